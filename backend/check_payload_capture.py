@@ -25,16 +25,17 @@ def check_payload_capture():
             print(f"  RequestID: {req.RequestID}")
             print(f"  Status: {req.StatusCode}")
             print(f"  Duration: {req.DurationMs}ms")
-            print(f"  RequestPayload: {'✅ CAPTURED' if req.RequestPayload else '❌ NULL'}")
-            print(f"  ResponsePayload: {'✅ CAPTURED' if req.ResponsePayload else '❌ NULL'}")
-            print(f"  Headers: {'✅ CAPTURED' if req.Headers else '❌ NULL'}")
+            payloads = req.decoded_payloads()
+            print(f"  RequestPayload: {'✅ CAPTURED' if payloads['RequestPayload'] else '❌ NULL'}")
+            print(f"  ResponsePayload: {'✅ CAPTURED' if payloads['ResponsePayload'] else '❌ NULL'}")
+            print(f"  Headers: {'✅ CAPTURED' if payloads['Headers'] else '❌ NULL'}")
             
-            if req.RequestPayload:
-                print(f"  RequestPayload Preview: {req.RequestPayload[:100]}...")
-            if req.ResponsePayload:
-                print(f"  ResponsePayload Preview: {req.ResponsePayload[:100]}...")
-            if req.Headers:
-                print(f"  Headers Preview: {req.Headers[:100]}...")
+            if payloads['RequestPayload']:
+                print(f"  RequestPayload Preview: {payloads['RequestPayload'][:100]}...")
+            if payloads['ResponsePayload']:
+                print(f"  ResponsePayload Preview: {payloads['ResponsePayload'][:100]}...")
+            if payloads['Headers']:
+                print(f"  Headers Preview: {payloads['Headers'][:100]}...")
         
         # Check configuration
         print("\n" + "=" * 60)
@@ -30,28 +30,29 @@ def check_payload_direct():
         print(f"Duration: {recent_request.DurationMs}ms")
         print()
         
+        payloads = recent_request.decoded_payloads()
         print("Payload Fields:")
-        print(f"  RequestPayload: {'✅ CAPTURED' if recent_request.RequestPayload else '❌ NULL'}")
-        print(f"  ResponsePayload: {'✅ CAPTURED' if recent_request.ResponsePayload else '❌ NULL'}")
-        print(f"  Headers: {'✅ CAPTURED' if recent_request.Headers else '❌ NULL'}")
+        print(f"  RequestPayload: {'✅ CAPTURED' if payloads['RequestPayload'] else '❌ NULL'}")
+        print(f"  ResponsePayload: {'✅ CAPTURED' if payloads['ResponsePayload'] else '❌ NULL'}")
+        print(f"  Headers: {'✅ CAPTURED' if payloads['Headers'] else '❌ NULL'}")
         print()
         
-        if recent_request.RequestPayload:
+        if payloads['RequestPayload']:
             print("Request Payload Preview:")
             print("-" * 40)
-            print(recent_request.RequestPayload[:500] + "..." if len(recent_request.RequestPayload) > 500 else recent_request.RequestPayload)
+            print(payloads['RequestPayload'][:500] + "..." if len(payloads['RequestPayload']) > 500 else payloads['RequestPayload'])
             print("-" * 40)
         
-        if recent_request.ResponsePayload:
+        if payloads['ResponsePayload']:
             print("Response Payload Preview:")
             print("-" * 40)
-            print(recent_request.ResponsePayload[:500] + "..." if len(recent_request.ResponsePayload) > 500 else recent_request.ResponsePayload)
+            print(payloads['ResponsePayload'][:500] + "..." if len(payloads['ResponsePayload']) > 500 else payloads['ResponsePayload'])
             print("-" * 40)
         
-        if recent_request.Headers:
+        if payloads['Headers']:
             print("Headers Preview:")
             print("-" * 40)
-            print(recent_request.Headers[:500] + "..." if len(recent_request.Headers) > 500 else recent_request.Headers)
+            print(payloads['Headers'][:500] + "..." if len(payloads['Headers']) > 500 else payloads['Headers'])
             print("-" * 40)
         
         # Check configuration
@@ -7,6 +7,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from .database_service import get_database_service
 from .db_utils import get_app_setting, get_performance_metrics
+from .payload_blobs import expand_payload_rows, query_blob_fetcher
 
 logger = logging.getLogger(__name__)
 
@@ -73,13 +74,16 @@ class AgentDatabaseHelpers:
             query = """
                 SELECT 
                     Method, Path, StatusCode, DurationMs, 
-                    RequestPayload, ResponsePayload, CreatedDate
+                    RequestPayload, ResponsePayload,
+                    RequestPayloadCompressed, ResponsePayloadCompressed,
+                    RequestPayloadBlobID, ResponsePayloadBlobID, CreatedDate
                 FROM log.ApiRequest 
                 WHERE UserID = ? 
                 AND CreatedDate >= DATEADD(hour, -?, GETUTCDATE())
                 ORDER BY CreatedDate DESC
             """
-            return self.db_service.execute_query(query, (user_id, hours))
+            rows = self.db_service.execute_query(query, (user_id, hours))
+            return expand_payload_rows(rows, query_blob_fetcher(self.db_service.execute_query))
         except Exception as e:
             logger.error(f"Failed to get user activity for user {user_id}: {e}")
             return []
@@ -90,33 +94,54 @@ class AgentDatabaseHelpers:
             query = """
                 SELECT 
                     Method, Path, StatusCode, DurationMs,
-                    RequestPayload, ResponsePayload, CreatedDate
+                    RequestPayload, ResponsePayload,
+                    RequestPayloadCompressed, ResponsePayloadCompressed,
+                    RequestPayloadBlobID, ResponsePayloadBlobID, CreatedDate
                 FROM log.ApiRequest 
                 WHERE (
                     Path LIKE ? OR 
                     RequestPayload LIKE ? OR 
-                    ResponsePayload LIKE ?
+                    ResponsePayload LIKE ? OR
+                    RequestPayloadCompressed IS NOT NULL OR
+                    ResponsePayloadCompressed IS NOT NULL OR
+                    RequestPayloadBlobID IS NOT NULL OR
+                    ResponsePayloadBlobID IS NOT NULL
                 )
                 AND CreatedDate >= DATEADD(hour, -?, GETUTCDATE())
                 ORDER BY CreatedDate DESC
             """
             search_term = f"%{epic_name}%"
-            return self.db_service.execute_query(query, (search_term, search_term, search_term, hours))
+            rows = self.db_service.execute_query(query, (search_term, search_term, search_term, hours))
+            # Compressed/deduplicated payloads can't be searched in SQL: match them after decoding
+            needle = epic_name.lower()
+            return [
+                row for row in expand_payload_rows(rows, query_blob_fetcher(self.db_service.execute_query))
+                if any(needle in (row.get(column) or "").lower() for column in ("Path", "RequestPayload", "ResponsePayload"))
+            ]
         except Exception as e:
             logger.error(f"Failed to get epic progress logs for {epic_name}: {e}")
             return []
     
     def get_performance_issues(self, threshold_ms: int = 1000) -> List[Dict[str, Any]]:
-        """Get API requests that exceeded performance threshold"""
+        """
+        Get endpoints whose slowest request exceeded the threshold (last 24h).
+
+        Reads the log analyzer's hourly log.EndpointSummary rows, one per
+        endpoint and hour, with the slowest request as the exemplar. Path is
+        the route template; StatusCode and UserID are not summarized (trace
+        the RequestID for them).
+        """
         try:
             query = """
                 SELECT 
-                    Method, Path, StatusCode, DurationMs,
-                    UserID, RequestID, CreatedDate
-                FROM log.ApiRequest 
-                WHERE DurationMs > ?
-                AND CreatedDate >= DATEADD(hour, -24, GETUTCDATE())
-                ORDER BY DurationMs DESC
+                    Method, PathTemplate AS Path, NULL AS StatusCode,
+                    MaxDurationMs AS DurationMs, NULL AS UserID,
+                    SlowestRequestID AS RequestID, SlowestAt AS CreatedDate,
+                    RequestCount, SlowCount
+                FROM log.EndpointSummary 
+                WHERE MaxDurationMs > ?
+                AND BucketStart >= DATEADD(hour, -24, GETUTCDATE())
+                ORDER BY MaxDurationMs DESC
             """
             return self.db_service.execute_query(query, (threshold_ms,))
         except Exception as e:
@@ -124,15 +149,16 @@ class AgentDatabaseHelpers:
             return []
     
     def get_error_patterns(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get error patterns for analysis"""
+        """Get error patterns for analysis (log analyzer's log.ErrorPatternSummary)"""
         try:
             query = """
                 SELECT 
                     ErrorType, 
-                    COUNT(*) as error_count,
-                    MAX(CreatedDate) as last_occurrence
-                FROM log.ApplicationError 
-                WHERE CreatedDate >= DATEADD(hour, -?, GETUTCDATE())
+                    SUM(OccurrenceCount) as error_count,
+                    MAX(LastSeen) as last_occurrence,
+                    COUNT(DISTINCT Fingerprint) as pattern_count
+                FROM log.ErrorPatternSummary 
+                WHERE BucketStart >= DATEADD(hour, -?, GETUTCDATE())
                 GROUP BY ErrorType
                 ORDER BY error_count DESC
             """
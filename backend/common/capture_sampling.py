@@ -0,0 +1,327 @@
+"""
+Payload Capture Sampling
+Tail-biased decision of which requests get their payloads captured
+
+Redacting, truncating and storing request/response bodies is the most
+expensive part of request logging, and almost nobody reads the payloads
+of fast 200s. The request logger therefore captures payloads for:
+
+    error      status >= 400 (always)
+    slow       duration >= logging.slow_request_ms (always)
+    override   a user/company listed in logging.capture_overrides, until
+               the entry's expiry (debugging a customer's session)
+    sampled    the rest at logging.payload_sample_rates[route template],
+               else logging.payload_sample_rate
+
+Every request still gets its log.ApiRequest row and rollup; only the
+payload columns are left empty when none of the above applies.
+
+The settings are read into an immutable CapturePolicy snapshot at most
+every PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS per process, so the per
+request decision is a few dict lookups and no database work. When the
+settings cannot be read the previous snapshot is kept (the constants'
+defaults before the first successful load).
+
+Environment variables:
+    PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS   Settings snapshot age (default: 30)
+
+Usage:
+    policy = capture_policy_cache.get()
+    if policy.is_candidate(path):
+        reason = policy.decide(route, status_code, duration_ms, user_id, company_id)
+
+    add_capture_override(db, user_id=42, minutes=60, updated_by=admin_id)
+"""
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from common.constants import (
+    DEFAULT_LOGGING_CAPTURE_OVERRIDES,
+    DEFAULT_LOGGING_CAPTURE_PAYLOADS,
+    DEFAULT_LOGGING_EXCLUDED_ENDPOINTS,
+    DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB,
+    DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE,
+    DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES,
+    DEFAULT_LOGGING_SLOW_REQUEST_MS,
+)
+from common.logger import get_logger
+from common.metrics import metrics_registry
+
+logger = get_logger(__name__)
+
+
+PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS = float(os.getenv("PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS", "30"))
+
+CAPTURE_OVERRIDES_SETTING = "logging.capture_overrides"
+
+capture_decisions = metrics_registry.counter(
+    "payload_capture_decisions_total",
+    "Payload capture decisions by reason (error, slow, override, sampled, skipped)",
+    ("reason",)
+)
+
+
+def _json_setting(value: Any, default: Any) -> Any:
+    """Settings seeded as 'string' arrive as JSON text; parse them"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            logger.warning(f"Invalid JSON setting value {value!r}, using default")
+            return default
+    return default if value is None else value
+
+
+def _rate(value: Any, default: float) -> float:
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _expiry(value: Any) -> Optional[datetime]:
+    """Naive UTC expiry from an ISO-8601 string"""
+    try:
+        expires = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if expires.tzinfo is not None:
+        expires = expires.astimezone(timezone.utc).replace(tzinfo=None)
+    return expires
+
+
+def _active_overrides(overrides: Any, now: datetime) -> Tuple[Dict[int, datetime], Dict[int, datetime]]:
+    """(user ID -> expiry, company ID -> expiry) for unexpired entries"""
+    users: Dict[int, datetime] = {}
+    companies: Dict[int, datetime] = {}
+    for entry in overrides if isinstance(overrides, list) else ():
+        if not isinstance(entry, dict):
+            continue
+        expires = _expiry(entry.get("expires"))
+        if expires is None or expires <= now:
+            continue
+        for key, target in (("user_id", users), ("company_id", companies)):
+            if entry.get(key) is not None:
+                try:
+                    subject = int(entry[key])
+                except (TypeError, ValueError):
+                    continue
+                target[subject] = max(expires, target.get(subject, expires))
+    return users, companies
+
+
+@dataclass(frozen=True)
+class CapturePolicy:
+    """Immutable snapshot of the payload capture settings"""
+    capture_payloads: bool = DEFAULT_LOGGING_CAPTURE_PAYLOADS
+    max_payload_size_kb: int = DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB
+    excluded_endpoints: Tuple[str, ...] = tuple(DEFAULT_LOGGING_EXCLUDED_ENDPOINTS)
+    sample_rate: float = DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE
+    route_sample_rates: Dict[str, float] = field(default_factory=dict)
+    slow_request_ms: int = DEFAULT_LOGGING_SLOW_REQUEST_MS
+    user_overrides: Dict[int, datetime] = field(default_factory=dict)
+    company_overrides: Dict[int, datetime] = field(default_factory=dict)
+
+    @classmethod
+    def from_settings(
+        cls,
+        capture_payloads: Any = DEFAULT_LOGGING_CAPTURE_PAYLOADS,
+        max_payload_size_kb: Any = DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB,
+        excluded_endpoints: Any = DEFAULT_LOGGING_EXCLUDED_ENDPOINTS,
+        sample_rate: Any = DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE,
+        route_sample_rates: Any = DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES,
+        slow_request_ms: Any = DEFAULT_LOGGING_SLOW_REQUEST_MS,
+        capture_overrides: Any = DEFAULT_LOGGING_CAPTURE_OVERRIDES,
+        now: Optional[datetime] = None
+    ) -> "CapturePolicy":
+        """Build a snapshot from raw setting values, normalising types"""
+        excluded = _json_setting(excluded_endpoints, DEFAULT_LOGGING_EXCLUDED_ENDPOINTS)
+        if isinstance(excluded, str):
+            excluded = [excluded]
+        rates = _json_setting(route_sample_rates, DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES)
+        overrides = _json_setting(capture_overrides, DEFAULT_LOGGING_CAPTURE_OVERRIDES)
+        users, companies = _active_overrides(overrides, now or datetime.utcnow())
+        try:
+            slow_ms = int(slow_request_ms)
+        except (TypeError, ValueError):
+            slow_ms = DEFAULT_LOGGING_SLOW_REQUEST_MS
+        try:
+            max_kb = int(max_payload_size_kb)
+        except (TypeError, ValueError):
+            max_kb = DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB
+        default_rate = _rate(sample_rate, DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE)
+        return cls(
+            capture_payloads=bool(capture_payloads),
+            max_payload_size_kb=max_kb,
+            excluded_endpoints=tuple(str(ep) for ep in excluded if ep),
+            sample_rate=default_rate,
+            route_sample_rates={
+                str(route): _rate(rate, default_rate)
+                for route, rate in (rates.items() if isinstance(rates, dict) else ())
+            },
+            slow_request_ms=slow_ms,
+            user_overrides=users,
+            company_overrides=companies,
+        )
+
+    def is_candidate(self, path: str) -> bool:
+        """Whether payloads of this path may be captured at all"""
+        return self.capture_payloads and not path.startswith(self.excluded_endpoints)
+
+    def decide(
+        self,
+        route: Optional[str],
+        status_code: int,
+        duration_ms: float,
+        user_id: Optional[int] = None,
+        company_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+        rand: Callable[[], float] = random.random
+    ) -> Optional[str]:
+        """
+        Reason to capture this request's payloads, or None to skip them.
+
+        Call after the response; the caller checks is_candidate() first.
+        """
+        if status_code >= 400:
+            reason = "error"
+        elif duration_ms >= self.slow_request_ms:
+            reason = "slow"
+        elif self._overridden(user_id, company_id, now):
+            reason = "override"
+        elif rand() < self.route_sample_rates.get(route, self.sample_rate):
+            reason = "sampled"
+        else:
+            capture_decisions.labels("skipped").inc()
+            return None
+        capture_decisions.labels(reason).inc()
+        return reason
+
+    def _overridden(self, user_id: Optional[int], company_id: Optional[int], now: Optional[datetime]) -> bool:
+        if not self.user_overrides and not self.company_overrides:
+            return False
+        now = now or datetime.utcnow()
+        for expires in (self.user_overrides.get(user_id), self.company_overrides.get(company_id)):
+            if expires is not None and expires > now:
+                return True
+        return False
+
+
+def load_capture_policy(db: Session) -> CapturePolicy:
+    """Read a CapturePolicy from config.AppSetting"""
+    from common.config_service import ConfigurationService
+
+    config = ConfigurationService(db)
+    return CapturePolicy.from_settings(
+        capture_payloads=config.get_logging_capture_payloads(),
+        max_payload_size_kb=config.get_logging_max_payload_size_kb(),
+        excluded_endpoints=config.get_logging_excluded_endpoints(),
+        sample_rate=config.get_logging_payload_sample_rate(),
+        route_sample_rates=config.get_logging_payload_sample_rates(),
+        slow_request_ms=config.get_logging_slow_request_ms(),
+        capture_overrides=config.get_logging_capture_overrides(),
+    )
+
+
+class CapturePolicyCache:
+    """
+    Process-wide CapturePolicy, reloaded at most every refresh_seconds.
+
+    Thread-safe. One caller reloads a stale snapshot while the others keep
+    using the current one; a failed reload keeps it too.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = None,
+        refresh_seconds: float = PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS
+    ):
+        self._session_factory = session_factory
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._policy: Optional[CapturePolicy] = None
+        self._loaded_at = 0.0
+
+    def get(self) -> CapturePolicy:
+        policy = self._policy
+        if policy is not None and time.monotonic() - self._loaded_at < self._refresh_seconds:
+            return policy
+        if not self._lock.acquire(blocking=policy is None):
+            return policy
+        try:
+            if self._policy is not None and time.monotonic() - self._loaded_at < self._refresh_seconds:
+                return self._policy
+            self._policy = self._load() or self._policy or CapturePolicy()
+            self._loaded_at = time.monotonic()
+            return self._policy
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        """Reload on the next get() (after changing the settings)"""
+        self._loaded_at = 0.0
+
+    def _load(self) -> Optional[CapturePolicy]:
+        if self._session_factory is None:
+            from common.database import LogSessionLocal
+            session_factory = LogSessionLocal
+        else:
+            session_factory = self._session_factory
+        try:
+            db = session_factory()
+            try:
+                return load_capture_policy(db)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error loading payload capture settings, keeping previous policy: {e}")
+            return None
+
+
+# Shared instance
+capture_policy_cache = CapturePolicyCache()
+
+
+def add_capture_override(
+    db: Session,
+    user_id: Optional[int] = None,
+    company_id: Optional[int] = None,
+    minutes: int = 60,
+    updated_by: Optional[int] = None
+) -> bool:
+    """
+    Capture every payload of a user or company for the next `minutes`.
+
+    Expired entries are pruned from logging.capture_overrides on the way.
+    Returns False if neither ID is given or the setting cannot be updated.
+    """
+    if user_id is None and company_id is None:
+        return False
+    from common.config_service import ConfigurationService
+
+    config = ConfigurationService(db)
+    now = datetime.utcnow()
+    overrides = _json_setting(config.get_logging_capture_overrides(), [])
+    kept = [
+        entry for entry in (overrides if isinstance(overrides, list) else [])
+        if isinstance(entry, dict) and (_expiry(entry.get("expires")) or now) > now
+    ]
+    entry: Dict[str, Any] = {"expires": (now + timedelta(minutes=minutes)).isoformat(timespec="seconds")}
+    if user_id is not None:
+        entry["user_id"] = int(user_id)
+    if company_id is not None:
+        entry["company_id"] = int(company_id)
+    kept.append(entry)
+
+    updated = config.update_setting(CAPTURE_OVERRIDES_SETTING, json.dumps(kept, separators=(",", ":")), updated_by)
+    if updated:
+        capture_policy_cache.invalidate()
+    return updated
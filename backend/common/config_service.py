@@ -12,6 +12,7 @@ from sqlalchemy import and_
 import json
 import logging
 
+from common.timing import span
 from models.config.app_setting import AppSetting
 from models.ref import SettingCategory, SettingType
 from common.constants import (
@@ -30,6 +31,12 @@ from common.constants import (
     DEFAULT_LOGGING_CAPTURE_PAYLOADS,
     DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB,
     DEFAULT_LOGGING_EXCLUDED_ENDPOINTS,
+    DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE,
+    DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES,
+    DEFAULT_LOGGING_SLOW_REQUEST_MS,
+    DEFAULT_LOGGING_CAPTURE_OVERRIDES,
+    DEFAULT_LOGGING_RETENTION_DAYS,
+    DEFAULT_LOGGING_ARCHIVE_EXPIRED,
 )
 
 logger = logging.getLogger(__name__)
@@ -126,7 +133,8 @@ class ConfigurationService:
                     SettingCategory.CategoryCode == category_code
                 )
             
-            setting = query.first()
+            with span("config", setting=setting_key):
+                setting = query.first()
             
             if setting:
                 # Type conversion based on SettingType
@@ -424,6 +432,93 @@ class ConfigurationService:
         )
     
     
+    def get_logging_payload_sample_rate(self) -> float:
+        """
+        Get the fraction of successful, fast requests whose payloads are captured.
+        
+        Returns:
+            Sample rate between 0 and 1 (default: 0.1)
+        """
+        return self.get_setting(
+            'logging.payload_sample_rate',
+            DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE,
+            'logging'
+        )
+    
+    
+    def get_logging_payload_sample_rates(self) -> dict:
+        """
+        Get per route template payload sample rates.
+        
+        Returns:
+            Dict of route template -> sample rate (default: {})
+        """
+        return self.get_setting(
+            'logging.payload_sample_rates',
+            DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES,
+            'logging'
+        )
+    
+    
+    def get_logging_slow_request_ms(self) -> int:
+        """
+        Get the latency from which request payloads are always captured.
+        
+        Returns:
+            Threshold in milliseconds (default: 1000)
+        """
+        return self.get_setting(
+            'logging.slow_request_ms',
+            DEFAULT_LOGGING_SLOW_REQUEST_MS,
+            'logging'
+        )
+    
+    
+    def get_logging_capture_overrides(self) -> list[dict]:
+        """
+        Get temporary full payload capture overrides for users/companies.
+        
+        Returns:
+            List of {"user_id" or "company_id", "expires"} dicts (default: [])
+        """
+        return self.get_setting(
+            'logging.capture_overrides',
+            DEFAULT_LOGGING_CAPTURE_OVERRIDES,
+            'logging'
+        )
+    
+    
+    def get_logging_retention_days(self, table_name: str) -> int:
+        """
+        Get how many days rows of a log table are kept.
+        
+        Args:
+            table_name: log schema table (e.g. 'ApiRequest')
+            
+        Returns:
+            Retention in days, 0 to keep forever (default: per-table, see constants)
+        """
+        return self.get_setting(
+            f'logging.retention_days.{table_name}',
+            DEFAULT_LOGGING_RETENTION_DAYS.get(table_name, 0),
+            'logging'
+        )
+    
+    
+    def get_logging_archive_expired(self) -> bool:
+        """
+        Get whether expired log rows are archived to files before deletion.
+        
+        Returns:
+            True to archive, False to delete only (default: True)
+        """
+        return self.get_setting(
+            'logging.archive_expired',
+            DEFAULT_LOGGING_ARCHIVE_EXPIRED,
+            'logging'
+        )
+    
+    
     # ========================================================================
     # ADMIN METHODS (Story 1.13 Task 9)
     # ========================================================================
@@ -51,6 +51,26 @@ DEFAULT_LOGGING_CAPTURE_PAYLOADS = True
 DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB = 10
 DEFAULT_LOGGING_EXCLUDED_ENDPOINTS = ["/api/health"]
 
+# Payload capture sampling (common.capture_sampling): errors and slow
+# requests are always captured, other requests at the sample rate
+DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATE = 0.1
+DEFAULT_LOGGING_PAYLOAD_SAMPLE_RATES = {}
+DEFAULT_LOGGING_SLOW_REQUEST_MS = 1000
+DEFAULT_LOGGING_CAPTURE_OVERRIDES = []
+
+# Log retention (days per log table, 0 = keep forever); overridden by
+# config.AppSetting 'logging.retention_days.<Table>'
+DEFAULT_LOGGING_RETENTION_DAYS = {
+    "ApiRequest": 30,
+    "ApplicationError": 90,
+    "AuthEvent": 365,
+    "EmailDelivery": 180,
+    "UserAction": 365,
+    "IntegrationEvent": 90,
+    "PerformanceMetric": 90,
+}
+DEFAULT_LOGGING_ARCHIVE_EXPIRED = True
+
 
 # ============================================================================
 # USER STATUS ENUMS (ref.UserStatus)
@@ -2,12 +2,15 @@
 Database Connection and Session Management
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 import logging
 
+from common.db_pool import PoolSettings, build_engine, instrument_engine
+
 logger = logging.getLogger(__name__)
 
 # Database URL from environment
@@ -16,20 +19,113 @@ DATABASE_URL = os.getenv(
     "mssql+pyodbc://localhost/EventLeadPlatform?driver=ODBC+Driver+18+for+SQL+Server&Trusted_Connection=Yes&TrustServerCertificate=yes"
 )
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Set to True for SQL query logging
-    pool_pre_ping=True,  # Test connections before using them
-    pool_recycle=3600,  # Recycle connections after 1 hour
-)
+# Request pool (DB_POOL_* environment variables, see common/db_pool.py)
+engine = build_engine(DATABASE_URL, name="app", settings=PoolSettings.from_env("DB_POOL"))
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Logging pool (DB_LOG_POOL_* environment variables)
+# Request logging, error logging and email delivery logs write through a small
+# dedicated pool so background log writes never compete with request sessions.
+# In-memory SQLite shares the app engine (a second engine would be a separate database).
+if make_url(DATABASE_URL).get_backend_name() == "sqlite":
+    log_engine = engine
+else:
+    log_engine = build_engine(
+        DATABASE_URL,
+        name="logging",
+        settings=PoolSettings.from_env("DB_LOG_POOL", pool_size=2, max_overflow=3, pool_timeout=5.0),
+    )
+
+LogSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=log_engine)
+
 # Base class for models
 Base = declarative_base()
 
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "mssql": "mssql+aioodbc",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Derive the asyncio driver URL for a sync DATABASE_URL.
+    
+    The host, credentials and query string (ODBC driver, TrustServerCertificate,
+    etc.) are preserved; only the driver part of the URL is swapped, so
+    `mssql+pyodbc://...` becomes `mssql+aioodbc://...` and `sqlite:///...`
+    becomes `sqlite+aiosqlite:///...`.
+    
+    Args:
+        url: Sync SQLAlchemy database URL
+        
+    Returns:
+        str: Equivalent asyncio database URL
+    """
+    parsed = make_url(url)
+    async_driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if async_driver is None:
+        raise ValueError(f"No async driver configured for database backend: {parsed.get_backend_name()}")
+    return parsed.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+# Async database URL (override with ASYNC_DATABASE_URL, otherwise derived from DATABASE_URL)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Created on first use so a missing async driver never breaks application import
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the shared async SQLAlchemy engine (created lazily).
+    
+    Returns:
+        AsyncEngine: Engine using the asyncio driver for ASYNC_DATABASE_URL
+    """
+    global _async_engine
+    if _async_engine is None:
+        settings = PoolSettings.from_env("DB_POOL")
+        pool_kwargs = {}
+        if make_url(ASYNC_DATABASE_URL).get_backend_name() != "sqlite":
+            pool_kwargs = {
+                "pool_size": settings.pool_size,
+                "max_overflow": settings.max_overflow,
+                "pool_timeout": settings.pool_timeout,
+            }
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=False,
+            pool_pre_ping=settings.pool_pre_ping,
+            pool_recycle=settings.pool_recycle,
+            **pool_kwargs
+        )
+        instrument_engine(_async_engine.sync_engine, "app_async", settings)
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Get the async session factory bound to the shared async engine.
+    
+    Returns:
+        async_sessionmaker: Factory producing AsyncSession instances
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_session_factory
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency function that provides a database session.
@@ -47,6 +143,26 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function that provides an async database session.
+    
+    Use this in `async def` route handlers so SQL round-trips are awaited
+    instead of blocking the event loop (the sync `get_db` session runs
+    pyodbc calls directly on the loop when used from an async handler).
+    
+    Lazy-loaded relationships are not available on AsyncSession - load what
+    the handler needs in the query (joins / selectinload), or use
+    `await db.run_sync(...)` for existing sync helpers.
+    
+    Usage:
+        @router.get("/endpoint")
+        async def endpoint(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(User))
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
 def test_connection() -> bool:
     """
     Test database connection
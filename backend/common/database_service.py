@@ -6,9 +6,10 @@ import pyodbc
 import logging
 from typing import Optional, Dict, Any
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from urllib.parse import quote_plus
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+
+from common.db_pool import PoolSettings, build_engine
 
 logger = logging.getLogger(__name__)
 
@@ -46,16 +47,14 @@ class DatabaseService:
         )
     
     def _create_engine(self):
-        """Create SQLAlchemy engine with optimized settings"""
+        """Create SQLAlchemy engine via the shared engine factory (DB_POOL_* settings)"""
         # Convert ODBC connection string to SQLAlchemy format
-        sqlalchemy_url = f"mssql+pyodbc:///?odbc_connect={self._connection_string}"
+        sqlalchemy_url = f"mssql+pyodbc:///?odbc_connect={quote_plus(self._connection_string)}"
         
-        return create_engine(
+        return build_engine(
             sqlalchemy_url,
-            poolclass=StaticPool,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            echo=False
+            name="database_service",
+            settings=PoolSettings.from_env("DB_POOL")
         )
     
     @property
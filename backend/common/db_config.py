@@ -47,6 +47,14 @@ HEALTH_CHECK_QUERIES = {
     'connection_count': "SELECT COUNT(*) FROM sys.dm_exec_sessions WHERE database_id = DB_ID()"
 }
 
+# Log tables and their unique ID column (keyset pagination tie-breaker)
+LOG_TABLE_ID_COLUMNS = {
+    'log.ApiRequest': 'ApiRequestID',
+    'log.AuthEvent': 'AuthEventID',
+    'log.ApplicationError': 'ApplicationErrorID',
+    'log.EmailDelivery': 'EmailDeliveryID',
+}
+
 # Common Query Templates
 QUERY_TEMPLATES = {
     'get_setting': """
@@ -71,6 +79,24 @@ QUERY_TEMPLATES = {
         WHERE UserID = ? 
         AND CreatedDate >= DATEADD(hour, -{hours}, GETUTCDATE())
         ORDER BY CreatedDate DESC
+    """,
+    # Keyset pagination over (CreatedDate, ID) - first page / subsequent pages
+    'get_logs_page_first': """
+        SELECT TOP (?) * 
+        FROM {table} 
+        ORDER BY CreatedDate DESC, {id_column} DESC
+    """,
+    'get_logs_page_after': """
+        SELECT TOP (?) * 
+        FROM {table} 
+        WHERE CreatedDate < ? OR (CreatedDate = ? AND {id_column} < ?)
+        ORDER BY CreatedDate DESC, {id_column} DESC
+    """,
+    # Approximate row count from partition metadata (no table scan)
+    'get_approximate_row_count': """
+        SELECT SUM(row_count) 
+        FROM sys.dm_db_partition_stats 
+        WHERE object_id = OBJECT_ID(?) AND index_id IN (0, 1)
     """
 }
 
@@ -0,0 +1,384 @@
+"""
+Database Engine Factory and Connection Pool Instrumentation
+
+Single place where SQLAlchemy engines are built, so pool sizing and pre-ping
+policy are configured once (environment variables) instead of per call site.
+
+Every engine built here is instrumented with pool event hooks that track:
+- Checkout latency (time spent waiting for a pooled connection)
+- In-use (checked out) and overflow connection counts
+- Checkout timeouts (pool exhaustion)
+- Long-held connections, logged with the acquiring stack and request ID
+
+Configuration (per pool prefix, e.g. DB_POOL_* for the app pool and
+DB_LOG_POOL_* for the logging pool):
+    {PREFIX}_SIZE                 Persistent connections per worker (default 5)
+    {PREFIX}_MAX_OVERFLOW         Extra connections allowed under burst (default 10)
+    {PREFIX}_TIMEOUT              Seconds to wait for a connection (default 30)
+    {PREFIX}_RECYCLE              Recycle connections after N seconds (default 3600)
+    {PREFIX}_PRE_PING             Test connections on checkout (default true)
+    {PREFIX}_LONG_HELD_SECONDS    Warn when a connection is held longer (default 5)
+    {PREFIX}_CAPTURE_STACK        Record acquiring stack on checkout (default true)
+
+Usage:
+    from common.db_pool import build_engine, get_pool_stats
+
+    engine = build_engine(DATABASE_URL, name="app")
+    stats = get_pool_stats()["app"]
+"""
+import os
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from common.logger import get_logger
+from common.request_context import get_current_request_context
+
+logger = get_logger(__name__)
+
+
+def _env_bool(value: Optional[str], default: bool) -> bool:
+    """Parse a boolean environment value ('true', '1', 'yes')"""
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "1", "yes")
+
+
+@dataclass
+class PoolSettings:
+    """
+    Connection pool policy for one engine.
+
+    Attributes:
+        pool_size: Persistent connections kept in the pool
+        max_overflow: Additional connections allowed beyond pool_size
+        pool_timeout: Seconds to wait for a connection before TimeoutError
+        pool_recycle: Seconds after which connections are recycled
+        pool_pre_ping: Test connection liveness on checkout
+        long_held_seconds: Held-duration threshold for long-held warnings
+        capture_stack: Record the acquiring stack on every checkout
+    """
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 3600
+    pool_pre_ping: bool = True
+    long_held_seconds: float = 5.0
+    capture_stack: bool = True
+
+    @classmethod
+    def from_env(cls, prefix: str = "DB_POOL", **defaults: Any) -> "PoolSettings":
+        """
+        Build settings from environment variables with the given prefix.
+
+        Args:
+            prefix: Environment variable prefix (e.g. 'DB_POOL', 'DB_LOG_POOL')
+            **defaults: Overrides for the class defaults (used when a variable is unset)
+
+        Returns:
+            PoolSettings instance
+        """
+        base = cls(**defaults)
+        env = os.getenv
+        return cls(
+            pool_size=int(env(f"{prefix}_SIZE", base.pool_size)),
+            max_overflow=int(env(f"{prefix}_MAX_OVERFLOW", base.max_overflow)),
+            pool_timeout=float(env(f"{prefix}_TIMEOUT", base.pool_timeout)),
+            pool_recycle=int(env(f"{prefix}_RECYCLE", base.pool_recycle)),
+            pool_pre_ping=_env_bool(env(f"{prefix}_PRE_PING"), base.pool_pre_ping),
+            long_held_seconds=float(env(f"{prefix}_LONG_HELD_SECONDS", base.long_held_seconds)),
+            capture_stack=_env_bool(env(f"{prefix}_CAPTURE_STACK"), base.capture_stack),
+        )
+
+
+class PoolMonitor:
+    """
+    Collects pool statistics for one engine via pool events.
+
+    Checkout/checkin bookkeeping is keyed by the DBAPI connection record, so
+    the set of currently held connections (with request ID, acquiring stack
+    and hold start time) is always available for exhaustion diagnostics.
+    """
+
+    def __init__(self, name: str, settings: PoolSettings):
+        self.name = name
+        self.settings = settings
+        self.pool = None
+        self._lock = threading.Lock()
+        self._held: Dict[int, Dict[str, Any]] = {}
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.long_held_count = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.held_max_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Event handlers
+    # ------------------------------------------------------------------
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        context = get_current_request_context()
+        stack = None
+        if self.settings.capture_stack:
+            # Drop the SQLAlchemy/pool frames at the top of the stack
+            stack = "".join(traceback.format_stack(limit=25)[:-4])
+        with self._lock:
+            self._held[id(connection_record)] = {
+                "checked_out_at": time.monotonic(),
+                "request_id": context.request_id if context else None,
+                "thread": threading.current_thread().name,
+                "stack": stack,
+            }
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            holder = self._held.pop(id(connection_record), None)
+        if holder is None:
+            return
+        held_ms = (time.monotonic() - holder["checked_out_at"]) * 1000
+        with self._lock:
+            self.held_max_ms = max(self.held_max_ms, held_ms)
+        if held_ms >= self.settings.long_held_seconds * 1000:
+            with self._lock:
+                self.long_held_count += 1
+            logger.warning(
+                f"Long-held DB connection on pool '{self.name}': held {held_ms:.0f}ms "
+                f"(threshold {self.settings.long_held_seconds:.1f}s), "
+                f"request_id={holder['request_id']}, thread={holder['thread']}\n"
+                f"Acquired at:\n{holder['stack'] or '(stack capture disabled)'}"
+            )
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+            self._held.pop(id(connection_record), None)
+
+    # ------------------------------------------------------------------
+    # Checkout latency / exhaustion (called by InstrumentedQueuePool)
+    # ------------------------------------------------------------------
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def record_timeout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+        holders = self.current_holders()
+        details = "\n".join(
+            f"  - request_id={h['request_id']}, thread={h['thread']}, held {h['held_ms']:.0f}ms\n"
+            f"{h['stack'] or '    (stack capture disabled)'}"
+            for h in holders
+        )
+        logger.error(
+            f"DB pool '{self.name}' exhausted: no connection after {wait_ms:.0f}ms "
+            f"({len(holders)} in use, size={self.settings.pool_size}, "
+            f"max_overflow={self.settings.max_overflow}). Current holders:\n{details}"
+        )
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def current_holders(self) -> List[Dict[str, Any]]:
+        """
+        Get currently checked-out connections, longest-held first.
+
+        Returns:
+            List of dicts with request_id, thread, held_ms and stack
+        """
+        now = time.monotonic()
+        with self._lock:
+            holders = [
+                {
+                    "request_id": h["request_id"],
+                    "thread": h["thread"],
+                    "held_ms": round((now - h["checked_out_at"]) * 1000, 1),
+                    "stack": h["stack"],
+                }
+                for h in self._held.values()
+            ]
+        return sorted(holders, key=lambda h: h["held_ms"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of pool statistics.
+
+        Returns:
+            Dictionary with sizing, usage and latency figures
+        """
+        pool = self.pool
+        with self._lock:
+            checkouts = self.checkouts
+            snapshot = {
+                "pool": self.name,
+                "pool_size": self.settings.pool_size,
+                "max_overflow": self.settings.max_overflow,
+                "in_use": len(self._held),
+                "checkouts": checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": round(self.wait_total_ms / checkouts, 3) if checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.wait_max_ms, 3),
+                "held_max_ms": round(self.held_max_ms, 1),
+                "long_held_count": self.long_held_count,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+        if isinstance(pool, QueuePool):
+            snapshot["idle"] = pool.checkedin()
+            snapshot["overflow"] = max(pool.overflow(), 0)
+        return snapshot
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that reports checkout wait time and exhaustion to a PoolMonitor.
+
+    Pool events fire after a connection has been obtained, so the wait itself
+    is measured around connect().
+    """
+
+    monitor: Optional[PoolMonitor] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.monitor is not None:
+                self.monitor.record_timeout((time.perf_counter() - start) * 1000)
+            raise
+        if self.monitor is not None:
+            self.monitor.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.monitor = self.monitor
+        if self.monitor is not None:
+            self.monitor.pool = new_pool
+        return new_pool
+
+
+# Registered monitors by pool name
+_monitors: Dict[str, PoolMonitor] = {}
+
+
+def instrument_engine(engine: Engine, name: str, settings: PoolSettings) -> PoolMonitor:
+    """
+    Attach pool event hooks to an engine and register its monitor.
+
+    Args:
+        engine: Engine to instrument
+        name: Pool name used in stats and log messages
+        settings: Pool settings (long-held threshold, stack capture)
+
+    Returns:
+        PoolMonitor for the engine
+    """
+    monitor = PoolMonitor(name, settings)
+    monitor.pool = engine.pool
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.monitor = monitor
+
+    event.listen(engine, "connect", monitor.on_connect)
+    event.listen(engine, "checkout", monitor.on_checkout)
+    event.listen(engine, "checkin", monitor.on_checkin)
+    event.listen(engine, "invalidate", monitor.on_invalidate)
+
+    _monitors[name] = monitor
+    return monitor
+
+
+def build_engine(
+    url: str,
+    name: str = "app",
+    settings: Optional[PoolSettings] = None,
+    **engine_kwargs: Any
+) -> Engine:
+    """
+    Create an instrumented SQLAlchemy engine with the configured pool policy.
+
+    In-memory SQLite (tests, local tooling) uses a StaticPool because each
+    new connection would otherwise see an empty database; all other URLs use
+    an InstrumentedQueuePool sized from `settings`.
+
+    Args:
+        url: Database URL
+        name: Pool name for stats/logging (e.g. 'app', 'logging')
+        settings: Pool settings (default: PoolSettings.from_env('DB_POOL'))
+        **engine_kwargs: Extra create_engine arguments (e.g. echo)
+
+    Returns:
+        Engine instance
+    """
+    settings = settings or PoolSettings.from_env("DB_POOL")
+    parsed = make_url(url)
+    engine_kwargs.setdefault("echo", False)
+
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        engine = create_engine(
+            url,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            **engine_kwargs
+        )
+    else:
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+            pool_pre_ping=settings.pool_pre_ping,
+            **engine_kwargs
+        )
+
+    instrument_engine(engine, name, settings)
+    logger.info(
+        f"Database engine '{name}' created: pool_size={settings.pool_size}, "
+        f"max_overflow={settings.max_overflow}, timeout={settings.pool_timeout}s, "
+        f"pre_ping={settings.pool_pre_ping}"
+    )
+    return engine
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every engine built by build_engine().
+
+    Returns:
+        Dictionary of pool name -> stats snapshot
+    """
+    return {name: monitor.stats() for name, monitor in _monitors.items()}
+
+
+def get_pool_holders(name: str) -> List[Dict[str, Any]]:
+    """
+    Get the connections currently held from a pool (exhaustion diagnostics).
+
+    Args:
+        name: Pool name
+
+    Returns:
+        List of holders (request_id, thread, held_ms, stack), longest first
+    """
+    monitor = _monitors.get(name)
+    return monitor.current_holders() if monitor else []
@@ -6,10 +6,23 @@ import logging
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime, timedelta
 from .database_service import get_database_service, get_session_context
-from .db_config import get_query_template, get_health_check_query
+from .db_config import get_query_template, get_health_check_query, LOG_TABLE_ID_COLUMNS
+from .payload_blobs import expand_payload_rows, query_blob_fetcher
+from .request_rollup import performance_summary, endpoint_performance
+from .log_diagnostics import get_trace
+from schemas.base import decode_cursor, CursorPage, total_count_cache
 
 logger = logging.getLogger(__name__)
 
+# log_diagnostics source table -> get_correlation_analysis key
+CORRELATION_KEYS = {
+    "ApiRequest": "api_requests",
+    "ApplicationError": "application_errors",
+    "AuthEvent": "auth_events",
+    "UserAction": "user_actions",
+    "IntegrationEvent": "integration_events",
+}
+
 class DatabaseUtils:
     """Utility class for common database operations"""
     
@@ -45,6 +58,10 @@ class DatabaseUtils:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    def _decode_payloads(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Expand log.ApiRequest payload blobs / compressed columns to text (other rows unchanged)"""
+        return expand_payload_rows(rows, query_blob_fetcher(self.db_service.execute_query))
+    
     def get_app_setting(self, setting_key: str, default_value: Any = None) -> Any:
         """Get application setting from config.AppSetting"""
         try:
@@ -62,16 +79,70 @@ class DatabaseUtils:
                 limit=limit, 
                 table=table
             )
-            return self.db_service.execute_query(query)
+            return self._decode_payloads(self.db_service.execute_query(query))
         except Exception as e:
             logger.error(f"Failed to get recent logs from {table}: {e}")
             return []
     
+    def get_logs_page(
+        self,
+        table: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        include_total: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get one page of logs, newest first, using keyset pagination.
+        
+        Seeks on (CreatedDate, <Table>ID) so deep pages cost the same as the
+        first one. The optional total is an approximate row count from
+        partition metadata, cached for 60 seconds.
+        
+        Args:
+            table: Log table (one of LOG_TABLE_ID_COLUMNS, e.g. 'log.ApiRequest')
+            cursor: Cursor from the previous page's next_cursor (None for first page)
+            limit: Rows per page
+            include_total: Whether to include an approximate total
+            
+        Returns:
+            Dictionary with items, next_cursor, has_more, limit, total, total_is_estimate
+            
+        Raises:
+            ValueError: If the table is not a known log table or the cursor is invalid
+        """
+        id_column = LOG_TABLE_ID_COLUMNS.get(table)
+        if id_column is None:
+            raise ValueError(f"Unsupported log table: {table}")
+        
+        if cursor:
+            created_date, last_id = decode_cursor(cursor, expected_length=2)
+            query = get_query_template('get_logs_page_after').format(table=table, id_column=id_column)
+            rows = self.db_service.execute_query(query, (limit + 1, created_date, created_date, last_id))
+        else:
+            query = get_query_template('get_logs_page_first').format(table=table, id_column=id_column)
+            rows = self.db_service.execute_query(query, (limit + 1,))
+        
+        total = None
+        if include_total:
+            total, _ = total_count_cache.get_or_compute(
+                ("logs", table),
+                lambda: self.db_service.execute_scalar(get_query_template('get_approximate_row_count'), (table,))
+            )
+        
+        page = CursorPage.from_rows(
+            self._decode_payloads(rows),
+            limit,
+            key=lambda row: (row["CreatedDate"], row[id_column]),
+            total=total,
+            total_is_estimate=total is not None
+        )
+        return page.model_dump()
+    
     def get_logs_by_request_id(self, request_id: str) -> List[Dict[str, Any]]:
         """Get all logs for a specific request ID"""
         try:
             query = get_query_template('get_logs_by_request_id')
-            return self.db_service.execute_query(query, (request_id,))
+            return self._decode_payloads(self.db_service.execute_query(query, (request_id,)))
         except Exception as e:
             logger.error(f"Failed to get logs for request {request_id}: {e}")
             return []
@@ -98,75 +169,61 @@ class DatabaseUtils:
                     RequestPayload,
                     ResponsePayload,
                     Headers,
+                    RequestPayloadCompressed,
+                    ResponsePayloadCompressed,
+                    HeadersCompressed,
+                    RequestPayloadBlobID,
+                    ResponsePayloadBlobID,
+                    HeadersBlobID,
                     CreatedDate
                 FROM log.ApiRequest 
                 WHERE CreatedDate >= DATEADD(hour, -?, GETUTCDATE())
-                AND (RequestPayload IS NOT NULL OR ResponsePayload IS NOT NULL)
+                AND (RequestPayload IS NOT NULL OR ResponsePayload IS NOT NULL
+                     OR RequestPayloadCompressed IS NOT NULL OR ResponsePayloadCompressed IS NOT NULL
+                     OR RequestPayloadBlobID IS NOT NULL OR ResponsePayloadBlobID IS NOT NULL)
                 ORDER BY CreatedDate DESC
             """
-            return self.db_service.execute_query(query, (hours,))
+            return self._decode_payloads(self.db_service.execute_query(query, (hours,)))
         except Exception as e:
             logger.error(f"Failed to get payload logs: {e}")
             return []
     
     def get_performance_metrics(self, hours: int = 24) -> Dict[str, Any]:
-        """Get performance metrics from API logs"""
+        """Get performance metrics from the API request rollup (log.ApiRequestRollup)"""
         try:
-            query = """
-                SELECT 
-                    COUNT(*) as total_requests,
-                    AVG(CAST(DurationMs AS FLOAT)) as avg_duration_ms,
-                    MAX(DurationMs) as max_duration_ms,
-                    MIN(DurationMs) as min_duration_ms,
-                    COUNT(CASE WHEN StatusCode >= 400 THEN 1 END) as error_count
-                FROM log.ApiRequest 
-                WHERE CreatedDate >= DATEADD(hour, -?, GETUTCDATE())
-            """
-            result = self.db_service.execute_query(query, (hours,))
-            
-            if result:
-                return result[0]
-            else:
-                return {
-                    "total_requests": 0,
-                    "avg_duration_ms": 0,
-                    "max_duration_ms": 0,
-                    "min_duration_ms": 0,
-                    "error_count": 0
-                }
+            with get_session_context() as session:
+                return performance_summary(session, hours)
         except Exception as e:
             logger.error(f"Failed to get performance metrics: {e}")
             return {}
     
-    def get_correlation_analysis(self, request_id: str) -> Dict[str, Any]:
-        """Get correlation analysis for a specific request"""
+    def get_endpoint_performance(self, hours: int = 24, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get per-route performance metrics from the API request rollup, busiest first"""
         try:
-            # Get API request
-            api_query = """
-                SELECT * FROM log.ApiRequest 
-                WHERE RequestID = ?
-            """
-            api_logs = self.db_service.execute_query(api_query, (request_id,))
-            
-            # Get auth events
-            auth_query = """
-                SELECT * FROM log.AuthEvent 
-                WHERE RequestID = ?
-            """
-            auth_logs = self.db_service.execute_query(auth_query, (request_id,))
-            
-            # Get application errors
-            error_query = """
-                SELECT * FROM log.ApplicationError 
-                WHERE RequestID = ?
-            """
-            error_logs = self.db_service.execute_query(error_query, (request_id,))
-            
+            with get_session_context() as session:
+                return endpoint_performance(session, hours, limit)
+        except Exception as e:
+            logger.error(f"Failed to get endpoint performance: {e}")
+            return []
+    
+    def get_correlation_analysis(self, request_id: str, hours: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get correlation analysis for a specific request.
+
+        One indexed UNION ALL query over the log tables (common.log_diagnostics);
+        entries carry summary columns only - load payloads with
+        log_diagnostics.fetch_payloads().
+        """
+        try:
+            start = datetime.utcnow() - timedelta(hours=hours) if hours is not None else None
+            with get_session_context() as session:
+                entries = get_trace(session, request_id, start=start)
+            grouped: Dict[str, List[Dict[str, Any]]] = {key: [] for key in CORRELATION_KEYS.values()}
+            for entry in entries:
+                grouped[CORRELATION_KEYS[entry.source]].append(entry.to_dict())
             return {
                 "request_id": request_id,
-                "api_requests": api_logs,
-                "auth_events": auth_logs,
-                "application_errors": error_logs,
+                **grouped,
                 "timestamp": datetime.utcnow().isoformat()
             }
         except Exception as e:
@@ -190,6 +247,10 @@ def get_recent_logs(table: str, limit: int = 10) -> List[Dict[str, Any]]:
     """Get recent logs"""
     return db_utils.get_recent_logs(table, limit)
 
+def get_logs_page(table: str, cursor: Optional[str] = None, limit: int = 50, include_total: bool = False) -> Dict[str, Any]:
+    """Get one keyset-paginated page of logs"""
+    return db_utils.get_logs_page(table, cursor, limit, include_total)
+
 def get_payload_logs(hours: int = 24) -> List[Dict[str, Any]]:
     """Get logs with payload data"""
     return db_utils.get_payload_logs(hours)
@@ -197,3 +258,11 @@ def get_payload_logs(hours: int = 24) -> List[Dict[str, Any]]:
 def get_performance_metrics(hours: int = 24) -> Dict[str, Any]:
     """Get performance metrics"""
     return db_utils.get_performance_metrics(hours)
+
+def get_endpoint_performance(hours: int = 24, limit: int = 20) -> List[Dict[str, Any]]:
+    """Get per-route performance metrics"""
+    return db_utils.get_endpoint_performance(hours, limit)
+
+def get_correlation_analysis(request_id: str, hours: Optional[float] = None) -> Dict[str, Any]:
+    """Get everything logged for one request"""
+    return db_utils.get_correlation_analysis(request_id, hours)
@@ -0,0 +1,138 @@
+"""
+Geohash Utilities
+Encode coordinates as geohash strings and cover bounding boxes with cells
+
+A geohash prefix is a rectangle, and every point inside it has a geohash
+starting with that prefix, so a B-tree index on the geohash column answers
+"points in this rectangle" with a few range seeks (GeoHash >= 'cell' AND
+GeoHash < 'cell~') instead of scanning latitude/longitude.
+"""
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Sorts after every base32 character: cell <= geohash < cell + CELL_END
+CELL_END = "~"
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude: float, longitude: float, precision: int = 8) -> str:
+    """
+    Geohash of a point.
+
+    Args:
+        latitude: -90..90
+        longitude: -180..180
+        precision: Characters (8 ~ 38m x 19m)
+
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if target >= mid:
+            value = (value << 1) | 1
+            bounds[0] = mid
+        else:
+            value <<= 1
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) of a cell in degrees"""
+    lat_bits = (5 * precision) // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _cover(min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int, max_cells: int) -> Optional[List[str]]:
+    height, width = cell_size(precision)
+    rows = int(180.0 / height)
+    columns = int(360.0 / width)
+    i0 = min(int((min_lat + 90.0) / height), rows - 1)
+    i1 = min(int((max_lat + 90.0) / height), rows - 1)
+    j0 = min(int((min_lon + 180.0) / width), columns - 1)
+    j1 = min(int((max_lon + 180.0) / width), columns - 1)
+    if (i1 - i0 + 1) * (j1 - j0 + 1) > max_cells:
+        return None
+    return sorted({
+        encode(-90.0 + (i + 0.5) * height, -180.0 + (j + 0.5) * width, precision)
+        for i in range(i0, i1 + 1)
+        for j in range(j0, j1 + 1)
+    })
+
+
+def covering_cells(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    max_precision: int = 8,
+    max_cells: int = 16
+) -> List[str]:
+    """
+    Geohash cells whose union covers a bounding box.
+
+    Uses the finest precision (<= max_precision) needing at most max_cells
+    cells per box, so a query does a handful of index seeks while reading
+    little outside the box. A box crossing the antimeridian (min_lon >
+    max_lon) is split in two.
+
+    Returns:
+        Sorted cell prefixes ([] means the whole world: no geohash filter)
+    """
+    if min_lon > max_lon:
+        return sorted(set(
+            covering_cells(min_lat, min_lon, max_lat, 180.0, max_precision, max_cells)
+            + covering_cells(min_lat, -180.0, max_lat, max_lon, max_precision, max_cells)
+        ))
+    for precision in range(max_precision, 0, -1):
+        cells = _cover(min_lat, min_lon, max_lat, max_lon, precision, max_cells)
+        if cells is not None:
+            return cells
+    return []
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Bounding box (min_lat, min_lon, max_lat, max_lon) enclosing a circle.
+
+    Longitude wraps (min_lon > max_lon across the antimeridian); near the
+    poles the box spans every longitude.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(-90.0, latitude - lat_delta)
+    max_lat = min(90.0, latitude + lat_delta)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, -180.0, max_lat, 180.0
+    lon_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    if lon_delta >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lon = (longitude - lon_delta + 540.0) % 360.0 - 180.0
+    max_lon = (longitude + lon_delta + 540.0) % 360.0 - 180.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,712 @@
+"""
+Log Analyzer
+Incremental slow-endpoint and error-pattern summaries from the log tables
+
+Slow-request and error-pattern reports used to scan log.ApiRequest and
+log.ApplicationError on every call. Instead a periodic job folds new rows
+into hourly summary tables:
+
+1. Read the next LOG_ANALYZER_BATCH_SIZE rows past the table's watermark
+   (log.LogAnalyzerWatermark), in primary key order - a range seek on the
+   clustered index. Rows younger than LOG_ANALYZER_SETTLE_SECONDS wait for
+   the next run, so a row committed late with a lower ID is not skipped
+2. Normalize paths to route templates ('/api/companies/123/invitations' ->
+   '/api/companies/{company_id}/invitations') and errors to fingerprints
+   (type, route, raising function and message with values replaced)
+3. Additively upsert log.EndpointSummary (count, slow, 5xx, duration sum,
+   max and the slowest request) and log.ErrorPatternSummary (occurrences,
+   first/last seen, last request), per hour
+4. Advance the watermark in the same transaction with a compare-and-set on
+   the old value: a second analyzer process that read the same batch rolls
+   back instead of counting it twice
+
+Reports (slowest_endpoints, error_patterns) read only the summary tables.
+On its first run the analyzer starts LOG_ANALYZER_BACKFILL_HOURS back.
+"Slow" is logging.slow_request_ms, the same threshold payload capture uses.
+
+Environment variables:
+    LOG_ANALYZER_ENABLED            Run the analyzer worker (default: true)
+    LOG_ANALYZER_INTERVAL_SECONDS   Time between runs (default: 60)
+    LOG_ANALYZER_BATCH_SIZE         Rows read per transaction (default: 5000)
+    LOG_ANALYZER_MAX_BATCHES_PER_RUN  Batches per table per run (default: 20)
+    LOG_ANALYZER_SETTLE_SECONDS     Age before a row is analyzed (default: 5)
+    LOG_ANALYZER_BACKFILL_HOURS     History analyzed on the first run (default: 24)
+
+Usage:
+    route_normalizer.set_templates(route.path for route in app.routes)
+
+    results = run_log_analyzer(db)
+
+    endpoints = slowest_endpoints(db, hours=24, limit=20)
+    patterns = error_patterns(db, hours=24, limit=20)
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from common.database import LogSessionLocal
+from common.logger import get_logger
+from common.request_rollup import HOUR, MAX_PATH_TEMPLATE_LENGTH, bucket_start
+from middleware.metrics import UNMATCHED_ROUTE
+from models.log import ApiRequest, ApplicationError, EndpointSummary, ErrorPatternSummary, LogAnalyzerWatermark
+
+logger = get_logger(__name__)
+
+
+LOG_ANALYZER_ENABLED = os.getenv("LOG_ANALYZER_ENABLED", "true").lower() in ("true", "1", "yes")
+LOG_ANALYZER_INTERVAL_SECONDS = float(os.getenv("LOG_ANALYZER_INTERVAL_SECONDS", "60"))
+LOG_ANALYZER_BATCH_SIZE = int(os.getenv("LOG_ANALYZER_BATCH_SIZE", "5000"))
+LOG_ANALYZER_MAX_BATCHES_PER_RUN = int(os.getenv("LOG_ANALYZER_MAX_BATCHES_PER_RUN", "20"))
+LOG_ANALYZER_SETTLE_SECONDS = float(os.getenv("LOG_ANALYZER_SETTLE_SECONDS", "5"))
+LOG_ANALYZER_BACKFILL_HOURS = float(os.getenv("LOG_ANALYZER_BACKFILL_HOURS", "24"))
+
+# ErrorPatternSummary column lengths
+MAX_MESSAGE_TEMPLATE_LENGTH = 500
+MAX_LOCATION_LENGTH = 200
+
+ENDPOINT_ORDERS = ("max", "avg", "slow")
+
+
+# ----------------------------------------------------------------------------
+# Normalization
+# ----------------------------------------------------------------------------
+
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_TOKEN_RE = re.compile(r"^(?=.*\d)[A-Za-z0-9_\-]{20,}$")
+_HEX_RE = re.compile(r"^[0-9a-fA-F]{16,}$")
+
+
+def _segment_placeholder(segment: str) -> str:
+    if segment.isdigit():
+        return "{id}"
+    if _UUID_RE.match(segment):
+        return "{uuid}"
+    if "@" in segment:
+        return "{email}"
+    if _HEX_RE.match(segment) or _TOKEN_RE.match(segment):
+        return "{token}"
+    return segment
+
+
+def normalize_path(path: str) -> str:
+    """
+    Route-like template of a raw path, from its segments alone.
+
+    Numeric IDs, UUIDs, emails and long tokens become {id}, {uuid}, {email}
+    and {token}; the query string and a trailing slash are dropped.
+    """
+    path = (path or "/").split("?", 1)[0]
+    segments = [_segment_placeholder(segment) for segment in path.strip("/").split("/") if segment]
+    return ("/" + "/".join(segments))[:MAX_PATH_TEMPLATE_LENGTH]
+
+
+def _template_regex(template: str):
+    pattern = ""
+    for part in re.split(r"(\{[^}]+\})", template.rstrip("/") or "/"):
+        if part.startswith("{") and part.endswith("}"):
+            pattern += ".+" if part.endswith(":path}") else "[^/]+"
+        else:
+            pattern += re.escape(part)
+    return re.compile(f"^{pattern}/?$")
+
+
+class RouteNormalizer:
+    """
+    Maps raw request paths to the application's route templates.
+
+    With templates set (the app's route paths), a path gets the first
+    matching template - routes with fewer parameters win, so '/api/events/search'
+    is not reported as '/api/events/{event_id}' - and UNMATCHED_ROUTE when
+    none matches (404 scans). Without templates, normalize_path() is used.
+    Results are cached per heuristic form of the path (bounded LRU).
+    """
+
+    def __init__(self, templates: Iterable[str] = (), cache_size: int = 10000):
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._routes: List[Tuple[re.Pattern, str]] = []
+        self.set_templates(templates)
+
+    def set_templates(self, templates: Iterable[str]) -> None:
+        """Replace the known route templates (e.g. route.path for app.routes)"""
+        unique = sorted(
+            {t for t in templates if t and t.startswith("/")},
+            key=lambda t: (t.count("{"), -len(t), t)
+        )
+        with self._lock:
+            self._routes = [(_template_regex(t), t[:MAX_PATH_TEMPLATE_LENGTH]) for t in unique]
+            self._cache.clear()
+
+    def template(self, path: str) -> str:
+        """Route template of a raw path"""
+        key = normalize_path(path)
+        if not self._routes:
+            return key
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            routes = self._routes
+        raw = (path or "/").split("?", 1)[0]
+        result = next((template for regex, template in routes if regex.match(raw)), UNMATCHED_ROUTE)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+# Shared instance (templates set by main.py once the routers are included)
+route_normalizer = RouteNormalizer()
+
+
+_MESSAGE_PATTERNS = (
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "{uuid}"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "{email}"),
+    (re.compile(r"'[^']*'"), "'{str}'"),
+    (re.compile(r'"[^"]*"'), '"{str}"'),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "{hex}"),
+    (re.compile(r"\b[0-9a-fA-F]{16,}\b"), "{hex}"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "{n}"),
+)
+_FRAME_RE = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+
+
+def normalize_message(message: Optional[str]) -> str:
+    """First line of an error message with IDs, numbers and quoted values replaced"""
+    text = (message or "").strip().split("\n", 1)[0]
+    for pattern, placeholder in _MESSAGE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return " ".join(text.split())[:MAX_MESSAGE_TEMPLATE_LENGTH]
+
+
+def stack_location(stack_trace: Optional[str]) -> Optional[str]:
+    """'module.py:function' of the innermost frame of a Python traceback"""
+    frames = _FRAME_RE.findall(stack_trace or "")
+    if not frames:
+        return None
+    file_name, function = frames[-1]
+    return f"{os.path.basename(file_name)}:{function}"[:MAX_LOCATION_LENGTH]
+
+
+def error_fingerprint(error_type: str, path_template: Optional[str], location: Optional[str], message_template: str) -> str:
+    """BLAKE2b-128 (hex) of an error pattern"""
+    key = "\n".join((error_type or "", path_template or "", location or "", message_template))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# ----------------------------------------------------------------------------
+# Aggregation
+# ----------------------------------------------------------------------------
+
+@dataclass
+class EndpointStats:
+    """Aggregates for one (hour, method, route template)"""
+    count: int = 0
+    slow: int = 0
+    errors: int = 0
+    total_ms: int = 0
+    max_ms: int = -1
+    slowest_request_id: Optional[str] = None
+    slowest_at: Optional[datetime] = None
+
+    def add(self, duration_ms: int, status_code: int, request_id: str, at: datetime, slow_ms: int) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms >= slow_ms:
+            self.slow += 1
+        if status_code >= 500:
+            self.errors += 1
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+            self.slowest_request_id = request_id
+            self.slowest_at = at
+
+
+@dataclass
+class ErrorPatternStats:
+    """Aggregates for one (hour, fingerprint)"""
+    error_type: str
+    path_template: Optional[str]
+    location: Optional[str]
+    message_template: str
+    count: int = 0
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    last_request_id: Optional[str] = None
+
+    def add(self, at: datetime, request_id: Optional[str]) -> None:
+        self.count += 1
+        if self.first_seen is None or at < self.first_seen:
+            self.first_seen = at
+        if self.last_seen is None or at >= self.last_seen:
+            self.last_seen = at
+            self.last_request_id = request_id
+
+
+def _upsert_endpoint(db: Session, key: Tuple[datetime, str, str], stats: EndpointStats) -> None:
+    start, method, path = key
+    table = EndpointSummary.__table__
+    where = and_(table.c.BucketStart == start, table.c.Method == method, table.c.PathTemplate == path)
+    slower = table.c.MaxDurationMs < stats.max_ms
+    values = {
+        "RequestCount": table.c.RequestCount + stats.count,
+        "SlowCount": table.c.SlowCount + stats.slow,
+        "ErrorCount": table.c.ErrorCount + stats.errors,
+        "TotalDurationMs": table.c.TotalDurationMs + stats.total_ms,
+        # Right-hand sides see the old row, so the exemplar follows the old max
+        "MaxDurationMs": case((slower, stats.max_ms), else_=table.c.MaxDurationMs),
+        "SlowestRequestID": case((slower, stats.slowest_request_id), else_=table.c.SlowestRequestID),
+        "SlowestAt": case((slower, stats.slowest_at), else_=table.c.SlowestAt),
+    }
+    if db.execute(update(table).where(where).values(**values)).rowcount:
+        return
+    db.execute(table.insert().values(
+        BucketStart=start, Method=method, PathTemplate=path, RequestCount=stats.count, SlowCount=stats.slow,
+        ErrorCount=stats.errors, TotalDurationMs=stats.total_ms, MaxDurationMs=stats.max_ms,
+        SlowestRequestID=stats.slowest_request_id, SlowestAt=stats.slowest_at
+    ))
+
+
+def _upsert_error_pattern(db: Session, key: Tuple[datetime, str], stats: ErrorPatternStats) -> None:
+    start, fingerprint = key
+    table = ErrorPatternSummary.__table__
+    where = and_(table.c.BucketStart == start, table.c.Fingerprint == fingerprint)
+    later = table.c.LastSeen <= stats.last_seen
+    values = {
+        "OccurrenceCount": table.c.OccurrenceCount + stats.count,
+        "FirstSeen": case((table.c.FirstSeen > stats.first_seen, stats.first_seen), else_=table.c.FirstSeen),
+        "LastSeen": case((later, stats.last_seen), else_=table.c.LastSeen),
+        "LastRequestID": case((later, stats.last_request_id), else_=table.c.LastRequestID),
+    }
+    if db.execute(update(table).where(where).values(**values)).rowcount:
+        return
+    db.execute(table.insert().values(
+        BucketStart=start, Fingerprint=fingerprint, ErrorType=stats.error_type, PathTemplate=stats.path_template,
+        Location=stats.location, MessageTemplate=stats.message_template, OccurrenceCount=stats.count,
+        FirstSeen=stats.first_seen, LastSeen=stats.last_seen, LastRequestID=stats.last_request_id
+    ))
+
+
+def _fold_api_requests(rows, normalizer: RouteNormalizer, slow_ms: int) -> Dict[Tuple[datetime, str, str], EndpointStats]:
+    entries: Dict[Tuple[datetime, str, str], EndpointStats] = {}
+    for row in rows:
+        key = (bucket_start(row.CreatedDate, HOUR), (row.Method or "")[:10], normalizer.template(row.Path))
+        stats = entries.get(key)
+        if stats is None:
+            stats = entries[key] = EndpointStats()
+        stats.add(int(row.DurationMs or 0), int(row.StatusCode or 0), row.RequestID, row.CreatedDate, slow_ms)
+    return entries
+
+
+def _fold_application_errors(rows, normalizer: RouteNormalizer) -> Dict[Tuple[datetime, str], ErrorPatternStats]:
+    entries: Dict[Tuple[datetime, str], ErrorPatternStats] = {}
+    for row in rows:
+        error_type = (row.ErrorType or "")[:100]
+        path_template = normalizer.template(row.Path) if row.Path else None
+        location = stack_location(row.StackTrace)
+        message_template = normalize_message(row.ErrorMessage)
+        key = (bucket_start(row.CreatedDate, HOUR), error_fingerprint(error_type, path_template, location, message_template))
+        stats = entries.get(key)
+        if stats is None:
+            stats = entries[key] = ErrorPatternStats(error_type, path_template, location, message_template)
+        stats.add(row.CreatedDate, row.RequestID)
+    return entries
+
+
+# ----------------------------------------------------------------------------
+# Incremental runs
+# ----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class _Source:
+    """A log table the analyzer folds in"""
+    name: str
+    model: object
+    id_column: str
+    columns: Tuple[str, ...]
+
+
+API_REQUEST_SOURCE = _Source(
+    "ApiRequest", ApiRequest, "ApiRequestID",
+    ("ApiRequestID", "RequestID", "Method", "Path", "StatusCode", "DurationMs", "CreatedDate"),
+)
+APPLICATION_ERROR_SOURCE = _Source(
+    "ApplicationError", ApplicationError, "ApplicationErrorID",
+    ("ApplicationErrorID", "RequestID", "ErrorType", "ErrorMessage", "StackTrace", "Path", "CreatedDate"),
+)
+ANALYZER_SOURCES = (API_REQUEST_SOURCE, APPLICATION_ERROR_SOURCE)
+
+
+def get_watermark(db: Session, source: _Source, backfill_hours: float = None, now: datetime = None) -> int:
+    """
+    Last processed ID of a source, created on first use.
+
+    The first watermark is the newest row older than backfill_hours (a
+    CreatedDate index seek), so the first run analyzes that much history.
+    """
+    last_id = db.scalar(
+        select(LogAnalyzerWatermark.LastID).where(LogAnalyzerWatermark.SourceTable == source.name)
+    )
+    if last_id is not None:
+        return last_id
+    hours = LOG_ANALYZER_BACKFILL_HOURS if backfill_hours is None else backfill_hours
+    model = source.model
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=hours)
+    start_id = db.scalar(
+        select(func.max(getattr(model, source.id_column))).where(model.CreatedDate < cutoff)
+    ) or 0
+    try:
+        db.execute(LogAnalyzerWatermark.__table__.insert().values(
+            SourceTable=source.name, LastID=start_id, UpdatedDate=now or datetime.utcnow()
+        ))
+        db.commit()
+        return start_id
+    except IntegrityError:
+        # Another process created it first
+        db.rollback()
+        return db.scalar(
+            select(LogAnalyzerWatermark.LastID).where(LogAnalyzerWatermark.SourceTable == source.name)
+        )
+
+
+def _next_rows(db: Session, source: _Source, after_id: int, batch_size: int, settled_before: datetime) -> list:
+    model = source.model
+    id_column = getattr(model, source.id_column)
+    rows = db.execute(
+        select(*(getattr(model, column) for column in source.columns))
+        .where(id_column > after_id)
+        .order_by(id_column)
+        .limit(batch_size)
+    ).all()
+    # Stop at the first row that may still have lower-ID rows in flight
+    for index, row in enumerate(rows):
+        if row.CreatedDate >= settled_before:
+            return rows[:index]
+    return rows
+
+
+def analyze_batch(
+    db: Session,
+    source: _Source,
+    normalizer: RouteNormalizer = None,
+    slow_ms: int = None,
+    batch_size: int = None,
+    now: datetime = None
+) -> int:
+    """
+    Fold the next batch of a source's rows into its summary table and commit.
+
+    Returns:
+        Rows analyzed (0 when there is nothing settled to read, or another
+        process advanced the watermark first)
+    """
+    normalizer = normalizer or route_normalizer
+    now = now or datetime.utcnow()
+    after_id = get_watermark(db, source, now=now)
+    rows = _next_rows(
+        db, source, after_id, batch_size or LOG_ANALYZER_BATCH_SIZE,
+        now - timedelta(seconds=LOG_ANALYZER_SETTLE_SECONDS)
+    )
+    if not rows:
+        db.rollback()
+        return 0
+
+    if source is API_REQUEST_SOURCE:
+        upserts = [
+            (_upsert_endpoint, key, stats)
+            for key, stats in sorted(_fold_api_requests(rows, normalizer, _slow_ms(slow_ms)).items(), key=lambda item: item[0])
+        ]
+    else:
+        upserts = [
+            (_upsert_error_pattern, key, stats)
+            for key, stats in sorted(_fold_application_errors(rows, normalizer).items(), key=lambda item: item[0])
+        ]
+    last_id = getattr(rows[-1], source.id_column)
+
+    for attempt in range(2):
+        try:
+            for upsert, key, stats in upserts:
+                upsert(db, key, stats)
+            advanced = db.execute(
+                update(LogAnalyzerWatermark)
+                .where(LogAnalyzerWatermark.SourceTable == source.name, LogAnalyzerWatermark.LastID == after_id)
+                .values(LastID=last_id, UpdatedDate=now)
+            ).rowcount
+            if not advanced:
+                db.rollback()
+                logger.info("Log analyzer: %s watermark moved by another process, batch skipped", source.name)
+                return 0
+            db.commit()
+            return len(rows)
+        except IntegrityError:
+            # A summary row inserted concurrently; it exists now, so retry as an update
+            db.rollback()
+            if attempt:
+                raise
+    return 0
+
+
+def _slow_ms(slow_ms: Optional[int]) -> int:
+    if slow_ms is not None:
+        return slow_ms
+    from common.capture_sampling import capture_policy_cache
+    return capture_policy_cache.get().slow_request_ms
+
+
+def run_log_analyzer(
+    db: Session,
+    normalizer: RouteNormalizer = None,
+    slow_ms: int = None,
+    batch_size: int = None,
+    max_batches: int = None,
+    now: datetime = None
+) -> Dict[str, int]:
+    """
+    Analyze every source until caught up (or max_batches per source).
+
+    Returns:
+        Rows analyzed per source table
+    """
+    batch_size = batch_size or LOG_ANALYZER_BATCH_SIZE
+    max_batches = max_batches or LOG_ANALYZER_MAX_BATCHES_PER_RUN
+    slow_ms = _slow_ms(slow_ms)
+    results = {}
+    for source in ANALYZER_SOURCES:
+        total = 0
+        for _ in range(max_batches):
+            analyzed = analyze_batch(db, source, normalizer, slow_ms, batch_size, now)
+            total += analyzed
+            if analyzed < batch_size:
+                break
+        results[source.name] = total
+    return results
+
+
+class LogAnalyzerWorker:
+    """
+    Daemon thread that runs the log analyzer every interval.
+
+    Started/stopped with the application (main.py). Failures are logged and
+    retried on the next tick; the watermark only moves with a committed batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = LogSessionLocal,
+        interval_seconds: float = LOG_ANALYZER_INTERVAL_SECONDS,
+        normalizer: RouteNormalizer = None
+    ):
+        self._session_factory = session_factory
+        self._interval_seconds = interval_seconds
+        self._normalizer = normalizer or route_normalizer
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """Analyze once; returns rows analyzed per source table"""
+        db = self._session_factory()
+        try:
+            return run_log_analyzer(db, self._normalizer)
+        finally:
+            db.close()
+
+    def _run_logged(self) -> None:
+        try:
+            results = self.run_once()
+            if any(results.values()):
+                logger.debug("Log analyzer processed %s", results)
+        except Exception as e:
+            logger.error(f"Log analyzer failed: {str(e)}", exc_info=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            self._run_logged()
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-analyzer-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker to stop and wait for the current run"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+log_analyzer_worker = LogAnalyzerWorker()
+
+
+# ----------------------------------------------------------------------------
+# Reports (summary tables only)
+# ----------------------------------------------------------------------------
+
+def _since(hours: float, now: Optional[datetime]) -> datetime:
+    return bucket_start((now or datetime.utcnow()) - timedelta(hours=hours), HOUR)
+
+
+def slowest_endpoints(
+    db: Session,
+    hours: float = 24,
+    limit: int = 20,
+    order_by: str = "max",
+    now: Optional[datetime] = None
+) -> List[Dict[str, object]]:
+    """
+    Top-N endpoints over the last N hours (whole hours).
+
+    Args:
+        order_by: 'max' (slowest request), 'avg' (mean duration) or 'slow'
+            (requests over logging.slow_request_ms)
+
+    Returns:
+        Dicts with method, path_template, request_count, slow_count,
+        error_count, avg_duration_ms, max_duration_ms, slowest_request_id
+        and slowest_at
+    """
+    if order_by not in ENDPOINT_ORDERS:
+        raise ValueError(f"order_by must be one of {', '.join(ENDPOINT_ORDERS)}")
+    since = _since(hours, now)
+    requests = func.sum(EndpointSummary.RequestCount)
+    total_ms = func.sum(EndpointSummary.TotalDurationMs)
+    max_ms = func.max(EndpointSummary.MaxDurationMs)
+    slow = func.sum(EndpointSummary.SlowCount)
+    order = {
+        "max": (max_ms.desc(),),
+        "avg": ((total_ms * 1.0 / requests).desc(),),
+        "slow": (slow.desc(), max_ms.desc()),
+    }[order_by]
+    rows = db.execute(
+        select(
+            EndpointSummary.Method, EndpointSummary.PathTemplate,
+            requests.label("request_count"), slow.label("slow_count"),
+            func.sum(EndpointSummary.ErrorCount).label("error_count"),
+            total_ms.label("total_duration_ms"), max_ms.label("max_duration_ms"),
+        )
+        .where(EndpointSummary.BucketStart >= since)
+        .group_by(EndpointSummary.Method, EndpointSummary.PathTemplate)
+        .order_by(*order, EndpointSummary.PathTemplate)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return []
+
+    # Slowest request of each endpoint: the exemplar of its slowest hour
+    wanted = {(row.Method, row.PathTemplate) for row in rows}
+    exemplars: Dict[Tuple[str, str], object] = {}
+    for row in db.execute(
+        select(
+            EndpointSummary.Method, EndpointSummary.PathTemplate, EndpointSummary.MaxDurationMs,
+            EndpointSummary.SlowestRequestID, EndpointSummary.SlowestAt,
+        ).where(
+            EndpointSummary.BucketStart >= since,
+            EndpointSummary.PathTemplate.in_(sorted({path for _, path in wanted})),
+        )
+    ):
+        key = (row.Method, row.PathTemplate)
+        if key in wanted and (key not in exemplars or row.MaxDurationMs > exemplars[key].MaxDurationMs):
+            exemplars[key] = row
+
+    results = []
+    for row in rows:
+        exemplar = exemplars.get((row.Method, row.PathTemplate))
+        count = int(row.request_count or 0)
+        results.append({
+            "method": row.Method,
+            "path_template": row.PathTemplate,
+            "request_count": count,
+            "slow_count": int(row.slow_count or 0),
+            "error_count": int(row.error_count or 0),
+            "avg_duration_ms": round(int(row.total_duration_ms or 0) / count, 2) if count else 0,
+            "max_duration_ms": int(row.max_duration_ms or 0),
+            "slowest_request_id": exemplar.SlowestRequestID if exemplar else None,
+            "slowest_at": exemplar.SlowestAt if exemplar else None,
+        })
+    return results
+
+
+def error_patterns(
+    db: Session,
+    hours: float = 24,
+    limit: int = 20,
+    now: Optional[datetime] = None
+) -> List[Dict[str, object]]:
+    """
+    Most frequent error fingerprints over the last N hours (whole hours).
+
+    Returns:
+        Dicts with fingerprint, error_type, path_template, location,
+        message_template, count, first_seen, last_seen and last_request_id
+    """
+    since = _since(hours, now)
+    count = func.sum(ErrorPatternSummary.OccurrenceCount)
+    rows = db.execute(
+        select(
+            ErrorPatternSummary.Fingerprint,
+            func.max(ErrorPatternSummary.ErrorType).label("error_type"),
+            func.max(ErrorPatternSummary.PathTemplate).label("path_template"),
+            func.max(ErrorPatternSummary.Location).label("location"),
+            func.max(ErrorPatternSummary.MessageTemplate).label("message_template"),
+            count.label("count"),
+            func.min(ErrorPatternSummary.FirstSeen).label("first_seen"),
+            func.max(ErrorPatternSummary.LastSeen).label("last_seen"),
+        )
+        .where(ErrorPatternSummary.BucketStart >= since)
+        .group_by(ErrorPatternSummary.Fingerprint)
+        .order_by(count.desc(), func.max(ErrorPatternSummary.LastSeen).desc())
+        .limit(limit)
+    ).all()
+    if not rows:
+        return []
+
+    last_requests: Dict[str, Tuple[datetime, Optional[str]]] = {}
+    for row in db.execute(
+        select(ErrorPatternSummary.Fingerprint, ErrorPatternSummary.LastSeen, ErrorPatternSummary.LastRequestID)
+        .where(
+            ErrorPatternSummary.BucketStart >= since,
+            ErrorPatternSummary.Fingerprint.in_([row.Fingerprint for row in rows]),
+        )
+    ):
+        current = last_requests.get(row.Fingerprint)
+        if current is None or row.LastSeen >= current[0]:
+            last_requests[row.Fingerprint] = (row.LastSeen, row.LastRequestID)
+
+    return [
+        {
+            "fingerprint": row.Fingerprint,
+            "error_type": row.error_type,
+            "path_template": row.path_template,
+            "location": row.location,
+            "message_template": row.message_template,
+            "count": int(row.count or 0),
+            "first_seen": row.first_seen,
+            "last_seen": row.last_seen,
+            "last_request_id": last_requests.get(row.Fingerprint, (None, None))[1],
+        }
+        for row in rows
+    ]
+
+
+def analyzer_status(db: Session) -> List[Dict[str, object]]:
+    """Watermark per source table"""
+    return [
+        {"source_table": row.SourceTable, "last_id": row.LastID, "updated_date": row.UpdatedDate}
+        for row in db.execute(select(LogAnalyzerWatermark).order_by(LogAnalyzerWatermark.SourceTable)).scalars()
+    ]
@@ -0,0 +1,300 @@
+"""
+Log Diagnostics
+Everything logged for one request, from a single indexed query
+
+A request leaves rows in up to five log tables (log.ApiRequest,
+log.ApplicationError, log.AuthEvent, log.UserAction, log.IntegrationEvent),
+all carrying its RequestID. iter_trace() reads them with one UNION ALL
+statement:
+
+- Each branch seeks IX_<Table>_RequestID_CreatedDate (migration 032) and is
+  bounded by a CreatedDate range, so it reads only the rows of that request
+  in the window (and only the matching partitions if a table is partitioned
+  by CreatedDate)
+- Only short summary columns are selected: the kind of entry, its status,
+  duration, a truncated detail (path, reason, error message) and whether a
+  payload was captured. NVARCHAR(MAX) payloads are never read here;
+  fetch_payloads() loads one request's payloads on demand
+- Rows are streamed in time order as they arrive
+
+With include_archive, rows already moved to the retention archive are read
+first (common.log_retention; only the day partitions in the range are
+opened).
+
+Environment variables:
+    DIAGNOSTICS_LOOKBACK_HOURS   Default time range when no start is given (default: 168)
+    DIAGNOSTICS_DETAIL_CHARS     Length of the detail column (default: 200)
+    DIAGNOSTICS_FETCH_SIZE       Rows fetched per round trip while streaming (default: 500)
+
+Usage:
+    for entry in iter_trace(db, request_id):
+        print(format_entry(entry))
+
+    payloads = fetch_payloads(db, entry.entry_id)
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import Integer, String, bindparam, case, cast, func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from common.log_retention import read_archive
+from common.payload_blobs import BLOB_COLUMNS, expand_payload_rows, session_blob_fetcher
+from common.payload_codec import PAYLOAD_COLUMNS
+from models.log import ApiRequest, ApplicationError, AuthEvent, IntegrationEvent, UserAction
+
+
+DIAGNOSTICS_LOOKBACK_HOURS = float(os.getenv("DIAGNOSTICS_LOOKBACK_HOURS", "168"))
+DIAGNOSTICS_DETAIL_CHARS = int(os.getenv("DIAGNOSTICS_DETAIL_CHARS", "200"))
+DIAGNOSTICS_FETCH_SIZE = int(os.getenv("DIAGNOSTICS_FETCH_SIZE", "500"))
+
+PAYLOAD_TEXT_COLUMNS = ("RequestPayload", "ResponsePayload", "Headers")
+
+
+@dataclass(frozen=True)
+class _Source:
+    """Summary column mapping of one log table (attribute names, None = not applicable)"""
+    model: Any
+    id_column: str
+    name: str
+    status: Optional[str] = None
+    duration: Optional[str] = None
+    detail: Optional[str] = None
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+
+TRACE_SOURCES = (
+    _Source(ApiRequest, "ApiRequestID", name="Method", status="StatusCode", duration="DurationMs", detail="Path"),
+    _Source(ApplicationError, "ApplicationErrorID", name="ErrorType", status="Severity", detail="ErrorMessage"),
+    _Source(AuthEvent, "AuthEventID", name="EventType", detail="Reason"),
+    _Source(UserAction, "UserActionID", name="Action", detail="Path"),
+    _Source(IntegrationEvent, "IntegrationEventID", name="EventType", status="TargetDomain", detail="Details"),
+)
+
+
+@dataclass(frozen=True)
+class TraceEntry:
+    """One log row of a request (summary columns only)"""
+    source: str
+    entry_id: int
+    created: datetime
+    name: Optional[str]
+    status: Optional[str]
+    duration_ms: Optional[int]
+    detail: Optional[str]
+    user_id: Optional[int]
+    has_payload: bool
+    archived: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "entry_id": self.entry_id,
+            "created": self.created.isoformat(),
+            "name": self.name,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "detail": self.detail,
+            "user_id": self.user_id,
+            "has_payload": self.has_payload,
+            "archived": self.archived,
+        }
+
+
+def _payload_columns() -> List[str]:
+    return sorted({column for pair in PAYLOAD_COLUMNS + BLOB_COLUMNS for column in pair})
+
+
+def default_range(start: Optional[datetime] = None, end: Optional[datetime] = None, now: datetime = None):
+    """(start, end) with start defaulting to DIAGNOSTICS_LOOKBACK_HOURS before end (or now)"""
+    if start is None:
+        start = (end or now or datetime.utcnow()) - timedelta(hours=DIAGNOSTICS_LOOKBACK_HOURS)
+    return start, end
+
+
+@lru_cache(maxsize=32)
+def trace_statement(bounded: bool = False, limited: bool = False, detail_chars: int = DIAGNOSTICS_DETAIL_CHARS):
+    """
+    The UNION ALL correlation query, ordered by CreatedDate.
+
+    Built once per shape and reused (SQLAlchemy then skips re-compiling it).
+    Parameters: request_id, start, end (when bounded) and limit (when limited).
+    Columns: Source, EntryID, CreatedDate, Name, Status, DurationMs, Detail,
+    UserID, HasPayload.
+    """
+    branches = []
+    for source in TRACE_SOURCES:
+        model = source.model
+        status = getattr(model, source.status) if source.status else null()
+        detail = getattr(model, source.detail) if source.detail else null()
+        if source is TRACE_SOURCES[0]:
+            captured = [getattr(model, column).isnot(None) for column in _payload_columns()]
+            has_payload = case((or_(*captured), 1), else_=0)
+        else:
+            has_payload = literal(0)
+        conditions = [model.RequestID == bindparam("request_id"), model.CreatedDate >= bindparam("start")]
+        if bounded:
+            conditions.append(model.CreatedDate < bindparam("end"))
+        branches.append(
+            select(
+                literal(source.table, String(30)).label("Source"),
+                getattr(model, source.id_column).label("EntryID"),
+                model.CreatedDate.label("CreatedDate"),
+                getattr(model, source.name).label("Name"),
+                cast(status, String(50)).label("Status"),
+                cast(getattr(model, source.duration) if source.duration else null(), Integer).label("DurationMs"),
+                cast(func.substring(detail, 1, detail_chars), String(detail_chars)).label("Detail"),
+                model.UserID.label("UserID"),
+                has_payload.label("HasPayload"),
+            ).where(*conditions)
+        )
+    # Selected from as a derived table so TOP / LIMIT applies on every dialect
+    trace = union_all(*branches).subquery("trace")
+    statement = select(trace).order_by(trace.c.CreatedDate, trace.c.Source, trace.c.EntryID)
+    if limited:
+        statement = statement.limit(bindparam("limit", type_=Integer, literal_execute=True))
+    return statement.execution_options(yield_per=DIAGNOSTICS_FETCH_SIZE)
+
+
+def _archived_entries(
+    request_id: str,
+    start: datetime,
+    end: Optional[datetime],
+    detail_chars: int,
+    archive_dir: Optional[str]
+) -> Iterator[TraceEntry]:
+    entries = []
+    for source in TRACE_SOURCES:
+        for row in read_archive(
+            source.table, start, end, where=lambda row: row.get("RequestID") == request_id, archive_dir=archive_dir
+        ):
+            detail = row.get(source.detail) if source.detail else None
+            status = row.get(source.status) if source.status else None
+            entries.append(TraceEntry(
+                source=source.table,
+                entry_id=row[source.id_column],
+                created=row["CreatedDate"],
+                name=row.get(source.name),
+                status=None if status is None else str(status),
+                duration_ms=row.get(source.duration) if source.duration else None,
+                detail=None if detail is None else str(detail)[:detail_chars],
+                user_id=row.get("UserID"),
+                has_payload=any(row.get(column) is not None for column in PAYLOAD_TEXT_COLUMNS),
+                archived=True,
+            ))
+    entries.sort(key=lambda entry: (entry.created, entry.source, entry.entry_id))
+    return iter(entries)
+
+
+def iter_trace(
+    db: Session,
+    request_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_archive: bool = False,
+    archive_dir: Optional[str] = None,
+    limit: Optional[int] = None,
+    detail_chars: int = DIAGNOSTICS_DETAIL_CHARS
+) -> Iterator[TraceEntry]:
+    """
+    Stream the log entries of a request created in [start, end), oldest first.
+
+    Args:
+        start: Defaults to DIAGNOSTICS_LOOKBACK_HOURS before end (or now)
+        end: Open-ended when None
+        include_archive: Also read rows already moved to the retention archive
+            (they are older than every live row, so they come first)
+        limit: Stop after this many entries
+    """
+    start, end = default_range(start, end)
+    produced = 0
+    if include_archive:
+        for entry in _archived_entries(request_id, start, end, detail_chars, archive_dir):
+            if limit is not None and produced >= limit:
+                return
+            produced += 1
+            yield entry
+
+    parameters = {"request_id": request_id, "start": start}
+    if end is not None:
+        parameters["end"] = end
+    if limit is not None:
+        parameters["limit"] = max(limit - produced, 0)
+    statement = trace_statement(end is not None, limit is not None, detail_chars)
+    result = db.execute(statement, parameters)
+    try:
+        for row in result:
+            yield TraceEntry(
+                source=row.Source,
+                entry_id=row.EntryID,
+                created=row.CreatedDate,
+                name=row.Name,
+                status=row.Status,
+                duration_ms=row.DurationMs,
+                detail=row.Detail,
+                user_id=row.UserID,
+                has_payload=bool(row.HasPayload),
+            )
+    finally:
+        result.close()
+
+
+def get_trace(db: Session, request_id: str, **kwargs) -> List[TraceEntry]:
+    """iter_trace() as a list"""
+    return list(iter_trace(db, request_id, **kwargs))
+
+
+def fetch_payloads(db: Session, api_request_id: int, max_chars: Optional[int] = None) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Request / response payload and headers text of one log.ApiRequest row.
+
+    Args:
+        max_chars: Truncate each value to this many characters
+
+    Returns:
+        Dict with RequestPayload, ResponsePayload and Headers, or None when
+        the row does not exist
+    """
+    columns = _payload_columns()
+    row = db.execute(
+        select(*(getattr(ApiRequest, column) for column in columns))
+        .where(ApiRequest.ApiRequestID == api_request_id)
+    ).mappings().first()
+    if row is None:
+        return None
+    decoded = expand_payload_rows([dict(row)], session_blob_fetcher(db))[0]
+    payloads = {column: decoded.get(column) for column in PAYLOAD_TEXT_COLUMNS}
+    if max_chars is not None:
+        payloads = {
+            column: text[:max_chars] + "..." if text is not None and len(text) > max_chars else text
+            for column, text in payloads.items()
+        }
+    return payloads
+
+
+def format_entry(entry: TraceEntry) -> str:
+    """One line per entry for terminal output"""
+    parts = [
+        entry.created.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+        f"{entry.source}#{entry.entry_id}",
+        entry.name or "-",
+    ]
+    if entry.status is not None:
+        parts.append(entry.status)
+    if entry.duration_ms is not None:
+        parts.append(f"{entry.duration_ms}ms")
+    if entry.detail:
+        parts.append(" ".join(entry.detail.split()))
+    if entry.user_id is not None:
+        parts.append(f"user={entry.user_id}")
+    if entry.has_payload:
+        parts.append("[payload]")
+    if entry.archived:
+        parts.append("[archived]")
+    return "  ".join(parts)
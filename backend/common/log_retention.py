@@ -0,0 +1,491 @@
+"""
+Log Retention
+Expires log schema rows in small batches and archives them to compressed files
+
+The log tables (log.ApiRequest, log.ApplicationError, log.AuthEvent,
+log.EmailDelivery, log.UserAction, log.IntegrationEvent,
+log.PerformanceMetric) are append-only and clustered on an IDENTITY key, so
+clustered order is insert order and the expired rows are always the head of
+the table. Retention walks that head like a rolling partition:
+
+1. Take the next LOG_RETENTION_BATCH_SIZE rows older than the cutoff, in key
+   order (a short range seek on the clustered index, no CreatedDate scan)
+2. Write them to the archive, one file per table, day and key range
+3. DELETE the same key range and commit; pause, repeat
+
+Batches stay below SQL Server's lock escalation threshold (5000 locks), so
+a run never takes a table lock and log writers keep inserting at the tail.
+
+Deduplicated payloads (log.PayloadBlob) are archived inline with their
+requests; blobs nobody references any more are deleted after a complete
+log.ApiRequest pass (expire_payload_blobs).
+
+Retention days per table come from config.AppSetting
+('logging.retention_days.<Table>', 0 = keep forever) and archiving from
+'logging.archive_expired' (see ConfigurationService).
+
+Archives are NDJSON, zstd-compressed when the zstandard package is
+installed and gzip otherwise, laid out as
+
+    LOG_ARCHIVE_DIR/<Table>/<YYYY-MM-DD>/<Table>_<firstID>-<lastID>.ndjson.zst
+
+The day directories are the partitions: read_archive() only opens the days a
+query covers. File names are deterministic and written atomically, so a run
+interrupted between archiving and deleting rewrites the same file next time.
+
+Environment variables:
+    LOG_RETENTION_ENABLED              Run the retention worker (default: false)
+    LOG_RETENTION_INTERVAL_SECONDS     Time between runs (default: 3600)
+    LOG_RETENTION_BATCH_SIZE           Rows archived/deleted per transaction (default: 2000)
+    LOG_RETENTION_BATCH_PAUSE_SECONDS  Pause between batches (default: 0.2)
+    LOG_RETENTION_MAX_BATCHES_PER_RUN  Batches per table per run (default: 500)
+    LOG_ARCHIVE_DIR                    Archive root directory
+
+Usage:
+    results = run_log_retention(db)
+
+    for row in read_archive("ApiRequest", start=datetime(2025, 1, 1), end=datetime(2025, 1, 2)):
+        ...
+"""
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from common.config_service import ConfigurationService
+from common.database import LogSessionLocal
+from common.logger import get_logger
+from common.payload_blobs import PAYLOAD_BLOB_TOUCH_SECONDS, expand_payload_rows, session_blob_fetcher
+from models.log import (
+    ApiRequest,
+    ApplicationError,
+    AuthEvent,
+    EmailDelivery,
+    IntegrationEvent,
+    PayloadBlob,
+    PerformanceMetric,
+    UserAction,
+)
+
+logger = get_logger(__name__)
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional dependency: archives fall back to gzip
+    zstandard = None
+
+
+LOG_RETENTION_ENABLED = os.getenv("LOG_RETENTION_ENABLED", "false").lower() in ("true", "1", "yes")
+LOG_RETENTION_INTERVAL_SECONDS = float(os.getenv("LOG_RETENTION_INTERVAL_SECONDS", "3600"))
+LOG_RETENTION_BATCH_SIZE = int(os.getenv("LOG_RETENTION_BATCH_SIZE", "2000"))
+LOG_RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("LOG_RETENTION_BATCH_PAUSE_SECONDS", "0.2"))
+LOG_RETENTION_MAX_BATCHES_PER_RUN = int(os.getenv("LOG_RETENTION_MAX_BATCHES_PER_RUN", "500"))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", os.path.join(tempfile.gettempdir(), "eventlead-log-archive"))
+
+# Tables under retention, keyed by table name
+LOG_RETENTION_MODELS = {
+    model.__tablename__: model
+    for model in (
+        ApiRequest, ApplicationError, AuthEvent, EmailDelivery, UserAction, IntegrationEvent, PerformanceMetric,
+    )
+}
+
+ZSTD_SUFFIX = ".ndjson.zst"
+GZIP_SUFFIX = ".ndjson.gz"
+
+
+@dataclass
+class RetentionResult:
+    """
+    Outcome of one table's retention run.
+
+    Attributes:
+        table: Table name
+        cutoff: Rows created before this were expired
+        deleted: Rows deleted
+        archived_files: Archive files written
+        complete: False if the run stopped at the batch limit with rows left
+    """
+    table: str
+    cutoff: Optional[datetime]
+    deleted: int = 0
+    archived_files: List[str] = field(default_factory=list)
+    complete: bool = True
+
+
+# ----------------------------------------------------------------------------
+# Archive files
+# ----------------------------------------------------------------------------
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise ValueError(f"Cannot read {path}: the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=1 << 31)
+    return gzip.decompress(data)
+
+
+def write_archive_file(table_name: str, day: date, rows: List[Dict], id_column: str, archive_dir: str) -> str:
+    """
+    Write one day's rows of a batch as a compressed NDJSON file.
+
+    Written to a temporary file and renamed into place, so readers never see
+    a partial file and a retried batch replaces its earlier file.
+
+    Returns:
+        Path of the archive file
+    """
+    directory = os.path.join(archive_dir, table_name, day.isoformat())
+    os.makedirs(directory, exist_ok=True)
+    suffix = ZSTD_SUFFIX if zstandard is not None else GZIP_SUFFIX
+    path = os.path.join(directory, f"{table_name}_{rows[0][id_column]}-{rows[-1][id_column]}{suffix}")
+
+    data = "\n".join(json.dumps(row, default=_json_default, ensure_ascii=False) for row in rows).encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_compress(data))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def archive_partitions(table_name: str, archive_dir: str = None) -> List[Dict[str, object]]:
+    """
+    Archived days of a table, oldest first.
+
+    Returns:
+        Dicts with day, files and bytes
+    """
+    root = os.path.join(archive_dir or LOG_ARCHIVE_DIR, table_name)
+    if not os.path.isdir(root):
+        return []
+    partitions = []
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        files = [f for f in os.listdir(directory) if f.endswith((ZSTD_SUFFIX, GZIP_SUFFIX))]
+        partitions.append({
+            "day": date.fromisoformat(name),
+            "files": len(files),
+            "bytes": sum(os.path.getsize(os.path.join(directory, f)) for f in files),
+        })
+    return partitions
+
+
+def read_archive(
+    table_name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    where: Optional[Callable[[Dict], bool]] = None,
+    archive_dir: str = None
+) -> Iterator[Dict]:
+    """
+    Stream archived rows of a table created in [start, end), in key order per day.
+
+    Only the day partitions overlapping the range are opened. CreatedDate is
+    returned as a datetime; other values as archived (JSON types).
+
+    Args:
+        where: Optional row predicate (e.g. lambda row: row["StatusCode"] >= 500)
+    """
+    root = os.path.join(archive_dir or LOG_ARCHIVE_DIR, table_name)
+    if not os.path.isdir(root):
+        return
+    for name in sorted(os.listdir(root)):
+        day = date.fromisoformat(name)
+        if start is not None and day < start.date():
+            continue
+        if end is not None and datetime.combine(day, datetime.min.time()) >= end:
+            break
+        directory = os.path.join(root, name)
+        files = [f for f in os.listdir(directory) if f.endswith((ZSTD_SUFFIX, GZIP_SUFFIX))]
+        # Key order: file names carry the first ID of each batch
+        files.sort(key=lambda f: int(f.rsplit("_", 1)[1].split("-", 1)[0]))
+        for file_name in files:
+            for line in _decompress(os.path.join(directory, file_name)).splitlines():
+                row = json.loads(line)
+                row["CreatedDate"] = datetime.fromisoformat(row["CreatedDate"])
+                if start is not None and row["CreatedDate"] < start:
+                    continue
+                if end is not None and row["CreatedDate"] >= end:
+                    continue
+                if where is None or where(row):
+                    yield row
+
+
+# ----------------------------------------------------------------------------
+# Expiry
+# ----------------------------------------------------------------------------
+
+def expire_batch(
+    db: Session,
+    model,
+    cutoff: datetime,
+    archive: bool = True,
+    archive_dir: str = None,
+    batch_size: int = None
+) -> RetentionResult:
+    """
+    Archive and delete the oldest batch of rows created before the cutoff.
+
+    The rows are the first batch_size expired rows in key order; the DELETE
+    repeats the same key range and cutoff, so it removes exactly the rows
+    archived. Commits on success.
+    """
+    table = model.__table__
+    id_column = table.primary_key.columns.values()[0]
+    expired = table.c.CreatedDate < cutoff
+    result = RetentionResult(table=table.name, cutoff=cutoff)
+
+    # Payloads are archived as text: archives don't depend on
+    # log.PayloadBlob / log.PayloadDictionary rows that may be gone when read
+    rows = expand_payload_rows(
+        [
+            dict(row._mapping)
+            for row in db.execute(
+                select(table).where(expired).order_by(id_column).limit(batch_size or LOG_RETENTION_BATCH_SIZE)
+            )
+        ],
+        session_blob_fetcher(db)
+    )
+    if not rows:
+        return result
+
+    if archive:
+        by_day: Dict[date, List[Dict]] = {}
+        for row in rows:
+            by_day.setdefault(row["CreatedDate"].date(), []).append(row)
+        for day, day_rows in sorted(by_day.items()):
+            result.archived_files.append(
+                write_archive_file(table.name, day, day_rows, id_column.name, archive_dir or LOG_ARCHIVE_DIR)
+            )
+
+    first, last = rows[0][id_column.name], rows[-1][id_column.name]
+    result.deleted = db.execute(
+        table.delete().where(and_(id_column >= first, id_column <= last, expired))
+    ).rowcount
+    db.commit()
+    return result
+
+
+def apply_retention(
+    db: Session,
+    model,
+    days: int,
+    now: Optional[datetime] = None,
+    archive: bool = True,
+    archive_dir: str = None,
+    batch_size: int = None,
+    max_batches: int = None,
+    pause_seconds: float = 0.0
+) -> RetentionResult:
+    """
+    Expire one table's rows older than `days`, batch by batch.
+
+    Args:
+        days: Retention in days (0 or less keeps everything)
+        max_batches: Stop after this many batches (the next run continues)
+        pause_seconds: Sleep between batches, letting log writers through
+    """
+    if days <= 0:
+        return RetentionResult(table=model.__tablename__, cutoff=None)
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    batch_size = batch_size or LOG_RETENTION_BATCH_SIZE
+    max_batches = max_batches or LOG_RETENTION_MAX_BATCHES_PER_RUN
+    total = RetentionResult(table=model.__tablename__, cutoff=cutoff)
+
+    for batch in range(max_batches):
+        result = expire_batch(db, model, cutoff, archive, archive_dir, batch_size)
+        total.deleted += result.deleted
+        total.archived_files.extend(result.archived_files)
+        if result.deleted < batch_size:
+            return total
+        if pause_seconds and batch + 1 < max_batches:
+            time.sleep(pause_seconds)
+    total.complete = False
+    return total
+
+
+def run_log_retention(
+    db: Session,
+    now: Optional[datetime] = None,
+    archive_dir: str = None,
+    batch_size: int = None,
+    max_batches: int = None,
+    pause_seconds: float = None
+) -> List[RetentionResult]:
+    """
+    Apply retention to every log table using the config.AppSetting policy.
+
+    A failing table is logged and rolled back; the others still run.
+
+    Returns:
+        One RetentionResult per table that was processed
+    """
+    config = ConfigurationService(db)
+    archive = config.get_logging_archive_expired()
+    pause_seconds = LOG_RETENTION_BATCH_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    results = []
+    for table_name, model in LOG_RETENTION_MODELS.items():
+        days = config.get_logging_retention_days(table_name) or 0
+        try:
+            result = apply_retention(
+                db, model, days, now, archive, archive_dir, batch_size, max_batches, pause_seconds
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Log retention failed for log.{table_name}: {str(e)}", exc_info=True)
+            continue
+        if result.deleted:
+            logger.info(
+                f"Log retention expired {result.deleted} rows from log.{table_name} "
+                f"(before {result.cutoff:%Y-%m-%d %H:%M}, {len(result.archived_files)} archive files)"
+            )
+        results.append(result)
+    return results
+
+
+def expire_payload_blobs(
+    db: Session,
+    api_request_result: RetentionResult,
+    batch_size: int = None,
+    max_batches: int = None,
+    pause_seconds: float = 0.0
+) -> Optional[RetentionResult]:
+    """
+    Delete log.PayloadBlob rows no longer referenced by log.ApiRequest.
+
+    Only runs after a complete log.ApiRequest retention pass (every request
+    before its cutoff is gone). Writers refresh a blob's LastSeenDate at
+    least every PAYLOAD_BLOB_TOUCH_SECONDS while they reference it, so blobs
+    last seen more than that before the cutoff have no requests left.
+    Blobs are not archived: archived requests carry their payload text.
+
+    Returns:
+        RetentionResult for 'PayloadBlob', or None if collection was skipped
+    """
+    if api_request_result.cutoff is None or not api_request_result.complete:
+        return None
+    cutoff = api_request_result.cutoff - timedelta(seconds=PAYLOAD_BLOB_TOUCH_SECONDS)
+    batch_size = batch_size or LOG_RETENTION_BATCH_SIZE
+    max_batches = max_batches or LOG_RETENTION_MAX_BATCHES_PER_RUN
+    result = RetentionResult(table=PayloadBlob.__tablename__, cutoff=cutoff)
+
+    for batch in range(max_batches):
+        blob_ids = db.scalars(
+            select(PayloadBlob.PayloadBlobID)
+            .where(PayloadBlob.LastSeenDate < cutoff)
+            .order_by(PayloadBlob.LastSeenDate)
+            .limit(batch_size)
+        ).all()
+        if blob_ids:
+            result.deleted += db.execute(
+                PayloadBlob.__table__.delete().where(
+                    and_(PayloadBlob.PayloadBlobID.in_(blob_ids), PayloadBlob.LastSeenDate < cutoff)
+                )
+            ).rowcount
+            db.commit()
+        if len(blob_ids) < batch_size:
+            return result
+        if pause_seconds and batch + 1 < max_batches:
+            time.sleep(pause_seconds)
+    result.complete = False
+    return result
+
+
+class LogRetentionWorker:
+    """
+    Daemon thread that runs log retention every interval.
+
+    Started/stopped with the application (main.py) when LOG_RETENTION_ENABLED.
+    Running it in several API processes is safe: a batch archived twice is
+    written to the same file and the second DELETE finds nothing.
+    """
+
+    def __init__(
+        self,
+        session_factory=LogSessionLocal,
+        interval_seconds: float = LOG_RETENTION_INTERVAL_SECONDS
+    ):
+        self._session_factory = session_factory
+        self._interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> List[RetentionResult]:
+        """Run retention once over all log tables, then collect payload blobs"""
+        db = self._session_factory()
+        try:
+            results = run_log_retention(db)
+            api_requests = next((r for r in results if r.table == ApiRequest.__tablename__), None)
+            if api_requests is not None:
+                try:
+                    blobs = expire_payload_blobs(db, api_requests, pause_seconds=LOG_RETENTION_BATCH_PAUSE_SECONDS)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Payload blob collection failed: {str(e)}", exc_info=True)
+                else:
+                    if blobs is not None:
+                        if blobs.deleted:
+                            logger.info(f"Log retention removed {blobs.deleted} unreferenced payload blobs")
+                        results.append(blobs)
+            return results
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Log retention worker failed: {str(e)}", exc_info=True)
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-retention-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker to stop and wait for the current batch"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+log_retention_worker = LogRetentionWorker()
@@ -1,93 +1,346 @@
 """
 Logging Utilities
 Structured logging configuration with RequestID inclusion
+
+Every logger from get_logger() shares one handler chain:
+
+1. On the calling thread, RequestIDFilter copies request_id / user_id /
+   company_id from the RequestContext onto the record (ContextVars are not
+   visible from another thread) and, when LOG_RATE_LIMIT_PER_MINUTE is set,
+   RateLimitFilter drops repeats of a noisy message beyond that budget
+2. The record is put on a bounded in-memory queue (QueueHandler) without
+   formatting it: %-style arguments are only interpolated by the listener
+   thread, so `logger.info("found %s", value)` costs the request almost
+   nothing. A full queue drops the record instead of blocking
+3. A QueueListener thread formats (text or JSON lines) and writes stdout
+
+Pass arguments instead of f-strings on hot paths: formatting then happens
+off the request thread, and the rate limiter can tell repeats of the same
+message apart from different messages. (Arguments are rendered later, so
+do not pass objects the caller goes on to mutate.)
+
+Environment variables:
+    LOG_LEVEL                  Level of application loggers (default: INFO)
+    LOG_FORMAT                 'text' or 'json' (one object per line) (default: text)
+    LOG_QUEUE_ENABLED          Write through the background queue (default: true)
+    LOG_QUEUE_SIZE             Records waiting to be written before dropping (default: 10000)
+    LOG_RATE_LIMIT_PER_MINUTE  Records per logger and message per minute below
+                               WARNING; 0 disables (default: 0)
+    LOG_RATE_LIMIT_LOGGERS     Comma-separated logger names (and their children)
+                               the limit applies to; empty means every logger
+                               (default: empty)
+
+Usage:
+    logger = get_logger(__name__)
+    logger.info("Cache hit: %s search returned %d results", search_type, count)
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
 
 from common.request_context import get_current_request_context
 
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "true").lower() in ("true", "1", "yes")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT_PER_MINUTE = int(os.getenv("LOG_RATE_LIMIT_PER_MINUTE", "0"))
+LOG_RATE_LIMIT_LOGGERS = tuple(
+    name.strip() for name in os.getenv("LOG_RATE_LIMIT_LOGGERS", "").split(",") if name.strip()
+)
+
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(request_id)s] [%(name)s] %(message)s"
+TEXT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# LogRecord attributes that are not `extra={...}` fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "user_id", "company_id", "suppressed",
+}
+
+
 class RequestIDFilter(logging.Filter):
     """
     Logging filter that adds RequestID to all log records.
-    
-    If no request context exists, uses "no-request" as placeholder.
+
+    If no request context exists, uses "no-request" as placeholder. Also
+    adds user_id and company_id (None when unknown) for the JSON format.
     """
-    
+
     def filter(self, record: logging.LogRecord) -> bool:
         """
-        Add request_id to log record.
-        
+        Add request_id, user_id and company_id to log record.
+
         Args:
             record: Log record to modify
-            
+
         Returns:
             True (always allow record through)
         """
         context = get_current_request_context()
-        record.request_id = context.request_id if context else "no-request"
+        if context is None:
+            record.request_id = "no-request"
+            record.user_id = None
+            record.company_id = None
+        else:
+            record.request_id = context.request_id
+            record.user_id = context.user_id
+            record.company_id = context.company_id
+        return True
+
+
+def _report_suppressed(records: int, messages: int) -> None:
+    get_logger(__name__).warning(
+        "Log rate limit suppressed %d records of %d messages in the last minute", records, messages
+    )
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of one message beyond a per-minute budget.
+
+    Records are keyed by logger name and message template (record.msg before
+    argument interpolation). WARNING and above always pass, as do loggers
+    outside `loggers` when names are given. The first record of a message
+    let through after suppression carries `suppressed` (the number dropped),
+    which both formats show, and the first record of each minute reports
+    the previous minute's total through `report` (a WARNING line by default).
+    """
+
+    def __init__(
+        self,
+        per_minute: int = LOG_RATE_LIMIT_PER_MINUTE,
+        loggers: Iterable[str] = LOG_RATE_LIMIT_LOGGERS,
+        max_keys: int = 10000,
+        report: Callable[[int, int], None] = _report_suppressed
+    ):
+        super().__init__()
+        self._per_minute = per_minute
+        self._loggers = tuple(loggers)
+        self._prefixes = tuple(f"{name}." for name in self._loggers)
+        self._max_keys = max_keys
+        self._report = report
+        self._lock = threading.Lock()
+        self._window = 0
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+        self._window_suppressed: Dict[Tuple[str, str], int] = {}
+
+    def _limited(self, name: str) -> bool:
+        return not self._loggers or name in self._loggers or name.startswith(self._prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._per_minute <= 0 or record.levelno >= logging.WARNING or not self._limited(record.name):
+            return True
+        key = (record.name, str(record.msg))
+        window = int(record.created // 60)
+        finished = None
+        with self._lock:
+            if window != self._window:
+                # Suppression counts carry over until the message is next let through
+                self._window = window
+                self._counts.clear()
+                if len(self._suppressed) > self._max_keys:
+                    self._suppressed.clear()
+                if self._window_suppressed:
+                    finished = self._window_suppressed
+                    self._window_suppressed = {}
+            count = self._counts.get(key, 0)
+            if count >= self._per_minute:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                if len(self._window_suppressed) < self._max_keys:
+                    self._window_suppressed[key] = self._window_suppressed.get(key, 0) + 1
+                dropped = True
+            else:
+                if len(self._counts) < self._max_keys:
+                    self._counts[key] = count + 1
+                suppressed = self._suppressed.pop(key, 0)
+                dropped = False
+        if finished:
+            self._report(sum(finished.values()), len(finished))
+        if dropped:
+            return False
+        if suppressed:
+            record.suppressed = suppressed
         return True
 
 
+class TextFormatter(logging.Formatter):
+    """[timestamp] [level] [request_id] [name] message (+ suppression note)"""
+
+    def __init__(self):
+        super().__init__(fmt=TEXT_FORMAT, datefmt=TEXT_DATE_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "no-request"
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" [{suppressed} similar messages suppressed]"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record.
+
+    Keys: ts (UTC ISO-8601), level, logger, msg, request_id, user_id,
+    company_id, then exc / suppressed / `extra={...}` fields when present.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "user_id": getattr(record, "user_id", None),
+            "company_id": getattr(record, "company_id", None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers message formatting to the listener thread.
+
+    The stock QueueHandler formats the message on the calling thread; this
+    one only renders exception tracebacks (they reference live frames) and
+    drops the record when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_formatter(log_format: str = LOG_FORMAT) -> logging.Formatter:
+    """Formatter for LOG_FORMAT ('json' or 'text')"""
+    return JsonFormatter() if log_format == "json" else TextFormatter()
+
+
+_handler_lock = threading.Lock()
+_shared_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_log_handler() -> logging.Handler:
+    """
+    The handler shared by all application loggers (created on first use).
+
+    With LOG_QUEUE_ENABLED a LogQueueHandler feeding a QueueListener that
+    writes stdout (stopped, after draining the queue, at interpreter exit);
+    otherwise a StreamHandler on stdout.
+    """
+    global _shared_handler, _listener
+    if _shared_handler is not None:
+        return _shared_handler
+    with _handler_lock:
+        if _shared_handler is not None:
+            return _shared_handler
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(build_formatter())
+        if LOG_QUEUE_ENABLED:
+            handler = LogQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+            _listener = logging.handlers.QueueListener(handler.queue, stream_handler, respect_handler_level=False)
+            _listener.start()
+            atexit.register(stop_logging)
+        else:
+            handler = stream_handler
+        # Filters run on the calling thread, before the record is queued
+        handler.addFilter(RequestIDFilter())
+        if LOG_RATE_LIMIT_PER_MINUTE > 0:
+            handler.addFilter(RateLimitFilter())
+        _shared_handler = handler
+        return handler
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread (idempotent)"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with RequestID included in all messages.
-    
+
     Args:
         name: Logger name (typically __name__)
-        
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    
+
     # Only configure if not already configured
     if not logger.handlers:
         # Set log level (can be configured via env var)
-        logger.setLevel(logging.INFO)
-        
-        # Console handler
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.INFO)
-        
-        # Format: [timestamp] [level] [request_id] [name] message
-        formatter = logging.Formatter(
-            fmt="[%(asctime)s] [%(levelname)s] [%(request_id)s] [%(name)s] %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        handler.setFormatter(formatter)
-        
-        # Add RequestID filter
-        handler.addFilter(RequestIDFilter())
-        
-        logger.addHandler(handler)
-        
+        logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+        # Shared queue/stream handler (format, RequestID and rate limiting)
+        logger.addHandler(get_log_handler())
+
         # Prevent propagation to root logger (avoid duplicate logs)
         logger.propagate = False
-    
+
     return logger
 
 
 def configure_logging(log_level: str = "INFO") -> None:
     """
     Configure application-wide logging settings.
-    
-    Call this once at application startup (in main.py).
-    
+
+    Call this once at application startup (in main.py). Third-party loggers
+    (propagating to the root logger) go through the same handler, so they
+    are written in the same format and off the request thread too.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     """
-    # Set root logger level
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format="[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    
+    # Set root logger level and handler
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, log_level.upper()))
+    if not root.handlers:
+        root.addHandler(get_log_handler())
+
     # Reduce noise from third-party libraries
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("fastapi").setLevel(logging.INFO)
-
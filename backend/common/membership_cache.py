@@ -0,0 +1,264 @@
+"""
+Membership Snapshot Cache
+Compact per-user company membership and role snapshot shared by login,
+token refresh, company switching, the users/me endpoints and RBAC checks.
+
+A snapshot holds every non-deleted UserCompany row for one user together with
+its company name, role code/name and status code, built with ONE query
+(UserCompany joined to Company, UserCompanyRole and UserCompanyStatus).
+
+Snapshots are cached per process (LRU + TTL). Invalidation is automatic:
+inserts/updates/deletes of UserCompany rows (and Company renames) queue the
+affected users on the session, and the cache entries are dropped when that
+session commits (or rolls back). Bulk UPDATE statements bypass ORM events,
+so callers using them must call invalidate_memberships_on_commit().
+
+Invalidation only reaches the committing worker's cache; other workers
+see a change when their entry expires. Paths that issue tokens or switch
+companies (login, refresh, switch) therefore call load_membership_snapshot()
+directly; read-only views and per-request RBAC checks use the cache.
+A load that overlaps an invalidation is returned but not cached: the
+cache's generation counter is read before the query, and set() drops the
+snapshot if any invalidation has bumped it since.
+
+Usage:
+    snapshot = get_membership_snapshot(db, user_id)
+    membership = snapshot.default_membership()     # primary, else first active
+    snapshot.has_active_membership(company_id)
+
+    snapshot = await get_membership_snapshot_async(db, user_id)
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.company import Company
+from models.user_company import UserCompany
+from models.ref.user_company_role import UserCompanyRole
+from models.ref.user_company_status import UserCompanyStatus
+from common.logger import get_logger
+from common.ttl_cache import CommitInvalidation, TtlLruCache
+
+logger = get_logger(__name__)
+
+
+# Snapshot lifetime (changes from other workers become visible within this window)
+MEMBERSHIP_CACHE_TTL_SECONDS = 300
+MEMBERSHIP_CACHE_MAX_USERS = 10000
+
+# Session.info keys holding user/company IDs to invalidate on commit
+_PENDING_USERS_KEY = "membership_cache_pending_users"
+_PENDING_COMPANIES_KEY = "membership_cache_pending_companies"
+
+
+@dataclass(frozen=True)
+class CompanyMembership:
+    """
+    One UserCompany row with its display and RBAC attributes.
+
+    Attributes:
+        user_company_id: UserCompanyID
+        company_id: CompanyID
+        company_name: Company.CompanyName
+        role_code: UserCompanyRole.RoleCode (used in JWTs and RBAC checks)
+        role_name: UserCompanyRole.RoleName (display)
+        status_code: UserCompanyStatus.StatusCode ('active', 'inactive', ...)
+        is_primary: UserCompany.IsPrimaryCompany
+        joined_date: UserCompany.JoinedDate
+    """
+    user_company_id: int
+    company_id: int
+    company_name: Optional[str]
+    role_code: Optional[str]
+    role_name: Optional[str]
+    status_code: Optional[str]
+    is_primary: bool
+    joined_date: Optional[datetime]
+
+    @property
+    def is_active(self) -> bool:
+        return self.status_code == "active"
+
+
+@dataclass(frozen=True)
+class MembershipSnapshot:
+    """
+    All memberships of one user, primary first then by join date.
+
+    Attributes:
+        user_id: User the snapshot belongs to
+        memberships: Memberships (non-deleted, any status)
+    """
+    user_id: int
+    memberships: Tuple[CompanyMembership, ...]
+
+    def get(self, company_id: int) -> Optional[CompanyMembership]:
+        """Get the membership for a company (any status)"""
+        for membership in self.memberships:
+            if membership.company_id == company_id:
+                return membership
+        return None
+
+    def active(self) -> Tuple[CompanyMembership, ...]:
+        """Get active memberships"""
+        return tuple(m for m in self.memberships if m.is_active)
+
+    def active_company_ids(self) -> Set[int]:
+        """Get IDs of companies with an active membership"""
+        return {m.company_id for m in self.memberships if m.is_active}
+
+    def has_active_membership(self, company_id: int) -> bool:
+        """Check whether the user is an active member of a company"""
+        membership = self.get(company_id)
+        return membership is not None and membership.is_active
+
+    def primary(self) -> Optional[CompanyMembership]:
+        """Get the membership flagged IsPrimaryCompany (if any)"""
+        for membership in self.memberships:
+            if membership.is_primary:
+                return membership
+        return None
+
+    def default_membership(self) -> Optional[CompanyMembership]:
+        """
+        Get the membership that drives the JWT role/company claims.
+
+        Primary company first; otherwise the earliest active membership;
+        otherwise any membership.
+        """
+        primary = self.primary()
+        if primary is not None:
+            return primary
+        active = self.active()
+        if active:
+            return active[0]
+        return self.memberships[0] if self.memberships else None
+
+
+def _snapshot_statement(user_id: int):
+    return (
+        select(
+            UserCompany.UserCompanyID,
+            UserCompany.CompanyID,
+            Company.CompanyName,
+            UserCompanyRole.RoleCode,
+            UserCompanyRole.RoleName,
+            UserCompanyStatus.StatusCode,
+            UserCompany.IsPrimaryCompany,
+            UserCompany.JoinedDate,
+        )
+        .join(Company, Company.CompanyID == UserCompany.CompanyID)
+        .outerjoin(UserCompanyRole, UserCompanyRole.UserCompanyRoleID == UserCompany.UserCompanyRoleID)
+        .outerjoin(UserCompanyStatus, UserCompanyStatus.UserCompanyStatusID == UserCompany.StatusID)
+        .where(
+            UserCompany.UserID == user_id,
+            UserCompany.IsDeleted == False,  # noqa: E712
+        )
+        .order_by(
+            UserCompany.IsPrimaryCompany.desc(),
+            UserCompany.JoinedDate.asc(),
+            UserCompany.UserCompanyID.asc(),
+        )
+    )
+
+
+def _snapshot_from_rows(user_id: int, rows) -> MembershipSnapshot:
+    return MembershipSnapshot(
+        user_id=user_id,
+        memberships=tuple(
+            CompanyMembership(
+                user_company_id=r[0],
+                company_id=r[1],
+                company_name=r[2],
+                role_code=r[3],
+                role_name=r[4],
+                status_code=r[5],
+                is_primary=bool(r[6]),
+                joined_date=r[7],
+            )
+            for r in rows
+        ),
+    )
+
+
+def load_membership_snapshot(db: Session, user_id: int) -> MembershipSnapshot:
+    """Build a user's membership snapshot in one query (bypasses the cache)"""
+    return _snapshot_from_rows(user_id, db.execute(_snapshot_statement(user_id)).all())
+
+
+async def load_membership_snapshot_async(db: AsyncSession, user_id: int) -> MembershipSnapshot:
+    """Build a user's membership snapshot in one query (bypasses the cache)"""
+    return _snapshot_from_rows(user_id, (await db.execute(_snapshot_statement(user_id))).all())
+
+
+class MembershipCache(TtlLruCache):
+    """
+    Process-wide LRU cache of membership snapshots keyed by user ID.
+
+    Features:
+    - TTL expiry so changes from other workers are picked up
+    - Bounded size (least recently used users evicted first)
+    - Per-user and per-company invalidation
+    - Generation counter so a load racing an invalidation is not stored
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = MEMBERSHIP_CACHE_TTL_SECONDS,
+        max_users: int = MEMBERSHIP_CACHE_MAX_USERS
+    ):
+        super().__init__(ttl_seconds, max_users, key=lambda snapshot: snapshot.user_id)
+
+    def invalidate_companies(self, company_ids: Iterable[int]) -> None:
+        """Drop every snapshot that contains one of the given companies"""
+        company_ids = set(company_ids)
+        self.invalidate_where(lambda snapshot: any(m.company_id in company_ids for m in snapshot.memberships))
+
+
+# Shared instance
+membership_cache = MembershipCache()
+
+
+def get_membership_snapshot(db: Session, user_id: int) -> MembershipSnapshot:
+    """Get a user's membership snapshot (cached, one query on miss)"""
+    snapshot = membership_cache.get(user_id)
+    if snapshot is None:
+        generation = membership_cache.generation()
+        snapshot = membership_cache.set(load_membership_snapshot(db, user_id), generation)
+    return snapshot
+
+
+async def get_membership_snapshot_async(db: AsyncSession, user_id: int) -> MembershipSnapshot:
+    """Get a user's membership snapshot (cached, one query on miss)"""
+    snapshot = membership_cache.get(user_id)
+    if snapshot is None:
+        generation = membership_cache.generation()
+        snapshot = membership_cache.set(await load_membership_snapshot_async(db, user_id), generation)
+    return snapshot
+
+
+def invalidate_memberships_on_commit(db: Session, user_ids: Iterable[int]) -> None:
+    """
+    Drop the users' snapshots once the session's transaction commits.
+
+    Needed after bulk UPDATE/DELETE statements on UserCompany, which bypass
+    the ORM events that queue invalidation automatically.
+    """
+    _pending_users.queue(db, user_ids)
+
+
+# ----------------------------------------------------------------------------
+# Automatic invalidation (ORM events)
+# ----------------------------------------------------------------------------
+
+# Over-invalidating after a rollback is harmless; keeping stale entries is not
+_pending_users = CommitInvalidation(_PENDING_USERS_KEY, membership_cache.invalidate)
+_pending_companies = CommitInvalidation(_PENDING_COMPANIES_KEY, membership_cache.invalidate_companies)
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(UserCompany, _event_name, _pending_users.queue_attribute("UserID"))
+event.listen(Company, "after_update", _pending_companies.queue_attribute("CompanyID"))
@@ -0,0 +1,557 @@
+"""
+In-Process Metrics Registry
+Counters, gauges and latency histograms with Prometheus exposition and a
+periodic flush of aggregated summaries to log.PerformanceMetric
+
+Recording a measurement only updates memory (one dict increment under the
+series lock); nothing is written per request. Every
+METRICS_FLUSH_INTERVAL_SECONDS the flush worker diffs each series against
+the previous flush and writes one row per series and statistic (p50/p90/p99,
+count, and the HTTP error rate) to log.PerformanceMetric in a single INSERT.
+GET /metrics renders the cumulative values in the Prometheus text format
+(histograms as summaries with 0.5/0.9/0.99 quantiles).
+
+Histograms are HDR-style (log-linear buckets): values are exact below 128
+units and within 1/64 (~1.6%) above, with no upper limit, so per-endpoint
+latency distributions need a few hundred sparse counters at most and
+intervals are computed by subtracting bucket counts.
+
+Environment variables:
+    METRICS_ENABLED                  Record HTTP request metrics (default: true)
+    METRICS_FLUSH_ENABLED            Run the PerformanceMetric flush worker (default: true)
+    METRICS_FLUSH_INTERVAL_SECONDS   Flush interval (default: 60)
+    METRICS_ALLOW_REMOTE_SCRAPE      Serve /metrics to non-loopback clients (default: false)
+
+Usage:
+    job_duration = metrics_registry.histogram("export_duration_ms", "Export job duration", ("format",))
+    job_duration.labels("csv").record(elapsed_ms)
+
+    metrics_registry.counter("leads_ingested_total", "Leads stored").labels().inc(accepted)
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from common.database import LogSessionLocal
+from common.logger import get_logger
+from models.log.performance_metric import PerformanceMetric
+
+logger = get_logger(__name__)
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("true", "1", "yes")
+METRICS_FLUSH_ENABLED = os.getenv("METRICS_FLUSH_ENABLED", "true").lower() in ("true", "1", "yes")
+METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "60"))
+METRICS_ALLOW_REMOTE_SCRAPE = os.getenv("METRICS_ALLOW_REMOTE_SCRAPE", "false").lower() in ("true", "1", "yes")
+
+# Sub-buckets per power of two: relative error <= 1 / (SUB_BUCKETS / 2)
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF_SUB_BUCKETS = SUB_BUCKETS >> 1
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+# PerformanceMetric.MetricType is NVARCHAR(50); "_p99" etc. is appended
+MAX_METRIC_NAME_LENGTH = 40
+
+# PerformanceMetric.Value is NUMERIC(10, 2)
+MAX_STORED_VALUE = 99999999.99
+
+_METRIC_NAME = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+
+# ----------------------------------------------------------------------------
+# Series
+# ----------------------------------------------------------------------------
+
+def bucket_index(value: int) -> int:
+    """HDR bucket of a non-negative integer"""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * _HALF_SUB_BUCKETS + (value >> shift) - _HALF_SUB_BUCKETS
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """[low, high) integer range of an HDR bucket"""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift, offset = divmod(index - SUB_BUCKETS, _HALF_SUB_BUCKETS)
+    mantissa = offset + _HALF_SUB_BUCKETS
+    return mantissa << (shift + 1), (mantissa + 1) << (shift + 1)
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    """
+    Point-in-time copy of a histogram (cumulative, or an interval when
+    subtracted from a later snapshot).
+
+    Attributes:
+        counts: HDR bucket index -> observations
+        count: Observations
+        total: Sum of observed values
+        max: Largest observed value (for an interval: upper bound of its top bucket)
+        scale: Integer units per value unit
+    """
+    counts: Dict[int, int]
+    count: int
+    total: float
+    max: float
+    scale: int
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1); 0.0 for an empty histogram"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                value = low if high - low == 1 else (low + high - 1) / 2
+                return min(value / self.scale, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __sub__(self, previous: "HistogramSnapshot") -> "HistogramSnapshot":
+        counts = {
+            index: n - previous.counts.get(index, 0)
+            for index, n in self.counts.items()
+            if n != previous.counts.get(index, 0)
+        }
+        top = max(counts) if counts else 0
+        return HistogramSnapshot(
+            counts=counts,
+            count=self.count - previous.count,
+            total=self.total - previous.total,
+            max=min(self.max, bucket_bounds(top)[1] / self.scale) if counts else 0.0,
+            scale=self.scale,
+        )
+
+
+class Histogram:
+    """HDR-style histogram of non-negative values"""
+
+    __slots__ = ("_scale", "_counts", "_count", "_total", "_max", "_lock")
+
+    def __init__(self, scale: int = 1000):
+        self._scale = scale
+        self._counts: Dict[int, int] = {}
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value: float) -> None:
+        """Add one observation (negative values count as 0)"""
+        value = value if value > 0 else 0.0
+        index = bucket_index(int(value * self._scale))
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self._count += 1
+            self._total += value
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            return HistogramSnapshot(dict(self._counts), self._count, self._total, self._max, self._scale)
+
+
+class Counter:
+    """Monotonically increasing value"""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Value that goes up and down"""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+# ----------------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------------
+
+class MetricFamily:
+    """
+    A named metric with one series per combination of label values.
+
+    Attributes:
+        name: Metric name (Prometheus naming rules)
+        help: One-line description
+        kind: 'counter', 'gauge' or 'histogram'
+        label_names: Label names, in the order labels() takes values
+    """
+
+    def __init__(self, name: str, help: str, kind: str, label_names: Sequence[str], factory: Callable[[], object]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> object:
+        """Get (or create) the series for the given label values"""
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"Metric {self.name} takes labels {self.label_names}, got {key}")
+            with self._lock:
+                series = self._series.setdefault(key, self._factory())
+        return series
+
+    def series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        """(label values, series) pairs"""
+        with self._lock:
+            return list(self._series.items())
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of metric families.
+
+    Registering an existing name returns the existing family (so modules can
+    declare their metrics at import time); a different kind or label set is
+    an error.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, help: str, kind: str, label_names: Sequence[str], factory) -> MetricFamily:
+        if not _METRIC_NAME.match(name) or len(name) > MAX_METRIC_NAME_LENGTH:
+            raise ValueError(f"Invalid metric name: {name!r}")
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, help, kind, label_names, factory)
+            elif family.kind != kind or family.label_names != tuple(label_names):
+                raise ValueError(f"Metric {name} already registered as {family.kind}{family.label_names}")
+            return family
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, help, "counter", label_names, Counter)
+
+    def gauge(self, name: str, help: str, label_names: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, help, "gauge", label_names, Gauge)
+
+    def histogram(self, name: str, help: str, label_names: Sequence[str] = (), scale: int = 1000) -> MetricFamily:
+        """
+        Register a histogram.
+
+        Args:
+            scale: Integer units per value unit (1000 for millisecond values
+                gives exact microsecond resolution below 0.128ms)
+        """
+        return self._register(name, help, "histogram", label_names, lambda: Histogram(scale))
+
+    def families(self) -> List[MetricFamily]:
+        with self._lock:
+            return sorted(self._families.values(), key=lambda family: family.name)
+
+    def reset(self) -> None:
+        """Drop every series, keeping the families (tests)"""
+        for family in self.families():
+            with family._lock:
+                family._series.clear()
+
+
+# Shared instance
+metrics_registry = MetricsRegistry()
+
+
+# ----------------------------------------------------------------------------
+# HTTP request metrics (recorded by middleware.metrics.MetricsMiddleware)
+# ----------------------------------------------------------------------------
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_ms", "HTTP request latency in milliseconds", ("method", "route")
+)
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by response status", ("method", "route", "status")
+)
+http_requests_in_progress = metrics_registry.gauge(
+    "http_requests_in_progress", "HTTP requests being processed by this worker"
+)
+
+
+def observe_request(method: str, route: str, status_code: int, duration_ms: float) -> None:
+    """Record one finished HTTP request"""
+    http_request_duration.labels(method, route).record(duration_ms)
+    http_requests.labels(method, route, status_code).inc()
+
+
+# ----------------------------------------------------------------------------
+# Prometheus exposition
+# ----------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(registry: MetricsRegistry = metrics_registry) -> str:
+    """Render every family in the Prometheus text exposition format (0.0.4)"""
+    lines = []
+    for family in registry.families():
+        series = family.series()
+        kind = "summary" if family.kind == "histogram" else family.kind
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {kind}")
+        for values, item in sorted(series, key=lambda pair: pair[0]):
+            if family.kind == "histogram":
+                snapshot = item.snapshot()
+                for q in SUMMARY_QUANTILES:
+                    labels = _label_text(family.label_names, values, ("quantile", str(q)))
+                    lines.append(f"{family.name}{labels} {_number(snapshot.quantile(q))}")
+                labels = _label_text(family.label_names, values)
+                lines.append(f"{family.name}_sum{labels} {_number(snapshot.total)}")
+                lines.append(f"{family.name}_count{labels} {snapshot.count}")
+            else:
+                lines.append(f"{family.name}{_label_text(family.label_names, values)} {_number(item.value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------------
+# Flush to log.PerformanceMetric
+# ----------------------------------------------------------------------------
+
+@dataclass
+class MetricsInterval:
+    """
+    Rows summarizing one flush interval, and the cumulative marks to keep
+    once they are stored.
+
+    Attributes:
+        rows: PerformanceMetric insert parameters
+        marks: (family, label values) -> cumulative snapshot or counter value
+    """
+    rows: List[Dict[str, object]] = field(default_factory=list)
+    marks: Dict[Tuple[str, Tuple[str, ...]], object] = field(default_factory=dict)
+
+
+def _stored(value: float) -> float:
+    return round(min(value, MAX_STORED_VALUE), 2)
+
+
+def _endpoint(values: Tuple[str, ...]) -> Optional[str]:
+    return " ".join(values)[:500] if values else None
+
+
+class MetricsFlusher:
+    """
+    Turns cumulative series into per-interval PerformanceMetric rows.
+
+    Histograms produce <name>_p50/_p90/_p99 and <name>_count rows per series
+    (Endpoint = label values, e.g. 'GET /api/events/search'); the HTTP
+    request counter produces an http_error_rate row (5xx / all) per route.
+    Series without observations in the interval produce no rows. Marks only
+    advance once the rows are stored, so a failed write is retried with the
+    next interval's data included.
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics_registry):
+        self._registry = registry
+        self._marks: Dict[Tuple[str, Tuple[str, ...]], object] = {}
+        self._last_flush = time.monotonic()
+
+    def collect(self, now: Optional[datetime] = None) -> MetricsInterval:
+        now = now or datetime.utcnow()
+        interval_seconds = round(time.monotonic() - self._last_flush, 3)
+        interval = MetricsInterval()
+
+        for family in self._registry.families():
+            if family.kind != "histogram":
+                continue
+            for values, histogram in family.series():
+                key = (family.name, values)
+                cumulative = histogram.snapshot()
+                previous = self._marks.get(key)
+                delta = cumulative - previous if previous is not None else cumulative
+                interval.marks[key] = cumulative
+                if delta.count <= 0:
+                    continue
+                details = json.dumps({
+                    "interval_seconds": interval_seconds,
+                    "count": delta.count,
+                    "mean": round(delta.mean, 3),
+                    "max": round(delta.max, 3),
+                })
+                base = {"Endpoint": _endpoint(values), "Details": details, "CreatedDate": now}
+                for q in SUMMARY_QUANTILES:
+                    interval.rows.append({
+                        **base, "MetricType": f"{family.name}_p{int(q * 100)}", "Value": _stored(delta.quantile(q))
+                    })
+                interval.rows.append({**base, "MetricType": f"{family.name}_count", "Value": _stored(delta.count)})
+
+        totals: Dict[Tuple[str, ...], List[float]] = {}
+        for values, counter in http_requests.series():
+            key = (http_requests.name, values)
+            current = counter.value
+            delta = current - self._marks.get(key, 0.0)
+            interval.marks[key] = current
+            if delta <= 0:
+                continue
+            route_totals = totals.setdefault(values[:2], [0.0, 0.0])
+            route_totals[0] += delta
+            if values[2].isdigit() and int(values[2]) >= 500:
+                route_totals[1] += delta
+        for values, (requests, errors) in totals.items():
+            interval.rows.append({
+                "MetricType": "http_error_rate",
+                "Endpoint": _endpoint(values),
+                "Value": _stored(errors / requests),
+                "Details": json.dumps({
+                    "interval_seconds": interval_seconds, "requests": int(requests), "errors": int(errors)
+                }),
+                "CreatedDate": now,
+            })
+        return interval
+
+    def commit(self, interval: MetricsInterval) -> None:
+        """Advance the marks once the interval's rows are stored"""
+        self._marks.update(interval.marks)
+        self._last_flush = time.monotonic()
+
+
+def flush_metrics(db: Session, flusher: MetricsFlusher) -> int:
+    """
+    Write one interval of summaries to log.PerformanceMetric and commit.
+
+    Returns:
+        Rows written
+    """
+    interval = flusher.collect()
+    if interval.rows:
+        db.execute(PerformanceMetric.__table__.insert(), interval.rows)
+        db.commit()
+    flusher.commit(interval)
+    return len(interval.rows)
+
+
+class MetricsFlushWorker:
+    """
+    Daemon thread that flushes metric summaries every interval.
+
+    Started/stopped with the application (main.py); stopping flushes the
+    final partial interval. Failures are logged and the interval is carried
+    into the next flush.
+    """
+
+    def __init__(
+        self,
+        session_factory=LogSessionLocal,
+        interval_seconds: float = METRICS_FLUSH_INTERVAL_SECONDS,
+        registry: MetricsRegistry = metrics_registry
+    ):
+        self._session_factory = session_factory
+        self._interval_seconds = interval_seconds
+        self._flusher = MetricsFlusher(registry)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Flush once; returns rows written"""
+        db = self._session_factory()
+        try:
+            return flush_metrics(db, self._flusher)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run_logged(self) -> None:
+        try:
+            written = self.run_once()
+            if written:
+                logger.debug(f"Metrics flush worker wrote {written} PerformanceMetric rows")
+        except Exception as e:
+            logger.error(f"Metrics flush worker failed: {str(e)}", exc_info=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            self._run_logged()
+        self._run_logged()
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker to stop and wait for the final flush"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+metrics_flush_worker = MetricsFlushWorker()
@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 
 from common.logger import get_logger
+from common.membership_cache import MembershipSnapshot
 
 logger = get_logger(__name__)
 
@@ -66,19 +67,22 @@ def verify_company_access(
     resource_company_id: int,
     user_company_id: Optional[int],
     resource_type: str = "Resource",
-    log_denied_access: bool = True
+    log_denied_access: bool = True,
+    memberships: Optional[MembershipSnapshot] = None
 ) -> None:
     """
     Verify user has access to resource's company (AC-1.8.2, AC-1.8.3, AC-1.8.4).
     
     Prevents cross-company data access by verifying the resource
-    belongs to the user's current company.
+    belongs to the user's current company. When the user's membership
+    snapshot is passed, the membership must also still be active.
     
     Args:
         resource_company_id: Company ID of the resource being accessed
         user_company_id: Company ID from user's JWT
         resource_type: Type of resource for logging (e.g., "Event", "Form")
         log_denied_access: Whether to log denied access attempts
+        memberships: Optional membership snapshot (common.membership_cache)
         
     Raises:
         HTTPException: 403 if companies don't match or user has no company context
@@ -109,6 +113,17 @@ def verify_company_access(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Access denied. {resource_type} belongs to a different company."
         )
+    
+    if memberships is not None and not memberships.has_active_membership(user_company_id):
+        if log_denied_access:
+            logger.warning(
+                f"Access denied: UserID={memberships.user_id} no longer has an active membership "
+                f"in CompanyID={user_company_id} ({resource_type})"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Your membership in this company is no longer active."
+        )
 
 
 def log_cross_company_access_attempt(
@@ -0,0 +1,279 @@
+"""
+Payload Blobs
+Content-addressed deduplication of captured payloads and headers
+
+Most captured header sets are identical (same browser, origin and redacted
+credentials) and many response bodies are byte-identical across thousands
+of requests (reference data such as countries or themes). Request loggers
+therefore store each distinct payload once in log.PayloadBlob, keyed by a
+16-byte BLAKE2b digest of its compact text, and log.ApiRequest holds only
+the blob IDs (RequestPayloadBlobID / ResponsePayloadBlobID / HeadersBlobID).
+
+Writers keep an in-process LRU of recently written digests: a hit returns
+the blob ID with no database work at all. An entry older than
+PAYLOAD_BLOB_TOUCH_SECONDS refreshes the blob's LastSeenDate by key; an
+unknown digest is inserted (falling back to a lookup when another process
+stored it first). Each write commits on its own. So a blob referenced by a
+request created at T always has LastSeenDate >= T - PAYLOAD_BLOB_TOUCH_SECONDS,
+which is what lets log retention delete blobs by LastSeenDate once the
+requests before its cutoff are gone (common.log_retention).
+
+Payloads shorter than PAYLOAD_BLOB_MIN_BYTES stay in the row (compressed):
+a blob reference plus its hash and index entry would cost more than it saves.
+
+Readers call expand_payload_rows(): blob references, compressed columns and
+legacy text rows all come back as RequestPayload / ResponsePayload / Headers
+text.
+
+Environment variables:
+    PAYLOAD_DEDUP_ENABLED         Store payloads as shared blobs (default: true)
+    PAYLOAD_BLOB_CACHE_SIZE       Digests remembered per process (default: 4096)
+    PAYLOAD_BLOB_TOUCH_SECONDS    Max age of a cached digest (default: 3600)
+    PAYLOAD_BLOB_MIN_BYTES        Smaller payloads stay in the row (default: 128)
+
+Usage:
+    api_request = ApiRequest(..., **payload_columns(db, request_body, response_body, headers_json))
+
+    rows = expand_payload_rows(rows, session_blob_fetcher(db))
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from common.logger import get_logger
+from common.metrics import metrics_registry
+from common.payload_codec import PAYLOAD_COLUMNS, PayloadCodec, compact_json, decode_payload_columns, encode_payload_columns
+from models.log.payload_blob import PayloadBlob
+
+logger = get_logger(__name__)
+
+
+PAYLOAD_DEDUP_ENABLED = os.getenv("PAYLOAD_DEDUP_ENABLED", "true").lower() in ("true", "1", "yes")
+PAYLOAD_BLOB_CACHE_SIZE = int(os.getenv("PAYLOAD_BLOB_CACHE_SIZE", "4096"))
+PAYLOAD_BLOB_TOUCH_SECONDS = float(os.getenv("PAYLOAD_BLOB_TOUCH_SECONDS", "3600"))
+PAYLOAD_BLOB_MIN_BYTES = int(os.getenv("PAYLOAD_BLOB_MIN_BYTES", "128"))
+
+# (text column, blob ID column) pairs on log.ApiRequest
+BLOB_COLUMNS = (
+    ("RequestPayload", "RequestPayloadBlobID"),
+    ("ResponsePayload", "ResponsePayloadBlobID"),
+    ("Headers", "HeadersBlobID"),
+)
+
+payload_blob_writes = metrics_registry.counter(
+    "payload_blob_writes_total", "Captured payloads stored by outcome (cached, touched, inserted)", ("result",)
+)
+
+BlobFetcher = Callable[[List[int]], Dict[int, bytes]]
+
+
+def content_hash(text: str) -> bytes:
+    """16-byte BLAKE2b digest of payload text (log.PayloadBlob.ContentHash)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class PayloadBlobStore:
+    """
+    Writes payloads to log.PayloadBlob, skipping recently written ones.
+
+    Thread-safe; one instance per process (payload_blob_store).
+    """
+
+    def __init__(
+        self,
+        cache_size: int = PAYLOAD_BLOB_CACHE_SIZE,
+        touch_seconds: float = PAYLOAD_BLOB_TOUCH_SECONDS,
+        codec: PayloadCodec = None
+    ):
+        self._cache_size = cache_size
+        self._touch_seconds = touch_seconds
+        self._codec = codec
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+    def clear(self) -> None:
+        """Forget cached digests (tests, after blob garbage collection)"""
+        with self._lock:
+            self._cache.clear()
+
+    def store(self, db: Session, text: Optional[str]) -> Optional[int]:
+        """
+        Blob ID for a payload, writing it if needed; None stays None.
+
+        Commits the session unless the digest is cached, so call it before
+        adding the referencing log.ApiRequest row.
+        """
+        if text is None:
+            return None
+        text = compact_json(text)
+        digest = content_hash(text)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None and now - cached[1] < self._touch_seconds:
+                self._cache.move_to_end(digest)
+                payload_blob_writes.labels("cached").inc()
+                return cached[0]
+
+        blob_id = self._write(db, text, digest, cached[0] if cached is not None else None)
+
+        with self._lock:
+            self._cache[digest] = (blob_id, now)
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return blob_id
+
+    def _existing(self, db: Session, digest: bytes) -> Optional[int]:
+        return db.scalar(select(PayloadBlob.PayloadBlobID).where(PayloadBlob.ContentHash == digest))
+
+    def _touch(self, db: Session, blob_id: int, now: datetime) -> bool:
+        touched = db.execute(
+            update(PayloadBlob).where(PayloadBlob.PayloadBlobID == blob_id).values(LastSeenDate=now)
+        ).rowcount
+        db.commit()
+        return bool(touched)
+
+    def _write(self, db: Session, text: str, digest: bytes, known_id: Optional[int] = None) -> int:
+        now = datetime.utcnow()
+        if known_id is not None and self._touch(db, known_id, now):
+            # Aged cache entry: one UPDATE by key
+            payload_blob_writes.labels("touched").inc()
+            return known_id
+
+        # Unknown here: insert first (new content is the common case)
+        from common.payload_codec import payload_codec
+        data = text.encode("utf-8")
+        blob = PayloadBlob(
+            ContentHash=digest,
+            Content=(self._codec or payload_codec).encode(text, compact=False),
+            ContentLength=len(data),
+            CreatedDate=now,
+            LastSeenDate=now,
+        )
+        db.add(blob)
+        try:
+            db.flush()
+            blob_id = blob.PayloadBlobID
+            db.commit()
+        except IntegrityError:
+            # Already stored (by another process, or before a restart)
+            db.rollback()
+            blob_id = self._existing(db, digest)
+            if blob_id is None or not self._touch(db, blob_id, now):
+                raise
+            payload_blob_writes.labels("touched").inc()
+            return blob_id
+        payload_blob_writes.labels("inserted").inc()
+        return blob_id
+
+
+# Shared instance
+payload_blob_store = PayloadBlobStore()
+
+
+def payload_columns(
+    db: Session,
+    request_payload: Optional[str],
+    response_payload: Optional[str],
+    headers: Optional[str],
+    store: PayloadBlobStore = None
+) -> Dict[str, object]:
+    """
+    log.ApiRequest column values for captured payloads.
+
+    Blob references when PAYLOAD_DEDUP_ENABLED; payloads shorter than
+    PAYLOAD_BLOB_MIN_BYTES (and everything when dedup is off) go to the
+    per-row columns (common.payload_codec.encode_payload_columns).
+    """
+    if not PAYLOAD_DEDUP_ENABLED:
+        return encode_payload_columns(request_payload, response_payload, headers)
+    store = store or payload_blob_store
+    values = {"RequestPayload": request_payload, "ResponsePayload": response_payload, "Headers": headers}
+    shared = {
+        column: text for column, text in values.items()
+        if text is not None and len(text) >= PAYLOAD_BLOB_MIN_BYTES
+    }
+    columns = encode_payload_columns(*(None if column in shared else text for column, text in values.items()))
+    for text_column, blob_column in BLOB_COLUMNS:
+        columns[blob_column] = store.store(db, shared[text_column]) if text_column in shared else None
+    return columns
+
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+def session_blob_fetcher(db: Session) -> BlobFetcher:
+    """Blob fetcher for a SQLAlchemy session"""
+    def fetch(blob_ids: List[int]) -> Dict[int, bytes]:
+        rows = db.execute(
+            select(PayloadBlob.PayloadBlobID, PayloadBlob.Content).where(PayloadBlob.PayloadBlobID.in_(blob_ids))
+        )
+        return {row.PayloadBlobID: row.Content for row in rows}
+    return fetch
+
+
+def query_blob_fetcher(execute_query: Callable) -> BlobFetcher:
+    """Blob fetcher for DatabaseService.execute_query (raw SQL, '?' parameters)"""
+    def fetch(blob_ids: List[int]) -> Dict[int, bytes]:
+        placeholders = ", ".join("?" for _ in blob_ids)
+        rows = execute_query(
+            f"SELECT PayloadBlobID, Content FROM log.PayloadBlob WHERE PayloadBlobID IN ({placeholders})",
+            tuple(blob_ids)
+        )
+        return {row["PayloadBlobID"]: row["Content"] for row in rows}
+    return fetch
+
+
+def expand_payload_rows(
+    rows: Iterable[Dict],
+    fetch: Optional[BlobFetcher] = None,
+    codec: PayloadCodec = None
+) -> List[Dict]:
+    """
+    Replace blob references and compressed payload columns in
+    log.ApiRequest rows (dicts) by their text.
+
+    Blobs are fetched once per distinct ID for the whole list. Rows without
+    blob or compressed columns are returned unchanged.
+    """
+    rows = list(rows)
+    blob_ids = {
+        row[blob_column]
+        for row in rows
+        for _, blob_column in BLOB_COLUMNS
+        if row.get(blob_column) is not None
+    }
+    blobs: Dict[int, bytes] = {}
+    if blob_ids:
+        if fetch is None:
+            raise ValueError("Rows reference payload blobs but no blob fetcher was given")
+        ordered = sorted(blob_ids)
+        for start in range(0, len(ordered), 500):
+            blobs.update(fetch(ordered[start:start + 500]))
+
+    compressed_columns = dict(PAYLOAD_COLUMNS)
+    for row in rows:
+        for text_column, blob_column in BLOB_COLUMNS:
+            if blob_column not in row:
+                continue
+            blob_id = row.pop(blob_column)
+            if blob_id is None:
+                continue
+            if blob_id in blobs:
+                # Decoded with the compressed columns below
+                row[compressed_columns[text_column]] = blobs[blob_id]
+            else:
+                row[text_column] = f"[MISSING PAYLOAD BLOB {blob_id}]"
+        decode_payload_columns(row, codec)
+    return rows
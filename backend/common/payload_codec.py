@@ -0,0 +1,382 @@
+"""
+Payload Codec
+Compact, dictionary-compressed storage for captured request/response bodies
+
+Captured payloads and headers used to be stored as pretty-printed JSON in
+NVARCHAR(MAX) (UTF-16 on SQL Server): two to four times the wire size. They
+are now written to VARBINARY(MAX) columns (log.ApiRequest
+RequestPayloadCompressed / ResponsePayloadCompressed / HeadersCompressed)
+as compact JSON compressed with a shared dictionary:
+
+    frame = codec (1 byte) | dictionary ID (2 bytes, big-endian) | compressed bytes
+
+- codec 2: zstd (zstandard, pinned in requirements.txt) with a trained
+  dictionary
+- codec 1: zlib (standard library) with the dictionary as preset zdict,
+  used only where zstandard cannot be installed
+
+The codec is per frame, so zlib frames stay readable after a server moves
+to zstd; zstd frames need zstandard to decode.
+
+API payloads are small and repetitive (the same keys in every body), which
+is exactly where per-message compression does badly and a dictionary trained
+on our own JSON shapes does well. Dictionaries live in log.PayloadDictionary;
+train_payload_dictionary() builds one from recent captured payloads and
+activates it. Old frames keep their dictionary ID, so retraining never
+breaks reads. Dictionary 0 means "no dictionary".
+
+Readers never look at frames: decode_payload_columns() turns a row (dict)
+from log.ApiRequest back into RequestPayload / ResponsePayload / Headers
+text, for rows written before and after this change alike.
+
+Environment variables:
+    PAYLOAD_COMPRESSION_ENABLED  Write compressed columns (default: true)
+    PAYLOAD_COMPRESSION_LEVEL    zstd/zlib level (default: 6)
+
+Usage:
+    frame = payload_codec.encode(body_text)
+    text = payload_codec.decode(frame)
+
+    row = decode_payload_columns(dict(row._mapping))
+"""
+import json
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from common.database import LogSessionLocal
+from common.logger import get_logger
+from models.log.payload_dictionary import PayloadDictionary
+
+logger = get_logger(__name__)
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # in requirements.txt; zlib with a preset dictionary without it
+    zstandard = None
+
+
+PAYLOAD_COMPRESSION_ENABLED = os.getenv("PAYLOAD_COMPRESSION_ENABLED", "true").lower() in ("true", "1", "yes")
+PAYLOAD_COMPRESSION_LEVEL = int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "6"))
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+
+_HEADER = struct.Struct(">BH")
+
+# zlib only looks back 32 KB, so a larger preset dictionary is wasted
+MAX_ZLIB_DICTIONARY_BYTES = 32 * 1024
+DEFAULT_DICTIONARY_BYTES = 16 * 1024
+
+# (text column, compressed column) pairs on log.ApiRequest
+PAYLOAD_COLUMNS = (
+    ("RequestPayload", "RequestPayloadCompressed"),
+    ("ResponsePayload", "ResponsePayloadCompressed"),
+    ("Headers", "HeadersCompressed"),
+)
+
+
+def default_codec() -> int:
+    """Codec used for new frames on this server"""
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compact_json(text: str) -> str:
+    """
+    Compact JSON text (no indentation, no spaces after separators).
+
+    Text that is not a complete JSON document (plain text, truncated
+    bodies) is returned unchanged.
+    """
+    stripped = text.lstrip()[:1]
+    if stripped not in ("{", "["):
+        return text
+    try:
+        return json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        return text
+
+
+class PayloadCodec:
+    """
+    Encodes/decodes payload frames with the registered dictionaries.
+
+    Dictionaries are loaded from log.PayloadDictionary on first use and
+    again whenever a frame names a dictionary this process has not seen
+    (another worker trained a new one).
+    """
+
+    def __init__(self, session_factory=LogSessionLocal, level: int = PAYLOAD_COMPRESSION_LEVEL):
+        self._session_factory = session_factory
+        self._level = level
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, Tuple[int, bytes]] = {}
+        self._active_id = 0
+        self._loaded = False
+        self._zstd_dicts: Dict[int, object] = {}
+
+    # -- dictionaries --------------------------------------------------------
+
+    def load(self, db: Optional[Session] = None) -> None:
+        """(Re)load dictionaries; the newest active one is used for encoding"""
+        own_session = db is None
+        db = db or self._session_factory()
+        try:
+            rows = db.execute(
+                select(PayloadDictionary.PayloadDictionaryID, PayloadDictionary.Codec,
+                       PayloadDictionary.Content, PayloadDictionary.IsActive)
+                .order_by(PayloadDictionary.PayloadDictionaryID)
+            ).all()
+        finally:
+            if own_session:
+                db.close()
+        with self._lock:
+            self._dictionaries = {row.PayloadDictionaryID: (row.Codec, bytes(row.Content)) for row in rows}
+            self._zstd_dicts = {}
+            usable = [
+                row.PayloadDictionaryID for row in rows
+                if row.IsActive and row.Codec == default_codec()
+            ]
+            self._active_id = usable[-1] if usable else 0
+            self._loaded = True
+
+    def register(self, dictionary_id: int, codec: int, content: bytes, active: bool = True) -> None:
+        """Add a dictionary without a database round trip (tests, just-trained dictionaries)"""
+        with self._lock:
+            self._dictionaries[dictionary_id] = (codec, content)
+            if active and codec == default_codec():
+                self._active_id = dictionary_id
+            self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            try:
+                self.load()
+            except Exception as e:
+                # No dictionary table yet: compress without one
+                logger.warning(f"Payload dictionaries unavailable: {str(e)}")
+                self._loaded = True
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        if dictionary_id not in self._dictionaries:
+            self.load()
+        return self._dictionaries[dictionary_id][1]
+
+    def _zstd_dict(self, dictionary_id: int):
+        zdict = self._zstd_dicts.get(dictionary_id)
+        if zdict is None:
+            zdict = self._zstd_dicts[dictionary_id] = zstandard.ZstdCompressionDict(self._dictionary(dictionary_id))
+        return zdict
+
+    @property
+    def active_dictionary_id(self) -> int:
+        self._ensure_loaded()
+        return self._active_id
+
+    # -- frames --------------------------------------------------------------
+
+    def encode(self, text: Optional[str], compact: bool = True) -> Optional[bytes]:
+        """Compress a payload (compacting JSON first); None stays None"""
+        if text is None:
+            return None
+        if compact:
+            text = compact_json(text)
+        data = text.encode("utf-8")
+        self._ensure_loaded()
+        codec, dictionary_id = default_codec(), self._active_id
+
+        if codec == CODEC_ZSTD:
+            if dictionary_id:
+                compressor = zstandard.ZstdCompressor(level=self._level, dict_data=self._zstd_dict(dictionary_id))
+            else:
+                compressor = zstandard.ZstdCompressor(level=self._level)
+            body = compressor.compress(data)
+        else:
+            if dictionary_id:
+                compressor = zlib.compressobj(self._level, zlib.DEFLATED, -15, zdict=self._dictionary(dictionary_id))
+            else:
+                compressor = zlib.compressobj(self._level, zlib.DEFLATED, -15)
+            body = compressor.compress(data) + compressor.flush()
+        return _HEADER.pack(codec, dictionary_id) + body
+
+    def decode(self, value) -> Optional[str]:
+        """
+        Payload text from a frame; str values (rows written before
+        compression) are returned unchanged.
+
+        Raises:
+            ValueError: Unknown codec, or zstd frame without zstandard installed
+        """
+        if value is None or isinstance(value, str):
+            return value
+        frame = bytes(value)
+        codec, dictionary_id = _HEADER.unpack_from(frame)
+        body = frame[_HEADER.size:]
+
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise ValueError("Payload was compressed with zstd but the zstandard package is not installed")
+            if dictionary_id:
+                decompressor = zstandard.ZstdDecompressor(dict_data=self._zstd_dict(dictionary_id))
+            else:
+                decompressor = zstandard.ZstdDecompressor()
+            data = decompressor.decompress(body)
+        elif codec == CODEC_ZLIB:
+            if dictionary_id:
+                decompressor = zlib.decompressobj(-15, zdict=self._dictionary(dictionary_id))
+            else:
+                decompressor = zlib.decompressobj(-15)
+            data = decompressor.decompress(body) + decompressor.flush()
+        else:
+            raise ValueError(f"Unknown payload codec {codec}")
+        return data.decode("utf-8")
+
+
+# Shared instance
+payload_codec = PayloadCodec()
+
+
+def encode_payload_columns(
+    request_payload: Optional[str],
+    response_payload: Optional[str],
+    headers: Optional[str],
+    codec: PayloadCodec = None
+) -> Dict[str, object]:
+    """
+    log.ApiRequest column values for captured payloads.
+
+    Compressed columns when PAYLOAD_COMPRESSION_ENABLED (text columns left
+    NULL), the text columns otherwise.
+    """
+    values = {"RequestPayload": request_payload, "ResponsePayload": response_payload, "Headers": headers}
+    if not PAYLOAD_COMPRESSION_ENABLED:
+        return values
+    codec = codec or payload_codec
+    encoded: Dict[str, object] = {}
+    for text_column, compressed_column in PAYLOAD_COLUMNS:
+        encoded[text_column] = None
+        encoded[compressed_column] = codec.encode(values[text_column])
+    return encoded
+
+
+def decode_payload_columns(row: Dict, codec: PayloadCodec = None) -> Dict:
+    """
+    Replace compressed payload columns in a log.ApiRequest row (dict) by
+    their text. Rows without compressed columns are returned unchanged.
+    """
+    codec = codec or payload_codec
+    for text_column, compressed_column in PAYLOAD_COLUMNS:
+        if compressed_column not in row:
+            continue
+        compressed = row.pop(compressed_column)
+        if compressed is not None:
+            try:
+                row[text_column] = codec.decode(compressed)
+            except Exception as e:
+                logger.error(f"Failed to decode {compressed_column}: {str(e)}")
+                row[text_column] = f"[UNREADABLE PAYLOAD: {str(e)}]"
+    return row
+
+
+# ----------------------------------------------------------------------------
+# Dictionary training
+# ----------------------------------------------------------------------------
+
+# JSON keys, short strings and literals: the repeated fragments of API bodies
+_FRAGMENT_RE = re.compile(r'"[^"\\]{1,40}":?|\b(?:true|false|null)\b|[{}\[\],:]+')
+
+
+def build_zlib_dictionary(samples: Iterable[str], size: int = DEFAULT_DICTIONARY_BYTES) -> bytes:
+    """
+    Preset dictionary for zlib from sample payloads.
+
+    Counts repeated JSON fragments (keys with their colon, short string
+    values, literals) weighted by length, and lays out the most valuable
+    last, where deflate finds them with the shortest distances.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update(_FRAGMENT_RE.findall(compact_json(sample)))
+    ranked = sorted(
+        (fragment for fragment, n in counts.items() if n > 1),
+        key=lambda fragment: counts[fragment] * len(fragment),
+    )
+    selected: List[str] = []
+    used = 0
+    limit = min(size, MAX_ZLIB_DICTIONARY_BYTES)
+    for fragment in reversed(ranked):
+        length = len(fragment.encode("utf-8"))
+        if used + length > limit:
+            continue
+        selected.append(fragment)
+        used += length
+    return "".join(reversed(selected)).encode("utf-8")
+
+
+def build_dictionary(samples: List[str], size: int = DEFAULT_DICTIONARY_BYTES, codec: int = None) -> bytes:
+    """Dictionary content for a codec (zstd training or the zlib fragment dictionary)"""
+    codec = codec or default_codec()
+    if codec == CODEC_ZSTD:
+        data = [compact_json(sample).encode("utf-8") for sample in samples]
+        return zstandard.train_dictionary(size, data).as_bytes()
+    return build_zlib_dictionary(samples, size)
+
+
+def train_payload_dictionary(
+    db: Session,
+    sample_limit: int = 2000,
+    size: int = DEFAULT_DICTIONARY_BYTES,
+    codec: PayloadCodec = None
+) -> Optional[int]:
+    """
+    Train a dictionary on recent captured payloads (inline columns and
+    log.PayloadBlob), store it in log.PayloadDictionary and make it the
+    active one.
+
+    Returns:
+        New PayloadDictionaryID, or None if there are too few samples
+    """
+    from models.log.api_request import ApiRequest
+    from models.log.payload_blob import PayloadBlob
+
+    codec = codec or payload_codec
+    columns = [getattr(ApiRequest, column) for pair in PAYLOAD_COLUMNS for column in pair]
+    rows = db.execute(
+        select(*columns).order_by(ApiRequest.ApiRequestID.desc()).limit(sample_limit)
+    ).all()
+    samples = []
+    for row in rows:
+        decoded = decode_payload_columns(dict(row._mapping), codec)
+        samples.extend(decoded[text] for text, _ in PAYLOAD_COLUMNS if decoded.get(text))
+    # Deduplicated payloads (common.payload_blobs): newest distinct contents
+    blobs = db.scalars(
+        select(PayloadBlob.Content).order_by(PayloadBlob.PayloadBlobID.desc()).limit(sample_limit)
+    )
+    samples.extend(codec.decode(content) for content in blobs)
+    if len(samples) < 10:
+        logger.warning(f"Not enough payload samples to train a dictionary ({len(samples)})")
+        return None
+
+    codec_id = default_codec()
+    content = build_dictionary(samples, size, codec_id)
+    db.execute(update(PayloadDictionary).where(PayloadDictionary.Codec == codec_id).values(IsActive=False))
+    dictionary = PayloadDictionary(
+        Codec=codec_id, Content=content, SampleCount=len(samples), IsActive=True, CreatedDate=datetime.utcnow()
+    )
+    db.add(dictionary)
+    db.commit()
+    codec.register(dictionary.PayloadDictionaryID, codec_id, content)
+    logger.info(
+        f"Trained {CODEC_NAMES[codec_id]} payload dictionary {dictionary.PayloadDictionaryID} "
+        f"({len(content)} bytes from {len(samples)} samples)"
+    )
+    return dictionary.PayloadDictionaryID
@@ -4,9 +4,14 @@ Decorators and helper functions for role-based authorization
 """
 from functools import wraps
 from fastapi import HTTPException, status, Request
-from typing import Union, List, Callable, Any
+from typing import Union, List, Callable, Any, Optional
 
 from modules.auth.models import CurrentUser
+from common.constants import UserRole
+from common.logger import get_logger
+from common.membership_cache import MembershipSnapshot
+
+logger = get_logger(__name__)
 
 
 def require_role(roles: Union[str, List[str]]) -> Callable:
@@ -154,16 +159,25 @@ def belongs_to_company(user: CurrentUser, company_id: int) -> bool:
     return user.company_id == company_id
 
 
-def require_company_access(user: CurrentUser, company_id: int) -> None:
+def require_company_access(
+    user: CurrentUser,
+    company_id: int,
+    memberships: Optional[MembershipSnapshot] = None
+) -> None:
     """
     Require user to belong to specific company, raise 403 if not.
     
     Helper function for endpoints that access company-specific resources.
     Enforces multi-tenant data isolation.
     
+    When the user's membership snapshot is passed, the membership must also
+    still be active, so access revoked after the JWT was issued is denied
+    without waiting for token expiry (no extra query: snapshots are cached).
+    
     Args:
         user: CurrentUser instance
         company_id: Required company ID
+        memberships: Optional membership snapshot (common.membership_cache)
         
     Raises:
         HTTPException: 403 if user doesn't belong to company
@@ -178,7 +192,9 @@ def require_company_access(user: CurrentUser, company_id: int) -> None:
             # Proceed with data access
             pass
     """
-    if not belongs_to_company(user, company_id):
+    if not belongs_to_company(user, company_id) or (
+        memberships is not None and not memberships.has_active_membership(company_id)
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied. You do not have permission to access this company's resources."
@@ -223,3 +239,30 @@ def require_company_admin_for_company(user: CurrentUser, company_id: int) -> Non
             detail="You do not have access to this company"
         )
 
+
+def require_system_admin(user: CurrentUser) -> None:
+    """
+    Require the platform system_admin role, raise 403 if not.
+    
+    For operator-only endpoints (diagnostics, connection pool state) that
+    are not scoped to a company.
+    
+    Args:
+        user: CurrentUser instance
+        
+    Raises:
+        HTTPException: 403 if user is not a system admin
+        
+    Example:
+        @router.get("/admin/diagnostics/slow-endpoints")
+        def slow_endpoints(current_user: CurrentUser = Depends(get_current_user)):
+            require_system_admin(current_user)
+            # Proceed with diagnostics
+            pass
+    """
+    if not has_role(user, UserRole.SYSTEM_ADMIN):
+        logger.warning("System admin access denied: user_id=%s, role=%s", user.user_id, user.role)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. System admin role required."
+        )
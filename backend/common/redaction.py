@@ -0,0 +1,246 @@
+"""
+Redaction Engine
+One definition of "sensitive" for every logging path
+
+All request loggers, common.log_filters and the exception handler decide
+whether a field is sensitive with is_sensitive_key(): a single precompiled
+alternation of SENSITIVE_FIELD_PATTERNS (one regex search instead of one per
+pattern), memoized per key name because payloads repeat the same few
+hundred keys.
+
+Captured JSON bodies are redacted with redact_json(), a one-pass rewrite of
+the text: a regex tokenizer visits only strings and brackets, values of
+sensitive keys (scalars, strings, or whole objects/arrays) are replaced by
+"[REDACTED]", and every other byte is copied through unchanged. Keys are
+matched as a JSON parser reads them: a key containing an escape
+('"pass\\u0077ord"') is decoded before the check. No Python object tree is
+built and nothing is re-serialized, so the cost is a regex scan of the body
+instead of json.loads + walk + json.dumps.
+
+Usage:
+    is_sensitive_key("refresh_token")                   # True
+    redact_json('{"user": "a", "password": "x"}')       # '{"user": "a", "password": "[REDACTED]"}'
+    redact_value({"password": "x"})                     # {'password': '[REDACTED]'}
+    redact_headers({"Authorization": "Bearer ..."})
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+REDACTED = "[REDACTED]"
+
+# Patterns for sensitive field names (case-insensitive, matched anywhere in the key)
+SENSITIVE_FIELD_PATTERNS = [
+    r"password",
+    r"passwd",
+    r"pwd",
+    r"token",
+    r"secret",
+    r"api[_-]?key",
+    r"apikey",
+    r"auth",
+    r"authorization",
+    r"credential",
+    r"private[_-]?key",
+    r"access[_-]?token",
+    r"refresh[_-]?token",
+    r"session[_-]?id",
+    r"csrf",
+    r"xsrf",
+]
+
+# Headers that carry credentials without a sensitive-looking name
+SENSITIVE_HEADERS = frozenset({"cookie", "set-cookie"})
+
+# Distinct key names remembered by is_sensitive_key
+REDACTION_KEY_CACHE_SIZE = 4096
+
+_SENSITIVE_ALTERNATION = "|".join(f"(?:{pattern})" for pattern in SENSITIVE_FIELD_PATTERNS)
+SENSITIVE_KEY_RE = re.compile(_SENSITIVE_ALTERNATION, re.IGNORECASE)
+
+
+@lru_cache(maxsize=REDACTION_KEY_CACHE_SIZE)
+def is_sensitive_key(key: str) -> bool:
+    """True if a field/header/parameter name matches SENSITIVE_FIELD_PATTERNS"""
+    return SENSITIVE_KEY_RE.search(key) is not None
+
+
+# ----------------------------------------------------------------------------
+# Object trees
+# ----------------------------------------------------------------------------
+
+def redact_value(value: Any, max_depth: int = 10, marker: str = REDACTED) -> Any:
+    """
+    Copy of a decoded JSON value with sensitive keys' values replaced.
+
+    Containers nested deeper than max_depth are replaced by a truncation note.
+    """
+    if isinstance(value, dict):
+        if max_depth <= 0:
+            return {"_truncated": "Max depth reached"}
+        return {
+            key: marker if isinstance(key, str) and is_sensitive_key(key) else redact_value(item, max_depth - 1, marker)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        if max_depth <= 0:
+            return ["_truncated"]
+        return [redact_value(item, max_depth - 1, marker) for item in value]
+    return value
+
+
+def redact_headers(headers: Dict[str, str], marker: str = REDACTED) -> Dict[str, str]:
+    """Headers with credential-carrying values replaced"""
+    return {
+        name: marker if name.lower() in SENSITIVE_HEADERS or is_sensitive_key(name) else value
+        for name, value in headers.items()
+    }
+
+
+def redact_query_string(query: Optional[str], marker: str = REDACTED) -> Optional[str]:
+    """Query string / form body with sensitive parameters' values replaced"""
+    if not query:
+        return query
+    pairs = []
+    for pair in query.split("&"):
+        key, sep, _ = pair.partition("=")
+        pairs.append(f"{key}={marker}" if sep and is_sensitive_key(key) else pair)
+    return "&".join(pairs)
+
+
+# ----------------------------------------------------------------------------
+# JSON text (single pass)
+# ----------------------------------------------------------------------------
+
+# Strings (optionally followed by ':' - an object key) and brackets. Numbers,
+# literals, commas and whitespace are never tokens, and none of them contain
+# a quote, so every match of a valid document starts on a real token.
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOKEN_PATTERN = rf'({_STRING})(\s*:)?|[{{}}\[\]]'
+_TOKENS_STR = re.compile(_TOKEN_PATTERN, re.DOTALL)
+_TOKENS_BYTES = re.compile(_TOKEN_PATTERN.encode(), re.DOTALL)
+
+# A scalar value between a key and the next token
+_SCALAR_STR = re.compile(r"[^\s,}\]]+")
+_SCALAR_BYTES = re.compile(rb"[^\s,}\]]+")
+
+# Something that could be a sensitive key: pattern, rest of a key, '"', ':',
+# or a key containing an escape (which could spell a pattern). Bodies
+# without a match (most responses) are returned without tokenizing.
+_CANDIDATE_PATTERN = rf'(?:{_SENSITIVE_ALTERNATION})[^"]*"\s*:|\\(?:[^"\\]|\\.)*"\s*:'
+_CANDIDATE_STR = re.compile(_CANDIDATE_PATTERN, re.IGNORECASE)
+_CANDIDATE_BYTES = re.compile(_CANDIDATE_PATTERN.encode(), re.IGNORECASE)
+
+_OPEN_STR, _CLOSE_STR = ("{", "["), ("}", "]")
+_OPEN_BYTES, _CLOSE_BYTES = (b"{", b"["), (b"}", b"]")
+
+
+def _key_name(quoted: Union[str, bytes], is_bytes: bool) -> str:
+    """A quoted key as a JSON parser decodes it (escapes resolved)"""
+    if (b"\\" if is_bytes else "\\") in quoted:
+        try:
+            return json.loads(quoted)
+        except ValueError:
+            pass  # invalid escape or UTF-8: match the raw text
+    key = quoted[1:-1]
+    return key.decode("utf-8", "replace") if is_bytes else key
+
+
+def redact_json(text: Union[str, bytes], marker: str = REDACTED) -> Union[str, bytes]:
+    """
+    Replace the values of sensitive keys in JSON text, in one pass.
+
+    Accepts str or UTF-8 bytes and returns the same type. Formatting is
+    preserved. Truncated documents are handled: a sensitive value cut off by
+    the end of the text is redacted to the end. Text that is not JSON comes
+    back unchanged apart from any '"key": value' pairs it happens to contain.
+    """
+    is_bytes = isinstance(text, bytes)
+    if (_CANDIDATE_BYTES if is_bytes else _CANDIDATE_STR).search(text) is None:
+        return text
+    if is_bytes:
+        tokens, scalar, opens, closes = _TOKENS_BYTES, _SCALAR_BYTES, _OPEN_BYTES, _CLOSE_BYTES
+        replacement = f'"{marker}"'.encode()
+    else:
+        tokens, scalar, opens, closes = _TOKENS_STR, _SCALAR_STR, _OPEN_STR, _CLOSE_STR
+        replacement = f'"{marker}"'
+
+    out = []
+    copied = 0          # text[:copied] is already in out
+    value_start = None  # set after a sensitive key: where its value begins
+    depth = 0           # bracket depth inside a redacted container
+
+    for match in tokens.finditer(text):
+        if depth:
+            token = match.group()
+            if token in opens:
+                depth += 1
+            elif token in closes:
+                depth -= 1
+                if depth == 0:
+                    out.append(replacement)
+                    copied = match.end()
+            continue
+
+        if value_start is not None:
+            token = match.group()
+            if token in opens:
+                out.append(text[copied:match.start()])
+                depth = 1
+                value_start = None
+                continue
+            if match.group(1) is not None and match.group(2) is None:
+                # String value
+                out.append(text[copied:match.start()])
+                out.append(replacement)
+                copied = match.end()
+                value_start = None
+                continue
+            # Scalar value (number, true/false/null) before '}' / ']' / next key
+            found = scalar.search(text, value_start, match.start())
+            if found:
+                out.append(text[copied:found.start()])
+                out.append(replacement)
+                copied = found.end()
+            value_start = None
+
+        if match.group(2) is not None:
+            if is_sensitive_key(_key_name(match.group(1), is_bytes)):
+                out.append(text[copied:match.end()])
+                copied = value_start = match.end()
+
+    if depth:
+        # Cut off inside a redacted container
+        out.append(replacement)
+        copied = len(text)
+    elif value_start is not None:
+        found = scalar.search(text, value_start)
+        if found:
+            out.append(text[copied:found.start()])
+            out.append(replacement)
+            copied = found.end()
+
+    if not out:
+        return text
+    out.append(text[copied:])
+    return (b"" if is_bytes else "").join(out)
+
+
+def redact_body(body: Union[str, bytes], content_type: str = "", marker: str = REDACTED) -> Union[str, bytes]:
+    """
+    Redact a captured request/response body according to its content type.
+
+    JSON (declared or sniffed from a leading '{' / '[') goes through
+    redact_json(), form bodies through redact_query_string(); anything else
+    is returned unchanged.
+    """
+    content_type = (content_type or "").lower()
+    stripped = body.lstrip()[:1]
+    if "json" in content_type or stripped in ("{", "[", b"{", b"["):
+        return redact_json(body, marker)
+    if "application/x-www-form-urlencoded" in content_type:
+        if isinstance(body, bytes):
+            return redact_query_string(body.decode("utf-8", "replace"), marker).encode()
+        return redact_query_string(body, marker)
+    return body
@@ -0,0 +1,159 @@
+"""
+Reference Data Cache
+In-memory cache of small, rarely changing reference tables used to decorate
+user-facing responses (theme, layout density, font size, industry) and to
+classify rows by status code (event status).
+
+Each table is loaded whole with one query on first use and kept for
+REF_DATA_CACHE_TTL_SECONDS, so resolving a reference ID to its code/name is a
+dictionary lookup instead of a db.get() round trip.
+
+Usage:
+    theme = ref_data_cache.get_option(db, "theme", user.ThemePreferenceID)
+    options = ref_data_cache.list_active(db, "font_size")
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.ref.theme_preference import ThemePreference
+from models.ref.layout_density import LayoutDensity
+from models.ref.font_size import FontSize
+from models.ref.industry import Industry
+from models.ref.event_status import EventStatus
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Reference tables change only through migrations/admin seeding
+REF_DATA_CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class ReferenceOption:
+    """
+    One reference row, normalized across tables.
+
+    Attributes:
+        id: Primary key
+        code: Unique code (ThemeCode, DensityCode, SizeCode, IndustryCode, StatusCode)
+        name: Display name
+        description: Description
+        css_class: CSS class (None for industries and event statuses)
+        base_font_size: Base font size (font sizes only)
+        is_active: Whether the option is selectable
+        sort_order: Display order
+    """
+    id: int
+    code: str
+    name: str
+    description: Optional[str]
+    css_class: Optional[str]
+    base_font_size: Optional[str]
+    is_active: bool
+    sort_order: int
+
+
+# kind -> (model, columns in ReferenceOption field order; None = not applicable)
+_REFERENCE_TABLES = {
+    "theme": (ThemePreference, (
+        ThemePreference.ThemePreferenceID, ThemePreference.ThemeCode, ThemePreference.ThemeName,
+        ThemePreference.Description, ThemePreference.CSSClass, None,
+        ThemePreference.IsActive, ThemePreference.SortOrder,
+    )),
+    "layout_density": (LayoutDensity, (
+        LayoutDensity.LayoutDensityID, LayoutDensity.DensityCode, LayoutDensity.DensityName,
+        LayoutDensity.Description, LayoutDensity.CSSClass, None,
+        LayoutDensity.IsActive, LayoutDensity.SortOrder,
+    )),
+    "font_size": (FontSize, (
+        FontSize.FontSizeID, FontSize.SizeCode, FontSize.SizeName,
+        FontSize.Description, FontSize.CSSClass, FontSize.BaseFontSize,
+        FontSize.IsActive, FontSize.SortOrder,
+    )),
+    "industry": (Industry, (
+        Industry.IndustryID, Industry.IndustryCode, Industry.IndustryName,
+        Industry.Description, None, None,
+        Industry.IsActive, Industry.SortOrder,
+    )),
+    "event_status": (EventStatus, (
+        EventStatus.EventStatusID, EventStatus.StatusCode, EventStatus.StatusName,
+        EventStatus.StatusDescription, None, None,
+        EventStatus.IsActive, EventStatus.SortOrder,
+    )),
+}
+
+
+class RefDataCache:
+    """
+    Process-wide cache of reference tables keyed by kind.
+
+    Kinds: "theme", "layout_density", "font_size", "industry", "event_status".
+    """
+
+    def __init__(self, ttl_seconds: int = REF_DATA_CACHE_TTL_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._tables: Dict[str, Tuple[Dict[int, ReferenceOption], float]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session, kind: str) -> Dict[int, ReferenceOption]:
+        if kind not in _REFERENCE_TABLES:
+            raise ValueError(f"Unknown reference data kind: {kind}")
+        _, columns = _REFERENCE_TABLES[kind]
+        selected = [c for c in columns if c is not None]
+        rows = db.execute(select(*selected)).all()
+
+        options: Dict[int, ReferenceOption] = {}
+        for row in rows:
+            values = iter(row)
+            fields = [next(values) if c is not None else None for c in columns]
+            option = ReferenceOption(
+                id=int(fields[0]),
+                code=str(fields[1]),
+                name=str(fields[2]),
+                description=fields[3],
+                css_class=fields[4],
+                base_font_size=fields[5],
+                is_active=bool(fields[6]),
+                sort_order=int(fields[7] or 0),
+            )
+            options[option.id] = option
+        return options
+
+    def get_table(self, db: Session, kind: str) -> Dict[int, ReferenceOption]:
+        """Get all rows of a reference table by ID (one query on miss)"""
+        entry = self._tables.get(kind)
+        if entry is not None and time.monotonic() - entry[1] < self._ttl_seconds:
+            return entry[0]
+        options = self._load(db, kind)
+        with self._lock:
+            self._tables[kind] = (options, time.monotonic())
+        return options
+
+    def get_option(self, db: Session, kind: str, option_id: Optional[int]) -> Optional[ReferenceOption]:
+        """Resolve a reference ID (inactive options included, None if unset/unknown)"""
+        if option_id is None:
+            return None
+        return self.get_table(db, kind).get(int(option_id))
+
+    def list_active(self, db: Session, kind: str) -> List[ReferenceOption]:
+        """Get selectable options ordered by SortOrder"""
+        options = [o for o in self.get_table(db, kind).values() if o.is_active]
+        return sorted(options, key=lambda o: (o.sort_order, o.id))
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop one reference table (or all) from the cache"""
+        with self._lock:
+            if kind is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(kind, None)
+
+
+# Shared instance
+ref_data_cache = RefDataCache()
@@ -0,0 +1,439 @@
+"""
+API Request Rollup
+Time-bucketed request aggregates maintained by the request log writer
+
+Performance dashboards used to run COUNT/AVG/MAX/MIN over log.ApiRequest
+for the requested window on every call - a scan of an NVARCHAR(MAX)-heavy
+table growing by millions of rows a day. Instead:
+
+1. The log writer adds every request to an in-process buffer keyed by
+   (minute, method, route template, status class): count, duration sum,
+   min, max and fixed latency bucket counts
+2. Every API_REQUEST_ROLLUP_FLUSH_SECONDS the worker merges the buffer into
+   log.ApiRequestRollup with additive upserts, at minute and hour
+   granularity. Additive UPDATEs (Count = Count + ?) let every worker
+   process flush into the same rows without reading them first
+3. Dashboards read the rollup: windows up to ROLLUP_MINUTE_WINDOW_HOURS use
+   minute buckets, longer ones hour buckets (whole hours: the window start
+   is rounded down). Percentiles are interpolated inside the latency
+   buckets
+
+Raw log.ApiRequest rows are only read for drill-down (a request ID or a page
+of recent requests).
+
+Environment variables:
+    API_REQUEST_ROLLUP_ENABLED        Run the rollup flush worker (default: true)
+    API_REQUEST_ROLLUP_FLUSH_SECONDS  Flush interval (default: 10)
+
+Usage:
+    request_rollup_buffer.add("GET", "/api/events/search", 200, 42.0)
+
+    summary = performance_summary(db, hours=24)
+    endpoints = endpoint_performance(db, hours=1, limit=20)
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from common.database import LogSessionLocal
+from common.logger import get_logger
+from models.log.api_request_rollup import ApiRequestRollup, LATENCY_BUCKET_BOUNDS_MS, LATENCY_BUCKET_COLUMNS
+
+logger = get_logger(__name__)
+
+
+API_REQUEST_ROLLUP_ENABLED = os.getenv("API_REQUEST_ROLLUP_ENABLED", "true").lower() in ("true", "1", "yes")
+API_REQUEST_ROLLUP_FLUSH_SECONDS = float(os.getenv("API_REQUEST_ROLLUP_FLUSH_SECONDS", "10"))
+
+MINUTE, HOUR = 60, 3600
+ROLLUP_GRANULARITIES = (MINUTE, HOUR)
+
+# Windows up to this long are read from minute buckets
+ROLLUP_MINUTE_WINDOW_HOURS = 6
+
+# ApiRequestRollup.PathTemplate length
+MAX_PATH_TEMPLATE_LENGTH = 200
+
+RollupKey = Tuple[datetime, str, str, int]
+
+
+def bucket_start(at: datetime, seconds: int) -> datetime:
+    """Start of the bucket containing a timestamp"""
+    if seconds == HOUR:
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(second=0, microsecond=0)
+
+
+def latency_bucket(duration_ms: float) -> int:
+    """Index of the latency bucket column a duration falls in"""
+    for index, bound in enumerate(LATENCY_BUCKET_BOUNDS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(LATENCY_BUCKET_BOUNDS_MS)
+
+
+@dataclass
+class RollupStats:
+    """
+    Aggregates for one rollup key.
+
+    Attributes:
+        count: Requests
+        total_ms: Sum of durations
+        min_ms: Fastest request
+        max_ms: Slowest request
+        buckets: Requests per latency bucket (LATENCY_BUCKET_COLUMNS order)
+    """
+    count: int = 0
+    total_ms: int = 0
+    min_ms: Optional[int] = None
+    max_ms: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKET_COLUMNS))
+
+    def add(self, duration_ms: int) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.min_ms = duration_ms if self.min_ms is None else min(self.min_ms, duration_ms)
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[latency_bucket(duration_ms)] += 1
+
+    def merge(self, other: "RollupStats") -> None:
+        self.count += other.count
+        self.total_ms += other.total_ms
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+
+class RequestRollupBuffer:
+    """
+    Process-wide buffer of per-minute request aggregates.
+
+    add() is a dict update under a lock; drain() hands the accumulated
+    minutes to the flush and restore() puts them back if the flush fails.
+    """
+
+    def __init__(self):
+        self._entries: Dict[RollupKey, RollupStats] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        method: str,
+        path_template: str,
+        status_code: int,
+        duration_ms: float,
+        at: Optional[datetime] = None
+    ) -> None:
+        """Record one finished request"""
+        key = (
+            bucket_start(at or datetime.utcnow(), MINUTE),
+            method[:10],
+            path_template[:MAX_PATH_TEMPLATE_LENGTH],
+            max(1, min(5, int(status_code) // 100)),
+        )
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is None:
+                stats = self._entries[key] = RollupStats()
+            stats.add(int(round(duration_ms)))
+
+    def drain(self) -> Dict[RollupKey, RollupStats]:
+        """Take everything recorded so far"""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        return entries
+
+    def restore(self, entries: Dict[RollupKey, RollupStats]) -> None:
+        """Merge drained entries back (after a failed flush)"""
+        with self._lock:
+            for key, stats in entries.items():
+                current = self._entries.get(key)
+                if current is None:
+                    self._entries[key] = stats
+                else:
+                    current.merge(stats)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared instance
+request_rollup_buffer = RequestRollupBuffer()
+
+
+# ----------------------------------------------------------------------------
+# Flush (additive upserts)
+# ----------------------------------------------------------------------------
+
+def rollup_rows(entries: Dict[RollupKey, RollupStats]) -> Dict[Tuple[int, datetime, str, str, int], RollupStats]:
+    """Fold per-minute entries into minute and hour rollup rows"""
+    rows: Dict[Tuple[int, datetime, str, str, int], RollupStats] = {}
+    for (minute, method, path, status_class), stats in entries.items():
+        for seconds in ROLLUP_GRANULARITIES:
+            key = (seconds, bucket_start(minute, seconds), method, path, status_class)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = RollupStats()
+            row.merge(stats)
+    return rows
+
+
+def _upsert(db: Session, key: Tuple[int, datetime, str, str, int], stats: RollupStats) -> None:
+    seconds, start, method, path, status_class = key
+    table = ApiRequestRollup.__table__
+    where = and_(
+        table.c.BucketSeconds == seconds,
+        table.c.BucketStart == start,
+        table.c.Method == method,
+        table.c.PathTemplate == path,
+        table.c.StatusClass == status_class,
+    )
+    values = {
+        "RequestCount": table.c.RequestCount + stats.count,
+        "TotalDurationMs": table.c.TotalDurationMs + stats.total_ms,
+        "MinDurationMs": case((table.c.MinDurationMs <= stats.min_ms, table.c.MinDurationMs), else_=stats.min_ms),
+        "MaxDurationMs": case((table.c.MaxDurationMs >= stats.max_ms, table.c.MaxDurationMs), else_=stats.max_ms),
+    }
+    for name, n in zip(LATENCY_BUCKET_COLUMNS, stats.buckets):
+        if n:
+            values[name] = table.c[name] + n
+    if db.execute(update(table).where(where).values(**values)).rowcount:
+        return
+    db.execute(table.insert().values(
+        BucketSeconds=seconds, BucketStart=start, Method=method, PathTemplate=path, StatusClass=status_class,
+        RequestCount=stats.count, TotalDurationMs=stats.total_ms, MinDurationMs=stats.min_ms,
+        MaxDurationMs=stats.max_ms, **dict(zip(LATENCY_BUCKET_COLUMNS, stats.buckets))
+    ))
+
+
+def flush_request_rollup(db: Session, buffer: RequestRollupBuffer = None) -> int:
+    """
+    Merge the buffered aggregates into log.ApiRequestRollup and commit.
+
+    A row inserted concurrently by another worker makes the INSERT fail; the
+    transaction is retried once (the row now exists, so it is updated). On
+    failure the aggregates go back into the buffer for the next flush.
+
+    Returns:
+        Rollup rows upserted
+    """
+    buffer = buffer or request_rollup_buffer
+    entries = buffer.drain()
+    if not entries:
+        return 0
+    rows = rollup_rows(entries)
+    try:
+        for attempt in range(2):
+            try:
+                for key, stats in sorted(rows.items()):
+                    _upsert(db, key, stats)
+                db.commit()
+                return len(rows)
+            except IntegrityError:
+                db.rollback()
+                if attempt:
+                    raise
+    except Exception:
+        db.rollback()
+        buffer.restore(entries)
+        raise
+
+
+class RequestRollupWorker:
+    """
+    Daemon thread that flushes the request rollup buffer every interval.
+
+    Started/stopped with the application (main.py); stopping flushes what
+    is left. Failures are logged and retried on the next tick.
+    """
+
+    def __init__(
+        self,
+        session_factory=LogSessionLocal,
+        interval_seconds: float = API_REQUEST_ROLLUP_FLUSH_SECONDS,
+        buffer: RequestRollupBuffer = None
+    ):
+        self._session_factory = session_factory
+        self._interval_seconds = interval_seconds
+        self._buffer = buffer or request_rollup_buffer
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Flush once; returns rows upserted"""
+        db = self._session_factory()
+        try:
+            return flush_request_rollup(db, self._buffer)
+        finally:
+            db.close()
+
+    def _run_logged(self) -> None:
+        try:
+            flushed = self.run_once()
+            if flushed:
+                logger.debug(f"Request rollup worker upserted {flushed} rows")
+        except Exception as e:
+            logger.error(f"Request rollup worker failed: {str(e)}", exc_info=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            self._run_logged()
+        self._run_logged()
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="request-rollup-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker to stop and wait for the final flush"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+request_rollup_worker = RequestRollupWorker()
+
+
+# ----------------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------------
+
+def bucket_quantile(buckets: Sequence[int], q: float, max_ms: float = 0.0) -> float:
+    """
+    Estimate a quantile from latency bucket counts.
+
+    Interpolates linearly inside the bucket holding the rank (as Prometheus'
+    histogram_quantile does); the open-ended top bucket reports max_ms.
+    """
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for index, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            if index == len(LATENCY_BUCKET_BOUNDS_MS):
+                return float(max_ms)
+            upper = LATENCY_BUCKET_BOUNDS_MS[index]
+            estimate = lower + (upper - lower) * (rank - seen) / n
+            return round(min(estimate, max_ms) if max_ms else estimate, 2)
+        seen += n
+        if index < len(LATENCY_BUCKET_BOUNDS_MS):
+            lower = LATENCY_BUCKET_BOUNDS_MS[index]
+    return float(max_ms)
+
+
+def _window(hours: float, now: Optional[datetime]) -> Tuple[int, datetime]:
+    now = now or datetime.utcnow()
+    seconds = MINUTE if hours <= ROLLUP_MINUTE_WINDOW_HOURS else HOUR
+    return seconds, bucket_start(now - timedelta(hours=hours), seconds)
+
+
+def _aggregates():
+    return [
+        func.sum(ApiRequestRollup.RequestCount).label("total_requests"),
+        func.sum(ApiRequestRollup.TotalDurationMs).label("total_duration_ms"),
+        func.max(ApiRequestRollup.MaxDurationMs).label("max_duration_ms"),
+        func.min(ApiRequestRollup.MinDurationMs).label("min_duration_ms"),
+        func.sum(case((ApiRequestRollup.StatusClass >= 4, ApiRequestRollup.RequestCount), else_=0)).label("error_count"),
+        func.sum(case((ApiRequestRollup.StatusClass >= 5, ApiRequestRollup.RequestCount), else_=0)).label("server_error_count"),
+        *[func.sum(ApiRequestRollup.__table__.c[name]).label(name) for name in LATENCY_BUCKET_COLUMNS],
+    ]
+
+
+def _summary(row) -> Dict[str, object]:
+    total = int(row.total_requests or 0)
+    buckets = [int(getattr(row, name) or 0) for name in LATENCY_BUCKET_COLUMNS]
+    max_ms = int(row.max_duration_ms or 0)
+    return {
+        "total_requests": total,
+        "avg_duration_ms": round(int(row.total_duration_ms or 0) / total, 2) if total else 0,
+        "max_duration_ms": max_ms,
+        "min_duration_ms": int(row.min_duration_ms or 0),
+        "error_count": int(row.error_count or 0),
+        "server_error_count": int(row.server_error_count or 0),
+        "p50_duration_ms": bucket_quantile(buckets, 0.5, max_ms),
+        "p95_duration_ms": bucket_quantile(buckets, 0.95, max_ms),
+        "p99_duration_ms": bucket_quantile(buckets, 0.99, max_ms),
+    }
+
+
+def performance_summary(db: Session, hours: float = 24, now: Optional[datetime] = None) -> Dict[str, object]:
+    """
+    Request volume, latency and errors over the last N hours (from the rollup).
+
+    Returns:
+        total_requests, avg/max/min/p50/p95/p99 duration (ms), error_count
+        (4xx + 5xx), server_error_count (5xx), and the bucket width read
+    """
+    seconds, since = _window(hours, now)
+    row = db.execute(
+        select(*_aggregates()).where(
+            ApiRequestRollup.BucketSeconds == seconds,
+            ApiRequestRollup.BucketStart >= since,
+        )
+    ).one()
+    return {**_summary(row), "bucket_seconds": seconds}
+
+
+def endpoint_performance(
+    db: Session,
+    hours: float = 24,
+    limit: int = 20,
+    now: Optional[datetime] = None
+) -> List[Dict[str, object]]:
+    """
+    Per-route summaries over the last N hours, busiest first.
+
+    Returns:
+        Dicts with method, path_template and the performance_summary() fields
+    """
+    seconds, since = _window(hours, now)
+    rows = db.execute(
+        select(ApiRequestRollup.Method, ApiRequestRollup.PathTemplate, *_aggregates())
+        .where(ApiRequestRollup.BucketSeconds == seconds, ApiRequestRollup.BucketStart >= since)
+        .group_by(ApiRequestRollup.Method, ApiRequestRollup.PathTemplate)
+        .order_by(func.sum(ApiRequestRollup.RequestCount).desc())
+        .limit(limit)
+    ).all()
+    return [{"method": row.Method, "path_template": row.PathTemplate, **_summary(row)} for row in rows]
+
+
+def performance_timeseries(
+    db: Session,
+    hours: float = 24,
+    path_template: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, object]]:
+    """
+    Per-bucket summaries over the last N hours (oldest first), optionally
+    for one route template.
+
+    Returns:
+        Dicts with bucket_start and the performance_summary() fields
+    """
+    seconds, since = _window(hours, now)
+    statement = (
+        select(ApiRequestRollup.BucketStart, *_aggregates())
+        .where(ApiRequestRollup.BucketSeconds == seconds, ApiRequestRollup.BucketStart >= since)
+        .group_by(ApiRequestRollup.BucketStart)
+        .order_by(ApiRequestRollup.BucketStart)
+    )
+    if path_template is not None:
+        statement = statement.where(ApiRequestRollup.PathTemplate == path_template)
+    return [{"bucket_start": row.BucketStart, **_summary(row)} for row in db.execute(statement).all()]
@@ -4,7 +4,10 @@ Password hashing and verification using bcrypt
 """
 import bcrypt
 
+from common.timing import traced
 
+
+@traced("bcrypt")
 def hash_password(password: str, rounds: int = 12) -> str:
     """
     Hash a password using bcrypt with configurable cost factor.
@@ -35,6 +38,7 @@ def hash_password(password: str, rounds: int = 12) -> str:
     return hashed.decode('utf-8')
 
 
+@traced("bcrypt")
 def verify_password(password: str, hashed_password: str) -> bool:
     """
     Verify a password against its bcrypt hash.
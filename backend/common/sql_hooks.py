@@ -0,0 +1,84 @@
+"""
+Shared SQL Cursor Hooks
+One pair of engine-wide cursor execution hooks for the per-request observers
+
+common.sql_profiler (N+1 detection) and common.timing (request spans) both
+need each statement's text and duration. Rather than each registering its
+own before/after_cursor_execute pair, observers register here: a statement
+is timed once and handed to every observer that is active for the current
+context. With no observer active the hooks cost one check per observer.
+
+Usage:
+    add_statement_observer(is_active, record)   # idempotent per observer
+
+    def record(statement: str, started_ns: int, duration_ns: int) -> None: ...
+
+    profile._token = _current_profile.set(profile)
+    ...
+    reset_context_var(_current_profile, profile._token)
+"""
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# (is_active, record) pairs, in registration order
+StatementObserver = Tuple[Callable[[], bool], Callable[[str, int, int], None]]
+
+_observers: List[StatementObserver] = []
+_lock = threading.Lock()
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, not the connection: after_cursor_execute
+    # never fires for a failed statement, and the context goes with it
+    if context is None:
+        return
+    for is_active, _record in _observers:
+        if is_active():
+            context._sql_hooks_start = time.perf_counter_ns()
+            return
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_hooks_start", None)
+    if started is None:
+        return
+    context._sql_hooks_start = None
+    duration_ns = time.perf_counter_ns() - started
+    for is_active, record in _observers:
+        if is_active():
+            record(statement, started, duration_ns)
+
+
+def add_statement_observer(is_active: Callable[[], bool], record: Callable[[str, int, int], None]) -> None:
+    """
+    Time statements for an observer, installing the engine hooks on first use.
+
+    Args:
+        is_active: Whether the observer wants statements in the current context
+        record: Called with (statement, perf_counter_ns at start, duration in ns)
+            after each statement executed while is_active() is true
+    """
+    global _installed
+    with _lock:
+        if (is_active, record) not in _observers:
+            _observers.append((is_active, record))
+        if not _installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _installed = True
+
+
+def reset_context_var(var: ContextVar, token: Token) -> None:
+    """Restore a ContextVar set by a per-request observer"""
+    try:
+        var.reset(token)
+    except ValueError:
+        # Finished from a different context (e.g. streamed response) - just detach
+        var.set(None)
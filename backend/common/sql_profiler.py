@@ -0,0 +1,253 @@
+"""
+Per-Request SQL Profiler and N+1 Detector
+
+Observes SQLAlchemy cursor execution (the shared hooks in common.sql_hooks)
+and attributes every statement to the active profile (one per request, bound
+via a ContextVar together with the RequestContext.request_id). Each profile
+counts and times queries and groups them by statement shape; a shape executed
+repeatedly within one request is flagged as a likely N+1 pattern.
+
+Opt-in via environment variables (profiling adds per-statement overhead):
+    SQL_PROFILER_ENABLED       Enable profiling middleware (default: false)
+    SQL_PROFILER_N1_THRESHOLD  Repeats of one shape to flag as N+1 (default: 5)
+    SQL_PROFILER_SLOW_MS       Log individual statements slower than this (default: 200)
+
+Usage:
+    install_sql_profiler()                  # once, registers engine event hooks
+    profile = start_profile(request_id)     # per request (done by middleware)
+    ...
+    finish_profile(profile)
+    profile.summary()
+"""
+import os
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from common.logger import get_logger
+from common.request_context import get_current_request_context
+from common.sql_hooks import add_statement_observer, reset_context_var
+
+logger = get_logger(__name__)
+
+
+SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "false").lower() in ("true", "1", "yes")
+SQL_PROFILER_N1_THRESHOLD = int(os.getenv("SQL_PROFILER_N1_THRESHOLD", "5"))
+SQL_PROFILER_SLOW_MS = float(os.getenv("SQL_PROFILER_SLOW_MS", "200"))
+
+# Statement normalization (parameters are already bound; collapse what varies per call)
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape for N+1 grouping.
+
+    Collapses whitespace, expanded IN-lists (`?, ?, ?` -> `?...`), numeric
+    and string literals, so repeated lookups that differ only by parameter
+    values group together.
+
+    Args:
+        statement: SQL statement text
+
+    Returns:
+        str: Normalized statement shape
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("'?'", shape)
+    shape = _NUMBER.sub("N", shape)
+    return _PLACEHOLDER_LIST.sub("?...", shape)
+
+
+@dataclass
+class StatementShape:
+    """
+    Aggregated executions of one statement shape within a request.
+
+    Attributes:
+        shape: Normalized statement text
+        count: Number of executions
+        total_ms: Total execution time in milliseconds
+        max_ms: Slowest execution in milliseconds
+    """
+    shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class QueryProfile:
+    """
+    SQL activity recorded for one request.
+
+    Attributes:
+        request_id: Request ID the statements are attributed to
+        query_count: Number of statements executed
+        total_ms: Total statement execution time in milliseconds
+        shapes: Aggregates by normalized statement shape
+        slow_statements: Statements slower than SQL_PROFILER_SLOW_MS
+    """
+    request_id: Optional[str] = None
+    query_count: int = 0
+    total_ms: float = 0.0
+    shapes: Dict[str, StatementShape] = field(default_factory=dict)
+    slow_statements: List[Dict[str, Any]] = field(default_factory=list)
+    n1_threshold: int = SQL_PROFILER_N1_THRESHOLD
+    slow_ms: float = SQL_PROFILER_SLOW_MS
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        """Record one executed statement"""
+        shape_key = normalize_statement(statement)
+        shape = self.shapes.get(shape_key)
+        if shape is None:
+            shape = self.shapes[shape_key] = StatementShape(shape=shape_key)
+        shape.count += 1
+        shape.total_ms += duration_ms
+        shape.max_ms = max(shape.max_ms, duration_ms)
+        self.query_count += 1
+        self.total_ms += duration_ms
+        if duration_ms >= self.slow_ms:
+            self.slow_statements.append({"statement": shape_key[:500], "duration_ms": round(duration_ms, 2)})
+
+    def n_plus_one(self) -> List[StatementShape]:
+        """
+        Get statement shapes repeated at least n1_threshold times.
+
+        Returns:
+            Repeated shapes, most frequent first
+        """
+        repeated = [s for s in self.shapes.values() if s.count >= self.n1_threshold]
+        return sorted(repeated, key=lambda s: s.count, reverse=True)
+
+    def server_timing(self) -> str:
+        """
+        Format the profile as a Server-Timing header value.
+
+        Returns:
+            str: e.g. 'db;dur=12.34;desc="7 queries", db-n1;desc="1 repeated shape"'
+        """
+        value = f'db;dur={self.total_ms:.2f};desc="{self.query_count} queries"'
+        repeated = self.n_plus_one()
+        if repeated:
+            plural = "s" if len(repeated) > 1 else ""
+            value += f', db-n1;desc="{len(repeated)} repeated shape{plural}"'
+        return value
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get a JSON-serializable summary for logging.
+
+        Returns:
+            Dictionary with counts, timings, N+1 candidates and slow statements
+        """
+        return {
+            "request_id": self.request_id,
+            "query_count": self.query_count,
+            "total_ms": round(self.total_ms, 2),
+            "distinct_shapes": len(self.shapes),
+            "n_plus_one": [
+                {"shape": s.shape[:500], "count": s.count, "total_ms": round(s.total_ms, 2)}
+                for s in self.n_plus_one()
+            ],
+            "slow_statements": self.slow_statements,
+        }
+
+
+# Active profile for the current request (None when not profiling)
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("sql_profile", default=None)
+
+def _is_profiling() -> bool:
+    return _current_profile.get() is not None
+
+
+def _record_statement(statement: str, started_ns: int, duration_ns: int) -> None:
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, duration_ns / 1e6)
+
+
+def install_sql_profiler() -> None:
+    """
+    Register the profiler with the shared cursor hooks (idempotent).
+
+    Hooks are cheap no-ops unless a profile is active for the current context.
+    """
+    add_statement_observer(_is_profiling, _record_statement)
+
+
+def start_profile(request_id: Optional[str] = None) -> QueryProfile:
+    """
+    Start profiling SQL for the current context.
+
+    Args:
+        request_id: Request ID (default: from the current RequestContext)
+
+    Returns:
+        QueryProfile that collects statements until finish_profile()
+    """
+    if request_id is None:
+        context = get_current_request_context()
+        request_id = context.request_id if context else None
+    profile = QueryProfile(request_id=request_id)
+    profile._token = _current_profile.set(profile)  # type: ignore[attr-defined]
+    return profile
+
+
+def finish_profile(profile: QueryProfile) -> QueryProfile:
+    """
+    Stop profiling and restore the previous context state.
+
+    Args:
+        profile: Profile returned by start_profile()
+
+    Returns:
+        The same profile (for chaining)
+    """
+    token = getattr(profile, "_token", None)
+    if token is not None:
+        reset_context_var(_current_profile, token)
+        profile._token = None  # type: ignore[attr-defined]
+    return profile
+
+
+def get_current_profile() -> Optional[QueryProfile]:
+    """
+    Get the active profile for the current context.
+
+    Returns:
+        QueryProfile or None if not profiling
+    """
+    return _current_profile.get()
+
+
+def log_profile_summary(profile: QueryProfile, method: str, path: str) -> None:
+    """
+    Write a profile summary to the application log.
+
+    N+1 candidates are logged at WARNING so they stand out in the logging sink.
+
+    Args:
+        profile: Finished profile
+        method: HTTP method
+        path: Request path
+    """
+    summary = profile.summary()
+    logger.info(
+        f"SQL profile {method} {path}: {summary['query_count']} queries, "
+        f"{summary['total_ms']}ms, {summary['distinct_shapes']} distinct shapes"
+    )
+    for candidate in summary["n_plus_one"]:
+        logger.warning(
+            f"Possible N+1 on {method} {path} (request_id={profile.request_id}): "
+            f"{candidate['count']}x in {candidate['total_ms']}ms: {candidate['shape']}"
+        )
+    for slow in summary["slow_statements"]:
+        logger.warning(
+            f"Slow SQL on {method} {path} (request_id={profile.request_id}): "
+            f"{slow['duration_ms']}ms: {slow['statement']}"
+        )
@@ -0,0 +1,469 @@
+"""
+Request Timing Spans
+Where a request's time went: middleware, SQL, external calls, hashing
+
+ApiRequest.DurationMs says how long a request took, not why. A trace is
+started per HTTP request (middleware.timing.TimingMiddleware) and bound to
+a ContextVar next to the RequestContext, so any code the request runs -
+async endpoints, threadpool calls, SQLAlchemy cursor events - can add
+spans to it without passing anything around:
+
+    with span("abr", endpoint="SearchByABNv202001"):
+        ...
+
+    @traced("bcrypt")
+    def verify_password(...): ...
+
+Outside a request (workers, CLI) there is no trace and span()/traced() cost
+one ContextVar lookup. SQL statements are recorded by the shared
+engine-wide cursor hooks (common.sql_hooks, install_timing_hooks()).
+
+Spans are summarised per category in a Server-Timing response header
+(visible in browser devtools) and, when an export target is configured,
+queued for a background thread that writes them as OTLP/JSON
+(ExportTraceServiceRequest) to a JSON-lines file and/or POSTs them to a
+collector.
+
+Environment variables:
+    TIMING_SPANS_ENABLED       Trace requests, add Server-Timing (default: false)
+    TIMING_MAX_SPANS           Spans kept per request; later ones only count
+                               towards the header totals (default: 256)
+    TIMING_EXPORT_PATH         Append OTLP/JSON lines to this file (default: off)
+    TIMING_EXPORT_URL          POST OTLP/JSON to this URL, e.g.
+                               http://localhost:4318/v1/traces (default: off)
+    TIMING_EXPORT_QUEUE_SIZE   Traces waiting for export before dropping (default: 1000)
+    TIMING_EXPORT_FLUSH_SECONDS  Export interval (default: 5)
+
+Usage:
+    install_timing_hooks()
+    trace = start_trace()
+    ...
+    finish_trace(trace)
+    trace.server_timing()
+"""
+import functools
+import inspect
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from common.logger import get_logger
+from common.metrics import metrics_registry
+from common.sql_hooks import add_statement_observer, reset_context_var
+
+logger = get_logger(__name__)
+
+
+TIMING_SPANS_ENABLED = os.getenv("TIMING_SPANS_ENABLED", "false").lower() in ("true", "1", "yes")
+TIMING_MAX_SPANS = int(os.getenv("TIMING_MAX_SPANS", "256"))
+TIMING_EXPORT_PATH = os.getenv("TIMING_EXPORT_PATH", "")
+TIMING_EXPORT_URL = os.getenv("TIMING_EXPORT_URL", "")
+TIMING_EXPORT_QUEUE_SIZE = int(os.getenv("TIMING_EXPORT_QUEUE_SIZE", "1000"))
+TIMING_EXPORT_FLUSH_SECONDS = float(os.getenv("TIMING_EXPORT_FLUSH_SECONDS", "5"))
+
+SERVICE_NAME = "eventlead-api"
+SCOPE_NAME = "common.timing"
+
+timing_exports = metrics_registry.counter(
+    "timing_span_exports_total", "Request traces handed to the span exporter by outcome (queued, dropped, written, failed)", ("result",)
+)
+
+
+@dataclass
+class Span:
+    """
+    One timed operation within a request.
+
+    Attributes:
+        name: Operation name (e.g. 'sql', 'abr', 'jwt')
+        category: Server-Timing metric the duration is added to
+        span_id: 16 hex characters
+        parent_id: Enclosing span's ID (None at the top level)
+        start_ns: Start, nanoseconds after the trace started
+        duration_ns: Duration in nanoseconds
+        attributes: Extra key/values for the exported span
+    """
+    name: str
+    category: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    duration_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RequestTrace:
+    """
+    Spans recorded for one request.
+
+    Attributes:
+        trace_id: 32 hex characters (OTLP trace ID)
+        request_id: RequestContext.request_id, once known
+        spans: Recorded spans, at most max_spans
+        totals: Category -> [count, total nanoseconds], every span included
+    """
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+    request_id: Optional[str] = None
+    name: str = "request"
+    start_unix_ns: int = field(default_factory=time.time_ns)
+    start_perf_ns: int = field(default_factory=time.perf_counter_ns)
+    duration_ns: int = 0
+    spans: List[Span] = field(default_factory=list)
+    totals: Dict[str, List[int]] = field(default_factory=dict)
+    dropped: int = 0
+    max_spans: int = TIMING_MAX_SPANS
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def add(self, span: Span) -> None:
+        """Record a finished span"""
+        total = self.totals.get(span.category)
+        if total is None:
+            total = self.totals[span.category] = [0, 0]
+        total[0] += 1
+        total[1] += span.duration_ns
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def elapsed_ns(self) -> int:
+        return time.perf_counter_ns() - self.start_perf_ns
+
+    def server_timing(self) -> str:
+        """
+        Format the category totals as a Server-Timing header value.
+
+        Returns:
+            str: e.g. 'jwt;dur=0.4, sql;dur=12.3;desc="7x", total;dur=25.0'
+        """
+        parts = []
+        for category, (count, total_ns) in self.totals.items():
+            part = f"{category};dur={total_ns / 1e6:.1f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={(self.duration_ns or self.elapsed_ns()) / 1e6:.1f}")
+        return ", ".join(parts)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        root_id = secrets.token_hex(8)
+        root_attributes = dict(self.attributes)
+        if self.request_id:
+            root_attributes["request.id"] = self.request_id
+        if self.dropped:
+            root_attributes["spans.dropped"] = self.dropped
+        spans = [_otlp_span(self, root_id, None, self.name, 0, self.duration_ns or self.elapsed_ns(), root_attributes)]
+        spans.extend(
+            _otlp_span(self, s.span_id, s.parent_id or root_id, s.name, s.start_ns, s.duration_ns, s.attributes)
+            for s in self.spans
+        )
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    attributes = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+def _otlp_span(
+    trace: RequestTrace, span_id: str, parent_id: Optional[str], name: str,
+    start_ns: int, duration_ns: int, attributes: Dict[str, Any]
+) -> Dict[str, Any]:
+    start = trace.start_unix_ns + start_ns
+    otlp = {
+        "traceId": trace.trace_id,
+        "spanId": span_id,
+        "name": name,
+        "kind": 2 if parent_id is None else 1,  # SERVER for the request, INTERNAL below it
+        "startTimeUnixNano": str(start),
+        "endTimeUnixNano": str(start + duration_ns),
+        "attributes": _otlp_attributes(attributes),
+    }
+    if parent_id is not None:
+        otlp["parentSpanId"] = parent_id
+    return otlp
+
+
+# Active trace and innermost open span for the current context
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("timing_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("timing_span_id", default=None)
+
+
+def get_current_trace() -> Optional[RequestTrace]:
+    """
+    Get the active trace for the current context.
+
+    Returns:
+        RequestTrace or None outside a traced request
+    """
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, category: Optional[str] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time the enclosed block as a span of the current request.
+
+    Args:
+        name: Span name
+        category: Server-Timing metric (default: the name)
+        **attributes: Exported span attributes
+
+    Yields:
+        The open Span (attributes may be added), or None outside a trace
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    started = time.perf_counter_ns()
+    current = Span(
+        name=name,
+        category=category or name,
+        span_id=secrets.token_hex(8),
+        parent_id=_current_span_id.get(),
+        start_ns=started - trace.start_perf_ns,
+        attributes=attributes,
+    )
+    token = _current_span_id.set(current.span_id)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration_ns = time.perf_counter_ns() - started
+        try:
+            _current_span_id.reset(token)
+        except ValueError:
+            # Closed from another context (generator finalised elsewhere)
+            _current_span_id.set(current.parent_id)
+        trace.add(current)
+
+
+def traced(name: str, category: Optional[str] = None) -> Callable:
+    """
+    Decorator recording each call of a function (sync or async) as a span.
+
+    Usage:
+        @traced("email")
+        async def send_email(...): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name, category):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_trace(name: str = "request", request_id: Optional[str] = None, **attributes: Any) -> RequestTrace:
+    """
+    Start tracing the current context.
+
+    Args:
+        name: Root span name (e.g. 'GET /api/events/{event_id}', set by the middleware)
+        request_id: Request ID if already known
+        **attributes: Root span attributes
+
+    Returns:
+        RequestTrace collecting spans until finish_trace()
+    """
+    trace = RequestTrace(name=name, request_id=request_id, attributes=attributes)
+    trace._token = _current_trace.set(trace)  # type: ignore[attr-defined]
+    return trace
+
+
+def finish_trace(trace: RequestTrace) -> RequestTrace:
+    """
+    Stop tracing, fix the total duration and restore the previous context state.
+
+    Args:
+        trace: Trace returned by start_trace()
+
+    Returns:
+        The same trace (for chaining)
+    """
+    if not trace.duration_ns:
+        trace.duration_ns = trace.elapsed_ns()
+    if trace.request_id is None:
+        from common.request_context import get_current_request_context
+        context = get_current_request_context()
+        trace.request_id = context.request_id if context else None
+    token = getattr(trace, "_token", None)
+    if token is not None:
+        reset_context_var(_current_trace, token)
+        trace._token = None  # type: ignore[attr-defined]
+    return trace
+
+
+# ----------------------------------------------------------------------------
+# SQL
+# ----------------------------------------------------------------------------
+
+def _is_tracing() -> bool:
+    return _current_trace.get() is not None
+
+
+def _record_statement(statement: str, started_ns: int, duration_ns: int) -> None:
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add(Span(
+        name="sql",
+        category="sql",
+        span_id=secrets.token_hex(8),
+        parent_id=_current_span_id.get(),
+        start_ns=started_ns - trace.start_perf_ns,
+        duration_ns=duration_ns,
+        attributes={"db.statement": " ".join(statement.split())[:500]},
+    ))
+
+
+def install_timing_hooks() -> None:
+    """
+    Register SQL span recording with the shared cursor hooks (idempotent).
+
+    Hooks are cheap no-ops unless a trace is active for the current context.
+    """
+    add_statement_observer(_is_tracing, _record_statement)
+
+
+# ----------------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------------
+
+class SpanExporter:
+    """
+    Background OTLP/JSON export of finished traces.
+
+    export() only enqueues (dropping when the queue is full), so requests
+    never wait on the file system or the collector; a daemon thread writes
+    every flush interval. Started/stopped with the application (main.py);
+    stopping exports what is left.
+    """
+
+    def __init__(
+        self,
+        path: str = TIMING_EXPORT_PATH,
+        url: str = TIMING_EXPORT_URL,
+        queue_size: int = TIMING_EXPORT_QUEUE_SIZE,
+        interval_seconds: float = TIMING_EXPORT_FLUSH_SECONDS
+    ):
+        self._path = path
+        self._url = url
+        self._queue: "queue.Queue[RequestTrace]" = queue.Queue(maxsize=queue_size)
+        self._interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path or self._url)
+
+    def export(self, trace: RequestTrace) -> bool:
+        """Queue a finished trace; False if export is off or the queue is full"""
+        if not self.enabled:
+            return False
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            timing_exports.labels("dropped").inc()
+            return False
+        timing_exports.labels("queued").inc()
+        return True
+
+    def run_once(self) -> int:
+        """Export everything queued; returns traces exported"""
+        traces = []
+        while True:
+            try:
+                traces.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not traces:
+            return 0
+        documents = [trace.to_otlp() for trace in traces]
+        try:
+            if self._path:
+                with open(self._path, "a", encoding="utf-8") as f:
+                    for document in documents:
+                        f.write(json.dumps(document, separators=(",", ":")) + "\n")
+            if self._url:
+                import httpx
+                # One request carrying every trace's spans
+                merged = {"resourceSpans": [rs for document in documents for rs in document["resourceSpans"]]}
+                httpx.post(self._url, json=merged, timeout=10.0).raise_for_status()
+        except Exception:
+            timing_exports.labels("failed").inc(len(traces))
+            raise
+        timing_exports.labels("written").inc(len(traces))
+        return len(traces)
+
+    def _run_logged(self) -> None:
+        try:
+            exported = self.run_once()
+            if exported:
+                logger.debug(f"Span exporter wrote {exported} traces")
+        except Exception as e:
+            logger.error(f"Span exporter failed: {str(e)}", exc_info=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            self._run_logged()
+        self._run_logged()
+
+    def start(self) -> None:
+        """Start the exporter thread (no-op if already running or nothing to export to)"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="timing-span-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the exporter to stop and wait for the final export"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+span_exporter = SpanExporter()
@@ -0,0 +1,161 @@
+"""
+TTL/LRU Cache with Commit Invalidation
+Building blocks for the per-process caches of database-derived snapshots
+
+TtlLruCache holds values keyed by an attribute of the value (user ID, form
+ID, ...), bounded in size (least recently used dropped first) and expired
+after a TTL so changes made by other workers are picked up. Every
+invalidation bumps a generation counter: a loader reads generation() before
+its query and passes it to set(), which drops the value if anything was
+invalidated meanwhile (the query may have read the superseded rows).
+
+CommitInvalidation queues keys on a Session (session.info) from ORM events
+or explicit calls and hands them to a callback once the session commits.
+Invalidation happens after the commit, so a concurrent load can never cache
+the old rows again under a newer generation.
+
+Usage:
+    form_cache = TtlLruCache(ttl_seconds=300, max_entries=10000, key=lambda form: form.form_id)
+
+    value = form_cache.get(form_id)
+    if value is None:
+        generation = form_cache.generation()
+        value = form_cache.set(load(db, form_id), generation)
+
+    pending_forms = CommitInvalidation("form_cache_pending", form_cache.invalidate)
+    event.listen(Form, "after_update", pending_forms.queue_attribute("FormID"))
+    pending_forms.queue(db, [form_id])      # after a bulk UPDATE
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TtlLruCache:
+    """
+    Thread-safe LRU cache with TTL expiry and a generation counter.
+
+    Args:
+        ttl_seconds: Lifetime of an entry
+        max_entries: Entries kept (least recently used evicted first)
+        key: Cache key of a value
+        expired: Optional extra expiry check on a value (e.g. a deadline it carries)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        key: Callable[[object], Hashable],
+        expired: Optional[Callable[[object], bool]] = None
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._key = key
+        self._expired = expired
+        self._entries: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        """Invalidation counter; read before loading and pass to set()"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable):
+        """Get a cached value (None if missing or expired)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, loaded_at = entry
+            if time.monotonic() - loaded_at >= self._ttl_seconds or (
+                self._expired is not None and self._expired(value)
+            ):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, value, generation: Optional[int] = None):
+        """Store a value, unless an invalidation happened since `generation` was read"""
+        key = self._key(value)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return value
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        """Drop the given keys"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[object], bool]) -> None:
+        """Drop every value matching a predicate"""
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, (value, _) in self._entries.items() if predicate(value)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop everything"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+class CommitInvalidation:
+    """
+    Keys queued on a session, handed to `apply` when it commits.
+
+    Args:
+        info_key: session.info key holding the queued keys (unique per instance)
+        apply: Called with the set of queued keys after commit
+        apply_on_rollback: Also apply on rollback (over-invalidating is harmless
+            when the change itself is not rolled back with the session);
+            otherwise the queue is discarded once the outermost transaction
+            rolls back
+    """
+
+    def __init__(self, info_key: str, apply: Callable[[Set], None], apply_on_rollback: bool = True):
+        self._info_key = info_key
+        self._apply = apply
+        self._apply_on_rollback = apply_on_rollback
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_soft_rollback", self._after_soft_rollback)
+
+    def queue(self, session: Session, keys: Iterable[Hashable]) -> None:
+        """Queue keys for invalidation when the session commits"""
+        session.info.setdefault(self._info_key, set()).update(keys)
+
+    def queue_attribute(self, attribute: str):
+        """Mapper event listener queuing an attribute of the flushed instance"""
+        def listener(mapper, connection, target) -> None:
+            session = Session.object_session(target)
+            value = getattr(target, attribute)
+            if session is not None and value is not None:
+                session.info.setdefault(self._info_key, set()).add(value)
+        return listener
+
+    def _after_commit(self, session: Session) -> None:
+        keys = session.info.pop(self._info_key, None)
+        if keys:
+            self._apply(keys)
+
+    def _after_soft_rollback(self, session: Session, previous_transaction) -> None:
+        if self._apply_on_rollback:
+            self._after_commit(session)
+        elif not session.in_transaction():
+            # Savepoints leave the queue to the outer transaction
+            session.info.pop(self._info_key, None)
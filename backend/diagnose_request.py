@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Print everything logged for one request: API request, application errors,
+auth events, user actions and integration events, oldest first.
+
+One indexed query over the log tables (common.log_diagnostics); entries are
+printed as they arrive. Payloads are only loaded with --payloads.
+
+Usage:
+    python diagnose_request.py <request-id> [--hours 168 | --since 2025-03-01T09:00]
+                               [--until ...] [--archive] [--payloads] [--json]
+"""
+import argparse
+import json
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.database import LogSessionLocal
+from common.log_diagnostics import DIAGNOSTICS_LOOKBACK_HOURS, fetch_payloads, format_entry, iter_trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace one request through the log tables")
+    parser.add_argument("request_id", help="RequestID (X-Request-ID response header)")
+    parser.add_argument("--hours", type=float, default=DIAGNOSTICS_LOOKBACK_HOURS, help="Look back this many hours")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Start of the time range (UTC, ISO 8601); overrides --hours")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="End of the time range (UTC, ISO 8601)")
+    parser.add_argument("--archive", action="store_true", help="Include rows moved to the retention archive")
+    parser.add_argument("--payloads", action="store_true", help="Also print captured request/response payloads")
+    parser.add_argument("--max-chars", type=int, default=2000, help="Truncate each payload to this many characters")
+    parser.add_argument("--json", action="store_true", help="One JSON object per line")
+    args = parser.parse_args()
+
+    start = args.since or (args.until or datetime.utcnow()) - timedelta(hours=args.hours)
+
+    db = LogSessionLocal()
+    count = 0
+    try:
+        for entry in iter_trace(db, args.request_id, start=start, end=args.until, include_archive=args.archive):
+            count += 1
+            payloads = None
+            if args.payloads and entry.has_payload and entry.source == "ApiRequest" and not entry.archived:
+                payloads = fetch_payloads(db, entry.entry_id, max_chars=args.max_chars)
+            if args.json:
+                line = entry.to_dict()
+                if payloads is not None:
+                    line["payloads"] = payloads
+                print(json.dumps(line, default=str), flush=True)
+                continue
+            print(format_entry(entry), flush=True)
+            for column, text in (payloads or {}).items():
+                if text is not None:
+                    print(f"    {column}: {text}", flush=True)
+    finally:
+        db.close()
+
+    if count == 0:
+        print(f"No log entries for {args.request_id} since {start.isoformat()}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
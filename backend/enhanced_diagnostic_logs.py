@@ -41,6 +41,13 @@ class DiagnosticLogger:
                 raise Exception("DATABASE_URL not found in environment variables")
             self.engine = create_engine(database_url)
     
+    def _decode(self, row: Dict) -> Dict:
+        """Expand payload blobs / compressed columns (log.ApiRequest) to text"""
+        from sqlalchemy.orm import Session
+        from common.payload_blobs import expand_payload_rows, session_blob_fetcher
+        with Session(bind=self.engine) as session:
+            return expand_payload_rows([row], session_blob_fetcher(session))[0]
+    
     def format_json(self, json_str: str) -> str:
         """Pretty print JSON strings with error handling"""
         try:
@@ -108,11 +115,17 @@ class DiagnosticLogger:
                     RequestPayload,
                     ResponsePayload,
                     Headers,
+                    RequestPayloadCompressed,
+                    ResponsePayloadCompressed,
+                    HeadersCompressed,
+                    RequestPayloadBlobID,
+                    ResponsePayloadBlobID,
+                    HeadersBlobID,
                     QueryParams
                 FROM log.ApiRequest
                 ORDER BY CreatedDate DESC
             """)
-            return [dict(row._mapping) for row in conn.execute(query).fetchall()]
+            return [self._decode(dict(row._mapping)) for row in conn.execute(query).fetchall()]
     
     def get_recent_email_deliveries(self) -> List[Dict]:
         """Get recent email delivery events"""
@@ -171,6 +184,10 @@ class DiagnosticLogger:
                         api.DurationMs,
                         api.RequestPayload,
                         api.ResponsePayload,
+                        api.RequestPayloadCompressed,
+                        api.ResponsePayloadCompressed,
+                        api.RequestPayloadBlobID,
+                        api.ResponsePayloadBlobID,
                         ed.Status as EmailStatus,
                         ed.ErrorMessage as EmailError
                     FROM log.AuthEvent ae
@@ -195,6 +212,10 @@ class DiagnosticLogger:
                         api.DurationMs,
                         api.RequestPayload,
                         api.ResponsePayload,
+                        api.RequestPayloadCompressed,
+                        api.ResponsePayloadCompressed,
+                        api.RequestPayloadBlobID,
+                        api.ResponsePayloadBlobID,
                         ed.Status as EmailStatus,
                         ed.ErrorMessage as EmailError
                     FROM log.AuthEvent ae
@@ -206,7 +227,7 @@ class DiagnosticLogger:
                 """)
                 result = conn.execute(correlation_query).fetchone()
             
-            return dict(result._mapping) if result else {}
+            return self._decode(dict(result._mapping)) if result else {}
     
     def get_performance_metrics(self, hours: int = 24) -> Dict:
         """Get performance metrics for the last N hours"""
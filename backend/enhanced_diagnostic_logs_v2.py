@@ -14,6 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__)))
 # Use centralized database service
 from common.database_service import get_database_service
 from common.db_utils import get_payload_logs, get_performance_metrics
+from common.payload_blobs import expand_payload_rows, query_blob_fetcher
 
 def print_header(title: str, char: str = "=", width: int = 80):
     """Print a formatted header"""
@@ -107,11 +108,13 @@ def get_recent_api_requests(limit: int = 5) -> List[Dict[str, Any]]:
             SELECT TOP {limit} 
                 Method, Path, StatusCode, DurationMs, UserID, CompanyID,
                 IPAddress, UserAgent, RequestID, Headers, QueryParams,
-                RequestPayload, ResponsePayload, CreatedDate
+                RequestPayload, ResponsePayload, HeadersCompressed,
+                RequestPayloadCompressed, ResponsePayloadCompressed, HeadersBlobID,
+                RequestPayloadBlobID, ResponsePayloadBlobID, CreatedDate
             FROM log.ApiRequest 
             ORDER BY CreatedDate DESC
         """
-        return db_service.execute_query(query)
+        return expand_payload_rows(db_service.execute_query(query), query_blob_fetcher(db_service.execute_query))
     except Exception as e:
         print(f"Error getting API requests: {e}")
         return []
@@ -5,12 +5,21 @@ Main application entry point
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # Import middleware and exception handlers
 from middleware import RequestLoggingMiddleware, EnhancedRequestLoggingMiddleware, BulletproofRequestLoggingMiddleware, JWTAuthMiddleware, global_exception_handler
 from middleware.test_middleware import TestMiddleware
+from middleware.sql_profiler import SQLProfilerMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.timing import TimingMiddleware
+from common.sql_profiler import SQL_PROFILER_ENABLED
+from common.timing import TIMING_SPANS_ENABLED, span_exporter
+from common.metrics import (
+    METRICS_ENABLED, METRICS_FLUSH_ENABLED, METRICS_ALLOW_REMOTE_SCRAPE, metrics_flush_worker, render_prometheus
+)
 from common.logger import configure_logging
 
 # Import routers
@@ -21,6 +30,15 @@ from modules.invitations.router import router as invitations_router
 from modules.config.router import router as config_router, admin_router as config_admin_router
 from modules.countries.router import router as countries_router
 from modules.dashboard.router import router as dashboard_router
+from modules.forms.router import router as forms_router
+from modules.dashboard.kpi_service import kpi_rollup_worker, KPI_ROLLUP_WORKER_ENABLED
+from common.request_rollup import request_rollup_worker, API_REQUEST_ROLLUP_ENABLED
+from common.log_retention import log_retention_worker, LOG_RETENTION_ENABLED
+from common.log_analyzer import log_analyzer_worker, route_normalizer, LOG_ANALYZER_ENABLED
+from modules.exports.router import router as exports_router
+from modules.exports.export_service import lead_export_worker, EXPORT_WORKER_ENABLED
+from modules.events.router import router as events_router
+from modules.diagnostics.router import router as diagnostics_router
 
 # Configure application-wide logging
 configure_logging(log_level="INFO")
@@ -64,6 +82,47 @@ app.include_router(config_router)  # Story 1.13: Public configuration
 app.include_router(config_admin_router)  # Story 1.13: Admin configuration management
 app.include_router(countries_router)  # Story 1.12: Country validation
 app.include_router(dashboard_router)  # Story 1.18: Dashboard KPIs
+app.include_router(forms_router)  # Epic 2: Lead submission ingestion
+app.include_router(exports_router)  # Epic 2: Lead exports
+app.include_router(events_router)  # Epic 2: Event search
+app.include_router(diagnostics_router)  # Request traces and log analyzer summaries (admin)
+
+# Background KPI rollup worker (folds dbo.KpiOutbox into the rollup tables)
+if KPI_ROLLUP_WORKER_ENABLED:
+    app.add_event_handler("startup", kpi_rollup_worker.start)
+    app.add_event_handler("shutdown", kpi_rollup_worker.stop)
+
+# Background lead export worker (runs queued dbo.LeadExportJob exports)
+if EXPORT_WORKER_ENABLED:
+    app.add_event_handler("startup", lead_export_worker.start)
+    app.add_event_handler("shutdown", lead_export_worker.stop)
+
+# Metrics flush worker (per-endpoint summaries into log.PerformanceMetric)
+if METRICS_ENABLED and METRICS_FLUSH_ENABLED:
+    app.add_event_handler("startup", metrics_flush_worker.start)
+    app.add_event_handler("shutdown", metrics_flush_worker.stop)
+
+# API request rollup worker (per-minute/hour aggregates into log.ApiRequestRollup)
+if API_REQUEST_ROLLUP_ENABLED:
+    app.add_event_handler("startup", request_rollup_worker.start)
+    app.add_event_handler("shutdown", request_rollup_worker.stop)
+
+# Log retention worker (archives and deletes expired log schema rows in batches)
+if LOG_RETENTION_ENABLED:
+    app.add_event_handler("startup", log_retention_worker.start)
+    app.add_event_handler("shutdown", log_retention_worker.stop)
+
+# Log analyzer worker (slow endpoints and error patterns into log summary tables);
+# paths are normalized to the app's route templates, known once all routes exist
+if LOG_ANALYZER_ENABLED:
+    app.add_event_handler("startup", lambda: route_normalizer.set_templates(route.path for route in app.routes))
+    app.add_event_handler("startup", log_analyzer_worker.start)
+    app.add_event_handler("shutdown", log_analyzer_worker.stop)
+
+# Timing span exporter (OTLP/JSON to TIMING_EXPORT_PATH / TIMING_EXPORT_URL, if set)
+if TIMING_SPANS_ENABLED and span_exporter.enabled:
+    app.add_event_handler("startup", span_exporter.start)
+    app.add_event_handler("shutdown", span_exporter.stop)
 
 @app.get("/")
 async def root():
@@ -84,6 +143,18 @@ async def health_check():
         "environment": "development"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus scrape endpoint (this worker's in-process metrics).
+    
+    Served to loopback clients only unless METRICS_ALLOW_REMOTE_SCRAPE=true.
+    """
+    client = request.client.host if request.client else None
+    if not METRICS_ALLOW_REMOTE_SCRAPE and client not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Metrics are only served to local scrapers")
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/test-database")
 async def test_database():
     """Test database connection"""
@@ -124,7 +195,11 @@ except Exception as e:
     import traceback
     print(f"Traceback: {traceback.format_exc()}")
 
-# 4. Bulletproof request logging middleware (guaranteed payload capture)
+# 4. SQL profiler (opt-in: SQL_PROFILER_ENABLED=true) - inside request logging so request_id is set
+if SQL_PROFILER_ENABLED:
+    app.add_middleware(SQLProfilerMiddleware)
+
+# 5. Bulletproof request logging middleware (guaranteed payload capture)
 # Note: FastAPI add_middleware doesn't support keyword args, so debug is set in the class
 print("Registering BulletproofRequestLoggingMiddleware...")
 try:
@@ -135,6 +210,14 @@ except Exception as e:
     import traceback
     print(f"Traceback: {traceback.format_exc()}")
 
+# 6. Timing spans (opt-in: TIMING_SPANS_ENABLED=true) - outside request logging so payload capture is timed
+if TIMING_SPANS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
+# 7. Metrics (outermost, so latency includes every other middleware)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -1,12 +1,15 @@
 """
 Middleware Package
-Request logging, JWT authentication, and exception handling middleware
+Request logging, JWT authentication, SQL profiling, timing, metrics and exception handling middleware
 """
 from .request_logger import RequestLoggingMiddleware
 from .enhanced_request_logger import EnhancedRequestLoggingMiddleware
 from .bulletproof_request_logger import RequestLoggingMiddleware as BulletproofRequestLoggingMiddleware
 from .exception_handler import global_exception_handler
 from .auth import JWTAuthMiddleware
+from .sql_profiler import SQLProfilerMiddleware
+from .metrics import MetricsMiddleware
+from .timing import TimingMiddleware
 
 __all__ = [
     "RequestLoggingMiddleware",
@@ -14,5 +17,8 @@ __all__ = [
     "BulletproofRequestLoggingMiddleware",
     "JWTAuthMiddleware",
     "global_exception_handler",
+    "SQLProfilerMiddleware",
+    "MetricsMiddleware",
+    "TimingMiddleware",
 ]
 
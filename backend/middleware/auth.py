@@ -51,6 +51,7 @@ class JWTAuthMiddleware(BaseHTTPMiddleware):
         "/redoc",
         "/api/health",
         "/api/test-database",
+        "/metrics",  # Prometheus scrape (loopback only, see main.py)
         "/",  # Root endpoint
     ]
     
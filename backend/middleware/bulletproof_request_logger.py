@@ -14,6 +14,13 @@ from starlette.background import BackgroundTask
 from starlette.datastructures import Headers
 from io import BytesIO
 
+from common.capture_sampling import CapturePolicy, capture_policy_cache
+from common.payload_blobs import payload_columns
+from common.redaction import SENSITIVE_FIELD_PATTERNS, redact_body, redact_headers, redact_query_string, redact_value
+from common.request_rollup import request_rollup_buffer
+from common.timing import span
+from middleware.metrics import UNMATCHED_ROUTE
+
 class CachedBodyRequest(Request):
     """
     Request subclass that caches the body for reuse.
@@ -21,13 +28,17 @@ class CachedBodyRequest(Request):
     """
     def __init__(self, request: Request):
         super().__init__(request.scope, request.receive)
+        self._request = request
         self._cached_body: Optional[bytes] = None
         self._body_consumed = False
         
     async def body(self) -> bytes:
         """Cache and return the request body"""
         if self._cached_body is None:
-            self._cached_body = await super().body()
+            # Read through the middleware's request: BaseHTTPMiddleware replays
+            # a body read there to the endpoint, one read here from the raw
+            # receive channel would leave the endpoint waiting for it
+            self._cached_body = await self._request.body()
             self._body_consumed = True
         return self._cached_body
 
@@ -41,18 +52,12 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         print(f"\n[MIDDLEWARE CONSTRUCTOR] Called with app={type(app).__name__}, debug={debug}")
         super().__init__(app)
         self._debug = debug
-        self._sensitive_fields = {
-            "password", "token", "secret", "api_key", 
-            "apikey", "authorization", "auth", "credential",
-            "passwd", "pwd", "private_key", "access_token",
-            "refresh_token", "session_id", "sessionid"
-        }
         
         # Print initialization
         print("\n" + "="*80)
         print("BULLETPROOF REQUEST LOGGING MIDDLEWARE INITIALIZED")
         print(f"   Debug Mode: {self._debug}")
-        print(f"   Sensitive Fields: {len(self._sensitive_fields)} fields masked")
+        print(f"   Sensitive Field Patterns: {len(SENSITIVE_FIELD_PATTERNS)} patterns masked")
         print(f"   App: {type(app).__name__}")
         print("="*80 + "\n")
         
@@ -73,81 +78,12 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             if data is not None:
                 print(f"        Data: {data}")
     
-    def _get_logging_config(self) -> Dict[str, Any]:
+    def _get_logging_config(self) -> CapturePolicy:
         """
-        Get logging configuration with extensive debugging.
-        Returns config dict with fallback defaults.
+        Payload capture settings: the process-wide snapshot, refreshed every
+        PAYLOAD_CAPTURE_POLICY_REFRESH_SECONDS (common.capture_sampling).
         """
-        print("[CONFIG] Starting configuration retrieval...")
-        self._log_debug("=" * 60)
-        self._log_debug("RETRIEVING LOGGING CONFIGURATION")
-        
-        try:
-            print("[CONFIG] Importing configuration service...")
-            from common.config_service import ConfigurationService
-            from common.constants import (
-                DEFAULT_LOGGING_CAPTURE_PAYLOADS,
-                DEFAULT_LOGGING_MAX_PAYLOAD_SIZE_KB,
-                DEFAULT_LOGGING_EXCLUDED_ENDPOINTS
-            )
-            print("[CONFIG] Imports successful")
-            
-            # Create a database session for config service
-            print("[CONFIG] Creating database session...")
-            from common.database import SessionLocal
-            db = SessionLocal()
-            print("[CONFIG] Database session created")
-            
-            print("[CONFIG] Creating configuration service...")
-            config_service = ConfigurationService(db)
-            print("[CONFIG] Configuration service created")
-            
-            # Get each setting individually with debug output
-            print("[CONFIG] Getting capture_payloads setting...")
-            capture_payloads = config_service.get_logging_capture_payloads()
-            print(f"[CONFIG] capture_payloads: {capture_payloads}")
-            self._log_debug(f"Config 'capture_payloads': {capture_payloads}")
-            
-            print("[CONFIG] Getting max_payload_size_kb setting...")
-            max_size = config_service.get_logging_max_payload_size_kb()
-            print(f"[CONFIG] max_payload_size_kb: {max_size}")
-            self._log_debug(f"Config 'max_payload_size_kb': {max_size}")
-            
-            print("[CONFIG] Getting excluded_endpoints setting...")
-            excluded = config_service.get_logging_excluded_endpoints()
-            print(f"[CONFIG] excluded_endpoints: {excluded}")
-            self._log_debug(f"Config 'excluded_endpoints': {excluded}")
-            
-            config = {
-                "capture_payloads": capture_payloads,
-                "max_payload_size_kb": max_size,
-                "excluded_endpoints": excluded,
-            }
-            
-            print("[CONFIG] Configuration loaded successfully")
-            self._log_debug("Configuration loaded successfully")
-            self._log_debug("=" * 60)
-            db.close()
-            print("[CONFIG] Database session closed")
-            return config
-            
-        except Exception as e:
-            print(f"[CONFIG] ERROR: {type(e).__name__}: {str(e)}")
-            import traceback
-            print(f"[CONFIG] Traceback: {traceback.format_exc()}")
-            self._log_debug(f"Config service error: {str(e)}")
-            self._log_debug(f"   Using fallback configuration")
-            
-            # FALLBACK: Always enable for debugging
-            fallback_config = {
-                "capture_payloads": True,  # Force enable for debugging
-                "max_payload_size_kb": 50,
-                "excluded_endpoints": ["/api/health", "/docs", "/openapi.json", "/redoc", "/favicon.ico"],
-            }
-            print(f"[CONFIG] Using fallback config: {fallback_config}")
-            self._log_debug(f"Fallback config: {fallback_config}")
-            self._log_debug("=" * 60)
-            return fallback_config
+        return capture_policy_cache.get()
     
     def _is_endpoint_excluded(self, path: str, excluded_endpoints: List[str]) -> bool:
         """Check if endpoint should be excluded from logging"""
@@ -158,22 +94,22 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     
     def _sanitize_payload(self, payload: Any) -> Any:
         """
-        Recursively sanitize sensitive fields in payload.
-        Works with dicts, lists, and nested structures.
+        Recursively sanitize sensitive fields in a decoded payload.
+        Works with dicts, lists, and nested structures (common.redaction).
+        """
+        return redact_value(payload)
+    
+    def _limit_payload(self, body_str: str, max_size_kb: int) -> str:
+        """
+        Truncate a (redacted) payload to the configured size.
         """
-        if isinstance(payload, dict):
-            sanitized = {}
-            for key, value in payload.items():
-                key_lower = key.lower()
-                if any(sensitive in key_lower for sensitive in self._sensitive_fields):
-                    sanitized[key] = "***REDACTED***"
-                else:
-                    sanitized[key] = self._sanitize_payload(value)
-            return sanitized
-        elif isinstance(payload, list):
-            return [self._sanitize_payload(item) for item in payload]
-        else:
-            return payload
+        max_size_bytes = max_size_kb * 1024
+        if len(body_str) > max_size_bytes:
+            self._log_debug(f"   Truncating payload: {len(body_str)} > {max_size_bytes} bytes")
+            return f"{body_str[:max_size_bytes]}... [TRUNCATED - Original: {len(body_str)} bytes]"
+        self._log_debug(f"   Final payload: {len(body_str)} characters")
+        self._log_debug(f"   Preview: {body_str[:200]}...")
+        return body_str
     
     async def _capture_request_payload(
         self, 
@@ -218,38 +154,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 import base64
                 return f"[BINARY DATA: {len(body_bytes)} bytes, base64: {base64.b64encode(body_bytes[:100]).decode()}...]"
             
-            # Check size limit
-            max_size_bytes = max_size_kb * 1024
-            if len(body_str) > max_size_bytes:
-                self._log_debug(f"   Truncating payload: {len(body_str)} > {max_size_bytes} bytes")
-                truncated = body_str[:max_size_bytes]
-                result = f"{truncated}... [TRUNCATED - Original: {len(body_str)} bytes]"
-                self._log_debug(f"   Result length: {len(result)}")
-                return result
-            
-            # Try to parse and sanitize JSON
-            if "application/json" in content_type or body_str.strip().startswith(("{", "[")):
-                try:
-                    self._log_debug("   Attempting JSON parse...")
-                    json_obj = json.loads(body_str)
-                    self._log_debug("   JSON parsed successfully")
-                    
-                    self._log_debug("   Sanitizing sensitive fields...")
-                    sanitized = self._sanitize_payload(json_obj)
-                    
-                    result = json.dumps(sanitized, indent=2)
-                    self._log_debug(f"   Final payload: {len(result)} characters")
-                    self._log_debug(f"   Preview: {result[:200]}...")
-                    return result
-                    
-                except json.JSONDecodeError as e:
-                    self._log_debug(f"   JSON parse failed: {str(e)}")
-                    self._log_debug("   Returning raw body string")
-            
-            # Return raw body for non-JSON
-            self._log_debug(f"   Returning raw body: {len(body_str)} characters")
-            self._log_debug(f"   Preview: {body_str[:200]}...")
-            return body_str
+            # Redact sensitive fields (single pass over the text, before truncation)
+            self._log_debug("   Sanitizing sensitive fields...")
+            return self._limit_payload(redact_body(body_str, content_type), max_size_kb)
             
         except Exception as e:
             error_msg = f"[ERROR CAPTURING REQUEST: {type(e).__name__}: {str(e)}]"
@@ -295,32 +202,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             else:
                 body_str = str(body)
             
-            # Check size limit
-            max_size_bytes = max_size_kb * 1024
-            if len(body_str) > max_size_bytes:
-                self._log_debug(f"   Truncating response: {len(body_str)} > {max_size_bytes} bytes")
-                truncated = body_str[:max_size_bytes]
-                result = f"{truncated}... [TRUNCATED - Original: {len(body_str)} bytes]"
-                return result
-            
-            # Try to parse JSON
-            content_type = response.headers.get("content-type", "").lower()
-            if "application/json" in content_type or body_str.strip().startswith(("{", "[")):
-                try:
-                    self._log_debug("   Attempting JSON parse...")
-                    json_obj = json.loads(body_str)
-                    self._log_debug("   JSON parsed successfully")
-                    
-                    result = json.dumps(json_obj, indent=2)
-                    self._log_debug(f"   Final response: {len(result)} characters")
-                    self._log_debug(f"   Preview: {result[:200]}...")
-                    return result
-                    
-                except json.JSONDecodeError:
-                    self._log_debug("   JSON parse failed, returning raw")
-            
-            self._log_debug(f"   Returning raw response: {len(body_str)} characters")
-            return body_str
+            # Redact sensitive fields (single pass over the text, before truncation)
+            content_type = response.headers.get("content-type", "")
+            return self._limit_payload(redact_body(body_str, content_type), max_size_kb)
             
         except Exception as e:
             error_msg = f"[ERROR CAPTURING RESPONSE: {type(e).__name__}: {str(e)}]"
@@ -358,14 +242,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         self._log_debug(f"   Query: {request.url.query}")
         self._log_debug("="*80)
         
-        # Get configuration
-        config = self._get_logging_config()
-        
-        # Check if endpoint is excluded
-        is_excluded = self._is_endpoint_excluded(
-            request.url.path, 
-            config["excluded_endpoints"]
-        )
+        # Get configuration (cached snapshot, no database work)
+        policy = self._get_logging_config()
         
         # Wrap request for body caching
         self._log_debug("Wrapping request with CachedBodyRequest...")
@@ -375,25 +253,14 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         # Initialize payload variables
         request_payload = None
         response_payload = None
+        capture_reason = None
         
-        # Capture request payload BEFORE calling endpoint
-        should_capture = config["capture_payloads"] and not is_excluded
-        self._log_debug(f"Payload capture enabled: {should_capture}")
-        self._log_debug(f"   capture_payloads: {config['capture_payloads']}")
-        self._log_debug(f"   is_excluded: {is_excluded}")
-        
-        if should_capture:
-            self._log_debug("ATTEMPTING REQUEST PAYLOAD CAPTURE")
-            request_payload = await self._capture_request_payload(
-                cached_request, 
-                config["max_payload_size_kb"]
-            )
-            if request_payload:
-                self._log_debug(f"Request payload captured: {len(request_payload)} chars")
-            else:
-                self._log_debug("Request payload is None")
-        else:
-            self._log_debug("Skipping payload capture (disabled or excluded)")
+        # Payloads are only processed once the outcome is known (errors and
+        # slow requests always, the rest sampled); keep the raw body for that
+        should_capture = policy.is_candidate(request.url.path)
+        self._log_debug(f"Payload capture candidate: {should_capture}")
+        if should_capture and request.method in ("POST", "PUT", "PATCH", "DELETE"):
+            await cached_request.body()
         
         # Process the request through the application
         self._log_debug("Calling next middleware/endpoint...")
@@ -407,33 +274,41 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         
         # Calculate duration
         duration_ms = int((time.time() - start_time) * 1000)
+        route = getattr(request.scope.get("route"), "path", None) or UNMATCHED_ROUTE
         
-        # Capture response payload
         if should_capture:
-            self._log_debug("ATTEMPTING RESPONSE PAYLOAD CAPTURE")
-            response_payload = await self._capture_response_payload(
-                response, 
-                config["max_payload_size_kb"]
+            user = getattr(cached_request.state, "user", None)
+            capture_reason = policy.decide(
+                route,
+                response.status_code,
+                duration_ms,
+                getattr(user, "user_id", None),
+                getattr(user, "company_id", None),
             )
-            if response_payload:
-                self._log_debug(f"Response payload captured: {len(response_payload)} chars")
-            else:
-                self._log_debug("Response payload is None")
+            self._log_debug(f"Payload capture decision: {capture_reason or 'skipped'}")
+        
+        if capture_reason:
+            with span("capture", reason=capture_reason):
+                request_payload = await self._capture_request_payload(
+                    cached_request, 
+                    policy.max_payload_size_kb
+                )
+                response_payload = await self._capture_response_payload(
+                    response, 
+                    policy.max_payload_size_kb
+                )
         
         # Prepare headers (sanitized)
-        headers_dict = dict(request.headers)
-        if "authorization" in headers_dict:
-            headers_dict["authorization"] = "***REDACTED***"
-        if "cookie" in headers_dict:
-            headers_dict["cookie"] = "***REDACTED***"
-        headers_json = json.dumps(headers_dict, indent=2)
+        headers_dict = redact_headers(dict(request.headers))
+        headers_json = json.dumps(headers_dict, separators=(",", ":"))
         
         # Prepare log data
         log_data = {
             "request_id": request_id,
             "method": request.method,
             "path": str(request.url.path),
-            "query_params": str(request.url.query) if request.url.query else None,
+            "route": route,
+            "query_params": redact_query_string(str(request.url.query)) if request.url.query else None,
             "status_code": response.status_code,
             "duration_ms": duration_ms,
             "ip_address": request.client.host if request.client else None,
@@ -449,6 +324,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         self._log_debug(f"   RequestID: {request_id}")
         self._log_debug(f"   Duration: {duration_ms}ms")
         self._log_debug(f"   Status: {response.status_code}")
+        self._log_debug(f"   Capture Reason: {capture_reason or 'None'}")
         self._log_debug(f"   Request Payload: {'Captured' if request_payload else 'None'}")
         self._log_debug(f"   Response Payload: {'Captured' if response_payload else 'None'}")
         self._log_debug("="*80 + "\n")
@@ -471,11 +347,19 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             self._log_debug(f"   Request Payload Length: {len(log_data['request_payload']) if log_data['request_payload'] else 0}")
             self._log_debug(f"   Response Payload Length: {len(log_data['response_payload']) if log_data['response_payload'] else 0}")
             
-            from common.database import SessionLocal
+            # Aggregate first: dashboards read the rollup, not these rows
+            request_rollup_buffer.add(
+                log_data["method"],
+                log_data["route"],
+                log_data["status_code"],
+                log_data["duration_ms"],
+            )
+            
+            from common.database import LogSessionLocal
             from models.log.api_request import ApiRequest
             from datetime import datetime
             
-            db = SessionLocal()
+            db = LogSessionLocal()
             try:
                 api_request = ApiRequest(
                     RequestID=log_data["request_id"],
@@ -486,10 +370,14 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                     DurationMs=log_data["duration_ms"],
                     IPAddress=log_data.get("ip_address"),
                     UserAgent=log_data.get("user_agent"),
-                    RequestPayload=log_data.get("request_payload"),
-                    ResponsePayload=log_data.get("response_payload"),
-                    Headers=log_data.get("headers"),
                     CreatedDate=datetime.utcnow(),
+                    # Deduplicated + compressed here, off the response path
+                    **payload_columns(
+                        db,
+                        log_data.get("request_payload"),
+                        log_data.get("response_payload"),
+                        log_data.get("headers"),
+                    ),
                 )
                 
                 db.add(api_request)
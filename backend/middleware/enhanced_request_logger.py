@@ -13,9 +13,11 @@ from starlette.background import BackgroundTask
 from starlette.types import ASGIApp, Scope, Receive, Send
 from sqlalchemy.orm import Session
 
-from common.database import SessionLocal
+from common.database import LogSessionLocal
 from common.request_context import set_request_context, clear_request_context
 from common.log_filters import sanitize_query_params
+from common.payload_blobs import payload_columns
+from common.redaction import redact_body, redact_headers
 from common.config_service import ConfigurationService
 from models.log.api_request import ApiRequest
 
@@ -215,7 +217,7 @@ class EnhancedRequestLoggingMiddleware:
             return self._config_cache
         
         # Get fresh configuration from database
-        db = SessionLocal()
+        db = LogSessionLocal()
         try:
             config_service = ConfigurationService(db)
             
@@ -267,8 +269,8 @@ class EnhancedRequestLoggingMiddleware:
             if not body:
                 return None
             
-            # Convert to string and check size
-            body_str = body.decode('utf-8')
+            # Convert to string, redact sensitive fields and check size
+            body_str = redact_body(body.decode('utf-8'))
             max_size_bytes = max_size_kb * 1024
             
             if len(body_str) <= max_size_bytes:
@@ -288,8 +290,8 @@ class EnhancedRequestLoggingMiddleware:
             if not body:
                 return None
             
-            # Convert to string and check size
-            body_str = body.decode('utf-8')
+            # Convert to string, redact sensitive fields and check size
+            body_str = redact_body(body.decode('utf-8'))
             max_size_bytes = max_size_kb * 1024
             
             if len(body_str) <= max_size_bytes:
@@ -306,15 +308,10 @@ class EnhancedRequestLoggingMiddleware:
     def _capture_headers(self, headers_dict: Dict[str, str]) -> Optional[str]:
         """Capture request headers as JSON string"""
         try:
-            # Filter out sensitive headers
-            sensitive_headers = {"authorization", "cookie", "x-api-key", "x-auth-token"}
+            # Mask sensitive headers
+            filtered_headers = redact_headers(headers_dict)
             
-            filtered_headers = {
-                name: value for name, value in headers_dict.items()
-                if name.lower() not in sensitive_headers
-            }
-            
-            return json.dumps(filtered_headers, indent=2)
+            return json.dumps(filtered_headers, separators=(",", ":"))
             
         except Exception as e:
             print(f"Error capturing headers: {e}")
@@ -323,7 +320,7 @@ class EnhancedRequestLoggingMiddleware:
     def _log_to_database_async(self, log_data: dict):
         """Log to database in background thread"""
         def log_api_request():
-            db: Session = SessionLocal()
+            db: Session = LogSessionLocal()
             try:
                 api_request = ApiRequest(
                     RequestID=log_data["request_id"],
@@ -336,9 +333,12 @@ class EnhancedRequestLoggingMiddleware:
                     CompanyID=log_data["company_id"],
                     IPAddress=log_data["ip_address"],
                     UserAgent=log_data["user_agent"],
-                    RequestPayload=log_data.get("request_payload"),
-                    ResponsePayload=log_data.get("response_payload"),
-                    Headers=log_data.get("headers"),
+                    **payload_columns(
+                        db,
+                        log_data.get("request_payload"),
+                        log_data.get("response_payload"),
+                        log_data.get("headers"),
+                    ),
                 )
                 
                 db.add(api_request)
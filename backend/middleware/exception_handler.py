@@ -9,7 +9,7 @@ from fastapi import Request, status, HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
-from common.database import SessionLocal
+from common.database import LogSessionLocal
 from common.request_context import get_current_request_context
 from common.log_filters import sanitize_stack_trace
 from models.log.application_error import ApplicationError
@@ -72,7 +72,7 @@ async def global_exception_handler(
     user_agent = context.user_agent if context else None
     
     # Log error to database (synchronous - we want to ensure it's logged)
-    db: Session = SessionLocal()
+    db: Session = LogSessionLocal()
     try:
         application_error = ApplicationError(
             RequestID=request_id,
@@ -0,0 +1,64 @@
+"""
+Metrics Middleware
+Per-endpoint request latency, status counts and in-flight gauge
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.metrics import http_requests_in_progress, observe_request
+
+# Route label for requests that matched no route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records every HTTP request in the in-process metrics registry.
+
+    Features:
+    - Latency histogram and status counter per (method, route template), so
+      /api/forms/1/submissions and /api/forms/2/submissions share a series
+    - In-flight request gauge
+    - Requests that raise are counted as 500
+
+    Only updates memory; common.metrics flushes summaries to
+    log.PerformanceMetric and serves them on /metrics. Register it last
+    (outermost) so the latency includes the other middleware. Pure ASGI (no
+    BaseHTTPMiddleware) to keep the per-request overhead to a few dict
+    updates.
+
+    Usage:
+        if METRICS_ENABLED:
+            app.add_middleware(MetricsMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.labels().inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.labels().dec()
+            route = scope.get("route")
+            observe_request(
+                scope.get("method", ""),
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status_code,
+                (time.perf_counter() - started) * 1000
+            )
@@ -11,9 +11,11 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 
-from common.database import SessionLocal
+from common.database import LogSessionLocal
 from common.request_context import set_request_context, clear_request_context
 from common.log_filters import sanitize_query_params
+from common.payload_blobs import payload_columns
+from common.redaction import redact_body, redact_headers
 from common.config_service import ConfigurationService
 from models.log.api_request import ApiRequest
 
@@ -151,7 +153,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             return self._config_cache
         
         # Get fresh configuration from database
-        db = SessionLocal()
+        db = LogSessionLocal()
         try:
             config_service = ConfigurationService(db)
             
@@ -217,8 +219,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             if not body:
                 return None
             
-            # Convert to string and check size
-            body_str = body.decode('utf-8')
+            # Convert to string, redact sensitive fields and check size
+            body_str = redact_body(body.decode('utf-8'))
             max_size_bytes = max_size_kb * 1024
             
             if len(body_str) <= max_size_bytes:
@@ -271,8 +273,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             if not body:
                 return None
             
-            # Convert to string and check size
-            body_str = body.decode('utf-8')
+            # Convert to string, redact sensitive fields and check size
+            body_str = redact_body(body.decode('utf-8'))
             max_size_bytes = max_size_kb * 1024
             
             if len(body_str) <= max_size_bytes:
@@ -297,15 +299,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             JSON string of headers or None if error
         """
         try:
-            # Filter out sensitive headers
-            sensitive_headers = {"authorization", "cookie", "x-api-key", "x-auth-token"}
+            # Mask sensitive headers
+            headers = redact_headers(dict(request.headers))
             
-            headers = {
-                name: value for name, value in request.headers.items()
-                if name.lower() not in sensitive_headers
-            }
-            
-            return json.dumps(headers, indent=2)
+            return json.dumps(headers, separators=(",", ":"))
             
         except Exception as e:
             print(f"Error capturing headers: {e}")
@@ -319,7 +316,7 @@ def log_api_request(log_data: dict) -> None:
     Args:
         log_data: Dictionary containing request details
     """
-    db: Session = SessionLocal()
+    db: Session = LogSessionLocal()
     try:
         api_request = ApiRequest(
             RequestID=log_data["request_id"],
@@ -332,9 +329,12 @@ def log_api_request(log_data: dict) -> None:
             CompanyID=log_data["company_id"],
             IPAddress=log_data["ip_address"],
             UserAgent=log_data["user_agent"],
-            RequestPayload=log_data.get("request_payload"),
-            ResponsePayload=log_data.get("response_payload"),
-            Headers=log_data.get("headers"),
+            **payload_columns(
+                db,
+                log_data.get("request_payload"),
+                log_data.get("response_payload"),
+                log_data.get("headers"),
+            ),
         )
         
         db.add(api_request)
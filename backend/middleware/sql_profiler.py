@@ -0,0 +1,59 @@
+"""
+SQL Profiler Middleware
+Opt-in per-request SQL profiling with N+1 detection and Server-Timing output
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.sql_profiler import (
+    install_sql_profiler,
+    start_profile,
+    finish_profile,
+    log_profile_summary,
+)
+
+
+class SQLProfilerMiddleware:
+    """
+    Profiles the SQL executed by each HTTP request.
+
+    Features:
+    - Attributes every statement to the request's RequestContext.request_id
+    - Counts and times queries per request
+    - Flags statement shapes repeated >= SQL_PROFILER_N1_THRESHOLD as N+1
+    - Adds a Server-Timing header (visible in browser devtools)
+    - Logs a per-request summary (N+1 candidates and slow statements at WARNING)
+
+    Must be registered inside the request logging middleware so the request
+    context (request_id) is already set. Pure ASGI (no BaseHTTPMiddleware) so
+    the profile ContextVar is shared with the endpoint and its threadpool calls.
+
+    Usage:
+        if SQL_PROFILER_ENABLED:
+            app.add_middleware(SQLProfilerMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        install_sql_profiler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = start_profile(scope.get("request_id"))
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                existing = headers.get("server-timing")
+                timing = profile.server_timing()
+                headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish_profile(profile)
+            log_profile_summary(profile, scope.get("method", ""), scope.get("path", ""))
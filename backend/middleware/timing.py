@@ -0,0 +1,63 @@
+"""
+Timing Middleware
+Per-request timing spans with Server-Timing output and optional OTLP export
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.timing import finish_trace, install_timing_hooks, span_exporter, start_trace
+from middleware.metrics import UNMATCHED_ROUTE
+
+
+class TimingMiddleware:
+    """
+    Traces each HTTP request (common.timing).
+
+    Features:
+    - Spans from everything the request runs: JWT decode, payload capture,
+      SQL statements, ABR and email calls, bcrypt
+    - Adds a Server-Timing header with per-category totals
+    - Queues the trace for OTLP/JSON export when an export target is set
+
+    Register it outside the request logging middleware so payload capture
+    is included; the request ID that middleware puts in the scope is read
+    when the request finishes. Pure ASGI (no BaseHTTPMiddleware) so the
+    trace ContextVar is shared with the endpoint and its threadpool calls.
+
+    Usage:
+        if TIMING_SPANS_ENABLED:
+            app.add_middleware(TimingMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        install_timing_hooks()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace(scope.get("method", ""), **{"http.method": scope.get("method", "")})
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                existing = headers.get("server-timing")
+                timing = trace.server_timing()
+                headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish_trace(trace)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            trace.name = f"{scope.get('method', '')} {route}"
+            trace.request_id = scope.get("request_id") or trace.request_id
+            trace.attributes["http.route"] = route
+            trace.attributes["http.status_code"] = status_code
+            span_exporter.export(trace)
@@ -0,0 +1,65 @@
+"""Company Relationship Closure Table
+
+Revision ID: 019_company_relationship_closure
+Revises: 018_logging_configuration
+Create Date: 2025-02-03 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019_company_relationship_closure'
+down_revision = '018_logging_configuration'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create dbo.CompanyRelationshipClosure and backfill it from active relationships"""
+
+    op.create_table('CompanyRelationshipClosure',
+        sa.Column('AncestorCompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('DescendantCompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('Depth', sa.Integer(), nullable=False),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.ForeignKeyConstraint(['AncestorCompanyID'], ['dbo.Company.CompanyID'], name='FK_CompanyRelationshipClosure_Ancestor'),
+        sa.ForeignKeyConstraint(['DescendantCompanyID'], ['dbo.Company.CompanyID'], name='FK_CompanyRelationshipClosure_Descendant'),
+        sa.PrimaryKeyConstraint('AncestorCompanyID', 'DescendantCompanyID', name='PK_CompanyRelationshipClosure'),
+        schema='dbo'
+    )
+
+    op.create_index(
+        'IX_CompanyRelationshipClosure_Descendant',
+        'CompanyRelationshipClosure',
+        ['DescendantCompanyID', 'Depth'],
+        schema='dbo'
+    )
+
+    # Backfill: shortest path for every (ancestor, descendant) pair over active relationships
+    op.execute("""
+        WITH Paths (AncestorCompanyID, DescendantCompanyID, Depth) AS (
+            SELECT ParentCompanyID, ChildCompanyID, 1
+            FROM [dbo].[CompanyRelationship]
+            WHERE Status = 'active' AND IsDeleted = 0
+            UNION ALL
+            SELECT p.AncestorCompanyID, r.ChildCompanyID, p.Depth + 1
+            FROM Paths p
+            INNER JOIN [dbo].[CompanyRelationship] r
+                ON r.ParentCompanyID = p.DescendantCompanyID
+               AND r.Status = 'active' AND r.IsDeleted = 0
+            WHERE p.Depth < 32
+        )
+        INSERT INTO [dbo].[CompanyRelationshipClosure] (AncestorCompanyID, DescendantCompanyID, Depth)
+        SELECT AncestorCompanyID, DescendantCompanyID, MIN(Depth)
+        FROM Paths
+        WHERE AncestorCompanyID <> DescendantCompanyID
+        GROUP BY AncestorCompanyID, DescendantCompanyID
+        OPTION (MAXRECURSION 32)
+    """)
+
+
+def downgrade():
+    """Drop dbo.CompanyRelationshipClosure"""
+    op.drop_index('IX_CompanyRelationshipClosure_Descendant', table_name='CompanyRelationshipClosure', schema='dbo')
+    op.drop_table('CompanyRelationshipClosure', schema='dbo')
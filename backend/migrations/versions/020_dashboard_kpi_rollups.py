@@ -0,0 +1,158 @@
+"""Dashboard KPI Rollup Tables and Outbox
+
+Revision ID: 020_dashboard_kpi_rollups
+Revises: 019_company_relationship_closure
+Create Date: 2025-02-05 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_dashboard_kpi_rollups'
+down_revision = '019_company_relationship_closure'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create KPI rollup tables and the KPI outbox, backfill totals from Event/Form"""
+
+    # =====================================================================
+    # 1. Per-company totals
+    # =====================================================================
+    op.create_table('CompanyKpiRollup',
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('TotalForms', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalEvents', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ActiveEvents', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalSubmissions', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ProductionLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('DemoLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('UpdatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_CompanyKpiRollup_Company'),
+        sa.PrimaryKeyConstraint('CompanyID', name='PK_CompanyKpiRollup'),
+        schema='dbo'
+    )
+
+    # =====================================================================
+    # 2. Per-event totals
+    # =====================================================================
+    op.create_table('EventKpiRollup',
+        sa.Column('EventID', sa.BigInteger(), nullable=False),
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('TotalForms', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalSubmissions', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ProductionLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('DemoLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('UpdatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.ForeignKeyConstraint(['EventID'], ['dbo.Event.EventID'], name='FK_EventKpiRollup_Event'),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_EventKpiRollup_Company'),
+        sa.PrimaryKeyConstraint('EventID', name='PK_EventKpiRollup'),
+        schema='dbo'
+    )
+    op.create_index('IX_EventKpiRollup_Company', 'EventKpiRollup', ['CompanyID'], schema='dbo')
+
+    # =====================================================================
+    # 3. Per-company, per-day activity
+    # =====================================================================
+    op.create_table('CompanyDailyKpiRollup',
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('MetricDate', sa.Date(), nullable=False),
+        sa.Column('FormsCreated', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('EventsCreated', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalSubmissions', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ProductionLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('DemoLeads', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('UpdatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_CompanyDailyKpiRollup_Company'),
+        sa.PrimaryKeyConstraint('CompanyID', 'MetricDate', name='PK_CompanyDailyKpiRollup'),
+        schema='dbo'
+    )
+
+    # =====================================================================
+    # 4. KPI outbox (deltas written in the same transaction as the change)
+    # =====================================================================
+    op.create_table('KpiOutbox',
+        sa.Column('KpiOutboxID', sa.BigInteger(), sa.Identity(start=1, increment=1), nullable=False),
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('EventID', sa.BigInteger(), nullable=True),
+        sa.Column('MetricDate', sa.Date(), nullable=False),
+        sa.Column('FormsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('EventsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ActiveEventsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('SubmissionsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ProductionLeadsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('DemoLeadsDelta', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.PrimaryKeyConstraint('KpiOutboxID', name='PK_KpiOutbox'),
+        schema='dbo'
+    )
+
+    # =====================================================================
+    # 5. Backfill totals (same definitions as kpi_service.rebuild_kpi_rollups)
+    # =====================================================================
+    op.execute("""
+        INSERT INTO [dbo].[CompanyKpiRollup]
+            (CompanyID, TotalForms, TotalEvents, ActiveEvents, TotalSubmissions, ProductionLeads, DemoLeads)
+        SELECT c.CompanyID,
+               ISNULL(f.TotalForms, 0), ISNULL(e.TotalEvents, 0), ISNULL(e.ActiveEvents, 0),
+               ISNULL(f.TotalSubmissions, 0), ISNULL(f.ProductionLeads, 0), ISNULL(f.DemoLeads, 0)
+        FROM [dbo].[Company] c
+        LEFT JOIN (
+            SELECT ev.CompanyID,
+                   COUNT(*) AS TotalEvents,
+                   SUM(CASE WHEN es.StatusCode = 'PUBLISHED' THEN 1 ELSE 0 END) AS ActiveEvents
+            FROM [dbo].[Event] ev
+            INNER JOIN [ref].[EventStatus] es ON es.EventStatusID = ev.EventStatusID
+            WHERE ev.IsDeleted = 0
+            GROUP BY ev.CompanyID
+        ) e ON e.CompanyID = c.CompanyID
+        LEFT JOIN (
+            SELECT CompanyID,
+                   SUM(CASE WHEN IsDeleted = 0 THEN 1 ELSE 0 END) AS TotalForms,
+                   SUM(CAST(TotalSubmissions AS BIGINT)) AS TotalSubmissions,
+                   SUM(CAST(ProductionLeadsCollected AS BIGINT)) AS ProductionLeads,
+                   SUM(CAST(DemoLeadsCollected AS BIGINT)) AS DemoLeads
+            FROM [dbo].[Form]
+            GROUP BY CompanyID
+        ) f ON f.CompanyID = c.CompanyID
+    """)
+
+    op.execute("""
+        INSERT INTO [dbo].[EventKpiRollup]
+            (EventID, CompanyID, TotalForms, TotalSubmissions, ProductionLeads, DemoLeads)
+        SELECT ev.EventID, ev.CompanyID,
+               ISNULL(SUM(CASE WHEN f.IsDeleted = 0 THEN 1 ELSE 0 END), 0),
+               ISNULL(SUM(CAST(f.TotalSubmissions AS BIGINT)), 0),
+               ISNULL(SUM(CAST(f.ProductionLeadsCollected AS BIGINT)), 0),
+               ISNULL(SUM(CAST(f.DemoLeadsCollected AS BIGINT)), 0)
+        FROM [dbo].[Event] ev
+        LEFT JOIN [dbo].[Form] f ON f.EventID = ev.EventID
+        WHERE ev.IsDeleted = 0
+        GROUP BY ev.EventID, ev.CompanyID
+    """)
+
+    # Daily history: forms/events by creation day (submission history is not
+    # recoverable from Form counters and starts accruing from the outbox)
+    op.execute("""
+        INSERT INTO [dbo].[CompanyDailyKpiRollup] (CompanyID, MetricDate, FormsCreated, EventsCreated)
+        SELECT CompanyID, MetricDate, SUM(FormsCreated), SUM(EventsCreated)
+        FROM (
+            SELECT CompanyID, CAST(CreatedDate AS DATE) AS MetricDate, 1 AS FormsCreated, 0 AS EventsCreated
+            FROM [dbo].[Form] WHERE IsDeleted = 0
+            UNION ALL
+            SELECT CompanyID, CAST(CreatedDate AS DATE), 0, 1
+            FROM [dbo].[Event] WHERE IsDeleted = 0
+        ) activity
+        GROUP BY CompanyID, MetricDate
+    """)
+
+
+def downgrade():
+    """Drop KPI rollup tables and the KPI outbox"""
+    op.drop_table('KpiOutbox', schema='dbo')
+    op.drop_table('CompanyDailyKpiRollup', schema='dbo')
+    op.drop_index('IX_EventKpiRollup_Company', table_name='EventKpiRollup', schema='dbo')
+    op.drop_table('EventKpiRollup', schema='dbo')
+    op.drop_table('CompanyKpiRollup', schema='dbo')
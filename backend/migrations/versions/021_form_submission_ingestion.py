@@ -0,0 +1,64 @@
+"""Form Submission Ingestion
+
+Revision ID: 021_form_submission_ingestion
+Revises: 020_dashboard_kpi_rollups
+Create Date: 2025-02-07 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021_form_submission_ingestion'
+down_revision = '020_dashboard_kpi_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create dbo.FormSubmission and extend dbo.KpiOutbox with per-form counter deltas"""
+
+    # =====================================================================
+    # 1. Append-only submission table
+    # =====================================================================
+    op.create_table('FormSubmission',
+        sa.Column('FormSubmissionID', sa.BigInteger(), sa.Identity(start=1, increment=1), nullable=False),
+        sa.Column('FormID', sa.BigInteger(), nullable=False),
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('EventID', sa.BigInteger(), nullable=True),
+        sa.Column('IsDemo', sa.Boolean(), nullable=False, server_default=sa.text('0')),
+        sa.Column('SubmissionData', sa.UnicodeText(), nullable=False),
+        sa.Column('SubmittedDate', sa.DateTime(), nullable=False),
+        sa.Column('ReceivedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.Column('SubmittedBy', sa.BigInteger(), nullable=True),
+        sa.ForeignKeyConstraint(['FormID'], ['dbo.Form.FormID'], name='FK_FormSubmission_Form'),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_FormSubmission_Company'),
+        sa.ForeignKeyConstraint(['SubmittedBy'], ['dbo.User.UserID'], name='FK_FormSubmission_SubmittedBy'),
+        sa.PrimaryKeyConstraint('FormSubmissionID', name='PK_FormSubmission'),
+        schema='dbo'
+    )
+
+    op.create_index('IX_FormSubmission_Form', 'FormSubmission', ['FormID', 'FormSubmissionID'], schema='dbo')
+    op.create_index('IX_FormSubmission_Company', 'FormSubmission', ['CompanyID', 'FormSubmissionID'], schema='dbo')
+
+    # Concurrent inserts all land on the last page of the identity-clustered
+    # index; SQL Server 2019+ mitigates the last-page latch convoy
+    op.execute("""
+        IF CAST(SERVERPROPERTY('ProductMajorVersion') AS INT) >= 15
+            EXEC('ALTER INDEX [PK_FormSubmission] ON [dbo].[FormSubmission] SET (OPTIMIZE_FOR_SEQUENTIAL_KEY = ON)')
+    """)
+
+    # =====================================================================
+    # 2. Per-form counter deltas on the KPI outbox
+    # =====================================================================
+    op.add_column('KpiOutbox', sa.Column('FormID', sa.BigInteger(), nullable=True), schema='dbo')
+    op.add_column('KpiOutbox', sa.Column('LastOccurredDate', sa.DateTime(), nullable=True), schema='dbo')
+
+
+def downgrade():
+    """Drop dbo.FormSubmission and the KpiOutbox form columns"""
+    op.drop_column('KpiOutbox', 'LastOccurredDate', schema='dbo')
+    op.drop_column('KpiOutbox', 'FormID', schema='dbo')
+    op.drop_index('IX_FormSubmission_Company', table_name='FormSubmission', schema='dbo')
+    op.drop_index('IX_FormSubmission_Form', table_name='FormSubmission', schema='dbo')
+    op.drop_table('FormSubmission', schema='dbo')
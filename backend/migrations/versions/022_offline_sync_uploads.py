@@ -0,0 +1,56 @@
+"""Offline Sync Uploads
+
+Revision ID: 022_offline_sync_uploads
+Revises: 021_form_submission_ingestion
+Create Date: 2025-02-10 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_offline_sync_uploads'
+down_revision = '021_form_submission_ingestion'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add idempotency keys to dbo.FormSubmission and create dbo.SyncUpload"""
+
+    # =====================================================================
+    # 1. Idempotency key (16-byte digest, unique where present)
+    # =====================================================================
+    op.add_column('FormSubmission', sa.Column('ClientKey', sa.BINARY(16), nullable=True), schema='dbo')
+    op.create_index(
+        'UX_FormSubmission_ClientKey', 'FormSubmission', ['ClientKey'],
+        unique=True, schema='dbo',
+        mssql_where=sa.text('ClientKey IS NOT NULL')
+    )
+
+    # =====================================================================
+    # 2. Resumable upload sessions
+    # =====================================================================
+    op.create_table('SyncUpload',
+        sa.Column('SyncUploadID', sa.BigInteger(), sa.Identity(start=1, increment=1), nullable=False),
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('UserID', sa.BigInteger(), nullable=False),
+        sa.Column('DeviceID', sa.String(100), nullable=False),
+        sa.Column('CommittedItems', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('StoredItems', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('DuplicateItems', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('RejectedItems', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.Column('UpdatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_SyncUpload_Company'),
+        sa.ForeignKeyConstraint(['UserID'], ['dbo.User.UserID'], name='FK_SyncUpload_User'),
+        sa.PrimaryKeyConstraint('SyncUploadID', name='PK_SyncUpload'),
+        schema='dbo'
+    )
+
+
+def downgrade():
+    """Drop dbo.SyncUpload and the FormSubmission idempotency key"""
+    op.drop_table('SyncUpload', schema='dbo')
+    op.drop_index('UX_FormSubmission_ClientKey', table_name='FormSubmission', schema='dbo')
+    op.drop_column('FormSubmission', 'ClientKey', schema='dbo')
@@ -0,0 +1,58 @@
+"""Lead Export Jobs
+
+Revision ID: 023_lead_export_jobs
+Revises: 022_offline_sync_uploads
+Create Date: 2025-02-12 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_lead_export_jobs'
+down_revision = '022_offline_sync_uploads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create dbo.LeadExportJob"""
+    op.create_table('LeadExportJob',
+        sa.Column('LeadExportJobID', sa.BigInteger(), sa.Identity(start=1, increment=1), nullable=False),
+        sa.Column('CompanyID', sa.BigInteger(), nullable=False),
+        sa.Column('EventID', sa.BigInteger(), nullable=True),
+        sa.Column('FormID', sa.BigInteger(), nullable=True),
+        sa.Column('IncludeDemo', sa.Boolean(), nullable=False, server_default=sa.text('0')),
+        sa.Column('Format', sa.String(10), nullable=False),
+        sa.Column('Status', sa.String(20), nullable=False, server_default=sa.text("'PENDING'")),
+        sa.Column('RowCount', sa.Integer(), nullable=True),
+        sa.Column('FileSize', sa.BigInteger(), nullable=True),
+        sa.Column('FilePath', sa.String(500), nullable=True),
+        sa.Column('ErrorMessage', sa.String(1000), nullable=True),
+        sa.Column('RequestedBy', sa.BigInteger(), nullable=False),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.Column('StartedDate', sa.DateTime(), nullable=True),
+        sa.Column('CompletedDate', sa.DateTime(), nullable=True),
+        sa.Column('ExpiresDate', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['CompanyID'], ['dbo.Company.CompanyID'], name='FK_LeadExportJob_Company'),
+        sa.ForeignKeyConstraint(['RequestedBy'], ['dbo.User.UserID'], name='FK_LeadExportJob_RequestedBy'),
+        sa.PrimaryKeyConstraint('LeadExportJobID', name='PK_LeadExportJob'),
+        schema='dbo'
+    )
+
+    op.create_index('IX_LeadExportJob_Company', 'LeadExportJob', ['CompanyID', 'LeadExportJobID'], schema='dbo')
+    op.create_index('IX_LeadExportJob_Status', 'LeadExportJob', ['Status', 'LeadExportJobID'], schema='dbo')
+
+    # Event-scoped exports read submissions by event in key order
+    op.create_index(
+        'IX_FormSubmission_Event', 'FormSubmission', ['EventID', 'FormSubmissionID'],
+        schema='dbo', mssql_where=sa.text('EventID IS NOT NULL')
+    )
+
+
+def downgrade():
+    """Drop dbo.LeadExportJob"""
+    op.drop_index('IX_FormSubmission_Event', table_name='FormSubmission', schema='dbo')
+    op.drop_index('IX_LeadExportJob_Status', table_name='LeadExportJob', schema='dbo')
+    op.drop_index('IX_LeadExportJob_Company', table_name='LeadExportJob', schema='dbo')
+    op.drop_table('LeadExportJob', schema='dbo')
@@ -0,0 +1,114 @@
+"""Event Search Indexes
+
+Revision ID: 024_event_search_indexes
+Revises: 023_lead_export_jobs
+Create Date: 2025-02-14 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from common.geohash import encode as geohash_encode
+
+# revision identifiers, used by Alembic.
+revision = '024_event_search_indexes'
+down_revision = '023_lead_export_jobs'
+branch_labels = None
+depends_on = None
+
+GEOHASH_PRECISION = 8
+BACKFILL_BATCH_SIZE = 5000
+
+LIVE = sa.text('IsDeleted = 0')
+
+# (name, columns) - equality filters first, then the keyset sort key
+SEARCH_INDEXES = [
+    ('IX_Event_Public_Start', ['IsPublic', 'StartDateTime', 'EventID']),
+    ('IX_Event_Company_Start', ['CompanyID', 'StartDateTime', 'EventID']),
+    ('IX_Event_Location_Start', ['CountryID', 'State', 'City', 'StartDateTime', 'EventID']),
+    ('IX_Event_Type_Start', ['EventTypeID', 'StartDateTime', 'EventID']),
+    ('IX_Event_Industry_Start', ['IndustryID', 'StartDateTime', 'EventID']),
+]
+
+# Superseded by the *_Start indexes above
+REPLACED_INDEXES = [
+    ('IX_Event_Type', ['EventTypeID', 'IsDeleted']),
+    ('IX_Event_Industry', ['IndustryID', 'IsDeleted']),
+    ('IX_Event_Location', ['City', 'State', 'CountryID', 'IsDeleted']),
+]
+
+
+def upgrade():
+    """Add composite search indexes, the EventTag tag index and Event.GeoHash"""
+
+    # =====================================================================
+    # 1. Composite filter + sort indexes (filtered to live events)
+    # =====================================================================
+    for name, _ in REPLACED_INDEXES:
+        op.drop_index(name, 'Event', schema='dbo')
+    for name, columns in SEARCH_INDEXES:
+        op.create_index(name, 'Event', columns, schema='dbo', mssql_where=LIVE)
+
+    # =====================================================================
+    # 2. Tag index
+    # =====================================================================
+    op.create_table('EventTag',
+        sa.Column('Tag', sa.String(50), nullable=False),
+        sa.Column('EventID', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['EventID'], ['dbo.Event.EventID'], name='FK_EventTag_Event', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('Tag', 'EventID', name='PK_EventTag'),
+        schema='dbo'
+    )
+    op.create_index('IX_EventTag_Event', 'EventTag', ['EventID'], schema='dbo')
+
+    # Whitespace inside a tag is collapsed by the application on the next write
+    op.execute("""
+        INSERT INTO [dbo].[EventTag] (Tag, EventID)
+        SELECT DISTINCT LEFT(LOWER(LTRIM(RTRIM(s.value))), 50), e.EventID
+        FROM [dbo].[Event] e
+        CROSS APPLY STRING_SPLIT(CAST(e.Tags AS NVARCHAR(MAX)), ',') s
+        WHERE e.Tags IS NOT NULL AND LTRIM(RTRIM(s.value)) <> ''
+    """)
+
+    # =====================================================================
+    # 3. Geohash column and index
+    # =====================================================================
+    op.add_column('Event', sa.Column('GeoHash', sa.String(12), nullable=True), schema='dbo')
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text("""
+            SELECT TOP (:batch) EventID, Latitude, Longitude FROM [dbo].[Event]
+            WHERE EventID > :last_id AND Latitude IS NOT NULL AND Longitude IS NOT NULL
+            ORDER BY EventID
+        """), {"batch": BACKFILL_BATCH_SIZE, "last_id": last_id}).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE [dbo].[Event] SET GeoHash = :geohash WHERE EventID = :event_id"),
+            [
+                {"geohash": geohash_encode(float(r.Latitude), float(r.Longitude), GEOHASH_PRECISION), "event_id": r.EventID}
+                for r in rows
+            ]
+        )
+        last_id = rows[-1].EventID
+
+    op.create_index(
+        'IX_Event_GeoHash', 'Event', ['GeoHash', 'StartDateTime', 'EventID'], schema='dbo',
+        mssql_where=sa.text('IsDeleted = 0 AND GeoHash IS NOT NULL')
+    )
+
+
+def downgrade():
+    """Drop the search indexes, EventTag and Event.GeoHash"""
+    op.drop_index('IX_Event_GeoHash', 'Event', schema='dbo')
+    op.drop_column('Event', 'GeoHash', schema='dbo')
+
+    op.drop_index('IX_EventTag_Event', 'EventTag', schema='dbo')
+    op.drop_table('EventTag', schema='dbo')
+
+    for name, _ in SEARCH_INDEXES:
+        op.drop_index(name, 'Event', schema='dbo')
+    for name, columns in REPLACED_INDEXES:
+        op.create_index(name, 'Event', columns, schema='dbo')
@@ -0,0 +1,39 @@
+"""Event Duplicate Blocking Keys
+
+Revision ID: 025_event_duplicate_blocking
+Revises: 024_event_search_indexes
+Create Date: 2025-02-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '025_event_duplicate_blocking'
+down_revision = '024_event_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add dbo.EventBlockKey.
+
+    Keys are computed in Python (name normalization + hashing); populate
+    them and flag existing duplicates with
+    modules.events.dedup_service.backfill_duplicates() after upgrading.
+    """
+    op.create_table('EventBlockKey',
+        sa.Column('BlockKey', sa.BigInteger(), nullable=False),
+        sa.Column('EventID', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['EventID'], ['dbo.Event.EventID'], name='FK_EventBlockKey_Event', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('BlockKey', 'EventID', name='PK_EventBlockKey'),
+        schema='dbo'
+    )
+    op.create_index('IX_EventBlockKey_Event', 'EventBlockKey', ['EventID'], schema='dbo')
+
+
+def downgrade():
+    """Drop dbo.EventBlockKey"""
+    op.drop_index('IX_EventBlockKey_Event', 'EventBlockKey', schema='dbo')
+    op.drop_table('EventBlockKey', schema='dbo')
@@ -0,0 +1,39 @@
+"""Form Effective Access Materialization
+
+Revision ID: 026_form_effective_access
+Revises: 025_event_duplicate_blocking
+Create Date: 2025-02-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '026_form_effective_access'
+down_revision = '025_event_duplicate_blocking'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add dbo.FormEffectiveAccess.
+
+    Populate it from existing grants with
+    modules.forms.access_service.rebuild_form_access() after upgrading.
+    """
+    op.create_table('FormEffectiveAccess',
+        sa.Column('UserID', sa.BigInteger(), nullable=False),
+        sa.Column('FormID', sa.BigInteger(), nullable=False),
+        sa.Column('Permission', sa.Integer(), nullable=False),
+        sa.Column('ExpiryDate', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['UserID'], ['dbo.User.UserID'], name='FK_FormEffectiveAccess_User'),
+        sa.ForeignKeyConstraint(['FormID'], ['dbo.Form.FormID'], name='FK_FormEffectiveAccess_Form', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('UserID', 'FormID', 'Permission', name='PK_FormEffectiveAccess'),
+        schema='dbo'
+    )
+
+
+def downgrade():
+    """Drop dbo.FormEffectiveAccess"""
+    op.drop_table('FormEffectiveAccess', schema='dbo')
@@ -0,0 +1,55 @@
+"""API Request Rollup
+
+Revision ID: 027_api_request_rollup
+Revises: 026_form_effective_access
+Create Date: 2025-02-24 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '027_api_request_rollup'
+down_revision = '026_form_effective_access'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add log.ApiRequestRollup (per minute/hour, route template and status class).
+
+    The request log writer maintains it from deploy time on; history before
+    the upgrade stays in log.ApiRequest only.
+    """
+    op.create_table('ApiRequestRollup',
+        sa.Column('BucketSeconds', sa.Integer(), nullable=False),
+        sa.Column('BucketStart', sa.DateTime(), nullable=False),
+        sa.Column('Method', sa.String(length=10), nullable=False),
+        sa.Column('PathTemplate', sa.String(length=200), nullable=False),
+        sa.Column('StatusClass', sa.SmallInteger(), nullable=False),
+        sa.Column('RequestCount', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalDurationMs', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('MinDurationMs', sa.Integer(), nullable=False),
+        sa.Column('MaxDurationMs', sa.Integer(), nullable=False),
+        sa.Column('LatencyLe10', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe25', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe50', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe100', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe250', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe500', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe1000', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe2500', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe5000', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyLe10000', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('LatencyOver10000', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.PrimaryKeyConstraint(
+            'BucketSeconds', 'BucketStart', 'Method', 'PathTemplate', 'StatusClass', name='PK_ApiRequestRollup'
+        ),
+        schema='log'
+    )
+
+
+def downgrade():
+    """Drop log.ApiRequestRollup"""
+    op.drop_table('ApiRequestRollup', schema='log')
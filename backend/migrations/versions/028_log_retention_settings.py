@@ -0,0 +1,106 @@
+"""Log Retention Settings
+
+Revision ID: 028_log_retention_settings
+Revises: 027_api_request_rollup
+Create Date: 2025-02-26 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '028_log_retention_settings'
+down_revision = '027_api_request_rollup'
+branch_labels = None
+depends_on = None
+
+
+# (table, default retention days, sort order)
+RETENTION_SETTINGS = [
+    ('ApiRequest', 30, 40),
+    ('ApplicationError', 90, 41),
+    ('AuthEvent', 365, 42),
+    ('EmailDelivery', 180, 43),
+    ('UserAction', 365, 44),
+    ('IntegrationEvent', 90, 45),
+    ('PerformanceMetric', 90, 46),
+]
+
+
+def upgrade():
+    """
+    Add per-table log retention settings to config.AppSetting.
+
+    Read by the log retention worker (common.log_retention); 0 keeps a
+    table forever.
+    """
+    for table_name, days, sort_order in RETENTION_SETTINGS:
+        op.execute(f"""
+            INSERT INTO [config].[AppSetting] (
+                SettingKey,
+                SettingValue,
+                Description,
+                DefaultValue,
+                SettingCategoryID,
+                SettingTypeID,
+                IsEditable,
+                ValidationRegex,
+                MinValue,
+                MaxValue,
+                IsActive,
+                SortOrder
+            )
+            SELECT
+                'logging.retention_days.{table_name}',
+                '{days}',
+                'Days log.{table_name} rows are kept before being archived and deleted (0 = keep forever)',
+                '{days}',
+                (SELECT SettingCategoryID FROM [ref].[SettingCategory] WHERE CategoryCode = 'logging'),
+                (SELECT SettingTypeID FROM [ref].[SettingType] WHERE TypeCode = 'integer'),
+                1,
+                '^[0-9]+$',
+                0,
+                3650,
+                1,
+                {sort_order}
+            WHERE NOT EXISTS (SELECT 1 FROM [config].[AppSetting] WHERE SettingKey = 'logging.retention_days.{table_name}');
+        """)
+
+    op.execute("""
+        INSERT INTO [config].[AppSetting] (
+            SettingKey,
+            SettingValue,
+            Description,
+            DefaultValue,
+            SettingCategoryID,
+            SettingTypeID,
+            IsEditable,
+            ValidationRegex,
+            MinValue,
+            MaxValue,
+            IsActive,
+            SortOrder
+        )
+        SELECT
+            'logging.archive_expired',
+            'true',
+            'Archive expired log rows to compressed NDJSON files before deleting them',
+            'true',
+            (SELECT SettingCategoryID FROM [ref].[SettingCategory] WHERE CategoryCode = 'logging'),
+            (SELECT SettingTypeID FROM [ref].[SettingType] WHERE TypeCode = 'boolean'),
+            1,
+            '^(true|false)$',
+            NULL,
+            NULL,
+            1,
+            47
+        WHERE NOT EXISTS (SELECT 1 FROM [config].[AppSetting] WHERE SettingKey = 'logging.archive_expired');
+    """)
+
+
+def downgrade():
+    """Remove log retention settings"""
+    keys = ", ".join(f"'logging.retention_days.{table_name}'" for table_name, _, _ in RETENTION_SETTINGS)
+    op.execute(f"""
+        DELETE FROM [config].[AppSetting]
+        WHERE SettingKey IN ({keys}, 'logging.archive_expired');
+    """)
@@ -0,0 +1,47 @@
+"""Compressed API Payloads
+
+Revision ID: 029_compressed_api_payloads
+Revises: 028_log_retention_settings
+Create Date: 2025-02-28 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = '029_compressed_api_payloads'
+down_revision = '028_log_retention_settings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add VARBINARY(MAX) payload columns to log.ApiRequest and
+    log.PayloadDictionary for the shared compression dictionaries.
+
+    Existing rows keep their NVARCHAR payloads; readers decode both.
+    """
+    op.add_column('ApiRequest', sa.Column('RequestPayloadCompressed', mssql.VARBINARY(length='max'), nullable=True), schema='log')
+    op.add_column('ApiRequest', sa.Column('ResponsePayloadCompressed', mssql.VARBINARY(length='max'), nullable=True), schema='log')
+    op.add_column('ApiRequest', sa.Column('HeadersCompressed', mssql.VARBINARY(length='max'), nullable=True), schema='log')
+
+    op.create_table('PayloadDictionary',
+        sa.Column('PayloadDictionaryID', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('Codec', sa.SmallInteger(), nullable=False),
+        sa.Column('Content', mssql.VARBINARY(length='max'), nullable=False),
+        sa.Column('SampleCount', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('IsActive', sa.Boolean(), nullable=False, server_default=sa.text('1')),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.PrimaryKeyConstraint('PayloadDictionaryID', name='PK_PayloadDictionary'),
+        schema='log'
+    )
+
+
+def downgrade():
+    """Drop log.PayloadDictionary and the compressed payload columns"""
+    op.drop_table('PayloadDictionary', schema='log')
+    op.drop_column('ApiRequest', 'HeadersCompressed', schema='log')
+    op.drop_column('ApiRequest', 'ResponsePayloadCompressed', schema='log')
+    op.drop_column('ApiRequest', 'RequestPayloadCompressed', schema='log')
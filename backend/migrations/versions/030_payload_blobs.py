@@ -0,0 +1,52 @@
+"""Payload Blobs
+
+Revision ID: 030_payload_blobs
+Revises: 029_compressed_api_payloads
+Create Date: 2025-03-03 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = '030_payload_blobs'
+down_revision = '029_compressed_api_payloads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add log.PayloadBlob (content-addressed payloads/headers) and the blob
+    references on log.ApiRequest.
+
+    No foreign keys: requests and blobs are expired independently by log
+    retention (blobs by LastSeenDate after the requests are gone).
+    """
+    op.create_table('PayloadBlob',
+        sa.Column('PayloadBlobID', sa.BigInteger(), sa.Identity(start=1, increment=1), nullable=False),
+        sa.Column('ContentHash', sa.BINARY(16), nullable=False),
+        sa.Column('Content', mssql.VARBINARY(length='max'), nullable=False),
+        sa.Column('ContentLength', sa.Integer(), nullable=False),
+        sa.Column('CreatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.Column('LastSeenDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.PrimaryKeyConstraint('PayloadBlobID', name='PK_PayloadBlob'),
+        schema='log'
+    )
+    op.create_index('UX_PayloadBlob_ContentHash', 'PayloadBlob', ['ContentHash'], unique=True, schema='log')
+    op.create_index('IX_PayloadBlob_LastSeenDate', 'PayloadBlob', ['LastSeenDate'], schema='log')
+
+    op.add_column('ApiRequest', sa.Column('RequestPayloadBlobID', sa.BigInteger(), nullable=True), schema='log')
+    op.add_column('ApiRequest', sa.Column('ResponsePayloadBlobID', sa.BigInteger(), nullable=True), schema='log')
+    op.add_column('ApiRequest', sa.Column('HeadersBlobID', sa.BigInteger(), nullable=True), schema='log')
+
+
+def downgrade():
+    """Drop the blob references and log.PayloadBlob"""
+    op.drop_column('ApiRequest', 'HeadersBlobID', schema='log')
+    op.drop_column('ApiRequest', 'ResponsePayloadBlobID', schema='log')
+    op.drop_column('ApiRequest', 'RequestPayloadBlobID', schema='log')
+    op.drop_index('IX_PayloadBlob_LastSeenDate', table_name='PayloadBlob', schema='log')
+    op.drop_index('UX_PayloadBlob_ContentHash', table_name='PayloadBlob', schema='log')
+    op.drop_table('PayloadBlob', schema='log')
@@ -0,0 +1,89 @@
+"""Payload Capture Sampling Settings
+
+Revision ID: 031_payload_capture_sampling
+Revises: 030_payload_blobs
+Create Date: 2025-03-05 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '031_payload_capture_sampling'
+down_revision = '030_payload_blobs'
+branch_labels = None
+depends_on = None
+
+
+# (key, value, description, type, validation regex, min, max, sort order)
+SAMPLING_SETTINGS = [
+    (
+        'logging.payload_sample_rate', '0.1',
+        'Fraction of successful, fast requests whose payloads are captured (errors and slow requests always are)',
+        'decimal', '^(0(\\.[0-9]+)?|1(\\.0+)?)$', 0, 1, 31,
+    ),
+    (
+        'logging.payload_sample_rates', '{}',
+        'Per route template sample rates, JSON object (e.g. {"/api/forms/{form_id}": 0.5})',
+        'json', '^\\{.*\\}$', None, None, 32,
+    ),
+    (
+        'logging.slow_request_ms', '1000',
+        'Requests at least this slow (ms) always have their payloads captured',
+        'integer', '^[0-9]+$', 0, 600000, 33,
+    ),
+    (
+        'logging.capture_overrides', '[]',
+        'Temporary full capture for users/companies, JSON array of {"user_id"|"company_id", "expires"}',
+        'json', '^\\[.*\\]$', None, None, 34,
+    ),
+]
+
+
+def upgrade():
+    """
+    Add payload capture sampling settings to config.AppSetting.
+
+    Read through the cached policy snapshot in common.capture_sampling.
+    """
+    for key, value, description, type_code, regex, min_value, max_value, sort_order in SAMPLING_SETTINGS:
+        min_sql = 'NULL' if min_value is None else min_value
+        max_sql = 'NULL' if max_value is None else max_value
+        op.execute(f"""
+            INSERT INTO [config].[AppSetting] (
+                SettingKey,
+                SettingValue,
+                Description,
+                DefaultValue,
+                SettingCategoryID,
+                SettingTypeID,
+                IsEditable,
+                ValidationRegex,
+                MinValue,
+                MaxValue,
+                IsActive,
+                SortOrder
+            )
+            SELECT
+                '{key}',
+                '{value}',
+                '{description}',
+                '{value}',
+                (SELECT SettingCategoryID FROM [ref].[SettingCategory] WHERE CategoryCode = 'logging'),
+                (SELECT SettingTypeID FROM [ref].[SettingType] WHERE TypeCode = '{type_code}'),
+                1,
+                '{regex}',
+                {min_sql},
+                {max_sql},
+                1,
+                {sort_order}
+            WHERE NOT EXISTS (SELECT 1 FROM [config].[AppSetting] WHERE SettingKey = '{key}');
+        """)
+
+
+def downgrade():
+    """Remove payload capture sampling settings"""
+    keys = ", ".join(f"'{key}'" for key, *_ in SAMPLING_SETTINGS)
+    op.execute(f"""
+        DELETE FROM [config].[AppSetting]
+        WHERE SettingKey IN ({keys});
+    """)
@@ -0,0 +1,29 @@
+"""Log RequestID Indexes
+
+Revision ID: 032_log_request_id_indexes
+Revises: 031_payload_capture_sampling
+Create Date: 2025-03-06 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '032_log_request_id_indexes'
+down_revision = '031_payload_capture_sampling'
+branch_labels = None
+depends_on = None
+
+# Tables correlated by common.log_diagnostics (RequestID seek, CreatedDate range)
+REQUEST_ID_TABLES = ['ApiRequest', 'ApplicationError', 'AuthEvent', 'UserAction', 'IntegrationEvent']
+
+
+def upgrade():
+    """Index RequestID (with CreatedDate for the time range) on the log tables"""
+    for table in REQUEST_ID_TABLES:
+        op.create_index(f'IX_{table}_RequestID_CreatedDate', table, ['RequestID', 'CreatedDate'], schema='log')
+
+
+def downgrade():
+    """Drop the RequestID indexes"""
+    for table in REQUEST_ID_TABLES:
+        op.drop_index(f'IX_{table}_RequestID_CreatedDate', table, schema='log')
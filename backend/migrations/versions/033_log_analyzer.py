@@ -0,0 +1,68 @@
+"""Log Analyzer Summaries
+
+Revision ID: 033_log_analyzer
+Revises: 032_log_request_id_indexes
+Create Date: 2025-03-07 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '033_log_analyzer'
+down_revision = '032_log_request_id_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add log.EndpointSummary, log.ErrorPatternSummary and log.LogAnalyzerWatermark.
+
+    Filled by the log analyzer (common.log_analyzer) from the last
+    LOG_ANALYZER_BACKFILL_HOURS of log rows on its first run.
+    """
+    op.create_table('EndpointSummary',
+        sa.Column('BucketStart', sa.DateTime(), nullable=False),
+        sa.Column('Method', sa.String(length=10), nullable=False),
+        sa.Column('PathTemplate', sa.String(length=200), nullable=False),
+        sa.Column('RequestCount', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('SlowCount', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('ErrorCount', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('TotalDurationMs', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('MaxDurationMs', sa.Integer(), nullable=False),
+        sa.Column('SlowestRequestID', sa.String(length=100), nullable=True),
+        sa.Column('SlowestAt', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('BucketStart', 'Method', 'PathTemplate', name='PK_EndpointSummary'),
+        schema='log'
+    )
+
+    op.create_table('ErrorPatternSummary',
+        sa.Column('BucketStart', sa.DateTime(), nullable=False),
+        sa.Column('Fingerprint', sa.String(length=32), nullable=False),
+        sa.Column('ErrorType', sa.String(length=100), nullable=False),
+        sa.Column('PathTemplate', sa.String(length=200), nullable=True),
+        sa.Column('Location', sa.String(length=200), nullable=True),
+        sa.Column('MessageTemplate', sa.String(length=500), nullable=False),
+        sa.Column('OccurrenceCount', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('FirstSeen', sa.DateTime(), nullable=False),
+        sa.Column('LastSeen', sa.DateTime(), nullable=False),
+        sa.Column('LastRequestID', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('BucketStart', 'Fingerprint', name='PK_ErrorPatternSummary'),
+        schema='log'
+    )
+
+    op.create_table('LogAnalyzerWatermark',
+        sa.Column('SourceTable', sa.String(length=50), nullable=False),
+        sa.Column('LastID', sa.BigInteger(), nullable=False),
+        sa.Column('UpdatedDate', sa.DateTime(), nullable=False, server_default=sa.text('GETUTCDATE()')),
+        sa.PrimaryKeyConstraint('SourceTable', name='PK_LogAnalyzerWatermark'),
+        schema='log'
+    )
+
+
+def downgrade():
+    """Drop the log analyzer tables"""
+    op.drop_table('LogAnalyzerWatermark', schema='log')
+    op.drop_table('ErrorPatternSummary', schema='log')
+    op.drop_table('EndpointSummary', schema='log')
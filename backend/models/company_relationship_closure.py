@@ -0,0 +1,47 @@
+"""
+CompanyRelationshipClosure Model (dbo.CompanyRelationshipClosure)
+Materialized transitive closure of active company relationships
+"""
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class CompanyRelationshipClosure(Base):
+    """
+    Transitive closure of the active CompanyRelationship graph.
+
+    One row per (ancestor, descendant) pair reachable through active
+    relationships, so hierarchy questions become a single indexed lookup:
+    - Cycle check: does (child -> parent) exist?
+    - Ancestors of X: WHERE DescendantCompanyID = X
+    - Descendants of X: WHERE AncestorCompanyID = X
+
+    Maintained by modules.companies.relationship_graph on relationship create
+    and status changes. Self-pairs are not stored.
+
+    Attributes:
+        AncestorCompanyID: FK to Company (parent side of the path)
+        DescendantCompanyID: FK to Company (child side of the path)
+        Depth: Shortest path length in relationships (1 = direct child)
+        CreatedDate: When the path was materialized
+    """
+
+    __tablename__ = "CompanyRelationshipClosure"
+    __table_args__ = (
+        Index('IX_CompanyRelationshipClosure_Descendant', 'DescendantCompanyID', 'Depth'),
+        {"schema": "dbo"}
+    )
+
+    # Composite primary key (clustered on ancestor for descendant listings)
+    AncestorCompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), primary_key=True)
+    DescendantCompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), primary_key=True)
+    Depth = Column(Integer, nullable=False)
+
+    # Audit
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return (
+            f"<CompanyRelationshipClosure(Ancestor={self.AncestorCompanyID}, "
+            f"Descendant={self.DescendantCompanyID}, Depth={self.Depth})>"
+        )
@@ -0,0 +1,133 @@
+"""
+Event Model (dbo.Event)
+Events that companies collect leads at (created by migration 015)
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey, Index, func, text
+from common.database import Base
+
+
+class Event(Base):
+    """
+    Event model - Epic 2 events domain.
+
+    EventTypeID and RecurrencePatternID reference ref.EventType and
+    ref.RecurrencePattern; those foreign keys are enforced by migration 015
+    (no ORM models exist for them yet).
+
+    Attributes:
+        EventID: Primary key
+        Name: Event name
+        CompanyID: FK to owning Company
+        StartDateTime / EndDateTime: Event schedule (UTC)
+        City / State / CountryID / Latitude / Longitude: Location
+        GeoHash: Geohash of Latitude/Longitude (maintained by modules.events.search_service)
+        EventTypeID: FK to ref.EventType
+        EventStatusID: FK to ref.EventStatus
+        Tags: Comma-separated tags (indexed one row per tag in dbo.EventTag)
+        IsPublic: Listed in the public event directory
+        IsDuplicate / DuplicateEventID: Flagged duplicate of an earlier public event
+            (modules.events.dedup_service)
+        FormsCreated / TotalSubmissions: Denormalized counters
+    """
+
+    __tablename__ = "Event"
+    __table_args__ = (
+        # Search indexes (migration 024): equality filters, then StartDateTime/EventID for
+        # ordered keyset pages; all filtered to live events
+        Index(
+            'IX_Event_Public_Start', 'IsPublic', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0'), sqlite_where=text('IsDeleted = 0')
+        ),
+        Index(
+            'IX_Event_Company_Start', 'CompanyID', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0'), sqlite_where=text('IsDeleted = 0')
+        ),
+        Index(
+            'IX_Event_Location_Start', 'CountryID', 'State', 'City', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0'), sqlite_where=text('IsDeleted = 0')
+        ),
+        Index(
+            'IX_Event_Type_Start', 'EventTypeID', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0'), sqlite_where=text('IsDeleted = 0')
+        ),
+        Index(
+            'IX_Event_Industry_Start', 'IndustryID', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0'), sqlite_where=text('IsDeleted = 0')
+        ),
+        Index(
+            'IX_Event_GeoHash', 'GeoHash', 'StartDateTime', 'EventID',
+            mssql_where=text('IsDeleted = 0 AND GeoHash IS NOT NULL'),
+            sqlite_where=text('IsDeleted = 0 AND GeoHash IS NOT NULL')
+        ),
+        {"schema": "dbo"}
+    )
+
+    # Primary Key
+    EventID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Core Fields
+    Name = Column(String(200), nullable=False)
+    Description = Column(Text, nullable=True)
+    ShortDescription = Column(String(500), nullable=True)
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False, index=True)
+
+    # Schedule
+    StartDateTime = Column(DateTime, nullable=False)
+    EndDateTime = Column(DateTime, nullable=True)
+    TimezoneIdentifier = Column(String(50), nullable=True)
+
+    # Location
+    VenueName = Column(String(200), nullable=True)
+    VenueAddress = Column(String(500), nullable=True)
+    City = Column(String(100), nullable=True)
+    State = Column(String(100), nullable=True)
+    CountryID = Column(BigInteger, ForeignKey('ref.Country.CountryID'), nullable=True)
+    Latitude = Column(Numeric(10, 8), nullable=True)
+    Longitude = Column(Numeric(11, 8), nullable=True)
+    GeoHash = Column(String(12), nullable=True)
+
+    # Classification
+    EventTypeID = Column(Integer, nullable=False)
+    IndustryID = Column(BigInteger, ForeignKey('ref.Industry.IndustryID'), nullable=True)
+    Tags = Column(Text, nullable=True)
+
+    # Visibility and Status
+    IsPublic = Column(Boolean, nullable=False, default=False)
+    EventStatusID = Column(Integer, ForeignKey('ref.EventStatus.EventStatusID'), nullable=False)
+    IsRecurring = Column(Boolean, nullable=False, default=False)
+    RecurrencePatternID = Column(Integer, nullable=True)
+
+    # Public Review
+    IsPublicReviewRequired = Column(Boolean, nullable=False, default=True)
+    PublicReviewStatus = Column(String(20), nullable=True)
+    PublicReviewDate = Column(DateTime, nullable=True)
+    PublicReviewBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+    PublicReviewComments = Column(Text, nullable=True)
+    PublicVisibilityDate = Column(DateTime, nullable=True)
+
+    # Duplicate Detection
+    DuplicateEventID = Column(BigInteger, ForeignKey('dbo.Event.EventID'), nullable=True)
+    IsDuplicate = Column(Boolean, nullable=False, default=False)
+
+    # Organizer
+    OrganizerCompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=True)
+    OrganizerContactEmail = Column(String(100), nullable=True)
+    OrganizerWebsite = Column(String(200), nullable=True)
+
+    # Metrics
+    ExpectedAttendees = Column(Integer, nullable=True)
+    ActualAttendees = Column(Integer, nullable=True)
+    FormsCreated = Column(Integer, nullable=False, default=0)
+    TotalSubmissions = Column(Integer, nullable=False, default=0)
+
+    # Audit Trail
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    CreatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    UpdatedDate = Column(DateTime, nullable=True)
+    UpdatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+    IsDeleted = Column(Boolean, nullable=False, default=False)
+    DeletedDate = Column(DateTime, nullable=True)
+    DeletedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<Event(EventID={self.EventID}, Name='{self.Name}', CompanyID={self.CompanyID})>"
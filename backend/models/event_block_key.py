@@ -0,0 +1,32 @@
+"""
+EventBlockKey Model (dbo.EventBlockKey)
+Blocking keys for duplicate-event detection
+"""
+from sqlalchemy import Column, BigInteger, ForeignKey, Index
+from common.database import Base
+
+
+class EventBlockKey(Base):
+    """
+    Duplicate-detection block membership for public events.
+
+    Each key is a 64-bit hash of (name token, week, city or geohash cell)
+    (modules.events.dedup_service); a new event is only compared with
+    events sharing one of its keys instead of with every public event.
+
+    Attributes:
+        BlockKey: Hashed blocking key
+        EventID: FK to Event
+    """
+
+    __tablename__ = "EventBlockKey"
+    __table_args__ = (
+        Index('IX_EventBlockKey_Event', 'EventID'),
+        {"schema": "dbo"}
+    )
+
+    BlockKey = Column(BigInteger, primary_key=True, autoincrement=False)
+    EventID = Column(BigInteger, ForeignKey('dbo.Event.EventID', ondelete='CASCADE'), primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<EventBlockKey(BlockKey={self.BlockKey}, EventID={self.EventID})>"
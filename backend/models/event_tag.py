@@ -0,0 +1,32 @@
+"""
+EventTag Model (dbo.EventTag)
+One row per (normalized tag, event): the index behind tag search
+"""
+from sqlalchemy import Column, BigInteger, String, ForeignKey, Index
+from common.database import Base
+
+
+class EventTag(Base):
+    """
+    Tag index for events.
+
+    Derived from Event.Tags (comma-separated) whenever an event is written
+    (modules.events.search_service), so tag filters are index seeks on
+    (Tag, EventID) instead of LIKE scans over Event.Tags.
+
+    Attributes:
+        Tag: Normalized tag (trimmed, lower case, single-spaced)
+        EventID: FK to Event
+    """
+
+    __tablename__ = "EventTag"
+    __table_args__ = (
+        Index('IX_EventTag_Event', 'EventID'),
+        {"schema": "dbo"}
+    )
+
+    Tag = Column(String(50), primary_key=True)
+    EventID = Column(BigInteger, ForeignKey('dbo.Event.EventID', ondelete='CASCADE'), primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<EventTag(Tag='{self.Tag}', EventID={self.EventID})>"
@@ -0,0 +1,66 @@
+"""
+Form Model (dbo.Form)
+Lead capture form header (created by migration 016)
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey, func
+from common.database import Base
+
+
+class Form(Base):
+    """
+    Form header model - Epic 2 forms domain.
+
+    FormStatusID and FormApprovalStatusID reference ref.FormStatus and
+    ref.FormApprovalStatus; those foreign keys are enforced by migration 016.
+
+    Attributes:
+        FormID: Primary key
+        FormName: Form name
+        CompanyID: FK to owning Company
+        EventID: FK to Event the form collects leads for (optional)
+        TotalSubmissions: All submissions received
+        DemoLeadsCollected: Submissions made in demo/preview mode
+        ProductionLeadsCollected: Submissions made against the live form
+        LastSubmissionDate: Most recent submission
+    """
+
+    __tablename__ = "Form"
+    __table_args__ = {"schema": "dbo"}
+
+    # Primary Key
+    FormID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Core Fields
+    FormName = Column(String(200), nullable=False)
+    FormDescription = Column(Text, nullable=True)
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False, index=True)
+    EventID = Column(BigInteger, ForeignKey('dbo.Event.EventID'), nullable=True, index=True)
+
+    # Status
+    FormStatusID = Column(Integer, nullable=False)
+    FormApprovalStatusID = Column(Integer, nullable=False)
+    IsPublic = Column(Boolean, nullable=False, default=False)
+    DeploymentCost = Column(Numeric(10, 2), nullable=True)
+
+    # Submission Counters
+    TotalSubmissions = Column(Integer, nullable=False, default=0)
+    DemoLeadsCollected = Column(Integer, nullable=False, default=0)
+    ProductionLeadsCollected = Column(Integer, nullable=False, default=0)
+    LastSubmissionDate = Column(DateTime, nullable=True)
+    LastActivityDate = Column(DateTime, nullable=True)
+
+    # Presentation
+    FormThumbnailURL = Column(String(500), nullable=True)
+    FormPreviewURL = Column(String(500), nullable=True)
+
+    # Audit Trail
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    CreatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    UpdatedDate = Column(DateTime, nullable=True)
+    UpdatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+    IsDeleted = Column(Boolean, nullable=False, default=False)
+    DeletedDate = Column(DateTime, nullable=True)
+    DeletedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<Form(FormID={self.FormID}, FormName='{self.FormName}', CompanyID={self.CompanyID})>"
@@ -0,0 +1,69 @@
+"""
+FormAccessControl Model (dbo.FormAccessControl)
+Form access grants to users of the owning or a related company (created by migration 016)
+"""
+from sqlalchemy import Column, BigInteger, Integer, Boolean, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class FormAccessControl(Base):
+    """
+    One access grant on a form.
+
+    A grant applies while it is not deleted or expired, the grantee is an
+    active member of CompanyID, and CompanyID either owns the form or is
+    linked to the owner by an active CompanyRelationship of type
+    CompanyRelationshipTypeID. Effective grants are materialized per user
+    in dbo.FormEffectiveAccess (modules.forms.access_service).
+
+    FormAccessControlAccessTypeID and CompanyRelationshipTypeID reference
+    ref.FormAccessControlAccessType and ref.CompanyRelationshipType; those
+    foreign keys are enforced by migration 016.
+
+    Attributes:
+        FormAccessControlID: Primary key
+        FormID: FK to Form
+        UserID: FK to the grantee User
+        CompanyID: FK to the Company the grantee acts for
+        FormAccessControlAccessTypeID: Access level (VIEW, EDIT, MANAGE, SUBMIT, ANALYZE)
+        CompanyRelationshipTypeID: Relationship type linking CompanyID to the form's company
+        GrantedBy: FK to User who granted access
+        GrantedDate: Timestamp when access was granted
+        ExpiryDate: Timestamp when the grant lapses (NULL = never)
+    """
+
+    __tablename__ = "FormAccessControl"
+    __table_args__ = (
+        Index('IX_FormAccessControl_Form', 'FormID', 'IsDeleted'),
+        Index('IX_FormAccessControl_User', 'UserID', 'IsDeleted'),
+        Index('IX_FormAccessControl_Company', 'CompanyID', 'IsDeleted'),
+        Index('IX_FormAccessControl_AccessType', 'FormAccessControlAccessTypeID', 'IsDeleted'),
+        Index('IX_FormAccessControl_Expiry', 'ExpiryDate', 'IsDeleted'),
+        {"schema": "dbo"}
+    )
+
+    # Primary Key
+    FormAccessControlID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Grant
+    FormID = Column(BigInteger, ForeignKey('dbo.Form.FormID'), nullable=False)
+    UserID = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False)
+    FormAccessControlAccessTypeID = Column(Integer, nullable=False)
+    CompanyRelationshipTypeID = Column(Integer, nullable=False)
+    GrantedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    GrantedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    ExpiryDate = Column(DateTime, nullable=True)
+
+    # Audit Trail
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    CreatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    UpdatedDate = Column(DateTime, nullable=True)
+    UpdatedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+    IsDeleted = Column(Boolean, nullable=False, default=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<FormAccessControl(FormAccessControlID={self.FormAccessControlID}, FormID={self.FormID}, "
+            f"UserID={self.UserID}, AccessTypeID={self.FormAccessControlAccessTypeID})>"
+        )
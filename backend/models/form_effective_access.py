@@ -0,0 +1,35 @@
+"""
+FormEffectiveAccess Model (dbo.FormEffectiveAccess)
+Materialized effective form permissions per user
+"""
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from common.database import Base
+
+
+class FormEffectiveAccess(Base):
+    """
+    One permission a user currently holds on a form through FormAccessControl.
+
+    Rows are derived data: modules.forms.access_service rebuilds a user's
+    rows in the same transaction as any change to their grants, their
+    memberships, the relationships between the companies involved or the
+    granted forms. Owning-company members are not materialized (their access
+    follows from the membership snapshot).
+
+    Attributes:
+        UserID: FK to User
+        FormID: FK to Form
+        Permission: Permission bit (1 << access type: VIEW, EDIT, MANAGE, SUBMIT, ANALYZE)
+        ExpiryDate: Latest expiry among the grants conferring it (NULL = never)
+    """
+
+    __tablename__ = "FormEffectiveAccess"
+    __table_args__ = {"schema": "dbo"}
+
+    UserID = Column(BigInteger, ForeignKey('dbo.User.UserID'), primary_key=True)
+    FormID = Column(BigInteger, ForeignKey('dbo.Form.FormID', ondelete='CASCADE'), primary_key=True)
+    Permission = Column(Integer, primary_key=True, autoincrement=False)
+    ExpiryDate = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<FormEffectiveAccess(UserID={self.UserID}, FormID={self.FormID}, Permission={self.Permission})>"
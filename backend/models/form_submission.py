@@ -0,0 +1,67 @@
+"""
+FormSubmission Model (dbo.FormSubmission)
+Append-only store of lead submissions captured by forms
+"""
+from sqlalchemy import Column, BigInteger, Boolean, DateTime, Text, BINARY, ForeignKey, Index, func, text
+from common.database import Base
+
+
+class FormSubmission(Base):
+    """
+    One captured lead.
+
+    Rows are only ever inserted (in batches), never updated: the Form and
+    Event submission counters are maintained by the KPI outbox fold
+    (modules.dashboard.kpi_service) with one aggregated UPDATE per form per
+    tick, so concurrent tablets never contend on the Form row.
+
+    Attributes:
+        FormSubmissionID: Primary key (ever-increasing, clustered)
+        FormID: FK to Form
+        CompanyID: Owning company (denormalized from Form for tenant scans)
+        EventID: Event the form belongs to (denormalized, optional)
+        IsDemo: Captured in demo/preview mode (not counted as a production lead)
+        SubmissionData: Answers as a JSON object
+        SubmittedDate: When the lead was captured on the device (UTC)
+        ReceivedDate: When the API stored the lead
+        SubmittedBy: FK to User operating the device
+        ClientKey: 16-byte digest of the device's idempotency key, scoped to
+            the company (see modules.forms.sync_service); NULL for online
+            submissions
+    """
+
+    __tablename__ = "FormSubmission"
+    __table_args__ = (
+        Index('IX_FormSubmission_Form', 'FormID', 'FormSubmissionID'),
+        Index('IX_FormSubmission_Company', 'CompanyID', 'FormSubmissionID'),
+        Index('IX_FormSubmission_Event', 'EventID', 'FormSubmissionID', mssql_where=text('EventID IS NOT NULL')),
+        Index(
+            'UX_FormSubmission_ClientKey', 'ClientKey', unique=True,
+            mssql_where=text('ClientKey IS NOT NULL'),
+            sqlite_where=text('ClientKey IS NOT NULL')
+        ),
+        {"schema": "dbo"}
+    )
+
+    # Primary Key
+    FormSubmissionID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Ownership
+    FormID = Column(BigInteger, ForeignKey('dbo.Form.FormID'), nullable=False)
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False)
+    EventID = Column(BigInteger, nullable=True)
+
+    # Lead
+    IsDemo = Column(Boolean, nullable=False, default=False)
+    SubmissionData = Column(Text, nullable=False)
+
+    # Timing
+    SubmittedDate = Column(DateTime, nullable=False)
+    ReceivedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    SubmittedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+
+    # Offline sync deduplication
+    ClientKey = Column(BINARY(16), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<FormSubmission(FormSubmissionID={self.FormSubmissionID}, FormID={self.FormID})>"
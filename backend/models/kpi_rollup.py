@@ -0,0 +1,155 @@
+"""
+KPI Rollup Models (dbo.CompanyKpiRollup, dbo.EventKpiRollup,
+dbo.CompanyDailyKpiRollup, dbo.KpiOutbox)
+Pre-aggregated dashboard metrics maintained by modules.dashboard.kpi_service
+"""
+from sqlalchemy import Column, BigInteger, Integer, Date, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class CompanyKpiRollup(Base):
+    """
+    Running KPI totals per company.
+
+    Dashboard queries for any set of companies sum these rows instead of
+    counting Event/Form/submission rows.
+
+    Attributes:
+        CompanyID: FK to Company (primary key)
+        TotalForms: Forms not deleted
+        TotalEvents: Events not deleted
+        ActiveEvents: Events in an active status (see kpi_service.ACTIVE_EVENT_STATUS_CODES)
+        TotalSubmissions: All submissions (production + demo)
+        ProductionLeads: Submissions against live forms
+        DemoLeads: Submissions made in demo/preview mode
+        UpdatedDate: Last time an outbox batch touched the row
+    """
+
+    __tablename__ = "CompanyKpiRollup"
+    __table_args__ = {"schema": "dbo"}
+
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), primary_key=True, autoincrement=False)
+
+    TotalForms = Column(Integer, nullable=False, default=0)
+    TotalEvents = Column(Integer, nullable=False, default=0)
+    ActiveEvents = Column(Integer, nullable=False, default=0)
+    TotalSubmissions = Column(BigInteger, nullable=False, default=0)
+    ProductionLeads = Column(BigInteger, nullable=False, default=0)
+    DemoLeads = Column(BigInteger, nullable=False, default=0)
+
+    UpdatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return (
+            f"<CompanyKpiRollup(CompanyID={self.CompanyID}, TotalForms={self.TotalForms}, "
+            f"ProductionLeads={self.ProductionLeads}, ActiveEvents={self.ActiveEvents})>"
+        )
+
+
+class EventKpiRollup(Base):
+    """
+    Running KPI totals per event.
+
+    Attributes:
+        EventID: FK to Event (primary key)
+        CompanyID: Owning company (for per-company event listings)
+        TotalForms: Forms attached to the event
+        TotalSubmissions / ProductionLeads / DemoLeads: Submission counts
+        UpdatedDate: Last time an outbox batch touched the row
+    """
+
+    __tablename__ = "EventKpiRollup"
+    __table_args__ = (
+        Index('IX_EventKpiRollup_Company', 'CompanyID'),
+        {"schema": "dbo"}
+    )
+
+    EventID = Column(BigInteger, ForeignKey('dbo.Event.EventID'), primary_key=True, autoincrement=False)
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False)
+
+    TotalForms = Column(Integer, nullable=False, default=0)
+    TotalSubmissions = Column(BigInteger, nullable=False, default=0)
+    ProductionLeads = Column(BigInteger, nullable=False, default=0)
+    DemoLeads = Column(BigInteger, nullable=False, default=0)
+
+    UpdatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<EventKpiRollup(EventID={self.EventID}, ProductionLeads={self.ProductionLeads})>"
+
+
+class CompanyDailyKpiRollup(Base):
+    """
+    KPI activity per company per UTC day (trend charts).
+
+    Attributes:
+        CompanyID: FK to Company
+        MetricDate: UTC date the activity happened on
+        FormsCreated / EventsCreated: Net forms/events created that day
+        TotalSubmissions / ProductionLeads / DemoLeads: Submissions that day
+        UpdatedDate: Last time an outbox batch touched the row
+    """
+
+    __tablename__ = "CompanyDailyKpiRollup"
+    __table_args__ = {"schema": "dbo"}
+
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), primary_key=True, autoincrement=False)
+    MetricDate = Column(Date, primary_key=True)
+
+    FormsCreated = Column(Integer, nullable=False, default=0)
+    EventsCreated = Column(Integer, nullable=False, default=0)
+    TotalSubmissions = Column(BigInteger, nullable=False, default=0)
+    ProductionLeads = Column(BigInteger, nullable=False, default=0)
+    DemoLeads = Column(BigInteger, nullable=False, default=0)
+
+    UpdatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return (
+            f"<CompanyDailyKpiRollup(CompanyID={self.CompanyID}, MetricDate={self.MetricDate}, "
+            f"ProductionLeads={self.ProductionLeads})>"
+        )
+
+
+class KpiOutbox(Base):
+    """
+    Transactional outbox of KPI deltas.
+
+    Writers insert a delta row in the same transaction as the Event/Form/
+    submission change; the KPI worker folds batches of rows into the rollup
+    tables and deletes them. A rolled-back write never produces a delta.
+
+    Attributes:
+        KpiOutboxID: Primary key (processing order)
+        CompanyID: Company the delta applies to
+        EventID: Event the delta applies to (None = company-level only)
+        FormID: Form whose submission counters the delta applies to
+        MetricDate: UTC day for the daily rollup
+        LastOccurredDate: Latest submission time in the delta (Form.LastSubmissionDate)
+        FormsDelta / EventsDelta / ActiveEventsDelta: Count changes
+        SubmissionsDelta / ProductionLeadsDelta / DemoLeadsDelta: Submission count changes
+        CreatedDate: When the delta was written (freshness monitoring)
+    """
+
+    __tablename__ = "KpiOutbox"
+    __table_args__ = {"schema": "dbo"}
+
+    KpiOutboxID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    CompanyID = Column(BigInteger, nullable=False)
+    EventID = Column(BigInteger, nullable=True)
+    FormID = Column(BigInteger, nullable=True)
+    MetricDate = Column(Date, nullable=False)
+    LastOccurredDate = Column(DateTime, nullable=True)
+
+    FormsDelta = Column(Integer, nullable=False, default=0)
+    EventsDelta = Column(Integer, nullable=False, default=0)
+    ActiveEventsDelta = Column(Integer, nullable=False, default=0)
+    SubmissionsDelta = Column(Integer, nullable=False, default=0)
+    ProductionLeadsDelta = Column(Integer, nullable=False, default=0)
+    DemoLeadsDelta = Column(Integer, nullable=False, default=0)
+
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<KpiOutbox(KpiOutboxID={self.KpiOutboxID}, CompanyID={self.CompanyID}, EventID={self.EventID})>"
@@ -0,0 +1,66 @@
+"""
+LeadExportJob Model (dbo.LeadExportJob)
+Background lead exports and the files they produce
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, Boolean, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class LeadExportJob(Base):
+    """
+    One requested lead export.
+
+    The worker streams the leads into FilePath (written to a temporary name
+    and renamed on completion), so a COMPLETED job always has a whole file
+    that clients can download with HTTP Range requests and resume.
+
+    Attributes:
+        LeadExportJobID: Primary key
+        CompanyID: Company whose leads are exported
+        EventID: Restrict to one event (optional)
+        FormID: Restrict to one form (optional)
+        IncludeDemo: Include demo/preview submissions
+        Format: csv | xlsx | parquet
+        Status: PENDING | RUNNING | COMPLETED | FAILED
+        RowCount: Leads written
+        FileSize: Bytes written
+        FilePath: Export file on the export storage volume
+        ErrorMessage: Failure reason
+        RequestedBy: FK to User who requested the export
+        CreatedDate / StartedDate / CompletedDate: Lifecycle timestamps
+        ExpiresDate: When the file is purged
+    """
+
+    __tablename__ = "LeadExportJob"
+    __table_args__ = (
+        Index('IX_LeadExportJob_Company', 'CompanyID', 'LeadExportJobID'),
+        Index('IX_LeadExportJob_Status', 'Status', 'LeadExportJobID'),
+        {"schema": "dbo"}
+    )
+
+    # Primary Key
+    LeadExportJobID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Scope
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False)
+    EventID = Column(BigInteger, nullable=True)
+    FormID = Column(BigInteger, nullable=True)
+    IncludeDemo = Column(Boolean, nullable=False, default=False)
+    Format = Column(String(10), nullable=False)
+
+    # Progress
+    Status = Column(String(20), nullable=False, default="PENDING")
+    RowCount = Column(Integer, nullable=True)
+    FileSize = Column(BigInteger, nullable=True)
+    FilePath = Column(String(500), nullable=True)
+    ErrorMessage = Column(String(1000), nullable=True)
+
+    # Audit
+    RequestedBy = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    StartedDate = Column(DateTime, nullable=True)
+    CompletedDate = Column(DateTime, nullable=True)
+    ExpiresDate = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<LeadExportJob(LeadExportJobID={self.LeadExportJobID}, Status='{self.Status}')>"
@@ -3,14 +3,32 @@ Log Models (log schema)
 Technical logging tables for operational monitoring
 """
 from .api_request import ApiRequest
+from .api_request_rollup import ApiRequestRollup
 from .auth_event import AuthEvent
 from .application_error import ApplicationError
 from .email_delivery import EmailDelivery
+from .endpoint_summary import EndpointSummary
+from .error_pattern_summary import ErrorPatternSummary
+from .integration_event import IntegrationEvent
+from .log_analyzer_watermark import LogAnalyzerWatermark
+from .payload_blob import PayloadBlob
+from .payload_dictionary import PayloadDictionary
+from .performance_metric import PerformanceMetric
+from .user_action import UserAction
 
 __all__ = [
     "ApiRequest",
+    "ApiRequestRollup",
     "AuthEvent",
     "ApplicationError",
     "EmailDelivery",
+    "EndpointSummary",
+    "ErrorPatternSummary",
+    "IntegrationEvent",
+    "LogAnalyzerWatermark",
+    "PayloadBlob",
+    "PayloadDictionary",
+    "PerformanceMetric",
+    "UserAction",
 ]
 
@@ -2,7 +2,7 @@
 ApiRequest Model (log.ApiRequest)
 API request logging for performance monitoring and debugging
 """
-from sqlalchemy import Column, BigInteger, String, Integer, DateTime, func, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, LargeBinary, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from common.database import Base
 
@@ -29,11 +29,20 @@ class ApiRequest(Base):
         RequestPayload: Request body payload (JSON-encoded, Epic 2)
         ResponsePayload: Response body payload (JSON-encoded, Epic 2)
         Headers: Request headers (JSON-encoded, Epic 2)
+        RequestPayloadCompressed: Compact, compressed request body (common.payload_codec frame)
+        ResponsePayloadCompressed: Compact, compressed response body
+        HeadersCompressed: Compact, compressed request headers
+        RequestPayloadBlobID: Request body in log.PayloadBlob (deduplicated)
+        ResponsePayloadBlobID: Response body in log.PayloadBlob
+        HeadersBlobID: Request headers in log.PayloadBlob
         CreatedDate: Timestamp when request was made
     """
     
     __tablename__ = "ApiRequest"
-    __table_args__ = {"schema": "log"}
+    __table_args__ = (
+        Index("IX_ApiRequest_RequestID_CreatedDate", "RequestID", "CreatedDate"),
+        {"schema": "log"},
+    )
     
     # Primary Key
     ApiRequestID = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -60,6 +69,18 @@ class ApiRequest(Base):
     RequestPayload = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
     ResponsePayload = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
     Headers = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
+
+    # Compressed payloads (replace the text columns above for new rows;
+    # read through common.payload_codec.decode_payload_columns)
+    RequestPayloadCompressed = Column(LargeBinary, nullable=True)  # VARBINARY(MAX)
+    ResponsePayloadCompressed = Column(LargeBinary, nullable=True)  # VARBINARY(MAX)
+    HeadersCompressed = Column(LargeBinary, nullable=True)  # VARBINARY(MAX)
+
+    # Deduplicated payloads (log.PayloadBlob; no FK so blobs and requests
+    # expire independently - see common.payload_blobs)
+    RequestPayloadBlobID = Column(BigInteger, nullable=True)
+    ResponsePayloadBlobID = Column(BigInteger, nullable=True)
+    HeadersBlobID = Column(BigInteger, nullable=True)
     
     # Timestamp
     CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate(), index=True)
@@ -68,6 +89,18 @@ class ApiRequest(Base):
     user = relationship("User", back_populates="api_requests")
     company = relationship("Company", back_populates="api_requests")
     
+    def decoded_payloads(self) -> dict:
+        """RequestPayload / ResponsePayload / Headers text, however they are stored"""
+        from sqlalchemy.orm import object_session
+        from common.payload_blobs import BLOB_COLUMNS, expand_payload_rows, session_blob_fetcher
+        from common.payload_codec import PAYLOAD_COLUMNS
+        columns = {column for pair in PAYLOAD_COLUMNS + BLOB_COLUMNS for column in pair}
+        session = object_session(self)
+        return expand_payload_rows(
+            [{column: getattr(self, column) for column in sorted(columns)}],
+            session_blob_fetcher(session) if session is not None else None
+        )[0]
+    
     def __repr__(self) -> str:
         return f"<ApiRequest(ApiRequestID={self.ApiRequestID}, Method='{self.Method}', Path='{self.Path}', StatusCode={self.StatusCode})>"
 
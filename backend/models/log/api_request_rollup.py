@@ -0,0 +1,70 @@
+"""
+ApiRequestRollup Model (log.ApiRequestRollup)
+Time-bucketed API request aggregates for performance dashboards
+"""
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, DateTime
+from common.database import Base
+
+# Upper bounds (ms, inclusive) of the latency bucket columns; the last column
+# counts everything slower
+LATENCY_BUCKET_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+LATENCY_BUCKET_COLUMNS = tuple(f"LatencyLe{bound}" for bound in LATENCY_BUCKET_BOUNDS_MS) + ("LatencyOver10000",)
+
+
+class ApiRequestRollup(Base):
+    """
+    Request counts and latency distribution per time bucket, method, route
+    template and status class.
+
+    Maintained by the request log writer (common.request_rollup) with
+    additive upserts, once per minute bucket and once per hour bucket, so
+    dashboards read a few hundred rows instead of scanning log.ApiRequest.
+    Latency buckets are non-cumulative counts ((previous bound, bound]).
+
+    Attributes:
+        BucketSeconds: Bucket width (60 or 3600)
+        BucketStart: Bucket start (UTC)
+        Method: HTTP method
+        PathTemplate: Route template ('/api/forms/{form_id}') or 'unmatched'
+        StatusClass: Status code // 100 (2 = 2xx ... 5 = 5xx)
+        RequestCount: Requests in the bucket
+        TotalDurationMs: Sum of request durations
+        MinDurationMs: Fastest request
+        MaxDurationMs: Slowest request
+        LatencyLe10..LatencyOver10000: Requests per latency bucket
+    """
+
+    __tablename__ = "ApiRequestRollup"
+    __table_args__ = {"schema": "log"}
+
+    # Primary Key (time first: dashboards read a time range)
+    BucketSeconds = Column(Integer, primary_key=True, autoincrement=False)
+    BucketStart = Column(DateTime, primary_key=True)
+    Method = Column(String(10), primary_key=True)
+    PathTemplate = Column(String(200), primary_key=True)
+    StatusClass = Column(SmallInteger, primary_key=True, autoincrement=False)
+
+    # Aggregates
+    RequestCount = Column(BigInteger, nullable=False, default=0)
+    TotalDurationMs = Column(BigInteger, nullable=False, default=0)
+    MinDurationMs = Column(Integer, nullable=False)
+    MaxDurationMs = Column(Integer, nullable=False)
+
+    # Latency distribution
+    LatencyLe10 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe25 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe50 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe100 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe250 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe500 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe1000 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe2500 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe5000 = Column(BigInteger, nullable=False, default=0)
+    LatencyLe10000 = Column(BigInteger, nullable=False, default=0)
+    LatencyOver10000 = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ApiRequestRollup(BucketStart={self.BucketStart}, Method='{self.Method}', "
+            f"PathTemplate='{self.PathTemplate}', StatusClass={self.StatusClass}, RequestCount={self.RequestCount})>"
+        )
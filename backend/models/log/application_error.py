@@ -2,7 +2,7 @@
 ApplicationError Model (log.ApplicationError)
 Application error logging for debugging and monitoring
 """
-from sqlalchemy import Column, BigInteger, String, DateTime, func, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from common.database import Base
 
@@ -32,7 +32,10 @@ class ApplicationError(Base):
     """
     
     __tablename__ = "ApplicationError"
-    __table_args__ = {"schema": "log"}
+    __table_args__ = (
+        Index("IX_ApplicationError_RequestID_CreatedDate", "RequestID", "CreatedDate"),
+        {"schema": "log"},
+    )
     
     # Primary Key
     ApplicationErrorID = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -2,7 +2,7 @@
 AuthEvent Model (log.AuthEvent)
 Authentication and authorization event logging
 """
-from sqlalchemy import Column, BigInteger, String, DateTime, func, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from common.database import Base
 
@@ -27,7 +27,10 @@ class AuthEvent(Base):
     """
     
     __tablename__ = "AuthEvent"
-    __table_args__ = {"schema": "log"}
+    __table_args__ = (
+        Index("IX_AuthEvent_RequestID_CreatedDate", "RequestID", "CreatedDate"),
+        {"schema": "log"},
+    )
     
     # Primary Key
     AuthEventID = Column(BigInteger, primary_key=True, autoincrement=True)
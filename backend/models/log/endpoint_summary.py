@@ -0,0 +1,55 @@
+"""
+EndpointSummary Model (log.EndpointSummary)
+Hourly per-route latency summary derived from log.ApiRequest
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime
+from common.database import Base
+
+
+class EndpointSummary(Base):
+    """
+    Request counts, slow requests and the slowest request per hour, method
+    and route template.
+
+    Maintained by the log analyzer (common.log_analyzer), which folds new
+    log.ApiRequest rows in past a watermark, so slow-endpoint reports never
+    scan the raw log. SlowestRequestID is the drill-down into
+    common.log_diagnostics.
+
+    Attributes:
+        BucketStart: Hour (UTC)
+        Method: HTTP method
+        PathTemplate: Route template ('/api/companies/{company_id}/invitations')
+        RequestCount: Requests in the hour
+        SlowCount: Requests at least logging.slow_request_ms slow
+        ErrorCount: 5xx responses
+        TotalDurationMs: Sum of request durations
+        MaxDurationMs: Slowest request
+        SlowestRequestID: RequestID of the slowest request
+        SlowestAt: CreatedDate of the slowest request
+    """
+
+    __tablename__ = "EndpointSummary"
+    __table_args__ = {"schema": "log"}
+
+    # Primary Key (time first: reports read a time range)
+    BucketStart = Column(DateTime, primary_key=True)
+    Method = Column(String(10), primary_key=True)
+    PathTemplate = Column(String(200), primary_key=True)
+
+    # Aggregates
+    RequestCount = Column(BigInteger, nullable=False, default=0)
+    SlowCount = Column(BigInteger, nullable=False, default=0)
+    ErrorCount = Column(BigInteger, nullable=False, default=0)
+    TotalDurationMs = Column(BigInteger, nullable=False, default=0)
+    MaxDurationMs = Column(Integer, nullable=False)
+
+    # Exemplar
+    SlowestRequestID = Column(String(100), nullable=True)
+    SlowestAt = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<EndpointSummary(BucketStart={self.BucketStart}, Method='{self.Method}', "
+            f"PathTemplate='{self.PathTemplate}', RequestCount={self.RequestCount})>"
+        )
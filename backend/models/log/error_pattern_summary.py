@@ -0,0 +1,55 @@
+"""
+ErrorPatternSummary Model (log.ErrorPatternSummary)
+Hourly error fingerprint counts derived from log.ApplicationError
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime
+from common.database import Base
+
+
+class ErrorPatternSummary(Base):
+    """
+    Occurrences per hour of one error fingerprint.
+
+    A fingerprint is the error type, route template, raising function and
+    message with IDs, numbers and quoted values replaced by placeholders
+    (common.log_analyzer.error_fingerprint), so the same failure on
+    different records counts as one pattern. Maintained by the log analyzer
+    past a watermark on log.ApplicationError.
+
+    Attributes:
+        BucketStart: Hour (UTC)
+        Fingerprint: BLAKE2b-128 digest of the pattern (hex)
+        ErrorType: Exception class
+        PathTemplate: Route template of the failing request (if any)
+        Location: 'module.py:function' of the innermost stack frame (if any)
+        MessageTemplate: Normalized first line of the message
+        OccurrenceCount: Errors in the hour
+        FirstSeen: First occurrence in the hour
+        LastSeen: Last occurrence in the hour
+        LastRequestID: RequestID of the last occurrence
+    """
+
+    __tablename__ = "ErrorPatternSummary"
+    __table_args__ = {"schema": "log"}
+
+    # Primary Key (time first: reports read a time range)
+    BucketStart = Column(DateTime, primary_key=True)
+    Fingerprint = Column(String(32), primary_key=True)
+
+    # Pattern
+    ErrorType = Column(String(100), nullable=False)
+    PathTemplate = Column(String(200), nullable=True)
+    Location = Column(String(200), nullable=True)
+    MessageTemplate = Column(String(500), nullable=False)
+
+    # Aggregates
+    OccurrenceCount = Column(BigInteger, nullable=False, default=0)
+    FirstSeen = Column(DateTime, nullable=False)
+    LastSeen = Column(DateTime, nullable=False)
+    LastRequestID = Column(String(100), nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ErrorPatternSummary(BucketStart={self.BucketStart}, Fingerprint='{self.Fingerprint}', "
+            f"ErrorType='{self.ErrorType}', OccurrenceCount={self.OccurrenceCount})>"
+        )
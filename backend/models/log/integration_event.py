@@ -0,0 +1,44 @@
+"""
+IntegrationEvent Model (log.IntegrationEvent)
+Cross-domain integration event log (created by migration 017)
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class IntegrationEvent(Base):
+    """
+    Integration event log model.
+
+    Attributes:
+        IntegrationEventID: Primary key
+        EventType: Event name
+        SourceDomain: Emitting domain (e.g. 'forms')
+        TargetDomain: Receiving domain (e.g. 'exports')
+        EntityID: ID of the entity the event is about
+        Details: JSON details (NVARCHAR(MAX))
+        UserID: Foreign key to dbo.User (nullable for system events)
+        RequestID: Unique request ID (correlation ID)
+        CreatedDate: Timestamp when the event occurred
+    """
+
+    __tablename__ = "IntegrationEvent"
+    __table_args__ = (
+        Index("IX_IntegrationEvent_EventType_CreatedDate", "EventType", "CreatedDate"),
+        Index("IX_IntegrationEvent_SourceDomain_CreatedDate", "SourceDomain", "CreatedDate"),
+        Index("IX_IntegrationEvent_RequestID_CreatedDate", "RequestID", "CreatedDate"),
+        {"schema": "log"},
+    )
+
+    IntegrationEventID = Column(BigInteger, primary_key=True, autoincrement=True)
+    EventType = Column(String(100), nullable=False)
+    SourceDomain = Column(String(50), nullable=False)
+    TargetDomain = Column(String(50), nullable=False)
+    EntityID = Column(BigInteger, nullable=True)
+    Details = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
+    UserID = Column(BigInteger, ForeignKey("dbo.User.UserID"), nullable=True)
+    RequestID = Column(String(100), nullable=True)
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<IntegrationEvent(IntegrationEventID={self.IntegrationEventID}, EventType='{self.EventType}')>"
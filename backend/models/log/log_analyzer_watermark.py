@@ -0,0 +1,31 @@
+"""
+LogAnalyzerWatermark Model (log.LogAnalyzerWatermark)
+Last log row folded into the analyzer summaries, per source table
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime, func
+from common.database import Base
+
+
+class LogAnalyzerWatermark(Base):
+    """
+    Highest primary key of a log table already folded into the summaries.
+
+    Advanced in the same transaction as the summary upserts, with a
+    compare-and-set on LastID, so every row is counted exactly once even
+    with several analyzer processes (common.log_analyzer).
+
+    Attributes:
+        SourceTable: 'ApiRequest' or 'ApplicationError'
+        LastID: Last processed primary key
+        UpdatedDate: Last advance
+    """
+
+    __tablename__ = "LogAnalyzerWatermark"
+    __table_args__ = {"schema": "log"}
+
+    SourceTable = Column(String(50), primary_key=True)
+    LastID = Column(BigInteger, nullable=False)
+    UpdatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<LogAnalyzerWatermark(SourceTable='{self.SourceTable}', LastID={self.LastID})>"
@@ -0,0 +1,47 @@
+"""
+PayloadBlob Model (log.PayloadBlob)
+Content-addressed store for captured request/response payloads and headers
+"""
+from sqlalchemy import Column, BigInteger, Integer, DateTime, LargeBinary, BINARY, Index, func
+from common.database import Base
+
+
+class PayloadBlob(Base):
+    """
+    One distinct payload or header set, referenced from log.ApiRequest
+    (RequestPayloadBlobID / ResponsePayloadBlobID / HeadersBlobID).
+
+    Keyed by a 16-byte BLAKE2b digest of the compact text, so identical
+    bodies (reference data responses, the same browser's headers) are
+    stored once. LastSeenDate is refreshed at most once per writer cache
+    period and drives garbage collection after log.ApiRequest retention.
+
+    Attributes:
+        PayloadBlobID: Primary key
+        ContentHash: BLAKE2b-128 digest of the compact text (unique)
+        Content: common.payload_codec frame
+        ContentLength: Compact text length in bytes (UTF-8)
+        CreatedDate: First time the content was seen
+        LastSeenDate: Latest recorded reference (see common.payload_blobs)
+    """
+
+    __tablename__ = "PayloadBlob"
+    __table_args__ = (
+        Index("UX_PayloadBlob_ContentHash", "ContentHash", unique=True),
+        Index("IX_PayloadBlob_LastSeenDate", "LastSeenDate"),
+        {"schema": "log"},
+    )
+
+    # Primary Key
+    PayloadBlobID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    ContentHash = Column(BINARY(16), nullable=False)
+    Content = Column(LargeBinary, nullable=False)  # VARBINARY(MAX)
+    ContentLength = Column(Integer, nullable=False)
+
+    # Timestamps
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    LastSeenDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<PayloadBlob(PayloadBlobID={self.PayloadBlobID}, ContentLength={self.ContentLength})>"
@@ -0,0 +1,41 @@
+"""
+PayloadDictionary Model (log.PayloadDictionary)
+Shared compression dictionaries for captured request/response payloads
+"""
+from sqlalchemy import Column, Integer, SmallInteger, Boolean, DateTime, LargeBinary, func
+from common.database import Base
+
+
+class PayloadDictionary(Base):
+    """
+    Compression dictionary used by common.payload_codec.
+
+    Every compressed payload frame names the dictionary it was written with,
+    so rows are kept after a newer dictionary is trained; only the newest
+    active row is used for new frames.
+
+    Attributes:
+        PayloadDictionaryID: Primary key (stored in each frame header)
+        Codec: 1 = zlib preset dictionary, 2 = zstd dictionary
+        Content: Dictionary bytes
+        SampleCount: Payloads the dictionary was trained on
+        IsActive: Used for new frames
+        CreatedDate: When the dictionary was trained
+    """
+
+    __tablename__ = "PayloadDictionary"
+    __table_args__ = {"schema": "log"}
+
+    # Primary Key (frame headers hold it as uint16)
+    PayloadDictionaryID = Column(Integer, primary_key=True, autoincrement=True)
+
+    Codec = Column(SmallInteger, nullable=False)
+    Content = Column(LargeBinary, nullable=False)  # VARBINARY(MAX)
+    SampleCount = Column(Integer, nullable=False, default=0)
+    IsActive = Column(Boolean, nullable=False, default=True)
+
+    # Timestamp
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<PayloadDictionary(PayloadDictionaryID={self.PayloadDictionaryID}, Codec={self.Codec}, IsActive={self.IsActive})>"
@@ -0,0 +1,53 @@
+"""
+PerformanceMetric Model (log.PerformanceMetric)
+Aggregated performance measurements (created by migration 017)
+"""
+from sqlalchemy import Column, BigInteger, String, Integer, Numeric, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class PerformanceMetric(Base):
+    """
+    Performance metric log model.
+
+    Written by the metrics flush worker (common.metrics): one row per
+    endpoint and statistic per flush interval (e.g. MetricType
+    'http_latency_p99_ms', Endpoint 'GET /api/events/search'), not one row
+    per request.
+
+    Attributes:
+        PerformanceMetricID: Primary key
+        MetricType: Statistic name
+        Endpoint: Route the statistic describes ('METHOD /route/{param}')
+        Value: Statistic value (milliseconds, count or ratio)
+        StatusCode: HTTP status code the statistic is restricted to (if any)
+        UserID: Foreign key to dbo.User (nullable)
+        Details: Supporting data (JSON-encoded)
+        CreatedDate: End of the interval the statistic covers
+    """
+
+    __tablename__ = "PerformanceMetric"
+    __table_args__ = (
+        Index('IX_PerformanceMetric_MetricType_CreatedDate', 'MetricType', 'CreatedDate'),
+        Index('IX_PerformanceMetric_Value_CreatedDate', 'Value', 'CreatedDate'),
+        {"schema": "log"}
+    )
+
+    # Primary Key
+    PerformanceMetricID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Measurement
+    MetricType = Column(String(50), nullable=False)
+    Endpoint = Column(String(500), nullable=True)
+    Value = Column(Numeric(10, 2), nullable=False)
+    StatusCode = Column(Integer, nullable=True)
+
+    # Context
+    UserID = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=True)
+    Details = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
+
+    # Timestamp
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<PerformanceMetric(PerformanceMetricID={self.PerformanceMetricID}, MetricType='{self.MetricType}', Value={self.Value})>"
@@ -0,0 +1,40 @@
+"""
+UserAction Model (log.UserAction)
+User-initiated action audit log (created by migration 017)
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index, func
+from common.database import Base
+
+
+class UserAction(Base):
+    """
+    User action log model.
+
+    Attributes:
+        UserActionID: Primary key
+        UserID: Foreign key to dbo.User
+        Action: Action name (e.g. 'form.publish')
+        Details: JSON details (NVARCHAR(MAX))
+        Path: Request path the action came from
+        RequestID: Unique request ID (correlation ID)
+        CreatedDate: Timestamp when the action occurred
+    """
+
+    __tablename__ = "UserAction"
+    __table_args__ = (
+        Index("IX_UserAction_UserID_CreatedDate", "UserID", "CreatedDate"),
+        Index("IX_UserAction_Action_CreatedDate", "Action", "CreatedDate"),
+        Index("IX_UserAction_RequestID_CreatedDate", "RequestID", "CreatedDate"),
+        {"schema": "log"},
+    )
+
+    UserActionID = Column(BigInteger, primary_key=True, autoincrement=True)
+    UserID = Column(BigInteger, ForeignKey("dbo.User.UserID"), nullable=False)
+    Action = Column(String(100), nullable=False)
+    Details = Column(String(None), nullable=True)  # NVARCHAR(MAX) - JSON
+    Path = Column(String(500), nullable=True)
+    RequestID = Column(String(100), nullable=True)
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<UserAction(UserActionID={self.UserActionID}, UserID={self.UserID}, Action='{self.Action}')>"
@@ -0,0 +1,54 @@
+"""
+EventStatus Reference Model (ref.EventStatus)
+Lifecycle status codes for events (created by migration 015)
+"""
+from sqlalchemy import Column, BigInteger, String, Boolean, Integer, DateTime, func
+from common.database import Base
+
+
+class EventStatus(Base):
+    """
+    Event status reference table.
+
+    Status codes: DRAFT, PENDING_REVIEW, PUBLISHED, COMPLETED, CANCELLED,
+    REJECTED, ARCHIVED
+
+    Attributes:
+        EventStatusID: Primary key
+        StatusCode: Unique status code (e.g., 'PUBLISHED')
+        StatusName: Display name
+        StatusDescription: Full description of the status
+        StatusColor: Hex colour used by the UI badge
+        StatusIcon: Icon name used by the UI badge
+        IsActive: Whether this status is available for use
+        SortOrder: Display order
+    """
+
+    __tablename__ = "EventStatus"
+    __table_args__ = {"schema": "ref"}
+
+    # Primary Key
+    EventStatusID = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Core Fields
+    StatusCode = Column(String(20), nullable=False, unique=True)
+    StatusName = Column(String(50), nullable=False)
+    StatusDescription = Column(String(200), nullable=True)
+    StatusColor = Column(String(7), nullable=True)
+    StatusIcon = Column(String(50), nullable=True)
+
+    # Status and Ordering
+    IsActive = Column(Boolean, nullable=False, default=True)
+    SortOrder = Column(Integer, nullable=False, default=0)
+
+    # Audit Columns
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    CreatedBy = Column(BigInteger, nullable=False, default=1)
+    UpdatedDate = Column(DateTime, nullable=True)
+    UpdatedBy = Column(BigInteger, nullable=True)
+    IsDeleted = Column(Boolean, nullable=False, default=False)
+    DeletedDate = Column(DateTime, nullable=True)
+    DeletedBy = Column(BigInteger, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EventStatus(EventStatusID={self.EventStatusID}, StatusCode='{self.StatusCode}')>"
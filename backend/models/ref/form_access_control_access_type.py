@@ -0,0 +1,52 @@
+"""
+FormAccessControlAccessType Reference Model (ref.FormAccessControlAccessType)
+Access levels grantable on a form (created by migration 016)
+"""
+from sqlalchemy import Column, BigInteger, String, Boolean, Integer, DateTime, func
+from common.database import Base
+
+
+class FormAccessControlAccessType(Base):
+    """
+    Form access type reference table.
+
+    Access type codes: VIEW, EDIT, MANAGE, SUBMIT, ANALYZE
+
+    Attributes:
+        FormAccessControlAccessTypeID: Primary key
+        AccessTypeCode: Unique access type code (e.g., 'SUBMIT')
+        AccessTypeName: Display name
+        AccessTypeDescription: Full description of the access type
+        IsActive: Whether this access type is available for use
+        SortOrder: Display order
+    """
+
+    __tablename__ = "FormAccessControlAccessType"
+    __table_args__ = {"schema": "ref"}
+
+    # Primary Key
+    FormAccessControlAccessTypeID = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Core Fields
+    AccessTypeCode = Column(String(20), nullable=False, unique=True)
+    AccessTypeName = Column(String(50), nullable=False)
+    AccessTypeDescription = Column(String(200), nullable=True)
+
+    # Status and Ordering
+    IsActive = Column(Boolean, nullable=False, default=True)
+    SortOrder = Column(Integer, nullable=False, default=0)
+
+    # Audit Columns
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    CreatedBy = Column(BigInteger, nullable=False, default=1)
+    UpdatedDate = Column(DateTime, nullable=True)
+    UpdatedBy = Column(BigInteger, nullable=True)
+    IsDeleted = Column(Boolean, nullable=False, default=False)
+    DeletedDate = Column(DateTime, nullable=True)
+    DeletedBy = Column(BigInteger, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<FormAccessControlAccessType(FormAccessControlAccessTypeID={self.FormAccessControlAccessTypeID}, "
+            f"AccessTypeCode='{self.AccessTypeCode}')>"
+        )
@@ -0,0 +1,54 @@
+"""
+SyncUpload Model (dbo.SyncUpload)
+Resumable offline-sync upload sessions for booth devices
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, func
+from common.database import Base
+
+
+class SyncUpload(Base):
+    """
+    One device's upload of its offline lead queue.
+
+    The device numbers the items of its queue 0..n-1 and sends them in any
+    number of requests; CommittedItems is advanced in the same transaction
+    as each stored chunk, so after a dropped connection the device resumes
+    from CommittedItems without resending (or re-storing) what already
+    landed.
+
+    Attributes:
+        SyncUploadID: Primary key
+        CompanyID: Company the device is capturing leads for
+        UserID: User operating the device (only they may append)
+        DeviceID: Client-supplied device identifier
+        CommittedItems: Items processed so far (stored, duplicate or rejected)
+        StoredItems: Items stored as new submissions
+        DuplicateItems: Items skipped because their idempotency key was seen
+        RejectedItems: Items that failed validation
+        CreatedDate: When the upload was opened
+        UpdatedDate: Last committed chunk
+    """
+
+    __tablename__ = "SyncUpload"
+    __table_args__ = {"schema": "dbo"}
+
+    # Primary Key
+    SyncUploadID = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Owner
+    CompanyID = Column(BigInteger, ForeignKey('dbo.Company.CompanyID'), nullable=False)
+    UserID = Column(BigInteger, ForeignKey('dbo.User.UserID'), nullable=False)
+    DeviceID = Column(String(100), nullable=False)
+
+    # Progress
+    CommittedItems = Column(Integer, nullable=False, default=0)
+    StoredItems = Column(Integer, nullable=False, default=0)
+    DuplicateItems = Column(Integer, nullable=False, default=0)
+    RejectedItems = Column(Integer, nullable=False, default=0)
+
+    # Audit
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    UpdatedDate = Column(DateTime, nullable=False, server_default=func.getutcdate())
+
+    def __repr__(self) -> str:
+        return f"<SyncUpload(SyncUploadID={self.SyncUploadID}, CommittedItems={self.CommittedItems})>"
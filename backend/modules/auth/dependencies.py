@@ -3,8 +3,11 @@ Authentication Dependencies
 FastAPI dependencies for accessing current authenticated user
 """
 from fastapi import Depends, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
+from common.database import get_async_db
+from common.membership_cache import MembershipSnapshot, get_membership_snapshot_async
 from modules.auth.models import CurrentUser
 
 
@@ -67,3 +70,29 @@ def get_current_user_optional(request: Request) -> Optional[CurrentUser]:
         return request.state.user
     return None
 
+
+
+async def get_current_memberships(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> MembershipSnapshot:
+    """
+    Dependency to get the current user's company memberships.
+    
+    Served from the process-wide membership snapshot cache (one query on miss),
+    so RBAC checks can confirm the JWT's company is still an active membership
+    without hitting the database per request.
+    
+    Returns:
+        MembershipSnapshot with company IDs, role codes, statuses and primary flag
+        
+    Example:
+        @router.get("/api/companies/{company_id}/data")
+        async def get_company_data(
+            company_id: int,
+            current_user: CurrentUser = Depends(get_current_user),
+            memberships: MembershipSnapshot = Depends(get_current_memberships)
+        ):
+            require_company_access(current_user, company_id, memberships)
+    """
+    return await get_membership_snapshot_async(db, current_user.user_id)
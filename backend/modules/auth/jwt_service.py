@@ -9,6 +9,7 @@ from typing import Optional, Dict, Any
 from jose import jwt, JWTError  # type: ignore
 from sqlalchemy.orm import Session
 
+from common.timing import traced
 from config.jwt import (
     get_secret_key,
     get_algorithm,
@@ -104,6 +105,7 @@ def create_refresh_token(db: Session, user_id: int) -> str:
     return jwt.encode(payload, get_secret_key(), algorithm=get_algorithm())
 
 
+@traced("jwt")
 def decode_token(token: str) -> Dict[str, Any]:
     """
     Decode and verify JWT token.
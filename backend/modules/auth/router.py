@@ -7,10 +7,12 @@ import logging
 from datetime import datetime
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, status, Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from common.database import get_db
+from common.database import get_db, get_async_db
 from common.password_validator import validate_password_strength
 from modules.auth.dependencies import get_current_user, CurrentUser
 from modules.auth.schemas import (
@@ -52,7 +54,6 @@ from modules.auth.jwt_service import (
 )
 from common.security import verify_password, hash_password
 from models.user import User
-from models.user_company import UserCompany
 from models.ref.user_company_role import UserCompanyRole
 from jose import JWTError  # type: ignore
 from modules.auth.audit_service import (
@@ -62,6 +63,7 @@ from modules.auth.audit_service import (
 )
 from services.email_service import get_email_service
 from common.auth_event_decorator import log_auth_attempts
+from common.membership_cache import get_membership_snapshot_async, load_membership_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -383,6 +385,89 @@ async def verify_email(
 # Login Endpoint
 # ============================================================================
 
+def _authenticate_and_issue_tokens(db: Session, email: str, password: str):
+    """
+    Authenticate credentials and issue tokens (login steps 1-7).
+    
+    Synchronous on purpose: the login route runs this in the threadpool so the
+    blocking pyodbc round-trips and the bcrypt comparison do not stall the
+    event loop. The sync session is kept because @log_auth_attempts writes
+    auth events through the same `db`.
+    
+    Returns:
+        Tuple of (user payload dict, access_token, refresh_token)
+        
+    Raises:
+        HTTPException: 401 for invalid credentials, 403 for unverified/inactive accounts
+    """
+    # 1. Find user by email
+    user = get_user_by_email(db, email)
+    
+    # 2. Verify password (timing-safe comparison)
+    # Use same error for invalid email/password to prevent email enumeration
+    if not user or not verify_password(password, user.PasswordHash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    
+    # 3. Check email verified
+    if not user.IsEmailVerified:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Please verify your email before logging in. Check your inbox for the verification link."
+        )
+    
+    # 4. Check account active (via StatusID relationship)
+    if user.status and user.status.StatusName not in ["Active"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your account has been deactivated. Please contact support."
+        )
+    
+    # 5. Get user's role and company (if exists)
+    # Primary company, else first active one. Loaded uncached (one query): the
+    # snapshot cache is per process, and tokens must not carry a role or
+    # company revoked through another worker
+    membership = load_membership_snapshot(db, user.UserID).default_membership()
+    
+    # Extract role and company_id
+    role = None
+    company_id = None
+    if membership:
+        # RBAC checks use role codes (not RoleName): "company_admin", "company_user", "system_admin"
+        role = membership.role_code
+        company_id = membership.company_id
+    
+    # 6. Generate tokens
+    access_token = create_access_token(
+        db=db,
+        user_id=user.UserID,
+        email=user.Email,
+        role=role,
+        company_id=company_id
+    )
+    
+    refresh_token = create_refresh_token(db=db, user_id=user.UserID)
+    
+    # 7. Store refresh token in database (expiry read from config per Story 1.13)
+    store_refresh_token(db, user.UserID, refresh_token)
+    
+    # Read user fields here; the commit above expired them and a refresh
+    # on the event loop would block again
+    user_payload = {
+        "user_id": user.UserID,
+        "email": user.Email,
+        "first_name": user.FirstName,
+        "last_name": user.LastName,
+        "onboarding_complete": user.OnboardingComplete,
+        "role": role,
+        "company_id": company_id
+    }
+    
+    return user_payload, access_token, refresh_token
+
+
 @router.post(
     "/login",
     response_model=LoginResponse,
@@ -431,67 +516,11 @@ async def login(
     - Errors automatically logged to log.ApplicationError
     - No manual logging code needed
     """
-    # 1. Find user by email
-    user = get_user_by_email(db, request_data.email)
-    
-    # 2. Verify password (timing-safe comparison)
-    # Use same error for invalid email/password to prevent email enumeration
-    if not user or not verify_password(request_data.password, user.PasswordHash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password"
-        )
-    
-    # 3. Check email verified
-    if not user.IsEmailVerified:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Please verify your email before logging in. Check your inbox for the verification link."
-        )
-    
-    # 4. Check account active (via StatusID relationship)
-    if user.status and user.status.StatusName not in ["Active"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Your account has been deactivated. Please contact support."
-        )
-    
-    # 5. Get user's role and company (if exists)
-    user_company = db.query(UserCompany).filter(
-        UserCompany.UserID == user.UserID,
-        UserCompany.IsPrimaryCompany == True
-    ).first()
-    
-    # If no primary company, get any active company
-    if not user_company:
-        user_company = db.query(UserCompany).filter(
-            UserCompany.UserID == user.UserID
-        ).first()
-    
-    # Extract role and company_id
-    role = None
-    company_id = None
-    if user_company:
-        # Get role CODE from UserCompanyRole relationship (not RoleName)
-        # RBAC checks use role codes: "company_admin", "company_user", "system_admin"
-        if user_company.role:
-            role = user_company.role.RoleCode
-        company_id = user_company.CompanyID
-    
-    # 6. Generate tokens
-    access_token = create_access_token(
-        db=db,
-        user_id=user.UserID,
-        email=user.Email,
-        role=role,
-        company_id=company_id
+    # Steps 1-7 run pyodbc queries and bcrypt; keep them off the event loop
+    user_payload, access_token, refresh_token = await run_in_threadpool(
+        _authenticate_and_issue_tokens, db, request_data.email, request_data.password
     )
     
-    refresh_token = create_refresh_token(db=db, user_id=user.UserID)
-    
-    # 7. Store refresh token in database (expiry read from config per Story 1.13)
-    store_refresh_token(db, user.UserID, refresh_token)
-    
     # 8. Return tokens with user details (for frontend AuthContext)
     # Return dict directly (FastAPI will serialize, no Pydantic validation)
     return JSONResponse(
@@ -501,15 +530,7 @@ async def login(
             "refresh_token": refresh_token,
             "token_type": "bearer",
             "expires_in": 3600,
-            "user": {
-                "user_id": user.UserID,
-                "email": user.Email,
-                "first_name": user.FirstName,
-                "last_name": user.LastName,
-                "onboarding_complete": user.OnboardingComplete,
-                "role": role,
-                "company_id": company_id
-            }
+            "user": user_payload
         }
     )
 
@@ -526,7 +547,7 @@ async def login(
 )
 async def get_current_user_endpoint(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """
@@ -534,7 +555,9 @@ async def get_current_user_endpoint(
     Requires valid JWT access token.
     """
     # Get fresh user data from database
-    user = db.query(User).filter(User.UserID == current_user.user_id).first()
+    user = (await db.execute(
+        select(User).where(User.UserID == current_user.user_id)
+    )).scalar_one_or_none()
     
     if not user:
         raise HTTPException(
@@ -542,18 +565,14 @@ async def get_current_user_endpoint(
             detail="User not found"
         )
     
-    # Get user's company and role (if exists)
-    user_company = db.query(UserCompany).filter(
-        UserCompany.UserID == user.UserID,
-        UserCompany.IsPrimaryCompany == True
-    ).first()
+    # Get user's company and role (if exists) from the cached membership snapshot
+    membership = (await get_membership_snapshot_async(db, user.UserID)).primary()
     
     role = None
     company_id = None
-    if user_company:
-        if user_company.role:
-            role = user_company.role.RoleName
-        company_id = user_company.CompanyID
+    if membership:
+        role = membership.role_name
+        company_id = membership.company_id
     
     # Return user details
     return JSONResponse(
@@ -654,24 +673,15 @@ async def refresh_token_endpoint(
                 detail="User not found, inactive, or email not verified"
             )
         
-        # 5. Get updated role/company info
-        user_company = db.query(UserCompany).filter(
-            UserCompany.UserID == user.UserID,
-            UserCompany.IsPrimaryCompany == True
-        ).first()
-        
-        if not user_company:
-            user_company = db.query(UserCompany).filter(
-                UserCompany.UserID == user.UserID
-            ).first()
+        # 5. Get updated role/company info (uncached, as at login)
+        membership = load_membership_snapshot(db, user.UserID).default_membership()
         
         role = None
         company_id = None
-        if user_company:
-            if user_company.role:
-                # Use RoleCode for JWT (RBAC checks use codes, not names)
-                role = user_company.role.RoleCode
-            company_id = user_company.CompanyID
+        if membership:
+            # Use RoleCode for JWT (RBAC checks use codes, not names)
+            role = membership.role_code
+            company_id = membership.company_id
         
         # 6. Generate new access token
         access_token = create_access_token(
@@ -19,6 +19,7 @@ import re
 
 import httpx
 from common.logger import get_logger
+from common.timing import traced
 
 logger = get_logger(__name__)
 
@@ -143,6 +144,7 @@ class ABRClient:
         
         return normalized
     
+    @traced("abr")
     async def _make_request(
         self, 
         endpoint: str, 
@@ -277,7 +279,7 @@ class ABRClient:
         # ABR XML uses namespaces - use explicit namespace in tag
         business_entities = root.findall(".//{http://abr.business.gov.au/ABRXMLSearch/}searchResultsRecord")
         
-        logger.info(f"Found {len(business_entities)} business entities in ABR response")
+        logger.info("Found %d business entities in ABR response", len(business_entities))
         
         for entity in business_entities[:10]:  # Limit to top 10 results
             result = self._extract_entity_details(entity)
@@ -305,7 +307,7 @@ class ABRClient:
                 self._get_xml_text(entity_element, ".//legalName/organisationName")
             )
             
-            logger.debug(f"Extracted from ABR: ABN={abn}, ACN={acn}, Name={legal_name}")
+            logger.debug("Extracted from ABR: ABN=%s, ACN=%s, Name=%s", abn, acn, legal_name)
             
             # Entity type - try multiple locations
             entity_type = (
@@ -323,7 +325,7 @@ class ABRClient:
                 self._get_xml_text(entity_element, ".//identifierStatus")
             )
             
-            logger.debug(f"Entity type: {entity_type}, ABN status: {abn_status}")
+            logger.debug("Entity type: %s, ABN status: %s", entity_type, abn_status)
             
             # GST registration
             ns = "{http://abr.business.gov.au/ABRXMLSearch/}"
@@ -337,7 +339,7 @@ class ABRClient:
             address_element = entity_element.find(f".//{ns}mainBusinessPhysicalAddress")
             if address_element is not None:
                 business_address = self._format_address(address_element)
-                logger.debug(f"Address extracted: {business_address}")
+                logger.debug("Address extracted: %s", business_address)
             else:
                 logger.debug("No mainBusinessPhysicalAddress element found")
                 business_address = None
@@ -406,7 +408,7 @@ class ABRClient:
             return None
             
         except Exception as e:
-            logger.debug(f"Address parsing failed: {e}")
+            logger.debug("Address parsing failed: %s", e)
             return None
     
     async def search_by_abn(self, abn: str) -> Optional[Dict[str, Any]]:
@@ -426,7 +428,7 @@ class ABRClient:
         """
         normalized_abn = self._normalize_abn(abn)
         
-        logger.info(f"Searching ABR by ABN: {normalized_abn}")
+        logger.info("Searching ABR by ABN: %s", normalized_abn)
         
         params = {
             "searchString": normalized_abn,
@@ -456,7 +458,7 @@ class ABRClient:
         """
         normalized_acn = self._normalize_acn(acn)
         
-        logger.info(f"Searching ABR by ACN: {normalized_acn}")
+        logger.info("Searching ABR by ACN: %s", normalized_acn)
         
         params = {
             "searchString": normalized_acn,
@@ -487,7 +489,7 @@ class ABRClient:
         """
         normalized_name = self._normalize_name(name)
         
-        logger.info(f"Searching ABR by name: '{normalized_name}'")
+        logger.info("Searching ABR by name: '%s'", normalized_name)
         
         params = {
             "name": normalized_name,
@@ -14,7 +14,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, func, and_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func, and_, desc
 
 from models.cache.abr_search import ABRSearch
 from common.logger import get_logger
@@ -70,7 +71,7 @@ class CacheService:
     
     async def get_cached_search(
         self, 
-        db: Session,
+        db: AsyncSession,
         search_type: str, 
         search_value: str
     ) -> Optional[List[Dict[str, Any]]]:
@@ -78,7 +79,7 @@ class CacheService:
         Get cached search results if available and not expired
         
         Args:
-            db: Database session
+            db: Async database session
             search_type: Type of search ('ABN', 'ACN', 'Name')
             search_value: Search value to look up
             
@@ -89,7 +90,7 @@ class CacheService:
         
         try:
             # Query for non-expired cache entries
-            cached_entries = db.execute(
+            cached_entries = (await db.execute(
                 select(ABRSearch)
                 .where(
                     and_(
@@ -100,20 +101,14 @@ class CacheService:
                     )
                 )
                 .order_by(ABRSearch.ResultIndex)
-            ).scalars().all()
+            )).scalars().all()
             
             if not cached_entries:
-                logger.debug(f"Cache miss: {search_type} search for '{search_value}'")
+                logger.debug("Cache miss: %s search for '%s'", search_type, search_value)
                 return None
             
-            # Update hit count and last hit timestamp for all entries
-            for entry in cached_entries:
-                entry.HitCount += 1  # type: ignore
-                entry.LastHitAt = datetime.utcnow()  # type: ignore
-            
-            db.commit()
-            
             # Parse and return results
+            hit_count = int(cached_entries[0].HitCount or 0) + 1  # type: ignore
             results = []
             for entry in cached_entries:
                 try:
@@ -123,21 +118,35 @@ class CacheService:
                     logger.warning(f"Failed to parse cached result: {e}")
                     continue
             
+            # Update hit count and last hit timestamp for all entries in one statement
+            await db.execute(
+                update(ABRSearch)
+                .where(
+                    and_(
+                        ABRSearch.SearchType == search_type,
+                        ABRSearch.SearchValue == search_key,
+                        ABRSearch.IsDeleted == False
+                    )
+                )
+                .values(HitCount=ABRSearch.HitCount + 1, LastHitAt=datetime.utcnow())
+            )
+            await db.commit()
+            
             logger.info(
                 f"Cache hit: {search_type} search for '{search_value}' "
-                f"({len(results)} results, hit_count: {cached_entries[0].HitCount})"
+                f"({len(results)} results, hit_count: {hit_count})"
             )
             
             return results if results else None
             
         except Exception as e:
             logger.error(f"Error retrieving cached search: {e}")
-            db.rollback()
+            await db.rollback()
             return None
     
     async def cache_search_result(
         self,
-        db: Session,
+        db: AsyncSession,
         search_type: str,
         search_value: str,
         results: List[Dict[str, Any]],
@@ -148,7 +157,7 @@ class CacheService:
         Cache search results with specified TTL
         
         Args:
-            db: Database session
+            db: Async database session
             search_type: Type of search ('ABN', 'ACN', 'Name')
             search_value: Search value that was searched
             results: List of search results to cache
@@ -159,7 +168,7 @@ class CacheService:
             True if caching successful, False otherwise
         """
         if not results:
-            logger.debug(f"Skipping cache for empty results: {search_type} '{search_value}'")
+            logger.debug("Skipping cache for empty results: %s '%s'", search_type, search_value)
             return False
         
         search_key = self._normalize_search_key(search_type, search_value)
@@ -167,7 +176,7 @@ class CacheService:
         
         try:
             # Delete any existing cache entries for this search
-            db.execute(
+            await db.execute(
                 delete(ABRSearch).where(
                     and_(
                         ABRSearch.SearchType == search_type,
@@ -200,7 +209,7 @@ class CacheService:
                 
                 db.add(cache_entry)
             
-            db.commit()
+            await db.commit()
             
             logger.info(
                 f"Cached search results: {search_type} '{search_value}' "
@@ -211,7 +220,7 @@ class CacheService:
             
         except Exception as e:
             logger.error(f"Error caching search results: {e}")
-            db.rollback()
+            await db.rollback()
             return False
     
     async def get_cache_statistics(self, db: Session) -> Dict[str, Any]:
@@ -3,7 +3,8 @@ Team Invitation Service
 Business logic for team member invitations
 """
 import secrets
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from typing import Optional, List, Tuple, Union
 from datetime import datetime, timedelta
@@ -18,6 +19,7 @@ from models.ref.user_company_status import UserCompanyStatus
 from models.ref.joined_via import JoinedVia
 from models.audit.activity_log import ActivityLog
 from common.logger import get_logger
+from schemas.base import apply_keyset, CursorPage, total_count_cache
 import json
 
 logger = get_logger(__name__)
@@ -273,6 +275,7 @@ async def send_invitation(
     db.add(audit_log)
     
     db.commit()
+    total_count_cache.invalidate_prefix(("invitations", company_id))
     db.refresh(invitation)
     
     logger.info(
@@ -453,6 +456,7 @@ async def cancel_invitation(
     db.add(audit_log)
     
     db.commit()
+    total_count_cache.invalidate_prefix(("invitations", company_id))
     db.refresh(invitation)
     
     logger.info(
@@ -464,7 +468,7 @@ async def cancel_invitation(
 
 
 async def list_company_invitations(
-    db: Session,
+    db: AsyncSession,
     company_id: int,
     status_filter: Optional[str] = None,
     page: int = 1,
@@ -473,8 +477,11 @@ async def list_company_invitations(
     """
     List all invitations for a company (AC-1.6.9).
     
+    Inviter, role and status are eager-loaded with the page so callers can
+    build the response without per-row lookups.
+    
     Args:
-        db: Database session
+        db: Async database session
         company_id: Company ID
         status_filter: Optional status code filter
         page: Page number (1-indexed)
@@ -499,18 +506,94 @@ async def list_company_invitations(
     
     # Get total count
     count_query = select(func.count()).select_from(query.subquery())
-    total = db.execute(count_query).scalar()
+    total = (await db.execute(count_query)).scalar()
     
     # Apply pagination and ordering
     query = query.order_by(UserInvitation.InvitedAt.desc())
     query = query.offset((page - 1) * page_size).limit(page_size)
+    query = query.options(
+        joinedload(UserInvitation.invited_by_user),
+        joinedload(UserInvitation.role),
+        joinedload(UserInvitation.status)
+    )
     
     # Execute query
-    invitations = db.execute(query).scalars().all()
+    invitations = (await db.execute(query)).scalars().all()
     
     return list(invitations), total or 0
 
 
+async def list_company_invitations_page(
+    db: AsyncSession,
+    company_id: int,
+    status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    include_total: bool = False
+) -> Tuple[List[UserInvitation], Optional[str], Optional[int]]:
+    """
+    List invitations for a company using keyset (cursor) pagination.
+    
+    Seeks on (InvitedAt, UserInvitationID) descending instead of OFFSET, so
+    every page costs the same regardless of depth. The total is optional and
+    served from the shared count cache (invalidated on send/cancel).
+    
+    Args:
+        db: Async database session
+        company_id: Company ID
+        status_filter: Optional status code filter
+        cursor: Cursor from the previous page (None for first page)
+        limit: Number of items per page
+        include_total: Whether to return a (cached) total count
+        
+    Returns:
+        Tuple of (invitations list, next cursor or None, total or None)
+        
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    # Base query
+    query = select(UserInvitation).where(
+        and_(
+            UserInvitation.CompanyID == company_id,
+            UserInvitation.IsDeleted == False
+        )
+    )
+    
+    # Apply status filter if provided
+    if status_filter:
+        query = query.join(UserInvitationStatus).where(
+            UserInvitationStatus.StatusCode == status_filter
+        )
+    
+    total = None
+    if include_total:
+        count_key = ("invitations", company_id, status_filter)
+        total = total_count_cache.get(count_key)
+        if total is None:
+            count_query = select(func.count()).select_from(query.subquery())
+            total = (await db.execute(count_query)).scalar() or 0
+            total_count_cache.set(count_key, total)
+    
+    page_query = apply_keyset(
+        query,
+        [UserInvitation.InvitedAt, UserInvitation.UserInvitationID],
+        cursor,
+        limit
+    ).options(
+        joinedload(UserInvitation.invited_by_user),
+        joinedload(UserInvitation.role),
+        joinedload(UserInvitation.status)
+    )
+    
+    rows = (await db.execute(page_query)).scalars().all()
+    invitations, next_cursor = CursorPage.split_rows(
+        rows, limit, key=lambda inv: (inv.InvitedAt, inv.UserInvitationID)
+    )
+    
+    return invitations, next_cursor, total
+
+
 async def get_invitation_details(
     db: Session,
     invitation_id: int,
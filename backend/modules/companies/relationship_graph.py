@@ -0,0 +1,360 @@
+"""
+Company Relationship Graph
+
+Hierarchy queries over the company relationship graph (branch, subsidiary,
+partner) without walking it one query per hop:
+
+- dbo.CompanyRelationshipClosure holds every (ancestor, descendant, depth)
+  pair reachable through active relationships. Cycle checks, ancestor and
+  descendant listings and "companies visible to a user" are one indexed query.
+- RelationshipGraphCache holds the active adjacency (parent -> children and
+  child -> parents, with relationship type names) in memory, loaded with a
+  single query and invalidated whenever a relationship is created or its
+  status changes.
+
+The closure is maintained by RelationshipService.create_relationship and
+update_relationship_status via refresh_closure(). Adding or removing the edge
+parent -> child only changes the ancestor sets of `child` and its descendants,
+so only those rows are rewritten (one DELETE, one bulk INSERT).
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, exists, union
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.company_relationship import CompanyRelationship
+from models.company_relationship_closure import CompanyRelationshipClosure
+from models.ref.company_relationship_type import CompanyRelationshipType
+from models.user_company import UserCompany
+from models.ref.user_company_status import UserCompanyStatus
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Adjacency cache lifetime (other workers' writes become visible within this window)
+GRAPH_CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class RelationshipEdge:
+    """
+    One active relationship in the graph.
+
+    Attributes:
+        relationship_id: CompanyRelationshipID
+        parent_id: ParentCompanyID
+        child_id: ChildCompanyID
+        type_name: CompanyRelationshipType.TypeName ('branch', 'subsidiary', 'partner')
+    """
+    relationship_id: int
+    parent_id: int
+    child_id: int
+    type_name: str
+
+
+@dataclass
+class CompanyGraph:
+    """
+    Immutable-by-convention adjacency snapshot of active relationships.
+
+    Attributes:
+        children: parent_id -> outgoing edges
+        parents: child_id -> incoming edges
+    """
+    children: Dict[int, List[RelationshipEdge]] = field(default_factory=dict)
+    parents: Dict[int, List[RelationshipEdge]] = field(default_factory=dict)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[RelationshipEdge]) -> "CompanyGraph":
+        graph = cls()
+        for edge in edges:
+            graph.children.setdefault(edge.parent_id, []).append(edge)
+            graph.parents.setdefault(edge.child_id, []).append(edge)
+        return graph
+
+    def edges_for(self, company_id: int) -> List[RelationshipEdge]:
+        """Get edges where the company is the parent, then edges where it is the child"""
+        return self.children.get(company_id, []) + self.parents.get(company_id, [])
+
+    def _walk(self, start_id: int, upward: bool) -> Dict[int, int]:
+        adjacency = self.parents if upward else self.children
+        depths: Dict[int, int] = {}
+        queue = deque([(start_id, 0)])
+        while queue:
+            company_id, depth = queue.popleft()
+            for edge in adjacency.get(company_id, []):
+                next_id = edge.parent_id if upward else edge.child_id
+                if next_id == start_id or next_id in depths:
+                    continue
+                depths[next_id] = depth + 1
+                queue.append((next_id, depth + 1))
+        return depths
+
+    def ancestors(self, company_id: int) -> Dict[int, int]:
+        """
+        Get all ancestors of a company.
+
+        Returns:
+            ancestor_id -> shortest depth (1 = direct parent)
+        """
+        return self._walk(company_id, upward=True)
+
+    def descendants(self, company_id: int) -> Dict[int, int]:
+        """
+        Get all descendants of a company.
+
+        Returns:
+            descendant_id -> shortest depth (1 = direct child)
+        """
+        return self._walk(company_id, upward=False)
+
+    def would_create_cycle(self, parent_id: int, child_id: int) -> bool:
+        """Check whether adding parent -> child would close a cycle"""
+        return parent_id == child_id or parent_id in self.descendants(child_id)
+
+
+def relationship_context(graph: CompanyGraph, company_id: int) -> Optional[Dict[str, object]]:
+    """
+    Describe a company's first relationship from its own perspective.
+
+    Assumes one company won't be a branch and a partner of the same other
+    company simultaneously; edges where the company is the parent win.
+
+    Returns:
+        {"type": "parent"|"child", "display_name", "related_company_id"} or None
+    """
+    for edge in graph.edges_for(company_id):
+        if edge.parent_id == company_id:
+            display_name = 'Head Office' if edge.type_name == 'branch' else 'Parent'
+            return {
+                "type": "parent",
+                "display_name": display_name,
+                "related_company_id": edge.child_id
+            }
+        if edge.type_name == 'branch':
+            display_name = 'Branch'
+        elif edge.type_name == 'subsidiary':
+            display_name = 'Subsidiary'
+        else:  # partner
+            display_name = 'Partner'
+        return {
+            "type": "child",
+            "display_name": display_name,
+            "related_company_id": edge.parent_id
+        }
+    return None
+
+
+def _edges_statement():
+    return (
+        select(
+            CompanyRelationship.CompanyRelationshipID,
+            CompanyRelationship.ParentCompanyID,
+            CompanyRelationship.ChildCompanyID,
+            CompanyRelationshipType.TypeName,
+        )
+        .join(
+            CompanyRelationshipType,
+            CompanyRelationshipType.CompanyRelationshipTypeID == CompanyRelationship.RelationshipTypeID,
+        )
+        .where(
+            CompanyRelationship.Status == 'active',
+            CompanyRelationship.IsDeleted == False,  # noqa: E712
+        )
+    )
+
+
+def _graph_from_rows(rows) -> CompanyGraph:
+    return CompanyGraph.from_edges(
+        RelationshipEdge(relationship_id=r[0], parent_id=r[1], child_id=r[2], type_name=r[3])
+        for r in rows
+    )
+
+
+def load_graph(db: Session) -> CompanyGraph:
+    """Load the active relationship graph in one query (bypasses the cache)"""
+    return _graph_from_rows(db.execute(_edges_statement()).all())
+
+
+async def load_graph_async(db: AsyncSession) -> CompanyGraph:
+    """Load the active relationship graph in one query (bypasses the cache)"""
+    return _graph_from_rows((await db.execute(_edges_statement())).all())
+
+
+class RelationshipGraphCache:
+    """
+    Process-wide cache of the active relationship adjacency.
+
+    Features:
+    - Loaded with one query (relationships joined to their type names)
+    - TTL expiry so writes from other workers are picked up
+    - Explicit invalidate() after local writes (RelationshipService does this)
+    - Sync and async loaders share the same snapshot
+
+    Usage:
+        graph = relationship_graph_cache.get(db)
+        graph.edges_for(company_id)
+    """
+
+    def __init__(self, ttl_seconds: int = GRAPH_CACHE_TTL_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._graph: Optional[CompanyGraph] = None
+        self._loaded_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[CompanyGraph]:
+        if self._graph is not None and time.monotonic() - self._loaded_at < self._ttl_seconds:
+            return self._graph
+        return None
+
+    def _store(self, graph: CompanyGraph) -> CompanyGraph:
+        with self._lock:
+            self._graph = graph
+            self._loaded_at = time.monotonic()
+        return graph
+
+    def get(self, db: Session) -> CompanyGraph:
+        """Get the cached graph, loading it with one query if missing or expired"""
+        return self._current() or self._store(load_graph(db))
+
+    async def get_async(self, db: AsyncSession) -> CompanyGraph:
+        """Get the cached graph, loading it with one query if missing or expired"""
+        return self._current() or self._store(await load_graph_async(db))
+
+    def invalidate(self) -> None:
+        """Drop the cached graph (next get() reloads)"""
+        with self._lock:
+            self._graph = None
+            self._loaded_at = 0.0
+
+
+# Shared instance
+relationship_graph_cache = RelationshipGraphCache()
+
+
+def closure_rows_for(graph: CompanyGraph, company_ids: Iterable[int]) -> List[Tuple[int, int, int]]:
+    """
+    Compute closure rows for the given descendants from an adjacency snapshot.
+
+    Args:
+        graph: Active relationship graph
+        company_ids: Descendant companies whose ancestor sets to compute
+
+    Returns:
+        List of (ancestor_id, descendant_id, depth)
+    """
+    rows = []
+    for descendant_id in company_ids:
+        for ancestor_id, depth in graph.ancestors(descendant_id).items():
+            rows.append((ancestor_id, descendant_id, depth))
+    return rows
+
+
+def refresh_closure(db: Session, child_id: int) -> int:
+    """
+    Rewrite closure rows after an edge into `child_id` was added or removed.
+
+    Must be called after the relationship change is flushed and before commit,
+    so the closure changes in the same transaction. Only `child_id` and its
+    descendants can gain or lose ancestors, so only their rows are replaced.
+
+    Args:
+        db: Database session (caller commits)
+        child_id: ChildCompanyID of the changed relationship
+
+    Returns:
+        int: Number of closure rows written
+    """
+    graph = load_graph(db)
+    affected: Set[int] = {child_id, *graph.descendants(child_id)}
+
+    db.execute(
+        delete(CompanyRelationshipClosure)
+        .where(CompanyRelationshipClosure.DescendantCompanyID.in_(affected))
+        .execution_options(synchronize_session=False)
+    )
+    rows = closure_rows_for(graph, affected)
+    if rows:
+        db.execute(
+            CompanyRelationshipClosure.__table__.insert(),
+            [
+                {"AncestorCompanyID": a, "DescendantCompanyID": d, "Depth": depth}
+                for a, d, depth in rows
+            ],
+        )
+
+    logger.debug(f"Closure refreshed for {len(affected)} companies below CompanyID={child_id}: {len(rows)} rows")
+    return len(rows)
+
+
+def is_ancestor(db: Session, ancestor_id: int, descendant_id: int) -> bool:
+    """Check (one PK lookup) whether ancestor_id is above descendant_id in the hierarchy"""
+    stmt = select(
+        exists().where(
+            CompanyRelationshipClosure.AncestorCompanyID == ancestor_id,
+            CompanyRelationshipClosure.DescendantCompanyID == descendant_id,
+        )
+    )
+    return bool(db.execute(stmt).scalar())
+
+
+def get_ancestor_ids(db: Session, company_id: int) -> List[int]:
+    """Get ancestor company IDs, nearest first (one indexed query)"""
+    stmt = (
+        select(CompanyRelationshipClosure.AncestorCompanyID)
+        .where(CompanyRelationshipClosure.DescendantCompanyID == company_id)
+        .order_by(CompanyRelationshipClosure.Depth, CompanyRelationshipClosure.AncestorCompanyID)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def get_descendant_ids(db: Session, company_id: int) -> List[int]:
+    """Get descendant company IDs, nearest first (one indexed query)"""
+    stmt = (
+        select(CompanyRelationshipClosure.DescendantCompanyID)
+        .where(CompanyRelationshipClosure.AncestorCompanyID == company_id)
+        .order_by(CompanyRelationshipClosure.Depth, CompanyRelationshipClosure.DescendantCompanyID)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def _visible_companies_statement(user_id: int):
+    memberships = (
+        select(UserCompany.CompanyID)
+        .join(UserCompanyStatus, UserCompanyStatus.UserCompanyStatusID == UserCompany.StatusID)
+        .where(
+            UserCompany.UserID == user_id,
+            UserCompany.IsDeleted == False,  # noqa: E712
+            UserCompanyStatus.StatusCode == "active",
+        )
+    )
+    below = (
+        select(CompanyRelationshipClosure.DescendantCompanyID)
+        .join(UserCompany, UserCompany.CompanyID == CompanyRelationshipClosure.AncestorCompanyID)
+        .join(UserCompanyStatus, UserCompanyStatus.UserCompanyStatusID == UserCompany.StatusID)
+        .where(
+            UserCompany.UserID == user_id,
+            UserCompany.IsDeleted == False,  # noqa: E712
+            UserCompanyStatus.StatusCode == "active",
+        )
+    )
+    return union(memberships, below)
+
+
+def get_visible_company_ids(db: Session, user_id: int) -> Set[int]:
+    """
+    Get every company a user can see: their active memberships plus everything
+    below them in the hierarchy (one query).
+    """
+    return set(db.execute(_visible_companies_statement(user_id)).scalars().all())
+
+
+async def get_visible_company_ids_async(db: AsyncSession, user_id: int) -> Set[int]:
+    """Async variant of get_visible_company_ids()"""
+    return set((await db.execute(_visible_companies_statement(user_id))).scalars().all())
@@ -11,6 +11,7 @@ from models.company import Company
 from models.company_relationship import CompanyRelationship
 from models.ref.company_relationship_type import CompanyRelationshipType
 from models.user import User
+from .relationship_graph import is_ancestor, refresh_closure, relationship_graph_cache
 
 logger = logging.getLogger(__name__)
 
@@ -35,16 +36,13 @@ class RelationshipService:
         """
         Detects if creating a relationship would result in a circular dependency.
         (e.g., A -> B -> C, then trying to create C -> A)
+
+        One primary-key lookup on dbo.CompanyRelationshipClosure: the new edge
+        closes a cycle if the child is already an ancestor of the parent.
         """
-        ancestor_id = parent_id
-        while ancestor_id is not None:
-            if ancestor_id == child_id:
-                return True
-            
-            stmt = select(CompanyRelationship.ParentCompanyID).where(CompanyRelationship.ChildCompanyID == ancestor_id)
-            ancestor_id = self.db.execute(stmt).scalars().first()
-        
-        return False
+        if parent_id == child_id:
+            return True
+        return is_ancestor(self.db, child_id, parent_id)
 
     def create_relationship(
         self,
@@ -85,8 +83,11 @@ class RelationshipService:
         )
         
         self.db.add(new_relationship)
+        self.db.flush()
+        refresh_closure(self.db, child_id)
         self.db.commit()
         self.db.refresh(new_relationship)
+        relationship_graph_cache.invalidate()
         
         return new_relationship
 
@@ -119,13 +120,27 @@ class RelationshipService:
         if not relationship:
             raise ValueError("Relationship not found.")
 
+        # Reactivating re-adds the edge to the hierarchy
+        if (
+            status == 'active'
+            and relationship.Status != 'active'
+            and self._is_circular_relationship(relationship.ParentCompanyID, relationship.ChildCompanyID)
+        ):
+            raise ValueError("This relationship would create a circular dependency.")
+
+        hierarchy_changed = (status == 'active') != (relationship.Status == 'active')
         relationship.Status = status
         relationship.UpdatedBy = updated_by_user.UserID
         relationship.UpdatedDate = datetime.utcnow()
 
         self.db.add(relationship)
+        if hierarchy_changed:
+            self.db.flush()
+            refresh_closure(self.db, relationship.ChildCompanyID)
         self.db.commit()
         self.db.refresh(relationship)
+        if hierarchy_changed:
+            relationship_graph_cache.invalidate()
 
         logger.info(
             f"Relationship status updated: RelationshipID={relationship_id}, "
@@ -4,22 +4,23 @@ Endpoints for company creation and management
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from typing import Optional, List
 from datetime import datetime
 import os
 import json
 
-from common.database import get_db
+from common.database import get_db, get_async_db
 from modules.auth.dependencies import get_current_user, get_current_user_optional
 from modules.auth.models import CurrentUser
 from modules.auth.jwt_service import create_access_token, create_refresh_token
 from common.rbac import require_company_admin_for_company
+from schemas.base import apply_keyset, encode_cursor, CursorPage
 from models.user import User
 from models.company import Company
 from models.ref.user_company_role import UserCompanyRole
-from models.ref.user_invitation_status import UserInvitationStatus
 from models.audit.activity_log import ActivityLog
 from services.email_service import get_email_service
 from .schemas import (
@@ -37,7 +38,7 @@ from .schemas import (
 from .service import create_company
 from .invitation_service import (
     invite_member, resend_invitation, cancel_invitation,
-    list_company_invitations, get_invitation_details,
+    list_company_invitations, list_company_invitations_page, get_invitation_details,
     INVITATION_EXPIRY_DAYS
 )
 from .abr_client import get_abr_client, ABRClientError, ABRTimeoutError, ABRValidationError, ABRAuthenticationError
@@ -273,49 +274,54 @@ async def list_invitations(
     status_filter: Optional[str] = Query(None, description="Filter by status (pending, accepted, expired, cancelled)"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor (keyset pagination, replaces page)"),
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> ListInvitationsResponse:
     """
     List company invitations (AC-1.6.9).
     
     Requires company_admin role.
     Supports filtering by status and pagination.
+    
+    Every response carries `next_cursor`; passing it back as `cursor` seeks
+    on (InvitedAt, UserInvitationID) instead of using OFFSET, and the total
+    is served from a short-lived count cache.
     """
     try:
         # Verify user is company admin for this company
         require_company_admin_for_company(current_user, company_id)
         
         # Get invitations
-        invitations, total = await list_company_invitations(
-            db=db,
-            company_id=company_id,
-            status_filter=status_filter,
-            page=page,
-            page_size=page_size
-        )
+        if cursor:
+            invitations, next_cursor, total = await list_company_invitations_page(
+                db=db,
+                company_id=company_id,
+                status_filter=status_filter,
+                cursor=cursor,
+                limit=page_size,
+                include_total=True
+            )
+        else:
+            invitations, total = await list_company_invitations(
+                db=db,
+                company_id=company_id,
+                status_filter=status_filter,
+                page=page,
+                page_size=page_size
+            )
+            next_cursor = None
+            if invitations and page * page_size < total:
+                last = invitations[-1]
+                next_cursor = encode_cursor((last.InvitedAt, last.UserInvitationID))
         
         # Build response
         invitation_details = []
         for inv in invitations:
-            # Get inviter details
-            inviter = db.execute(
-                select(User).where(User.UserID == inv.InvitedBy)
-            ).scalar_one()
-            
-            # Get role
-            role = db.execute(
-                select(UserCompanyRole).where(
-                    UserCompanyRole.UserCompanyRoleID == inv.UserCompanyRoleID
-                )
-            ).scalar_one()
-            
-            # Get status
-            status_obj = db.execute(
-                select(UserInvitationStatus).where(
-                    UserInvitationStatus.UserInvitationStatusID == inv.StatusID
-                )
-            ).scalar_one()
+            # Inviter, role and status are eager-loaded by list_company_invitations
+            inviter = inv.invited_by_user
+            role = inv.role
+            status_obj = inv.status
             
             invitation_details.append(InvitationDetails(
                 invitation_id=int(inv.UserInvitationID),  # type: ignore
@@ -337,13 +343,19 @@ async def list_invitations(
         
         return ListInvitationsResponse(
             invitations=invitation_details,
-            total=total,
+            total=total or 0,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=next_cursor
         )
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error listing invitations: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -819,7 +831,7 @@ def detect_search_type(query: str) -> str:
 async def smart_company_search(
     request: SmartSearchRequest,
     current_user: Optional[CurrentUser] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> SmartSearchResponse:
     """
     Smart company search with auto-detection and enterprise caching
@@ -847,8 +859,8 @@ async def smart_company_search(
         search_type = detect_search_type(request.query)
         
         logger.info(
-            f"Smart search request: query='{request.query}', "
-            f"detected_type={search_type}, max_results={request.max_results}"
+            "Smart search request: query='%s', detected_type=%s, max_results=%s",
+            request.query, search_type, request.max_results
         )
         
         # Get services
@@ -870,8 +882,8 @@ async def smart_company_search(
             results = [CompanySearchResult(**result) for result in cached_results]
             
             logger.info(
-                f"Cache hit: {search_type} search for '{request.query}' "
-                f"returned {len(results)} results in {response_time_ms}ms"
+                "Cache hit: %s search for '%s' returned %d results in %dms",
+                search_type, request.query, len(results), response_time_ms
             )
             
             return SmartSearchResponse(
@@ -884,7 +896,7 @@ async def smart_company_search(
             )
         
         # Cache miss - call ABR API
-        logger.debug(f"Cache miss: calling ABR API for {search_type} search")
+        logger.debug("Cache miss: calling ABR API for %s search", search_type)
         
         try:
             if search_type == "ABN":
@@ -919,8 +931,8 @@ async def smart_company_search(
             results = [CompanySearchResult(**result) for result in api_results]
             
             logger.info(
-                f"ABR API search complete: {search_type} search for '{request.query}' "
-                f"returned {len(results)} results in {response_time_ms}ms"
+                "ABR API search complete: %s search for '%s' returned %d results in %dms",
+                search_type, request.query, len(results), response_time_ms
             )
             
             return SmartSearchResponse(
@@ -1061,21 +1073,25 @@ async def get_cache_statistics(
 )
 async def get_company_users(
     company_id: int,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size (omit to return all users)"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's nextCursor"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all users for a specific company.
     AC-1.18.7: Team management panel shows users for clicked company.
-    """
-    from models.user_company import UserCompany
-    from models.user import User
     
+    When `limit` is given the list is keyset-paginated on UserCompanyID and
+    the response includes `nextCursor` (null on the last page).
+    """
     # Verify current user has access to this company
-    user_company = db.query(UserCompany).filter(
-        UserCompany.UserID == current_user.user_id,
-        UserCompany.CompanyID == company_id
-    ).first()
+    user_company = (await db.execute(
+        select(UserCompany.UserCompanyID).where(
+            UserCompany.UserID == current_user.user_id,
+            UserCompany.CompanyID == company_id
+        ).limit(1)
+    )).first()
     
     if not user_company:
         raise HTTPException(
@@ -1083,14 +1099,29 @@ async def get_company_users(
             detail="You don't have access to this company"
         )
     
-    # Get all users for this company
-    company_users = db.query(UserCompany).filter(
-        UserCompany.CompanyID == company_id
-    ).all()
+    # Get all users for this company (user, role and status in one round-trip)
+    users_query = (
+        select(UserCompany)
+        .where(UserCompany.CompanyID == company_id)
+        .options(
+            joinedload(UserCompany.user).joinedload(User.status),
+            joinedload(UserCompany.role)
+        )
+    )
+    next_cursor = None
+    if limit:
+        try:
+            users_query = apply_keyset(users_query, [UserCompany.UserCompanyID], cursor, limit, descending=False)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        rows = (await db.execute(users_query)).scalars().all()
+        company_users, next_cursor = CursorPage.split_rows(rows, limit, key=lambda uc: (uc.UserCompanyID,))
+    else:
+        company_users = (await db.execute(users_query)).scalars().all()
     
     users_list = []
     for uc in company_users:
-        user = db.query(User).filter(User.UserID == uc.UserID).first()
+        user = uc.user
         if user:
             # Get role name
             role_name = "Company User"
@@ -1116,7 +1147,8 @@ async def get_company_users(
         content={
             "companyId": company_id,
             "companyName": "Company Name",  # TODO: Get from Company table
-            "users": users_list
+            "users": users_list,
+            "nextCursor": next_cursor
         }
     )
 
@@ -223,6 +223,7 @@ class ListInvitationsResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
     
     class Config:
         json_schema_extra = {
@@ -230,7 +231,8 @@ class ListInvitationsResponse(BaseModel):
                 "invitations": [],
                 "total": 5,
                 "page": 1,
-                "page_size": 20
+                "page_size": 20,
+                "next_cursor": None
             }
         }
 
@@ -0,0 +1,788 @@
+"""
+Dashboard KPI Service
+Incremental KPI rollups behind GET /api/dashboard/kpis
+
+Write path (transactional outbox):
+    ORM listeners on Event and Form queue a change when an event or form is
+    inserted or soft-deleted, or an event's status changes; after the flush
+    the matching record_* helper adds a dbo.KpiOutbox delta row to the SAME
+    session, so a rolled-back write never produces a delta and a committed
+    one always does. Lead submissions are bulk inserts and write their
+    outbox rows alongside (submission_outbox_rows()). Writes that bypass the
+    ORM call the record_* helpers directly.
+
+Fold path (micro-batch):
+    process_kpi_outbox() claims up to KPI_OUTBOX_BATCH_SIZE outbox rows
+    (UPDLOCK/READPAST on SQL Server, so concurrent workers skip each other's
+    rows), sums them in memory per company, per event and per company-day,
+    applies one UPDATE batch and one INSERT batch per rollup table, and deletes
+    the claimed rows - all in one transaction. Submission deltas also carry
+    their FormID, so the same fold applies one aggregated counter UPDATE per
+    form (Form.TotalSubmissions, ProductionLeadsCollected, DemoLeadsCollected,
+    LastSubmissionDate) and per event (Event.TotalSubmissions) instead of one
+    per lead. KpiRollupWorker runs it every KPI_OUTBOX_FLUSH_INTERVAL_SECONDS
+    and drains the backlog before sleeping.
+
+Read path:
+    get_kpi_summary() sums dbo.CompanyKpiRollup rows for the requested
+    companies: one primary key seek per company, independent of how many
+    events, forms or leads exist.
+
+Freshness bound:
+    A committed change shows on the dashboard (and in the Form/Event
+    counters) within KPI_OUTBOX_FLUSH_INTERVAL_SECONDS plus the time to fold
+    the backlog
+    (a 5,000-delta batch folds in well under a second). get_outbox_lag_seconds()
+    reports the age of the oldest unfolded delta for monitoring.
+
+Drift repair:
+    rebuild_kpi_rollups() recomputes company and event totals from the Event
+    and Form tables (migration 020 backfills with the same definitions).
+"""
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, case, event, func, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from common.database import SessionLocal
+from common.ref_data_cache import ref_data_cache
+from common.logger import get_logger
+from models.event import Event
+from models.form import Form
+from models.kpi_rollup import CompanyKpiRollup, EventKpiRollup, CompanyDailyKpiRollup, KpiOutbox
+
+logger = get_logger(__name__)
+
+
+KPI_ROLLUP_WORKER_ENABLED = os.getenv("KPI_ROLLUP_WORKER_ENABLED", "true").lower() == "true"
+KPI_OUTBOX_FLUSH_INTERVAL_SECONDS = float(os.getenv("KPI_OUTBOX_FLUSH_INTERVAL_SECONDS", "10"))
+KPI_OUTBOX_BATCH_SIZE = int(os.getenv("KPI_OUTBOX_BATCH_SIZE", "5000"))
+
+# Event statuses counted as "active" (live and accepting forms)
+ACTIVE_EVENT_STATUS_CODES = frozenset({"PUBLISHED"})
+
+# Keeps IN lists well under SQL Server's 2,100 parameter limit
+_IN_CHUNK_SIZE = 1000
+
+# Rollup column -> KpiOutbox delta column
+_COMPANY_FIELDS = {
+    "TotalForms": "FormsDelta",
+    "TotalEvents": "EventsDelta",
+    "ActiveEvents": "ActiveEventsDelta",
+    "TotalSubmissions": "SubmissionsDelta",
+    "ProductionLeads": "ProductionLeadsDelta",
+    "DemoLeads": "DemoLeadsDelta",
+}
+_EVENT_FIELDS = {
+    "TotalForms": "FormsDelta",
+    "TotalSubmissions": "SubmissionsDelta",
+    "ProductionLeads": "ProductionLeadsDelta",
+    "DemoLeads": "DemoLeadsDelta",
+}
+_DAILY_FIELDS = {
+    "FormsCreated": "FormsDelta",
+    "EventsCreated": "EventsDelta",
+    "TotalSubmissions": "SubmissionsDelta",
+    "ProductionLeads": "ProductionLeadsDelta",
+    "DemoLeads": "DemoLeadsDelta",
+}
+
+
+def _chunks(items: Sequence, size: int = _IN_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ----------------------------------------------------------------------------
+# Write path
+# ----------------------------------------------------------------------------
+
+def is_active_event_status(db: Session, event_status_id: Optional[int]) -> bool:
+    """Whether an EventStatusID counts towards activeEvents (reference data cached)"""
+    option = ref_data_cache.get_option(db, "event_status", event_status_id)
+    return option is not None and option.code in ACTIVE_EVENT_STATUS_CODES
+
+
+def record_kpi_delta(
+    db: Session,
+    company_id: int,
+    *,
+    event_id: Optional[int] = None,
+    form_id: Optional[int] = None,
+    occurred_at: Optional[datetime] = None,
+    forms: int = 0,
+    events: int = 0,
+    active_events: int = 0,
+    submissions: int = 0,
+    production_leads: int = 0,
+    demo_leads: int = 0
+) -> None:
+    """
+    Queue a KPI delta in the caller's transaction (applied by the KPI worker).
+
+    Args:
+        db: Session performing the write (not committed here)
+        company_id: Company the change belongs to
+        event_id: Event the change belongs to, if any
+        form_id: Form whose submission counters change, if any
+        occurred_at: When the change happened (UTC, defaults to now) - picks the daily bucket
+        forms / events / active_events: Count changes
+        submissions / production_leads / demo_leads: Submission count changes
+    """
+    if not any((forms, events, active_events, submissions, production_leads, demo_leads)) and event_id is None:
+        return
+    occurred_at = occurred_at or datetime.utcnow()
+    db.add(KpiOutbox(
+        CompanyID=company_id,
+        EventID=event_id,
+        FormID=form_id,
+        MetricDate=occurred_at.date(),
+        LastOccurredDate=occurred_at if submissions else None,
+        FormsDelta=forms,
+        EventsDelta=events,
+        ActiveEventsDelta=active_events,
+        SubmissionsDelta=submissions,
+        ProductionLeadsDelta=production_leads,
+        DemoLeadsDelta=demo_leads
+    ))
+
+
+def record_event_created(db: Session, event: Event) -> None:
+    """Queue KPI deltas for a new event (call after flush so EventID is set)"""
+    record_kpi_delta(
+        db,
+        int(event.CompanyID),
+        event_id=int(event.EventID),
+        events=1,
+        active_events=1 if is_active_event_status(db, event.EventStatusID) else 0
+    )
+
+
+def record_event_status_changed(db: Session, event: Event, previous_status_id: int) -> None:
+    """Queue an activeEvents delta when an event moves in or out of an active status"""
+    change = int(is_active_event_status(db, event.EventStatusID)) - int(is_active_event_status(db, previous_status_id))
+    if change:
+        record_kpi_delta(db, int(event.CompanyID), active_events=change)
+
+
+def record_event_deleted(db: Session, event: Event) -> None:
+    """Queue KPI deltas for a soft-deleted event"""
+    record_kpi_delta(
+        db,
+        int(event.CompanyID),
+        events=-1,
+        active_events=-1 if is_active_event_status(db, event.EventStatusID) else 0
+    )
+
+
+def record_form_created(db: Session, form: Form) -> None:
+    """Queue KPI deltas for a new form"""
+    record_kpi_delta(
+        db,
+        int(form.CompanyID),
+        event_id=int(form.EventID) if form.EventID is not None else None,
+        forms=1
+    )
+
+
+def record_form_deleted(db: Session, form: Form) -> None:
+    """Queue KPI deltas for a soft-deleted form (leads already collected are kept)"""
+    record_kpi_delta(
+        db,
+        int(form.CompanyID),
+        event_id=int(form.EventID) if form.EventID is not None else None,
+        forms=-1
+    )
+
+
+def record_submissions(
+    db: Session,
+    company_id: int,
+    form_id: int,
+    event_id: Optional[int] = None,
+    *,
+    production: int = 0,
+    demo: int = 0,
+    occurred_at: Optional[datetime] = None
+) -> None:
+    """Queue submission count deltas for a form (production and demo leads)"""
+    record_kpi_delta(
+        db,
+        company_id,
+        event_id=event_id,
+        form_id=form_id,
+        occurred_at=occurred_at,
+        submissions=production + demo,
+        production_leads=production,
+        demo_leads=demo
+    )
+
+
+def submission_outbox_rows(
+    company_id: int,
+    form_id: int,
+    event_id: Optional[int],
+    submissions: Iterable[Tuple[datetime, bool]]
+) -> List[dict]:
+    """
+    Build KpiOutbox rows for a batch of submissions to one form.
+
+    One row per UTC day in the batch (not per lead), ready for a single
+    executemany INSERT alongside the submission rows.
+
+    Args:
+        company_id / form_id / event_id: Owning company, form and event
+        submissions: (submitted_at, is_demo) per submission
+
+    Returns:
+        KpiOutbox insert parameter dictionaries
+    """
+    days: Dict[date, dict] = {}
+    for submitted_at, is_demo in submissions:
+        row = days.setdefault(submitted_at.date(), {
+            "CompanyID": company_id,
+            "EventID": event_id,
+            "FormID": form_id,
+            "MetricDate": submitted_at.date(),
+            "LastOccurredDate": submitted_at,
+            "FormsDelta": 0,
+            "EventsDelta": 0,
+            "ActiveEventsDelta": 0,
+            "SubmissionsDelta": 0,
+            "ProductionLeadsDelta": 0,
+            "DemoLeadsDelta": 0,
+        })
+        row["SubmissionsDelta"] += 1
+        row["DemoLeadsDelta" if is_demo else "ProductionLeadsDelta"] += 1
+        row["LastOccurredDate"] = max(row["LastOccurredDate"], submitted_at)
+    return list(days.values())
+
+
+# ----------------------------------------------------------------------------
+# Fold path
+# ----------------------------------------------------------------------------
+
+def _apply_deltas(
+    db: Session,
+    model,
+    key_names: Tuple[str, ...],
+    deltas: Dict[tuple, Dict[str, int]],
+    extra: Optional[Dict[tuple, dict]] = None,
+    now: Optional[datetime] = None
+) -> None:
+    """UPDATE existing rollup rows by delta and INSERT missing ones (batched)"""
+    if not deltas:
+        return
+    table = model.__table__
+    key_columns = [table.c[name] for name in key_names]
+    keys = list(deltas)
+
+    # Superset lookup (per-column IN lists), exact keys filtered in Python
+    existing = set()
+    for chunk in _chunks(keys):
+        conditions = [
+            column.in_(sorted({key[i] for key in chunk}))
+            for i, column in enumerate(key_columns)
+        ]
+        for row in db.execute(select(*key_columns).where(and_(*conditions))):
+            existing.add(tuple(row))
+
+    fields = list(next(iter(deltas.values())))
+    now = now or datetime.utcnow()
+
+    updates = [
+        {
+            **{f"k_{name}": key[i] for i, name in enumerate(key_names)},
+            **{f"d_{field}": values[field] for field in fields},
+            "now": now,
+        }
+        for key, values in deltas.items() if key in existing
+    ]
+    if updates:
+        stmt = (
+            table.update()
+            .where(and_(*(table.c[name] == bindparam(f"k_{name}") for name in key_names)))
+            .values({
+                **{field: table.c[field] + bindparam(f"d_{field}") for field in fields},
+                "UpdatedDate": bindparam("now"),
+            })
+        )
+        db.execute(stmt, updates)
+
+    inserts = [
+        {
+            **dict(zip(key_names, key)),
+            **(extra or {}).get(key, {}),
+            **values,
+            "UpdatedDate": now,
+        }
+        for key, values in deltas.items() if key not in existing
+    ]
+    if inserts:
+        db.execute(table.insert(), inserts)
+
+
+def _apply_submission_counters(
+    db: Session,
+    per_form: Dict[int, dict],
+    per_event: Dict[int, int]
+) -> None:
+    """One aggregated counter UPDATE per touched form and event (batched)"""
+    if per_form:
+        form = Form.__table__
+        last = bindparam("last_submission")
+        db.execute(
+            form.update()
+            .where(form.c.FormID == bindparam("form_id"))
+            .values(
+                TotalSubmissions=form.c.TotalSubmissions + bindparam("d_total"),
+                ProductionLeadsCollected=form.c.ProductionLeadsCollected + bindparam("d_production"),
+                DemoLeadsCollected=form.c.DemoLeadsCollected + bindparam("d_demo"),
+                LastSubmissionDate=case(
+                    (or_(form.c.LastSubmissionDate.is_(None), form.c.LastSubmissionDate < last), last),
+                    else_=form.c.LastSubmissionDate
+                ),
+            ),
+            [{"form_id": form_id, **values} for form_id, values in per_form.items()]
+        )
+    if per_event:
+        event = Event.__table__
+        db.execute(
+            event.update()
+            .where(event.c.EventID == bindparam("event_id"))
+            .values(TotalSubmissions=event.c.TotalSubmissions + bindparam("d_total")),
+            [{"event_id": event_id, "d_total": total} for event_id, total in per_event.items()]
+        )
+
+
+def process_kpi_outbox(db: Session, batch_size: int = KPI_OUTBOX_BATCH_SIZE) -> int:
+    """
+    Fold one batch of outbox deltas into the rollup tables and commit.
+
+    Args:
+        db: Database session (committed on success)
+        batch_size: Maximum outbox rows to claim
+
+    Returns:
+        Number of outbox rows processed (0 when the outbox is empty)
+    """
+    stmt = (
+        select(
+            KpiOutbox.KpiOutboxID,
+            KpiOutbox.CompanyID,
+            KpiOutbox.EventID,
+            KpiOutbox.FormID,
+            KpiOutbox.MetricDate,
+            KpiOutbox.LastOccurredDate,
+            *(getattr(KpiOutbox, column) for column in _COMPANY_FIELDS.values())
+        )
+        .order_by(KpiOutbox.KpiOutboxID)
+        .limit(batch_size)
+        .with_hint(KpiOutbox, "WITH (UPDLOCK, READPAST, ROWLOCK)", "mssql")
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    company: Dict[tuple, Dict[str, int]] = {}
+    per_event: Dict[tuple, Dict[str, int]] = {}
+    event_companies: Dict[tuple, dict] = {}
+    daily: Dict[tuple, Dict[str, int]] = {}
+    form_counters: Dict[int, dict] = {}
+    event_counters: Dict[int, int] = {}
+
+    def fold(target: Dict[tuple, Dict[str, int]], key: tuple, fields: Dict[str, str], row) -> None:
+        totals = target.setdefault(key, dict.fromkeys(fields, 0))
+        for field, column in fields.items():
+            totals[field] += getattr(row, column)
+
+    for row in rows:
+        fold(company, (row.CompanyID,), _COMPANY_FIELDS, row)
+        if any(getattr(row, column) for column in _DAILY_FIELDS.values()):
+            fold(daily, (row.CompanyID, row.MetricDate), _DAILY_FIELDS, row)
+        if row.EventID is not None:
+            fold(per_event, (row.EventID,), _EVENT_FIELDS, row)
+            event_companies[(row.EventID,)] = {"CompanyID": row.CompanyID}
+        if row.SubmissionsDelta:
+            if row.FormID is not None:
+                counters = form_counters.setdefault(row.FormID, {
+                    "d_total": 0, "d_production": 0, "d_demo": 0, "last_submission": row.LastOccurredDate
+                })
+                counters["d_total"] += row.SubmissionsDelta
+                counters["d_production"] += row.ProductionLeadsDelta
+                counters["d_demo"] += row.DemoLeadsDelta
+                if row.LastOccurredDate is not None and (
+                    counters["last_submission"] is None or row.LastOccurredDate > counters["last_submission"]
+                ):
+                    counters["last_submission"] = row.LastOccurredDate
+            if row.EventID is not None:
+                event_counters[row.EventID] = event_counters.get(row.EventID, 0) + row.SubmissionsDelta
+
+    now = datetime.utcnow()
+    _apply_deltas(db, CompanyKpiRollup, ("CompanyID",), company, now=now)
+    _apply_deltas(db, EventKpiRollup, ("EventID",), per_event, extra=event_companies, now=now)
+    _apply_deltas(db, CompanyDailyKpiRollup, ("CompanyID", "MetricDate"), daily, now=now)
+    _apply_submission_counters(db, form_counters, event_counters)
+
+    outbox = KpiOutbox.__table__
+    for chunk in _chunks([row.KpiOutboxID for row in rows]):
+        db.execute(outbox.delete().where(outbox.c.KpiOutboxID.in_(chunk)))
+
+    db.commit()
+    return len(rows)
+
+
+def drain_kpi_outbox(db: Session, batch_size: int = KPI_OUTBOX_BATCH_SIZE) -> int:
+    """Fold batches until the outbox is empty; returns total rows processed"""
+    total = 0
+    while True:
+        processed = process_kpi_outbox(db, batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
+
+
+def get_outbox_lag_seconds(db: Session) -> float:
+    """Age of the oldest unfolded delta in seconds (0 when the outbox is empty)"""
+    oldest = db.execute(select(func.min(KpiOutbox.CreatedDate))).scalar()
+    if oldest is None:
+        return 0.0
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+    return max((datetime.utcnow() - oldest).total_seconds(), 0.0)
+
+
+def rebuild_kpi_rollups(db: Session, company_ids: Iterable[int]) -> None:
+    """
+    Recompute company and event rollups from Event/Form.
+
+    The outbox is drained (and committed) first so Form submission counters
+    are current; the recompute itself is left for the caller to commit.
+    Run while writes for these companies are quiet; daily rows are left
+    alone (submission history is not derivable from Form counters).
+    """
+    ids = sorted(set(company_ids))
+    if not ids:
+        return
+    drain_kpi_outbox(db)
+    active_status_ids = [
+        option.id for option in ref_data_cache.get_table(db, "event_status").values()
+        if option.code in ACTIVE_EVENT_STATUS_CODES
+    ]
+    now = datetime.utcnow()
+
+    for chunk in _chunks(ids):
+        for model in (CompanyKpiRollup, EventKpiRollup):
+            table = model.__table__
+            db.execute(table.delete().where(table.c.CompanyID.in_(chunk)))
+
+        totals = {
+            company_id: {"CompanyID": company_id, "UpdatedDate": now, **dict.fromkeys(_COMPANY_FIELDS, 0)}
+            for company_id in chunk
+        }
+        event_rows = db.execute(
+            select(
+                Event.CompanyID,
+                func.count(Event.EventID),
+                func.sum(case((Event.EventStatusID.in_(active_status_ids), 1), else_=0)),
+            )
+            .where(Event.CompanyID.in_(chunk), Event.IsDeleted == False)  # noqa: E712
+            .group_by(Event.CompanyID)
+        ).all()
+        for company_id, event_count, active_count in event_rows:
+            totals[company_id]["TotalEvents"] = int(event_count)
+            totals[company_id]["ActiveEvents"] = int(active_count or 0)
+
+        form_rows = db.execute(
+            select(
+                Form.CompanyID,
+                func.sum(case((Form.IsDeleted == False, 1), else_=0)),  # noqa: E712
+                func.sum(Form.TotalSubmissions),
+                func.sum(Form.ProductionLeadsCollected),
+                func.sum(Form.DemoLeadsCollected),
+            )
+            .where(Form.CompanyID.in_(chunk))
+            .group_by(Form.CompanyID)
+        ).all()
+        for company_id, form_count, submissions, production, demo in form_rows:
+            totals[company_id].update(
+                TotalForms=int(form_count or 0),
+                TotalSubmissions=int(submissions or 0),
+                ProductionLeads=int(production or 0),
+                DemoLeads=int(demo or 0),
+            )
+        db.execute(CompanyKpiRollup.__table__.insert(), list(totals.values()))
+
+        per_event = db.execute(
+            select(
+                Event.EventID,
+                Event.CompanyID,
+                func.sum(case((Form.IsDeleted == False, 1), else_=0)),  # noqa: E712
+                func.sum(Form.TotalSubmissions),
+                func.sum(Form.ProductionLeadsCollected),
+                func.sum(Form.DemoLeadsCollected),
+            )
+            .outerjoin(Form, Form.EventID == Event.EventID)
+            .where(Event.CompanyID.in_(chunk), Event.IsDeleted == False)  # noqa: E712
+            .group_by(Event.EventID, Event.CompanyID)
+        ).all()
+        if per_event:
+            db.execute(EventKpiRollup.__table__.insert(), [
+                {
+                    "EventID": event_id,
+                    "CompanyID": company_id,
+                    "TotalForms": int(form_count or 0),
+                    "TotalSubmissions": int(submissions or 0),
+                    "ProductionLeads": int(production or 0),
+                    "DemoLeads": int(demo or 0),
+                    "UpdatedDate": now,
+                }
+                for event_id, company_id, form_count, submissions, production, demo in per_event
+            ])
+
+
+# ----------------------------------------------------------------------------
+# Read path
+# ----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class KpiSummary:
+    """
+    Dashboard KPIs summed across a set of companies.
+
+    Attributes:
+        company_ids: Companies included
+        total_forms: Forms not deleted
+        total_leads: Production leads (demo submissions excluded)
+        active_events: Events in an active status
+        total_events: Events not deleted
+        total_submissions: Production + demo submissions
+        demo_leads: Demo submissions
+    """
+    company_ids: Tuple[int, ...]
+    total_forms: int = 0
+    total_leads: int = 0
+    active_events: int = 0
+    total_events: int = 0
+    total_submissions: int = 0
+    demo_leads: int = 0
+
+    def to_response(self) -> dict:
+        """Response body for GET /api/dashboard/kpis"""
+        return {
+            "totalForms": self.total_forms,
+            "totalLeads": self.total_leads,
+            "activeEvents": self.active_events,
+            "companyIds": list(self.company_ids),
+        }
+
+
+def _summary_statement(company_ids: Sequence[int]):
+    return select(
+        func.coalesce(func.sum(CompanyKpiRollup.TotalForms), 0),
+        func.coalesce(func.sum(CompanyKpiRollup.ProductionLeads), 0),
+        func.coalesce(func.sum(CompanyKpiRollup.ActiveEvents), 0),
+        func.coalesce(func.sum(CompanyKpiRollup.TotalEvents), 0),
+        func.coalesce(func.sum(CompanyKpiRollup.TotalSubmissions), 0),
+        func.coalesce(func.sum(CompanyKpiRollup.DemoLeads), 0),
+    ).where(CompanyKpiRollup.CompanyID.in_(company_ids))
+
+
+def _summary_from_row(company_ids: Sequence[int], row) -> KpiSummary:
+    return KpiSummary(tuple(company_ids), *(int(value) for value in row))
+
+
+def get_kpi_summary(db: Session, company_ids: Sequence[int]) -> KpiSummary:
+    """Sum rollup rows for the given companies (one query, none when empty)"""
+    if not company_ids:
+        return KpiSummary(())
+    return _summary_from_row(company_ids, db.execute(_summary_statement(company_ids)).one())
+
+
+async def get_kpi_summary_async(db: AsyncSession, company_ids: Sequence[int]) -> KpiSummary:
+    """Async variant of get_kpi_summary()"""
+    if not company_ids:
+        return KpiSummary(())
+    return _summary_from_row(company_ids, (await db.execute(_summary_statement(company_ids))).one())
+
+
+def _daily_statement(company_ids: Sequence[int], start_date: date, end_date: date):
+    return (
+        select(
+            CompanyDailyKpiRollup.MetricDate,
+            func.sum(CompanyDailyKpiRollup.FormsCreated),
+            func.sum(CompanyDailyKpiRollup.EventsCreated),
+            func.sum(CompanyDailyKpiRollup.ProductionLeads),
+            func.sum(CompanyDailyKpiRollup.DemoLeads),
+        )
+        .where(
+            CompanyDailyKpiRollup.CompanyID.in_(company_ids),
+            CompanyDailyKpiRollup.MetricDate >= start_date,
+            CompanyDailyKpiRollup.MetricDate <= end_date,
+        )
+        .group_by(CompanyDailyKpiRollup.MetricDate)
+        .order_by(CompanyDailyKpiRollup.MetricDate)
+    )
+
+
+def _daily_from_rows(rows) -> List[dict]:
+    return [
+        {
+            "date": metric_date.isoformat() if isinstance(metric_date, date) else str(metric_date),
+            "formsCreated": int(forms or 0),
+            "eventsCreated": int(events or 0),
+            "leads": int(production or 0),
+            "demoLeads": int(demo or 0),
+        }
+        for metric_date, forms, events, production, demo in rows
+    ]
+
+
+def get_daily_kpis(db: Session, company_ids: Sequence[int], start_date: date, end_date: date) -> List[dict]:
+    """Per-day activity summed across companies (days without activity omitted)"""
+    if not company_ids:
+        return []
+    return _daily_from_rows(db.execute(_daily_statement(company_ids, start_date, end_date)).all())
+
+
+async def get_daily_kpis_async(
+    db: AsyncSession, company_ids: Sequence[int], start_date: date, end_date: date
+) -> List[dict]:
+    """Async variant of get_daily_kpis()"""
+    if not company_ids:
+        return []
+    return _daily_from_rows((await db.execute(_daily_statement(company_ids, start_date, end_date))).all())
+
+
+# ----------------------------------------------------------------------------
+# Automatic deltas (ORM events)
+# ----------------------------------------------------------------------------
+
+_PENDING_CHANGES_KEY = "kpi_pending_changes"
+
+
+def _soft_deleted(target) -> bool:
+    """IsDeleted set in this flush (an unloaded previous value counts as not deleted)"""
+    history = inspect(target).attrs.IsDeleted.history
+    return bool(target.IsDeleted) and history.has_changes() and not any(history.deleted)
+
+
+def _queue(target, *change) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_CHANGES_KEY, []).append(change)
+
+
+def _event_inserted(mapper, connection, target) -> None:
+    if not target.IsDeleted:
+        _queue(target, record_event_created, target)
+
+
+def _event_updated(mapper, connection, target) -> None:
+    deleted = _soft_deleted(target)
+    if target.IsDeleted and not deleted:
+        return
+    previous = inspect(target).attrs.EventStatusID.history.deleted
+    if previous and previous[0] != target.EventStatusID:
+        _queue(target, record_event_status_changed, target, previous[0])
+    if deleted:
+        _queue(target, record_event_deleted, target)
+
+
+def _form_inserted(mapper, connection, target) -> None:
+    if not target.IsDeleted:
+        _queue(target, record_form_created, target)
+
+
+def _form_updated(mapper, connection, target) -> None:
+    if _soft_deleted(target):
+        _queue(target, record_form_deleted, target)
+
+
+def _record_pending(session: Session, flush_context) -> None:
+    # The outbox rows are flushed by commit (or the next flush) in the same transaction
+    for recorder, target, *args in session.info.pop(_PENDING_CHANGES_KEY, ()):
+        recorder(session, target, *args)
+
+
+def _discard_pending(session: Session, previous_transaction) -> None:
+    if not session.in_transaction():
+        session.info.pop(_PENDING_CHANGES_KEY, None)
+
+
+event.listen(Event, "after_insert", _event_inserted)
+event.listen(Event, "after_update", _event_updated)
+event.listen(Form, "after_insert", _form_inserted)
+event.listen(Form, "after_update", _form_updated)
+event.listen(Session, "after_flush_postexec", _record_pending)
+event.listen(Session, "after_soft_rollback", _discard_pending)
+
+
+# ----------------------------------------------------------------------------
+# Background worker
+# ----------------------------------------------------------------------------
+
+class KpiRollupWorker:
+    """
+    Daemon thread that drains the KPI outbox every interval.
+
+    Started/stopped with the application (main.py). Failures are logged and
+    retried on the next tick; unfolded deltas stay in the outbox.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval_seconds: float = KPI_OUTBOX_FLUSH_INTERVAL_SECONDS,
+        batch_size: int = KPI_OUTBOX_BATCH_SIZE
+    ):
+        self._session_factory = session_factory
+        self._interval_seconds = interval_seconds
+        self._batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Drain the outbox once; returns rows processed"""
+        db = self._session_factory()
+        try:
+            return drain_kpi_outbox(db, self._batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                processed = self.run_once()
+                if processed:
+                    logger.debug(f"KPI rollup worker folded {processed} outbox rows")
+            except Exception as e:
+                logger.error(f"KPI rollup worker failed: {str(e)}", exc_info=True)
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kpi-rollup-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker to stop and wait for the current batch"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared instance
+kpi_rollup_worker = KpiRollupWorker()
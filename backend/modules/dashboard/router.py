@@ -1,17 +1,56 @@
 """
 Dashboard Router - Story 1.18
 Provides KPI data and dashboard analytics
+
+KPIs are read from pre-aggregated rollup tables (see kpi_service for the
+write path and freshness bound), so multi-company dashboards cost one
+indexed query regardless of lead volume.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from common.database import get_async_db
+from common.membership_cache import MembershipSnapshot
+from common.logger import get_logger
+from modules.auth.dependencies import get_current_user, get_current_memberships, CurrentUser
+from modules.companies.relationship_graph import get_visible_company_ids_async
+from modules.dashboard.kpi_service import get_kpi_summary_async, get_daily_kpis_async
 
-from common.database import get_db
-from modules.auth.dependencies import get_current_user, CurrentUser
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
+# Longest range served by the daily trend endpoint
+MAX_DAILY_RANGE_DAYS = 366
+
+
+async def _resolve_company_ids(
+    requested: List[int],
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot,
+    db: AsyncSession
+) -> List[int]:
+    """
+    Companies to aggregate: the requested IDs (each must be an active
+    membership or a company below one in the hierarchy), or every active
+    membership when none are requested.
+    """
+    active_ids = memberships.active_company_ids()
+    if not requested:
+        return sorted(active_ids)
+
+    company_ids = sorted(set(requested))
+    outside = set(company_ids) - active_ids
+    if outside and not outside <= await get_visible_company_ids_async(db, current_user.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have access to one or more of the requested companies"
+        )
+    return company_ids
+
 
 @router.get(
     "/kpis",
@@ -19,29 +58,82 @@ router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
     description="Returns aggregated KPI metrics for specified company IDs"
 )
 async def get_kpis(
-    companyIds: List[int] = [],
-    db: Session = Depends(get_db),
-    current_user: CurrentUser = Depends(get_current_user)
+    companyIds: List[int] = Query(default=[]),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
 ):
     """
     Get KPI data for selected companies.
     AC-1.18.8: KPI components update based on selected company.
-    
-    For Epic 1: Returns placeholder/zero values (events/forms in Epic 2)
+
+    Sums the per-company rollup rows for the selected companies (all active
+    memberships when none are selected).
     """
-    # TODO Epic 2: Query actual events/forms tables
-    # For now, return zeros (no events/forms exist yet)
-    
-    return JSONResponse(
-        status_code=200,
-        content={
-            "totalForms": 0,
-            "totalLeads": 0,
-            "activeEvents": 0,
-            "companyIds": companyIds
-        }
-    )
+    try:
+        company_ids = await _resolve_company_ids(companyIds, current_user, memberships, db)
+        summary = await get_kpi_summary_async(db, company_ids)
 
+        return JSONResponse(status_code=200, content=summary.to_response())
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to load KPIs for user {current_user.user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to load dashboard KPIs"
+        )
+
+
+@router.get(
+    "/kpis/daily",
+    summary="Get daily KPI trend for selected companies",
+    description="Returns per-day forms, events and leads for specified company IDs"
+)
+async def get_daily_kpis(
+    companyIds: List[int] = Query(default=[]),
+    startDate: Optional[date] = Query(default=None),
+    endDate: Optional[date] = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Get the daily KPI trend (defaults to the last 30 days, UTC).
+    Days without activity are omitted.
+    """
+    try:
+        end = endDate or datetime.utcnow().date()
+        start = startDate or end - timedelta(days=29)
+        if start > end:
+            raise ValueError("startDate must be on or before endDate")
+        if (end - start).days >= MAX_DAILY_RANGE_DAYS:
+            raise ValueError(f"Date range cannot exceed {MAX_DAILY_RANGE_DAYS} days")
 
+        company_ids = await _resolve_company_ids(companyIds, current_user, memberships, db)
+        days = await get_daily_kpis_async(db, company_ids, start, end)
 
+        return JSONResponse(
+            status_code=200,
+            content={
+                "startDate": start.isoformat(),
+                "endDate": end.isoformat(),
+                "companyIds": company_ids,
+                "days": days
+            }
+        )
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to load daily KPIs for user {current_user.user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to load dashboard KPIs"
+        )
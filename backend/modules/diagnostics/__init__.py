@@ -0,0 +1,7 @@
+"""
+Diagnostics Module
+Request correlation over the log tables (system admins)
+"""
+from .router import router  # type: ignore
+
+__all__ = ["router"]
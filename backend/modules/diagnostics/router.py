@@ -0,0 +1,178 @@
+"""
+Diagnostics Router
+Request traces across the log tables, on-demand payloads, log analyzer
+summaries and connection pool state (system admins)
+"""
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from common.database import LogSessionLocal
+from common.db_pool import get_pool_holders, get_pool_stats
+from common.log_analyzer import ENDPOINT_ORDERS, error_patterns, slowest_endpoints
+from common.log_diagnostics import fetch_payloads, iter_trace
+from common.rbac import require_system_admin
+from modules.auth.dependencies import get_current_user, CurrentUser
+from modules.diagnostics.schemas import ErrorPatternsResponse, PayloadResponse, SlowEndpointsResponse
+
+router = APIRouter(prefix="/api/admin/diagnostics", tags=["Diagnostics - Admin"])
+
+# Longest payload value returned unless the caller asks for more
+DEFAULT_PAYLOAD_CHARS = 20000
+
+
+def stream_trace(request_id: str, session_factory=LogSessionLocal, **kwargs) -> Iterator[bytes]:
+    """
+    NDJSON generator for StreamingResponse.
+
+    Owns its session: request-scoped dependencies are closed before a
+    streamed body is sent.
+    """
+    db = session_factory()
+    try:
+        for entry in iter_trace(db, request_id, **kwargs):
+            yield (json.dumps(entry.to_dict(), default=str) + "\n").encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get(
+    "/requests/{request_id}",
+    summary="Trace a request",
+    description=(
+        "Stream every log entry of a request (API request, errors, auth events, user actions, "
+        "integration events) as NDJSON, oldest first. Summary columns only; payloads are "
+        "fetched separately."
+    ),
+    response_class=StreamingResponse
+)
+def trace_request(
+    request_id: str,
+    since: Optional[datetime] = Query(None, description="Start of the time range (UTC); default: DIAGNOSTICS_LOOKBACK_HOURS ago"),
+    until: Optional[datetime] = Query(None, description="End of the time range (UTC), exclusive"),
+    archive: bool = Query(False, description="Include rows already moved to the retention archive"),
+    limit: Optional[int] = Query(None, ge=1, le=100000, description="Maximum entries"),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Stream one request's log entries"""
+    require_system_admin(current_user)
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be before until"
+        )
+    return StreamingResponse(
+        stream_trace(
+            request_id, LogSessionLocal, start=since, end=until, include_archive=archive, limit=limit
+        ),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get(
+    "/api-requests/{api_request_id}/payloads",
+    response_model=PayloadResponse,
+    summary="Get captured payloads",
+    description="Request/response payloads and headers of one log.ApiRequest row"
+)
+def get_payloads(
+    api_request_id: int,
+    max_chars: int = Query(DEFAULT_PAYLOAD_CHARS, ge=1, description="Truncate each value to this many characters"),
+    current_user: CurrentUser = Depends(get_current_user)
+) -> PayloadResponse:
+    """Load the payloads of one traced API request"""
+    require_system_admin(current_user)
+    db = LogSessionLocal()
+    try:
+        payloads = fetch_payloads(db, api_request_id, max_chars=max_chars)
+    finally:
+        db.close()
+    if payloads is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API request not found"
+        )
+    return PayloadResponse(
+        api_request_id=api_request_id,
+        request_payload=payloads["RequestPayload"],
+        response_payload=payloads["ResponsePayload"],
+        headers=payloads["Headers"]
+    )
+
+
+@router.get(
+    "/slow-endpoints",
+    response_model=SlowEndpointsResponse,
+    summary="Get slowest endpoints",
+    description=(
+        "Endpoints (route templates) ranked by slowest request, mean duration or slow-request "
+        "count, from the log analyzer's hourly summaries. Raw log tables are not read."
+    )
+)
+def get_slow_endpoints(
+    hours: float = Query(24, gt=0, le=24 * 90, description="Time window in hours (whole hours)"),
+    limit: int = Query(20, ge=1, le=500, description="Maximum endpoints"),
+    order_by: str = Query("max", description=f"Ranking: {', '.join(ENDPOINT_ORDERS)}"),
+    current_user: CurrentUser = Depends(get_current_user)
+) -> SlowEndpointsResponse:
+    """Top-N slowest endpoints"""
+    require_system_admin(current_user)
+    if order_by not in ENDPOINT_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"order_by must be one of {', '.join(ENDPOINT_ORDERS)}"
+        )
+    db = LogSessionLocal()
+    try:
+        endpoints = slowest_endpoints(db, hours=hours, limit=limit, order_by=order_by)
+    finally:
+        db.close()
+    return SlowEndpointsResponse(hours=hours, order_by=order_by, endpoints=endpoints)
+
+
+@router.get(
+    "/error-patterns",
+    response_model=ErrorPatternsResponse,
+    summary="Get error patterns",
+    description=(
+        "Most frequent error fingerprints (type, route, location and message template) from "
+        "the log analyzer's hourly summaries. Raw log tables are not read."
+    )
+)
+def get_error_patterns(
+    hours: float = Query(24, gt=0, le=24 * 90, description="Time window in hours (whole hours)"),
+    limit: int = Query(20, ge=1, le=500, description="Maximum patterns"),
+    current_user: CurrentUser = Depends(get_current_user)
+) -> ErrorPatternsResponse:
+    """Top-N error patterns"""
+    require_system_admin(current_user)
+    db = LogSessionLocal()
+    try:
+        patterns = error_patterns(db, hours=hours, limit=limit)
+    finally:
+        db.close()
+    return ErrorPatternsResponse(hours=hours, patterns=patterns)
+
+
+@router.get(
+    "/db-pool",
+    summary="Get connection pool state",
+    description=(
+        "Checkout latency, in-use/overflow counts, timeouts and long-held connections per pool, "
+        "plus the request IDs currently holding connections (acquiring stacks are only written "
+        "to the logs)"
+    )
+)
+def get_db_pool(current_user: CurrentUser = Depends(get_current_user)) -> dict:
+    """Connection pool statistics for pool sizing under load"""
+    require_system_admin(current_user)
+    stats = get_pool_stats()
+    for name, pool_stats in stats.items():
+        pool_stats["holders"] = [
+            {key: holder[key] for key in ("request_id", "thread", "held_ms")}
+            for holder in get_pool_holders(name)
+        ]
+    return {"pools": stats}
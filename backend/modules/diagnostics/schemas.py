@@ -0,0 +1,54 @@
+"""
+Diagnostics Schemas
+Pydantic models for captured payloads and log analyzer summaries
+"""
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class PayloadResponse(BaseModel):
+    """Captured payloads of one API request"""
+    api_request_id: int = Field(..., description="log.ApiRequest ID")
+    request_payload: Optional[str] = Field(None, description="Request body")
+    response_payload: Optional[str] = Field(None, description="Response body")
+    headers: Optional[str] = Field(None, description="Request headers (JSON)")
+
+
+class SlowEndpoint(BaseModel):
+    """Request statistics of one endpoint (route template)"""
+    method: str = Field(..., description="HTTP method")
+    path_template: str = Field(..., description="Route template, e.g. /api/companies/{company_id}/invitations")
+    request_count: int = Field(..., description="Requests in the window")
+    slow_count: int = Field(..., description="Requests at or over logging.slow_request_ms")
+    error_count: int = Field(..., description="5xx responses")
+    avg_duration_ms: float = Field(..., description="Mean duration")
+    max_duration_ms: int = Field(..., description="Slowest request duration")
+    slowest_request_id: Optional[str] = Field(None, description="RequestID of the slowest request (for the trace endpoint)")
+    slowest_at: Optional[datetime] = Field(None, description="When the slowest request was logged (UTC)")
+
+
+class SlowEndpointsResponse(BaseModel):
+    """Slowest endpoints over a time window"""
+    hours: float = Field(..., description="Window length in hours")
+    order_by: str = Field(..., description="max, avg or slow")
+    endpoints: List[SlowEndpoint]
+
+
+class ErrorPattern(BaseModel):
+    """One error fingerprint"""
+    fingerprint: str = Field(..., description="Hash of type, route, location and message template")
+    error_type: str = Field(..., description="Exception type")
+    path_template: Optional[str] = Field(None, description="Route template the error was raised on")
+    location: Optional[str] = Field(None, description="Innermost stack frame (file:function)")
+    message_template: str = Field(..., description="Error message with values replaced by placeholders")
+    count: int = Field(..., description="Occurrences in the window")
+    first_seen: datetime = Field(..., description="First occurrence in the window (UTC)")
+    last_seen: datetime = Field(..., description="Last occurrence (UTC)")
+    last_request_id: Optional[str] = Field(None, description="RequestID of the last occurrence")
+
+
+class ErrorPatternsResponse(BaseModel):
+    """Most frequent error patterns over a time window"""
+    hours: float = Field(..., description="Window length in hours")
+    patterns: List[ErrorPattern]
@@ -0,0 +1,7 @@
+"""
+Events Module
+Event search and listing, duplicate-event detection
+"""
+from .router import router  # type: ignore
+
+__all__ = ["router"]
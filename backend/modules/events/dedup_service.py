@@ -0,0 +1,548 @@
+"""
+Event Duplicate Detection
+Flags public events that duplicate an earlier listing (Event.IsDuplicate /
+Event.DuplicateEventID)
+
+Comparing a new event with every public event is O(n) per insert and
+O(n^2) for a backfill. Instead each public event gets a few blocking keys
+in dbo.EventBlockKey - hash(name token, week, city or geohash cell) - and
+is scored only against events sharing a key for its own or an adjacent
+week. Two listings of the same event share a distinctive name token, a
+place and (roughly) a date, so they land in a common block.
+
+Scoring (similarity()):
+- Name: token-set (Dice) similarity of normalized name tokens, minus the
+  city and numbers, tolerating typos; 0 when a word was replaced rather
+  than added or dropped. Below NAME_SIMILARITY_MIN the pair is never a
+  duplicate
+- Date: 1 on the same start time, falling to 0 at DATE_WINDOW_DAYS apart
+- Place: 1 for the same city or venues within SAME_PLACE_KM, 0.5 for the
+  same geohash cell
+
+Detection runs on insert/update through the ORM listeners at the bottom of
+this module; backfill_duplicates() rebuilds keys and flags for all events.
+"""
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, delete, event, false, inspect, select
+from sqlalchemy.orm import Session
+
+from common import geohash
+from models.event import Event
+from models.event_block_key import EventBlockKey
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Score at or above which an event is flagged as a duplicate
+EVENT_DUPLICATE_THRESHOLD = float(os.getenv("EVENT_DUPLICATE_THRESHOLD", "0.8"))
+
+NAME_SIMILARITY_MIN = 0.75
+# Shortest tokens for which a one-character difference counts as a typo
+TYPO_MIN_LENGTH = 5
+NAME_WEIGHT, DATE_WEIGHT, PLACE_WEIGHT = 0.6, 0.25, 0.15
+DATE_WINDOW_DAYS = 7
+SAME_PLACE_KM = 2.0
+
+# Longest (most distinctive) name tokens used for blocking
+MAX_BLOCK_TOKENS = 4
+# ~39km x 20km cells
+BLOCK_GEOHASH_PRECISION = 4
+
+# IN-list size per query (SQL Server allows 2100 parameters)
+KEY_CHUNK_SIZE = 1000
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "by", "de", "for", "in", "la", "of", "on", "the", "to", "with",
+})
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _fold(text: Optional[str]) -> str:
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+@lru_cache(maxsize=65536)
+def name_tokens(name: Optional[str]) -> FrozenSet[str]:
+    """Distinct normalized name tokens (accents, punctuation and stopwords removed)"""
+    return frozenset(
+        token for token in _NON_ALNUM.split(_fold(name))
+        if len(token) > 1 and token not in _STOPWORDS
+    )
+
+
+@lru_cache(maxsize=4096)
+def normalize_city(city: Optional[str]) -> Optional[str]:
+    """Lower-case, accent-free, single-spaced city name (None if empty)"""
+    return " ".join(token for token in _NON_ALNUM.split(_fold(city)) if token) or None
+
+
+@dataclass(frozen=True)
+class EventFingerprint:
+    """What duplicate detection compares"""
+    event_id: Optional[int]
+    tokens: FrozenSet[str]
+    start: datetime
+    city: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    duplicate_of: Optional[int] = None
+
+    @classmethod
+    def of(cls, event_id, name, start, city, latitude, longitude, duplicate_of=None) -> "EventFingerprint":
+        city = normalize_city(city)
+        # The city and year ("Sydney ... 2025") say nothing the place and date
+        # don't, and would make "Fintech Summit Sydney" look like "Health Summit Sydney"
+        tokens = name_tokens(name)
+        distinctive = frozenset(t for t in tokens if not t.isdigit() and t not in (city or "").split())
+        return cls(
+            event_id=event_id,
+            tokens=distinctive or tokens,
+            start=start,
+            city=city,
+            latitude=float(latitude) if latitude is not None else None,
+            longitude=float(longitude) if longitude is not None else None,
+            duplicate_of=duplicate_of
+        )
+
+    @property
+    def has_coordinates(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    @property
+    def geocell(self) -> Optional[str]:
+        if not self.has_coordinates:
+            return None
+        return geohash.encode(self.latitude, self.longitude, BLOCK_GEOHASH_PRECISION)
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    """Best earlier event matching a fingerprint"""
+    matched_event_id: int
+    original_event_id: int
+    score: float
+
+
+# ----------------------------------------------------------------------------
+# Blocking and scoring
+# ----------------------------------------------------------------------------
+
+def _week(start: datetime) -> int:
+    return start.date().toordinal() // 7
+
+
+def _hash_key(token: str, week: int, place: str) -> int:
+    digest = hashlib.blake2b(f"{token}|{week}|{place}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _block_parts(fingerprint: EventFingerprint) -> Tuple[List[str], List[str]]:
+    tokens = sorted(fingerprint.tokens, key=lambda t: (-len(t), t))[:MAX_BLOCK_TOKENS]
+    places = []
+    if fingerprint.city:
+        places.append(f"c:{fingerprint.city}")
+    if fingerprint.has_coordinates:
+        places.append(f"g:{fingerprint.geocell}")
+    return tokens, places or ["-"]
+
+
+def blocking_keys(fingerprint: EventFingerprint) -> Set[int]:
+    """Keys stored for an event (its own week)"""
+    tokens, places = _block_parts(fingerprint)
+    week = _week(fingerprint.start)
+    return {_hash_key(token, week, place) for token in tokens for place in places}
+
+
+def probe_keys(fingerprint: EventFingerprint) -> Set[int]:
+    """Keys to look up for an event (its own and the adjacent weeks)"""
+    tokens, places = _block_parts(fingerprint)
+    week = _week(fingerprint.start)
+    return {
+        _hash_key(token, w, place)
+        for token in tokens for place in places for w in (week - 1, week, week + 1)
+    }
+
+
+def _one_edit_apart(x: str, y: str) -> bool:
+    if min(len(x), len(y)) < TYPO_MIN_LENGTH or abs(len(x) - len(y)) > 1:
+        return False
+    if len(x) > len(y):
+        x, y = y, x
+    i = 0
+    while i < len(x) and x[i] == y[i]:
+        i += 1
+    if len(x) == len(y):
+        return x[i + 1:] == y[i + 1:]
+    return x[i:] == y[i + 1:]
+
+
+def name_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Token-set (Dice) similarity of two names' tokens (0..1).
+
+    Tokens one typo apart count as shared. A re-listing adds or drops
+    words; when each name has a word the other lacks ("Design Forum" vs
+    "Music Forum") the events differ, so the similarity is 0.
+    """
+    if not a or not b:
+        return 0.0
+    only_a, only_b = sorted(a - b), set(b - a)
+    typos = 0
+    for token in only_a:
+        match = next((t for t in sorted(only_b) if _one_edit_apart(token, t)), None)
+        if match is not None:
+            only_b.discard(match)
+            typos += 1
+    if len(only_a) > typos and only_b:
+        return 0.0
+    return 2 * (len(a & b) + typos) / (len(a) + len(b))
+
+
+def similarity(a: EventFingerprint, b: EventFingerprint) -> float:
+    """
+    Duplicate score between two events (0..1).
+
+    0 when the names are not similar enough, whatever the date and place.
+    """
+    name = name_similarity(a.tokens, b.tokens)
+    if name < NAME_SIMILARITY_MIN:
+        return 0.0
+
+    days = abs((a.start - b.start).total_seconds()) / 86400
+    date = max(0.0, 1 - days / DATE_WINDOW_DAYS)
+
+    place = 0.0
+    if a.city and a.city == b.city:
+        place = 1.0
+    elif a.has_coordinates and b.has_coordinates:
+        if geohash.haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) <= SAME_PLACE_KM:
+            place = 1.0
+        elif a.geocell == b.geocell:
+            place = 0.5
+
+    return round(NAME_WEIGHT * name + DATE_WEIGHT * date + PLACE_WEIGHT * place, 4)
+
+
+def _best_match(
+    fingerprint: EventFingerprint,
+    candidates: Iterable[EventFingerprint],
+    originals: Optional[Dict[int, Optional[int]]] = None
+) -> Tuple[Optional[DuplicateMatch], int]:
+    """(best match at or above the threshold, pairs scored)"""
+    best = None
+    compared = 0
+    for candidate in candidates:
+        compared += 1
+        score = similarity(fingerprint, candidate)
+        if score < EVENT_DUPLICATE_THRESHOLD:
+            continue
+        if best is None or score > best.score or (score == best.score and candidate.event_id < best.matched_event_id):
+            original = candidate.duplicate_of
+            if originals is not None and candidate.event_id in originals:
+                original = originals[candidate.event_id]
+            best = DuplicateMatch(candidate.event_id, original or candidate.event_id, score)
+    return best, compared
+
+
+# ----------------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------------
+
+_FINGERPRINT_COLUMNS = [
+    Event.EventID, Event.Name, Event.StartDateTime, Event.City,
+    Event.Latitude, Event.Longitude, Event.DuplicateEventID,
+]
+
+
+def _fingerprint(row) -> EventFingerprint:
+    return EventFingerprint.of(
+        row.EventID, row.Name, row.StartDateTime, row.City, row.Latitude, row.Longitude, row.DuplicateEventID
+    )
+
+
+def _listed_rows(rows) -> list:
+    """Rows of events taking part in duplicate detection (public, not deleted)"""
+    return [row for row in rows if row.IsPublic and not row.IsDeleted]
+
+
+def _candidate_statement(keys: Iterable[int], exclude_event_id: Optional[int] = None, before: bool = True):
+    # Driven from the block keys (one primary-key seek per key). Only listed
+    # events have keys; IsPublic/IsDeleted are re-checked by _listed_rows()
+    # rather than in SQL, where they tempt planners into scanning
+    # IX_Event_Public_Start instead
+    statement = (
+        select(*_FINGERPRINT_COLUMNS, Event.IsPublic, Event.IsDeleted)
+        .select_from(EventBlockKey)
+        .join(Event, Event.EventID == EventBlockKey.EventID)
+        .where(EventBlockKey.BlockKey.in_(list(keys)))
+        .distinct()
+    )
+    if exclude_event_id is not None:
+        statement = statement.where(
+            Event.EventID < exclude_event_id if before else Event.EventID != exclude_event_id
+        )
+    return statement
+
+
+def find_duplicate(db, fingerprint: EventFingerprint) -> Optional[DuplicateMatch]:
+    """
+    Best earlier public event that the fingerprint duplicates.
+
+    Args:
+        db: Session or Connection
+        fingerprint: Event being checked (event_id None for a new event)
+
+    Returns:
+        DuplicateMatch, or None
+    """
+    rows = db.execute(_candidate_statement(probe_keys(fingerprint), fingerprint.event_id))
+    candidates = [_fingerprint(row) for row in _listed_rows(rows)]
+    return _best_match(fingerprint, candidates)[0]
+
+
+def list_duplicate_candidates(db: Session, event_id: int, limit: int = 20) -> Optional[List[Tuple[object, float]]]:
+    """
+    Public events resembling an event, best first (for review).
+
+    Returns:
+        [(row, score)], or None if the event does not exist
+    """
+    row = db.execute(
+        select(*_FINGERPRINT_COLUMNS).where(Event.EventID == event_id, Event.IsDeleted == false())
+    ).first()
+    if row is None:
+        return None
+    fingerprint = _fingerprint(row)
+    rows = db.execute(_candidate_statement(probe_keys(fingerprint), event_id, before=False)).all()
+    scored = [(candidate, similarity(fingerprint, _fingerprint(candidate))) for candidate in _listed_rows(rows)]
+    scored = [(candidate, score) for candidate, score in scored if score > 0]
+    scored.sort(key=lambda pair: (-pair[1], pair[0].EventID))
+    return scored[:limit]
+
+
+# ----------------------------------------------------------------------------
+# Backfill
+# ----------------------------------------------------------------------------
+
+@dataclass
+class DedupBackfillStats:
+    """backfill_duplicates() outcome"""
+    events: int = 0
+    comparisons: int = 0
+    duplicates: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+
+
+def _chunks(values: List, size: int = KEY_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _key_rows(fingerprint: EventFingerprint) -> List[dict]:
+    return [{"BlockKey": key, "EventID": fingerprint.event_id} for key in blocking_keys(fingerprint)]
+
+
+def rebuild_block_keys(db: Session, batch_size: int = 500) -> int:
+    """
+    Recompute dbo.EventBlockKey for every event (commits per batch).
+
+    Returns:
+        Public events keyed
+    """
+    table = EventBlockKey.__table__
+    keyed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(*_FINGERPRINT_COLUMNS, Event.IsPublic, Event.IsDeleted)
+            .where(Event.EventID > last_id)
+            .order_by(Event.EventID)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return keyed
+
+        ids = [row.EventID for row in rows]
+        db.execute(delete(table).where(table.c.EventID.in_(ids)))
+        keys = [key for row in rows if row.IsPublic and not row.IsDeleted for key in _key_rows(_fingerprint(row))]
+        if keys:
+            db.execute(table.insert(), keys)
+        db.commit()
+        keyed += sum(1 for row in rows if row.IsPublic and not row.IsDeleted)
+        last_id = ids[-1]
+
+
+_bind_event_id = bindparam("b_event_id")
+_bind_duplicate_of = bindparam("b_duplicate_of")
+_bind_is_duplicate = bindparam("b_is_duplicate")
+
+
+def backfill_duplicates(db: Session, batch_size: int = 500) -> DedupBackfillStats:
+    """
+    Rebuild blocking keys, then re-flag every public event (commits per batch).
+
+    Events are processed in EventID order and only matched against earlier
+    events, so the first listing stays the original and later listings point
+    at it (chains collapse to the first event). Existing IsDuplicate /
+    DuplicateEventID values on public events are overwritten.
+
+    Returns:
+        DedupBackfillStats
+    """
+    began = time.perf_counter()
+    stats = DedupBackfillStats()
+    rebuild_block_keys(db, batch_size)
+
+    event_table = Event.__table__
+    key_table = EventBlockKey.__table__
+    last_id = 0
+    while True:
+        scanned = db.execute(
+            select(*_FINGERPRINT_COLUMNS, Event.IsDuplicate, Event.IsPublic, Event.IsDeleted)
+            .where(Event.EventID > last_id)
+            .order_by(Event.EventID)
+            .limit(batch_size)
+        ).all()
+        if not scanned:
+            break
+        last_id = scanned[-1].EventID
+        rows = _listed_rows(scanned)
+        if not rows:
+            continue
+        batch = [_fingerprint(row) for row in rows]
+        probes = {fp.event_id: probe_keys(fp) for fp in batch}
+
+        # Earlier block members for every probe key of the batch
+        members: Dict[int, Set[int]] = {}
+        all_keys = sorted(set().union(*probes.values()))
+        for chunk in _chunks(all_keys):
+            for key, event_id in db.execute(
+                select(key_table.c.BlockKey, key_table.c.EventID)
+                .where(key_table.c.BlockKey.in_(chunk), key_table.c.EventID < last_id)
+            ):
+                members.setdefault(key, set()).add(event_id)
+
+        # Candidate fingerprints (batch rows are already loaded)
+        known = {fp.event_id: fp for fp in batch}
+        wanted = sorted({
+            event_id for keys in probes.values() for key in keys for event_id in members.get(key, ())
+        } - known.keys())
+        for chunk in _chunks(wanted):
+            candidates = db.execute(
+                select(*_FINGERPRINT_COLUMNS, Event.IsPublic, Event.IsDeleted).where(Event.EventID.in_(chunk))
+            )
+            for row in _listed_rows(candidates):
+                known[row.EventID] = _fingerprint(row)
+
+        originals: Dict[int, Optional[int]] = {}
+        updates = []
+        for fp, row in zip(batch, rows):
+            candidate_ids = {
+                event_id for key in probes[fp.event_id] for event_id in members.get(key, ())
+                if event_id < fp.event_id and event_id in known
+            }
+            match, compared = _best_match(fp, (known[i] for i in sorted(candidate_ids)), originals)
+            stats.comparisons += compared
+            original = match.original_event_id if match else None
+            originals[fp.event_id] = original
+            if match:
+                stats.duplicates += 1
+            if bool(row.IsDuplicate) != (match is not None) or row.DuplicateEventID != original:
+                updates.append({"b_event_id": fp.event_id, "b_duplicate_of": original, "b_is_duplicate": match is not None})
+
+        if updates:
+            db.execute(
+                event_table.update()
+                .where(event_table.c.EventID == _bind_event_id)
+                .values(IsDuplicate=_bind_is_duplicate, DuplicateEventID=_bind_duplicate_of),
+                updates
+            )
+        db.commit()
+        stats.events += len(rows)
+        stats.changed += len(updates)
+
+    stats.seconds = time.perf_counter() - began
+    logger.info(
+        f"Duplicate backfill: {stats.events} events, {stats.comparisons} comparisons, "
+        f"{stats.duplicates} duplicates ({stats.changed} changed) in {stats.seconds:.1f}s"
+    )
+    return stats
+
+
+# ----------------------------------------------------------------------------
+# Incremental detection
+# ----------------------------------------------------------------------------
+
+# Event fields that change an event's blocking keys or score
+_TRACKED = ("Name", "StartDateTime", "City", "Latitude", "Longitude", "IsPublic", "IsDeleted")
+
+
+def _changed(target, *attributes: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _is_listed(target) -> bool:
+    return bool(target.IsPublic) and not target.IsDeleted
+
+
+def _target_fingerprint(target) -> EventFingerprint:
+    return EventFingerprint.of(
+        target.EventID, target.Name, target.StartDateTime, target.City, target.Latitude, target.Longitude
+    )
+
+
+def _detect(connection, target) -> None:
+    match = find_duplicate(connection, _target_fingerprint(target))
+    target.IsDuplicate = match is not None
+    target.DuplicateEventID = match.original_event_id if match else None
+
+
+def _detect_on_insert(mapper, connection, target) -> None:
+    # An explicit DuplicateEventID (e.g. set by a reviewer or an import) wins
+    if _is_listed(target) and target.DuplicateEventID is None:
+        _detect(connection, target)
+
+
+def _detect_on_update(mapper, connection, target) -> None:
+    if not _changed(target, *_TRACKED) or _changed(target, "IsDuplicate", "DuplicateEventID"):
+        return
+    if _is_listed(target):
+        _detect(connection, target)
+
+
+def _key_on_insert(mapper, connection, target) -> None:
+    if not _is_listed(target):
+        return
+    rows = _key_rows(_target_fingerprint(target))
+    if rows:
+        connection.execute(EventBlockKey.__table__.insert(), rows)
+
+
+def _rekey_on_update(mapper, connection, target) -> None:
+    if not _changed(target, *_TRACKED):
+        return
+    table = EventBlockKey.__table__
+    connection.execute(delete(table).where(table.c.EventID == target.EventID))
+    _key_on_insert(mapper, connection, target)
+
+
+event.listen(Event, "before_insert", _detect_on_insert)
+event.listen(Event, "before_update", _detect_on_update)
+event.listen(Event, "after_insert", _key_on_insert)
+event.listen(Event, "after_update", _rekey_on_update)
@@ -0,0 +1,202 @@
+"""
+Events Router
+Event search and listing, duplicate review
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.database import get_async_db
+from common.membership_cache import MembershipSnapshot
+from common.rbac import belongs_to_company, require_company_access
+from common.logger import get_logger
+from modules.auth.dependencies import get_current_user, get_current_memberships, CurrentUser
+from models.event import Event
+from modules.events.schemas import DuplicateCandidateResponse, EventSummaryResponse
+from modules.events.dedup_service import list_duplicate_candidates
+from modules.events import search_service
+from modules.events.search_service import EventSearchFilter, GeoBox, GeoNear, parse_tags
+from schemas.base import CursorPage
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+def _summary(row, distance_km: Optional[float] = None) -> EventSummaryResponse:
+    return EventSummaryResponse(
+        event_id=row.EventID,
+        name=row.Name,
+        short_description=row.ShortDescription,
+        company_id=row.CompanyID,
+        start_date_time=row.StartDateTime,
+        end_date_time=row.EndDateTime,
+        timezone=row.TimezoneIdentifier,
+        venue_name=row.VenueName,
+        city=row.City,
+        state=row.State,
+        country_id=row.CountryID,
+        latitude=float(row.Latitude) if row.Latitude is not None else None,
+        longitude=float(row.Longitude) if row.Longitude is not None else None,
+        event_type_id=row.EventTypeID,
+        industry_id=row.IndustryID,
+        event_status_id=row.EventStatusID,
+        is_public=row.IsPublic,
+        tags=parse_tags(row.Tags),
+        distance_km=distance_km
+    )
+
+
+def _geo_filters(
+    min_lat: Optional[float], min_lon: Optional[float], max_lat: Optional[float], max_lon: Optional[float],
+    lat: Optional[float], lon: Optional[float], radius_km: Optional[float]
+):
+    box_values = [min_lat, min_lon, max_lat, max_lon]
+    box = None
+    if any(v is not None for v in box_values):
+        if any(v is None for v in box_values):
+            raise ValueError("A bounding box needs min_lat, min_lon, max_lat and max_lon")
+        box = GeoBox(min_lat, min_lon, max_lat, max_lon)
+
+    near_values = [lat, lon, radius_km]
+    near = None
+    if any(v is not None for v in near_values):
+        if any(v is None for v in near_values):
+            raise ValueError("A radius search needs lat, lon and radius_km")
+        near = GeoNear(lat, lon, radius_km)
+    return box, near
+
+
+@router.get(
+    "/search",
+    response_model=CursorPage[EventSummaryResponse],
+    summary="Search events",
+    description=(
+        "List events by date range, location, type, industry, tags and bounding box or radius, "
+        "ordered by start time. Public events only, unless company_id is one of your companies."
+    )
+)
+async def search_events(
+    company_id: Optional[int] = Query(None, description="Only this company's events (includes private events for members)"),
+    start_from: Optional[datetime] = Query(None, description="Starting at or after (UTC)"),
+    start_to: Optional[datetime] = Query(None, description="Starting before (UTC)"),
+    country_id: Optional[int] = Query(None, description="Country"),
+    state: Optional[str] = Query(None, max_length=100, description="State / region"),
+    city: Optional[str] = Query(None, max_length=100, description="City"),
+    event_type_id: Optional[int] = Query(None, description="Event type"),
+    industry_id: Optional[int] = Query(None, description="Industry"),
+    tags: List[str] = Query([], description="Events having all of these tags"),
+    min_lat: Optional[float] = Query(None, description="Bounding box south edge"),
+    min_lon: Optional[float] = Query(None, description="Bounding box west edge (may exceed max_lon across the antimeridian)"),
+    max_lat: Optional[float] = Query(None, description="Bounding box north edge"),
+    max_lon: Optional[float] = Query(None, description="Bounding box east edge"),
+    lat: Optional[float] = Query(None, description="Radius search centre latitude"),
+    lon: Optional[float] = Query(None, description="Radius search centre longitude"),
+    radius_km: Optional[float] = Query(None, description="Radius search distance (km)"),
+    cursor: Optional[str] = Query(None, description="Cursor from previous page (omit for first page)"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page (max 100)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Search events.
+
+    Every filter is served by an index (see search_service); pages are
+    keyset-paginated on (start time, event ID).
+    """
+    try:
+        box, near = _geo_filters(min_lat, min_lon, max_lat, max_lon, lat, lon, radius_km)
+        normalized_tags = parse_tags(",".join(tags))
+        include_private = company_id is not None and (
+            belongs_to_company(current_user, company_id) and memberships.has_active_membership(company_id)
+        )
+        search = EventSearchFilter(
+            company_id=company_id,
+            include_private=include_private,
+            start_from=start_from,
+            start_to=start_to,
+            country_id=country_id,
+            state=state,
+            city=city,
+            event_type_id=event_type_id,
+            industry_id=industry_id,
+            tags=tuple(normalized_tags),
+            box=box,
+            near=near
+        )
+
+        page = await db.run_sync(search_service.search_events, search, cursor, limit)
+        distances = page.distances_km or [None] * len(page.rows)
+        return CursorPage[EventSummaryResponse](
+            items=[_summary(row, distance) for row, distance in zip(page.rows, distances)],
+            next_cursor=page.next_cursor,
+            has_more=page.next_cursor is not None,
+            limit=limit
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to search events: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search events"
+        )
+
+
+@router.get(
+    "/{event_id}/duplicates",
+    response_model=List[DuplicateCandidateResponse],
+    summary="List possible duplicates of an event",
+    description="Public events resembling this one, best match first (for duplicate review)"
+)
+async def list_event_duplicates(
+    event_id: int,
+    limit: int = Query(20, ge=1, le=100, description="Maximum candidates"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Score an event against the public events in its duplicate-detection blocks.
+    """
+    try:
+        event = await db.get(Event, event_id)
+        if event is None or event.IsDeleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
+        if not event.IsPublic:
+            require_company_access(current_user, event.CompanyID, memberships)
+
+        candidates = await db.run_sync(list_duplicate_candidates, event_id, limit) or []
+        return [
+            DuplicateCandidateResponse(
+                event_id=row.EventID,
+                name=row.Name,
+                start_date_time=row.StartDateTime,
+                city=row.City,
+                is_duplicate=row.DuplicateEventID is not None,
+                duplicate_event_id=row.DuplicateEventID,
+                score=score
+            )
+            for row, score in candidates
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to list duplicates of event {event_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list duplicate events"
+        )
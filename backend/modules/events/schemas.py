@@ -0,0 +1,41 @@
+"""
+Event Schemas
+Pydantic models for event search results
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class EventSummaryResponse(BaseModel):
+    """Event search result"""
+    event_id: int = Field(..., description="Event ID")
+    name: str = Field(..., description="Event name")
+    short_description: Optional[str] = Field(None, description="Short description")
+    company_id: int = Field(..., description="Owning company")
+    start_date_time: datetime = Field(..., description="Start (UTC)")
+    end_date_time: Optional[datetime] = Field(None, description="End (UTC)")
+    timezone: Optional[str] = Field(None, description="IANA timezone of the venue")
+    venue_name: Optional[str] = Field(None, description="Venue")
+    city: Optional[str] = Field(None, description="City")
+    state: Optional[str] = Field(None, description="State / region")
+    country_id: Optional[int] = Field(None, description="Country")
+    latitude: Optional[float] = Field(None, description="Venue latitude")
+    longitude: Optional[float] = Field(None, description="Venue longitude")
+    event_type_id: Optional[int] = Field(None, description="Event type")
+    industry_id: Optional[int] = Field(None, description="Industry")
+    event_status_id: int = Field(..., description="Event status")
+    is_public: bool = Field(..., description="Listed publicly")
+    tags: List[str] = Field(default_factory=list, description="Normalized tags")
+    distance_km: Optional[float] = Field(None, description="Distance from the search point (radius searches)")
+
+
+class DuplicateCandidateResponse(BaseModel):
+    """Public event resembling another event"""
+    event_id: int = Field(..., description="Event ID")
+    name: str = Field(..., description="Event name")
+    start_date_time: datetime = Field(..., description="Start (UTC)")
+    city: Optional[str] = Field(None, description="City")
+    is_duplicate: bool = Field(..., description="Already flagged as a duplicate")
+    duplicate_event_id: Optional[int] = Field(None, description="Original event, when flagged")
+    score: float = Field(..., description="Duplicate score (0-1); flagged at or above the configured threshold")
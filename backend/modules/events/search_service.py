@@ -0,0 +1,376 @@
+"""
+Event Search Service
+Indexed event listing/search for GET /api/events/search
+
+Every query is ordered by (StartDateTime, EventID) and paginated with a
+keyset cursor (schemas.base.apply_keyset), so deep pages cost the same as
+the first. Filters map onto indexes from migration 024:
+- Equality filters + date range: IX_Event_{Public,Company,Location,Type,Industry}_Start
+- Tags: dbo.EventTag (Tag, EventID) seeks, one semi-join per tag, instead
+  of LIKE scans over Event.Tags
+- Bounding box / radius: a few range seeks on IX_Event_GeoHash (see
+  common.geohash), then exact latitude/longitude (and great-circle
+  distance) checks on the candidates
+
+EventTag rows and Event.GeoHash are derived from Event.Tags and
+Latitude/Longitude by the ORM listeners at the bottom of this module;
+rebuild_event_search_index() recomputes both for rows written outside the
+ORM.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, false, inspect, or_, select, true, union_all
+from sqlalchemy.orm import Session
+
+from common import geohash
+from models.event import Event
+from models.event_tag import EventTag
+from schemas.base import CursorPage, apply_keyset, encode_cursor
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+GEOHASH_PRECISION = 8
+
+# Range seeks per geo query (more cells = tighter cover, more seeks)
+MAX_GEO_CELLS = 16
+
+MAX_SEARCH_TAGS = 5
+MAX_TAG_LENGTH = 50
+MAX_RADIUS_KM = 1000
+
+# Radius search reads candidates from the bounding box in batches of
+# (limit + 1) * RADIUS_SCAN_FACTOR until the page is full (corners of the
+# box outside the circle are discarded), for at most RADIUS_SCAN_ROUNDS
+RADIUS_SCAN_FACTOR = 2
+RADIUS_SCAN_ROUNDS = 10
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_tag(tag: str) -> Optional[str]:
+    """Trimmed, lower-cased, single-spaced tag (None if empty)"""
+    tag = _WHITESPACE.sub(" ", tag).strip().lower()[:MAX_TAG_LENGTH].strip()
+    return tag or None
+
+
+def parse_tags(raw: Optional[str]) -> List[str]:
+    """Distinct normalized tags from a comma-separated Tags value, in order"""
+    tags = {}
+    for part in (raw or "").split(","):
+        tag = normalize_tag(part)
+        if tag:
+            tags.setdefault(tag, None)
+    return list(tags)
+
+
+@dataclass(frozen=True)
+class GeoNear:
+    """Radius filter"""
+    latitude: float
+    longitude: float
+    radius_km: float
+
+
+@dataclass(frozen=True)
+class GeoBox:
+    """Bounding box filter (min_lon > max_lon crosses the antimeridian)"""
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+
+@dataclass(frozen=True)
+class EventSearchFilter:
+    """
+    Event search criteria.
+
+    Attributes:
+        company_id: Only this company's events
+        include_private: Include non-public events (caller verified the
+            user belongs to company_id)
+        start_from / start_to: StartDateTime range (inclusive / exclusive)
+        country_id / state / city: Location
+        event_type_id / industry_id: Classification
+        tags: Events having all of these tags
+        box / near: Geo filter (at most one)
+    """
+    company_id: Optional[int] = None
+    include_private: bool = False
+    start_from: Optional[datetime] = None
+    start_to: Optional[datetime] = None
+    country_id: Optional[int] = None
+    state: Optional[str] = None
+    city: Optional[str] = None
+    event_type_id: Optional[int] = None
+    industry_id: Optional[int] = None
+    tags: Tuple[str, ...] = ()
+    box: Optional[GeoBox] = None
+    near: Optional[GeoNear] = None
+
+    def validate(self) -> "EventSearchFilter":
+        """
+        Check the criteria.
+
+        Raises:
+            ValueError: Inconsistent or out-of-range criteria
+        """
+        if self.include_private and self.company_id is None:
+            raise ValueError("Private events can only be searched within a company")
+        if self.start_from and self.start_to and self.start_to <= self.start_from:
+            raise ValueError("start_to must be after start_from")
+        if len(self.tags) > MAX_SEARCH_TAGS:
+            raise ValueError(f"At most {MAX_SEARCH_TAGS} tags can be searched at once")
+        if self.box and self.near:
+            raise ValueError("Use either a bounding box or a radius, not both")
+        if self.box:
+            box = self.box
+            if not (-90 <= box.min_lat <= box.max_lat <= 90):
+                raise ValueError("Bounding box latitudes must satisfy -90 <= min_lat <= max_lat <= 90")
+            if not (-180 <= box.min_lon <= 180 and -180 <= box.max_lon <= 180):
+                raise ValueError("Bounding box longitudes must be between -180 and 180")
+        if self.near:
+            near = self.near
+            if not (-90 <= near.latitude <= 90 and -180 <= near.longitude <= 180):
+                raise ValueError("Latitude must be -90..90 and longitude -180..180")
+            if not (0 < near.radius_km <= MAX_RADIUS_KM):
+                raise ValueError(f"Radius must be between 0 and {MAX_RADIUS_KM} km")
+        return self
+
+
+@dataclass(frozen=True)
+class EventSearchPage:
+    """One page of results; distances_km is set for radius searches"""
+    rows: List
+    next_cursor: Optional[str]
+    distances_km: Optional[List[float]] = None
+
+
+# ----------------------------------------------------------------------------
+# Query
+# ----------------------------------------------------------------------------
+
+SORT_KEY = [Event.StartDateTime, Event.EventID]
+
+_SUMMARY_COLUMNS = [
+    Event.EventID, Event.Name, Event.ShortDescription, Event.CompanyID,
+    Event.StartDateTime, Event.EndDateTime, Event.TimezoneIdentifier,
+    Event.VenueName, Event.City, Event.State, Event.CountryID,
+    Event.Latitude, Event.Longitude, Event.EventTypeID, Event.IndustryID,
+    Event.EventStatusID, Event.Tags, Event.IsPublic,
+]
+
+
+def _sort_values(row) -> Tuple:
+    return (row.StartDateTime, row.EventID)
+
+
+def _box_criteria(box: GeoBox) -> list:
+    criteria = [Event.GeoHash.isnot(None), Event.Latitude >= box.min_lat, Event.Latitude <= box.max_lat]
+    if box.min_lon <= box.max_lon:
+        criteria += [Event.Longitude >= box.min_lon, Event.Longitude <= box.max_lon]
+    else:
+        criteria.append(or_(Event.Longitude >= box.min_lon, Event.Longitude <= box.max_lon))
+
+    cells = geohash.covering_cells(
+        box.min_lat, box.min_lon, box.max_lat, box.max_lon, GEOHASH_PRECISION, MAX_GEO_CELLS
+    )
+    if cells:
+        # One range seek per cell; a single OR of ranges is often planned
+        # as one scan from the lowest cell to the highest
+        criteria.append(Event.EventID.in_(union_all(*(
+            select(Event.EventID).where(
+                Event.IsDeleted == false(),
+                Event.GeoHash.isnot(None),
+                Event.GeoHash >= cell,
+                Event.GeoHash < cell + geohash.CELL_END
+            )
+            for cell in cells
+        ))))
+    return criteria
+
+
+def event_search_statement(search: EventSearchFilter):
+    """Filtered select() of event summaries (unordered; see search_events)"""
+    # Literal predicates (not bound parameters) so the filtered indexes match
+    criteria = [Event.IsDeleted == false()]
+    if not search.include_private:
+        criteria.append(Event.IsPublic == true())
+    if search.company_id is not None:
+        criteria.append(Event.CompanyID == search.company_id)
+    if search.start_from is not None:
+        criteria.append(Event.StartDateTime >= search.start_from)
+    if search.start_to is not None:
+        criteria.append(Event.StartDateTime < search.start_to)
+    if search.country_id is not None:
+        criteria.append(Event.CountryID == search.country_id)
+    if search.state:
+        criteria.append(Event.State == search.state)
+    if search.city:
+        criteria.append(Event.City == search.city)
+    if search.event_type_id is not None:
+        criteria.append(Event.EventTypeID == search.event_type_id)
+    if search.industry_id is not None:
+        criteria.append(Event.IndustryID == search.industry_id)
+    for tag in search.tags:
+        criteria.append(Event.EventID.in_(select(EventTag.EventID).where(EventTag.Tag == tag)))
+
+    box = search.box
+    if search.near is not None:
+        box = GeoBox(*geohash.radius_bbox(search.near.latitude, search.near.longitude, search.near.radius_km))
+    if box is not None:
+        criteria.extend(_box_criteria(box))
+
+    return select(*_SUMMARY_COLUMNS).where(*criteria)
+
+
+def _distance_km(near: GeoNear, row) -> float:
+    return geohash.haversine_km(near.latitude, near.longitude, float(row.Latitude), float(row.Longitude))
+
+
+def search_events(db: Session, search: EventSearchFilter, cursor: Optional[str] = None, limit: int = 20) -> EventSearchPage:
+    """
+    Search events, one keyset page at a time.
+
+    Args:
+        db: Database session
+        search: Criteria
+        cursor: next_cursor of the previous page (None for the first page)
+        limit: Page size
+
+    Returns:
+        EventSearchPage
+
+    Raises:
+        ValueError: Invalid criteria or cursor
+    """
+    search = search.validate()
+    statement = event_search_statement(search)
+    if search.near is None:
+        rows = db.execute(apply_keyset(statement, SORT_KEY, cursor, limit, descending=False)).all()
+        page, next_cursor = CursorPage.split_rows(rows, limit, key=_sort_values)
+        return EventSearchPage(page, next_cursor)
+
+    batch = (limit + 1) * RADIUS_SCAN_FACTOR
+    matches: List[Tuple[object, float]] = []
+    scan_cursor = cursor
+    exhausted = False
+    for _ in range(RADIUS_SCAN_ROUNDS):
+        rows = db.execute(apply_keyset(statement, SORT_KEY, scan_cursor, batch - 1, descending=False)).all()
+        for row in rows:
+            distance = _distance_km(search.near, row)
+            if distance <= search.near.radius_km:
+                matches.append((row, distance))
+                if len(matches) > limit:
+                    break
+            scan_cursor = encode_cursor(_sort_values(row))
+        if len(matches) > limit:
+            break
+        if len(rows) < batch:
+            exhausted = True
+            break
+
+    page = matches[:limit]
+    if len(matches) > limit:
+        next_cursor = encode_cursor(_sort_values(page[-1][0]))
+    elif exhausted:
+        next_cursor = None
+    else:
+        # Scan budget spent before the page filled: resume after the last row read
+        next_cursor = scan_cursor
+    return EventSearchPage([row for row, _ in page], next_cursor, [round(d, 3) for _, d in page])
+
+
+# ----------------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------------
+
+def event_geohash(latitude, longitude) -> Optional[str]:
+    """Geohash stored in Event.GeoHash (None without coordinates)"""
+    if latitude is None or longitude is None:
+        return None
+    return geohash.encode(float(latitude), float(longitude), GEOHASH_PRECISION)
+
+
+_bind_event_id = bindparam("b_event_id")
+_bind_geohash = bindparam("b_geohash")
+
+
+def _tag_rows(event_id: int, raw: Optional[str]) -> List[dict]:
+    return [{"Tag": tag, "EventID": event_id} for tag in parse_tags(raw)]
+
+
+def rebuild_event_search_index(db: Session, batch_size: int = 5000) -> int:
+    """
+    Recompute Event.GeoHash and dbo.EventTag for every event (commits per batch).
+
+    For events written outside the ORM (bulk imports, SQL fixes).
+
+    Returns:
+        Events processed
+    """
+    event_table = Event.__table__
+    tag_table = EventTag.__table__
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Event.EventID, Event.Latitude, Event.Longitude, Event.Tags)
+            .where(Event.EventID > last_id)
+            .order_by(Event.EventID)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return processed
+
+        ids = [row.EventID for row in rows]
+        db.execute(delete(tag_table).where(tag_table.c.EventID.in_(ids)))
+        tags = [tag for row in rows for tag in _tag_rows(row.EventID, row.Tags)]
+        if tags:
+            db.execute(tag_table.insert(), tags)
+        db.execute(
+            event_table.update().where(event_table.c.EventID == _bind_event_id).values(GeoHash=_bind_geohash),
+            [{"b_event_id": row.EventID, "b_geohash": event_geohash(row.Latitude, row.Longitude)} for row in rows]
+        )
+        db.commit()
+        processed += len(rows)
+        last_id = ids[-1]
+
+
+def _changed(target, *attributes: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _set_geohash(mapper, connection, target) -> None:
+    target.GeoHash = event_geohash(target.Latitude, target.Longitude)
+
+
+def _set_geohash_on_update(mapper, connection, target) -> None:
+    if _changed(target, "Latitude", "Longitude"):
+        target.GeoHash = event_geohash(target.Latitude, target.Longitude)
+
+
+def _index_tags(mapper, connection, target) -> None:
+    rows = _tag_rows(target.EventID, target.Tags)
+    if rows:
+        connection.execute(EventTag.__table__.insert(), rows)
+
+
+def _reindex_tags(mapper, connection, target) -> None:
+    if not _changed(target, "Tags"):
+        return
+    table = EventTag.__table__
+    connection.execute(delete(table).where(table.c.EventID == target.EventID))
+    _index_tags(mapper, connection, target)
+
+
+event.listen(Event, "before_insert", _set_geohash)
+event.listen(Event, "before_update", _set_geohash_on_update)
+event.listen(Event, "after_insert", _index_tags)
+event.listen(Event, "after_update", _reindex_tags)
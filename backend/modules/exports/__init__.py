@@ -0,0 +1,7 @@
+"""
+Exports Module
+Streaming lead exports (CSV / XLSX / Parquet) and background export jobs
+"""
+from .router import router  # type: ignore
+
+__all__ = ["router"]
@@ -0,0 +1,288 @@
+"""
+Export Encoders
+Incremental CSV / XLSX / Parquet writers for lead exports
+
+Every encoder consumes an iterator of rows and yields bytes as it goes, so
+memory stays bounded by one flush buffer (or one Parquet row group) no
+matter how many rows are exported. Cell values are int, float, bool, str,
+datetime or None; column_types (a sample value per column) is only
+needed by typed formats.
+"""
+import csv
+import io
+import zipfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+# Bytes buffered before a chunk is yielded
+FLUSH_BYTES = 64 * 1024
+
+# Rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Excel's sheet limit (one row is the header)
+XLSX_MAX_ROWS_PER_SHEET = 1048576
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file object whose contents are drained as chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def pending(self) -> int:
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+# ----------------------------------------------------------------------------
+# CSV
+# ----------------------------------------------------------------------------
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value) -> object:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_csv(
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    column_types: Optional[Dict[str, object]] = None
+) -> Iterator[bytes]:
+    """UTF-8 CSV (with BOM so Excel detects the encoding), formula cells neutralized"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# ----------------------------------------------------------------------------
+# XLSX (SpreadsheetML written straight into a streamed zip)
+# ----------------------------------------------------------------------------
+
+_XML_ILLEGAL = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_SHEET = '<sheet name="Leads{suffix}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}</Relationships>'
+)
+_WORKBOOK_SHEET_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    text = escape(str(value).translate(_XML_ILLEGAL))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Sequence) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def encode_xlsx(
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    column_types: Optional[Dict[str, object]] = None
+) -> Iterator[bytes]:
+    """XLSX workbook; rolls over to a new sheet at Excel's row limit"""
+    sink = _ChunkSink()
+    header = _xlsx_row(columns)
+    sheets = 0
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        sheet = None
+        rows_in_sheet = 0
+        for row in rows:
+            if sheet is None or rows_in_sheet >= XLSX_MAX_ROWS_PER_SHEET - 1:
+                if sheet is not None:
+                    sheet.write(_SHEET_TAIL.encode("utf-8"))
+                    sheet.close()
+                sheets += 1
+                sheet = workbook.open(f"xl/worksheets/sheet{sheets}.xml", "w", force_zip64=True)
+                sheet.write((_SHEET_HEAD + header).encode("utf-8"))
+                rows_in_sheet = 0
+            sheet.write(_xlsx_row(row).encode("utf-8"))
+            rows_in_sheet += 1
+            if sink.pending >= FLUSH_BYTES:
+                yield sink.drain()
+
+        if sheet is None:
+            sheets = 1
+            sheet = workbook.open("xl/worksheets/sheet1.xml", "w")
+            sheet.write((_SHEET_HEAD + header).encode("utf-8"))
+        sheet.write(_SHEET_TAIL.encode("utf-8"))
+        sheet.close()
+
+        numbers = range(1, sheets + 1)
+        workbook.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)
+        ))
+        workbook.writestr("_rels/.rels", _ROOT_RELS)
+        workbook.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            _WORKBOOK_SHEET.format(n=n, suffix="" if n == 1 else f" {n}") for n in numbers
+        )))
+        workbook.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+            sheets="".join(_WORKBOOK_SHEET_REL.format(n=n) for n in numbers)
+        ))
+    yield sink.drain()
+
+
+# ----------------------------------------------------------------------------
+# Parquet (optional dependency: pyarrow)
+# ----------------------------------------------------------------------------
+
+def _parquet_type(pa, sample):
+    if isinstance(sample, bool):
+        return pa.bool_()
+    if isinstance(sample, int):
+        return pa.int64()
+    if isinstance(sample, float):
+        return pa.float64()
+    if isinstance(sample, datetime):
+        return pa.timestamp("ms")
+    return pa.string()
+
+
+def encode_parquet(
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    column_types: Optional[Dict[str, object]] = None
+) -> Iterator[bytes]:
+    """
+    Parquet file written one row group at a time.
+
+    Args:
+        column_types: Sample value per column deciding its type (columns not
+            listed are strings)
+
+    Raises:
+        ValueError: pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError:
+        raise ValueError("Parquet export is not available on this server (pyarrow is not installed)")
+
+    column_types = column_types or {}
+    schema = pa.schema([(name, _parquet_type(pa, column_types.get(name, ""))) for name in columns])
+    string_columns = [i for i, field in enumerate(schema) if pa.types.is_string(field.type)]
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+
+    def _write(batch: List[Sequence]) -> None:
+        data = [list(values) for values in zip(*batch)]
+        for i in string_columns:
+            data[i] = [None if v is None else (v if isinstance(v, str) else str(v)) for v in data[i]]
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(data, schema)], schema=schema
+        ))
+
+    batch: List[Sequence] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+            _write(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        _write(batch)
+    writer.close()
+    yield sink.drain()
+
+
+# format -> (encoder, media type, file extension)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "csv": (encode_csv, "text/csv; charset=utf-8", "csv"),
+    "xlsx": (encode_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": (encode_parquet, "application/vnd.apache.parquet", "parquet"),
+}
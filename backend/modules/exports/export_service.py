@@ -0,0 +1,436 @@
+"""
+Lead Export Service
+Streams a company's leads to CSV / XLSX / Parquet with bounded memory
+
+Rows are read with a server-side cursor (yield_per) and encoded
+incrementally (modules.exports.encoders), so neither the API worker nor the
+export worker ever holds more than EXPORT_FETCH_SIZE rows plus one encoder
+buffer. The query is tenant-scoped with common.multi_tenant.filter_by_company.
+
+Two ways out:
+- Direct download (GET /api/exports/leads): a generator-backed
+  StreamingResponse, for exports up to EXPORT_STREAM_MAX_ROWS
+- Background job (POST /api/exports/leads/jobs): LeadExportWorker threads
+  claim PENDING jobs from dbo.LeadExportJob (safe across API workers), write
+  the file to EXPORT_STORAGE_DIR, and clients download it with HTTP Range
+  support so an interrupted download resumes instead of restarting
+
+Answer columns come from the first EXPORT_HEADER_SAMPLE_ROWS leads; keys
+first seen later are written to the OtherAnswers column as JSON, because a
+streamed header cannot be rewritten.
+"""
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select, and_
+from sqlalchemy.orm import Session
+
+from common.database import SessionLocal
+from common.multi_tenant import filter_by_company
+from models.event import Event
+from models.form import Form
+from models.form_submission import FormSubmission
+from models.lead_export_job import LeadExportJob
+from modules.exports.encoders import EXPORT_FORMATS
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Rows fetched per server-side cursor round trip
+EXPORT_FETCH_SIZE = 2000
+
+# Leads inspected to decide the answer columns
+EXPORT_HEADER_SAMPLE_ROWS = 1000
+
+# Larger exports must use a background job
+EXPORT_STREAM_MAX_ROWS = int(os.getenv("EXPORT_STREAM_MAX_ROWS", "50000"))
+
+# Background jobs
+EXPORT_STORAGE_DIR = os.getenv("EXPORT_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "eventlead-exports"))
+EXPORT_WORKER_ENABLED = os.getenv("EXPORT_WORKER_ENABLED", "true").lower() == "true"
+EXPORT_WORKER_THREADS = int(os.getenv("EXPORT_WORKER_THREADS", "2"))
+EXPORT_JOB_POLL_INTERVAL_SECONDS = float(os.getenv("EXPORT_JOB_POLL_INTERVAL_SECONDS", "2"))
+EXPORT_FILE_RETENTION_HOURS = int(os.getenv("EXPORT_FILE_RETENTION_HOURS", "24"))
+
+# A RUNNING job not finished within this window is assumed orphaned (worker
+# restarted mid-export) and claimed again
+EXPORT_JOB_STALE_MINUTES = int(os.getenv("EXPORT_JOB_STALE_MINUTES", "30"))
+
+JOB_PENDING = "PENDING"
+JOB_RUNNING = "RUNNING"
+JOB_COMPLETED = "COMPLETED"
+JOB_FAILED = "FAILED"
+
+LEAD_EXPORT_COLUMNS = [
+    "SubmissionID", "SubmittedDate", "ReceivedDate", "FormID", "FormName",
+    "EventID", "EventName", "IsDemo",
+]
+OTHER_ANSWERS_COLUMN = "OtherAnswers"
+
+# Sample values typing the fixed columns (typed formats only)
+_COLUMN_TYPES = {
+    "SubmissionID": 0, "SubmittedDate": datetime.min, "ReceivedDate": datetime.min,
+    "FormID": 0, "EventID": 0, "IsDemo": False,
+}
+
+
+@dataclass(frozen=True)
+class LeadExportFilter:
+    """Which leads to export"""
+    company_id: int
+    event_id: Optional[int] = None
+    form_id: Optional[int] = None
+    include_demo: bool = False
+
+
+def validate_export_format(fmt: str) -> str:
+    """
+    Normalize an export format name.
+
+    Raises:
+        ValueError: Unknown format
+    """
+    fmt = (fmt or "").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}' (use one of: {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+
+def export_media_type(fmt: str) -> str:
+    return EXPORT_FORMATS[fmt][1]
+
+
+def export_filename(export: LeadExportFilter, fmt: str) -> str:
+    scope = f"event-{export.event_id}" if export.event_id else f"company-{export.company_id}"
+    if export.form_id:
+        scope += f"-form-{export.form_id}"
+    return f"leads-{scope}.{EXPORT_FORMATS[fmt][2]}"
+
+
+# ----------------------------------------------------------------------------
+# Query
+# ----------------------------------------------------------------------------
+
+def _scoped(statement, export: LeadExportFilter):
+    statement = filter_by_company(statement, export.company_id, FormSubmission)
+    if export.event_id is not None:
+        statement = statement.where(FormSubmission.EventID == export.event_id)
+    if export.form_id is not None:
+        statement = statement.where(FormSubmission.FormID == export.form_id)
+    if not export.include_demo:
+        statement = statement.where(FormSubmission.IsDemo == False)  # noqa: E712
+    return statement
+
+
+def lead_export_statement(export: LeadExportFilter):
+    """Tenant-scoped lead rows in FormSubmissionID order"""
+    statement = select(
+        FormSubmission.FormSubmissionID, FormSubmission.SubmittedDate, FormSubmission.ReceivedDate,
+        FormSubmission.FormID, Form.FormName, FormSubmission.EventID, Event.Name.label("EventName"),
+        FormSubmission.IsDemo, FormSubmission.SubmissionData
+    ).select_from(FormSubmission)
+    return (
+        _scoped(statement, export)
+        .outerjoin(Form, Form.FormID == FormSubmission.FormID)
+        .outerjoin(Event, Event.EventID == FormSubmission.EventID)
+        .order_by(FormSubmission.FormSubmissionID)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+
+
+def count_export_rows(db: Session, export: LeadExportFilter) -> int:
+    """Number of leads an export would contain"""
+    return db.scalar(_scoped(select(func.count()).select_from(FormSubmission), export)) or 0
+
+
+# ----------------------------------------------------------------------------
+# Row shaping
+# ----------------------------------------------------------------------------
+
+def _answers(raw: Optional[str]) -> Dict[str, object]:
+    if not raw:
+        return {}
+    try:
+        answers = json.loads(raw)
+    except ValueError:
+        return {OTHER_ANSWERS_COLUMN: raw}
+    return answers if isinstance(answers, dict) else {OTHER_ANSWERS_COLUMN: answers}
+
+
+def _cell(value) -> object:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+class _LeadTable:
+    """Header and row layout decided from a sample of leads"""
+
+    def __init__(self, sample: Sequence[Tuple[tuple, Dict[str, object]]]):
+        reserved = set(LEAD_EXPORT_COLUMNS) | {OTHER_ANSWERS_COLUMN}
+        keys: Dict[str, None] = {}
+        for _, answers in sample:
+            for key in answers:
+                if key not in reserved:
+                    keys.setdefault(key, None)
+        self.answer_keys = list(keys)
+        self.columns = LEAD_EXPORT_COLUMNS + self.answer_keys + [OTHER_ANSWERS_COLUMN]
+
+    def row(self, fixed: tuple, answers: Dict[str, object]) -> list:
+        values = list(fixed)
+        values.extend(_cell(answers.pop(key, None)) for key in self.answer_keys)
+        values.append(json.dumps(answers, separators=(",", ":"), default=str) if answers else None)
+        return values
+
+
+def _records(rows: Iterable) -> Iterator[Tuple[tuple, Dict[str, object]]]:
+    for row in rows:
+        yield (
+            (row.FormSubmissionID, row.SubmittedDate, row.ReceivedDate, row.FormID, row.FormName,
+             row.EventID, row.EventName, bool(row.IsDemo)),
+            _answers(row.SubmissionData)
+        )
+
+
+def encode_leads(rows: Iterable, fmt: str) -> Iterator[bytes]:
+    """Encode lead rows (see lead_export_statement) as fmt, incrementally"""
+    records = _records(rows)
+    sample = list(islice(records, EXPORT_HEADER_SAMPLE_ROWS))
+    table = _LeadTable(sample)
+    encoder = EXPORT_FORMATS[fmt][0]
+    return encoder(
+        table.columns,
+        (table.row(fixed, answers) for fixed, answers in chain(sample, records)),
+        column_types=_COLUMN_TYPES
+    )
+
+
+def iter_lead_export(db: Session, export: LeadExportFilter, fmt: str) -> Iterator[bytes]:
+    """Stream an export's bytes from an open session"""
+    result = db.execute(lead_export_statement(export))
+    try:
+        yield from encode_leads(result, fmt)
+    finally:
+        result.close()
+
+
+def stream_lead_export(export: LeadExportFilter, fmt: str, session_factory=SessionLocal) -> Iterator[bytes]:
+    """
+    Generator for StreamingResponse.
+
+    Owns its session: request-scoped dependencies are closed before a
+    streamed body is sent.
+    """
+    db = session_factory()
+    try:
+        yield from iter_lead_export(db, export, fmt)
+    finally:
+        db.close()
+
+
+# ----------------------------------------------------------------------------
+# Background jobs
+# ----------------------------------------------------------------------------
+
+def create_export_job(db: Session, export: LeadExportFilter, fmt: str, user_id: int) -> LeadExportJob:
+    """Queue a background export (commits)"""
+    job = LeadExportJob(
+        CompanyID=export.company_id,
+        EventID=export.event_id,
+        FormID=export.form_id,
+        IncludeDemo=export.include_demo,
+        Format=fmt,
+        Status=JOB_PENDING,
+        RequestedBy=user_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def job_filter(job: LeadExportJob) -> LeadExportFilter:
+    return LeadExportFilter(job.CompanyID, job.EventID, job.FormID, bool(job.IncludeDemo))
+
+
+def _claimable(now: datetime):
+    return or_(
+        LeadExportJob.Status == JOB_PENDING,
+        and_(
+            LeadExportJob.Status == JOB_RUNNING,
+            LeadExportJob.StartedDate < now - timedelta(minutes=EXPORT_JOB_STALE_MINUTES)
+        )
+    )
+
+
+def claim_export_job(db: Session) -> Optional[int]:
+    """
+    Claim the oldest runnable job (commits).
+
+    The conditional UPDATE makes the claim atomic, so any number of worker
+    threads and processes can poll the same table.
+    """
+    now = datetime.utcnow()
+    candidates = db.scalars(
+        select(LeadExportJob.LeadExportJobID)
+        .where(_claimable(now))
+        .order_by(LeadExportJob.LeadExportJobID)
+        .limit(5)
+    ).all()
+    table = LeadExportJob.__table__
+    for job_id in candidates:
+        claimed = db.execute(
+            table.update()
+            .where(table.c.LeadExportJobID == job_id, _claimable(now))
+            .values(Status=JOB_RUNNING, StartedDate=now, ErrorMessage=None)
+        ).rowcount
+        db.commit()
+        if claimed == 1:
+            return job_id
+    return None
+
+
+def run_export_job(db: Session, job_id: int, storage_dir: str = EXPORT_STORAGE_DIR) -> LeadExportJob:
+    """
+    Write a claimed job's file and mark it COMPLETED (or FAILED).
+
+    The file is streamed to a temporary name and renamed when whole, so a
+    download never sees a partial export.
+    """
+    job = db.get(LeadExportJob, job_id)
+    export = job_filter(job)
+    directory = os.path.join(storage_dir, str(job.CompanyID))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{job.LeadExportJobID}.{EXPORT_FORMATS[job.Format][2]}")
+    partial = path + ".part"
+
+    rows = 0
+    try:
+        def _counted(result):
+            nonlocal rows
+            for row in result:
+                rows += 1
+                yield row
+
+        result = db.execute(lead_export_statement(export))
+        try:
+            with open(partial, "wb") as handle:
+                for chunk in encode_leads(_counted(result), job.Format):
+                    handle.write(chunk)
+        finally:
+            result.close()
+        os.replace(partial, path)
+
+        job.Status = JOB_COMPLETED
+        job.RowCount = rows
+        job.FileSize = os.path.getsize(path)
+        job.FilePath = path
+        job.CompletedDate = datetime.utcnow()
+        job.ExpiresDate = job.CompletedDate + timedelta(hours=EXPORT_FILE_RETENTION_HOURS)
+        db.commit()
+        logger.info(f"Lead export {job_id} completed: {rows} rows, {job.FileSize} bytes")
+
+    except Exception as e:
+        db.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        job = db.get(LeadExportJob, job_id)
+        job.Status = JOB_FAILED
+        job.ErrorMessage = str(e)[:1000]
+        job.CompletedDate = datetime.utcnow()
+        db.commit()
+        logger.error(f"Lead export {job_id} failed: {str(e)}", exc_info=True)
+    return job
+
+
+def purge_expired_exports(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete expired export files and their jobs (commits); returns jobs purged"""
+    now = now or datetime.utcnow()
+    jobs = db.scalars(
+        select(LeadExportJob).where(LeadExportJob.ExpiresDate < now).limit(100)
+    ).all()
+    for job in jobs:
+        if job.FilePath and os.path.exists(job.FilePath):
+            os.remove(job.FilePath)
+        db.delete(job)
+    db.commit()
+    return len(jobs)
+
+
+class LeadExportWorker:
+    """
+    Daemon threads that run queued lead exports.
+
+    Started/stopped with the application (main.py). EXPORT_WORKER_THREADS
+    bounds how many exports one process streams at once, so a post-show
+    rush queues up instead of saturating the database.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        storage_dir: str = EXPORT_STORAGE_DIR,
+        threads: int = EXPORT_WORKER_THREADS,
+        interval_seconds: float = EXPORT_JOB_POLL_INTERVAL_SECONDS
+    ):
+        self._session_factory = session_factory
+        self._storage_dir = storage_dir
+        self._thread_count = threads
+        self._interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def run_once(self) -> Optional[int]:
+        """Claim and run one job; returns its ID (None if the queue was empty)"""
+        db = self._session_factory()
+        try:
+            job_id = claim_export_job(db)
+            if job_id is None:
+                purge_expired_exports(db)
+                return None
+            run_export_job(db, job_id, self._storage_dir)
+            return job_id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once() is not None:
+                    continue
+            except Exception as e:
+                logger.error(f"Lead export worker failed: {str(e)}", exc_info=True)
+            self._stop.wait(self._interval_seconds)
+
+    def start(self) -> None:
+        """Start the worker threads (no-op if already running)"""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"lead-export-worker-{n}", daemon=True)
+            for n in range(self._thread_count)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the workers to stop (an export in progress is reclaimed after restart)"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+# Shared instance
+lead_export_worker = LeadExportWorker()
@@ -0,0 +1,229 @@
+"""
+Exports Router
+Lead export downloads (streamed) and background export jobs
+"""
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from common.database import get_async_db
+from common.membership_cache import MembershipSnapshot
+from common.rbac import require_company_access
+from common.logger import get_logger
+from models.lead_export_job import LeadExportJob
+from modules.auth.dependencies import get_current_user, get_current_memberships, CurrentUser
+from modules.exports.schemas import LeadExportJobRequest, LeadExportJobResponse
+from modules.exports.export_service import (
+    EXPORT_STREAM_MAX_ROWS, JOB_COMPLETED, LeadExportFilter,
+    count_export_rows, create_export_job, export_filename, export_media_type,
+    job_filter, stream_lead_export, validate_export_format
+)
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/api/exports", tags=["Exports"])
+
+
+def _job_response(job: LeadExportJob) -> LeadExportJobResponse:
+    return LeadExportJobResponse(
+        job_id=job.LeadExportJobID,
+        company_id=job.CompanyID,
+        event_id=job.EventID,
+        form_id=job.FormID,
+        format=job.Format,
+        status=job.Status,
+        row_count=job.RowCount,
+        file_size=job.FileSize,
+        error=job.ErrorMessage,
+        created_at=job.CreatedDate,
+        completed_at=job.CompletedDate,
+        expires_at=job.ExpiresDate,
+        download_url=(
+            f"/api/exports/leads/jobs/{job.LeadExportJobID}/download"
+            if job.Status == JOB_COMPLETED else None
+        )
+    )
+
+
+async def _resolve_job(
+    job_id: int,
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot,
+    db: AsyncSession
+) -> LeadExportJob:
+    job = await db.get(LeadExportJob, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    require_company_access(current_user, job.CompanyID, memberships)
+    return job
+
+
+@router.get(
+    "/leads",
+    summary="Download leads",
+    description=(
+        f"Stream a company's leads as CSV, XLSX or Parquet (up to {EXPORT_STREAM_MAX_ROWS} leads; "
+        "larger exports use POST /api/exports/leads/jobs)"
+    ),
+    response_class=StreamingResponse
+)
+async def download_leads(
+    company_id: int = Query(..., description="Company whose leads are exported"),
+    event_id: Optional[int] = Query(None, description="Restrict to one event"),
+    form_id: Optional[int] = Query(None, description="Restrict to one form"),
+    include_demo: bool = Query(False, description="Include demo/preview submissions"),
+    format: str = Query("csv", description="csv | xlsx | parquet"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Stream leads straight from the database.
+
+    Rows are fetched with a server-side cursor and encoded as they arrive;
+    the response is never buffered whole.
+    """
+    try:
+        require_company_access(current_user, company_id, memberships)
+        fmt = validate_export_format(format)
+        export = LeadExportFilter(company_id, event_id, form_id, include_demo)
+
+        if await db.run_sync(count_export_rows, export) > EXPORT_STREAM_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"More than {EXPORT_STREAM_MAX_ROWS} leads; request a background export instead"
+            )
+
+        return StreamingResponse(
+            stream_lead_export(export, fmt),
+            media_type=export_media_type(fmt),
+            headers={"Content-Disposition": f'attachment; filename="{export_filename(export, fmt)}"'}
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to export leads for company {company_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export leads"
+        )
+
+
+@router.post(
+    "/leads/jobs",
+    response_model=LeadExportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a lead export",
+    description="Export any number of leads in the background; poll the job, then download the file"
+)
+async def create_lead_export_job(
+    request: LeadExportJobRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """Queue a background export"""
+    try:
+        require_company_access(current_user, request.company_id, memberships)
+        fmt = validate_export_format(request.format)
+        export = LeadExportFilter(request.company_id, request.event_id, request.form_id, request.include_demo)
+        job = await db.run_sync(create_export_job, export, fmt, current_user.user_id)
+        return _job_response(job)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to queue lead export: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to queue lead export"
+        )
+
+
+@router.get(
+    "/leads/jobs/{job_id}",
+    response_model=LeadExportJobResponse,
+    summary="Get lead export status"
+)
+async def get_lead_export_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """Get a background export's status"""
+    try:
+        return _job_response(await _resolve_job(job_id, current_user, memberships, db))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get lead export {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get lead export"
+        )
+
+
+@router.get(
+    "/leads/jobs/{job_id}/download",
+    summary="Download a completed lead export",
+    description="Supports HTTP Range requests, so interrupted downloads can resume",
+    response_class=FileResponse
+)
+async def download_lead_export(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Download the export file.
+
+    Served with Accept-Ranges/ETag; a client that lost the connection sends
+    Range: bytes=<received>- (with If-Range) and gets the rest as 206.
+    """
+    try:
+        job = await _resolve_job(job_id, current_user, memberships, db)
+        if job.Status != JOB_COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Export is {job.Status.lower()}"
+            )
+        if not job.FilePath or not os.path.exists(job.FilePath):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Export file has expired; request a new export"
+            )
+
+        return FileResponse(
+            job.FilePath,
+            media_type=export_media_type(job.Format),
+            filename=export_filename(job_filter(job), job.Format)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to download lead export {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to download lead export"
+        )
@@ -0,0 +1,42 @@
+"""
+Export Schemas
+Pydantic models for lead export jobs
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class LeadExportJobRequest(BaseModel):
+    """Queue a background lead export"""
+    company_id: int = Field(..., description="Company whose leads are exported")
+    event_id: Optional[int] = Field(None, description="Restrict to one event")
+    form_id: Optional[int] = Field(None, description="Restrict to one form")
+    include_demo: bool = Field(False, description="Include demo/preview submissions")
+    format: str = Field("csv", description="csv | xlsx | parquet")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "company_id": 10,
+                "event_id": 100,
+                "format": "xlsx"
+            }
+        }
+
+
+class LeadExportJobResponse(BaseModel):
+    """Background export status"""
+    job_id: int = Field(..., description="Export job ID")
+    company_id: int = Field(..., description="Company ID")
+    event_id: Optional[int] = Field(None, description="Event filter")
+    form_id: Optional[int] = Field(None, description="Form filter")
+    format: str = Field(..., description="Export format")
+    status: str = Field(..., description="PENDING | RUNNING | COMPLETED | FAILED")
+    row_count: Optional[int] = Field(None, description="Leads exported (when completed)")
+    file_size: Optional[int] = Field(None, description="File size in bytes (when completed)")
+    error: Optional[str] = Field(None, description="Failure reason")
+    created_at: Optional[datetime] = Field(None, description="When the export was requested")
+    completed_at: Optional[datetime] = Field(None, description="When the export finished")
+    expires_at: Optional[datetime] = Field(None, description="When the file is deleted")
+    download_url: Optional[str] = Field(None, description="Download URL (supports Range requests)")
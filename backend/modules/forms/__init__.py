@@ -0,0 +1,7 @@
+"""
+Forms Module
+Lead capture: submission ingestion and offline sync for forms (Epic 2)
+"""
+from .router import router  # type: ignore
+
+__all__ = ["router"]
@@ -0,0 +1,486 @@
+"""
+Form Access Resolver
+Effective per-user form permissions for authorization checks
+
+A user may act on a form when they are an active member of the company that
+owns it, or when a FormAccessControl grant gives them the permission. A grant
+only applies while it is unexpired, its grantee is an active member of the
+grant's company, and that company owns the form or is linked to the owner by
+an active CompanyRelationship of the grant's relationship type - four tables
+per check, so grants are materialized instead of evaluated per request:
+
+1. dbo.FormEffectiveAccess holds one row per (user, form, permission) that
+   a valid grant confers, with the latest expiry among those grants
+2. Changes to FormAccessControl, UserCompany, CompanyRelationship and Form
+   queue the affected users on the session; their rows are rebuilt just
+   before the transaction commits, so the materialization never disagrees
+   with the data it was derived from
+3. Each worker caches a FormAccess snapshot per user (form ID -> permission
+   bitmask), loaded with one primary-key range seek on a miss
+
+Owning-company members are not materialized: that check is the membership
+snapshot's, so the common case costs nothing extra. A grant check is a dict
+lookup and a bitwise AND.
+
+Snapshots are dropped when the transaction that changed them commits, expire
+at the earliest grant expiry they contain (lapsed grants stop working on
+time) and otherwise after FORM_ACCESS_CACHE_TTL_SECONDS (changes made by
+other workers). Bulk UPDATE statements bypass ORM events, so callers using
+them must call refresh_form_access_on_commit().
+
+Usage:
+    require_form_access(db, current_user, target, memberships, FORM_SUBMIT)
+
+    access = get_form_access(db, user_id)
+    access.allows(form_id, FORM_ANALYZE)
+
+Async routes call these through AsyncSession.run_sync().
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, event, exists, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from models.company_relationship import CompanyRelationship
+from models.form import Form
+from models.form_access_control import FormAccessControl
+from models.form_effective_access import FormEffectiveAccess
+from models.ref.form_access_control_access_type import FormAccessControlAccessType
+from models.ref.user_company_status import UserCompanyStatus
+from models.user_company import UserCompany
+from common.membership_cache import MembershipSnapshot
+from common.rbac import CurrentUser, belongs_to_company
+from common.logger import get_logger
+from common.ttl_cache import CommitInvalidation, TtlLruCache
+from modules.forms.submission_service import SubmissionTarget
+
+logger = get_logger(__name__)
+
+
+FORM_ACCESS_CACHE_TTL_SECONDS = 300
+FORM_ACCESS_CACHE_MAX_USERS = 10000
+
+# Users rebuilt per statement (SQL Server allows ~2100 parameters)
+MATERIALIZE_BATCH_SIZE = 500
+
+# Permission bits (one per ref.FormAccessControlAccessType code)
+FORM_VIEW = 1
+FORM_EDIT = 2
+FORM_MANAGE = 4
+FORM_SUBMIT = 8
+FORM_ANALYZE = 16
+FORM_ALL = FORM_VIEW | FORM_EDIT | FORM_MANAGE | FORM_SUBMIT | FORM_ANALYZE
+
+# Bits conferred by each access type (higher levels include the ones they need)
+ACCESS_TYPE_PERMISSIONS = {
+    "VIEW": FORM_VIEW,
+    "EDIT": FORM_EDIT | FORM_VIEW,
+    "MANAGE": FORM_MANAGE | FORM_EDIT | FORM_VIEW,
+    "SUBMIT": FORM_SUBMIT,
+    "ANALYZE": FORM_ANALYZE | FORM_VIEW,
+}
+
+# Session.info keys holding changes to materialize before commit, and the
+# users whose cached snapshots to drop after it
+_PENDING_USERS_KEY = "form_access_pending_users"
+_PENDING_FORMS_KEY = "form_access_pending_forms"
+_PENDING_PAIRS_KEY = "form_access_pending_company_pairs"
+_REBUILT_USERS_KEY = "form_access_rebuilt_users"
+
+
+@dataclass(frozen=True)
+class FormAccess:
+    """
+    Permissions one user holds on forms through grants.
+
+    Attributes:
+        user_id: User the snapshot belongs to
+        permissions: Form ID -> permission bitmask
+        expires_at: Earliest expiry among the grants (UTC, None = no expiring grant)
+    """
+    user_id: int
+    permissions: Dict[int, int]
+    expires_at: Optional[datetime] = None
+
+    def mask(self, form_id: int) -> int:
+        """Permission bitmask for a form (0 = no grant)"""
+        return self.permissions.get(form_id, 0)
+
+    def allows(self, form_id: int, permission: int) -> bool:
+        """Check whether the grants include every bit of a permission"""
+        return self.permissions.get(form_id, 0) & permission == permission
+
+    def form_ids(self, permission: int = FORM_VIEW) -> Set[int]:
+        """Get IDs of forms granted with a permission"""
+        return {form_id for form_id, mask in self.permissions.items() if mask & permission == permission}
+
+
+# ----------------------------------------------------------------------------
+# Materialization
+# ----------------------------------------------------------------------------
+
+def _chunks(values: Sequence[int], size: int = MATERIALIZE_BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _effective_grants_statement(user_ids: Sequence[int], now: datetime):
+    related = exists().where(
+        CompanyRelationship.RelationshipTypeID == FormAccessControl.CompanyRelationshipTypeID,
+        CompanyRelationship.Status == "active",
+        CompanyRelationship.IsDeleted == False,  # noqa: E712
+        or_(
+            and_(
+                CompanyRelationship.ParentCompanyID == Form.CompanyID,
+                CompanyRelationship.ChildCompanyID == FormAccessControl.CompanyID,
+            ),
+            and_(
+                CompanyRelationship.ParentCompanyID == FormAccessControl.CompanyID,
+                CompanyRelationship.ChildCompanyID == Form.CompanyID,
+            ),
+        ),
+    )
+    return (
+        select(
+            FormAccessControl.UserID,
+            FormAccessControl.FormID,
+            FormAccessControlAccessType.AccessTypeCode,
+            FormAccessControl.ExpiryDate,
+        )
+        .join(Form, Form.FormID == FormAccessControl.FormID)
+        .join(
+            FormAccessControlAccessType,
+            FormAccessControlAccessType.FormAccessControlAccessTypeID == FormAccessControl.FormAccessControlAccessTypeID
+        )
+        .join(
+            UserCompany,
+            and_(
+                UserCompany.UserID == FormAccessControl.UserID,
+                UserCompany.CompanyID == FormAccessControl.CompanyID,
+            )
+        )
+        .join(UserCompanyStatus, UserCompanyStatus.UserCompanyStatusID == UserCompany.StatusID)
+        .where(
+            FormAccessControl.UserID.in_(user_ids),
+            FormAccessControl.IsDeleted == False,  # noqa: E712
+            or_(FormAccessControl.ExpiryDate.is_(None), FormAccessControl.ExpiryDate > now),
+            Form.IsDeleted == False,  # noqa: E712
+            UserCompany.IsDeleted == False,  # noqa: E712
+            UserCompanyStatus.StatusCode == "active",
+            or_(FormAccessControl.CompanyID == Form.CompanyID, related),
+        )
+    )
+
+
+def effective_access_rows(grants) -> List[Dict[str, object]]:
+    """
+    Fold valid grants into FormEffectiveAccess rows.
+
+    Args:
+        grants: (UserID, FormID, AccessTypeCode, ExpiryDate) tuples
+
+    Returns:
+        One row per (user, form, permission bit); a bit conferred by several
+        grants keeps the latest expiry (NULL - never - wins)
+    """
+    expiries: Dict[Tuple[int, int, int], Optional[datetime]] = {}
+    for user_id, form_id, code, expiry in grants:
+        permissions = ACCESS_TYPE_PERMISSIONS.get(code, 0)
+        bit = 1
+        while bit <= permissions:
+            if permissions & bit:
+                key = (int(user_id), int(form_id), bit)
+                if key not in expiries:
+                    expiries[key] = expiry
+                elif expiries[key] is not None and (expiry is None or expiry > expiries[key]):
+                    expiries[key] = expiry
+            bit <<= 1
+    return [
+        {"UserID": user_id, "FormID": form_id, "Permission": bit, "ExpiryDate": expiry}
+        for (user_id, form_id, bit), expiry in expiries.items()
+    ]
+
+
+def materialize_form_access(db: Session, user_ids: Iterable[int], now: Optional[datetime] = None) -> int:
+    """
+    Rebuild the users' FormEffectiveAccess rows in the current transaction.
+
+    Does not commit (and does not drop cached snapshots: use
+    refresh_form_access_on_commit() for that).
+
+    Returns:
+        Rows written
+    """
+    now = now or datetime.utcnow()
+    written = 0
+    for chunk in _chunks(sorted(set(user_ids))):
+        db.execute(delete(FormEffectiveAccess).where(FormEffectiveAccess.UserID.in_(chunk)))
+        rows = effective_access_rows(db.execute(_effective_grants_statement(chunk, now)).all())
+        if rows:
+            db.execute(FormEffectiveAccess.__table__.insert(), rows)
+        written += len(rows)
+    return written
+
+
+def _users_for_forms(db: Session, form_ids: Iterable[int]) -> Set[int]:
+    users: Set[int] = set()
+    for chunk in _chunks(sorted(set(form_ids))):
+        users.update(db.scalars(
+            select(FormAccessControl.UserID).distinct().where(
+                FormAccessControl.FormID.in_(chunk),
+                FormAccessControl.IsDeleted == False,  # noqa: E712
+            )
+        ))
+    return users
+
+
+def _users_for_company_pairs(db: Session, pairs: Iterable[Tuple[int, int]]) -> Set[int]:
+    users: Set[int] = set()
+    for parent_id, child_id in pairs:
+        users.update(db.scalars(
+            select(FormAccessControl.UserID).distinct()
+            .join(Form, Form.FormID == FormAccessControl.FormID)
+            .where(
+                FormAccessControl.IsDeleted == False,  # noqa: E712
+                or_(
+                    and_(FormAccessControl.CompanyID == child_id, Form.CompanyID == parent_id),
+                    and_(FormAccessControl.CompanyID == parent_id, Form.CompanyID == child_id),
+                ),
+            )
+        ))
+    return users
+
+
+def rebuild_form_access(db: Session) -> int:
+    """
+    Rebuild FormEffectiveAccess for every user holding a grant, and commit.
+
+    Run after migration 026, and periodically if desired to purge rows of
+    lapsed grants (expired rows are ignored when loading either way).
+
+    Returns:
+        Rows written
+    """
+    user_ids = list(db.scalars(
+        select(FormAccessControl.UserID).distinct()
+        .where(FormAccessControl.IsDeleted == False)  # noqa: E712
+    ))
+    db.execute(delete(FormEffectiveAccess))
+    written = materialize_form_access(db, user_ids)
+    db.commit()
+    form_access_cache.clear()
+    logger.info(f"Rebuilt form access for {len(user_ids)} users ({written} permissions)")
+    return written
+
+
+# ----------------------------------------------------------------------------
+# Snapshot cache
+# ----------------------------------------------------------------------------
+
+def _access_statement(user_id: int, now: datetime):
+    return select(FormEffectiveAccess.FormID, FormEffectiveAccess.Permission, FormEffectiveAccess.ExpiryDate).where(
+        FormEffectiveAccess.UserID == user_id,
+        or_(FormEffectiveAccess.ExpiryDate.is_(None), FormEffectiveAccess.ExpiryDate > now),
+    )
+
+
+def _access_from_rows(user_id: int, rows) -> FormAccess:
+    permissions: Dict[int, int] = {}
+    expires_at = None
+    for form_id, permission, expiry in rows:
+        permissions[int(form_id)] = permissions.get(int(form_id), 0) | int(permission)
+        if expiry is not None and (expires_at is None or expiry < expires_at):
+            expires_at = expiry
+    return FormAccess(user_id=user_id, permissions=permissions, expires_at=expires_at)
+
+
+def load_form_access(db: Session, user_id: int) -> FormAccess:
+    """Load a user's granted permissions in one query (bypasses the cache)"""
+    return _access_from_rows(user_id, db.execute(_access_statement(user_id, datetime.utcnow())).all())
+
+
+def _grant_expired(access: FormAccess) -> bool:
+    return access.expires_at is not None and datetime.utcnow() >= access.expires_at
+
+
+class FormAccessCache(TtlLruCache):
+    """
+    Process-wide LRU cache of FormAccess snapshots keyed by user ID.
+
+    Features:
+    - TTL expiry so changes from other workers are picked up
+    - Snapshots expire when their earliest grant does
+    - Bounded size (least recently used users evicted first)
+    - Generation counter: a snapshot loaded before an invalidation is not
+      stored after it (the load may have read the superseded rows)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = FORM_ACCESS_CACHE_TTL_SECONDS,
+        max_users: int = FORM_ACCESS_CACHE_MAX_USERS
+    ):
+        super().__init__(ttl_seconds, max_users, key=lambda access: access.user_id, expired=_grant_expired)
+
+
+# Shared instance
+form_access_cache = FormAccessCache()
+
+
+def get_form_access(db: Session, user_id: int) -> FormAccess:
+    """Get a user's granted permissions (cached, one query on miss)"""
+    access = form_access_cache.get(user_id)
+    if access is None:
+        generation = form_access_cache.generation()
+        access = form_access_cache.set(load_form_access(db, user_id), generation)
+    return access
+
+
+def refresh_form_access_on_commit(
+    db: Session,
+    user_ids: Iterable[int] = (),
+    form_ids: Iterable[int] = (),
+    company_pairs: Iterable[Tuple[int, int]] = ()
+) -> None:
+    """
+    Rebuild affected users' effective access when the session commits.
+
+    Needed after bulk UPDATE/DELETE statements on FormAccessControl,
+    UserCompany, CompanyRelationship or Form, which bypass the ORM events
+    that queue the rebuild automatically.
+
+    Args:
+        db: Session that will commit the change
+        user_ids: Users whose grants or memberships changed
+        form_ids: Forms deleted or moved to another company
+        company_pairs: (parent, child) company IDs whose relationship changed
+    """
+    db.info.setdefault(_PENDING_USERS_KEY, set()).update(user_ids)
+    db.info.setdefault(_PENDING_FORMS_KEY, set()).update(form_ids)
+    db.info.setdefault(_PENDING_PAIRS_KEY, set()).update(company_pairs)
+
+
+# ----------------------------------------------------------------------------
+# Authorization
+# ----------------------------------------------------------------------------
+
+def _is_owner(current_user: CurrentUser, target: SubmissionTarget, memberships: MembershipSnapshot) -> bool:
+    return belongs_to_company(current_user, target.company_id) and memberships.has_active_membership(target.company_id)
+
+
+def _deny() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Access denied. You do not have permission to access this form."
+    )
+
+
+def has_form_access(
+    db: Session,
+    current_user: CurrentUser,
+    target: SubmissionTarget,
+    memberships: MembershipSnapshot,
+    permission: int = FORM_VIEW
+) -> bool:
+    """
+    Check a permission on a form.
+
+    Members of the owning company (the company in their token, with an
+    active membership) hold every permission; anyone else needs a grant.
+    Grants are only loaded for non-members.
+    """
+    if _is_owner(current_user, target, memberships):
+        return True
+    return get_form_access(db, current_user.user_id).allows(target.form_id, permission)
+
+
+def require_form_access(
+    db: Session,
+    current_user: CurrentUser,
+    target: SubmissionTarget,
+    memberships: MembershipSnapshot,
+    permission: int = FORM_VIEW
+) -> None:
+    """
+    Require a permission on a form, raise 403 if not held (see has_form_access).
+
+    Raises:
+        HTTPException: 403 if the user lacks the permission
+    """
+    if not has_form_access(db, current_user, target, memberships, permission):
+        raise _deny()
+
+
+# ----------------------------------------------------------------------------
+# Automatic maintenance (ORM events)
+# ----------------------------------------------------------------------------
+
+def _changed_values(target, attribute: str) -> Set[int]:
+    """Current and (on update) previous value of a column"""
+    values = {getattr(target, attribute)}
+    values.update(inspect(target).attrs[attribute].history.deleted or ())
+    return {value for value in values if value is not None}
+
+
+def _queue_users(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_USERS_KEY, set()).update(_changed_values(target, "UserID"))
+
+
+def _queue_form(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    if state.attrs.IsDeleted.history.has_changes() or state.attrs.CompanyID.history.has_changes():
+        session.info.setdefault(_PENDING_FORMS_KEY, set()).add(target.FormID)
+
+
+def _queue_relationship(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        return
+    pairs = session.info.setdefault(_PENDING_PAIRS_KEY, set())
+    for parent_id in _changed_values(target, "ParentCompanyID"):
+        for child_id in _changed_values(target, "ChildCompanyID"):
+            pairs.add((parent_id, child_id))
+
+
+def _materialize_pending(session: Session) -> None:
+    session.flush()
+    user_ids = session.info.pop(_PENDING_USERS_KEY, None) or set()
+    form_ids = session.info.pop(_PENDING_FORMS_KEY, None)
+    pairs = session.info.pop(_PENDING_PAIRS_KEY, None)
+    if not (user_ids or form_ids or pairs):
+        return
+    if form_ids:
+        user_ids |= _users_for_forms(session, form_ids)
+    if pairs:
+        user_ids |= _users_for_company_pairs(session, pairs)
+    if user_ids:
+        materialize_form_access(session, user_ids)
+        _rebuilt_users.queue(session, user_ids)
+
+
+def _discard_pending(session: Session, previous_transaction) -> None:
+    if session.in_transaction():
+        return  # savepoint: the outer transaction still commits its queued changes
+    for key in (_PENDING_USERS_KEY, _PENDING_FORMS_KEY, _PENDING_PAIRS_KEY):
+        session.info.pop(key, None)
+
+
+# The rebuilt rows roll back with the transaction, so the cache is still right
+_rebuilt_users = CommitInvalidation(_REBUILT_USERS_KEY, form_access_cache.invalidate, apply_on_rollback=False)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(FormAccessControl, _event_name, _queue_users)
+    event.listen(UserCompany, _event_name, _queue_users)
+    event.listen(CompanyRelationship, _event_name, _queue_relationship)
+event.listen(Form, "after_update", _queue_form)
+event.listen(Session, "before_commit", _materialize_pending)
+event.listen(Session, "after_soft_rollback", _discard_pending)
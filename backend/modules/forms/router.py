@@ -0,0 +1,319 @@
+"""
+Forms Router
+Lead submission ingestion and offline sync endpoints for booth devices
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List
+
+from common.database import get_async_db
+from common.membership_cache import MembershipSnapshot
+from common.rbac import require_company_access
+from common.logger import get_logger
+from modules.auth.dependencies import get_current_user, get_current_memberships, CurrentUser
+from modules.forms.schemas import (
+    LeadSubmissionRequest, LeadSubmissionBatchRequest, SubmissionReceiptResponse,
+    SyncUploadCreateRequest, SyncUploadResponse, SyncChunkResponse, SyncAckResponse
+)
+from modules.forms.access_service import FORM_SUBMIT, require_form_access
+from modules.forms.submission_service import SubmissionTarget, get_submission_target, ingest_submissions
+from modules.forms.sync_service import (
+    MAX_SYNC_BODY_BYTES, SYNC_RETRY_AFTER_SECONDS, SyncConflictError, SyncUploadState, sync_request_slots,
+    append_sync_items, decode_sync_items, get_sync_upload, open_sync_upload
+)
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/api/forms", tags=["Forms"])
+
+
+def _resolve_target(
+    db: Session,
+    form_id: int,
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot
+) -> SubmissionTarget:
+    target = get_submission_target(db, form_id)
+    if target is None or target.is_deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Form not found"
+        )
+    require_form_access(db, current_user, target, memberships, FORM_SUBMIT)
+    return target
+
+
+async def _ingest(
+    form_id: int,
+    submissions: List[LeadSubmissionRequest],
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot,
+    db: AsyncSession
+) -> SubmissionReceiptResponse:
+    try:
+        target = await db.run_sync(_resolve_target, form_id, current_user, memberships)
+        receipt = await db.run_sync(ingest_submissions, target, submissions, current_user.user_id)
+
+        return SubmissionReceiptResponse(
+            form_id=receipt.form_id,
+            accepted=receipt.accepted,
+            received_at=receipt.received_at
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to store submissions for form {form_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store submissions"
+        )
+
+
+@router.post(
+    "/{form_id}/submissions",
+    response_model=SubmissionReceiptResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a lead",
+    description="Store one lead for a form; counters and KPIs update asynchronously"
+)
+async def submit_lead(
+    form_id: int,
+    request: LeadSubmissionRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Store a single lead.
+
+    The lead is durable when 202 is returned; Form.TotalSubmissions and the
+    dashboard KPIs catch up within the KPI worker's flush interval.
+    """
+    return await _ingest(form_id, [request], current_user, memberships, db)
+
+
+@router.post(
+    "/{form_id}/submissions/batch",
+    response_model=SubmissionReceiptResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a batch of leads",
+    description="Store up to 500 leads for a form in one write"
+)
+async def submit_lead_batch(
+    form_id: int,
+    request: LeadSubmissionBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Store a batch of leads atomically (all or none).
+
+    Devices should buffer leads for a second or two and send them together:
+    the batch costs the same number of statements as a single lead.
+    """
+    return await _ingest(form_id, request.submissions, current_user, memberships, db)
+
+
+# ============================================================================
+# Offline sync (resumable NDJSON uploads)
+# ============================================================================
+
+def _upload_response(upload: SyncUploadState) -> SyncUploadResponse:
+    return SyncUploadResponse(
+        upload_id=upload.upload_id,
+        company_id=upload.company_id,
+        device_id=upload.device_id,
+        committed_items=upload.committed_items,
+        stored_items=upload.stored_items,
+        duplicate_items=upload.duplicate_items,
+        rejected_items=upload.rejected_items
+    )
+
+
+async def _resolve_upload(
+    upload_id: int,
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot,
+    db: AsyncSession
+) -> SyncUploadState:
+    upload = await db.run_sync(get_sync_upload, upload_id)
+    if upload is None or upload.user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    require_company_access(current_user, upload.company_id, memberships)
+    return upload
+
+
+@router.post(
+    "/sync/uploads",
+    response_model=SyncUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Open an offline sync upload",
+    description="Start a resumable upload of a device's queued leads"
+)
+async def open_upload(
+    request: SyncUploadCreateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Open an upload for the device's offline queue.
+
+    Items are then appended with POST /sync/uploads/{upload_id}/items.
+    """
+    try:
+        require_company_access(current_user, request.company_id, memberships)
+        upload = await db.run_sync(
+            open_sync_upload, request.company_id, current_user.user_id, request.device_id
+        )
+        return _upload_response(upload)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to open sync upload: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to open sync upload"
+        )
+
+
+@router.get(
+    "/sync/uploads/{upload_id}",
+    response_model=SyncUploadResponse,
+    summary="Get offline sync upload progress",
+    description="Where to resume an interrupted upload (committed_items)"
+)
+async def get_upload(
+    upload_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """Get an upload's progress after a dropped connection"""
+    try:
+        return _upload_response(await _resolve_upload(upload_id, current_user, memberships, db))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get sync upload {upload_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get sync upload"
+        )
+
+
+def _sync_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Sync is busy, retry shortly",
+        headers={"Retry-After": str(SYNC_RETRY_AFTER_SECONDS)}
+    )
+
+
+def _sync_body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Sync body exceeds {MAX_SYNC_BODY_BYTES // (1024 * 1024)}MB"
+    )
+
+
+async def _read_sync_body(http_request: Request) -> bytes:
+    """Request body, refused as soon as it passes MAX_SYNC_BODY_BYTES"""
+    chunks = []
+    received = 0
+    async for chunk in http_request.stream():
+        received += len(chunk)
+        if received > MAX_SYNC_BODY_BYTES:
+            raise _sync_body_too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post(
+    "/sync/uploads/{upload_id}/items",
+    response_model=SyncChunkResponse,
+    summary="Append queued leads to an offline sync upload",
+    description=(
+        "Body: NDJSON (one SyncItemRequest per line), optionally gzip or deflate "
+        "compressed (Content-Encoding). Returns one ack per line."
+    )
+)
+async def append_upload_items(
+    upload_id: int,
+    http_request: Request,
+    offset: int = Query(..., ge=0, description="Upload position of the first line"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    memberships: MembershipSnapshot = Depends(get_current_memberships)
+):
+    """
+    Store queued leads, one transaction per chunk.
+
+    Lines already committed by an interrupted earlier request are acked as
+    duplicates; an offset past the upload's progress returns 409 with the
+    offset to resume from. When the worker is saturated by a reconnect
+    storm, 503 with Retry-After is returned before anything is read.
+
+    Bodies over MAX_SYNC_BODY_BYTES get 413: from Content-Length before
+    reading, otherwise as soon as the stream passes the limit. A slot is
+    only taken once the body is in, so slow uploads never hold one.
+    """
+    if sync_request_slots.locked():
+        raise _sync_busy()
+    declared = http_request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_SYNC_BODY_BYTES:
+        raise _sync_body_too_large()
+
+    try:
+        upload = await _resolve_upload(upload_id, current_user, memberships, db)
+        body = await _read_sync_body(http_request)
+        if sync_request_slots.locked():
+            raise _sync_busy()
+
+        async with sync_request_slots:
+            items = await run_in_threadpool(
+                decode_sync_items, body, http_request.headers.get("content-encoding"), offset
+            )
+            result = await db.run_sync(append_sync_items, upload, offset, items, current_user, memberships)
+
+        return SyncChunkResponse(
+            upload_id=result.upload_id,
+            committed_items=result.committed_items,
+            acks=[
+                SyncAckResponse(index=a.index, client_key=a.client_key, status=a.status, error=a.error)
+                for a in result.acks
+            ]
+        )
+
+    except HTTPException:
+        raise
+    except SyncConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "committed_items": e.committed_items}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to append to sync upload {upload_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store sync items"
+        )
@@ -0,0 +1,111 @@
+"""
+Form Submission Schemas
+Pydantic models for lead submission ingestion
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+# Upper bound on leads accepted per batch request
+MAX_SUBMISSIONS_PER_BATCH = 500
+
+
+class LeadSubmissionRequest(BaseModel):
+    """One captured lead"""
+    data: Dict[str, Any] = Field(..., description="Form answers keyed by field name")
+    submitted_at: Optional[datetime] = Field(
+        None, description="When the lead was captured on the device (defaults to receipt time)"
+    )
+    is_demo: bool = Field(False, description="Captured in demo/preview mode")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "data": {"first_name": "Jane", "email": "jane@example.com", "interest": "Pricing"},
+                "submitted_at": "2025-03-01T09:30:00Z",
+                "is_demo": False
+            }
+        }
+
+
+class LeadSubmissionBatchRequest(BaseModel):
+    """Several leads for the same form, stored in one write"""
+    submissions: List[LeadSubmissionRequest] = Field(
+        ..., min_length=1, max_length=MAX_SUBMISSIONS_PER_BATCH,
+        description=f"Leads to store (1-{MAX_SUBMISSIONS_PER_BATCH})"
+    )
+
+
+class SubmissionReceiptResponse(BaseModel):
+    """Acknowledgement that leads were durably stored"""
+    form_id: int = Field(..., description="Form ID")
+    accepted: int = Field(..., description="Number of leads stored")
+    received_at: datetime = Field(..., description="Server receipt time (UTC)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "form_id": 42,
+                "accepted": 25,
+                "received_at": "2025-03-01T09:30:01Z"
+            }
+        }
+
+
+# ============================================================================
+# Offline sync
+# ============================================================================
+
+class SyncItemRequest(LeadSubmissionRequest):
+    """One line of an offline sync NDJSON body"""
+    client_key: str = Field(
+        ..., min_length=1, max_length=128,
+        description="Idempotency key generated on the device (e.g. a UUID)"
+    )
+    form_id: int = Field(..., description="Form the lead was captured with")
+
+
+class SyncUploadCreateRequest(BaseModel):
+    """Open a resumable upload of a device's offline queue"""
+    company_id: int = Field(..., description="Company the device captures leads for")
+    device_id: str = Field(..., min_length=1, max_length=100, description="Device identifier")
+
+
+class SyncUploadResponse(BaseModel):
+    """Upload progress (resume from committed_items)"""
+    upload_id: int = Field(..., description="Upload ID")
+    company_id: int = Field(..., description="Company ID")
+    device_id: str = Field(..., description="Device identifier")
+    committed_items: int = Field(..., description="Items processed; the next request starts at this offset")
+    stored_items: int = Field(..., description="Items stored as new leads")
+    duplicate_items: int = Field(..., description="Items already stored earlier")
+    rejected_items: int = Field(..., description="Items that failed validation")
+
+
+class SyncAckResponse(BaseModel):
+    """Outcome of one item"""
+    index: int = Field(..., description="Item position within the upload")
+    client_key: Optional[str] = Field(None, description="Idempotency key (absent if the line was unreadable)")
+    status: str = Field(..., description="stored | duplicate | rejected")
+    error: Optional[str] = Field(None, description="Why the item was rejected")
+
+
+class SyncChunkResponse(BaseModel):
+    """Per-item acknowledgements for one sync request"""
+    upload_id: int = Field(..., description="Upload ID")
+    committed_items: int = Field(..., description="Items processed; the next request starts at this offset")
+    acks: List[SyncAckResponse] = Field(..., description="One entry per item sent, in order")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "upload_id": 7,
+                "committed_items": 3,
+                "acks": [
+                    {"index": 0, "client_key": "0b4c...", "status": "stored", "error": None},
+                    {"index": 1, "client_key": "5f1e...", "status": "duplicate", "error": None},
+                    {"index": 2, "client_key": "9a77...", "status": "rejected", "error": "Form not found"}
+                ]
+            }
+        }
@@ -0,0 +1,265 @@
+"""
+Lead Submission Ingestion Service
+Write path for POST /api/forms/{form_id}/submissions[/batch]
+
+A request is acknowledged once its leads are durably stored, using a fixed
+number of statements regardless of batch size:
+1. Resolve the form (company, event, status) from an in-process cache
+2. One executemany INSERT into the append-only dbo.FormSubmission table
+3. One executemany INSERT of per-day KPI outbox deltas for the batch
+4. Commit
+
+No per-lead UPDATE touches dbo.Form: TotalSubmissions,
+ProductionLeadsCollected, DemoLeadsCollected and LastSubmissionDate (and
+Event.TotalSubmissions) are folded from the outbox by the KPI worker as one
+aggregated UPDATE per form per tick (see modules.dashboard.kpi_service for
+the freshness bound), so thousands of tablets submitting to the same form
+never serialize on its row lock.
+
+Form status changes reach other workers' target caches within
+FORM_TARGET_CACHE_TTL_SECONDS (this worker invalidates on commit).
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models.form import Form
+from models.form_submission import FormSubmission
+from models.kpi_rollup import KpiOutbox
+from models.ref.form_status import FormStatus
+from modules.dashboard.kpi_service import submission_outbox_rows
+from modules.forms.schemas import LeadSubmissionRequest
+from common.logger import get_logger
+from common.ttl_cache import CommitInvalidation, TtlLruCache
+
+logger = get_logger(__name__)
+
+
+FORM_TARGET_CACHE_TTL_SECONDS = 30
+FORM_TARGET_CACHE_MAX_ENTRIES = 10000
+
+# Largest serialized answer payload accepted per lead
+MAX_SUBMISSION_DATA_BYTES = 64 * 1024
+
+# Device clocks ahead of the server by more than this are clamped to receipt time
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+# Form statuses that accept production leads (demo leads are accepted for any
+# form that is not deleted, so drafts can be previewed on the booth tablet)
+ACCEPTING_FORM_STATUS_CODES = frozenset({"PUBLISHED"})
+
+# Session.info key holding form IDs changed in the open transaction
+_PENDING_FORMS_KEY = "submission_target_pending_forms"
+
+
+@dataclass(frozen=True)
+class SubmissionTarget:
+    """
+    What the write path needs to know about a form.
+
+    Attributes:
+        form_id: Form ID
+        company_id: Owning company (tenant check, denormalized onto submissions)
+        event_id: Event the form belongs to, if any
+        status_code: FormStatus code (e.g. 'PUBLISHED')
+        is_deleted: Form is soft-deleted
+    """
+    form_id: int
+    company_id: int
+    event_id: Optional[int]
+    status_code: Optional[str]
+    is_deleted: bool
+
+    def accepts(self, is_demo: bool) -> bool:
+        """Whether the form currently accepts a production (or demo) lead"""
+        if self.is_deleted:
+            return False
+        return is_demo or self.status_code in ACCEPTING_FORM_STATUS_CODES
+
+
+@dataclass(frozen=True)
+class SubmissionReceipt:
+    """Result of one ingestion call"""
+    form_id: int
+    accepted: int
+    received_at: datetime
+
+
+# ----------------------------------------------------------------------------
+# Form lookup
+# ----------------------------------------------------------------------------
+
+def _target_statement(form_id: int):
+    return (
+        select(Form.FormID, Form.CompanyID, Form.EventID, Form.IsDeleted, FormStatus.StatusCode)
+        .outerjoin(FormStatus, FormStatus.FormStatusID == Form.FormStatusID)
+        .where(Form.FormID == form_id)
+    )
+
+
+def _target_from_row(row) -> Optional[SubmissionTarget]:
+    if row is None:
+        return None
+    return SubmissionTarget(
+        form_id=int(row.FormID),
+        company_id=int(row.CompanyID),
+        event_id=int(row.EventID) if row.EventID is not None else None,
+        status_code=row.StatusCode,
+        is_deleted=bool(row.IsDeleted)
+    )
+
+
+def load_submission_target(db: Session, form_id: int) -> Optional[SubmissionTarget]:
+    """Load a form's submission target with one query (bypasses the cache)"""
+    return _target_from_row(db.execute(_target_statement(form_id)).first())
+
+
+class SubmissionTargetCache(TtlLruCache):
+    """
+    Process-wide cache of submission targets keyed by FormID.
+
+    Features:
+    - TTL expiry for changes made by other workers
+    - Bounded size (least recently used forms evicted first)
+    - Missing forms are not cached
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = FORM_TARGET_CACHE_TTL_SECONDS,
+        max_entries: int = FORM_TARGET_CACHE_MAX_ENTRIES
+    ):
+        super().__init__(ttl_seconds, max_entries, key=lambda target: target.form_id)
+
+
+# Shared instance
+submission_target_cache = SubmissionTargetCache()
+
+
+def get_submission_target(db: Session, form_id: int) -> Optional[SubmissionTarget]:
+    """Get a form's submission target (cached, one query on miss)"""
+    target = submission_target_cache.get(form_id)
+    if target is None:
+        generation = submission_target_cache.generation()
+        target = load_submission_target(db, form_id)
+        if target is not None:
+            submission_target_cache.set(target, generation)
+    return target
+
+
+# ----------------------------------------------------------------------------
+# Ingestion
+# ----------------------------------------------------------------------------
+
+def _to_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def build_submission_row(
+    target: SubmissionTarget,
+    submission: LeadSubmissionRequest,
+    user_id: Optional[int],
+    received_at: datetime,
+    index: int = 0
+) -> Dict[str, object]:
+    """
+    Validate one lead and build its FormSubmission insert parameters.
+
+    Raises:
+        ValueError: Form not accepting the lead, or answers too large
+    """
+    if not target.accepts(submission.is_demo):
+        raise ValueError(f"Form {target.form_id} is not accepting submissions")
+
+    payload = json.dumps(submission.data, separators=(",", ":"), default=str)
+    if len(payload.encode("utf-8")) > MAX_SUBMISSION_DATA_BYTES:
+        raise ValueError(
+            f"Submission {index} exceeds {MAX_SUBMISSION_DATA_BYTES // 1024}KB of answer data"
+        )
+
+    submitted_at = _to_utc_naive(submission.submitted_at) if submission.submitted_at else received_at
+    if submitted_at > received_at + MAX_CLOCK_SKEW:
+        submitted_at = received_at
+
+    return {
+        "FormID": target.form_id,
+        "CompanyID": target.company_id,
+        "EventID": target.event_id,
+        "IsDemo": submission.is_demo,
+        "SubmissionData": payload,
+        "SubmittedDate": submitted_at,
+        "ReceivedDate": received_at,
+        "SubmittedBy": user_id,
+    }
+
+
+def build_submission_rows(
+    target: SubmissionTarget,
+    submissions: Sequence[LeadSubmissionRequest],
+    user_id: Optional[int],
+    received_at: datetime
+) -> List[Dict[str, object]]:
+    """
+    Validate leads and build FormSubmission insert parameters.
+
+    Raises:
+        ValueError: Form not accepting a lead, or answers too large
+    """
+    return [
+        build_submission_row(target, submission, user_id, received_at, index)
+        for index, submission in enumerate(submissions)
+    ]
+
+
+def _outbox_rows(target: SubmissionTarget, rows: List[Dict[str, object]]) -> List[dict]:
+    return submission_outbox_rows(
+        target.company_id,
+        target.form_id,
+        target.event_id,
+        ((row["SubmittedDate"], row["IsDemo"]) for row in rows)
+    )
+
+
+def ingest_submissions(
+    db: Session,
+    target: SubmissionTarget,
+    submissions: Sequence[LeadSubmissionRequest],
+    user_id: Optional[int] = None
+) -> SubmissionReceipt:
+    """
+    Store leads for one form and queue their counter deltas (commits).
+
+    Args:
+        db: Database session
+        target: Resolved form (see get_submission_target)
+        submissions: Leads to store
+        user_id: User operating the capturing device
+
+    Returns:
+        SubmissionReceipt
+
+    Raises:
+        ValueError: Form not accepting submissions, or a lead is invalid
+    """
+    received_at = datetime.utcnow()
+    rows = build_submission_rows(target, submissions, user_id, received_at)
+    db.execute(FormSubmission.__table__.insert(), rows)
+    db.execute(KpiOutbox.__table__.insert(), _outbox_rows(target, rows))
+    db.commit()
+    return SubmissionReceipt(target.form_id, len(rows), received_at)
+
+
+# ----------------------------------------------------------------------------
+# Automatic invalidation (ORM events)
+# ----------------------------------------------------------------------------
+
+_pending_forms = CommitInvalidation(_PENDING_FORMS_KEY, submission_target_cache.invalidate)
+
+event.listen(Form, "after_update", _pending_forms.queue_attribute("FormID"))
+event.listen(Form, "after_delete", _pending_forms.queue_attribute("FormID"))
@@ -0,0 +1,427 @@
+"""
+Offline Sync Service
+Write path for /api/forms/sync/uploads (booth devices draining their offline queue)
+
+Protocol:
+1. The device opens an upload for one company (dbo.SyncUpload)
+2. It sends its queued leads as (gzip/deflate compressed) NDJSON, one
+   SyncItemRequest per line, with ?offset= set to the queue position of the
+   first line. Items are numbered across requests, so a dropped connection
+   is resumed from the upload's committed_items
+3. Items are processed in chunks of SYNC_CHUNK_SIZE, one transaction per
+   chunk: dedup lookup, one submission INSERT batch, one KPI outbox INSERT
+   batch, and the upload's progress, committed together
+4. The response carries one ack (stored | duplicate | rejected) per item
+
+Each item's form must accept submissions from the uploading user
+(FORM_SUBMIT, as for online submissions): members of the owning company, or
+holders of a grant on the form. Other items are rejected individually.
+
+Deduplication: every item carries a client-generated idempotency key. The
+key is stored on dbo.FormSubmission as a 16-byte BLAKE2b digest of
+"company:key" (UX_FormSubmission_ClientKey, filtered unique index), so
+re-sending a lead after a lost response never stores it twice, even across
+uploads or devices, and the index stays compact whatever the key format.
+"""
+import asyncio
+import hashlib
+import os
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.form_submission import FormSubmission
+from models.kpi_rollup import KpiOutbox
+from models.sync_upload import SyncUpload
+from common.membership_cache import MembershipSnapshot
+from common.rbac import CurrentUser
+from modules.dashboard.kpi_service import submission_outbox_rows
+from modules.forms.access_service import FORM_SUBMIT, has_form_access
+from modules.forms.schemas import SyncItemRequest
+from modules.forms.submission_service import (
+    SubmissionTarget,
+    build_submission_row,
+    get_submission_target,
+)
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Items per transaction
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "200"))
+
+# Request limits (compressed body, decompressed body, lines)
+MAX_SYNC_BODY_BYTES = 8 * 1024 * 1024
+MAX_SYNC_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+MAX_SYNC_ITEMS_PER_REQUEST = 5000
+
+# Sync requests processed concurrently per worker; a reconnect storm beyond
+# this is told to retry later instead of queueing on the database pool
+SYNC_MAX_CONCURRENT_REQUESTS = int(os.getenv("SYNC_MAX_CONCURRENT_REQUESTS", "4"))
+SYNC_RETRY_AFTER_SECONDS = 5
+
+ACK_STORED = "stored"
+ACK_DUPLICATE = "duplicate"
+ACK_REJECTED = "rejected"
+
+# Per-worker admission control for sync requests
+sync_request_slots = asyncio.Semaphore(SYNC_MAX_CONCURRENT_REQUESTS)
+
+
+class SyncConflictError(Exception):
+    """
+    Request offset does not match the upload's progress (a gap, or another
+    request appending to the same upload concurrently).
+    """
+
+    def __init__(self, committed_items: int):
+        super().__init__(f"Upload has committed {committed_items} items; resume from that offset")
+        self.committed_items = committed_items
+
+
+@dataclass(frozen=True)
+class SyncUploadState:
+    """Snapshot of a dbo.SyncUpload row"""
+    upload_id: int
+    company_id: int
+    user_id: int
+    device_id: str
+    committed_items: int
+    stored_items: int
+    duplicate_items: int
+    rejected_items: int
+
+
+@dataclass(frozen=True)
+class SyncItem:
+    """One decoded NDJSON line (request is None if the line was invalid)"""
+    index: int
+    request: Optional[SyncItemRequest]
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SyncAck:
+    """Outcome of one item"""
+    index: int
+    client_key: Optional[str]
+    status: str
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """Result of one append request"""
+    upload_id: int
+    committed_items: int
+    acks: List[SyncAck]
+
+
+# ----------------------------------------------------------------------------
+# Decoding
+# ----------------------------------------------------------------------------
+
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "x-gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def decompress_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    Decompress a request body, refusing to inflate past MAX_SYNC_DECOMPRESSED_BYTES.
+
+    Raises:
+        ValueError: Unsupported encoding, corrupt or oversized body
+    """
+    if len(body) > MAX_SYNC_BODY_BYTES:
+        raise ValueError(f"Sync body exceeds {MAX_SYNC_BODY_BYTES // (1024 * 1024)}MB")
+
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding not in _WBITS:
+        raise ValueError(f"Unsupported Content-Encoding '{content_encoding}'")
+
+    decompressor = zlib.decompressobj(_WBITS[encoding])
+    try:
+        data = decompressor.decompress(body, MAX_SYNC_DECOMPRESSED_BYTES + 1)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt {encoding} body: {e}")
+    if len(data) > MAX_SYNC_DECOMPRESSED_BYTES or decompressor.unconsumed_tail:
+        raise ValueError(f"Sync body inflates past {MAX_SYNC_DECOMPRESSED_BYTES // (1024 * 1024)}MB")
+    return data
+
+
+def decode_sync_items(body: bytes, content_encoding: Optional[str], offset: int) -> List[SyncItem]:
+    """
+    Decode an NDJSON sync body into items numbered from offset.
+
+    Unreadable lines become items with an error (rejected individually);
+    blank lines are ignored.
+
+    Raises:
+        ValueError: Body cannot be decompressed, or has too many lines
+    """
+    lines = [line for line in decompress_body(body, content_encoding).splitlines() if line.strip()]
+    if len(lines) > MAX_SYNC_ITEMS_PER_REQUEST:
+        raise ValueError(f"Sync requests are limited to {MAX_SYNC_ITEMS_PER_REQUEST} items")
+
+    items = []
+    for position, line in enumerate(lines):
+        index = offset + position
+        try:
+            items.append(SyncItem(index, SyncItemRequest.model_validate_json(line)))
+        except ValidationError as e:
+            first = e.errors()[0]
+            location = ".".join(str(part) for part in first["loc"]) or "line"
+            items.append(SyncItem(index, None, f"{location}: {first['msg']}"))
+    return items
+
+
+def client_key_digest(company_id: int, client_key: str) -> bytes:
+    """16-byte idempotency digest stored in FormSubmission.ClientKey"""
+    return hashlib.blake2b(f"{company_id}:{client_key}".encode("utf-8"), digest_size=16).digest()
+
+
+# ----------------------------------------------------------------------------
+# Chunk planning (no I/O)
+# ----------------------------------------------------------------------------
+
+@dataclass
+class _ChunkPlan:
+    submission_rows: List[dict]
+    outbox_rows: List[dict]
+    acks: List[SyncAck]
+    stored: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+
+
+def _plan_chunk(
+    items: Sequence[SyncItem],
+    upload: SyncUploadState,
+    targets: Dict[int, Optional[SubmissionTarget]],
+    denied: Set[int],
+    existing_keys: Set[bytes],
+    received_at: datetime
+) -> _ChunkPlan:
+    plan = _ChunkPlan([], [], [])
+    seen = set(existing_keys)
+    per_form: Dict[int, List[dict]] = {}
+
+    for item in items:
+        request = item.request
+        if request is None:
+            plan.acks.append(SyncAck(item.index, None, ACK_REJECTED, item.error))
+            plan.rejected += 1
+            continue
+
+        digest = client_key_digest(upload.company_id, request.client_key)
+        if digest in seen:
+            plan.acks.append(SyncAck(item.index, request.client_key, ACK_DUPLICATE))
+            plan.duplicates += 1
+            continue
+
+        target = targets.get(request.form_id)
+        if target is None or target.is_deleted:
+            plan.acks.append(SyncAck(item.index, request.client_key, ACK_REJECTED, "Form not found"))
+            plan.rejected += 1
+            continue
+        if target.form_id in denied:
+            plan.acks.append(SyncAck(item.index, request.client_key, ACK_REJECTED, "Access denied"))
+            plan.rejected += 1
+            continue
+
+        try:
+            row = build_submission_row(target, request, upload.user_id, received_at, item.index)
+        except ValueError as e:
+            plan.acks.append(SyncAck(item.index, request.client_key, ACK_REJECTED, str(e)))
+            plan.rejected += 1
+            continue
+
+        row["ClientKey"] = digest
+        seen.add(digest)
+        plan.submission_rows.append(row)
+        per_form.setdefault(target.form_id, []).append(row)
+        plan.acks.append(SyncAck(item.index, request.client_key, ACK_STORED))
+        plan.stored += 1
+
+    for form_id, rows in per_form.items():
+        target = targets[form_id]
+        plan.outbox_rows.extend(submission_outbox_rows(
+            target.company_id, target.form_id, target.event_id,
+            ((row["SubmittedDate"], row["IsDemo"]) for row in rows)
+        ))
+    return plan
+
+
+def _chunks(items: Sequence[SyncItem]) -> Iterable[Sequence[SyncItem]]:
+    for start in range(0, len(items), SYNC_CHUNK_SIZE):
+        yield items[start:start + SYNC_CHUNK_SIZE]
+
+
+def _chunk_keys(upload: SyncUploadState, items: Sequence[SyncItem]) -> List[bytes]:
+    return [
+        client_key_digest(upload.company_id, item.request.client_key)
+        for item in items if item.request is not None
+    ]
+
+
+def _existing_keys_statement(keys: List[bytes]):
+    return select(FormSubmission.ClientKey).where(FormSubmission.ClientKey.in_(keys))
+
+
+def _progress_statement(upload_id: int, expected: int, plan: _ChunkPlan, chunk_size: int):
+    table = SyncUpload.__table__
+    return (
+        table.update()
+        .where(table.c.SyncUploadID == upload_id, table.c.CommittedItems == expected)
+        .values(
+            CommittedItems=expected + chunk_size,
+            StoredItems=table.c.StoredItems + plan.stored,
+            DuplicateItems=table.c.DuplicateItems + plan.duplicates,
+            RejectedItems=table.c.RejectedItems + plan.rejected,
+            UpdatedDate=datetime.utcnow()
+        )
+    )
+
+
+def _resume_point(upload: SyncUploadState, offset: int, items: Sequence[SyncItem]) -> Tuple[List[SyncAck], Sequence[SyncItem]]:
+    """Ack items already committed by an earlier (interrupted) request and return the rest"""
+    if offset > upload.committed_items:
+        raise SyncConflictError(upload.committed_items)
+    skip = upload.committed_items - offset
+    acks = [
+        SyncAck(item.index, item.request.client_key if item.request else None, ACK_DUPLICATE)
+        for item in items[:skip]
+    ]
+    return acks, items[skip:]
+
+
+# ----------------------------------------------------------------------------
+# Uploads
+# ----------------------------------------------------------------------------
+
+def _upload_statement(upload_id: int):
+    return select(
+        SyncUpload.SyncUploadID, SyncUpload.CompanyID, SyncUpload.UserID, SyncUpload.DeviceID,
+        SyncUpload.CommittedItems, SyncUpload.StoredItems, SyncUpload.DuplicateItems,
+        SyncUpload.RejectedItems
+    ).where(SyncUpload.SyncUploadID == upload_id)
+
+
+def _state_from_row(row) -> Optional[SyncUploadState]:
+    if row is None:
+        return None
+    return SyncUploadState(
+        upload_id=int(row.SyncUploadID),
+        company_id=int(row.CompanyID),
+        user_id=int(row.UserID),
+        device_id=row.DeviceID,
+        committed_items=row.CommittedItems,
+        stored_items=row.StoredItems,
+        duplicate_items=row.DuplicateItems,
+        rejected_items=row.RejectedItems
+    )
+
+
+def open_sync_upload(db: Session, company_id: int, user_id: int, device_id: str) -> SyncUploadState:
+    """Open an upload session (commits)"""
+    upload = SyncUpload(CompanyID=company_id, UserID=user_id, DeviceID=device_id)
+    db.add(upload)
+    db.flush()
+    upload_id = upload.SyncUploadID
+    db.commit()
+    return SyncUploadState(upload_id, company_id, user_id, device_id, 0, 0, 0, 0)
+
+
+def get_sync_upload(db: Session, upload_id: int) -> Optional[SyncUploadState]:
+    """Load an upload's progress"""
+    return _state_from_row(db.execute(_upload_statement(upload_id)).first())
+
+
+# ----------------------------------------------------------------------------
+# Appending items
+# ----------------------------------------------------------------------------
+
+def _store_chunk(
+    db: Session,
+    upload: SyncUploadState,
+    committed: int,
+    chunk: Sequence[SyncItem],
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot
+) -> List[SyncAck]:
+    targets = {}
+    for item in chunk:
+        if item.request is not None and item.request.form_id not in targets:
+            targets[item.request.form_id] = get_submission_target(db, item.request.form_id)
+    denied = {
+        form_id for form_id, target in targets.items()
+        if target is not None and not has_form_access(db, current_user, target, memberships, FORM_SUBMIT)
+    }
+    keys = _chunk_keys(upload, chunk)
+
+    # A concurrent upload can store one of our keys between the lookup and
+    # the insert; the unique index rejects the chunk and the retry sees it
+    for attempt in range(2):
+        existing = set(db.scalars(_existing_keys_statement(keys))) if keys else set()
+        plan = _plan_chunk(chunk, upload, targets, denied, existing, datetime.utcnow())
+        try:
+            if plan.submission_rows:
+                db.execute(FormSubmission.__table__.insert(), plan.submission_rows)
+                db.execute(KpiOutbox.__table__.insert(), plan.outbox_rows)
+            if db.execute(_progress_statement(upload.upload_id, committed, plan, len(chunk))).rowcount != 1:
+                db.rollback()
+                raise SyncConflictError(committed)
+            db.commit()
+            return plan.acks
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+            logger.info(f"Sync upload {upload.upload_id}: idempotency key race, retrying chunk at {committed}")
+
+
+def append_sync_items(
+    db: Session,
+    upload: SyncUploadState,
+    offset: int,
+    items: Sequence[SyncItem],
+    current_user: CurrentUser,
+    memberships: MembershipSnapshot
+) -> SyncResult:
+    """
+    Store decoded items for an upload, one transaction per chunk (commits).
+
+    Items before the upload's committed_items (re-sent after a lost
+    response) are acknowledged as duplicates without touching the database.
+
+    Args:
+        db: Database session
+        upload: Upload snapshot (see get_sync_upload)
+        offset: Upload position of items[0]
+        items: Decoded items (see decode_sync_items)
+        current_user: Uploading user (FORM_SUBMIT is checked per form)
+        memberships: The user's membership snapshot
+
+    Returns:
+        SyncResult with one ack per item
+
+    Raises:
+        SyncConflictError: offset is past committed_items, or another request
+            advanced the upload concurrently (chunks already committed stay
+            committed; the device resumes from the reported offset)
+    """
+    acks, remaining = _resume_point(upload, offset, items)
+    committed = upload.committed_items
+    for chunk in _chunks(remaining):
+        acks.extend(_store_chunk(db, upload, committed, chunk, current_user, memberships))
+        committed += len(chunk)
+    return SyncResult(upload.upload_id, committed, acks)
+
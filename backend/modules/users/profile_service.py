@@ -0,0 +1,185 @@
+"""
+Enhanced Profile Service
+Projection-based loader and response cache for GET /api/users/me/profile/enhanced
+
+The profile is read with ONE query: the User columns it needs, left-joined to
+the user's active UserIndustry rows (one row per industry). Theme, layout
+density, font size and industry names are resolved from the reference data
+cache (common.ref_data_cache), so no per-field db.get() calls are made and no
+ORM instance is loaded - nothing to expire or refresh.
+
+Built responses are cached per user and dropped when a transaction that
+changed the user's User or UserIndustry rows commits (profile enhancements,
+details, industry add/update/remove), so a stale response is never served by
+this worker; other workers pick the change up within
+PROFILE_CACHE_TTL_SECONDS.
+"""
+from typing import Optional
+
+from sqlalchemy import event, select, and_
+from sqlalchemy.orm import Session
+
+from models.user import User
+from models.user_industry import UserIndustry
+from schemas.user import (
+    EnhancedUserProfileResponse, ReferenceOptionResponse, IndustryAssociationResponse
+)
+from common.ref_data_cache import ReferenceOption, ref_data_cache
+from common.logger import get_logger
+from common.ttl_cache import CommitInvalidation, TtlLruCache
+
+logger = get_logger(__name__)
+
+
+PROFILE_CACHE_TTL_SECONDS = 60
+PROFILE_CACHE_MAX_ENTRIES = 5000
+
+# Session.info key holding user IDs whose profile changed in the open transaction
+_PENDING_PROFILES_KEY = "profile_cache_pending_users"
+
+
+def _reference_response(option: Optional[ReferenceOption]) -> Optional[ReferenceOptionResponse]:
+    if option is None:
+        return None
+    return ReferenceOptionResponse(
+        id=option.id,
+        code=option.code,
+        name=option.name,
+        description=str(option.description),
+        css_class=str(option.css_class),
+        base_font_size=str(option.base_font_size) if option.base_font_size is not None else None
+    )
+
+
+def load_enhanced_profile(db: Session, user_id: int) -> Optional[EnhancedUserProfileResponse]:
+    """
+    Build the enhanced profile response with a single query (bypasses the cache).
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        EnhancedUserProfileResponse, or None if the user does not exist
+    """
+    stmt = (
+        select(
+            User.UserID,
+            User.Email,
+            User.FirstName,
+            User.LastName,
+            User.Phone,
+            User.Bio,
+            User.RoleTitle,
+            User.IsEmailVerified,
+            User.ThemePreferenceID,
+            User.LayoutDensityID,
+            User.FontSizeID,
+            UserIndustry.UserIndustryID,
+            UserIndustry.IndustryID,
+            UserIndustry.IsPrimary,
+            UserIndustry.SortOrder,
+        )
+        .outerjoin(
+            UserIndustry,
+            and_(
+                UserIndustry.UserID == User.UserID,
+                UserIndustry.IsDeleted == False  # noqa: E712
+            )
+        )
+        .where(User.UserID == user_id)
+        .order_by(UserIndustry.IsPrimary.desc(), UserIndustry.SortOrder.asc())
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+
+    user = rows[0]
+    industries = []
+    for row in rows:
+        if row.UserIndustryID is None:
+            continue
+        industry = ref_data_cache.get_option(db, "industry", row.IndustryID)
+        if industry:
+            industries.append(IndustryAssociationResponse(
+                user_industry_id=int(row.UserIndustryID),
+                industry_id=industry.id,
+                industry_name=industry.name,
+                industry_code=industry.code,
+                is_primary=bool(row.IsPrimary),
+                sort_order=int(row.SortOrder)
+            ))
+
+    return EnhancedUserProfileResponse(
+        user_id=int(user.UserID),
+        email=str(user.Email),
+        first_name=str(user.FirstName),
+        last_name=str(user.LastName),
+        phone=str(user.Phone) if user.Phone else None,
+        bio=str(user.Bio) if user.Bio else None,
+        role_title=str(user.RoleTitle) if user.RoleTitle else None,
+        is_email_verified=bool(user.IsEmailVerified),
+        theme_preference=_reference_response(
+            ref_data_cache.get_option(db, "theme", user.ThemePreferenceID)
+        ),
+        layout_density=_reference_response(
+            ref_data_cache.get_option(db, "layout_density", user.LayoutDensityID)
+        ),
+        font_size=_reference_response(
+            ref_data_cache.get_option(db, "font_size", user.FontSizeID)
+        ),
+        industries=industries
+    )
+
+
+class ProfileResponseCache(TtlLruCache):
+    """
+    Process-wide cache of enhanced profile responses keyed by user ID.
+
+    Features:
+    - Generation counter: a load that raced with a write is not stored
+    - TTL expiry for changes made by other workers
+    - Bounded size (least recently used entries evicted first)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = PROFILE_CACHE_TTL_SECONDS,
+        max_entries: int = PROFILE_CACHE_MAX_ENTRIES
+    ):
+        super().__init__(ttl_seconds, max_entries, key=lambda response: response.user_id)
+
+
+# Shared instance
+profile_response_cache = ProfileResponseCache()
+
+
+def get_enhanced_profile(db: Session, user_id: int) -> Optional[EnhancedUserProfileResponse]:
+    """
+    Get the enhanced profile response (cached, one query on miss).
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        EnhancedUserProfileResponse, or None if the user does not exist
+    """
+    response = profile_response_cache.get(user_id)
+    if response is None:
+        generation = profile_response_cache.generation()
+        response = load_enhanced_profile(db, user_id)
+        if response is not None:
+            profile_response_cache.set(response, generation)
+    return response
+
+
+# ----------------------------------------------------------------------------
+# Automatic invalidation (ORM events)
+# ----------------------------------------------------------------------------
+
+_pending_profiles = CommitInvalidation(_PENDING_PROFILES_KEY, profile_response_cache.invalidate)
+
+event.listen(User, "after_update", _pending_profiles.queue_attribute("UserID"))
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(UserIndustry, _event_name, _pending_profiles.queue_attribute("UserID"))
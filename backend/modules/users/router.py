@@ -4,15 +4,13 @@ Endpoints for user profile management
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from pydantic import BaseModel, Field
 
-from common.database import get_db
+from common.database import get_db, get_async_db
 from modules.auth.dependencies import get_current_user
 from modules.auth.models import CurrentUser
-from models.company import Company
-from models.ref.user_company_role import UserCompanyRole
 from schemas.user import (
     UpdateUserDetailsSchema, UpdateUserDetailsResponse, UserProfileResponse,
     SwitchCompanyRequest, SwitchCompanyResponse, UserCompanyInfo, RelationshipInfo,
@@ -25,12 +23,9 @@ from .service import (
     update_user_industry, remove_user_industry
 )
 from .switch_service import CompanySwitchService
+from .profile_service import get_enhanced_profile
 from common.logger import get_logger
-
-from models.ref.theme_preference import ThemePreference
-from models.ref.layout_density import LayoutDensity
-from models.ref.font_size import FontSize
-from models.ref.industry import Industry
+from common.ref_data_cache import ref_data_cache
 
 logger = get_logger(__name__)
 
@@ -99,7 +94,7 @@ async def update_my_details(
 )
 async def get_my_profile(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> UserProfileResponse:
     """
     Get current user's profile.
@@ -150,7 +145,7 @@ async def get_my_profile(
 )
 async def list_my_companies(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> List[UserCompanyInfo]:
     """
     List all companies user belongs to, enriched with relationship context.
@@ -161,20 +156,18 @@ async def list_my_companies(
         
         result = []
         for item in enriched_companies:
-            uc = item['user_company']
-            company = db.get(Company, uc.CompanyID)
-            role = db.get(UserCompanyRole, uc.UserCompanyRoleID)
+            membership = item['membership']
 
             relationship_info = None
             if item.get('relationship'):
                 relationship_info = RelationshipInfo(**item['relationship'])
 
             result.append(UserCompanyInfo(
-                company_id=uc.CompanyID,
-                company_name=company.CompanyName,
-                role=role.RoleCode,
-                is_primary=uc.IsPrimaryCompany,
-                joined_at=uc.JoinedDate,
+                company_id=membership.company_id,
+                company_name=membership.company_name,
+                role=membership.role_code,
+                is_primary=membership.is_primary,
+                joined_at=membership.joined_date,
                 relationship=relationship_info
             ))
         
@@ -319,94 +312,17 @@ async def get_my_enhanced_profile(
     Requires authentication.
     """
     try:
-        # Get user - use expire/refresh to ensure we get latest data from database
-        # This ensures we get the latest theme preferences even if cached
-        user = await get_user_profile(db, current_user.user_id)
+        # One projection query (user + industries) on a cache miss; reference
+        # names come from the ref-data cache. Cached per profile version, which
+        # is bumped when profile or industry changes commit.
+        response = get_enhanced_profile(db, current_user.user_id)
         
-        if not user:
+        if not response:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        # Expire and refresh user object to ensure we get latest data from database
-        # This ensures we get the latest theme preferences even if cached in session
-        db.expire(user)
-        db.refresh(user)
-        
-        # Get industry associations
-        user_industries = await get_user_industries(db, current_user.user_id)
-        industries_list = []
-        
-        for ui in user_industries:
-            industry = db.get(Industry, ui.IndustryID)
-            if industry:
-                industries_list.append(IndustryAssociationResponse(
-                    user_industry_id=int(ui.UserIndustryID),
-                    industry_id=int(industry.IndustryID),
-                    industry_name=str(industry.IndustryName),
-                    industry_code=str(industry.IndustryCode),
-                    is_primary=bool(ui.IsPrimary),
-                    sort_order=int(ui.SortOrder)
-                ))
-        
-        # Build response
-        response = EnhancedUserProfileResponse(
-            user_id=int(user.UserID),
-            email=str(user.Email),
-            first_name=str(user.FirstName),
-            last_name=str(user.LastName),
-            phone=str(user.Phone) if user.Phone else None,
-            bio=str(user.Bio) if user.Bio else None,
-            role_title=str(user.RoleTitle) if user.RoleTitle else None,
-            is_email_verified=bool(user.IsEmailVerified),
-            industries=industries_list
-        )
-        
-        # Add theme preference if set
-        if user.ThemePreferenceID:
-            theme = db.get(ThemePreference, user.ThemePreferenceID)
-            if theme:
-                logger.info(f"Returning theme preference: UserID={user.UserID}, "
-                           f"ThemePreferenceID={user.ThemePreferenceID}, "
-                           f"ThemeCode={theme.ThemeCode}, ThemeName={theme.ThemeName}")
-                response.theme_preference = ReferenceOptionResponse(
-                    id=int(theme.ThemePreferenceID),
-                    code=str(theme.ThemeCode),
-                    name=str(theme.ThemeName),
-                    description=str(theme.Description),
-                    css_class=str(theme.CSSClass),
-                    base_font_size=None
-                )
-        else:
-            logger.info(f"No theme preference set: UserID={user.UserID}, ThemePreferenceID={user.ThemePreferenceID}")
-        
-        # Add layout density if set
-        if user.LayoutDensityID:
-            density = db.get(LayoutDensity, user.LayoutDensityID)
-            if density:
-                response.layout_density = ReferenceOptionResponse(
-                    id=int(density.LayoutDensityID),
-                    code=str(density.DensityCode),
-                    name=str(density.DensityName),
-                    description=str(density.Description),
-                    css_class=str(density.CSSClass),
-                    base_font_size=None
-                )
-        
-        # Add font size if set
-        if user.FontSizeID:
-            font_size = db.get(FontSize, user.FontSizeID)
-            if font_size:
-                response.font_size = ReferenceOptionResponse(
-                    id=int(font_size.FontSizeID),
-                    code=str(font_size.SizeCode),
-                    name=str(font_size.SizeName),
-                    description=str(font_size.Description),
-                    css_class=str(font_size.CSSClass),
-                    base_font_size=str(font_size.BaseFontSize)
-                )
-        
         return response
         
     except HTTPException:
@@ -445,13 +361,13 @@ async def get_my_industries(
         industries_list = []
         
         for ui in user_industries:
-            industry = db.get(Industry, ui.IndustryID)
+            industry = ref_data_cache.get_option(db, "industry", ui.IndustryID)
             if industry:
                 industries_list.append(IndustryAssociationResponse(
                     user_industry_id=int(ui.UserIndustryID),
-                    industry_id=int(industry.IndustryID),
-                    industry_name=str(industry.IndustryName),
-                    industry_code=str(industry.IndustryCode),
+                    industry_id=industry.id,
+                    industry_name=industry.name,
+                    industry_code=industry.code,
                     is_primary=bool(ui.IsPrimary),
                     sort_order=int(ui.SortOrder)
                 ))
@@ -497,7 +413,7 @@ async def add_my_industry(
             sort_order=request.sort_order
         )
         
-        industry = db.get(Industry, user_industry.IndustryID)
+        industry = ref_data_cache.get_option(db, "industry", user_industry.IndustryID)
         if not industry:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -506,9 +422,9 @@ async def add_my_industry(
         
         return IndustryAssociationResponse(
             user_industry_id=int(user_industry.UserIndustryID),
-            industry_id=int(industry.IndustryID),
-            industry_name=str(industry.IndustryName),
-            industry_code=str(industry.IndustryCode),
+            industry_id=industry.id,
+            industry_name=industry.name,
+            industry_code=industry.code,
             is_primary=bool(user_industry.IsPrimary),
             sort_order=int(user_industry.SortOrder)
         )
@@ -560,7 +476,7 @@ async def update_my_industry(
             sort_order=request.sort_order
         )
         
-        industry = db.get(Industry, user_industry.IndustryID)
+        industry = ref_data_cache.get_option(db, "industry", user_industry.IndustryID)
         if not industry:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -569,9 +485,9 @@ async def update_my_industry(
         
         return IndustryAssociationResponse(
             user_industry_id=int(user_industry.UserIndustryID),
-            industry_id=int(industry.IndustryID),
-            industry_name=str(industry.IndustryName),
-            industry_code=str(industry.IndustryCode),
+            industry_id=industry.id,
+            industry_name=industry.name,
+            industry_code=industry.code,
             is_primary=bool(user_industry.IsPrimary),
             sort_order=int(user_industry.SortOrder)
         )
@@ -658,22 +574,16 @@ async def get_themes(
     No authentication required.
     """
     try:
-        stmt = select(ThemePreference).where(
-            ThemePreference.IsActive == True
-        ).order_by(ThemePreference.SortOrder.asc())
-        
-        themes = db.execute(stmt).scalars().all()
-        
         return [
             ReferenceOptionResponse(
-                id=int(theme.ThemePreferenceID),
-                code=str(theme.ThemeCode),
-                name=str(theme.ThemeName),
-                description=str(theme.Description),
-                css_class=str(theme.CSSClass),
+                id=theme.id,
+                code=theme.code,
+                name=theme.name,
+                description=str(theme.description),
+                css_class=str(theme.css_class),
                 base_font_size=None
             )
-            for theme in themes
+            for theme in ref_data_cache.list_active(db, "theme")
         ]
         
     except Exception as e:
@@ -705,22 +615,16 @@ async def get_layout_densities(
     No authentication required.
     """
     try:
-        stmt = select(LayoutDensity).where(
-            LayoutDensity.IsActive == True
-        ).order_by(LayoutDensity.SortOrder.asc())
-        
-        densities = db.execute(stmt).scalars().all()
-        
         return [
             ReferenceOptionResponse(
-                id=int(density.LayoutDensityID),
-                code=str(density.DensityCode),
-                name=str(density.DensityName),
-                description=str(density.Description),
-                css_class=str(density.CSSClass),
+                id=density.id,
+                code=density.code,
+                name=density.name,
+                description=str(density.description),
+                css_class=str(density.css_class),
                 base_font_size=None
             )
-            for density in densities
+            for density in ref_data_cache.list_active(db, "layout_density")
         ]
         
     except Exception as e:
@@ -752,22 +656,16 @@ async def get_font_sizes(
     No authentication required.
     """
     try:
-        stmt = select(FontSize).where(
-            FontSize.IsActive == True
-        ).order_by(FontSize.SortOrder.asc())
-        
-        font_sizes = db.execute(stmt).scalars().all()
-        
         return [
             ReferenceOptionResponse(
-                id=int(font_size.FontSizeID),
-                code=str(font_size.SizeCode),
-                name=str(font_size.SizeName),
-                description=str(font_size.Description),
-                css_class=str(font_size.CSSClass),
-                base_font_size=str(font_size.BaseFontSize)
+                id=font_size.id,
+                code=font_size.code,
+                name=font_size.name,
+                description=str(font_size.description),
+                css_class=str(font_size.css_class),
+                base_font_size=str(font_size.base_font_size)
             )
-            for font_size in font_sizes
+            for font_size in ref_data_cache.list_active(db, "font_size")
         ]
         
     except Exception as e:
@@ -814,20 +712,14 @@ async def get_industries(
     No authentication required.
     """
     try:
-        stmt = select(Industry).where(
-            Industry.IsActive == True
-        ).order_by(Industry.SortOrder.asc())
-        
-        industries = db.execute(stmt).scalars().all()
-        
         return [
             IndustryOptionResponse(
-                id=int(industry.IndustryID),
-                code=str(industry.IndustryCode),
-                name=str(industry.IndustryName),
-                description=str(industry.Description)
+                id=industry.id,
+                code=industry.code,
+                name=industry.name,
+                description=str(industry.description)
             )
-            for industry in industries
+            for industry in ref_data_cache.list_active(db, "industry")
         ]
         
     except Exception as e:
@@ -3,6 +3,7 @@ User Service Module
 Business logic for user profile management
 """
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional, List
 from datetime import datetime
@@ -15,93 +16,40 @@ from models.ref.layout_density import LayoutDensity
 from models.ref.font_size import FontSize
 from models.ref.industry import Industry
 from models.audit.user_audit import UserAudit
-from models.user_company import UserCompany
-from models.ref.user_company_status import UserCompanyStatus
-from models.company_relationship import CompanyRelationship
+from modules.companies.relationship_graph import relationship_graph_cache, relationship_context
+from common.membership_cache import get_membership_snapshot_async
 from common.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-async def get_user_companies_with_relationship_context(db: Session, user_id: int) -> List[dict]:
+async def get_user_companies_with_relationship_context(db: AsyncSession, user_id: int) -> List[dict]:
     """
     Get all active companies a user belongs to, enriched with relationship context.
     AC-1.11.1, AC-1.11.3, AC-1.11.8
+    
+    Memberships come from the cached membership snapshot (one query on miss:
+    company name, role and status joined in) and relationship context from the
+    cached adjacency graph (modules.companies.relationship_graph).
+    
+    Returns:
+        List of {"membership": CompanyMembership, "relationship": dict | None},
+        primary company first, then by join date
     """
-    # Get all active UserCompany associations
-    uc_stmt = select(UserCompany).join(UserCompanyStatus).where(
-        UserCompany.UserID == user_id,
-        UserCompany.IsDeleted == False,
-        UserCompanyStatus.StatusCode == "active"
-    ).order_by(UserCompany.IsPrimaryCompany.desc(), UserCompany.JoinedDate.asc())
-    user_companies = db.execute(uc_stmt).scalars().all()
-
-    company_ids = [uc.CompanyID for uc in user_companies]
-    if not company_ids:
+    snapshot = await get_membership_snapshot_async(db, user_id)
+    memberships = snapshot.active()
+    if not memberships:
         return []
 
-    # Get all relationships involving any of the user's companies
-    rel_stmt = select(CompanyRelationship).where(
-        (CompanyRelationship.ParentCompanyID.in_(company_ids)) |
-        (CompanyRelationship.ChildCompanyID.in_(company_ids)),
-        CompanyRelationship.IsDeleted == False,
-        CompanyRelationship.Status == 'active'
-    )
-    relationships = db.execute(rel_stmt).scalars().all()
-    
-    # Organize relationships for quick lookup
-    rel_map = {}
-    for rel in relationships:
-        rel_map.setdefault(rel.ParentCompanyID, []).append(rel)
-        rel_map.setdefault(rel.ChildCompanyID, []).append(rel)
+    graph = await relationship_graph_cache.get_async(db)
 
-    results = []
-    for uc in user_companies:
-        company_details = {
-            "user_company": uc,
-            "relationship": None
+    return [
+        {
+            "membership": membership,
+            "relationship": relationship_context(graph, membership.company_id)
         }
-
-        # Determine relationship context from the perspective of the *current* company (uc.CompanyID)
-        if uc.CompanyID in rel_map:
-            for rel in rel_map[uc.CompanyID]:
-                # This logic finds the first relationship, assuming one company won't be
-                # a branch and a partner of the same other company simultaneously.
-                # More complex logic may be needed if multiple relationship types can coexist.
-                
-                # If the user's company is the PARENT in the relationship
-                if rel.ParentCompanyID == uc.CompanyID:
-                    if rel.relationship_type.TypeName == 'branch':
-                        display_name = 'Head Office'
-                    else: # subsidiary, partner
-                        display_name = 'Parent'
-                    
-                    company_details['relationship'] = {
-                        "type": "parent",
-                        "display_name": display_name,
-                        "related_company_id": rel.ChildCompanyID
-                    }
-                    break
-
-                # If the user's company is the CHILD in the relationship
-                elif rel.ChildCompanyID == uc.CompanyID:
-                    if rel.relationship_type.TypeName == 'branch':
-                        display_name = 'Branch'
-                    elif rel.relationship_type.TypeName == 'subsidiary':
-                        display_name = 'Subsidiary'
-                    else: # partner
-                         display_name = 'Partner'
-
-                    company_details['relationship'] = {
-                        "type": "child",
-                        "display_name": display_name,
-                        "related_company_id": rel.ParentCompanyID
-                    }
-                    break
-        
-        results.append(company_details)
-
-    return results
+        for membership in memberships
+    ]
 
 
 async def update_user_details(
@@ -206,20 +154,21 @@ async def update_user_details(
         raise
 
 
-async def get_user_profile(db: Session, user_id: int) -> Optional[User]:
+async def get_user_profile(db: AsyncSession, user_id: int) -> Optional[User]:
     """
     Get user profile by ID.
     
     Args:
-        db: Database session
+        db: Async database session
         user_id: User ID
         
     Returns:
         User object or None if not found
     """
-    return db.execute(
+    result = await db.execute(
         select(User).where(User.UserID == user_id)
-    ).scalar_one_or_none()
+    )
+    return result.scalar_one_or_none()
 
 
 # ============================================================================
@@ -2,13 +2,12 @@
 Service for handling company switching logic.
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from sqlalchemy import update
 
 from models.user import User
-from models.company import Company
 from models.user_company import UserCompany
-from models.ref.user_company_role import UserCompanyRole
 from modules.auth.jwt_service import create_access_token, create_refresh_token
+from common.membership_cache import invalidate_memberships_on_commit, load_membership_snapshot
 from common.logger import get_logger
 
 logger = get_logger(__name__)
@@ -27,21 +26,17 @@ class CompanySwitchService:
         4. Generates new JWTs with the updated company_id and role.
         5. Returns new tokens and company details.
         """
-        # Get the target UserCompany record
-        target_uc_stmt = select(UserCompany).where(
-            UserCompany.UserID == user_id,
-            UserCompany.CompanyID == target_company_id
-        )
-        target_user_company = self.db.execute(target_uc_stmt).scalars().first()
+        # Target membership, loaded uncached (one query): the snapshot cache is
+        # per process and may not have seen a deactivation in another worker
+        snapshot = load_membership_snapshot(self.db, user_id)
+        target_membership = snapshot.get(target_company_id)
 
         # Validation: User must belong to the target company
-        if not target_user_company:
+        if not target_membership:
             raise ValueError("User does not have access to the target company.")
         
         # Validation: User's status in the company must be active
-        # Assuming StatusID 1 is 'active' based on common practice.
-        # TODO: Replace magic number 1 with an enum or a lookup from ref.UserCompanyStatus
-        if target_user_company.StatusID != 1:
+        if not target_membership.is_active:
             raise ValueError("User is not active in the target company.")
 
         # Step 1: Set all user's companies to IsPrimaryCompany = False
@@ -51,16 +46,20 @@ class CompanySwitchService:
         self.db.execute(update_stmt)
 
         # Step 2: Set the target company to IsPrimaryCompany = True
-        target_user_company.IsPrimaryCompany = True
-        self.db.add(target_user_company)
+        self.db.execute(
+            update(UserCompany)
+            .where(UserCompany.UserCompanyID == target_membership.user_company_id)
+            .values(IsPrimaryCompany=True)
+        )
+        # Bulk updates bypass ORM events - drop the cached snapshot explicitly
+        invalidate_memberships_on_commit(self.db, [user_id])
 
-        # Get user and role details for new token
+        # Get user details for new token
         user = self.db.get(User, user_id)
         if not user:
             raise ValueError("User not found.") # Should not happen
 
-        role = self.db.get(UserCompanyRole, target_user_company.UserCompanyRoleID)
-        if not role:
+        if not target_membership.role_code:
             raise ValueError("User role not found.") # Should not happen
 
         # Step 3: Generate new JWTs
@@ -68,7 +67,7 @@ class CompanySwitchService:
             db=self.db,
             user_id=user.UserID,
             email=user.Email,
-            role=role.RoleCode,
+            role=target_membership.role_code,
             company_id=target_company_id
         )
         
@@ -84,14 +83,12 @@ class CompanySwitchService:
         self.db.commit()
 
         # Step 5: Return tokens and company details
-        company = self.db.get(Company, target_company_id)
-        
         return {
             "access_token": new_access_token,
             "refresh_token": new_refresh_token,
             "company": {
-                "company_id": company.CompanyID,
-                "company_name": company.CompanyName,
-                "role": role.RoleCode
+                "company_id": target_membership.company_id,
+                "company_name": target_membership.company_name,
+                "role": target_membership.role_code
             }
         }
@@ -2,7 +2,11 @@
 Pydantic Schemas
 Base schemas and common patterns for API requests/responses
 """
-from schemas.base import BaseResponse, ErrorResponse, PaginationParams, PaginatedResponse
+from schemas.base import (
+    BaseResponse, ErrorResponse, PaginationParams, PaginatedResponse,
+    CursorParams, CursorPage, TotalCountCache, total_count_cache,
+    encode_cursor, decode_cursor, keyset_filter, apply_keyset
+)
 from schemas.common import validate_email, validate_australian_phone, validate_abn, validate_acn
 
 __all__ = [
@@ -11,6 +15,15 @@ __all__ = [
     "ErrorResponse",
     "PaginationParams",
     "PaginatedResponse",
+    # Keyset (cursor) pagination
+    "CursorParams",
+    "CursorPage",
+    "TotalCountCache",
+    "total_count_cache",
+    "encode_cursor",
+    "decode_cursor",
+    "keyset_filter",
+    "apply_keyset",
     # Common validators
     "validate_email",
     "validate_australian_phone",
@@ -2,8 +2,15 @@
 Base Pydantic Schemas
 Common response patterns and pagination
 """
-from typing import Any, Optional, Generic, TypeVar, List
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, Optional, Generic, Sequence, Tuple, TypeVar, List
 from pydantic import BaseModel, Field, ConfigDict
+from sqlalchemy import and_, or_
 
 
 # Generic type for paginated responses
@@ -199,3 +206,299 @@ class PaginatedResponse(BaseModel, Generic[T]):
             }
         )
 
+
+
+# ============================================================================
+# Keyset (cursor) pagination
+# ============================================================================
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort-key values of the last row on a page as an opaque cursor.
+    
+    Values are JSON-encoded (datetimes tagged so they round-trip) and then
+    URL-safe base64 encoded, so clients treat the cursor as an opaque token.
+    
+    Args:
+        values: Sort-key values in ORDER BY order, e.g. (InvitedAt, UserInvitationID)
+        
+    Returns:
+        str: Opaque cursor string
+    """
+    def _encode(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"dec": str(value)}
+        return value
+    
+    payload = json.dumps([_encode(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: Optional[int] = None) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor().
+    
+    Args:
+        cursor: Opaque cursor string
+        expected_length: Number of sort-key values expected (validated if given)
+        
+    Returns:
+        Tuple of sort-key values
+        
+    Raises:
+        ValueError: If the cursor is malformed or has the wrong number of values
+    """
+    def _decode(value: Any) -> Any:
+        if isinstance(value, dict) and "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if isinstance(value, dict) and "dec" in value:
+            return Decimal(value["dec"])
+        return value
+    
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    
+    if not isinstance(values, list) or (expected_length is not None and len(values) != expected_length):
+        raise ValueError("Invalid pagination cursor")
+    
+    return tuple(_decode(v) for v in values)
+
+
+def keyset_filter(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+    """
+    Build the seek predicate for rows strictly after `values` in sort order.
+    
+    Expanded OR form is used instead of a row-value comparison because
+    SQL Server does not support `(a, b) < (x, y)`:
+        a < x OR (a = x AND b < y)
+    
+    Args:
+        columns: Sort-key columns, most significant first (last must be unique)
+        values: Sort-key values of the last row on the previous page
+        descending: True for DESC ordering, False for ASC
+        
+    Returns:
+        SQLAlchemy boolean expression
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        past = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, past))
+    return or_(*clauses)
+
+
+def apply_keyset(
+    query,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True
+):
+    """
+    Apply keyset pagination to a select() statement.
+    
+    Adds the seek predicate for `cursor` (if any), ORDER BY on `columns` and
+    LIMIT limit + 1 (the extra row tells whether another page exists; see
+    CursorPage.from_rows).
+    
+    Args:
+        query: SQLAlchemy select() statement
+        columns: Sort-key columns, most significant first (last must be unique)
+        cursor: Cursor from the previous page (None for the first page)
+        limit: Page size
+        descending: True for newest-first ordering
+        
+    Returns:
+        Modified select() statement
+        
+    Raises:
+        ValueError: If the cursor is invalid
+        
+    Example:
+        >>> stmt = apply_keyset(
+        ...     select(UserInvitation).where(UserInvitation.CompanyID == company_id),
+        ...     [UserInvitation.InvitedAt, UserInvitation.UserInvitationID],
+        ...     cursor, limit=20
+        ... )
+    """
+    if cursor:
+        values = decode_cursor(cursor, expected_length=len(columns))
+        query = query.where(keyset_filter(columns, values, descending))
+    
+    order_by = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+class CursorParams(BaseModel):
+    """
+    Cursor pagination parameters for list endpoints.
+    
+    Attributes:
+        cursor: Opaque cursor from the previous page's next_cursor (None = first page)
+        limit: Number of items per page
+        include_total: Whether to return a (cached/approximate) total count
+    """
+    cursor: Optional[str] = Field(None, description="Cursor from previous page (omit for first page)")
+    limit: int = Field(20, ge=1, le=100, description="Items per page (max 100)")
+    include_total: bool = Field(False, description="Include cached/approximate total count")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """
+    Cursor-paginated response.
+    
+    Attributes:
+        items: Items for the current page
+        next_cursor: Cursor for the next page (None when this is the last page)
+        has_more: Whether another page exists
+        limit: Page size requested
+        total: Total item count (only when requested; may be cached or approximate)
+        total_is_estimate: True when total is approximate or served from cache
+        
+    Example:
+        {
+            "items": [{"id": 2}, {"id": 1}],
+            "next_cursor": "WzEsMl0",
+            "has_more": true,
+            "limit": 2,
+            "total": 57,
+            "total_is_estimate": true
+        }
+    """
+    items: List[T] = Field(..., description="Items for current page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+    has_more: bool = Field(False, description="Whether another page exists")
+    limit: int = Field(..., description="Items per page")
+    total: Optional[int] = Field(None, description="Total items (cached/approximate)")
+    total_is_estimate: bool = Field(False, description="Whether total is cached or approximate")
+    
+    @staticmethod
+    def split_rows(
+        rows: Sequence[Any],
+        limit: int,
+        key: Callable[[Any], Sequence[Any]]
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Split a limit + 1 result set into the page rows and the next cursor.
+        
+        Args:
+            rows: Rows fetched with LIMIT limit + 1
+            limit: Page size
+            key: Function returning a row's sort-key values
+            
+        Returns:
+            Tuple of (page rows, next cursor or None)
+        """
+        page = list(rows[:limit])
+        next_cursor = encode_cursor(key(page[-1])) if len(rows) > limit and page else None
+        return page, next_cursor
+    
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Any],
+        limit: int,
+        key: Callable[[Any], Sequence[Any]],
+        transform: Optional[Callable[[Any], T]] = None,
+        total: Optional[int] = None,
+        total_is_estimate: bool = False
+    ) -> "CursorPage[T]":
+        """
+        Build a page from rows fetched with apply_keyset().
+        
+        Args:
+            rows: Rows fetched with LIMIT limit + 1
+            limit: Page size
+            key: Function returning a row's sort-key values (for the next cursor)
+            transform: Optional row -> item conversion
+            total: Optional total count
+            total_is_estimate: Whether total is cached/approximate
+            
+        Returns:
+            CursorPage: Formatted page
+        """
+        page, next_cursor = cls.split_rows(rows, limit, key)
+        return cls(
+            items=[transform(row) for row in page] if transform else page,
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None,
+            limit=limit,
+            total=total,
+            total_is_estimate=total_is_estimate
+        )
+
+
+class TotalCountCache:
+    """
+    Short-lived cache for expensive COUNT(*) totals on paginated lists.
+    
+    Cursor pagination does not need a total to page, so totals are optional
+    and served from this cache (default 60 second TTL) instead of running a
+    COUNT(*) on every page request.
+    
+    Usage:
+        total, cached = total_count_cache.get_or_compute(
+            ("invitations", company_id, status_filter),
+            lambda: db.execute(count_query).scalar()
+        )
+    """
+    
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[int]:
+        """Get a cached total, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                return None
+            return entry[1]
+    
+    def set(self, key: Hashable, total: int) -> None:
+        """Store a total (oldest entry evicted when full)"""
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic(), int(total))
+    
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def invalidate_prefix(self, prefix: Tuple[Any, ...]) -> None:
+        """Drop every tuple key starting with `prefix` (e.g. all filters for one company)"""
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[:len(prefix)] == prefix]:
+                del self._entries[key]
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Optional[int]]) -> Tuple[int, bool]:
+        """
+        Get a cached total or compute and cache it.
+        
+        Returns:
+            Tuple of (total, served_from_cache)
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+        total = int(compute() or 0)
+        self.set(key, total)
+        return total, False
+
+
+# Shared cache for list totals
+total_count_cache = TotalCountCache()
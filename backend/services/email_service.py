@@ -8,8 +8,9 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from jinja2 import Environment, FileSystemLoader, TemplateNotFound, UndefinedError, StrictUndefined
 
-from common.database import SessionLocal
+from common.database import LogSessionLocal
 from common.request_context import get_current_request_context
+from common.timing import traced
 from models.log.email_delivery import EmailDelivery
 from services.email_providers import EmailProvider, MailHogProvider, SMTPProvider
 from services.email_providers.mailhog import TransientEmailError, PermanentEmailError
@@ -54,6 +55,7 @@ class EmailService:
             undefined=StrictUndefined  # Raise error for undefined variables
         )
     
+    @traced("email")
     async def send_email(
         self,
         to: str,
@@ -251,7 +253,7 @@ class EmailService:
         Returns:
             EmailDeliveryID of created log record
         """
-        db = SessionLocal()
+        db = LogSessionLocal()
         try:
             email_log = EmailDelivery(
                 EmailType=template_name,
@@ -297,7 +299,7 @@ class EmailService:
         if delivery_id <= 0:
             return  # Skip if logging failed
         
-        db = SessionLocal()
+        db = LogSessionLocal()
         try:
             email_log = db.get(EmailDelivery, delivery_id)
             if email_log:
@@ -10,8 +10,9 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 # Add backend directory to path for consistent imports
 backend_dir = os.path.dirname(os.path.dirname(__file__))
@@ -20,10 +21,15 @@ if backend_dir not in sys.path:
 
 # Import app and models - this will register all models with Base
 from main import app
-from common.database import Base, get_db
+from common.database import Base, get_db, get_async_db
 from modules.users.router import router as users_router
 from modules.companies.router import router as companies_router
 from modules.auth.router import router as auth_router
+from common.membership_cache import membership_cache
+from modules.companies.relationship_graph import relationship_graph_cache
+from common.ref_data_cache import ref_data_cache
+from modules.users.profile_service import profile_response_cache
+from modules.forms.submission_service import submission_target_cache
 # Import other routers as needed for tests...
 
 def create_test_app():
@@ -40,6 +46,10 @@ def create_test_app():
 TEST_DATABASE_URL = os.getenv("DATABASE_URL")  # Use actual database
 USE_REAL_DB = TEST_DATABASE_URL and "mssql" in TEST_DATABASE_URL.lower()
 
+# Named shared-cache in-memory SQLite database, so the sync test session and the
+# async (aiosqlite) sessions used by get_async_db routes see the same data
+SQLITE_TEST_DATABASE = "file:eventlead_test?mode=memory&cache=shared&uri=true"
+
 @pytest.fixture(scope="session")
 def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     """Create an instance of the default event loop for the test session."""
@@ -47,6 +57,17 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     yield loop
     loop.close()
 
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Process-wide caches must not leak rows between per-test databases."""
+    membership_cache.clear()
+    relationship_graph_cache.invalidate()
+    ref_data_cache.invalidate()
+    profile_response_cache.clear()
+    submission_target_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def test_db():
     """
@@ -67,7 +88,7 @@ def test_db():
     else:
         # Create in-memory SQLite database for testing
         engine = create_engine(
-            "sqlite:///:memory:",
+            f"sqlite:///{SQLITE_TEST_DATABASE}",
             connect_args={"check_same_thread": False},
             poolclass=StaticPool,
         )
@@ -94,12 +115,30 @@ def client(test_db) -> Generator[TestClient, None, None]:
         finally:
             pass
     
+    async_engine = None
+    if not USE_REAL_DB:
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{SQLITE_TEST_DATABASE}",
+            poolclass=NullPool,
+        )
+        AsyncTestingSessionLocal = async_sessionmaker(
+            bind=async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        
+        async def override_get_async_db():
+            async with AsyncTestingSessionLocal() as session:
+                yield session
+        
+        app.dependency_overrides[get_async_db] = override_get_async_db
+    
     app.dependency_overrides[get_db] = override_get_db
     
     with TestClient(app) as test_client:
         yield test_client
     
     app.dependency_overrides.clear()
+    if async_engine is not None:
+        async_engine.sync_engine.dispose()
 
 @pytest.fixture
 def sample_user_data():
@@ -0,0 +1,150 @@
+"""
+SQLite Test Support
+Engine setup shared by the tests that run the SQL Server models on SQLite
+
+- BigInteger compiles to INTEGER (SQLite only autoincrements INTEGER
+  PRIMARY KEY), registered once on import
+- The dbo / ref / log / config schemas are translated away
+- GETUTCDATE() (server defaults) is registered on every connection
+
+Route tests serve one router with a TestClient whose get_async_db sessions
+use aiosqlite on the same file database the sync engine seeded.
+
+Usage:
+    from tests.sqlite_support import route_client, sqlite_engine
+
+    engine = sqlite_engine([ApiRequest.__table__])
+
+    with route_client(router, url, current_user) as client:
+        client.get("/api/...")
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import BigInteger, Table, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool, StaticPool
+
+from common.database import Base, get_async_db, to_async_url
+from common.membership_cache import CompanyMembership, MembershipSnapshot
+from modules.auth.dependencies import get_current_memberships, get_current_user
+from modules.auth.models import CurrentUser
+
+
+MEMORY_URL = "sqlite:///:memory:"
+
+# SQL Server schemas used by the models
+SCHEMAS = ("dbo", "ref", "log", "config")
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY
+    return "INTEGER"
+
+
+def _register_functions(engine: Engine, utcnow: Callable[[], datetime]) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, _record):
+        dbapi_connection.create_function("getutcdate", 0, lambda: utcnow().isoformat(" "))
+
+
+def sqlite_engine(
+    tables: Iterable[Table] = (),
+    url: str = MEMORY_URL,
+    utcnow: Callable[[], datetime] = datetime.utcnow,
+    **engine_kwargs
+) -> Engine:
+    """
+    SQLite engine with the model schemas translated away and tables created.
+
+    Args:
+        tables: Tables to create
+        url: Database URL; in-memory databases share one connection
+            (StaticPool) unless other engine arguments are given
+        utcnow: Value of GETUTCDATE()
+        **engine_kwargs: Passed to create_engine()
+    """
+    if url == MEMORY_URL and not engine_kwargs:
+        engine_kwargs = {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+    engine = create_engine(url, **engine_kwargs).execution_options(
+        schema_translate_map={schema: None for schema in SCHEMAS}
+    )
+    _register_functions(engine, utcnow)
+
+    tables = list(tables)
+    if tables:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn, tables=tables)
+    return engine
+
+
+def async_sqlite_engine(url: str, utcnow: Callable[[], datetime] = datetime.utcnow) -> AsyncEngine:
+    """
+    aiosqlite engine for a file database created with sqlite_engine().
+
+    Connections are not pooled: each TestClient request runs on its own
+    event loop.
+    """
+    engine = create_async_engine(to_async_url(url), poolclass=NullPool).execution_options(
+        schema_translate_map={schema: None for schema in SCHEMAS}
+    )
+    _register_functions(engine.sync_engine, utcnow)
+    return engine
+
+
+def active_memberships(current_user: CurrentUser, *company_ids: int) -> MembershipSnapshot:
+    """Snapshot with an active membership of each company (default: the token's)"""
+    return MembershipSnapshot(current_user.user_id, tuple(
+        CompanyMembership(
+            user_company_id=index, company_id=company_id, company_name=None,
+            role_code=current_user.role, role_name=None, status_code="active",
+            is_primary=index == 1, joined_date=None
+        )
+        for index, company_id in enumerate(company_ids or (current_user.company_id,), start=1)
+    ))
+
+
+@contextmanager
+def route_client(
+    router: APIRouter,
+    url: str,
+    current_user: CurrentUser,
+    memberships: Optional[MembershipSnapshot] = None,
+    utcnow: Callable[[], datetime] = datetime.utcnow
+) -> Iterator[TestClient]:
+    """
+    TestClient for one router, authenticated as `current_user`.
+
+    Args:
+        router: Router under test
+        url: File database URL (see sqlite_engine())
+        current_user: Returned by get_current_user
+        memberships: Returned by get_current_memberships (default: active
+            member of the token's company)
+        utcnow: Value of GETUTCDATE()
+    """
+    engine = async_sqlite_engine(url, utcnow)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_async_db] = _get_async_db
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    app.dependency_overrides[get_current_memberships] = (
+        lambda: memberships if memberships is not None else active_memberships(current_user)
+    )
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        engine.sync_engine.dispose()
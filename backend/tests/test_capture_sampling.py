@@ -0,0 +1,283 @@
+"""
+Payload Capture Sampling Tests and Benchmark
+
+Covers common.capture_sampling:
+- Errors and slow requests always captured, the rest sampled per route
+  template with the default rate as fallback
+- User/company overrides until their expiry; add_capture_override pruning
+  expired entries in config.AppSetting
+- Settings normalisation (excluded endpoints seeded as a JSON string)
+- The process-wide snapshot: no database work within the refresh interval,
+  previous snapshot kept when loading fails
+- Request logger middleware only redacting payloads it decided to keep
+
+The benchmark replays a traffic mix (mostly fast 200s, some errors and slow
+requests) and compares the payload bytes redacted and stored with capture
+of every request against the sampled policy. Run it directly:
+
+    python -m tests.test_capture_sampling
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.capture_sampling as capture_sampling
+from common.capture_sampling import CapturePolicy, CapturePolicyCache, add_capture_override
+from models.config.app_setting import AppSetting
+from models.ref.setting_category import SettingCategory
+from models.ref.setting_type import SettingType
+from tests.sqlite_support import sqlite_engine
+
+
+NOW = datetime(2026, 3, 10, 12, 0, 0)
+
+
+def _policy(**settings) -> CapturePolicy:
+    settings.setdefault("sample_rate", 0.0)
+    return CapturePolicy.from_settings(now=NOW, **settings)
+
+
+class TestDecide:
+    """Per request decisions"""
+
+    def test_errors_and_slow_requests_always_captured(self):
+        policy = _policy(slow_request_ms=500)
+        assert policy.decide("/api/forms", 500, 10, now=NOW) == "error"
+        assert policy.decide("/api/forms", 404, 10, now=NOW) == "error"
+        assert policy.decide("/api/forms", 200, 500, now=NOW) == "slow"
+        assert policy.decide("/api/forms", 200, 499, now=NOW) is None
+
+    def test_route_rates_override_default(self):
+        policy = _policy(sample_rate=1.0, route_sample_rates={"/api/health": 0, "/api/forms/{form_id}": "1"})
+        assert policy.decide("/api/health", 200, 1, now=NOW) is None
+        assert policy.decide("/api/forms/{form_id}", 200, 1, now=NOW) == "sampled"
+        assert policy.decide("/api/events", 200, 1, now=NOW) == "sampled"
+
+    def test_default_rate_statistically(self):
+        policy = _policy(sample_rate=0.1)
+        rng = random.Random(7)
+        captured = sum(
+            policy.decide("/api/events", 200, 5, now=NOW, rand=rng.random) is not None
+            for _ in range(20000)
+        )
+        assert 1800 < captured < 2200
+
+    def test_rates_clamped(self):
+        policy = _policy(sample_rate=3, route_sample_rates={"/a": -1, "/b": "junk"})
+        assert policy.sample_rate == 1.0
+        assert policy.route_sample_rates == {"/a": 0.0, "/b": 1.0}
+
+    def test_overrides_until_expiry(self):
+        overrides = [
+            {"user_id": 7, "expires": (NOW + timedelta(minutes=30)).isoformat()},
+            {"company_id": 3, "expires": (NOW + timedelta(hours=2)).isoformat() + "Z"},
+            {"user_id": 8, "expires": (NOW - timedelta(minutes=1)).isoformat()},
+            {"user_id": 9, "expires": "not a date"},
+        ]
+        policy = _policy(capture_overrides=json.dumps(overrides))
+        assert set(policy.user_overrides) == {7}
+        assert policy.decide("/api/events", 200, 5, user_id=7, now=NOW) == "override"
+        assert policy.decide("/api/events", 200, 5, user_id=1, company_id=3, now=NOW) == "override"
+        assert policy.decide("/api/events", 200, 5, user_id=8, now=NOW) is None
+        later = NOW + timedelta(hours=1)
+        assert policy.decide("/api/events", 200, 5, user_id=7, now=later) is None
+        assert policy.decide("/api/events", 200, 5, user_id=7, company_id=3, now=later) == "override"
+
+    def test_excluded_endpoints_parsed_from_string(self):
+        # logging.excluded_endpoints is seeded as a 'string' setting
+        policy = _policy(excluded_endpoints='["/api/health", "/docs"]')
+        assert policy.excluded_endpoints == ("/api/health", "/docs")
+        assert not policy.is_candidate("/api/health/db")
+        assert policy.is_candidate("/api/events")
+        assert not _policy(capture_payloads=False).is_candidate("/api/events")
+
+
+class TestPolicyCache:
+    """Process-wide snapshot"""
+
+    def test_loaded_once_within_refresh_interval(self, monkeypatch):
+        loads = []
+        monkeypatch.setattr(capture_sampling, "load_capture_policy", lambda db: loads.append(db) or _policy(sample_rate=0.5))
+        cache = CapturePolicyCache(session_factory=lambda: Session(), refresh_seconds=60)
+        assert cache.get().sample_rate == 0.5
+        assert cache.get() is cache.get()
+        assert len(loads) == 1
+        cache.invalidate()
+        cache.get()
+        assert len(loads) == 2
+
+    def test_failed_load_keeps_previous_snapshot(self, monkeypatch):
+        cache = CapturePolicyCache(session_factory=lambda: Session(), refresh_seconds=0)
+        monkeypatch.setattr(capture_sampling, "load_capture_policy", lambda db: _policy(sample_rate=0.25))
+        assert cache.get().sample_rate == 0.25
+
+        def fail(db):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(capture_sampling, "load_capture_policy", fail)
+        assert cache.get().sample_rate == 0.25
+
+    def test_defaults_before_first_load(self):
+        def fail():
+            raise RuntimeError("database unavailable")
+
+        policy = CapturePolicyCache(session_factory=fail).get()
+        assert policy == CapturePolicy()
+        assert policy.capture_payloads and policy.sample_rate < 1
+
+
+@pytest.fixture
+def config_db():
+    engine = sqlite_engine([SettingCategory.__table__, SettingType.__table__, AppSetting.__table__])
+    session = Session(bind=engine)
+    session.add_all([
+        SettingCategory(SettingCategoryID=1, CategoryCode="logging", CategoryName="Logging", Description="Logging"),
+        SettingType(SettingTypeID=1, TypeCode="json", TypeName="JSON", Description="JSON"),
+    ])
+    expired = [{"user_id": 1, "expires": (datetime.utcnow() - timedelta(minutes=5)).isoformat()}]
+    session.add(AppSetting(
+        SettingKey="logging.capture_overrides", SettingValue=json.dumps(expired), DefaultValue="[]",
+        Description="Overrides", SettingCategoryID=1, SettingTypeID=1,
+    ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestCaptureOverrides:
+    """add_capture_override"""
+
+    def test_adds_entry_and_prunes_expired(self, config_db, monkeypatch):
+        cache = CapturePolicyCache(session_factory=lambda: config_db, refresh_seconds=3600)
+        monkeypatch.setattr(capture_sampling, "capture_policy_cache", cache)
+        config_db.close = lambda: None
+        assert cache.get().user_overrides == {}
+
+        assert add_capture_override(config_db, user_id=42, minutes=30, updated_by=5)
+        stored = json.loads(config_db.query(AppSetting).one().SettingValue)
+        assert [entry.get("user_id") for entry in stored] == [42]
+        # Invalidated: the next request sees the override
+        assert 42 in cache.get().user_overrides
+        assert cache.get().decide("/api/events", 200, 5, user_id=42) == "override"
+
+    def test_requires_a_subject(self, config_db):
+        assert not add_capture_override(config_db)
+
+
+class TestMiddleware:
+    """Request logger capture path"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        import middleware.bulletproof_request_logger as bulletproof
+
+        redacted, logged = [], []
+        policy = _policy(sample_rate=0.0, route_sample_rates={"/sampled": 1.0}, slow_request_ms=10000)
+        monkeypatch.setattr(bulletproof.capture_policy_cache, "get", lambda: policy)
+        monkeypatch.setattr(bulletproof, "redact_body", lambda body, content_type: redacted.append(body) or body)
+        monkeypatch.setattr(bulletproof.RequestLoggingMiddleware, "_log_to_database", lambda self, data: logged.append(data))
+
+        app = FastAPI()
+
+        @app.post("/plain")
+        async def plain(payload: dict):
+            return {"ok": True}
+
+        @app.post("/sampled")
+        async def sampled(payload: dict):
+            return {"ok": True}
+
+        @app.post("/fails")
+        async def fails(payload: dict):
+            from fastapi import HTTPException
+            raise HTTPException(status_code=422, detail="bad")
+
+        app.add_middleware(bulletproof.RequestLoggingMiddleware, debug=False)
+        return TestClient(app), redacted, logged
+
+    def test_unsampled_requests_skip_payload_processing(self, client):
+        client, redacted, logged = client
+        assert client.post("/plain", json={"password": "x"}).status_code == 200
+        assert redacted == []
+        assert logged[-1]["request_payload"] is None and logged[-1]["response_payload"] is None
+        assert logged[-1]["route"] == "/plain"
+
+    def test_sampled_and_error_requests_captured(self, client):
+        client, redacted, logged = client
+        client.post("/sampled", json={"a": 1})
+        assert json.loads(logged[-1]["request_payload"]) == {"a": 1}
+        client.post("/fails", json={"b": 2})
+        assert json.loads(logged[-1]["request_payload"]) == {"b": 2}
+        assert logged[-1]["status_code"] == 422
+        assert len(redacted) == 2
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(count: int = 100000, seed: int = 11):
+    """
+    Payload bytes processed for a traffic mix: 94% fast 200s, 4% errors,
+    2% slow requests, 2 KB request + 6 KB response each.
+    """
+    rng = random.Random(seed)
+    traffic = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.04:
+            traffic.append((rng.choice([400, 404, 500]), rng.randrange(5, 200)))
+        elif roll < 0.06:
+            traffic.append((200, rng.randrange(1000, 5000)))
+        else:
+            traffic.append((200, rng.randrange(5, 200)))
+    payload_bytes = 2048 + 6144
+
+    policy = CapturePolicy.from_settings(sample_rate=0.1, slow_request_ms=1000)
+    started = time.perf_counter()
+    reasons = [policy.decide("/api/events/{event_id}", status, duration, 1, 1, rand=rng.random) for status, duration in traffic]
+    decide_seconds = time.perf_counter() - started
+    captured = [reason for reason in reasons if reason]
+    return {
+        "requests": count,
+        "captured": len(captured),
+        "errors_captured": reasons.count("error"),
+        "slow_captured": reasons.count("slow"),
+        "errors": sum(1 for status, _ in traffic if status >= 400),
+        "slow": sum(1 for status, duration in traffic if status < 400 and duration >= 1000),
+        "all_bytes": count * payload_bytes,
+        "sampled_bytes": len(captured) * payload_bytes,
+        "decide_us": decide_seconds / count * 1e6,
+    }
+
+
+@pytest.mark.slow
+def test_benchmark_capture_volume_reduced():
+    results = run_benchmark(count=20000)
+    assert results["errors_captured"] == results["errors"]
+    assert results["slow_captured"] == results["slow"]
+    assert results["sampled_bytes"] * 5 < results["all_bytes"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"requests {results['requests']}, captured {results['captured']} "
+          f"(all {results['errors']} errors, all {results['slow']} slow)")
+    print(f"payload bytes: capture all {results['all_bytes'] / 1e6:.1f} MB, "
+          f"sampled {results['sampled_bytes'] / 1e6:.1f} MB "
+          f"({results['all_bytes'] / results['sampled_bytes']:.1f}x less)")
+    print(f"decide(): {results['decide_us']:.2f} us/request")
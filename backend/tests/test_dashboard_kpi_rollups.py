@@ -0,0 +1,405 @@
+"""
+Dashboard KPI Rollup Tests and Benchmark
+
+Covers modules.dashboard.kpi_service:
+- Outbox deltas written in the caller's transaction (rolled back with it)
+- Event/Form inserts, soft deletes and status changes queue deltas (ORM listeners)
+- Micro-batch folding into per-company, per-event and per-day rollups
+- Multi-company summaries from one query over pre-aggregated rows
+- rebuild_kpi_rollups() agreeing with the incremental path
+
+The benchmark seeds a file-backed SQLite database with events, forms and
+lead deltas (batched, KPI_BENCHMARK_LEADS_PER_DELTA leads per outbox row),
+folds the outbox and compares the rollup read against a live aggregate over
+Event/Form. Run it directly for timing output at 10M leads:
+
+    python -m tests.test_dashboard_kpi_rollups
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.ref_data_cache import ref_data_cache
+from models.company import Company
+from models.event import Event
+from models.event_block_key import EventBlockKey
+from models.event_tag import EventTag
+from models.form import Form
+from models.form_access_control import FormAccessControl
+from models.kpi_rollup import CompanyKpiRollup, EventKpiRollup, CompanyDailyKpiRollup, KpiOutbox
+from models.ref.event_status import EventStatus
+from modules.dashboard.kpi_service import (
+    KpiSummary,
+    drain_kpi_outbox,
+    get_daily_kpis,
+    get_kpi_summary,
+    get_outbox_lag_seconds,
+    process_kpi_outbox,
+    rebuild_kpi_rollups,
+    record_event_created,
+    record_submissions,
+)
+from tests.sqlite_support import MEMORY_URL, sqlite_engine
+
+
+DRAFT, PUBLISHED, COMPLETED = 1, 3, 4
+
+TABLES = [
+    EventStatus.__table__, Company.__table__, Event.__table__, Form.__table__,
+    CompanyKpiRollup.__table__, EventKpiRollup.__table__,
+    CompanyDailyKpiRollup.__table__, KpiOutbox.__table__,
+    # Maintained by the modules.events listeners on Event writes
+    EventTag.__table__, EventBlockKey.__table__,
+    # Read by the modules.forms access listener when a form is deleted
+    FormAccessControl.__table__,
+]
+
+STATUSES = [
+    {"EventStatusID": DRAFT, "StatusCode": "DRAFT", "StatusName": "Draft", "SortOrder": 1},
+    {"EventStatusID": 2, "StatusCode": "PENDING_REVIEW", "StatusName": "Pending Review", "SortOrder": 2},
+    {"EventStatusID": PUBLISHED, "StatusCode": "PUBLISHED", "StatusName": "Published", "SortOrder": 3},
+    {"EventStatusID": COMPLETED, "StatusCode": "COMPLETED", "StatusName": "Completed", "SortOrder": 4},
+]
+
+
+def _build_engine(url: str = MEMORY_URL, **kwargs):
+    engine = sqlite_engine(TABLES, url, **kwargs)
+    with engine.begin() as conn:
+        conn.execute(EventStatus.__table__.insert(), [dict(s, CreatedBy=1) for s in STATUSES])
+    return engine
+
+
+@pytest.fixture
+def db():
+    engine = _build_engine()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    for company_id in (10, 20, 30):
+        session.add(Company(CompanyID=company_id, CompanyName=f"Company {company_id}", CountryID=1))
+    session.commit()
+    ref_data_cache.invalidate()
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+    ref_data_cache.invalidate()
+
+
+def _add_event(db, event_id, company_id, status_id=PUBLISHED):
+    ev = Event(EventID=event_id, Name=f"Event {event_id}", CompanyID=company_id, CreatedBy=1,
+               StartDateTime=datetime(2025, 3, 1), EventTypeID=1, EventStatusID=status_id)
+    db.add(ev)
+    db.flush()
+    return ev
+
+
+def _add_form(db, form_id, company_id, event_id=None):
+    form = Form(FormID=form_id, FormName=f"Form {form_id}", CompanyID=company_id, EventID=event_id,
+                FormStatusID=1, FormApprovalStatusID=1, CreatedBy=1)
+    db.add(form)
+    db.flush()
+    return form
+
+
+def _seed_activity(db):
+    _add_event(db, 1, 10, PUBLISHED)
+    _add_event(db, 2, 10, DRAFT)
+    _add_event(db, 3, 20, PUBLISHED)
+    _add_form(db, 1, 10, event_id=1)
+    _add_form(db, 2, 10, event_id=1)
+    _add_form(db, 3, 20, event_id=3)
+    _add_form(db, 4, 20)
+    record_submissions(db, 10, 1, 1, production=7, demo=2, occurred_at=datetime(2025, 3, 1, 9))
+    record_submissions(db, 20, 3, 3, production=5, occurred_at=datetime(2025, 3, 2, 9))
+    db.commit()
+
+
+class TestOutboxFolding:
+    """Write path and micro-batch fold"""
+
+    def test_summary_sums_selected_companies(self, db):
+        _seed_activity(db)
+        assert get_kpi_summary(db, [10, 20]).total_leads == 0  # not folded yet
+
+        drain_kpi_outbox(db)
+        summary = get_kpi_summary(db, [10, 20])
+        assert (summary.total_forms, summary.total_leads, summary.active_events) == (4, 12, 2)
+        assert (summary.total_events, summary.demo_leads, summary.total_submissions) == (3, 2, 14)
+        assert get_kpi_summary(db, [20]).to_response() == {
+            "totalForms": 2, "totalLeads": 5, "activeEvents": 1, "companyIds": [20]
+        }
+        assert db.query(KpiOutbox).count() == 0
+
+    def test_rolled_back_write_leaves_no_delta(self, db):
+        _add_form(db, 1, 10)
+        db.rollback()
+        assert db.query(KpiOutbox).count() == 0
+
+    def test_second_batch_updates_existing_rows(self, db):
+        _seed_activity(db)
+        drain_kpi_outbox(db)
+        record_submissions(db, 10, 2, 1, production=3, occurred_at=datetime(2025, 3, 1, 18))
+        db.commit()
+        drain_kpi_outbox(db)
+
+        assert get_kpi_summary(db, [10]).total_leads == 10
+        assert db.get(EventKpiRollup, 1).ProductionLeads == 10
+        assert db.get(CompanyDailyKpiRollup, (10, date(2025, 3, 1))).ProductionLeads == 10
+
+    def test_form_and_event_counters_folded(self, db):
+        _seed_activity(db)
+        record_submissions(db, 10, 1, 1, demo=1, occurred_at=datetime(2025, 3, 1, 8))
+        db.commit()
+        db.info["statements"].clear()
+        drain_kpi_outbox(db)
+        # One aggregated UPDATE for all touched forms, not one per lead
+        assert sum(s.startswith("UPDATE") and '"Form" SET' in s for s in db.info["statements"]) == 1
+
+        db.expire_all()
+        form = db.get(Form, 1)
+        assert (form.TotalSubmissions, form.ProductionLeadsCollected, form.DemoLeadsCollected) == (10, 7, 3)
+        assert form.LastSubmissionDate == datetime(2025, 3, 1, 9)
+        assert db.get(Event, 1).TotalSubmissions == 10
+
+    def test_small_batches_drain_everything(self, db):
+        _seed_activity(db)
+        assert process_kpi_outbox(db, batch_size=3) == 3
+        assert drain_kpi_outbox(db, batch_size=3) == 6
+        assert get_kpi_summary(db, [10, 20]).total_forms == 4
+
+    def test_event_status_and_delete_adjust_active_events(self, db):
+        _seed_activity(db)
+        db.get(Event, 2).EventStatusID = PUBLISHED
+        db.get(Event, 1).IsDeleted = True
+        db.commit()
+        drain_kpi_outbox(db)
+
+        summary = get_kpi_summary(db, [10])
+        assert (summary.active_events, summary.total_events) == (1, 1)
+
+    def test_session_writes_queue_deltas(self, db):
+        db.add(Event(EventID=5, Name="Event 5", CompanyID=30, CreatedBy=1,
+                     StartDateTime=datetime(2025, 3, 1), EventTypeID=1, EventStatusID=PUBLISHED))
+        db.add(Form(FormID=5, FormName="Form 5", CompanyID=30, EventID=5,
+                    FormStatusID=1, FormApprovalStatusID=1, CreatedBy=1))
+        db.commit()
+        drain_kpi_outbox(db)
+        summary = get_kpi_summary(db, [30])
+        assert (summary.total_events, summary.active_events, summary.total_forms) == (1, 1, 1)
+        assert db.get(EventKpiRollup, 5).TotalForms == 1
+
+        db.get(Event, 5).Name = "Renamed"
+        db.commit()
+        assert db.query(KpiOutbox).count() == 0
+
+        db.get(Form, 5).IsDeleted = True
+        db.get(Event, 5).EventStatusID = COMPLETED
+        db.commit()
+        drain_kpi_outbox(db)
+        summary = get_kpi_summary(db, [30])
+        assert (summary.total_events, summary.active_events, summary.total_forms) == (1, 0, 0)
+
+    def test_daily_rollup(self, db):
+        _seed_activity(db)
+        drain_kpi_outbox(db)
+        days = get_daily_kpis(db, [10, 20], date(2025, 3, 1), date(2025, 3, 2))
+        assert [(d["date"], d["leads"], d["demoLeads"]) for d in days] == [
+            ("2025-03-01", 7, 2), ("2025-03-02", 5, 0)
+        ]
+
+    def test_outbox_lag(self, db):
+        assert get_outbox_lag_seconds(db) == 0.0
+        record_submissions(db, 10, 1, production=1)
+        db.commit()
+        assert get_outbox_lag_seconds(db) >= 0.0
+
+
+class TestKpiReads:
+    """Read path"""
+
+    def test_summary_is_one_query(self, db):
+        _seed_activity(db)
+        drain_kpi_outbox(db)
+        db.info["statements"].clear()
+        get_kpi_summary(db, [10, 20, 30])
+        assert len(db.info["statements"]) == 1
+
+    def test_no_companies_no_query(self, db):
+        db.info["statements"].clear()
+        assert get_kpi_summary(db, []) == KpiSummary(())
+        assert db.info["statements"] == []
+
+    def test_unknown_company_is_zero(self, db):
+        assert get_kpi_summary(db, [999]).to_response()["totalLeads"] == 0
+
+
+class TestRebuild:
+    """Drift repair"""
+
+    def test_rebuild_matches_incremental(self, db):
+        _seed_activity(db)
+        drain_kpi_outbox(db)
+        record_submissions(db, 10, 2, 1, production=1)  # pending delta folded before the rebuild
+        db.commit()
+        drain_kpi_outbox(db)
+        incremental = get_kpi_summary(db, [10, 20])
+
+        db.execute(CompanyKpiRollup.__table__.update().values(ProductionLeads=0, TotalForms=99))
+        db.commit()
+        record_submissions(db, 20, 3, 3, production=2)
+        db.commit()
+        rebuild_kpi_rollups(db, [10, 20, 30])
+        db.commit()
+
+        rebuilt = get_kpi_summary(db, [10, 20])
+        assert rebuilt.total_forms == incremental.total_forms
+        assert rebuilt.total_leads == incremental.total_leads + 2
+        assert db.get(EventKpiRollup, 1).TotalForms == 2
+        assert db.query(KpiOutbox).count() == 0
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+BENCHMARK_LEADS = int(os.getenv("KPI_BENCHMARK_LEADS", "10000000"))
+BENCHMARK_LEADS_PER_DELTA = int(os.getenv("KPI_BENCHMARK_LEADS_PER_DELTA", "100"))
+BENCHMARK_COMPANIES = 200
+BENCHMARK_EVENTS_PER_COMPANY = 10
+BENCHMARK_FORMS_PER_EVENT = 5
+BENCHMARK_READS = 50
+
+
+def run_benchmark(total_leads: int = BENCHMARK_LEADS) -> dict:
+    """Seed, fold and read KPIs against a temporary SQLite file database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _build_engine(f"sqlite:///{os.path.join(tmp, 'kpi.db')}")
+        companies = list(range(1, BENCHMARK_COMPANIES + 1))
+        events = [
+            (company_id * 1000 + n, company_id)
+            for company_id in companies for n in range(BENCHMARK_EVENTS_PER_COMPANY)
+        ]
+        forms = [
+            (event_id * 10 + n, event_id, company_id)
+            for event_id, company_id in events for n in range(BENCHMARK_FORMS_PER_EVENT)
+        ]
+        deltas = total_leads // BENCHMARK_LEADS_PER_DELTA
+
+        with engine.begin() as conn:
+            conn.execute(Company.__table__.insert(), [
+                {"CompanyID": c, "CompanyName": f"Company {c}", "CountryID": 1} for c in companies
+            ])
+            conn.execute(Event.__table__.insert(), [
+                {"EventID": e, "Name": f"Event {e}", "CompanyID": c, "CreatedBy": 1,
+                 "StartDateTime": datetime(2025, 3, 1), "EventTypeID": 1,
+                 "EventStatusID": PUBLISHED if e % 2 else DRAFT}
+                for e, c in events
+            ])
+            conn.execute(Form.__table__.insert(), [
+                {"FormID": f, "FormName": f"Form {f}", "CompanyID": c, "EventID": e,
+                 "FormStatusID": 1, "FormApprovalStatusID": 1, "CreatedBy": 1,
+                 "ProductionLeadsCollected": 0, "TotalSubmissions": 0}
+                for f, e, c in forms
+            ])
+
+        session = Session(bind=engine)
+        for e, c in events:
+            record_event_created(session, session.get(Event, e))
+        for f, e, c in forms:
+            session.add(KpiOutbox(CompanyID=c, EventID=e, MetricDate=date(2025, 3, 1), FormsDelta=1))
+        session.commit()
+
+        # Batched lead writes: one outbox delta per BENCHMARK_LEADS_PER_DELTA leads
+        # (the fold also maintains the Form counters used by the live baseline)
+        with engine.begin() as conn:
+            rows = []
+            for i in range(deltas):
+                f, e, c = forms[i % len(forms)]
+                rows.append({
+                    "CompanyID": c, "EventID": e, "FormID": f, "MetricDate": date(2025, 3, 1 + i % 28),
+                    "LastOccurredDate": datetime(2025, 3, 1 + i % 28, 12),
+                    "SubmissionsDelta": BENCHMARK_LEADS_PER_DELTA,
+                    "ProductionLeadsDelta": BENCHMARK_LEADS_PER_DELTA,
+                })
+                if len(rows) == 50000:
+                    conn.execute(KpiOutbox.__table__.insert(), rows)
+                    rows = []
+            if rows:
+                conn.execute(KpiOutbox.__table__.insert(), rows)
+
+        start = time.perf_counter()
+        folded = drain_kpi_outbox(session)
+        fold_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_READS):
+            summary = get_kpi_summary(session, companies)
+        rollup_read = (time.perf_counter() - start) / BENCHMARK_READS
+
+        live_stmt = select(
+            select(func.count()).select_from(Form).where(
+                Form.CompanyID.in_(companies), Form.IsDeleted == False  # noqa: E712
+            ).scalar_subquery(),
+            select(func.coalesce(func.sum(Form.ProductionLeadsCollected), 0)).where(
+                Form.CompanyID.in_(companies)
+            ).scalar_subquery(),
+            select(func.sum(case((Event.EventStatusID == PUBLISHED, 1), else_=0))).where(
+                Event.CompanyID.in_(companies), Event.IsDeleted == False  # noqa: E712
+            ).scalar_subquery(),
+        )
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_READS):
+            live = session.execute(live_stmt).one()
+        live_read = (time.perf_counter() - start) / BENCHMARK_READS
+
+        session.close()
+        engine.dispose()
+
+    return {
+        "leads": deltas * BENCHMARK_LEADS_PER_DELTA,
+        "outbox_rows": folded,
+        "fold_seconds": fold_elapsed,
+        "rollup_read_ms": rollup_read * 1000,
+        "live_read_ms": live_read * 1000,
+        "summary": summary,
+        "live": tuple(int(v) for v in live),
+    }
+
+
+@pytest.mark.slow
+def test_rollup_benchmark_matches_live_aggregate():
+    """Folded rollups agree with a live aggregate and read in one cheap query"""
+    result = run_benchmark(total_leads=200_000)
+    summary = result["summary"]
+
+    assert summary.total_leads == result["leads"] == 200_000
+    assert (summary.total_forms, summary.total_leads, summary.active_events) == result["live"]
+    assert result["rollup_read_ms"] < result["live_read_ms"]
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    summary = result["summary"]
+    print(
+        f"leads={result['leads']:,} outbox_rows={result['outbox_rows']:,} "
+        f"fold={result['fold_seconds']:.1f}s ({result['outbox_rows'] / max(result['fold_seconds'], 1e-9):,.0f} rows/s)"
+    )
+    print(
+        f"rollup read: {result['rollup_read_ms']:.2f}ms  live aggregate: {result['live_read_ms']:.2f}ms  "
+        f"({BENCHMARK_COMPANIES} companies, totalLeads={summary.total_leads:,})"
+    )
@@ -0,0 +1,207 @@
+"""
+Connection Pool Factory and Instrumentation Tests
+
+Covers common.db_pool:
+- PoolSettings.from_env() configuration
+- build_engine() pool selection and sizing
+- Checkout latency, in-use counts and overflow reporting
+- Long-held connection warnings (request ID + acquiring stack)
+- Pool exhaustion diagnostics
+- Pool state endpoint (system admins only)
+"""
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import StaticPool
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common import db_pool
+from common.db_pool import (
+    PoolSettings, InstrumentedQueuePool, build_engine, get_pool_stats, get_pool_holders
+)
+from common.request_context import set_request_context, clear_request_context
+from modules.auth.dependencies import get_current_user, CurrentUser
+from modules.diagnostics.router import router as diagnostics_router
+
+
+@pytest.fixture
+def sqlite_file_url():
+    """File-backed SQLite URL (uses a real QueuePool, unlike :memory:)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        yield f"sqlite:///{os.path.join(tmp, 'pool.db')}"
+
+
+@pytest.fixture
+def capture_pool_logs():
+    """Capture db_pool log records (get_logger disables propagation)"""
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    handler = ListHandler()
+    db_pool.logger.addHandler(handler)
+    yield records
+    db_pool.logger.removeHandler(handler)
+
+
+class TestPoolSettings:
+    """PoolSettings.from_env()"""
+
+    def test_defaults(self, monkeypatch):
+        for var in ("SIZE", "MAX_OVERFLOW", "TIMEOUT", "PRE_PING"):
+            monkeypatch.delenv(f"DB_POOL_{var}", raising=False)
+        settings = PoolSettings.from_env("DB_POOL")
+        assert settings.pool_size == 5
+        assert settings.max_overflow == 10
+        assert settings.pool_timeout == 30.0
+        assert settings.pool_pre_ping is True
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("DB_TEST_POOL_SIZE", "20")
+        monkeypatch.setenv("DB_TEST_POOL_MAX_OVERFLOW", "0")
+        monkeypatch.setenv("DB_TEST_POOL_TIMEOUT", "2.5")
+        monkeypatch.setenv("DB_TEST_POOL_PRE_PING", "false")
+        settings = PoolSettings.from_env("DB_TEST_POOL")
+        assert settings.pool_size == 20
+        assert settings.max_overflow == 0
+        assert settings.pool_timeout == 2.5
+        assert settings.pool_pre_ping is False
+
+    def test_prefix_defaults_used_when_unset(self, monkeypatch):
+        monkeypatch.delenv("DB_LOG_POOL_SIZE", raising=False)
+        settings = PoolSettings.from_env("DB_LOG_POOL", pool_size=2)
+        assert settings.pool_size == 2
+
+
+class TestBuildEngine:
+    """build_engine() pool selection"""
+
+    def test_memory_sqlite_uses_static_pool(self):
+        engine = build_engine("sqlite:///:memory:", name="test_memory")
+        assert isinstance(engine.pool, StaticPool)
+        engine.dispose()
+
+    def test_file_database_uses_instrumented_pool(self, sqlite_file_url):
+        engine = build_engine(
+            sqlite_file_url, name="test_sized", settings=PoolSettings(pool_size=3, max_overflow=1)
+        )
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        assert engine.pool.size() == 3
+        assert engine.pool.monitor is not None
+        engine.dispose()
+
+
+class TestPoolInstrumentation:
+    """Checkout latency, in-use counts, long-held warnings, exhaustion"""
+
+    def test_checkout_stats(self, sqlite_file_url):
+        engine = build_engine(
+            sqlite_file_url, name="test_stats", settings=PoolSettings(pool_size=2, max_overflow=2)
+        )
+        conn1 = engine.connect()
+        conn2 = engine.connect()
+        conn3 = engine.connect()  # overflow connection
+        conn1.execute(text("SELECT 1"))
+
+        stats = get_pool_stats()["test_stats"]
+        assert stats["in_use"] == 3
+        assert stats["checkouts"] == 3
+        assert stats["overflow"] == 1
+        assert stats["checkout_wait_max_ms"] >= 0
+
+        for conn in (conn1, conn2, conn3):
+            conn.close()
+        assert get_pool_stats()["test_stats"]["in_use"] == 0
+        engine.dispose()
+
+    def test_holders_carry_request_id(self, sqlite_file_url):
+        engine = build_engine(sqlite_file_url, name="test_holders", settings=PoolSettings())
+        set_request_context("req-holder-1")
+        try:
+            conn = engine.connect()
+            holders = get_pool_holders("test_holders")
+            assert len(holders) == 1
+            assert holders[0]["request_id"] == "req-holder-1"
+            assert "test_holders_carry_request_id" in holders[0]["stack"]
+            conn.close()
+        finally:
+            clear_request_context()
+            engine.dispose()
+
+    def test_long_held_connection_warning(self, sqlite_file_url, capture_pool_logs):
+        engine = build_engine(
+            sqlite_file_url, name="test_long_held", settings=PoolSettings(long_held_seconds=0)
+        )
+        set_request_context("req-long-held")
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        finally:
+            clear_request_context()
+
+        warnings = [r for r in capture_pool_logs if "Long-held DB connection" in r.getMessage()]
+        assert warnings
+        assert "req-long-held" in warnings[0].getMessage()
+        assert get_pool_stats()["test_long_held"]["long_held_count"] == 1
+        engine.dispose()
+
+    def test_pool_exhaustion_logs_holders(self, sqlite_file_url, capture_pool_logs):
+        engine = build_engine(
+            sqlite_file_url,
+            name="test_exhausted",
+            settings=PoolSettings(pool_size=1, max_overflow=0, pool_timeout=0.1)
+        )
+        set_request_context("req-hog")
+        held = engine.connect()
+        clear_request_context()
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+        errors = [r for r in capture_pool_logs if "exhausted: no connection" in r.getMessage()]
+        assert errors
+        assert "req-hog" in errors[0].getMessage()
+        assert get_pool_stats()["test_exhausted"]["checkout_timeouts"] == 1
+        held.close()
+        engine.dispose()
+
+
+class TestPoolRoute:
+    """GET /api/admin/diagnostics/db-pool"""
+
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+        app.include_router(diagnostics_router)
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=1, email="ops@example.com", role="system_admin")
+        return app
+
+    def test_pool_state_for_system_admin(self, app, sqlite_file_url):
+        engine = build_engine(sqlite_file_url, name="test_route", settings=PoolSettings())
+        set_request_context("req-route")
+        conn = engine.connect()
+        clear_request_context()
+        try:
+            pool = TestClient(app).get("/api/admin/diagnostics/db-pool").json()["pools"]["test_route"]
+            assert pool["in_use"] == 1
+            assert [h["request_id"] for h in pool["holders"]] == ["req-route"]
+            assert "stack" not in pool["holders"][0]
+        finally:
+            conn.close()
+            engine.dispose()
+
+    def test_system_admin_only(self, app):
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=2, email="u@example.com", role="company_admin")
+        assert TestClient(app).get("/api/admin/diagnostics/db-pool").status_code == 403
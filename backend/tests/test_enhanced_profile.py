@@ -0,0 +1,165 @@
+"""
+Enhanced Profile Loader Tests
+
+Covers modules.users.profile_service and common.ref_data_cache:
+- Profile (user + industries) built in one query, reference names from cache
+- Reference tables loaded once per TTL
+- Response cache invalidated on committed profile / industry changes, loads
+  racing an invalidation not stored
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.ref_data_cache import RefDataCache, ref_data_cache
+from models.user import User
+from models.user_industry import UserIndustry
+from models.ref.theme_preference import ThemePreference
+from models.ref.layout_density import LayoutDensity
+from models.ref.font_size import FontSize
+from models.ref.industry import Industry
+from modules.users.profile_service import (
+    ProfileResponseCache,
+    get_enhanced_profile,
+    load_enhanced_profile,
+    profile_response_cache,
+)
+from tests.sqlite_support import sqlite_engine
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([
+        ThemePreference.__table__, LayoutDensity.__table__, FontSize.__table__,
+        Industry.__table__, User.__table__, UserIndustry.__table__,
+    ], utcnow=lambda: datetime(2025, 1, 1))
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    session.add_all([
+        ThemePreference(ThemePreferenceID=1, ThemeCode="light", ThemeName="Light Theme",
+                        Description="Light", CSSClass="theme-light", SortOrder=1),
+        ThemePreference(ThemePreferenceID=2, ThemeCode="dark", ThemeName="Dark Theme",
+                        Description="Dark", CSSClass="theme-dark", SortOrder=2, IsActive=False),
+        LayoutDensity(LayoutDensityID=1, DensityCode="compact", DensityName="Compact",
+                      Description="Compact", CSSClass="density-compact"),
+        FontSize(FontSizeID=1, SizeCode="medium", SizeName="Medium", Description="Medium",
+                 CSSClass="font-medium", BaseFontSize="16px"),
+        Industry(IndustryID=1, IndustryCode="tech", IndustryName="Technology", Description="Tech"),
+        Industry(IndustryID=2, IndustryCode="health", IndustryName="Healthcare", Description="Health"),
+        Industry(IndustryID=3, IndustryCode="retail", IndustryName="Retail", Description="Retail"),
+        User(UserID=1, Email="jane@example.com", PasswordHash="x", FirstName="Jane", LastName="Doe",
+             StatusID=1, IsEmailVerified=True, Bio="Organizer",
+             ThemePreferenceID=2, LayoutDensityID=1, FontSizeID=1),
+        User(UserID=2, Email="bare@example.com", PasswordHash="x", FirstName="Bare", LastName="User",
+             StatusID=1),
+    ])
+    session.flush()
+    session.add_all([
+        UserIndustry(UserIndustryID=1, UserID=1, IndustryID=2, IsPrimary=False, SortOrder=1),
+        UserIndustry(UserIndustryID=2, UserID=1, IndustryID=1, IsPrimary=True, SortOrder=0),
+        UserIndustry(UserIndustryID=3, UserID=1, IndustryID=3, IsPrimary=False, SortOrder=2, IsDeleted=True),
+    ])
+    session.commit()
+    ref_data_cache.invalidate()
+    profile_response_cache.clear()
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+    ref_data_cache.invalidate()
+    profile_response_cache.clear()
+
+
+class TestLoadEnhancedProfile:
+    """Projection loader"""
+
+    def test_profile_is_one_query_with_warm_ref_cache(self, db):
+        load_enhanced_profile(db, 1)  # warms reference tables
+        db.info["statements"].clear()
+
+        profile = load_enhanced_profile(db, 1)
+        assert len(db.info["statements"]) == 1
+
+        assert profile.email == "jane@example.com"
+        assert profile.bio == "Organizer"
+        # Inactive options still resolve for users who selected them
+        assert profile.theme_preference.code == "dark"
+        assert profile.layout_density.css_class == "density-compact"
+        assert profile.font_size.base_font_size == "16px"
+        assert [(i.industry_code, i.is_primary) for i in profile.industries] == [
+            ("tech", True), ("health", False)
+        ]
+
+    def test_user_without_preferences_or_industries(self, db):
+        profile = load_enhanced_profile(db, 2)
+        assert profile.theme_preference is None
+        assert profile.font_size is None
+        assert profile.industries == []
+
+    def test_missing_user(self, db):
+        assert load_enhanced_profile(db, 404) is None
+
+
+class TestRefDataCache:
+    """Reference data cache"""
+
+    def test_table_loaded_once(self, db):
+        cache = RefDataCache()
+        cache.get_option(db, "industry", 1)
+        db.info["statements"].clear()
+        assert cache.get_option(db, "industry", 2).name == "Healthcare"
+        assert cache.get_option(db, "industry", None) is None
+        assert db.info["statements"] == []
+
+    def test_list_active_sorted(self, db):
+        assert [o.code for o in RefDataCache().list_active(db, "theme")] == ["light"]
+
+    def test_unknown_kind(self, db):
+        with pytest.raises(ValueError):
+            RefDataCache().get_table(db, "colour")
+
+
+class TestProfileResponseCache:
+    """Response cache"""
+
+    def test_cache_hit_issues_no_queries(self, db):
+        get_enhanced_profile(db, 1)
+        db.info["statements"].clear()
+        assert get_enhanced_profile(db, 1).first_name == "Jane"
+        assert db.info["statements"] == []
+
+    def test_profile_update_invalidates_on_commit(self, db):
+        assert get_enhanced_profile(db, 1).bio == "Organizer"
+        user = db.get(User, 1)
+        user.Bio = "Exhibitor"
+        db.flush()
+        assert get_enhanced_profile(db, 1).bio == "Organizer"
+        db.commit()
+        assert get_enhanced_profile(db, 1).bio == "Exhibitor"
+
+    def test_industry_edit_invalidates(self, db):
+        assert len(get_enhanced_profile(db, 1).industries) == 2
+        db.get(UserIndustry, 1).IsDeleted = True
+        db.commit()
+        assert [i.industry_code for i in get_enhanced_profile(db, 1).industries] == ["tech"]
+
+    def test_stale_load_not_stored(self, db):
+        cache = ProfileResponseCache()
+        generation = cache.generation()
+        response = load_enhanced_profile(db, 1)
+        cache.invalidate([1])
+        cache.set(response, generation)
+        assert cache.get(1) is None
@@ -0,0 +1,387 @@
+"""
+Duplicate-Event Detection Tests and Benchmark
+
+Covers modules.events.dedup_service:
+- Name normalization, blocking keys and similarity scoring
+- Incremental detection on insert/update (ORM listeners)
+- Backfill: keys rebuilt, duplicates flagged against the first listing
+- GET /api/events/{event_id}/duplicates
+
+The benchmark generates public events with re-listed variants (reworded,
+re-cased, shifted a day, venue moved a few hundred metres), runs the
+backfill and reports throughput, comparisons vs all-pairs, precision and
+recall:
+
+    python -m tests.test_event_dedup
+    EVENT_DEDUP_BENCHMARK_EVENTS=200000 python -m tests.test_event_dedup
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company import Company
+from models.event import Event
+from models.event_block_key import EventBlockKey
+from models.event_tag import EventTag
+from models.kpi_rollup import KpiOutbox
+from models.ref.event_status import EventStatus
+from modules.auth.models import CurrentUser
+from modules.events.dedup_service import (
+    EventFingerprint,
+    backfill_duplicates,
+    blocking_keys,
+    find_duplicate,
+    list_duplicate_candidates,
+    name_similarity,
+    name_tokens,
+    probe_keys,
+    similarity,
+)
+from modules.events.router import router
+from tests.sqlite_support import MEMORY_URL, route_client, sqlite_engine
+
+
+COMPANY_ID = 10
+START = datetime(2025, 5, 14, 9)
+SYDNEY = (-33.8688, 151.2093)
+
+
+TABLES = [
+    Company.__table__, Event.__table__, EventTag.__table__, EventBlockKey.__table__,
+    # Written by the modules.dashboard KPI listeners on Event writes
+    EventStatus.__table__, KpiOutbox.__table__,
+]
+
+
+def _build_engine(url: str = MEMORY_URL):
+    engine = sqlite_engine(TABLES, url)
+    with engine.begin() as conn:
+        conn.execute(Company.__table__.insert(), [{"CompanyID": COMPANY_ID, "CompanyName": "Expo Co", "CountryID": 1}])
+    return engine
+
+
+@pytest.fixture
+def engine():
+    engine = _build_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+def _fp(name, start=START, city="Sydney", latlon=SYDNEY, event_id=None):
+    lat, lon = latlon if latlon else (None, None)
+    return EventFingerprint.of(event_id, name, start, city, lat, lon)
+
+
+def _event(name, start=START, city="Sydney", latlon=SYDNEY, **values) -> Event:
+    lat, lon = latlon if latlon else (None, None)
+    defaults = dict(
+        Name=name, CompanyID=COMPANY_ID, StartDateTime=start, City=city, Latitude=lat, Longitude=lon,
+        EventTypeID=1, EventStatusID=3, CreatedBy=1, IsPublic=True
+    )
+    defaults.update(values)
+    return Event(**defaults)
+
+
+def _add(db, *events):
+    for e in events:
+        db.add(e)
+        db.commit()
+    return events
+
+
+class TestScoring:
+    """Normalization, blocking and similarity"""
+
+    def test_name_tokens(self):
+        assert name_tokens("The Sydney FinTech Summit, 2025!") == {"sydney", "fintech", "summit", "2025"}
+        assert name_tokens("Café Expo") == name_tokens("cafe expo")
+
+    def test_city_and_year_are_not_name_evidence(self):
+        assert _fp("Sydney Fintech Summit 2025").tokens == {"fintech", "summit"}
+        assert similarity(_fp("Fintech Summit Sydney"), _fp("Health Summit Sydney")) == 0.0
+
+    def test_name_similarity(self):
+        def names(a, b):
+            return name_similarity(name_tokens(a), name_tokens(b))
+
+        assert names("Fintech Summit", "Annual Fintech Summit") == 0.8
+        assert names("Zenka Future of Design Forum", "ZENKA Design Forum: Future") == 1.0
+        assert names("Zenka Future of Design Forum", "Zenka Futur of Design Forum") == 1.0
+        # A replaced word means a different event
+        assert names("Zenka Future of Design Forum", "Luxqua Future of Design Forum") == 0.0
+
+    def test_relisting_scores_high(self):
+        original = _fp("Sydney Fintech Summit 2025")
+        assert similarity(original, _fp("Fintech Summit")) == 1.0
+        assert similarity(original, _fp("Annual FinTech Summit", start=START + timedelta(days=1))) > 0.8
+        assert similarity(original, _fp("Fintech Summit", start=START + timedelta(days=30))) < 0.8
+
+    def test_place_matches_on_distance_without_city(self):
+        here = _fp("Fintech Summit", city=None)
+        nearby = _fp("Fintech Summit", city=None, latlon=(SYDNEY[0] + 0.005, SYDNEY[1]))
+        far = _fp("Fintech Summit", city=None, latlon=(-37.8136, 144.9631))
+        assert similarity(here, nearby) == 1.0
+        assert similarity(here, far) < similarity(here, nearby)
+
+    def test_nearby_dates_share_a_block(self):
+        # Saturday and the following Monday fall in different weeks
+        saturday = START + timedelta(days=(5 - START.weekday()) % 7)
+        a = _fp("Fintech Summit", start=saturday)
+        b = _fp("Fintech Summit", start=saturday + timedelta(days=2))
+        assert blocking_keys(b) & probe_keys(a)
+        assert not blocking_keys(_fp("Fintech Summit", start=START + timedelta(days=60))) & probe_keys(a)
+
+    def test_keys_are_bounded(self):
+        assert len(blocking_keys(_fp("International Blockchain Developers Festival Asia Pacific"))) <= 8
+
+
+class TestIncrementalDetection:
+    """ORM listeners flag duplicates on write"""
+
+    def test_relisting_is_flagged(self, db):
+        original, relisted = _add(db, _event("Sydney Fintech Summit 2025"), _event("FinTech Summit"))
+        assert not original.IsDuplicate
+        assert relisted.IsDuplicate and relisted.DuplicateEventID == original.EventID
+
+    def test_chains_point_at_the_first_listing(self, db):
+        first, second, third = _add(
+            db, _event("Fintech Summit"), _event("Fintech Summit", start=START + timedelta(days=1)),
+            _event("Fintech Summit", start=START + timedelta(days=2))
+        )
+        assert second.DuplicateEventID == first.EventID
+        assert third.DuplicateEventID == first.EventID
+
+    def test_unrelated_and_private_events_are_not_flagged(self, db):
+        _add(db, _event("Fintech Summit"))
+        other, private = _add(db, _event("Health Summit"), _event("Fintech Summit", IsPublic=False))
+        assert not other.IsDuplicate and not private.IsDuplicate
+        keys = db.execute(select(func.count()).select_from(EventBlockKey).where(EventBlockKey.EventID == private.EventID)).scalar()
+        assert keys == 0
+
+    def test_update_rechecks_and_rekeys(self, db):
+        original, renamed = _add(db, _event("Fintech Summit"), _event("Health Expo"))
+        assert not renamed.IsDuplicate
+
+        renamed.Name = "Fintech Summit"
+        db.commit()
+        assert renamed.DuplicateEventID == original.EventID
+
+        renamed.StartDateTime = START + timedelta(days=90)
+        db.commit()
+        assert not renamed.IsDuplicate and renamed.DuplicateEventID is None
+
+    def test_reviewer_decision_wins(self, db):
+        original, relisted = _add(db, _event("Fintech Summit"), _event("Fintech Summit"))
+        relisted.IsDuplicate, relisted.DuplicateEventID, relisted.Name = False, None, "Fintech Summit Day 2"
+        db.commit()
+        assert not relisted.IsDuplicate
+
+    def test_find_and_list_candidates(self, db):
+        original, relisted, _ = _add(db, _event("Fintech Summit"), _event("Fintech Summit"), _event("Health Expo"))
+        match = find_duplicate(db, _fp("The Fintech Summit"))
+        assert match.matched_event_id == original.EventID and match.original_event_id == original.EventID
+
+        candidates = list_duplicate_candidates(db, original.EventID)
+        assert [row.EventID for row, _ in candidates] == [relisted.EventID]
+        assert list_duplicate_candidates(db, 999) is None
+
+
+class TestBackfill:
+    """backfill_duplicates()"""
+
+    def test_backfill_flags_bulk_loaded_events(self, db):
+        rows = [
+            {"Name": "Fintech Summit", "StartDateTime": START},
+            {"Name": "Health Expo", "StartDateTime": START},
+            {"Name": "FINTECH SUMMIT 2025", "StartDateTime": START + timedelta(hours=2)},
+            {"Name": "Fintech Summit", "StartDateTime": START + timedelta(days=1)},
+            {"Name": "Fintech Summit", "StartDateTime": START + timedelta(days=1), "IsPublic": False},
+        ]
+        db.execute(Event.__table__.insert(), [{
+            "EventID": n + 1, "CompanyID": COMPANY_ID, "City": "Sydney", "Latitude": SYDNEY[0],
+            "Longitude": SYDNEY[1], "EventTypeID": 1, "EventStatusID": 3, "CreatedBy": 1,
+            "IsPublic": True, "IsDeleted": False, "IsDuplicate": False, **row
+        } for n, row in enumerate(rows)])
+        db.commit()
+
+        stats = backfill_duplicates(db, batch_size=2)
+        assert (stats.events, stats.duplicates, stats.changed) == (4, 2, 2)
+        flagged = dict(db.execute(select(Event.EventID, Event.DuplicateEventID).order_by(Event.EventID)).all())
+        assert flagged == {1: None, 2: None, 3: 1, 4: 1, 5: None}
+
+        # Idempotent
+        assert backfill_duplicates(db, batch_size=2).changed == 0
+
+
+class TestDuplicatesRoute:
+    """GET /api/events/{event_id}/duplicates"""
+
+    def test_candidates_and_private_events(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'events.db'}"
+        engine = _build_engine(url)
+        with Session(bind=engine) as db:
+            original, relisted, private = _add(
+                db, _event("Fintech Summit"), _event("Fintech Summit"), _event("Fintech Summit", IsPublic=False)
+            )
+            ids = original.EventID, relisted.EventID, private.EventID
+        engine.dispose()
+
+        outsider = CurrentUser(user_id=2, email="outsider@example.com", role="company_user", company_id=99)
+        with route_client(router, url, outsider) as client:
+            response = client.get(f"/api/events/{ids[0]}/duplicates")
+            assert response.status_code == 200
+            assert [(c["event_id"], c["duplicate_event_id"]) for c in response.json()] == [(ids[1], ids[0])]
+            assert client.get(f"/api/events/{ids[2]}/duplicates").status_code == 403
+            assert client.get("/api/events/999/duplicates").status_code == 404
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+BENCHMARK_EVENTS = int(os.getenv("EVENT_DEDUP_BENCHMARK_EVENTS", "100000"))
+
+_TOPICS = [
+    "fintech", "health", "cloud", "security", "retail", "energy", "mining", "wine", "design", "robotics",
+    "biotech", "marketing", "logistics", "education", "gaming", "travel", "fashion", "agritech", "legal", "hr",
+    "data", "quantum", "space", "climate", "property", "insurance", "media", "music", "coffee", "craft beer",
+]
+_FORMATS = ["summit", "expo", "conference", "forum", "festival", "week", "meetup", "congress", "show", "symposium"]
+_EXTRAS = ["", "", "", "asia pacific", "global", "national", "innovation", "leaders", "future of", "women in"]
+_CITIES = [
+    ("Sydney", -33.8688, 151.2093), ("Melbourne", -37.8136, 144.9631), ("Brisbane", -27.4698, 153.0251),
+    ("Perth", -31.9505, 115.8605), ("Auckland", -36.8485, 174.7633), ("Singapore", 1.3521, 103.8198),
+    ("London", 51.5072, -0.1276), ("New York", 40.7128, -74.0060), ("Berlin", 52.5200, 13.4050),
+    ("Tokyo", 35.6762, 139.6503), ("Toronto", 43.6532, -79.3832), ("Dubai", 25.2048, 55.2708),
+]
+_PREFIXES = ["the", "annual", "2025", "official"]
+_SYLLABLES = ["ka", "zen", "lo", "mira", "tek", "vo", "ra", "nex", "sol", "qua", "dri", "fin", "oro", "lux", "pi"]
+
+
+def _brand(rng: random.Random) -> str:
+    # Organizer brand: recurs across unrelated events (hard negatives)
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.choice([2, 3])))
+
+
+def _relist(name: str, rng: random.Random) -> str:
+    """A plausible second listing of the same event"""
+    words = name.split()
+    choice = rng.randrange(4)
+    if choice == 0:
+        words = [rng.choice(_PREFIXES)] + words
+    elif choice == 1:
+        words = [w.upper() if rng.random() < 0.5 else w.title() for w in words]
+    elif choice == 2 and len(words) > 2:
+        words = words[1:] + words[:1]
+    else:
+        words = words + [rng.choice(["2025", "(official)", "- sydney", "edition"])]
+    return " ".join(words)
+
+
+def generate_events(count: int, duplicate_share: float = 0.1, seed: int = 5):
+    """(rows, truth): truth maps each re-listing's EventID to the original's"""
+    rng = random.Random(seed)
+    rows, truth = [], {}
+    event_id = 0
+    while len(rows) < count:
+        event_id += 1
+        city, lat, lon = rng.choice(_CITIES)
+        name = " ".join(filter(None, [
+            _brand(rng), rng.choice(_EXTRAS), rng.choice(_TOPICS), rng.choice(_FORMATS)
+        ])).title()
+        if rng.random() < 0.5:
+            name = f"{city} {name}"
+        start = START + timedelta(days=rng.randrange(3 * 365), hours=rng.randrange(8, 18))
+        rows.append(_bench_row(event_id, name, start, city, lat, lon))
+
+        if rng.random() < duplicate_share and len(rows) < count:
+            event_id += 1
+            truth[event_id] = event_id - 1
+            rows.append(_bench_row(
+                event_id, _relist(name, rng), start + timedelta(days=rng.choice([0, 0, 1, -1])),
+                city if rng.random() < 0.7 else None,
+                lat + rng.uniform(-0.003, 0.003), lon + rng.uniform(-0.003, 0.003)
+            ))
+    return rows, truth
+
+
+def _bench_row(event_id, name, start, city, lat, lon) -> dict:
+    return {
+        "EventID": event_id, "Name": name, "StartDateTime": start, "City": city, "Latitude": lat,
+        "Longitude": lon, "CompanyID": COMPANY_ID, "EventTypeID": 1, "EventStatusID": 3, "CreatedBy": 1,
+        "IsPublic": True, "IsDeleted": False, "IsDuplicate": False,
+    }
+
+
+def run_benchmark(event_count: int = BENCHMARK_EVENTS, incremental_inserts: int = 500) -> dict:
+    """Backfill throughput, comparisons, precision/recall, and per-insert latency"""
+    rows, truth = generate_events(event_count)
+    engine = _build_engine()
+    with Session(bind=engine) as db:
+        for offset in range(0, len(rows), 50000):
+            db.execute(Event.__table__.insert(), rows[offset:offset + 50000])
+        db.commit()
+
+        stats = backfill_duplicates(db, batch_size=1000)
+        flagged = dict(db.execute(
+            select(Event.EventID, Event.DuplicateEventID).where(Event.IsDuplicate == True)  # noqa: E712
+        ).all())
+        true_positives = sum(1 for event_id, original in flagged.items() if truth.get(event_id) == original)
+
+        rng = random.Random(9)
+        samples = [rows[rng.randrange(len(rows))] for _ in range(incremental_inserts)]
+        began = time.perf_counter()
+        for sample in samples:
+            db.add(_event(_relist(sample["Name"], rng), start=sample["StartDateTime"], city=sample["City"],
+                          latlon=(sample["Latitude"], sample["Longitude"])))
+            db.commit()
+        insert_seconds = (time.perf_counter() - began) / incremental_inserts
+    engine.dispose()
+
+    return {
+        "events": len(rows),
+        "seconds": stats.seconds,
+        "events_per_second": len(rows) / stats.seconds,
+        "comparisons": stats.comparisons,
+        "all_pairs": len(rows) * (len(rows) - 1) // 2,
+        "flagged": len(flagged),
+        "precision": true_positives / len(flagged) if flagged else 1.0,
+        "recall": true_positives / len(truth) if truth else 1.0,
+        "insert_ms": insert_seconds * 1000,
+    }
+
+
+@pytest.mark.slow
+def test_backfill_precision_and_recall():
+    """Blocking keeps comparisons near-linear without losing re-listings"""
+    r = run_benchmark(20000, incremental_inserts=50)
+    assert r["comparisons"] < r["events"] * 20
+    assert r["precision"] > 0.95
+    assert r["recall"] > 0.9
+
+
+if __name__ == "__main__":
+    r = run_benchmark()
+    print(
+        f"{r['events']:,} events: backfill {r['seconds']:.1f}s ({r['events_per_second']:,.0f} events/s), "
+        f"{r['comparisons']:,} comparisons vs {r['all_pairs']:,} all-pairs\n"
+        f"flagged {r['flagged']:,}: precision {r['precision']:.3f}, recall {r['recall']:.3f}\n"
+        f"incremental insert with detection: {r['insert_ms']:.2f} ms/event"
+    )
@@ -0,0 +1,452 @@
+"""
+Event Search Tests and Benchmark
+
+Covers modules.events.search_service and common.geohash:
+- Geohash encoding, bounding-box covers (incl. the antimeridian)
+- EventTag / GeoHash maintenance by the ORM listeners and the rebuild job
+- Filters, bounding box and radius search, keyset pages
+- GET /api/events/search (private events for members, cursor pages)
+
+The benchmark seeds a large event table and compares the indexed tag and
+geo lookups with the LIKE / latitude-longitude scans they replace:
+
+    python -m tests.test_event_search            # 1,000,000 events
+    EVENT_SEARCH_BENCHMARK_EVENTS=200000 python -m tests.test_event_search
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common import geohash
+from models.company import Company
+from models.event import Event
+from models.event_block_key import EventBlockKey
+from models.event_tag import EventTag
+from models.kpi_rollup import KpiOutbox
+from models.ref.event_status import EventStatus
+from modules.auth.models import CurrentUser
+from modules.events import search_service
+from modules.events.search_service import (
+    EventSearchFilter,
+    GeoBox,
+    GeoNear,
+    event_geohash,
+    parse_tags,
+    rebuild_event_search_index,
+    search_events,
+)
+from modules.events.router import router
+from tests.sqlite_support import MEMORY_URL, route_client, sqlite_engine
+
+
+COMPANY_ID, OTHER_COMPANY_ID = 10, 20
+BASE_START = datetime(2025, 1, 1, 9)
+TAG_POOL = ["fintech", "ai", "cloud", "retail", "health", "security", "energy", "mobile"]
+RARE_TAG_SHARE = 0.002
+
+
+TABLES = [
+    Company.__table__, Event.__table__, EventTag.__table__, EventBlockKey.__table__,
+    # Written by the modules.dashboard KPI listeners on Event writes
+    EventStatus.__table__, KpiOutbox.__table__,
+]
+
+
+def _build_engine(url: str = MEMORY_URL):
+    # EventBlockKey: maintained by the duplicate-detection listeners on Event writes
+    engine = sqlite_engine(TABLES, url)
+    with engine.begin() as conn:
+        conn.execute(Company.__table__.insert(), [
+            {"CompanyID": COMPANY_ID, "CompanyName": "Expo Co", "CountryID": 1},
+            {"CompanyID": OTHER_COMPANY_ID, "CompanyName": "Other Co", "CountryID": 1},
+        ])
+    return engine
+
+
+def _event_row(event_id: int, rng: random.Random, **overrides) -> dict:
+    latitude = round(rng.uniform(-60, 70), 6)
+    longitude = round(rng.uniform(-180, 180), 6)
+    row = {
+        "EventID": event_id,
+        "Name": f"Event {event_id}",
+        "CompanyID": COMPANY_ID if event_id % 3 else OTHER_COMPANY_ID,
+        "StartDateTime": BASE_START + timedelta(hours=rng.randrange(24 * 365)),
+        "EventTypeID": rng.randrange(1, 6),
+        "IndustryID": None,
+        "CountryID": rng.randrange(1, 4),
+        "City": rng.choice(["Sydney", "Melbourne", "Auckland"]),
+        "Latitude": latitude,
+        "Longitude": longitude,
+        "GeoHash": event_geohash(latitude, longitude),
+        "Tags": ", ".join(rng.sample(TAG_POOL, 2) + (["Robotics"] if rng.random() < RARE_TAG_SHARE else [])),
+        "IsPublic": bool(event_id % 4),
+        "IsDeleted": False,
+        "EventStatusID": 3,
+        "CreatedBy": 1,
+    }
+    row.update(overrides)
+    return row
+
+
+def _seed(db: Session, count: int, seed: int = 7, start_id: int = 1) -> list:
+    """Bulk-insert random events with their EventTag rows (no ORM listeners)"""
+    rng = random.Random(seed)
+    rows = [_event_row(start_id + n, rng) for n in range(count)]
+    for offset in range(0, count, 50000):
+        batch = rows[offset:offset + 50000]
+        db.execute(Event.__table__.insert(), batch)
+        db.execute(EventTag.__table__.insert(), [
+            {"Tag": tag, "EventID": row["EventID"]} for row in batch for tag in parse_tags(row["Tags"])
+        ])
+    db.commit()
+    return rows
+
+
+def _seed_cluster(db: Session, rows: list, count: int = 200, latitude: float = -33.87, longitude: float = 151.21) -> None:
+    """Add events scattered up to ~800 km around a point (for radius searches)"""
+    rng = random.Random(11)
+    cluster = []
+    for n in range(count):
+        lat, lon = latitude + rng.uniform(-7, 7), longitude + rng.uniform(-9, 9)
+        cluster.append(_event_row(
+            len(rows) + n + 1, rng, Latitude=lat, Longitude=lon, GeoHash=event_geohash(lat, lon)
+        ))
+    db.execute(Event.__table__.insert(), cluster)
+    db.commit()
+    rows.extend(cluster)
+
+
+def _all_pages(db: Session, search: EventSearchFilter, limit: int):
+    ids, distances, cursor, pages = [], [], None, 0
+    while True:
+        page = search_events(db, search, cursor, limit)
+        ids += [row.EventID for row in page.rows]
+        distances += page.distances_km or []
+        pages += 1
+        if page.next_cursor is None:
+            return ids, distances, pages
+        cursor = page.next_cursor
+
+
+def _expected(rows, predicate):
+    visible = [r for r in rows if r["IsPublic"] and not r["IsDeleted"] and predicate(r)]
+    return [r["EventID"] for r in sorted(visible, key=lambda r: (r["StartDateTime"], r["EventID"]))]
+
+
+@pytest.fixture
+def engine():
+    engine = _build_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+class TestGeohash:
+    """common.geohash"""
+
+    def test_encode_known_value(self):
+        assert geohash.encode(42.605, -5.603, 5) == "ezs42"
+        assert geohash.encode(-33.8688, 151.2093, 8).startswith("r3gx2")
+
+    def test_cover_contains_every_point_in_box(self):
+        rng = random.Random(1)
+        box = (-34.2, 150.6, -33.5, 151.4)
+        cells = geohash.covering_cells(*box, max_precision=8, max_cells=16)
+        assert 0 < len(cells) <= 16
+        for _ in range(500):
+            point = geohash.encode(rng.uniform(box[0], box[2]), rng.uniform(box[1], box[3]), 8)
+            assert any(point.startswith(cell) for cell in cells)
+
+    def test_antimeridian_box_is_split(self):
+        cells = geohash.covering_cells(-20.0, 175.0, -10.0, -175.0, max_precision=8, max_cells=16)
+        for lat, lon in [(-15.0, 179.5), (-15.0, -179.5), (-11.0, 176.0)]:
+            assert any(geohash.encode(lat, lon, 8).startswith(cell) for cell in cells)
+
+    def test_radius_bbox_wraps_longitude(self):
+        min_lat, min_lon, max_lat, max_lon = geohash.radius_bbox(0.0, 179.9, 50)
+        assert min_lon > max_lon
+        assert min_lat < 0 < max_lat
+
+    def test_haversine(self):
+        # Sydney -> Melbourne ~ 714 km
+        assert 700 < geohash.haversine_km(-33.8688, 151.2093, -37.8136, 144.9631) < 730
+
+
+class TestIndexMaintenance:
+    """EventTag rows and GeoHash follow the Event row"""
+
+    def _event(self, **values) -> Event:
+        defaults = dict(
+            Name="Expo", CompanyID=COMPANY_ID, StartDateTime=BASE_START, EventTypeID=1,
+            EventStatusID=3, CreatedBy=1, IsPublic=True
+        )
+        defaults.update(values)
+        return Event(**defaults)
+
+    def _tags(self, db, event_id):
+        return sorted(db.execute(select(EventTag.Tag).where(EventTag.EventID == event_id)).scalars())
+
+    def test_parse_tags_normalizes(self):
+        assert parse_tags(" FinTech ,ai,  Machine   Learning,,fintech ") == ["fintech", "ai", "machine learning"]
+        assert parse_tags(None) == []
+        assert len(parse_tags("x" * 80)[0]) == search_service.MAX_TAG_LENGTH
+
+    def test_insert_indexes_tags_and_geohash(self, db):
+        expo = self._event(Tags="AI, Cloud", Latitude=-33.8688, Longitude=151.2093)
+        db.add(expo)
+        db.commit()
+        assert self._tags(db, expo.EventID) == ["ai", "cloud"]
+        assert expo.GeoHash == event_geohash(-33.8688, 151.2093)
+
+    def test_update_reindexes_only_changed_fields(self, db):
+        expo = self._event(Tags="ai", Latitude=-33.8688, Longitude=151.2093)
+        db.add(expo)
+        db.commit()
+
+        expo.Tags = "Retail"
+        db.commit()
+        assert self._tags(db, expo.EventID) == ["retail"]
+
+        expo.Latitude, expo.Longitude = -37.8136, 144.9631
+        db.commit()
+        assert expo.GeoHash == event_geohash(-37.8136, 144.9631)
+        assert self._tags(db, expo.EventID) == ["retail"]
+
+        expo.Latitude = None
+        db.commit()
+        assert expo.GeoHash is None
+
+    def test_rebuild_indexes_rows_written_outside_the_orm(self, db):
+        db.execute(Event.__table__.insert(), [
+            _event_row(1, random.Random(1), Tags="Energy,AI", GeoHash=None),
+            _event_row(2, random.Random(2), Tags=None, GeoHash=None),
+        ])
+        db.commit()
+        assert rebuild_event_search_index(db, batch_size=1) == 2
+        assert self._tags(db, 1) == ["ai", "energy"]
+        assert self._tags(db, 2) == []
+        first = db.get(Event, 1)
+        assert first.GeoHash == event_geohash(first.Latitude, first.Longitude)
+
+
+class TestSearch:
+    """search_events filters and pagination"""
+
+    @pytest.fixture
+    def rows(self, db):
+        return _seed(db, 600)
+
+    def test_public_only_by_default(self, db, rows):
+        ids, _, _ = _all_pages(db, EventSearchFilter(), limit=100)
+        assert ids == _expected(rows, lambda r: True)
+
+    def test_company_members_see_private_events(self, db, rows):
+        ids, _, _ = _all_pages(db, EventSearchFilter(company_id=COMPANY_ID, include_private=True), limit=100)
+        expected = sorted(
+            (r for r in rows if r["CompanyID"] == COMPANY_ID),
+            key=lambda r: (r["StartDateTime"], r["EventID"])
+        )
+        assert ids == [r["EventID"] for r in expected]
+
+        public_ids, _, _ = _all_pages(db, EventSearchFilter(company_id=COMPANY_ID), limit=100)
+        assert public_ids == _expected(rows, lambda r: r["CompanyID"] == COMPANY_ID)
+
+    def test_private_search_requires_company(self):
+        with pytest.raises(ValueError):
+            EventSearchFilter(include_private=True).validate()
+
+    def test_equality_and_date_filters(self, db, rows):
+        start_from, start_to = BASE_START + timedelta(days=30), BASE_START + timedelta(days=200)
+        search = EventSearchFilter(
+            start_from=start_from, start_to=start_to, country_id=2, city="Sydney", event_type_id=3
+        )
+        ids, _, _ = _all_pages(db, search, limit=7)
+        assert ids == _expected(rows, lambda r: (
+            start_from <= r["StartDateTime"] < start_to and r["CountryID"] == 2
+            and r["City"] == "Sydney" and r["EventTypeID"] == 3
+        ))
+        assert ids
+
+    def test_tags_match_all(self, db, rows):
+        ids, _, _ = _all_pages(db, EventSearchFilter(tags=("ai", "cloud")), limit=50)
+        assert ids == _expected(rows, lambda r: {"ai", "cloud"} <= set(parse_tags(r["Tags"])))
+        assert ids
+
+    def test_soft_deleted_events_are_hidden(self, db, rows):
+        visible = _expected(rows, lambda r: True)
+        db.execute(Event.__table__.update().where(Event.EventID == visible[0]).values(IsDeleted=True))
+        db.commit()
+        ids, _, _ = _all_pages(db, EventSearchFilter(), limit=100)
+        assert ids == visible[1:]
+
+    def test_bounding_box(self, db, rows):
+        box = GeoBox(-10.0, -40.0, 30.0, 25.0)
+        ids, _, _ = _all_pages(db, EventSearchFilter(box=box), limit=20)
+        assert ids == _expected(rows, lambda r: (
+            box.min_lat <= r["Latitude"] <= box.max_lat and box.min_lon <= r["Longitude"] <= box.max_lon
+        ))
+        assert ids
+
+    def test_bounding_box_across_antimeridian(self, db, rows):
+        box = GeoBox(-60.0, 150.0, 70.0, -150.0)
+        ids, _, _ = _all_pages(db, EventSearchFilter(box=box), limit=20)
+        assert ids == _expected(rows, lambda r: (
+            box.min_lat <= r["Latitude"] <= box.max_lat
+            and (r["Longitude"] >= box.min_lon or r["Longitude"] <= box.max_lon)
+        ))
+        assert ids
+
+    def test_radius(self, db, rows):
+        _seed_cluster(db, rows)
+        near = GeoNear(-33.87, 151.21, 500.0)
+        ids, distances, _ = _all_pages(db, EventSearchFilter(near=near), limit=5)
+        assert ids == _expected(rows, lambda r: (
+            geohash.haversine_km(near.latitude, near.longitude, r["Latitude"], r["Longitude"]) <= near.radius_km
+        ))
+        assert ids and all(d <= near.radius_km for d in distances)
+
+    def test_radius_resumes_when_scan_budget_is_spent(self, db, rows, monkeypatch):
+        monkeypatch.setattr(search_service, "RADIUS_SCAN_ROUNDS", 1)
+        monkeypatch.setattr(search_service, "RADIUS_SCAN_FACTOR", 1)
+        _seed_cluster(db, rows)
+        near = GeoNear(-33.87, 151.21, 500.0)
+        ids, _, pages = _all_pages(db, EventSearchFilter(near=near), limit=5)
+        assert ids == _expected(rows, lambda r: (
+            geohash.haversine_km(near.latitude, near.longitude, r["Latitude"], r["Longitude"]) <= near.radius_km
+        ))
+        assert pages > len(ids) / 5
+
+    def test_invalid_geo_filters(self):
+        with pytest.raises(ValueError):
+            EventSearchFilter(near=GeoNear(10.0, 0.0, 0)).validate()
+        with pytest.raises(ValueError):
+            EventSearchFilter(box=GeoBox(10.0, 0.0, -10.0, 5.0)).validate()
+        with pytest.raises(ValueError):
+            EventSearchFilter(box=GeoBox(-1, -1, 1, 1), near=GeoNear(0, 0, 5)).validate()
+
+
+class TestSearchRoute:
+    """GET /api/events/search"""
+
+    @pytest.fixture
+    def seeded(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'events.db'}"
+        engine = _build_engine(url)
+        with Session(bind=engine) as db:
+            rows = _seed(db, 60)
+        engine.dispose()
+        return url, rows
+
+    def _pages(self, client, **params):
+        ids, params = [], {**params, "limit": 7}
+        while True:
+            response = client.get("/api/events/search", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            ids += [item["event_id"] for item in body["items"]]
+            if not body["has_more"]:
+                return ids
+            params["cursor"] = body["next_cursor"]
+
+    def test_pages_and_private_events(self, seeded):
+        url, rows = seeded
+        member = CurrentUser(user_id=1, email="member@example.com", role="company_user", company_id=COMPANY_ID)
+        with route_client(router, url, member) as client:
+            assert self._pages(client, tags=["ai"]) == _expected(rows, lambda r: "ai" in parse_tags(r["Tags"]))
+            own = [r for r in rows if r["CompanyID"] == COMPANY_ID]
+            assert self._pages(client, company_id=COMPANY_ID) == [
+                r["EventID"] for r in sorted(own, key=lambda r: (r["StartDateTime"], r["EventID"]))
+            ]
+            # Another company's private events stay hidden
+            assert self._pages(client, company_id=OTHER_COMPANY_ID) == _expected(
+                rows, lambda r: r["CompanyID"] == OTHER_COMPANY_ID
+            )
+            assert client.get("/api/events/search", params={"lat": 1.0}).status_code == 400
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+BENCHMARK_EVENTS = int(os.getenv("EVENT_SEARCH_BENCHMARK_EVENTS", "1000000"))
+
+
+def _time(fn, repeat: int = 5) -> float:
+    fn()
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - began) / repeat
+
+
+def run_benchmark(event_count: int = BENCHMARK_EVENTS, limit: int = 20) -> dict:
+    """Seconds per first page: indexed lookups vs the scans they replace"""
+    engine = _build_engine()
+    with Session(bind=engine) as db:
+        for offset in range(0, event_count, 200000):
+            _seed(db, min(200000, event_count - offset), seed=offset, start_id=offset + 1)
+        # SQL Server keeps statistics itself; SQLite plans blind without them
+        db.connection().exec_driver_sql("ANALYZE")
+        db.commit()
+
+        visible = [Event.IsDeleted == False, Event.IsPublic == True]  # noqa: E712
+        columns = [Event.EventID, Event.StartDateTime]
+        order = [Event.StartDateTime, Event.EventID]
+        box = GeoBox(-34.5, 150.0, -33.0, 152.0)
+
+        tag_search = EventSearchFilter(tags=("robotics",))
+        like_scan = (
+            select(*columns).where(*visible, Event.Tags.like("%robotics%"))
+            .order_by(*order).limit(limit + 1)
+        )
+        geo_search = EventSearchFilter(box=box)
+        latlon_scan = (
+            select(*columns).where(
+                *visible,
+                Event.Latitude.between(box.min_lat, box.max_lat),
+                Event.Longitude.between(box.min_lon, box.max_lon)
+            ).order_by(*order).limit(limit + 1)
+        )
+        near_search = EventSearchFilter(near=GeoNear(-33.8688, 151.2093, 150.0))
+
+        results = {
+            "events": event_count,
+            "tag_index": _time(lambda: search_events(db, tag_search, limit=limit)),
+            "tag_like_scan": _time(lambda: db.execute(like_scan).all()),
+            "geohash_box": _time(lambda: search_events(db, geo_search, limit=limit)),
+            "latlon_box_scan": _time(lambda: db.execute(latlon_scan).all()),
+            "geohash_radius": _time(lambda: search_events(db, near_search, limit=limit)),
+        }
+    engine.dispose()
+    return results
+
+
+@pytest.mark.slow
+def test_indexed_search_beats_scans():
+    """Tag and geohash lookups avoid full scans"""
+    r = run_benchmark(100000)
+    assert r["tag_index"] < r["tag_like_scan"]
+    assert r["geohash_box"] < r["latlon_box_scan"]
+
+
+if __name__ == "__main__":
+    r = run_benchmark()
+    print(f"{r['events']:,} events, seconds per first page:")
+    for name in ("tag_index", "tag_like_scan", "geohash_box", "latlon_box_scan", "geohash_radius"):
+        print(f"  {name:<16} {r[name] * 1000:9.2f} ms")
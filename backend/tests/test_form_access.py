@@ -0,0 +1,476 @@
+"""
+Form Access Resolver Tests and Benchmark
+
+Covers modules.forms.access_service:
+- Folding grants into per-permission rows (implied bits, latest expiry wins)
+- Grants through the owning company or an active relationship of the
+  grant's type; membership, relationship, expiry and form deletion revoke
+- Rows rebuilt in the committing transaction, discarded on rollback
+- O(1) checks: owners need no query, grant snapshots are cached per user
+  and versioned against concurrent invalidation
+- Grants honoured by the submit route
+
+The benchmark compares evaluating grants per request (the four-table join)
+with the materialized, cached check. Run it directly for timings:
+
+    python -m tests.test_form_access
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company import Company
+from models.company_relationship import CompanyRelationship
+from models.form import Form
+from models.form_access_control import FormAccessControl
+from models.form_effective_access import FormEffectiveAccess
+from models.form_submission import FormSubmission
+from models.kpi_rollup import KpiOutbox
+from models.ref.company_relationship_type import CompanyRelationshipType
+from models.ref.form_access_control_access_type import FormAccessControlAccessType
+from models.ref.form_status import FormStatus
+from models.ref.user_company_role import UserCompanyRole
+from models.ref.user_company_status import UserCompanyStatus
+from models.user_company import UserCompany
+from common.membership_cache import load_membership_snapshot, membership_cache
+from modules.auth.models import CurrentUser
+from modules.forms.access_service import (
+    FORM_ANALYZE,
+    FORM_EDIT,
+    FORM_MANAGE,
+    FORM_SUBMIT,
+    FORM_VIEW,
+    FormAccess,
+    FormAccessCache,
+    effective_access_rows,
+    form_access_cache,
+    get_form_access,
+    load_form_access,
+    rebuild_form_access,
+    refresh_form_access_on_commit,
+    require_form_access,
+    _effective_grants_statement,
+)
+from modules.forms.router import router
+from modules.forms.submission_service import SubmissionTarget, submission_target_cache
+from tests.sqlite_support import MEMORY_URL, route_client, sqlite_engine
+
+
+OWNER, PARTNER, OTHER = 10, 20, 30
+OWNER_USER, PARTNER_USER = 1, 2
+BRANCH, PARTNERSHIP = 1, 3
+ACTIVE, SUSPENDED = 1, 2
+ACCESS_TYPES = ("VIEW", "EDIT", "MANAGE", "SUBMIT", "ANALYZE")
+VIEW, EDIT, MANAGE, SUBMIT, ANALYZE = range(1, 6)
+
+TABLES = [
+    Company.__table__, CompanyRelationshipType.__table__, CompanyRelationship.__table__,
+    UserCompanyRole.__table__, UserCompanyStatus.__table__, UserCompany.__table__,
+    Form.__table__, FormAccessControlAccessType.__table__, FormAccessControl.__table__,
+    FormEffectiveAccess.__table__,
+    # Written by the modules.dashboard KPI listeners on Form writes
+    KpiOutbox.__table__,
+]
+
+
+def _build_engine(url: str = MEMORY_URL, tables=TABLES):
+    engine = sqlite_engine(tables, url)
+    with engine.begin() as conn:
+        conn.execute(FormAccessControlAccessType.__table__.insert(), [
+            {"FormAccessControlAccessTypeID": i, "AccessTypeCode": code, "AccessTypeName": code.title(),
+             "SortOrder": i, "CreatedBy": 1}
+            for i, code in enumerate(ACCESS_TYPES, start=1)
+        ])
+        conn.execute(CompanyRelationshipType.__table__.insert(), [
+            {"CompanyRelationshipTypeID": i, "TypeName": name}
+            for i, name in enumerate(("branch", "subsidiary", "partner"), start=1)
+        ])
+        conn.execute(UserCompanyRole.__table__.insert(), [
+            {"UserCompanyRoleID": 1, "RoleCode": "company_user", "RoleName": "Company User",
+             "Description": "User", "RoleLevel": 2},
+        ])
+        conn.execute(UserCompanyStatus.__table__.insert(), [
+            {"UserCompanyStatusID": ACTIVE, "StatusCode": "active", "StatusName": "Active", "Description": "Active"},
+            {"UserCompanyStatusID": SUSPENDED, "StatusCode": "suspended", "StatusName": "Suspended",
+             "Description": "Suspended"},
+        ])
+        conn.execute(Company.__table__.insert(), [
+            {"CompanyID": company_id, "CompanyName": f"Company {company_id}", "CountryID": 1}
+            for company_id in (OWNER, PARTNER, OTHER)
+        ])
+    return engine
+
+
+def _membership(user_id: int, company_id: int, status_id: int = ACTIVE) -> UserCompany:
+    return UserCompany(
+        UserID=user_id, CompanyID=company_id, UserCompanyRoleID=1, StatusID=status_id,
+        IsPrimaryCompany=True, JoinedViaID=1
+    )
+
+
+def _form(form_id: int, company_id: int = OWNER) -> Form:
+    return Form(
+        FormID=form_id, FormName=f"Form {form_id}", CompanyID=company_id, FormStatusID=1,
+        FormApprovalStatusID=1, CreatedBy=1, TotalSubmissions=0, ProductionLeadsCollected=0,
+        DemoLeadsCollected=0
+    )
+
+
+def _grant(form_id: int, access_type: int, user_id: int = PARTNER_USER, company_id: int = PARTNER,
+           relationship_type: int = PARTNERSHIP, expiry=None) -> FormAccessControl:
+    return FormAccessControl(
+        FormID=form_id, UserID=user_id, CompanyID=company_id, FormAccessControlAccessTypeID=access_type,
+        CompanyRelationshipTypeID=relationship_type, GrantedBy=OWNER_USER, CreatedBy=OWNER_USER,
+        ExpiryDate=expiry
+    )
+
+
+def _relationship(parent_id: int = OWNER, child_id: int = PARTNER, type_id: int = PARTNERSHIP) -> CompanyRelationship:
+    return CompanyRelationship(
+        ParentCompanyID=parent_id, ChildCompanyID=child_id, RelationshipTypeID=type_id,
+        Status="active", EstablishedBy=OWNER_USER
+    )
+
+
+def _user(user_id: int, company_id: int) -> CurrentUser:
+    return CurrentUser(user_id=user_id, email=f"u{user_id}@example.com", role="company_user", company_id=company_id)
+
+
+def _target(form_id: int, company_id: int = OWNER) -> SubmissionTarget:
+    return SubmissionTarget(form_id=form_id, company_id=company_id, event_id=None, status_code="PUBLISHED",
+                            is_deleted=False)
+
+
+@pytest.fixture
+def db():
+    engine = _build_engine()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    session.add_all([
+        _membership(OWNER_USER, OWNER), _membership(PARTNER_USER, PARTNER),
+        _form(1), _form(2), _relationship(),
+    ])
+    session.commit()
+    form_access_cache.clear()
+    membership_cache.clear()
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+    form_access_cache.clear()
+    membership_cache.clear()
+
+
+def _materialized(db, user_id: int = PARTNER_USER):
+    return sorted(db.execute(
+        select(FormEffectiveAccess.FormID, FormEffectiveAccess.Permission, FormEffectiveAccess.ExpiryDate)
+        .where(FormEffectiveAccess.UserID == user_id)
+    ).all())
+
+
+class TestEffectiveRows:
+    """Folding grants into permission rows"""
+
+    def test_access_types_imply_lower_levels(self):
+        rows = effective_access_rows([(2, 1, "MANAGE", None), (2, 2, "ANALYZE", None), (2, 3, "SUBMIT", None)])
+        masks = {}
+        for row in rows:
+            masks[row["FormID"]] = masks.get(row["FormID"], 0) | row["Permission"]
+        assert masks == {1: FORM_MANAGE | FORM_EDIT | FORM_VIEW, 2: FORM_ANALYZE | FORM_VIEW, 3: FORM_SUBMIT}
+
+    def test_latest_expiry_wins_and_never_beats_all(self):
+        soon, later = datetime(2030, 1, 1), datetime(2031, 1, 1)
+        rows = effective_access_rows([
+            (2, 1, "VIEW", soon), (2, 1, "EDIT", later),
+            (2, 2, "SUBMIT", later), (2, 2, "SUBMIT", None), (2, 2, "SUBMIT", soon),
+        ])
+        expiries = {(r["FormID"], r["Permission"]): r["ExpiryDate"] for r in rows}
+        assert expiries == {(1, FORM_VIEW): later, (1, FORM_EDIT): later, (2, FORM_SUBMIT): None}
+
+    def test_unknown_access_type_confers_nothing(self):
+        assert effective_access_rows([(2, 1, "AUDIT", None)]) == []
+
+
+class TestMaterialization:
+    """Rows follow grants, memberships, relationships and forms"""
+
+    def test_grant_materialized_on_commit(self, db):
+        db.add(_grant(1, SUBMIT))
+        db.commit()
+
+        assert _materialized(db) == [(1, FORM_SUBMIT, None)]
+        access = get_form_access(db, PARTNER_USER)
+        assert access.allows(1, FORM_SUBMIT)
+        assert not access.allows(1, FORM_VIEW)
+        assert not access.allows(2, FORM_SUBMIT)
+
+    def test_grant_requires_relationship_of_its_type(self, db):
+        db.add(_grant(1, VIEW, relationship_type=BRANCH))
+        db.commit()
+        assert _materialized(db) == []
+
+        db.add(_relationship(parent_id=PARTNER, child_id=OWNER, type_id=BRANCH))
+        db.commit()
+        assert _materialized(db) == [(1, FORM_VIEW, None)]
+
+    def test_grant_for_own_company_needs_no_relationship(self, db):
+        db.add_all([_membership(5, OWNER), _grant(2, EDIT, user_id=5, company_id=OWNER)])
+        db.commit()
+        assert _materialized(db, 5) == [(2, FORM_VIEW, None), (2, FORM_EDIT, None)]
+
+    def test_relationship_termination_revokes(self, db):
+        db.add(_grant(1, SUBMIT))
+        db.commit()
+        assert get_form_access(db, PARTNER_USER).allows(1, FORM_SUBMIT)
+
+        relationship = db.scalars(select(CompanyRelationship)).one()
+        relationship.Status = "terminated"
+        db.commit()
+
+        assert _materialized(db) == []
+        assert not get_form_access(db, PARTNER_USER).allows(1, FORM_SUBMIT)
+
+    def test_membership_suspension_revokes(self, db):
+        db.add(_grant(1, SUBMIT))
+        db.commit()
+        assert get_form_access(db, PARTNER_USER).allows(1, FORM_SUBMIT)
+
+        membership = db.scalars(select(UserCompany).where(UserCompany.UserID == PARTNER_USER)).one()
+        membership.StatusID = SUSPENDED
+        db.commit()
+
+        assert not get_form_access(db, PARTNER_USER).allows(1, FORM_SUBMIT)
+
+    def test_form_deletion_revokes(self, db):
+        db.add(_grant(1, VIEW))
+        db.commit()
+
+        db.get(Form, 1).IsDeleted = True
+        db.commit()
+
+        assert _materialized(db) == []
+
+    def test_grant_deletion_revokes(self, db):
+        grant = _grant(1, VIEW)
+        db.add(grant)
+        db.commit()
+
+        grant.IsDeleted = True
+        db.commit()
+
+        assert _materialized(db) == []
+
+    def test_expired_grants_ignored_and_snapshot_expires_with_grant(self, db):
+        expiry = datetime.utcnow() + timedelta(hours=1)
+        db.add_all([_grant(1, VIEW, expiry=expiry), _grant(2, VIEW)])
+        db.commit()
+
+        access = get_form_access(db, PARTNER_USER)
+        assert access.form_ids() == {1, 2}
+        assert access.expires_at == expiry
+
+        # Rows whose grants have lapsed are skipped when loading
+        db.execute(update(FormEffectiveAccess).where(FormEffectiveAccess.FormID == 1)
+                   .values(ExpiryDate=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+        assert load_form_access(db, PARTNER_USER).form_ids() == {2}
+
+    def test_rollback_discards_pending_rebuild(self, db):
+        db.add(_grant(1, VIEW))
+        db.flush()
+        db.rollback()
+
+        db.add(_form(3))
+        db.commit()
+        assert _materialized(db) == []
+
+    def test_bulk_update_requires_explicit_refresh(self, db):
+        db.add(_grant(1, VIEW))
+        db.commit()
+        assert get_form_access(db, PARTNER_USER).allows(1, FORM_VIEW)
+
+        db.execute(update(FormAccessControl).values(IsDeleted=True))
+        db.commit()
+        assert get_form_access(db, PARTNER_USER).allows(1, FORM_VIEW)  # stale
+
+        db.execute(update(FormAccessControl).values(IsDeleted=True))
+        refresh_form_access_on_commit(db, user_ids=[PARTNER_USER])
+        db.commit()
+        assert not get_form_access(db, PARTNER_USER).allows(1, FORM_VIEW)
+
+    def test_rebuild_matches_incremental_maintenance(self, db):
+        db.add_all([_grant(1, MANAGE), _grant(2, ANALYZE)])
+        db.commit()
+        incremental = _materialized(db)
+
+        assert rebuild_form_access(db) == len(incremental)
+        assert _materialized(db) == incremental
+
+
+class TestAuthorization:
+    """O(1) checks on form endpoints"""
+
+    def test_owner_needs_no_query(self, db):
+        snapshot = load_membership_snapshot(db, OWNER_USER)
+        db.info["statements"].clear()
+
+        require_form_access(db, _user(OWNER_USER, OWNER), _target(1), snapshot, FORM_MANAGE)
+        assert db.info["statements"] == []
+
+    def test_grant_checks_cached(self, db):
+        db.add(_grant(1, SUBMIT))
+        db.commit()
+        snapshot = load_membership_snapshot(db, PARTNER_USER)
+        user = _user(PARTNER_USER, PARTNER)
+
+        db.info["statements"].clear()
+        require_form_access(db, user, _target(1), snapshot, FORM_SUBMIT)
+        require_form_access(db, user, _target(1), snapshot, FORM_SUBMIT)
+        assert len(db.info["statements"]) == 1
+
+        with pytest.raises(HTTPException) as exc_info:
+            require_form_access(db, user, _target(1), snapshot, FORM_EDIT)
+        assert exc_info.value.status_code == 403
+        with pytest.raises(HTTPException):
+            require_form_access(db, user, _target(2), snapshot, FORM_SUBMIT)
+        assert len(db.info["statements"]) == 1
+
+    def test_stale_load_not_stored_after_invalidation(self):
+        cache = FormAccessCache()
+        generation = cache.generation()
+        cache.invalidate([PARTNER_USER])
+        cache.set(FormAccess(user_id=PARTNER_USER, permissions={1: FORM_VIEW}), generation)
+        assert cache.get(PARTNER_USER) is None
+
+        cache.set(FormAccess(user_id=PARTNER_USER, permissions={1: FORM_VIEW}), cache.generation())
+        assert cache.get(PARTNER_USER).allows(1, FORM_VIEW)
+
+    def test_snapshot_dropped_at_grant_expiry(self):
+        cache = FormAccessCache()
+        cache.set(FormAccess(user_id=PARTNER_USER, permissions={1: FORM_VIEW},
+                             expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        assert cache.get(PARTNER_USER) is None
+
+
+class TestSubmitRoute:
+    """POST /api/forms/{form_id}/submissions with grants"""
+
+    @pytest.fixture
+    def url(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'access.db'}"
+        engine = _build_engine(url, TABLES + [FormStatus.__table__, FormSubmission.__table__])
+        with Session(bind=engine) as session:
+            session.add(FormStatus(FormStatusID=1, StatusCode="PUBLISHED", StatusName="Published", CreatedBy=1))
+            session.add_all([
+                _membership(OWNER_USER, OWNER), _membership(PARTNER_USER, PARTNER),
+                _form(1), _form(2), _relationship(),
+            ])
+            session.flush()
+            session.add_all([_grant(1, SUBMIT), _grant(2, VIEW)])
+            session.commit()
+        engine.dispose()
+        form_access_cache.clear()
+        submission_target_cache.clear()
+        yield url
+        form_access_cache.clear()
+        submission_target_cache.clear()
+
+    def test_submit_grant_required(self, url):
+        with route_client(router, url, _user(PARTNER_USER, PARTNER)) as client:
+            assert client.post("/api/forms/1/submissions", json={"data": {"n": 1}}).status_code == 202
+            assert client.post("/api/forms/2/submissions", json={"data": {"n": 2}}).status_code == 403
+
+        engine = sqlite_engine(url=url)
+        with Session(bind=engine) as session:
+            assert session.scalars(select(FormSubmission.FormID)).all() == [1]
+        engine.dispose()
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(forms: int = 2000, users: int = 2000, grants_per_user: int = 20, checks: int = 20000) -> dict:
+    """
+    Time per-request grant evaluation against the materialized, cached check.
+
+    Returns:
+        Dict with per-check latencies (microseconds) and rows materialized
+    """
+    import random
+
+    engine = _build_engine()
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(CompanyRelationship.__table__.insert(), [
+            {"ParentCompanyID": OWNER, "ChildCompanyID": PARTNER, "RelationshipTypeID": PARTNERSHIP,
+             "Status": "active", "EstablishedBy": 1},
+        ])
+        conn.execute(Form.__table__.insert(), [
+            {"FormID": i, "FormName": f"Form {i}", "CompanyID": OWNER, "FormStatusID": 1,
+             "FormApprovalStatusID": 1, "CreatedBy": 1, "TotalSubmissions": 0,
+             "ProductionLeadsCollected": 0, "DemoLeadsCollected": 0, "IsDeleted": False}
+            for i in range(1, forms + 1)
+        ])
+        conn.execute(UserCompany.__table__.insert(), [
+            {"UserID": u, "CompanyID": PARTNER, "UserCompanyRoleID": 1, "StatusID": ACTIVE,
+             "IsPrimaryCompany": True, "JoinedViaID": 1, "IsDeleted": False}
+            for u in range(100, 100 + users)
+        ])
+        conn.execute(FormAccessControl.__table__.insert(), [
+            {"FormID": rng.randint(1, forms), "UserID": u, "CompanyID": PARTNER,
+             "FormAccessControlAccessTypeID": rng.randint(1, 5), "CompanyRelationshipTypeID": PARTNERSHIP,
+             "GrantedBy": 1, "CreatedBy": 1, "IsDeleted": False}
+            for u in range(100, 100 + users) for _ in range(grants_per_user)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+    session = Session(bind=engine)
+    form_access_cache.clear()
+    rebuilt = rebuild_form_access(session)
+    probes = [(rng.randrange(100, 100 + users), rng.randint(1, forms)) for _ in range(checks)]
+
+    # Baseline: evaluate the user's grants on the form per request
+    started = time.perf_counter()
+    for user_id, form_id in probes:
+        statement = _effective_grants_statement([user_id], datetime.utcnow()).where(FormAccessControl.FormID == form_id)
+        session.execute(statement).all()
+    naive_us = (time.perf_counter() - started) / checks * 1e6
+
+    started = time.perf_counter()
+    for user_id, form_id in probes:
+        get_form_access(session, user_id).allows(form_id, FORM_VIEW)
+    cached_us = (time.perf_counter() - started) / checks * 1e6
+
+    session.close()
+    engine.dispose()
+    form_access_cache.clear()
+    return {"rows": rebuilt, "naive_us": naive_us, "cached_us": cached_us}
+
+
+@pytest.mark.slow
+def test_benchmark_cached_checks_faster():
+    result = run_benchmark(forms=500, users=200, grants_per_user=10, checks=5000)
+    assert result["cached_us"] < result["naive_us"]
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print(f"Materialized {result['rows']} permission rows")
+    print(f"Per-request join:  {result['naive_us']:8.1f} us/check")
+    print(f"Cached snapshot:   {result['cached_us']:8.1f} us/check")
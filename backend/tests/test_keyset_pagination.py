@@ -0,0 +1,165 @@
+"""
+Keyset (Cursor) Pagination Tests
+
+Covers schemas.base pagination helpers:
+- encode_cursor() / decode_cursor() round-trip and validation
+- apply_keyset() paging over (CreatedDate, ID) with duplicate timestamps
+- CursorPage.from_rows() next-cursor handling
+- TotalCountCache TTL and prefix invalidation
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from schemas.base import (
+    encode_cursor, decode_cursor, apply_keyset, CursorPage, TotalCountCache
+)
+
+
+metadata = MetaData()
+log_rows = Table(
+    "LogRow",
+    metadata,
+    Column("LogRowID", Integer, primary_key=True),
+    Column("Path", String(50)),
+    Column("CreatedDate", DateTime, nullable=False),
+)
+
+
+@pytest.fixture
+def engine():
+    """In-memory table with 25 rows; timestamps repeat in groups of 3"""
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    with engine.begin() as conn:
+        conn.execute(log_rows.insert(), [
+            {"LogRowID": i, "Path": f"/api/{i}", "CreatedDate": base + timedelta(seconds=i // 3)}
+            for i in range(1, 26)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def _fetch_all_pages(engine, limit, descending=True):
+    """Walk every page via next_cursor and return the IDs in order"""
+    columns = [log_rows.c.CreatedDate, log_rows.c.LogRowID]
+    seen, cursor, pages = [], None, 0
+    while True:
+        stmt = apply_keyset(select(log_rows), columns, cursor, limit, descending)
+        with engine.connect() as conn:
+            rows = conn.execute(stmt).mappings().all()
+        page = CursorPage.from_rows(rows, limit, key=lambda r: (r["CreatedDate"], r["LogRowID"]))
+        seen.extend(row["LogRowID"] for row in page.items)
+        pages += 1
+        if not page.has_more:
+            return seen, pages
+        cursor = page.next_cursor
+
+
+class TestCursorEncoding:
+    """encode_cursor / decode_cursor"""
+
+    def test_round_trip_with_datetime(self):
+        values = (datetime(2025, 3, 4, 5, 6, 7, 123456), 42)
+        assert decode_cursor(encode_cursor(values)) == values
+
+    def test_round_trip_with_decimal(self):
+        values = (Decimal("12.50"), "abc")
+        assert decode_cursor(encode_cursor(values)) == values
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor((datetime(2025, 1, 1), 99999))
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    def test_garbage_cursor_raises(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor!!")
+
+    def test_wrong_length_raises(self):
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor((1,)), expected_length=2)
+
+
+class TestApplyKeyset:
+    """apply_keyset paging"""
+
+    def test_descending_pages_cover_all_rows_once(self, engine):
+        ids, pages = _fetch_all_pages(engine, limit=4)
+        assert ids == list(range(25, 0, -1))
+        assert pages == 7
+
+    def test_ascending_pages_cover_all_rows_once(self, engine):
+        ids, _ = _fetch_all_pages(engine, limit=10, descending=False)
+        assert ids == list(range(1, 26))
+
+    def test_exact_multiple_has_no_empty_trailing_page(self, engine):
+        ids, pages = _fetch_all_pages(engine, limit=5)
+        assert len(ids) == 25
+        assert pages == 5
+
+    def test_invalid_cursor_rejected(self):
+        with pytest.raises(ValueError):
+            apply_keyset(select(log_rows), [log_rows.c.CreatedDate, log_rows.c.LogRowID], "bad", 10)
+
+
+class TestCursorPage:
+    """CursorPage.from_rows"""
+
+    def test_last_page_has_no_cursor(self):
+        page = CursorPage.from_rows([{"id": 1}, {"id": 2}], limit=5, key=lambda r: (r["id"],))
+        assert page.next_cursor is None
+        assert page.has_more is False
+
+    def test_transform_and_total(self):
+        page = CursorPage.from_rows(
+            [{"id": 3}, {"id": 2}, {"id": 1}], limit=2, key=lambda r: (r["id"],),
+            transform=lambda r: r["id"], total=3, total_is_estimate=True
+        )
+        assert page.items == [3, 2]
+        assert decode_cursor(page.next_cursor) == (2,)
+        assert page.total == 3
+        assert page.total_is_estimate is True
+
+
+class TestTotalCountCache:
+    """TotalCountCache"""
+
+    def test_get_or_compute_caches(self):
+        cache = TotalCountCache(ttl_seconds=60)
+        calls = []
+        compute = lambda: calls.append(1) or 10
+        assert cache.get_or_compute(("k",), compute) == (10, False)
+        assert cache.get_or_compute(("k",), compute) == (10, True)
+        assert len(calls) == 1
+
+    def test_expired_entries_recomputed(self):
+        cache = TotalCountCache(ttl_seconds=0)
+        cache.set("k", 5)
+        assert cache.get("k") is None
+
+    def test_invalidate_prefix(self):
+        cache = TotalCountCache()
+        cache.set(("invitations", 1, None), 3)
+        cache.set(("invitations", 1, "pending"), 2)
+        cache.set(("invitations", 2, None), 7)
+        cache.invalidate_prefix(("invitations", 1))
+        assert cache.get(("invitations", 1, None)) is None
+        assert cache.get(("invitations", 1, "pending")) is None
+        assert cache.get(("invitations", 2, None)) == 7
+
+    def test_eviction_when_full(self):
+        cache = TotalCountCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        assert cache.get("a") is None
+        assert cache.get("c") == 3
@@ -0,0 +1,364 @@
+"""
+Lead Export Tests and Memory Benchmark
+
+Covers modules.exports:
+- Tenant-scoped export query (filter_by_company) with event/form/demo filters
+- Incremental CSV / XLSX / Parquet encoding
+- Background jobs: atomic claim, file written whole, stale reclaim, purge
+- Export routes: size limit, job queue, poll and download, tenant check
+
+The benchmark streams CSV exports of increasing size and reports peak
+Python memory, which must stay flat as the row count grows:
+
+    python -m tests.test_lead_exports
+"""
+import csv
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company import Company
+from models.event import Event
+from models.form import Form
+from models.form_submission import FormSubmission
+from models.lead_export_job import LeadExportJob
+from modules.auth.models import CurrentUser
+from modules.exports import encoders
+from modules.exports import export_service
+from modules.exports.export_service import (
+    JOB_COMPLETED,
+    JOB_PENDING,
+    JOB_RUNNING,
+    LeadExportFilter,
+    LeadExportWorker,
+    claim_export_job,
+    count_export_rows,
+    create_export_job,
+    iter_lead_export,
+    purge_expired_exports,
+    run_export_job,
+)
+from tests.sqlite_support import MEMORY_URL, route_client, sqlite_engine
+
+
+COMPANY_ID, OTHER_COMPANY_ID = 10, 20
+EVENT_ID = 100
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+# The package re-exports `router`, shadowing the submodule attribute
+exports_router = importlib.import_module("modules.exports.router")
+
+
+def _build_engine(url: str = MEMORY_URL):
+    engine = sqlite_engine([
+        Company.__table__, Event.__table__, Form.__table__, FormSubmission.__table__, LeadExportJob.__table__,
+    ], url)
+    with engine.begin() as conn:
+        conn.execute(Company.__table__.insert(), [
+            {"CompanyID": COMPANY_ID, "CompanyName": "Expo Co", "CountryID": 1},
+            {"CompanyID": OTHER_COMPANY_ID, "CompanyName": "Other Co", "CountryID": 1},
+        ])
+        conn.execute(Event.__table__.insert(), [{
+            "EventID": EVENT_ID, "Name": "Expo", "CompanyID": COMPANY_ID, "CreatedBy": 1,
+            "StartDateTime": datetime(2025, 3, 1), "EventTypeID": 1, "EventStatusID": 3,
+        }])
+        conn.execute(Form.__table__.insert(), [
+            {"FormID": 1, "FormName": "Booth", "CompanyID": COMPANY_ID, "EventID": EVENT_ID,
+             "FormStatusID": 3, "FormApprovalStatusID": 1, "CreatedBy": 1},
+            {"FormID": 2, "FormName": "Web", "CompanyID": COMPANY_ID, "EventID": None,
+             "FormStatusID": 3, "FormApprovalStatusID": 1, "CreatedBy": 1},
+            {"FormID": 3, "FormName": "Theirs", "CompanyID": OTHER_COMPANY_ID, "EventID": None,
+             "FormStatusID": 3, "FormApprovalStatusID": 1, "CreatedBy": 1},
+        ])
+    return engine
+
+
+def _seed(db: Session, count: int, form_id: int = 1, company_id: int = COMPANY_ID,
+          event_id=EVENT_ID, is_demo: bool = False, data=None) -> None:
+    start = datetime(2025, 3, 1, 9)
+    db.execute(FormSubmission.__table__.insert(), [{
+        "FormID": form_id, "CompanyID": company_id, "EventID": event_id, "IsDemo": is_demo,
+        "SubmissionData": json.dumps(data if data is not None else {"email": f"lead{n}@example.com", "n": n}),
+        "SubmittedDate": start + timedelta(seconds=n), "ReceivedDate": start + timedelta(seconds=n),
+    } for n in range(count)])
+    db.commit()
+
+
+@pytest.fixture
+def engine():
+    engine = _build_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+def _csv(db, export):
+    body = b"".join(iter_lead_export(db, export, "csv")).decode("utf-8-sig")
+    return list(csv.reader(io.StringIO(body)))
+
+
+class TestQuery:
+    """Export scope"""
+
+    def test_tenant_and_filters(self, db):
+        _seed(db, 3)
+        _seed(db, 2, form_id=2, event_id=None)
+        _seed(db, 4, is_demo=True)
+        _seed(db, 5, form_id=3, company_id=OTHER_COMPANY_ID, event_id=None)
+
+        assert count_export_rows(db, LeadExportFilter(COMPANY_ID)) == 5
+        assert count_export_rows(db, LeadExportFilter(COMPANY_ID, include_demo=True)) == 9
+        assert count_export_rows(db, LeadExportFilter(COMPANY_ID, event_id=EVENT_ID)) == 3
+        assert count_export_rows(db, LeadExportFilter(COMPANY_ID, form_id=2)) == 2
+        # Another company's form ID yields nothing
+        assert count_export_rows(db, LeadExportFilter(COMPANY_ID, form_id=3)) == 0
+        assert len(_csv(db, LeadExportFilter(OTHER_COMPANY_ID))) == 6
+
+    def test_missing_company_context_rejected(self, db):
+        from fastapi import HTTPException
+        with pytest.raises(HTTPException):
+            count_export_rows(db, LeadExportFilter(None))
+
+
+class TestCsv:
+    """CSV layout"""
+
+    def test_header_and_rows(self, db):
+        _seed(db, 2)
+        rows = _csv(db, LeadExportFilter(COMPANY_ID))
+        assert rows[0] == export_service.LEAD_EXPORT_COLUMNS + ["email", "n", "OtherAnswers"]
+        assert rows[1][4:8] == ["Booth", str(EVENT_ID), "Expo", "false"]
+        assert rows[1][8:] == ["lead0@example.com", "0", ""]
+
+    def test_late_answer_keys_go_to_other_answers(self, db, monkeypatch):
+        monkeypatch.setattr(export_service, "EXPORT_HEADER_SAMPLE_ROWS", 1)
+        _seed(db, 1, data={"email": "a@example.com"})
+        _seed(db, 1, data={"email": "b@example.com", "phone": "0400", "tags": ["vip"]})
+        rows = _csv(db, LeadExportFilter(COMPANY_ID))
+        assert rows[0][-2:] == ["email", "OtherAnswers"]
+        assert json.loads(rows[2][-1]) == {"phone": "0400", "tags": ["vip"]}
+
+    def test_formula_cells_neutralized(self, db):
+        _seed(db, 1, data={"company": "=HYPERLINK(\"http://x\")"})
+        assert _csv(db, LeadExportFilter(COMPANY_ID))[1][8] == "'=HYPERLINK(\"http://x\")"
+
+    def test_encoding_is_incremental(self, monkeypatch):
+        monkeypatch.setattr(encoders, "FLUSH_BYTES", 1024)
+        consumed = []
+
+        def _rows():
+            for n in range(1000):
+                consumed.append(n)
+                yield [n, "x" * 20]
+
+        chunks = encoders.encode_csv(["n", "x"], _rows())
+        next(chunks)
+        assert len(consumed) < 100
+
+
+class TestXlsx:
+    """XLSX layout"""
+
+    def _sheets(self, body: bytes):
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        assert archive.testzip() is None
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        names = [s.get("name") for s in workbook.iter("{%s}sheet" % SHEET_NS["s"])]
+        return names, [
+            ElementTree.fromstring(archive.read(f"xl/worksheets/sheet{n}.xml")).findall(".//s:row", SHEET_NS)
+            for n in range(1, len(names) + 1)
+        ]
+
+    def test_workbook(self, db):
+        _seed(db, 3, data={"note": "a < b & \x01c"})
+        names, sheets = self._sheets(b"".join(iter_lead_export(db, LeadExportFilter(COMPANY_ID), "xlsx")))
+        assert names == ["Leads"]
+        rows = sheets[0]
+        assert len(rows) == 4
+        assert rows[1].findall("s:c", SHEET_NS)[8].find(".//s:t", SHEET_NS).text == "a < b & c"
+
+    def test_sheet_rollover(self, db, monkeypatch):
+        monkeypatch.setattr(encoders, "XLSX_MAX_ROWS_PER_SHEET", 3)
+        _seed(db, 5)
+        names, sheets = self._sheets(b"".join(iter_lead_export(db, LeadExportFilter(COMPANY_ID), "xlsx")))
+        assert names == ["Leads", "Leads 2", "Leads 3"]
+        assert [len(rows) - 1 for rows in sheets] == [2, 2, 1]
+
+    def test_empty_export(self, db):
+        names, sheets = self._sheets(b"".join(iter_lead_export(db, LeadExportFilter(COMPANY_ID), "xlsx")))
+        assert names == ["Leads"] and len(sheets[0]) == 1
+
+
+def test_parquet(db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _seed(db, 3)
+    table = pq.read_table(io.BytesIO(b"".join(iter_lead_export(db, LeadExportFilter(COMPANY_ID), "parquet"))))
+    assert table.num_rows == 3
+    assert table.column("email").to_pylist()[0] == "lead0@example.com"
+
+
+class TestJobs:
+    """Background exports"""
+
+    def test_run_job(self, db, tmp_path):
+        _seed(db, 25)
+        job = create_export_job(db, LeadExportFilter(COMPANY_ID), "csv", user_id=7)
+
+        assert claim_export_job(db) == job.LeadExportJobID
+        assert claim_export_job(db) is None  # already claimed
+
+        job = run_export_job(db, job.LeadExportJobID, str(tmp_path))
+        assert job.Status == JOB_COMPLETED
+        assert job.RowCount == 25
+        assert os.path.getsize(job.FilePath) == job.FileSize
+        assert not os.path.exists(job.FilePath + ".part")
+        assert job.FilePath.startswith(str(tmp_path / str(COMPANY_ID)))
+
+    def test_failed_job(self, db, tmp_path, monkeypatch):
+        _seed(db, 1)
+        job = create_export_job(db, LeadExportFilter(COMPANY_ID), "csv", user_id=7)
+        claim_export_job(db)
+
+        def _broken(rows, fmt):
+            raise RuntimeError("disk full")
+            yield b""
+
+        monkeypatch.setattr(export_service, "encode_leads", _broken)
+        job = run_export_job(db, job.LeadExportJobID, str(tmp_path))
+        assert (job.Status, job.ErrorMessage) == ("FAILED", "disk full")
+        assert os.listdir(tmp_path / str(COMPANY_ID)) == []
+
+    def test_stale_running_job_reclaimed(self, db):
+        job = create_export_job(db, LeadExportFilter(COMPANY_ID), "csv", user_id=7)
+        claim_export_job(db)
+        job.StartedDate = datetime.utcnow() - timedelta(minutes=export_service.EXPORT_JOB_STALE_MINUTES + 1)
+        db.commit()
+        assert claim_export_job(db) == job.LeadExportJobID
+        assert db.get(LeadExportJob, job.LeadExportJobID).Status == JOB_RUNNING
+
+    def test_worker_and_purge(self, engine, tmp_path):
+        factory = sessionmaker(bind=engine)
+        with factory() as db:
+            _seed(db, 3)
+            job_id = create_export_job(db, LeadExportFilter(COMPANY_ID), "xlsx", user_id=7).LeadExportJobID
+
+        worker = LeadExportWorker(session_factory=factory, storage_dir=str(tmp_path), threads=1)
+        assert worker.run_once() == job_id
+        assert worker.run_once() is None
+
+        with factory() as db:
+            path = db.get(LeadExportJob, job_id).FilePath
+            assert os.path.exists(path)
+            assert purge_expired_exports(db, datetime.utcnow() + timedelta(days=2)) == 1
+            assert not os.path.exists(path)
+            assert db.get(LeadExportJob, job_id) is None
+
+
+class TestRoutes:
+    """/api/exports/leads"""
+
+    @pytest.fixture
+    def url(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'exports.db'}"
+        engine = _build_engine(url)
+        with Session(bind=engine) as db:
+            _seed(db, 3)
+        engine.dispose()
+        return url
+
+    def _user(self, company_id: int = COMPANY_ID) -> CurrentUser:
+        return CurrentUser(user_id=7, email="admin@example.com", role="company_admin", company_id=company_id)
+
+    def test_stream_limits(self, url, monkeypatch):
+        monkeypatch.setattr(exports_router, "EXPORT_STREAM_MAX_ROWS", 2)
+        with route_client(exports_router.router, url, self._user()) as client:
+            assert client.get("/api/exports/leads", params={"company_id": COMPANY_ID}).status_code == 413
+            response = client.get("/api/exports/leads", params={"company_id": COMPANY_ID, "format": "xml"})
+            assert response.status_code == 400
+            assert client.get("/api/exports/leads", params={"company_id": OTHER_COMPANY_ID}).status_code == 403
+
+    def test_job_queued_polled_and_downloaded(self, url, tmp_path):
+        with route_client(exports_router.router, url, self._user()) as client:
+            response = client.post("/api/exports/leads/jobs", json={"company_id": COMPANY_ID})
+            assert response.status_code == 202
+            job = response.json()
+            assert (job["status"], job["download_url"]) == (JOB_PENDING, None)
+            assert client.get(f"/api/exports/leads/jobs/{job['job_id']}/download").status_code == 409
+
+            engine = sqlite_engine(url=url)
+            with Session(bind=engine) as db:
+                run_export_job(db, claim_export_job(db), str(tmp_path / "files"))
+            engine.dispose()
+
+            job = client.get(f"/api/exports/leads/jobs/{job['job_id']}").json()
+            assert (job["status"], job["row_count"]) == (JOB_COMPLETED, 3)
+            response = client.get(job["download_url"])
+            assert response.status_code == 200
+            assert len(list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))) == 4
+
+        with route_client(exports_router.router, url, self._user(OTHER_COMPANY_ID)) as client:
+            assert client.get(f"/api/exports/leads/jobs/{job['job_id']}").status_code == 403
+
+
+# ============================================================================
+# Memory benchmark
+# ============================================================================
+
+BENCHMARK_ROW_COUNTS = [int(n) for n in os.getenv("EXPORT_BENCHMARK_ROWS", "20000,200000").split(",")]
+
+
+def run_benchmark(row_counts=BENCHMARK_ROW_COUNTS, fmt: str = "csv") -> list:
+    """Peak traced memory while streaming exports of increasing size"""
+    results = []
+    for count in row_counts:
+        engine = _build_engine()
+        with Session(bind=engine) as db:
+            for start in range(0, count, 50000):
+                _seed(db, min(50000, count - start))
+
+            tracemalloc.start()
+            began = time.perf_counter()
+            size = sum(len(chunk) for chunk in iter_lead_export(db, LeadExportFilter(COMPANY_ID), fmt))
+            elapsed = time.perf_counter() - began
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        engine.dispose()
+        results.append({"rows": count, "bytes": size, "seconds": elapsed, "peak_bytes": peak})
+    return results
+
+
+@pytest.mark.slow
+def test_export_memory_is_bounded():
+    """Peak memory does not grow with the number of exported rows"""
+    small, large = run_benchmark([5000, 50000])
+    assert large["bytes"] > 9 * small["bytes"]
+    assert large["peak_bytes"] < 2 * small["peak_bytes"]
+
+
+if __name__ == "__main__":
+    for fmt in ("csv", "xlsx"):
+        for r in run_benchmark(fmt=fmt):
+            print(
+                f"{fmt:>4} {r['rows']:>8,} rows: {r['bytes'] / 1e6:7.1f} MB in {r['seconds']:.2f}s "
+                f"({r['rows'] / r['seconds']:,.0f} rows/s), peak memory {r['peak_bytes'] / 1e6:.1f} MB"
+            )
@@ -0,0 +1,318 @@
+"""
+Lead Submission Ingestion Tests and Load Test
+
+Covers modules.forms.submission_service:
+- Lead validation (form status, demo mode, payload size, device clock skew)
+- Fixed statement count per request: one submission INSERT batch plus one
+  outbox INSERT batch, no UPDATE on dbo.Form
+- Form counters folded from the outbox as aggregated UPDATEs
+- Submission target cache hits and invalidation on form changes
+- The submit routes end to end (async session, access check, receipt)
+
+The load test drives concurrent "tablets" against a file-backed SQLite
+database and compares batched ingestion with a naive per-lead INSERT plus
+Form counter UPDATE. It only runs under pytest with RUN_BENCHMARKS=1; run the
+module directly for throughput output:
+
+    python -m tests.test_lead_ingestion
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company import Company
+from models.event import Event
+from models.form import Form
+from models.form_effective_access import FormEffectiveAccess
+from models.form_submission import FormSubmission
+from models.kpi_rollup import CompanyKpiRollup, EventKpiRollup, CompanyDailyKpiRollup, KpiOutbox
+from models.ref.form_status import FormStatus
+from modules.auth.models import CurrentUser
+from modules.dashboard.kpi_service import drain_kpi_outbox
+from modules.forms.router import router
+from modules.forms.schemas import LeadSubmissionRequest
+from modules.forms.submission_service import (
+    MAX_SUBMISSION_DATA_BYTES,
+    build_submission_rows,
+    get_submission_target,
+    ingest_submissions,
+    load_submission_target,
+    submission_target_cache,
+)
+from tests.sqlite_support import MEMORY_URL, route_client, sqlite_engine
+
+
+DRAFT, PUBLISHED = 1, 3
+COMPANY_ID, EVENT_ID = 10, 100
+
+TABLES = [
+    FormStatus.__table__, Company.__table__, Event.__table__, Form.__table__,
+    FormSubmission.__table__, CompanyKpiRollup.__table__, EventKpiRollup.__table__,
+    CompanyDailyKpiRollup.__table__, KpiOutbox.__table__, FormEffectiveAccess.__table__,
+]
+
+
+def _build_engine(url: str = MEMORY_URL, **kwargs):
+    engine = sqlite_engine(TABLES, url, **kwargs)
+    with engine.begin() as conn:
+        conn.execute(FormStatus.__table__.insert(), [
+            {"FormStatusID": DRAFT, "StatusCode": "DRAFT", "StatusName": "Draft", "CreatedBy": 1},
+            {"FormStatusID": PUBLISHED, "StatusCode": "PUBLISHED", "StatusName": "Published", "CreatedBy": 1},
+        ])
+        conn.execute(Company.__table__.insert(), [{"CompanyID": COMPANY_ID, "CompanyName": "Expo Co", "CountryID": 1}])
+        conn.execute(Event.__table__.insert(), [{
+            "EventID": EVENT_ID, "Name": "Expo", "CompanyID": COMPANY_ID, "CreatedBy": 1,
+            "StartDateTime": datetime(2025, 3, 1), "EventTypeID": 1, "EventStatusID": 3,
+            "FormsCreated": 0, "TotalSubmissions": 0,
+        }])
+        conn.execute(Form.__table__.insert(), [
+            {"FormID": 1, "FormName": "Booth", "CompanyID": COMPANY_ID, "EventID": EVENT_ID,
+             "FormStatusID": PUBLISHED, "FormApprovalStatusID": 1, "CreatedBy": 1,
+             "TotalSubmissions": 0, "ProductionLeadsCollected": 0, "DemoLeadsCollected": 0},
+            {"FormID": 2, "FormName": "Draft", "CompanyID": COMPANY_ID, "EventID": None,
+             "FormStatusID": DRAFT, "FormApprovalStatusID": 1, "CreatedBy": 1,
+             "TotalSubmissions": 0, "ProductionLeadsCollected": 0, "DemoLeadsCollected": 0},
+        ])
+    return engine
+
+
+@pytest.fixture
+def db():
+    engine = _build_engine()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    submission_target_cache.clear()
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+    submission_target_cache.clear()
+
+
+def _lead(n: int, **kwargs) -> LeadSubmissionRequest:
+    return LeadSubmissionRequest(data={"email": f"lead{n}@example.com", "n": n}, **kwargs)
+
+
+class TestBuildRows:
+    """Lead validation"""
+
+    def test_draft_form_accepts_demo_only(self, db):
+        target = load_submission_target(db, 2)
+        now = datetime(2025, 3, 1, 9)
+        assert build_submission_rows(target, [_lead(1, is_demo=True)], 7, now)[0]["IsDemo"] is True
+        with pytest.raises(ValueError):
+            build_submission_rows(target, [_lead(1)], 7, now)
+
+    def test_payload_size_limit(self, db):
+        target = load_submission_target(db, 1)
+        big = LeadSubmissionRequest(data={"notes": "x" * MAX_SUBMISSION_DATA_BYTES})
+        with pytest.raises(ValueError):
+            build_submission_rows(target, [big], None, datetime.utcnow())
+
+    def test_submitted_at_normalized(self, db):
+        target = load_submission_target(db, 1)
+        now = datetime(2025, 3, 1, 9)
+        rows = build_submission_rows(target, [
+            _lead(1, submitted_at=datetime(2025, 3, 1, 19, 0, tzinfo=timezone(timedelta(hours=11)))),
+            _lead(2, submitted_at=now + timedelta(hours=2)),  # device clock ahead
+            _lead(3),
+        ], None, now)
+        assert [r["SubmittedDate"] for r in rows] == [datetime(2025, 3, 1, 8), now, now]
+        assert rows[0]["CompanyID"] == COMPANY_ID and rows[0]["EventID"] == EVENT_ID
+
+
+class TestIngestion:
+    """Write path"""
+
+    def test_batch_is_two_inserts_and_no_form_update(self, db):
+        target = get_submission_target(db, 1)
+        db.info["statements"].clear()
+
+        receipt = ingest_submissions(db, target, [_lead(n) for n in range(50)], user_id=7)
+        assert receipt.accepted == 50
+        statements = db.info["statements"]
+        assert len(statements) == 2
+        assert all(s.startswith("INSERT") for s in statements)
+        assert db.query(FormSubmission).count() == 50
+
+    def test_counters_folded_from_outbox(self, db):
+        target = get_submission_target(db, 1)
+        ingest_submissions(db, target, [_lead(n) for n in range(3)])
+        ingest_submissions(db, target, [_lead(9, is_demo=True, submitted_at=datetime(2030, 1, 1))])
+        assert db.get(Form, 1).TotalSubmissions == 0  # not folded yet
+
+        drain_kpi_outbox(db)
+        db.expire_all()
+        form = db.get(Form, 1)
+        assert (form.TotalSubmissions, form.ProductionLeadsCollected, form.DemoLeadsCollected) == (4, 3, 1)
+        assert form.LastSubmissionDate is not None
+        assert db.get(Event, EVENT_ID).TotalSubmissions == 4
+        assert db.get(CompanyKpiRollup, COMPANY_ID).ProductionLeads == 3
+
+    def test_rejected_batch_stores_nothing(self, db):
+        target = get_submission_target(db, 2)
+        with pytest.raises(ValueError):
+            ingest_submissions(db, target, [_lead(1, is_demo=True), _lead(2)])
+        assert db.query(FormSubmission).count() == 0
+        assert db.query(KpiOutbox).count() == 0
+
+
+class TestSubmissionTargetCache:
+    """Form lookup cache"""
+
+    def test_cache_hit_skips_query(self, db):
+        get_submission_target(db, 1)
+        db.info["statements"].clear()
+        assert get_submission_target(db, 1).status_code == "PUBLISHED"
+        assert db.info["statements"] == []
+
+    def test_form_pause_invalidates_on_commit(self, db):
+        assert get_submission_target(db, 1).accepts(is_demo=False)
+        db.get(Form, 1).FormStatusID = DRAFT
+        db.commit()
+        assert not get_submission_target(db, 1).accepts(is_demo=False)
+
+    def test_missing_form(self, db):
+        assert get_submission_target(db, 404) is None
+
+
+class TestSubmitRoutes:
+    """POST /api/forms/{form_id}/submissions[/batch]"""
+
+    @pytest.fixture
+    def url(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'leads.db'}"
+        _build_engine(url).dispose()
+        submission_target_cache.clear()
+        yield url
+        submission_target_cache.clear()
+
+    def _user(self, company_id: int = COMPANY_ID) -> CurrentUser:
+        return CurrentUser(user_id=7, email="booth@example.com", role="company_user", company_id=company_id)
+
+    def test_batch_stored_and_queued(self, url):
+        with route_client(router, url, self._user()) as client:
+            response = client.post("/api/forms/1/submissions/batch", json={
+                "submissions": [{"data": {"email": f"lead{n}@example.com"}} for n in range(3)]
+            })
+            assert response.status_code == 202
+            assert response.json()["accepted"] == 3
+            assert client.post("/api/forms/1/submissions", json={"data": {"n": 4}}).status_code == 202
+
+        engine = sqlite_engine(url=url)
+        with Session(bind=engine) as db:
+            assert db.query(FormSubmission).filter(FormSubmission.SubmittedBy == 7).count() == 4
+            assert db.query(KpiOutbox).count() == 2
+        engine.dispose()
+
+    def test_rejections(self, url):
+        with route_client(router, url, self._user()) as client:
+            assert client.post("/api/forms/2/submissions", json={"data": {}}).status_code == 400
+            assert client.post("/api/forms/404/submissions", json={"data": {}}).status_code == 404
+        with route_client(router, url, self._user(company_id=99)) as client:
+            assert client.post("/api/forms/1/submissions", json={"data": {}}).status_code == 403
+
+
+# ============================================================================
+# Load test
+# ============================================================================
+
+LOAD_TABLETS = int(os.getenv("LEAD_LOAD_TABLETS", "8"))
+LOAD_LEADS_PER_TABLET = int(os.getenv("LEAD_LOAD_LEADS_PER_TABLET", "1000"))
+LOAD_BATCH_SIZE = int(os.getenv("LEAD_LOAD_BATCH_SIZE", "25"))
+
+
+def _naive_submit(session_factory, leads):
+    """Baseline: one INSERT plus one Form counter UPDATE per lead"""
+    form = Form.__table__
+    for lead in leads:
+        with session_factory() as db:
+            db.execute(FormSubmission.__table__.insert(), [{
+                "FormID": 1, "CompanyID": COMPANY_ID, "EventID": EVENT_ID, "IsDemo": False,
+                "SubmissionData": "{}", "SubmittedDate": datetime.utcnow(),
+            }])
+            db.execute(
+                form.update().where(form.c.FormID == 1).values(
+                    TotalSubmissions=form.c.TotalSubmissions + 1,
+                    ProductionLeadsCollected=form.c.ProductionLeadsCollected + 1,
+                    LastSubmissionDate=datetime.utcnow(),
+                )
+            )
+            db.commit()
+
+
+def _batched_submit(session_factory, leads):
+    for start in range(0, len(leads), LOAD_BATCH_SIZE):
+        with session_factory() as db:
+            target = get_submission_target(db, 1)
+            ingest_submissions(db, target, leads[start:start + LOAD_BATCH_SIZE])
+
+
+def _run_tablets(session_factory, submit) -> float:
+    leads = [_lead(n) for n in range(LOAD_LEADS_PER_TABLET)]
+    threads = [threading.Thread(target=submit, args=(session_factory, leads)) for _ in range(LOAD_TABLETS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run_load_test() -> dict:
+    """Naive vs batched ingestion from concurrent tablets (file-backed SQLite)"""
+    results = {}
+    total = LOAD_TABLETS * LOAD_LEADS_PER_TABLET
+    for mode, submit in (("naive", _naive_submit), ("batched", _batched_submit)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = _build_engine(
+                f"sqlite:///{os.path.join(tmp, 'leads.db')}",
+                connect_args={"check_same_thread": False, "timeout": 60}
+            )
+            session_factory = sessionmaker(bind=engine)
+            submission_target_cache.clear()
+            elapsed = _run_tablets(session_factory, submit)
+
+            with session_factory() as db:
+                if mode == "batched":
+                    drain_kpi_outbox(db)
+                stored = db.scalar(select(Form.TotalSubmissions).where(Form.FormID == 1))
+            engine.dispose()
+        results[mode] = {"elapsed": elapsed, "per_second": total / elapsed, "counted": stored}
+    results["total"] = total
+    return results
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run benchmarks")
+def test_batched_ingestion_sustains_higher_throughput():
+    """Batched writes outpace per-lead INSERT + counter UPDATE and lose no counts"""
+    result = run_load_test()
+    assert result["naive"]["counted"] == result["batched"]["counted"] == result["total"]
+    assert result["batched"]["per_second"] > result["naive"]["per_second"]
+
+
+if __name__ == "__main__":
+    result = run_load_test()
+    for mode in ("naive", "batched"):
+        r = result[mode]
+        print(
+            f"{mode:>7}: {result['total']:,} leads from {LOAD_TABLETS} tablets in {r['elapsed']:.2f}s "
+            f"({r['per_second']:,.0f} leads/s)"
+        )
@@ -0,0 +1,431 @@
+"""
+Log Analyzer Tests and Benchmark
+
+Covers common.log_analyzer and its diagnostics endpoints:
+- Path normalization to the app's route templates (static routes first,
+  unmatched paths grouped) and to heuristic templates without routes
+- Error fingerprints stable across IDs, quoted values and line numbers
+- Incremental batches past the watermark adding up to the totals of a
+  single pass, with settle time, backfill window and concurrent-run guard
+- Reports and endpoints reading only the summary tables, system admins only
+
+The benchmark compares the previous ad hoc scans (every slow request and a
+GROUP BY over log.ApplicationError for the last 24 hours) with the summary
+reports, and times the analyzer itself. Run it directly:
+
+    python -m tests.test_log_analyzer
+"""
+import importlib
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.log_analyzer as log_analyzer_module
+from common.log_analyzer import (
+    API_REQUEST_SOURCE,
+    LogAnalyzerWorker,
+    RouteNormalizer,
+    analyze_batch,
+    analyzer_status,
+    error_fingerprint,
+    error_patterns,
+    get_watermark,
+    normalize_message,
+    normalize_path,
+    run_log_analyzer,
+    slowest_endpoints,
+    stack_location,
+)
+from middleware.metrics import UNMATCHED_ROUTE
+from models.log import ApiRequest, ApplicationError, EndpointSummary, ErrorPatternSummary, LogAnalyzerWatermark
+from modules.auth.dependencies import get_current_user
+from modules.auth.models import CurrentUser
+from tests.sqlite_support import sqlite_engine
+
+# The package re-exports `router` under the submodule's name
+diagnostics_router = importlib.import_module("modules.diagnostics.router")
+
+
+NOW = datetime(2026, 3, 10, 12, 30, 0)
+SLOW_MS = 1000
+ROUTES = [
+    "/api/companies/{company_id}/invitations",
+    "/api/companies/{company_id}",
+    "/api/events/{event_id}",
+    "/api/events/search",
+    "/api/forms/{form_id}/submissions",
+    "/api/health",
+]
+LOG_TABLES = [
+    ApiRequest.__table__, ApplicationError.__table__, EndpointSummary.__table__,
+    ErrorPatternSummary.__table__, LogAnalyzerWatermark.__table__,
+]
+
+
+def _engine():
+    return sqlite_engine(LOG_TABLES)
+
+
+@pytest.fixture
+def engine():
+    engine = _engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def normalizer():
+    return RouteNormalizer(ROUTES)
+
+
+def _request(db, path, duration_ms, created, status_code=200, request_id=None, method="GET"):
+    db.add(ApiRequest(
+        RequestID=request_id or f"req-{path}-{duration_ms}-{created.isoformat()}", Method=method, Path=path,
+        StatusCode=status_code, DurationMs=duration_ms, CreatedDate=created
+    ))
+
+
+def _error(db, message, created, path="/api/forms/7/submissions", request_id=None, line=10, error_type="ValueError"):
+    db.add(ApplicationError(
+        ErrorType=error_type, ErrorMessage=message, Severity="ERROR", RequestID=request_id, Path=path, Method="POST",
+        StackTrace=(
+            'Traceback (most recent call last):\n'
+            f'  File "/app/modules/forms/router.py", line 40, in submit\n'
+            f'  File "/app/modules/forms/service.py", line {line}, in save_lead\n'
+            f'{error_type}: {message}'
+        ),
+        CreatedDate=created,
+    ))
+
+
+def _run(db, normalizer, **kwargs):
+    kwargs.setdefault("slow_ms", SLOW_MS)
+    kwargs.setdefault("now", NOW)
+    return run_log_analyzer(db, normalizer, **kwargs)
+
+
+class TestNormalization:
+    """Route templates and error fingerprints"""
+
+    def test_route_templates(self, normalizer):
+        assert normalizer.template("/api/companies/42/invitations") == "/api/companies/{company_id}/invitations"
+        assert normalizer.template("/api/companies/42/invitations/?page=2") == "/api/companies/{company_id}/invitations"
+        assert normalizer.template("/api/companies/42") == "/api/companies/{company_id}"
+        # Static routes win over parametric ones
+        assert normalizer.template("/api/events/search") == "/api/events/search"
+        assert normalizer.template("/api/events/17") == "/api/events/{event_id}"
+        assert normalizer.template("/wp-login.php") == UNMATCHED_ROUTE
+
+    def test_heuristic_without_routes(self):
+        assert normalize_path("/api/companies/42/invitations?x=1") == "/api/companies/{id}/invitations"
+        assert normalize_path("/api/leads/550e8400-e29b-41d4-a716-446655440000/") == "/api/leads/{uuid}"
+        assert normalize_path("/api/verify/a1b2c3d4e5f6a7b8c9d0e1f2") == "/api/verify/{token}"
+        assert normalize_path("/api/users/bob@example.com") == "/api/users/{email}"
+        assert RouteNormalizer().template("/api/events/17") == "/api/events/{id}"
+        assert len(normalize_path("/segment" * 50)) == 200
+
+    def test_cache_is_bounded(self):
+        normalizer = RouteNormalizer(ROUTES, cache_size=3)
+        for i in range(10):
+            normalizer.template(f"/api/static-{i}")
+        assert len(normalizer._cache) == 3
+
+    def test_fingerprint_ignores_values(self):
+        first = normalize_message("Lead 42 not found for form 'spring-expo' (user a@b.co)\nTraceback ...")
+        second = normalize_message("Lead 7 not found for form 'autumn' (user c@d.org)")
+        assert first == second == "Lead {n} not found for form '{str}' (user {email})"
+        assert stack_location('File "/app/x/service.py", line 3, in outer\n  File "/app/x/db.py", line 9, in save') == "db.py:save"
+        assert stack_location("no frames") is None
+        assert error_fingerprint("ValueError", "/a", "db.py:save", first) != error_fingerprint("KeyError", "/a", "db.py:save", first)
+        assert len(error_fingerprint("ValueError", None, None, first)) == 32
+
+
+class TestAnalyzer:
+    """Incremental summaries"""
+
+    def test_endpoint_summary(self, db, normalizer):
+        for i, duration in enumerate([100, 1500, 3000]):
+            _request(db, f"/api/companies/{i}/invitations", duration, NOW - timedelta(minutes=20), request_id=f"r{i}")
+        _request(db, "/api/companies/9/invitations", 50, NOW - timedelta(minutes=10), status_code=503, method="POST")
+        _request(db, "/api/events/search", 10, NOW - timedelta(hours=2))
+        db.commit()
+
+        assert _run(db, normalizer) == {"ApiRequest": 5, "ApplicationError": 0}
+        rows = {(r.Method, r.PathTemplate, r.BucketStart): r for r in db.scalars(select(EndpointSummary))}
+        summary = rows[("GET", "/api/companies/{company_id}/invitations", datetime(2026, 3, 10, 12))]
+        assert (summary.RequestCount, summary.SlowCount, summary.ErrorCount) == (3, 2, 0)
+        assert (summary.TotalDurationMs, summary.MaxDurationMs, summary.SlowestRequestID) == (4600, 3000, "r2")
+        assert rows[("POST", "/api/companies/{company_id}/invitations", datetime(2026, 3, 10, 12))].ErrorCount == 1
+        assert ("GET", "/api/events/search", datetime(2026, 3, 10, 10)) in rows
+
+    def test_incremental_batches_match_single_pass(self, engine, normalizer):
+        def load(db):
+            for i in range(120):
+                _request(db, f"/api/events/{i % 7}", (i * 37) % 2500, NOW - timedelta(minutes=200 - i), request_id=f"r{i}")
+                if i % 4 == 0:
+                    _error(db, f"Lead {i} not found", NOW - timedelta(minutes=200 - i), request_id=f"r{i}", line=i)
+            db.commit()
+
+        def totals(db):
+            endpoints = sorted(tuple(r.values()) for r in
+                               (dict(row._mapping) for row in db.execute(select(EndpointSummary.__table__))))
+            patterns = sorted(tuple(r.values()) for r in
+                              (dict(row._mapping) for row in db.execute(select(ErrorPatternSummary.__table__))))
+            return endpoints, patterns
+
+        with Session(bind=engine) as db:
+            load(db)
+            assert _run(db, normalizer, batch_size=7) == {"ApiRequest": 120, "ApplicationError": 30}
+            incremental = totals(db)
+            # Caught up: nothing is counted twice
+            assert _run(db, normalizer) == {"ApiRequest": 0, "ApplicationError": 0}
+            assert totals(db) == incremental
+
+        other = _engine()
+        with Session(bind=other) as db:
+            load(db)
+            _run(db, normalizer, batch_size=10000)
+            assert totals(db) == incremental
+        other.dispose()
+
+    def test_error_patterns_group_by_fingerprint(self, db, normalizer):
+        _error(db, "Lead 1 not found", NOW - timedelta(minutes=30), request_id="a", line=10)
+        _error(db, "Lead 2 not found", NOW - timedelta(minutes=20), request_id="b", line=11)
+        _error(db, "Lead 3 not found", NOW - timedelta(minutes=10), path="/api/events/3", request_id="c")
+        _error(db, "duplicate key 'x'", NOW - timedelta(minutes=5), error_type="IntegrityError", request_id="d")
+        db.commit()
+        _run(db, normalizer)
+
+        patterns = error_patterns(db, hours=1, now=NOW)
+        assert [(p["error_type"], p["path_template"], p["count"]) for p in patterns] == [
+            ("ValueError", "/api/forms/{form_id}/submissions", 2),
+            ("IntegrityError", "/api/forms/{form_id}/submissions", 1),
+            ("ValueError", "/api/events/{event_id}", 1),
+        ]
+        top = patterns[0]
+        assert (top["location"], top["message_template"]) == ("service.py:save_lead", "Lead {n} not found")
+        assert (top["first_seen"], top["last_seen"], top["last_request_id"]) == (
+            NOW - timedelta(minutes=30), NOW - timedelta(minutes=20), "b"
+        )
+
+    def test_unsettled_rows_wait(self, db, normalizer):
+        _request(db, "/api/health", 5, NOW - timedelta(minutes=1))
+        _request(db, "/api/health", 5, NOW - timedelta(seconds=1))
+        _request(db, "/api/health", 5, NOW - timedelta(minutes=1))
+        db.commit()
+
+        assert _run(db, normalizer)["ApiRequest"] == 1
+        assert _run(db, normalizer, now=NOW + timedelta(minutes=1))["ApiRequest"] == 2
+        assert db.scalar(select(func.sum(EndpointSummary.RequestCount))) == 3
+
+    def test_backfill_window(self, db, normalizer, monkeypatch):
+        monkeypatch.setattr(log_analyzer_module, "LOG_ANALYZER_BACKFILL_HOURS", 24)
+        _request(db, "/api/health", 5, NOW - timedelta(days=3))
+        _request(db, "/api/health", 5, NOW - timedelta(hours=1))
+        db.commit()
+
+        assert _run(db, normalizer)["ApiRequest"] == 1
+        assert get_watermark(db, API_REQUEST_SOURCE) == 2
+        assert [s["source_table"] for s in analyzer_status(db)] == ["ApiRequest", "ApplicationError"]
+
+    def test_concurrent_run_does_not_double_count(self, db, normalizer, monkeypatch):
+        _request(db, "/api/health", 5, NOW - timedelta(minutes=5))
+        db.commit()
+        get_watermark(db, API_REQUEST_SOURCE, now=NOW)
+        next_rows = log_analyzer_module._next_rows
+
+        def other_process_wins(session, source, *args):
+            rows = next_rows(session, source, *args)
+            session.execute(update(LogAnalyzerWatermark).values(LastID=rows[-1].ApiRequestID))
+            return rows
+
+        monkeypatch.setattr(log_analyzer_module, "_next_rows", other_process_wins)
+        assert analyze_batch(db, API_REQUEST_SOURCE, normalizer, SLOW_MS, now=NOW) == 0
+        assert db.scalar(select(func.count()).select_from(EndpointSummary)) == 0
+
+    def test_worker_run_once(self, engine, normalizer):
+        with Session(bind=engine) as db:
+            _request(db, "/api/events/5", 2000, datetime.utcnow() - timedelta(minutes=1))
+            _error(db, "boom", datetime.utcnow() - timedelta(minutes=1))
+            db.commit()
+        worker = LogAnalyzerWorker(session_factory=lambda: Session(bind=engine), normalizer=normalizer)
+        assert worker.run_once() == {"ApiRequest": 1, "ApplicationError": 1}
+        worker.start()
+        worker.stop()
+
+
+class TestReports:
+    """Summary-table reads"""
+
+    @pytest.fixture
+    def analyzed(self, db, normalizer):
+        for i in range(10):
+            _request(db, f"/api/events/{i}", 200, NOW - timedelta(minutes=10), request_id=f"e{i}")
+        _request(db, "/api/events/search", 4000, NOW - timedelta(minutes=15), request_id="search-slow")
+        _request(db, "/api/events/search", 10, NOW - timedelta(minutes=14))
+        _request(db, "/api/companies/1", 1500, NOW - timedelta(hours=3), request_id="old-slow")
+        _request(db, "/api/companies/1", 1200, NOW - timedelta(minutes=40), request_id="company-slow")
+        _request(db, "/api/companies/2", 1100, NOW - timedelta(minutes=30))
+        _error(db, "boom", NOW - timedelta(minutes=5))
+        db.commit()
+        _run(db, normalizer)
+        return db
+
+    def test_order_by(self, analyzed):
+        by_max = slowest_endpoints(analyzed, hours=1, now=NOW)
+        assert [e["path_template"] for e in by_max] == [
+            "/api/events/search", "/api/companies/{company_id}", "/api/events/{event_id}"
+        ]
+        assert by_max[0]["slowest_request_id"] == "search-slow" and by_max[0]["avg_duration_ms"] == 2005
+        assert by_max[1]["slowest_request_id"] == "company-slow" and by_max[1]["slow_count"] == 2
+
+        by_avg = slowest_endpoints(analyzed, hours=1, order_by="avg", now=NOW)
+        assert by_avg[0]["path_template"] == "/api/events/search"
+        by_slow = slowest_endpoints(analyzed, hours=1, order_by="slow", now=NOW)
+        assert by_slow[0]["path_template"] == "/api/companies/{company_id}"
+        assert slowest_endpoints(analyzed, hours=1, limit=1, now=NOW)[0]["path_template"] == "/api/events/search"
+
+    def test_window(self, analyzed):
+        endpoint = next(e for e in slowest_endpoints(analyzed, hours=4, now=NOW)
+                        if e["path_template"] == "/api/companies/{company_id}")
+        assert (endpoint["request_count"], endpoint["max_duration_ms"], endpoint["slowest_request_id"]) == (3, 1500, "old-slow")
+        assert slowest_endpoints(analyzed, hours=24, now=NOW + timedelta(days=2)) == []
+        with pytest.raises(ValueError):
+            slowest_endpoints(analyzed, order_by="p99")
+
+    def test_reports_do_not_read_log_tables(self, analyzed, engine):
+        executed = []
+        event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+        slowest_endpoints(analyzed, now=NOW)
+        error_patterns(analyzed, now=NOW)
+        assert executed
+        for statement in executed:
+            assert not re.search(r"\b(ApiRequest|ApplicationError)\b", statement)
+
+
+class TestRouter:
+    """Log analyzer endpoints"""
+
+    @pytest.fixture
+    def client(self, engine, monkeypatch):
+        monkeypatch.setattr(diagnostics_router, "LogSessionLocal", lambda: Session(bind=engine))
+        app = FastAPI()
+        app.include_router(diagnostics_router.router)
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=1, email="ops@example.com", role="system_admin")
+        return app
+
+    def test_slow_endpoints_and_error_patterns(self, client, engine, normalizer):
+        now = datetime.utcnow()
+        with Session(bind=engine) as db:
+            _request(db, "/api/events/5", 2500, now - timedelta(minutes=1), request_id="slow-1")
+            _error(db, "Lead 5 not found", now - timedelta(minutes=1), request_id="slow-1")
+            db.commit()
+            run_log_analyzer(db, normalizer, slow_ms=SLOW_MS)
+
+        body = TestClient(client).get("/api/admin/diagnostics/slow-endpoints", params={"order_by": "slow"}).json()
+        assert body["order_by"] == "slow"
+        assert body["endpoints"][0]["path_template"] == "/api/events/{event_id}"
+        assert body["endpoints"][0]["slowest_request_id"] == "slow-1"
+
+        body = TestClient(client).get("/api/admin/diagnostics/error-patterns", params={"hours": 2}).json()
+        assert body["patterns"][0]["message_template"] == "Lead {n} not found"
+        assert body["patterns"][0]["last_request_id"] == "slow-1"
+
+    def test_invalid_order(self, client):
+        assert TestClient(client).get("/api/admin/diagnostics/slow-endpoints", params={"order_by": "p99"}).status_code == 400
+
+    def test_system_admin_only(self, client):
+        client.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=2, email="u@example.com", role="company_admin")
+        assert TestClient(client).get("/api/admin/diagnostics/slow-endpoints").status_code == 403
+        assert TestClient(client).get("/api/admin/diagnostics/error-patterns").status_code == 403
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+LEGACY_QUERIES = [
+    ("SELECT Method, Path, StatusCode, DurationMs, UserID, RequestID, CreatedDate FROM ApiRequest "
+     "WHERE DurationMs > ? AND CreatedDate >= ? ORDER BY DurationMs DESC"),
+    ("SELECT ErrorType, COUNT(*) AS error_count, MAX(CreatedDate) AS last_occurrence FROM ApplicationError "
+     "WHERE CreatedDate >= ? GROUP BY ErrorType ORDER BY error_count DESC"),
+]
+
+
+def run_benchmark(requests: int = 100000, repeats: int = 20):
+    """Milliseconds per report, legacy scans vs summaries, and analyzer throughput"""
+    engine = _engine()
+    normalizer = RouteNormalizer(ROUTES)
+    start = NOW - timedelta(hours=23)
+    step = (NOW - timedelta(minutes=1) - start) / requests
+    paths = ["/api/companies/{}/invitations", "/api/companies/{}", "/api/events/{}", "/api/forms/{}/submissions"]
+    with engine.begin() as conn:
+        conn.execute(insert(ApiRequest.__table__), [
+            {"RequestID": f"req-{i}", "Method": "GET", "Path": paths[i % 4].format(i % 500), "StatusCode": 200,
+             "DurationMs": (i * 7919) % 3000, "CreatedDate": start + step * i}
+            for i in range(requests)
+        ])
+        conn.execute(insert(ApplicationError.__table__), [
+            {"ErrorType": ("ValueError", "KeyError")[i % 2], "ErrorMessage": f"Lead {i} not found",
+             "StackTrace": f'File "/app/service.py", line {i % 50}, in save', "Severity": "ERROR",
+             "RequestID": f"req-{i}", "Path": paths[i % 4].format(i % 500), "CreatedDate": start + step * i}
+            for i in range(0, requests, 20)
+        ])
+
+    results = {}
+    with Session(bind=engine) as db:
+        started = time.perf_counter()
+        analyzed = run_log_analyzer(db, normalizer, slow_ms=SLOW_MS, batch_size=5000, max_batches=1000, now=NOW)
+        results["analyze_ms"] = (time.perf_counter() - started) * 1000
+        results["analyzed_rows"] = sum(analyzed.values())
+
+        connection = db.connection()
+        since = NOW - timedelta(hours=24)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            slow_rows = connection.exec_driver_sql(LEGACY_QUERIES[0], (SLOW_MS, since)).fetchall()
+            connection.exec_driver_sql(LEGACY_QUERIES[1], (since,)).fetchall()
+        results["legacy_ms"] = (time.perf_counter() - started) / repeats * 1000
+        results["legacy_rows"] = len(slow_rows)
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            endpoints = slowest_endpoints(db, hours=24, now=NOW)
+            error_patterns(db, hours=24, now=NOW)
+        results["summary_ms"] = (time.perf_counter() - started) / repeats * 1000
+        results["summary_slow_count"] = sum(e["slow_count"] for e in endpoints)
+    engine.dispose()
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_summaries_faster_than_scans():
+    results = run_benchmark(requests=30000, repeats=5)
+    assert results["analyzed_rows"] == 30000 + 1500
+    assert results["summary_ms"] * 5 < results["legacy_ms"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"analyzer (one pass)          {results['analyze_ms']:8.2f} ms  ({results['analyzed_rows']} rows)")
+    print(f"legacy (ad hoc scans)        {results['legacy_ms']:8.2f} ms  ({results['legacy_rows']} slow rows)")
+    print(f"summaries (top-N reports)    {results['summary_ms']:8.2f} ms  ({results['summary_slow_count']} slow requests)")
@@ -0,0 +1,342 @@
+"""
+Log Diagnostics Tests and Benchmark
+
+Covers common.log_diagnostics and the diagnostics router:
+- One UNION ALL query returning a request's rows from all five log tables
+  in time order, bounded by the time range, summary columns only
+- Every branch seeking the RequestID index
+- Payloads loaded on demand (blob, compressed and legacy rows), truncated
+- Archived rows read from the day partitions in range only
+- NDJSON streaming endpoint and payload endpoint, system admins only
+
+The benchmark traces a request among many logged requests with payloads,
+comparing the previous three `SELECT *` queries on unindexed RequestID
+against the indexed summary query. Run it directly:
+
+    python -m tests.test_log_diagnostics
+"""
+import importlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.payload_blobs as payload_blobs_module
+from common.log_diagnostics import (
+    TRACE_SOURCES,
+    fetch_payloads,
+    format_entry,
+    get_trace,
+    iter_trace,
+)
+from common.log_retention import write_archive_file
+from common.payload_blobs import PayloadBlobStore, payload_columns
+from common.payload_codec import PayloadCodec
+from models.log import (
+    ApiRequest,
+    ApplicationError,
+    AuthEvent,
+    IntegrationEvent,
+    PayloadBlob,
+    PayloadDictionary,
+    UserAction,
+)
+from modules.auth.dependencies import get_current_user
+from modules.auth.models import CurrentUser
+from tests.sqlite_support import sqlite_engine
+
+# The package re-exports `router` under the submodule's name
+diagnostics_router = importlib.import_module("modules.diagnostics.router")
+
+
+NOW = datetime(2026, 3, 10, 12, 0, 0)
+LOG_TABLES = [
+    ApiRequest.__table__, ApplicationError.__table__, AuthEvent.__table__, UserAction.__table__,
+    IntegrationEvent.__table__, PayloadBlob.__table__, PayloadDictionary.__table__,
+]
+
+
+def _engine():
+    return sqlite_engine(LOG_TABLES)
+
+
+@pytest.fixture
+def engine():
+    engine = _engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def store(engine):
+    return PayloadBlobStore(cache_size=16, codec=PayloadCodec(session_factory=lambda: Session(bind=engine)))
+
+
+@pytest.fixture(autouse=True)
+def _dedup_everything(monkeypatch):
+    monkeypatch.setattr(payload_blobs_module, "PAYLOAD_DEDUP_ENABLED", True)
+    monkeypatch.setattr(payload_blobs_module, "PAYLOAD_BLOB_MIN_BYTES", 0)
+
+
+def _log_request(db, request_id, created, store=None, **payloads):
+    """One request's rows in every log table"""
+    columns = payload_columns(db, payloads.get("request"), payloads.get("response"), payloads.get("headers"), store=store) \
+        if payloads else {}
+    db.add(ApiRequest(
+        RequestID=request_id, Method="POST", Path="/api/forms/7/submissions", StatusCode=500, DurationMs=42,
+        UserID=3, CompanyID=9, CreatedDate=created + timedelta(milliseconds=40), **columns
+    ))
+    db.add(AuthEvent(EventType="TOKEN_REFRESHED", Reason="ok", UserID=3, RequestID=request_id, CreatedDate=created))
+    db.add(UserAction(UserID=3, Action="form.submit", Path="/api/forms/7/submissions", RequestID=request_id,
+                      CreatedDate=created + timedelta(milliseconds=10)))
+    db.add(IntegrationEvent(EventType="lead.created", SourceDomain="forms", TargetDomain="exports", EntityID=11,
+                            Details='{"lead_id": 11}', UserID=3, RequestID=request_id,
+                            CreatedDate=created + timedelta(milliseconds=20)))
+    db.add(ApplicationError(ErrorType="IntegrityError", ErrorMessage="duplicate key " + "x" * 500, StackTrace="trace",
+                            Severity="ERROR", RequestID=request_id, Path="/api/forms/7/submissions", Method="POST",
+                            UserID=3, CreatedDate=created + timedelta(milliseconds=30)))
+    db.commit()
+
+
+class TestTrace:
+    """Correlation query"""
+
+    def test_all_tables_in_time_order(self, db):
+        _log_request(db, "req-1", NOW - timedelta(minutes=5))
+        _log_request(db, "req-2", NOW - timedelta(minutes=4))
+
+        entries = get_trace(db, "req-1", start=NOW - timedelta(hours=1))
+        assert [e.source for e in entries] == [
+            "AuthEvent", "UserAction", "IntegrationEvent", "ApplicationError", "ApiRequest"
+        ]
+        api = entries[-1]
+        assert (api.name, api.status, api.duration_ms, api.detail, api.user_id) == ("POST", "500", 42, "/api/forms/7/submissions", 3)
+        assert entries[3].status == "ERROR" and entries[2].status == "exports"
+        assert not api.has_payload and not any(e.archived for e in entries)
+        assert "ApiRequest#" in format_entry(api) and "500" in format_entry(api)
+
+    def test_time_range_bounds_every_table(self, db):
+        _log_request(db, "req-1", NOW - timedelta(days=10))
+        _log_request(db, "req-1", NOW - timedelta(minutes=5))
+
+        assert len(get_trace(db, "req-1", start=NOW - timedelta(hours=1))) == 5
+        assert len(get_trace(db, "req-1", start=NOW - timedelta(days=11), end=NOW - timedelta(days=9))) == 5
+        assert len(get_trace(db, "req-1", start=NOW - timedelta(days=11))) == 10
+        assert get_trace(db, "req-1", start=NOW) == []
+
+    def test_detail_truncated_and_limit(self, db):
+        _log_request(db, "req-1", NOW)
+        entries = get_trace(db, "req-1", start=NOW - timedelta(hours=1), detail_chars=20)
+        error = next(e for e in entries if e.source == "ApplicationError")
+        assert error.detail == ("duplicate key " + "x" * 500)[:20]
+        assert len(get_trace(db, "req-1", start=NOW - timedelta(hours=1), limit=2)) == 2
+
+    def test_single_statement_without_payload_columns(self, db, engine, store):
+        _log_request(db, "req-1", NOW, store=store, request='{"email": "a@b.co"}', response='{"ok": false}')
+        executed = []
+        event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+        entries = get_trace(db, "req-1", start=NOW - timedelta(hours=1))
+
+        assert len(executed) == 1
+        assert executed[0].count("UNION ALL") == len(TRACE_SOURCES) - 1
+        # Payload columns only appear in the HasPayload test, never as output
+        select_list = re.sub(r"CASE .*? END", "", executed[0].split("FROM", 1)[0], flags=re.S)
+        assert "Payload\"" not in select_list.replace('"HasPayload"', "")
+        assert "StackTrace" not in executed[0] and "*" not in executed[0]
+        assert next(e for e in entries if e.source == "ApiRequest").has_payload
+
+    def test_every_branch_seeks_request_id_index(self, db, engine):
+        _log_request(db, "req-1", NOW)
+        captured = []
+        event.listen(engine, "before_cursor_execute", lambda *args: captured.append((args[2], args[3])))
+        get_trace(db, "req-1", start=NOW - timedelta(hours=1), end=NOW + timedelta(hours=1))
+        statement, parameters = captured[0]
+
+        plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        for source in TRACE_SOURCES:
+            assert f"USING INDEX IX_{source.table}_RequestID_CreatedDate" in details
+
+    def test_streams_rows_lazily(self, db):
+        for i in range(3):
+            _log_request(db, "req-1", NOW + timedelta(seconds=i))
+        stream = iter_trace(db, "req-1", start=NOW - timedelta(hours=1))
+        assert next(stream).source == "AuthEvent"
+        stream.close()
+
+
+class TestPayloads:
+    """Lazy payload fetch"""
+
+    def test_blob_payloads(self, db, store):
+        _log_request(db, "req-1", NOW, store=store, request='{"email": "a@b.co"}', response='{"ok": false}',
+                     headers='{"user-agent": "test"}')
+        api_id = next(e for e in get_trace(db, "req-1", start=NOW - timedelta(hours=1)) if e.source == "ApiRequest").entry_id
+
+        payloads = fetch_payloads(db, api_id)
+        assert json.loads(payloads["RequestPayload"]) == {"email": "a@b.co"}
+        assert json.loads(payloads["ResponsePayload"]) == {"ok": False}
+        assert json.loads(payloads["Headers"]) == {"user-agent": "test"}
+
+        truncated = fetch_payloads(db, api_id, max_chars=5)
+        assert truncated["RequestPayload"] == payloads["RequestPayload"][:5] + "..."
+        assert fetch_payloads(db, 999) is None
+
+    def test_legacy_text_payloads(self, db):
+        db.add(ApiRequest(RequestID="old", Method="GET", Path="/", StatusCode=200, DurationMs=1,
+                          RequestPayload='{"a": 1}', CreatedDate=NOW))
+        db.commit()
+        entry = get_trace(db, "old", start=NOW - timedelta(hours=1))[0]
+        assert entry.has_payload
+        assert fetch_payloads(db, entry.entry_id)["RequestPayload"] == '{"a": 1}'
+
+
+class TestArchive:
+    """Retention archive partitions"""
+
+    def test_archived_rows_first(self, db, tmp_path):
+        archived_at = NOW - timedelta(days=40)
+        rows = [
+            {"ApiRequestID": 1, "RequestID": "req-1", "Method": "GET", "Path": "/api/events", "StatusCode": 200,
+             "DurationMs": 5, "UserID": 3, "RequestPayload": "{}", "CreatedDate": archived_at},
+            {"ApiRequestID": 2, "RequestID": "other", "Method": "GET", "Path": "/", "StatusCode": 200,
+             "DurationMs": 5, "UserID": None, "CreatedDate": archived_at},
+        ]
+        write_archive_file("ApiRequest", archived_at.date(), rows, "ApiRequestID", str(tmp_path))
+        # A day outside the range is never opened
+        outside = tmp_path / "ApiRequest" / "2020-01-01"
+        outside.mkdir()
+        (outside / "ApiRequest_1-1.ndjson.gz").write_bytes(b"not gzip")
+        _log_request(db, "req-1", NOW)
+
+        entries = get_trace(db, "req-1", start=NOW - timedelta(days=60), include_archive=True, archive_dir=str(tmp_path))
+        assert entries[0].archived and entries[0].entry_id == 1 and entries[0].has_payload
+        assert entries[0].detail == "/api/events" and entries[0].status == "200"
+        assert [e.archived for e in entries[1:]] == [False] * 5
+        assert len(get_trace(db, "req-1", start=NOW - timedelta(days=60), include_archive=True,
+                             archive_dir=str(tmp_path), limit=3)) == 3
+
+
+class TestRouter:
+    """Diagnostics endpoints"""
+
+    @pytest.fixture
+    def client(self, engine, monkeypatch):
+        monkeypatch.setattr(diagnostics_router, "LogSessionLocal", lambda: Session(bind=engine))
+        app = FastAPI()
+        app.include_router(diagnostics_router.router)
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=1, email="ops@example.com", role="system_admin")
+        return app
+
+    def test_trace_streams_ndjson(self, client, db, store):
+        _log_request(db, "req-1", datetime.utcnow(), store=store, request='{"a": 1}')
+        response = TestClient(client).get("/api/admin/diagnostics/requests/req-1")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["source"] for line in lines][0] == "AuthEvent" and len(lines) == 5
+        api = lines[-1]
+        assert api["has_payload"]
+
+        payloads = TestClient(client).get(f"/api/admin/diagnostics/api-requests/{api['entry_id']}/payloads").json()
+        assert json.loads(payloads["request_payload"]) == {"a": 1}
+        assert TestClient(client).get("/api/admin/diagnostics/api-requests/999/payloads").status_code == 404
+
+    def test_invalid_range(self, client):
+        response = TestClient(client).get(
+            "/api/admin/diagnostics/requests/req-1", params={"since": "2026-03-02T00:00:00", "until": "2026-03-01T00:00:00"}
+        )
+        assert response.status_code == 400
+
+    def test_system_admin_only(self, client):
+        client.dependency_overrides[get_current_user] = lambda: CurrentUser(user_id=2, email="u@example.com", role="company_admin")
+        assert TestClient(client).get("/api/admin/diagnostics/requests/req-1").status_code == 403
+        assert TestClient(client).get("/api/admin/diagnostics/api-requests/1/payloads").status_code == 403
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+LEGACY_QUERIES = [
+    "SELECT * FROM ApiRequest WHERE RequestID = ?",
+    "SELECT * FROM AuthEvent WHERE RequestID = ?",
+    "SELECT * FROM ApplicationError WHERE RequestID = ?",
+]
+
+
+def run_benchmark(requests: int = 50000, payload_bytes: int = 2000, repeats: int = 20):
+    """Milliseconds per correlation lookup, legacy (unindexed SELECT *) vs trace"""
+    engine = _engine()
+    payload = json.dumps({"data": "x" * payload_bytes})
+    start = NOW - timedelta(days=3)
+    with engine.begin() as conn:
+        conn.execute(insert(ApiRequest.__table__), [
+            {"RequestID": f"req-{i}", "Method": "POST", "Path": "/api/forms/7/submissions", "StatusCode": 200,
+             "DurationMs": 12, "RequestPayload": payload, "ResponsePayload": payload,
+             "CreatedDate": start + timedelta(seconds=i)}
+            for i in range(requests)
+        ])
+        conn.execute(insert(AuthEvent.__table__), [
+            {"EventType": "TOKEN_REFRESHED", "RequestID": f"req-{i}", "CreatedDate": start + timedelta(seconds=i)}
+            for i in range(0, requests, 2)
+        ])
+        conn.execute(insert(ApplicationError.__table__), [
+            {"ErrorType": "ValueError", "ErrorMessage": "bad", "StackTrace": "x" * payload_bytes, "Severity": "ERROR",
+             "RequestID": f"req-{i}", "CreatedDate": start + timedelta(seconds=i)}
+            for i in range(0, requests, 10)
+        ])
+    target = f"req-{requests // 2}"
+
+    results = {}
+    with Session(bind=engine) as db:
+        get_trace(db, target, start=start)  # Statement compiled once per process
+        started = time.perf_counter()
+        for _ in range(repeats):
+            entries = get_trace(db, target, start=start)
+        results["trace_ms"] = (time.perf_counter() - started) / repeats * 1000
+        results["trace_entries"] = len(entries)
+
+        with engine.begin() as conn:
+            for source in TRACE_SOURCES:
+                conn.exec_driver_sql(f"DROP INDEX IX_{source.table}_RequestID_CreatedDate")
+        connection = db.connection()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            rows = [row for sql in LEGACY_QUERIES for row in connection.exec_driver_sql(sql, (target,)).fetchall()]
+        results["legacy_ms"] = (time.perf_counter() - started) / repeats * 1000
+        results["legacy_rows"] = len(rows)
+    engine.dispose()
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_trace_faster_than_legacy():
+    results = run_benchmark(requests=10000, repeats=5)
+    assert results["trace_entries"] == results["legacy_rows"]
+    assert results["trace_ms"] * 5 < results["legacy_ms"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"legacy (3x SELECT *, no index)  {results['legacy_ms']:8.2f} ms  ({results['legacy_rows']} rows)")
+    print(f"trace  (UNION ALL, indexed)     {results['trace_ms']:8.2f} ms  ({results['trace_entries']} entries)")
@@ -0,0 +1,163 @@
+"""
+Log Retention Tests
+
+Covers common.log_retention:
+- Batched expiry in key order, stopping at the cutoff
+- Day-partitioned compressed archives and reading them back by date range
+- Retried batches rewriting the same archive file
+- Per-table policy with config.AppSetting fallbacks (defaults when unset)
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.log_retention import (
+    LOG_RETENTION_MODELS,
+    apply_retention,
+    archive_partitions,
+    expire_batch,
+    read_archive,
+    run_log_retention,
+)
+from models.log import ApiRequest, AuthEvent, UserAction
+from tests.sqlite_support import sqlite_engine
+
+
+NOW = datetime(2026, 3, 10, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([model.__table__ for model in LOG_RETENTION_MODELS.values()])
+    session = Session(bind=engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _requests(db, ages_days, payload="{}"):
+    db.add_all([
+        ApiRequest(
+            RequestID=f"r{i}", Method="GET", Path="/api/events", StatusCode=200 if i % 3 else 500,
+            DurationMs=i, RequestPayload=payload, CreatedDate=NOW - timedelta(days=age, hours=i % 5),
+        )
+        for i, age in enumerate(ages_days)
+    ])
+    db.commit()
+
+
+def _count(db, model):
+    return db.scalar(select(func.count()).select_from(model))
+
+
+class TestExpiry:
+    """Batched deletes"""
+
+    def test_batch_removes_oldest_expired_rows_only(self, db, tmp_path):
+        _requests(db, [40, 39, 38, 5, 4])
+        result = expire_batch(db, ApiRequest, NOW - timedelta(days=30), archive_dir=str(tmp_path), batch_size=2)
+
+        assert result.deleted == 2
+        remaining = db.scalars(select(ApiRequest.RequestID).order_by(ApiRequest.ApiRequestID)).all()
+        assert remaining == ["r2", "r3", "r4"]
+
+    def test_apply_retention_runs_batches_to_completion(self, db, tmp_path):
+        _requests(db, [60] * 7 + [1] * 3)
+        result = apply_retention(db, ApiRequest, 30, now=NOW, archive_dir=str(tmp_path), batch_size=3)
+
+        assert (result.deleted, result.complete) == (7, True)
+        assert _count(db, ApiRequest) == 3
+
+    def test_batch_limit_leaves_rest_for_next_run(self, db, tmp_path):
+        _requests(db, [60] * 7)
+        result = apply_retention(db, ApiRequest, 30, now=NOW, archive_dir=str(tmp_path), batch_size=2, max_batches=2)
+
+        assert (result.deleted, result.complete) == (4, False)
+        assert _count(db, ApiRequest) == 3
+
+    def test_zero_days_keeps_everything(self, db, tmp_path):
+        _requests(db, [900])
+        result = apply_retention(db, ApiRequest, 0, now=NOW, archive_dir=str(tmp_path))
+        assert result.deleted == 0
+        assert _count(db, ApiRequest) == 1
+
+    def test_delete_only_when_archiving_disabled(self, db, tmp_path):
+        _requests(db, [60, 60])
+        result = apply_retention(db, ApiRequest, 30, now=NOW, archive=False, archive_dir=str(tmp_path))
+        assert result.deleted == 2
+        assert result.archived_files == []
+        assert archive_partitions("ApiRequest", str(tmp_path)) == []
+
+
+class TestArchive:
+    """Compressed day partitions"""
+
+    def test_rows_archived_per_day_and_readable(self, db, tmp_path):
+        _requests(db, [40, 40, 39, 2], payload='{"email": "a@example.com"}')
+        apply_retention(db, ApiRequest, 30, now=NOW, archive_dir=str(tmp_path))
+
+        partitions = archive_partitions("ApiRequest", str(tmp_path))
+        assert [p["day"] for p in partitions] == [(NOW - timedelta(days=40)).date(), (NOW - timedelta(days=39)).date()]
+        rows = list(read_archive("ApiRequest", archive_dir=str(tmp_path)))
+        assert [row["RequestID"] for row in rows] == ["r0", "r1", "r2"]
+        assert rows[0]["RequestPayload"] == '{"email": "a@example.com"}'
+        assert isinstance(rows[0]["CreatedDate"], datetime)
+
+    def test_read_archive_by_range_and_predicate(self, db, tmp_path):
+        _requests(db, [50, 45, 44, 40])
+        apply_retention(db, ApiRequest, 30, now=NOW, archive_dir=str(tmp_path))
+
+        start, end = NOW - timedelta(days=46), NOW - timedelta(days=41)
+        rows = list(read_archive("ApiRequest", start=start, end=end, archive_dir=str(tmp_path)))
+        assert [row["RequestID"] for row in rows] == ["r1", "r2"]
+        errors = list(read_archive("ApiRequest", where=lambda row: row["StatusCode"] >= 500, archive_dir=str(tmp_path)))
+        assert [row["RequestID"] for row in errors] == ["r0", "r3"]
+
+    def test_retried_batch_rewrites_same_file(self, db, tmp_path, monkeypatch):
+        _requests(db, [40, 40])
+        cutoff = NOW - timedelta(days=30)
+
+        # Crash after archiving, before the DELETE commits
+        def _fail():
+            raise RuntimeError("connection lost")
+        monkeypatch.setattr(db, "commit", _fail)
+        with pytest.raises(RuntimeError):
+            expire_batch(db, ApiRequest, cutoff, archive_dir=str(tmp_path))
+        monkeypatch.undo()
+        db.rollback()
+        assert _count(db, ApiRequest) == 2
+        files = sorted(p.name for p in tmp_path.rglob("*.ndjson.*"))
+
+        result = expire_batch(db, ApiRequest, cutoff, archive_dir=str(tmp_path))
+
+        assert result.deleted == 2
+        assert sorted(p.name for p in tmp_path.rglob("*.ndjson.*")) == files
+        assert len(list(read_archive("ApiRequest", archive_dir=str(tmp_path)))) == 2
+
+
+class TestPolicy:
+    """Per-table settings"""
+
+    def test_defaults_apply_without_settings_table(self, db, tmp_path):
+        _requests(db, [31, 29])
+        db.add_all([
+            AuthEvent(EventType="login_success", CreatedDate=NOW - timedelta(days=200)),
+            AuthEvent(EventType="login_success", CreatedDate=NOW - timedelta(days=400)),
+            UserAction(UserID=1, Action="form.publish", CreatedDate=NOW - timedelta(days=400)),
+        ])
+        db.commit()
+
+        results = {r.table: r for r in run_log_retention(db, now=NOW, archive_dir=str(tmp_path), pause_seconds=0)}
+
+        assert results["ApiRequest"].deleted == 1  # 30 days
+        assert results["AuthEvent"].deleted == 1  # 365 days
+        assert results["UserAction"].deleted == 1
+        assert set(results) == set(LOG_RETENTION_MODELS)
@@ -0,0 +1,217 @@
+"""
+Membership Snapshot Cache Tests
+
+Covers common.membership_cache and its use in RBAC helpers:
+- Snapshot built in one query (company, role and status joined in)
+- Primary / default membership selection used for JWT claims
+- Cache hits, ORM-event invalidation on commit, explicit invalidation
+- Loads racing an invalidation not cached (generation counter)
+- Company switching reads memberships uncached
+- require_company_access / verify_company_access with a snapshot
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.membership_cache as membership_cache_module
+from common.membership_cache import (
+    MembershipCache,
+    get_membership_snapshot,
+    invalidate_memberships_on_commit,
+    load_membership_snapshot,
+    membership_cache,
+)
+from common.multi_tenant import verify_company_access
+from common.rbac import require_company_access
+from models.company import Company
+from models.company_relationship import CompanyRelationship
+from models.form import Form
+from models.form_access_control import FormAccessControl
+from models.form_effective_access import FormEffectiveAccess
+from models.user_company import UserCompany
+from models.ref.form_access_control_access_type import FormAccessControlAccessType
+from models.ref.user_company_role import UserCompanyRole
+from models.ref.user_company_status import UserCompanyStatus
+from modules.auth.models import CurrentUser
+from modules.users.switch_service import CompanySwitchService
+from tests.sqlite_support import sqlite_engine
+
+
+USER_ID = 7
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([
+        Company.__table__,
+        UserCompanyRole.__table__,
+        UserCompanyStatus.__table__,
+        UserCompany.__table__,
+        # Membership changes rebuild form grants (modules.forms.access_service)
+        CompanyRelationship.__table__,
+        Form.__table__,
+        FormAccessControlAccessType.__table__,
+        FormAccessControl.__table__,
+        FormEffectiveAccess.__table__,
+    ], utcnow=lambda: datetime(2025, 1, 1))
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    session.add_all([
+        UserCompanyRole(UserCompanyRoleID=1, RoleCode="company_admin", RoleName="Company Admin",
+                        Description="Admin", RoleLevel=1),
+        UserCompanyRole(UserCompanyRoleID=2, RoleCode="company_user", RoleName="Company User",
+                        Description="User", RoleLevel=2),
+        UserCompanyStatus(UserCompanyStatusID=1, StatusCode="active", StatusName="Active", Description="Active"),
+        UserCompanyStatus(UserCompanyStatusID=2, StatusCode="inactive", StatusName="Inactive", Description="Inactive"),
+    ])
+    for company_id in (10, 20, 30):
+        session.add(Company(CompanyID=company_id, CompanyName=f"Company {company_id}", CountryID=1))
+    session.add_all([
+        UserCompany(UserCompanyID=1, UserID=USER_ID, CompanyID=10, UserCompanyRoleID=2, StatusID=1,
+                    IsPrimaryCompany=False, JoinedDate=datetime(2024, 1, 1), JoinedViaID=1),
+        UserCompany(UserCompanyID=2, UserID=USER_ID, CompanyID=20, UserCompanyRoleID=1, StatusID=1,
+                    IsPrimaryCompany=True, JoinedDate=datetime(2024, 6, 1), JoinedViaID=1),
+        UserCompany(UserCompanyID=3, UserID=USER_ID, CompanyID=30, UserCompanyRoleID=2, StatusID=2,
+                    IsPrimaryCompany=False, JoinedDate=datetime(2023, 1, 1), JoinedViaID=1),
+    ])
+    session.commit()
+    membership_cache.clear()
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+    membership_cache.clear()
+
+
+class TestMembershipSnapshot:
+    """Snapshot contents"""
+
+    def test_built_in_one_query(self, db):
+        db.info["statements"].clear()
+        snapshot = load_membership_snapshot(db, USER_ID)
+        assert len(db.info["statements"]) == 1
+
+        assert [m.company_id for m in snapshot.memberships] == [20, 30, 10]
+        primary = snapshot.primary()
+        assert (primary.company_id, primary.role_code, primary.role_name) == (20, "company_admin", "Company Admin")
+        assert primary.company_name == "Company 20"
+        assert snapshot.active_company_ids() == {10, 20}
+        assert snapshot.has_active_membership(10)
+        assert not snapshot.has_active_membership(30)
+        assert not snapshot.has_active_membership(99)
+
+    def test_default_membership_falls_back_to_first_active(self, db):
+        db.execute(update(UserCompany).values(IsPrimaryCompany=False))
+        db.commit()
+        snapshot = load_membership_snapshot(db, USER_ID)
+        assert snapshot.primary() is None
+        # Company 30 joined earliest but is inactive
+        assert snapshot.default_membership().company_id == 10
+
+    def test_unknown_user_is_empty(self, db):
+        snapshot = load_membership_snapshot(db, 999)
+        assert snapshot.memberships == ()
+        assert snapshot.default_membership() is None
+
+
+class TestMembershipCaching:
+    """Cache hits and invalidation"""
+
+    def test_cache_hit_skips_query(self, db):
+        get_membership_snapshot(db, USER_ID)
+        db.info["statements"].clear()
+        get_membership_snapshot(db, USER_ID)
+        assert db.info["statements"] == []
+
+    def test_orm_update_invalidates_on_commit(self, db):
+        assert get_membership_snapshot(db, USER_ID).get(10).role_code == "company_user"
+
+        uc = db.get(UserCompany, 1)
+        uc.UserCompanyRoleID = 1
+        db.flush()
+        # Not visible until the transaction commits
+        assert get_membership_snapshot(db, USER_ID).get(10).role_code == "company_user"
+        db.commit()
+        assert get_membership_snapshot(db, USER_ID).get(10).role_code == "company_admin"
+
+    def test_bulk_update_requires_explicit_invalidation(self, db):
+        get_membership_snapshot(db, USER_ID)
+        db.execute(update(UserCompany).where(UserCompany.UserCompanyID == 1).values(StatusID=2))
+        invalidate_memberships_on_commit(db, [USER_ID])
+        db.commit()
+        assert not get_membership_snapshot(db, USER_ID).has_active_membership(10)
+
+    def test_company_rename_invalidates_members(self, db):
+        get_membership_snapshot(db, USER_ID)
+        db.get(Company, 20).CompanyName = "Renamed"
+        db.commit()
+        assert get_membership_snapshot(db, USER_ID).get(20).company_name == "Renamed"
+
+    def test_load_racing_invalidation_not_cached(self, db, monkeypatch):
+        def load_then_commit_elsewhere(session, user_id):
+            snapshot = load_membership_snapshot(session, user_id)
+            membership_cache.invalidate([user_id])  # another worker's commit lands mid-load
+            return snapshot
+
+        monkeypatch.setattr(membership_cache_module, "load_membership_snapshot", load_then_commit_elsewhere)
+        get_membership_snapshot(db, USER_ID)
+        assert membership_cache.get(USER_ID) is None
+
+        monkeypatch.undo()
+        get_membership_snapshot(db, USER_ID)
+        assert membership_cache.get(USER_ID) is not None
+
+    def test_switch_ignores_stale_cache(self, db):
+        assert get_membership_snapshot(db, USER_ID).has_active_membership(10)
+        # Deactivated through another worker: this process's cache is not told
+        db.execute(update(UserCompany).where(UserCompany.UserCompanyID == 1).values(StatusID=2))
+        db.commit()
+        assert get_membership_snapshot(db, USER_ID).has_active_membership(10)
+
+        with pytest.raises(ValueError, match="not active"):
+            CompanySwitchService(db).switch_company(USER_ID, 10)
+
+    def test_lru_eviction_and_ttl(self, db):
+        cache = MembershipCache(max_users=1)
+        cache.set(load_membership_snapshot(db, USER_ID))
+        cache.set(load_membership_snapshot(db, 999))
+        assert cache.get(USER_ID) is None
+        assert cache.get(999) is not None
+
+        expired = MembershipCache(ttl_seconds=0)
+        expired.set(load_membership_snapshot(db, USER_ID))
+        assert expired.get(USER_ID) is None
+
+
+class TestAccessChecksWithSnapshot:
+    """RBAC / multi-tenant helpers"""
+
+    def test_require_company_access_denies_revoked_membership(self, db):
+        snapshot = load_membership_snapshot(db, USER_ID)
+        user = CurrentUser(user_id=USER_ID, email="u@example.com", role="company_user", company_id=30)
+
+        require_company_access(user, 30)  # JWT alone still allows it
+        with pytest.raises(HTTPException) as exc_info:
+            require_company_access(user, 30, snapshot)
+        assert exc_info.value.status_code == 403
+
+    def test_verify_company_access_with_snapshot(self, db):
+        snapshot = load_membership_snapshot(db, USER_ID)
+        verify_company_access(20, 20, "Event", memberships=snapshot)
+        with pytest.raises(HTTPException) as exc_info:
+            verify_company_access(30, 30, "Event", memberships=snapshot)
+        assert exc_info.value.status_code == 403
@@ -0,0 +1,289 @@
+"""
+Metrics Registry Tests and Benchmark
+
+Covers common.metrics and middleware.metrics:
+- HDR bucket layout and quantile accuracy (within 1/64 relative error)
+- Interval snapshots by bucket subtraction
+- Registry registration rules and Prometheus text rendering
+- Per-route recording (route templates, unhandled errors as 500)
+- Flushing interval summaries to log.PerformanceMetric
+
+The benchmark compares recording a request in memory with inserting one
+log row per request. Run it directly for timings:
+
+    python -m tests.test_metrics
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.metrics import (
+    Histogram,
+    MetricsFlusher,
+    MetricsRegistry,
+    bucket_bounds,
+    bucket_index,
+    flush_metrics,
+    metrics_registry,
+    observe_request,
+    render_prometheus,
+)
+from middleware.metrics import MetricsMiddleware
+from models.log.performance_metric import PerformanceMetric
+from tests.sqlite_support import sqlite_engine
+
+
+@pytest.fixture(autouse=True)
+def _reset_registry():
+    metrics_registry.reset()
+    yield
+    metrics_registry.reset()
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([PerformanceMetric.__table__])
+    session = Session(bind=engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestHistogram:
+    """HDR buckets and quantiles"""
+
+    def test_buckets_contain_their_values(self):
+        for value in list(range(0, 2000)) + [random.Random(1).randrange(1, 10 ** 12) for _ in range(2000)]:
+            low, high = bucket_bounds(bucket_index(value))
+            assert low <= value < high
+            assert (high - low) <= max(1, low / 64)
+
+    def test_bucket_indexes_are_contiguous(self):
+        assert [bucket_index(v) for v in (127, 128, 130, 255, 256)] == [127, 128, 129, 191, 192]
+
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(3)
+        values = [rng.lognormvariate(3, 1.2) for _ in range(20000)]
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+        snapshot = histogram.snapshot()
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            exact = ordered[int(q * len(ordered)) - 1]
+            assert abs(snapshot.quantile(q) - exact) / exact < 0.02
+        assert snapshot.count == len(values)
+        assert snapshot.max == max(values)
+
+    def test_interval_by_subtraction(self):
+        histogram = Histogram()
+        for value in (1, 2, 3):
+            histogram.record(value)
+        before = histogram.snapshot()
+        for value in (500, 600):
+            histogram.record(value)
+
+        interval = histogram.snapshot() - before
+        assert interval.count == 2
+        assert interval.total == 1100
+        assert 490 < interval.quantile(0.5) < 510
+        assert (before - before).count == 0
+
+    def test_empty_quantile_is_zero(self):
+        assert Histogram().snapshot().quantile(0.99) == 0.0
+
+
+class TestRegistry:
+    """Registration and exposition"""
+
+    def test_registration_is_idempotent(self):
+        registry = MetricsRegistry()
+        family = registry.counter("jobs_total", "Jobs", ("kind",))
+        assert registry.counter("jobs_total", "Jobs", ("kind",)) is family
+        with pytest.raises(ValueError):
+            registry.gauge("jobs_total", "Jobs", ("kind",))
+        with pytest.raises(ValueError):
+            registry.counter("jobs-total", "Bad name")
+        with pytest.raises(ValueError):
+            family.labels("a", "b")
+
+    def test_counters_only_increase(self):
+        registry = MetricsRegistry()
+        with pytest.raises(ValueError):
+            registry.counter("jobs_total", "Jobs").labels().inc(-1)
+
+    def test_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Jobs run", ("kind",)).labels('csv "x"').inc(3)
+        registry.gauge("queue_depth", "Queued jobs").labels().set(7)
+        latency = registry.histogram("job_ms", "Job latency", ("kind",))
+        for value in (10, 20, 30):
+            latency.labels("csv").record(value)
+
+        text = render_prometheus(registry)
+        assert "# TYPE jobs_total counter\njobs_total{kind=\"csv \\\"x\\\"\"} 3\n" in text
+        assert "# TYPE queue_depth gauge\nqueue_depth 7\n" in text
+        assert "# TYPE job_ms summary\n" in text
+        assert 'job_ms{kind="csv",quantile="0.5"} 20' in text
+        assert 'job_ms_sum{kind="csv"} 60' in text
+        assert 'job_ms_count{kind="csv"} 3' in text
+
+
+class TestMiddleware:
+    """Per-route recording"""
+
+    def _app(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            return {"id": item_id}
+
+        @app.get("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        return app
+
+    def test_route_templates_share_a_series(self):
+        client = TestClient(self._app())
+        for item_id in (1, 2, 3):
+            assert client.get(f"/items/{item_id}").status_code == 200
+        assert client.get("/nowhere").status_code == 404
+
+        text = render_prometheus()
+        assert 'http_request_duration_ms_count{method="GET",route="/items/{item_id}"} 3' in text
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 3' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+        assert "http_requests_in_progress 0" in text
+
+    def test_unhandled_error_counted_as_500(self):
+        client = TestClient(self._app(), raise_server_exceptions=False)
+        assert client.get("/boom").status_code == 500
+        assert 'http_requests_total{method="GET",route="/boom",status="500"} 1' in render_prometheus()
+
+
+class TestFlush:
+    """Interval summaries in log.PerformanceMetric"""
+
+    def _rows(self, db):
+        return {
+            (row.MetricType, row.Endpoint): row
+            for row in db.scalars(select(PerformanceMetric))
+        }
+
+    def test_interval_summaries_written(self, db):
+        flusher = MetricsFlusher()
+        for ms in range(1, 101):
+            observe_request("GET", "/api/events/search", 200 if ms <= 95 else 503, ms)
+        observe_request("POST", "/api/forms/{form_id}/submissions", 202, 12.5)
+
+        written = flush_metrics(db, flusher)
+
+        rows = self._rows(db)
+        assert written == len(rows) == 10
+        search = "GET /api/events/search"
+        assert float(rows[("http_request_duration_ms_count", search)].Value) == 100
+        assert 49 <= float(rows[("http_request_duration_ms_p50", search)].Value) <= 51
+        assert 98 <= float(rows[("http_request_duration_ms_p99", search)].Value) <= 100
+        assert float(rows[("http_error_rate", search)].Value) == 0.05
+        assert float(rows[("http_error_rate", "POST /api/forms/{form_id}/submissions")].Value) == 0
+
+    def test_only_new_observations_flushed(self, db):
+        flusher = MetricsFlusher()
+        observe_request("GET", "/a", 200, 5)
+        flush_metrics(db, flusher)
+
+        assert flush_metrics(db, flusher) == 0
+
+        observe_request("GET", "/a", 500, 900)
+        flush_metrics(db, flusher)
+        latest = db.scalars(
+            select(PerformanceMetric).where(PerformanceMetric.MetricType == "http_request_duration_ms_p50")
+            .order_by(PerformanceMetric.PerformanceMetricID.desc())
+        ).first()
+        assert 880 <= float(latest.Value) <= 920
+
+    def test_failed_write_carried_into_next_interval(self, db):
+        flusher = MetricsFlusher()
+        observe_request("GET", "/a", 200, 5)
+        flusher.collect()  # rows never stored, marks not committed
+
+        observe_request("GET", "/a", 200, 5)
+        flush_metrics(db, flusher)
+        count = db.scalars(
+            select(PerformanceMetric.Value).where(PerformanceMetric.MetricType == "http_request_duration_ms_count")
+        ).one()
+        assert float(count) == 2
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(requests: int = 50000, routes: int = 20) -> dict:
+    """
+    Time in-memory recording against one PerformanceMetric INSERT per request.
+
+    Returns:
+        Dict with per-request costs (microseconds) and rows flushed
+    """
+    import tempfile
+
+    rng = random.Random(5)
+    samples = [
+        ("GET", f"/api/route{rng.randrange(routes)}", 200, rng.lognormvariate(3, 1)) for _ in range(requests)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine([PerformanceMetric.__table__], f"sqlite:///{os.path.join(tmp, 'metrics.db')}")
+        session = Session(bind=engine)
+
+        # Baseline: one row per request (what ApiRequest-style logging costs)
+        started = time.perf_counter()
+        for method, route, status_code, ms in samples:
+            session.execute(PerformanceMetric.__table__.insert(), {
+                "MetricType": "http_request_ms", "Endpoint": f"{method} {route}", "Value": round(ms, 2),
+                "StatusCode": status_code, "CreatedDate": datetime.utcnow(),
+            })
+            session.commit()
+        per_row_us = (time.perf_counter() - started) / requests * 1e6
+
+        metrics_registry.reset()
+        flusher = MetricsFlusher()
+        started = time.perf_counter()
+        for method, route, status_code, ms in samples:
+            observe_request(method, route, status_code, ms)
+        recorded_us = (time.perf_counter() - started) / requests * 1e6
+        flushed = flush_metrics(session, flusher)
+
+        session.close()
+        engine.dispose()
+    metrics_registry.reset()
+    return {"per_row_us": per_row_us, "recorded_us": recorded_us, "rows_flushed": flushed}
+
+
+@pytest.mark.slow
+def test_benchmark_recording_cheaper_than_row_per_request():
+    result = run_benchmark(requests=5000)
+    assert result["recorded_us"] * 10 < result["per_row_us"]
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print(f"Row per request:   {result['per_row_us']:8.1f} us/request")
+    print(f"In-memory record:  {result['recorded_us']:8.1f} us/request")
+    print(f"Flushed {result['rows_flushed']} summary rows for the whole run")
@@ -0,0 +1,362 @@
+"""
+Offline Sync Tests
+
+Covers modules.forms.sync_service:
+- Compressed NDJSON decoding (gzip/deflate, inflate limit, bad lines)
+- Per-item ack vector (stored / duplicate / rejected)
+- Idempotency keys: re-sent leads are never stored twice
+- One transaction per chunk with a fixed statement count
+- FORM_SUBMIT checked per form: owning-company members and grant holders
+- Resumable uploads (offset handling, concurrent appends)
+- The sync routes end to end (open, append NDJSON, resume)
+"""
+import asyncio
+import gzip
+import json
+import os
+import sys
+import zlib
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company import Company
+from models.event import Event
+from models.form import Form
+from models.form_effective_access import FormEffectiveAccess
+from models.form_submission import FormSubmission
+from models.kpi_rollup import CompanyKpiRollup, EventKpiRollup, CompanyDailyKpiRollup, KpiOutbox
+from models.ref.form_status import FormStatus
+from models.sync_upload import SyncUpload
+from modules.auth.models import CurrentUser
+from modules.dashboard.kpi_service import drain_kpi_outbox
+from modules.forms import sync_service
+from modules.forms.access_service import FORM_SUBMIT, form_access_cache
+from modules.forms.router import router
+from modules.forms.submission_service import submission_target_cache
+from modules.forms.sync_service import (
+    ACK_DUPLICATE,
+    ACK_REJECTED,
+    ACK_STORED,
+    SyncConflictError,
+    append_sync_items,
+    client_key_digest,
+    decode_sync_items,
+    get_sync_upload,
+    open_sync_upload,
+)
+from tests.sqlite_support import MEMORY_URL, active_memberships, route_client, sqlite_engine
+
+
+PUBLISHED = 3
+COMPANY_ID, OTHER_COMPANY_ID = 10, 20
+USER_ID = 7
+USER = CurrentUser(user_id=USER_ID, email="booth@example.com", role="company_user", company_id=COMPANY_ID)
+MEMBERSHIPS = active_memberships(USER)
+
+
+def _build_engine(url: str = MEMORY_URL):
+    engine = sqlite_engine([
+        FormStatus.__table__, Company.__table__, Event.__table__, Form.__table__,
+        FormSubmission.__table__, SyncUpload.__table__, CompanyKpiRollup.__table__,
+        EventKpiRollup.__table__, CompanyDailyKpiRollup.__table__, KpiOutbox.__table__,
+        FormEffectiveAccess.__table__,
+    ], url)
+    with engine.begin() as conn:
+        conn.execute(FormStatus.__table__.insert(), [
+            {"FormStatusID": PUBLISHED, "StatusCode": "PUBLISHED", "StatusName": "Published", "CreatedBy": 1},
+        ])
+        conn.execute(Company.__table__.insert(), [
+            {"CompanyID": COMPANY_ID, "CompanyName": "Expo Co", "CountryID": 1},
+            {"CompanyID": OTHER_COMPANY_ID, "CompanyName": "Other Co", "CountryID": 1},
+        ])
+        conn.execute(Form.__table__.insert(), [
+            {"FormID": form_id, "FormName": f"Form {form_id}", "CompanyID": company_id, "EventID": None,
+             "FormStatusID": PUBLISHED, "FormApprovalStatusID": 1, "CreatedBy": 1,
+             "TotalSubmissions": 0, "ProductionLeadsCollected": 0, "DemoLeadsCollected": 0}
+            for form_id, company_id in ((1, COMPANY_ID), (2, COMPANY_ID), (3, OTHER_COMPANY_ID))
+        ])
+    return engine
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    submission_target_cache.clear()
+    form_access_cache.clear()
+    yield
+    submission_target_cache.clear()
+    form_access_cache.clear()
+
+
+@pytest.fixture
+def db():
+    engine = _build_engine()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session = Session(bind=engine)
+    session.info["statements"] = statements
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _ndjson(*items) -> bytes:
+    return "\n".join(json.dumps(item) for item in items).encode("utf-8")
+
+
+def _lead(key: str, form_id: int = 1, **extra) -> dict:
+    return {"client_key": key, "form_id": form_id, "data": {"email": f"{key}@example.com"}, **extra}
+
+
+def _statuses(result):
+    return [ack.status for ack in result.acks]
+
+
+def _append(db, upload, offset: int, *leads):
+    return append_sync_items(db, upload, offset, decode_sync_items(_ndjson(*leads), None, offset), USER, MEMBERSHIPS)
+
+
+class TestDecoding:
+    """Compressed NDJSON bodies"""
+
+    def test_gzip_and_deflate(self):
+        body = _ndjson(_lead("a"), _lead("b"))
+        for encoded, encoding in ((gzip.compress(body), "gzip"), (zlib.compress(body), "deflate"), (body, None)):
+            items = decode_sync_items(encoded, encoding, offset=5)
+            assert [(i.index, i.request.client_key) for i in items] == [(5, "a"), (6, "b")]
+
+    def test_bad_lines_rejected_individually(self):
+        body = _ndjson(_lead("a"), {"form_id": 1, "data": {}}) + b"\n\n{not json\n"
+        items = decode_sync_items(body, None, offset=0)
+        assert items[0].request is not None
+        assert items[1].request is None and "client_key" in items[1].error
+        assert items[2].request is None and len(items) == 3
+
+    def test_inflate_limit(self, monkeypatch):
+        monkeypatch.setattr(sync_service, "MAX_SYNC_DECOMPRESSED_BYTES", 1024)
+        with pytest.raises(ValueError):
+            decode_sync_items(gzip.compress(b" " * 100000), "gzip", offset=0)
+
+    def test_unsupported_encoding(self):
+        with pytest.raises(ValueError):
+            decode_sync_items(b"", "br", offset=0)
+
+
+class TestAppend:
+    """Ack vector and idempotency"""
+
+    def test_ack_vector(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        items = decode_sync_items(_ndjson(
+            _lead("a"),
+            _lead("a"),               # same key twice in one request
+            _lead("b", form_id=3),    # another company's form, no grant
+            _lead("c", form_id=999),  # unknown form
+            _lead("d", form_id=2, is_demo=True),
+        ) + b"\n[]", None, offset=0)
+
+        result = append_sync_items(db, upload, 0, items, USER, MEMBERSHIPS)
+        assert _statuses(result) == [ACK_STORED, ACK_DUPLICATE, ACK_REJECTED, ACK_REJECTED, ACK_STORED, ACK_REJECTED]
+        assert (result.acks[2].error, result.acks[3].error) == ("Access denied", "Form not found")
+        assert result.committed_items == 6
+
+        state = get_sync_upload(db, upload.upload_id)
+        assert (state.committed_items, state.stored_items, state.duplicate_items, state.rejected_items) == (6, 2, 1, 3)
+        assert db.query(FormSubmission).count() == 2
+
+    def test_granted_form_accepted(self, db):
+        db.add(FormEffectiveAccess(UserID=USER_ID, FormID=3, Permission=FORM_SUBMIT))
+        db.commit()
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        assert _statuses(_append(db, upload, 0, _lead("a", form_id=3))) == [ACK_STORED]
+        assert db.scalar(select(FormSubmission.CompanyID)) == OTHER_COMPANY_ID
+
+    def test_revoked_membership_denied(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        # Removed from the upload's company after opening it
+        revoked = active_memberships(USER, OTHER_COMPANY_ID)
+        result = append_sync_items(db, upload, 0, decode_sync_items(_ndjson(_lead("a")), None, 0), USER, revoked)
+        assert _statuses(result) == [ACK_REJECTED]
+        assert result.acks[0].error == "Access denied"
+
+    def test_resent_leads_not_stored_twice(self, db):
+        first = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        _append(db, first, 0, _lead("a"), _lead("b"))
+
+        # Response was lost; the device re-sends its queue in a new upload
+        second = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        result = _append(db, second, 0, _lead("a"), _lead("b"), _lead("c"))
+        assert _statuses(result) == [ACK_DUPLICATE, ACK_DUPLICATE, ACK_STORED]
+        assert db.query(FormSubmission).count() == 3
+
+        stored = db.scalars(select(FormSubmission.ClientKey).order_by(FormSubmission.FormSubmissionID)).all()
+        assert stored[0] == client_key_digest(COMPANY_ID, "a") and len(stored[0]) == 16
+
+    def test_one_transaction_per_chunk(self, db, monkeypatch):
+        monkeypatch.setattr(sync_service, "SYNC_CHUNK_SIZE", 2)
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        items = decode_sync_items(_ndjson(*[_lead(f"k{n}", form_id=1 + n % 2) for n in range(6)]), None, 0)
+        sync_service.get_submission_target(db, 1)
+        sync_service.get_submission_target(db, 2)
+
+        statements = db.info["statements"]
+        statements.clear()
+        append_sync_items(db, upload, 0, items, USER, MEMBERSHIPS)
+        # Per chunk: key lookup, submission INSERT, outbox INSERT, progress UPDATE
+        kinds = [s.split()[0] for s in statements]
+        assert kinds == ["SELECT", "INSERT", "INSERT", "UPDATE"] * 3
+
+    def test_key_race_retries_chunk(self, db, monkeypatch):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        # Another device stores "a" after our key lookup ran
+        real = sync_service._existing_keys_statement
+        calls = []
+
+        def _stale_lookup(keys):
+            calls.append(keys)
+            if len(calls) == 1:
+                db.execute(FormSubmission.__table__.insert(), [{
+                    "FormID": 1, "CompanyID": COMPANY_ID, "IsDemo": False, "SubmissionData": "{}",
+                    "SubmittedDate": datetime.utcnow(), "ClientKey": client_key_digest(COMPANY_ID, "a"),
+                }])
+                db.commit()
+                return real([b"-"])
+            return real(keys)
+
+        monkeypatch.setattr(sync_service, "_existing_keys_statement", _stale_lookup)
+        result = _append(db, upload, 0, _lead("a"), _lead("b"))
+        assert _statuses(result) == [ACK_DUPLICATE, ACK_STORED]
+        assert db.query(FormSubmission).count() == 2
+
+    def test_counters_reach_form(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        _append(db, upload, 0, _lead("a"), _lead("b"), _lead("b"))
+        drain_kpi_outbox(db)
+        db.expire_all()
+        assert db.get(Form, 1).TotalSubmissions == 2
+
+
+class TestResume:
+    """Resumable uploads"""
+
+    def test_resume_after_lost_response(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        _append(db, upload, 0, _lead("a"), _lead("b"))
+
+        # The device did not see the response and re-sends from 0 with more items
+        upload = get_sync_upload(db, upload.upload_id)
+        statements = db.info["statements"]
+        statements.clear()
+        result = _append(db, upload, 0, _lead("a"), _lead("b"), _lead("c"))
+        assert _statuses(result) == [ACK_DUPLICATE, ACK_DUPLICATE, ACK_STORED]
+        assert result.committed_items == 3
+        # Only the new item's chunk touched the database
+        assert sum(1 for s in statements if s.startswith("INSERT")) == 2
+
+    def test_gap_is_conflict(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        with pytest.raises(SyncConflictError) as exc:
+            _append(db, upload, 3, _lead("a"))
+        assert exc.value.committed_items == 0
+
+    def test_concurrent_append_is_conflict(self, db):
+        upload = open_sync_upload(db, COMPANY_ID, USER_ID, "tablet-1")
+        _append(db, upload, 0, _lead("a"))
+
+        # A second request read the upload before the first committed
+        with pytest.raises(SyncConflictError) as exc:
+            _append(db, upload, 0, _lead("x"), _lead("y"))
+        assert exc.value.committed_items == 0
+        assert db.query(FormSubmission).count() == 1
+        assert get_sync_upload(db, upload.upload_id).committed_items == 1
+
+
+class TestSyncRoutes:
+    """/api/forms/sync/uploads"""
+
+    @pytest.fixture
+    def url(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'sync.db'}"
+        _build_engine(url).dispose()
+        return url
+
+    def test_upload_resumed_over_http(self, url):
+        with route_client(router, url, USER) as client:
+            response = client.post("/api/forms/sync/uploads", json={"company_id": COMPANY_ID, "device_id": "tablet-1"})
+            assert response.status_code == 201
+            upload_id = response.json()["upload_id"]
+
+            response = client.post(
+                f"/api/forms/sync/uploads/{upload_id}/items?offset=0",
+                content=gzip.compress(_ndjson(_lead("a"), _lead("b", form_id=3))),
+                headers={"Content-Encoding": "gzip", "Content-Type": "application/x-ndjson"}
+            )
+            assert response.status_code == 200
+            assert [a["status"] for a in response.json()["acks"]] == [ACK_STORED, ACK_REJECTED]
+
+            response = client.post(f"/api/forms/sync/uploads/{upload_id}/items?offset=5", content=_ndjson(_lead("c")))
+            assert response.status_code == 409
+            assert response.json()["detail"]["committed_items"] == 2
+
+            progress = client.get(f"/api/forms/sync/uploads/{upload_id}").json()
+            assert (progress["committed_items"], progress["stored_items"], progress["rejected_items"]) == (2, 1, 1)
+
+        other = CurrentUser(user_id=8, email="other@example.com", role="company_user", company_id=COMPANY_ID)
+        with route_client(router, url, other) as client:
+            assert client.get(f"/api/forms/sync/uploads/{upload_id}").status_code == 404
+
+    def test_oversized_body_refused(self, url, monkeypatch):
+        monkeypatch.setattr(sys.modules["modules.forms.router"], "MAX_SYNC_BODY_BYTES", 64)
+        body = _ndjson(_lead("a"), _lead("b"))
+
+        with route_client(router, url, USER) as client:
+            upload_id = client.post(
+                "/api/forms/sync/uploads", json={"company_id": COMPANY_ID, "device_id": "tablet-1"}
+            ).json()["upload_id"]
+
+            # Declared length: refused before reading
+            response = client.post(f"/api/forms/sync/uploads/{upload_id}/items?offset=0", content=body)
+            assert response.status_code == 413
+
+            # Chunked: refused once the stream passes the limit
+            response = client.post(
+                f"/api/forms/sync/uploads/{upload_id}/items?offset=0", content=iter([body[:60], body[60:]])
+            )
+            assert response.status_code == 413
+            assert not sync_service.sync_request_slots.locked()
+
+            progress = client.get(f"/api/forms/sync/uploads/{upload_id}").json()
+            assert progress["committed_items"] == 0
+
+    def test_oversized_stream_not_read_to_the_end(self, monkeypatch):
+        forms_router = sys.modules["modules.forms.router"]
+        monkeypatch.setattr(forms_router, "MAX_SYNC_BODY_BYTES", 64)
+        received = []
+
+        async def receive():
+            received.append(len(received))
+            return {"type": "http.request", "body": b"x" * 32, "more_body": len(received) < 10}
+
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(forms_router._read_sync_body(Request({"type": "http", "headers": []}, receive)))
+        assert raised.value.status_code == 413
+        assert len(received) == 3
+
+    def test_open_for_another_company_forbidden(self, url):
+        with route_client(router, url, USER) as client:
+            response = client.post(
+                "/api/forms/sync/uploads", json={"company_id": OTHER_COMPANY_ID, "device_id": "tablet-1"}
+            )
+            assert response.status_code == 403
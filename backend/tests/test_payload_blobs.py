@@ -0,0 +1,331 @@
+"""
+Payload Blob Tests and Benchmark
+
+Covers common.payload_blobs:
+- One log.PayloadBlob row per distinct compact payload; cache hits with no
+  database round trip; LastSeenDate refreshed once the cache entry ages
+- Concurrent writers of the same content converging on one blob
+- Readers resolving blob references, compressed and legacy rows together
+- Request logger storing repeated headers/responses once
+- Retention archiving blob payloads inline and collecting unreferenced blobs
+
+The benchmark replays a request mix with repeated header sets and reference
+data responses and compares bytes stored and write time for per-row
+compressed payloads against deduplicated blobs. Run it directly:
+
+    python -m tests.test_payload_blobs
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.payload_blobs as payload_blobs_module
+from common.log_retention import RetentionResult, expire_batch, expire_payload_blobs, read_archive
+from common.payload_blobs import (
+    PayloadBlobStore,
+    content_hash,
+    expand_payload_rows,
+    payload_columns,
+    session_blob_fetcher,
+)
+from common.payload_codec import PayloadCodec, encode_payload_columns
+from models.log import ApiRequest, PayloadBlob, PayloadDictionary
+from tests.sqlite_support import sqlite_engine
+
+
+NOW = datetime(2026, 3, 10, 12, 0, 0)
+
+
+def _engine():
+    return sqlite_engine([ApiRequest.__table__, PayloadBlob.__table__, PayloadDictionary.__table__])
+
+
+@pytest.fixture
+def engine():
+    engine = _engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def store(engine):
+    return PayloadBlobStore(cache_size=16, codec=PayloadCodec(session_factory=lambda: Session(bind=engine)))
+
+
+@pytest.fixture(autouse=True)
+def _dedup_everything(monkeypatch):
+    monkeypatch.setattr(payload_blobs_module, "PAYLOAD_DEDUP_ENABLED", True)
+    monkeypatch.setattr(payload_blobs_module, "PAYLOAD_BLOB_MIN_BYTES", 0)
+
+
+def _statements(engine):
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+    return executed
+
+
+class TestStore:
+    """Content-addressed writes"""
+
+    def test_same_content_stored_once(self, db, store):
+        first = store.store(db, '{\n  "countries": ["AU", "NZ"]\n}')
+        second = store.store(db, '{"countries":["AU","NZ"]}')
+        other = store.store(db, '{"countries":["AU"]}')
+
+        assert first == second != other
+        assert db.scalar(select(func.count()).select_from(PayloadBlob)) == 2
+        blob = db.get(PayloadBlob, first)
+        assert blob.ContentHash == content_hash('{"countries":["AU","NZ"]}')
+        assert blob.ContentLength == len('{"countries":["AU","NZ"]}')
+        assert store.store(db, None) is None
+
+    def test_cache_hit_skips_database(self, engine, db, store):
+        store.store(db, "same headers")
+        executed = _statements(engine)
+        for _ in range(5):
+            store.store(db, "same headers")
+        assert executed == []
+
+    def test_aged_entry_refreshes_last_seen(self, db, engine):
+        store = PayloadBlobStore(touch_seconds=0, codec=PayloadCodec(session_factory=lambda: Session(bind=engine)))
+        blob_id = store.store(db, "body")
+        db.execute(PayloadBlob.__table__.update().values(LastSeenDate=NOW - timedelta(days=5)))
+        db.commit()
+
+        assert store.store(db, "body") == blob_id
+        assert db.get(PayloadBlob, blob_id, populate_existing=True).LastSeenDate > NOW
+        assert db.scalar(select(func.count()).select_from(PayloadBlob)) == 1
+
+    def test_lru_evicts_oldest(self, engine, db):
+        store = PayloadBlobStore(cache_size=2, codec=PayloadCodec(session_factory=lambda: Session(bind=engine)))
+        for text in ("a", "b", "c"):
+            store.store(db, text)
+        executed = _statements(engine)
+        store.store(db, "c")
+        assert executed == []
+        store.store(db, "a")
+        assert executed
+
+    def test_concurrent_writers_converge(self, engine, store):
+        other = PayloadBlobStore(codec=store._codec)
+        with Session(bind=engine) as first, Session(bind=engine) as second:
+            blob_id = store.store(first, "shared")
+            # Second process: its insert hits the unique hash and falls back to the lookup
+            assert other.store(second, "shared") == blob_id
+            assert second.scalar(select(func.count()).select_from(PayloadBlob)) == 1
+
+
+class TestColumnsAndReaders:
+    """Write columns and read expansion"""
+
+    def test_payload_columns_reference_blobs(self, db, store):
+        columns = payload_columns(db, '{"a": 1}', None, '{"accept":"*/*"}', store)
+        assert columns["RequestPayload"] is columns["ResponsePayload"] is columns["Headers"] is None
+        assert columns["ResponsePayloadBlobID"] is None
+        assert isinstance(columns["RequestPayloadBlobID"], int) and isinstance(columns["HeadersBlobID"], int)
+
+    def test_small_payloads_stay_in_row(self, db, store, monkeypatch):
+        monkeypatch.setattr(payload_blobs_module, "PAYLOAD_BLOB_MIN_BYTES", 16)
+        monkeypatch.setattr("common.payload_codec.PAYLOAD_COMPRESSION_ENABLED", True)
+        columns = payload_columns(db, "{}", '{"countries": ["AU", "NZ"]}', None, store)
+        assert isinstance(columns["RequestPayloadCompressed"], bytes) and columns["RequestPayloadBlobID"] is None
+        assert columns["ResponsePayloadCompressed"] is None and isinstance(columns["ResponsePayloadBlobID"], int)
+
+    def test_dedup_disabled_falls_back_to_row_columns(self, db, store, monkeypatch):
+        monkeypatch.setattr(payload_blobs_module, "PAYLOAD_DEDUP_ENABLED", False)
+        monkeypatch.setattr("common.payload_codec.PAYLOAD_COMPRESSION_ENABLED", False)
+        assert payload_columns(db, "a", "b", "c", store) == {"RequestPayload": "a", "ResponsePayload": "b", "Headers": "c"}
+
+    def test_mixed_rows_expanded_with_one_fetch(self, db, store):
+        codec = store._codec
+        blob_id = store.store(db, '{"theme": "dark"}')
+        rows = [
+            {"ApiRequestID": 1, "RequestPayload": None, "RequestPayloadBlobID": blob_id, "HeadersBlobID": blob_id},
+            {"ApiRequestID": 2, "RequestPayload": None, "RequestPayloadBlobID": blob_id, "HeadersBlobID": None},
+            {"ApiRequestID": 3, "RequestPayload": None, "RequestPayloadBlobID": None,
+             **{k: v for k, v in encode_payload_columns('{"x": 1}', None, None, codec).items() if k.startswith("Request")}},
+            {"ApiRequestID": 4, "RequestPayload": "legacy text", "RequestPayloadBlobID": None},
+            {"ApiRequestID": 5, "RequestPayload": None, "RequestPayloadBlobID": 999},
+        ]
+        fetches = []
+
+        def fetch(ids):
+            fetches.append(ids)
+            return session_blob_fetcher(db)(ids)
+
+        expanded = expand_payload_rows(rows, fetch, codec)
+
+        assert fetches == [[blob_id, 999]]
+        assert [row["RequestPayload"] for row in expanded] == [
+            '{"theme":"dark"}', '{"theme":"dark"}', '{"x":1}', "legacy text", "[MISSING PAYLOAD BLOB 999]",
+        ]
+        assert expanded[0]["Headers"] == '{"theme":"dark"}'
+        assert not any(key.endswith(("BlobID", "Compressed")) for row in expanded for key in row)
+
+    def test_blob_rows_need_a_fetcher(self):
+        with pytest.raises(ValueError):
+            expand_payload_rows([{"RequestPayloadBlobID": 1}])
+
+    def test_model_decoded_payloads(self, db, store, monkeypatch):
+        monkeypatch.setattr("common.payload_codec.payload_codec", store._codec)
+        db.add(ApiRequest(RequestID="r", Method="GET", Path="/", StatusCode=200, DurationMs=1, CreatedDate=NOW,
+                          **payload_columns(db, '{"a": 1}', '{"b": 2}', None, store)))
+        db.commit()
+        request = db.scalars(select(ApiRequest)).one()
+        assert request.decoded_payloads() == {"RequestPayload": '{"a":1}', "ResponsePayload": '{"b":2}', "Headers": None}
+
+
+class TestWritePaths:
+    """Request logger and retention"""
+
+    def test_logger_stores_repeated_payloads_once(self, engine, store, monkeypatch):
+        import common.database
+        import middleware.bulletproof_request_logger as bulletproof
+        from common.request_rollup import RequestRollupBuffer
+
+        monkeypatch.setattr(payload_blobs_module, "payload_blob_store", store)
+        monkeypatch.setattr(common.database, "LogSessionLocal", lambda: Session(bind=engine))
+        monkeypatch.setattr(bulletproof, "request_rollup_buffer", RequestRollupBuffer())
+        middleware = bulletproof.RequestLoggingMiddleware.__new__(bulletproof.RequestLoggingMiddleware)
+        middleware._debug = False
+        for i in range(10):
+            middleware._log_to_database({
+                "request_id": f"r{i}", "method": "GET", "path": "/api/countries", "route": "/api/countries",
+                "query_params": None, "status_code": 200, "duration_ms": 3, "ip_address": None, "user_agent": None,
+                "request_payload": None, "response_payload": '[{"code": "AU"}]', "headers": '{"accept":"*/*"}',
+            })
+
+        with Session(bind=engine) as db:
+            assert db.scalar(select(func.count()).select_from(ApiRequest)) == 10
+            assert db.scalar(select(func.count()).select_from(PayloadBlob)) == 2
+            rows = [dict(row._mapping) for row in db.execute(select(ApiRequest.__table__))]
+            expanded = expand_payload_rows(rows, session_blob_fetcher(db), store._codec)
+        assert {row["ResponsePayload"] for row in expanded} == {'[{"code":"AU"}]'}
+
+    def test_archive_holds_blob_text(self, db, store, tmp_path, monkeypatch):
+        monkeypatch.setattr("common.payload_codec.payload_codec", store._codec)
+        db.add(ApiRequest(RequestID="old", Method="GET", Path="/", StatusCode=200, DurationMs=1,
+                          CreatedDate=NOW - timedelta(days=40), **payload_columns(db, None, '{"a": 1}', None, store)))
+        db.commit()
+
+        expire_batch(db, ApiRequest, NOW - timedelta(days=30), archive_dir=str(tmp_path))
+
+        row = next(read_archive("ApiRequest", archive_dir=str(tmp_path)))
+        assert row["ResponsePayload"] == '{"a":1}'
+        assert "ResponsePayloadBlobID" not in row
+
+    def test_unreferenced_blobs_collected(self, db, store):
+        old_id = store.store(db, "old")
+        recent_id = store.store(db, "recent")
+        db.execute(PayloadBlob.__table__.update().where(PayloadBlob.PayloadBlobID == old_id)
+                   .values(LastSeenDate=NOW - timedelta(days=31, hours=2)))
+        db.execute(PayloadBlob.__table__.update().where(PayloadBlob.PayloadBlobID == recent_id)
+                   .values(LastSeenDate=NOW - timedelta(days=30, minutes=30)))
+        db.commit()
+        cutoff = NOW - timedelta(days=30)
+
+        assert expire_payload_blobs(db, RetentionResult(table="ApiRequest", cutoff=cutoff, complete=False)) is None
+        assert expire_payload_blobs(db, RetentionResult(table="ApiRequest", cutoff=None)) is None
+        result = expire_payload_blobs(db, RetentionResult(table="ApiRequest", cutoff=cutoff), batch_size=1)
+
+        assert result.deleted == 1
+        assert db.scalars(select(PayloadBlob.PayloadBlobID)).all() == [recent_id]
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def _request_mix(count: int, seed: int = 5):
+    """(request body, response body, headers) shaped like production traffic"""
+    rng = random.Random(seed)
+    browsers = [
+        json.dumps({"host": "api.eventlead.com.au", "accept": "application/json", "user-agent": f"Mozilla/5.0 Browser/{v}",
+                    "origin": "https://app.eventlead.com.au", "authorization": "[REDACTED]", "cookie": "[REDACTED]"})
+        for v in range(12)
+    ]
+    countries = json.dumps([{"code": c, "name": f"Country {c}"} for c in ("AU", "NZ", "SG", "GB", "US")] * 8)
+    themes = json.dumps({"themes": [{"id": i, "name": f"Theme {i}", "colors": ["#112233", "#445566"]} for i in range(10)]})
+    mix = []
+    for i in range(count):
+        headers = rng.choice(browsers)
+        roll = rng.random()
+        if roll < 0.4:
+            mix.append((None, countries, headers))
+        elif roll < 0.6:
+            mix.append((None, themes, headers))
+        else:
+            body = json.dumps({"EventID": rng.randrange(10 ** 5), "Name": f"Expo {rng.randrange(10 ** 4)}"})
+            mix.append((body, json.dumps({"success": True, "data": json.loads(body)}), headers))
+    return mix
+
+
+def run_benchmark(count: int = 5000) -> dict:
+    """
+    Bytes stored and write time, per-row compressed payloads vs blobs.
+
+    Returns:
+        Dict with inline_bytes, dedup_bytes, blobs, inline_seconds, dedup_seconds
+    """
+    mix = _request_mix(count)
+    results = {}
+    for mode in ("inline", "dedup"):
+        engine = _engine()
+        codec = PayloadCodec(session_factory=lambda: Session(bind=engine))
+        store = PayloadBlobStore(codec=codec)
+        started = time.perf_counter()
+        with Session(bind=engine) as db:
+            for i, (request_body, response_body, headers) in enumerate(mix):
+                if mode == "inline":
+                    columns = encode_payload_columns(request_body, response_body, headers, codec)
+                else:
+                    columns = payload_columns(db, request_body, response_body, headers, store)
+                db.add(ApiRequest(RequestID=f"r{i}", Method="GET", Path="/api", StatusCode=200, DurationMs=1,
+                                  CreatedDate=NOW, **columns))
+                db.commit()
+            results[f"{mode}_seconds"] = time.perf_counter() - started
+            payload_bytes = db.scalar(select(
+                func.coalesce(func.sum(func.length(ApiRequest.RequestPayloadCompressed)), 0)
+                + func.coalesce(func.sum(func.length(ApiRequest.ResponsePayloadCompressed)), 0)
+                + func.coalesce(func.sum(func.length(ApiRequest.HeadersCompressed)), 0)
+            ))
+            reference_bytes = 8 * db.scalar(select(
+                func.count(ApiRequest.RequestPayloadBlobID) + func.count(ApiRequest.ResponsePayloadBlobID)
+                + func.count(ApiRequest.HeadersBlobID)
+            ))
+            blob_bytes = db.scalar(select(func.coalesce(func.sum(func.length(PayloadBlob.Content) + 16), 0)))
+            results[f"{mode}_bytes"] = payload_bytes + reference_bytes + blob_bytes
+            if mode == "dedup":
+                results["blobs"] = db.scalar(select(func.count()).select_from(PayloadBlob))
+        engine.dispose()
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_dedup_stores_less():
+    results = run_benchmark(count=1500)
+    assert results["dedup_bytes"] * 2 < results["inline_bytes"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"per-row compressed  {results['inline_bytes']:10d} bytes  {results['inline_seconds']:6.2f} s")
+    print(f"deduplicated blobs  {results['dedup_bytes']:10d} bytes  {results['dedup_seconds']:6.2f} s  ({results['blobs']} blobs)")
@@ -0,0 +1,333 @@
+"""
+Payload Codec Tests and Benchmark
+
+Covers common.payload_codec:
+- Frame round trips with and without a dictionary, compact JSON, text and
+  truncated bodies passed through unchanged
+- A trained dictionary shrinking small payloads; older dictionaries still
+  decoding after retraining
+- zstd frames, and zlib frames still decoding once zstandard is installed
+- Readers expanding compressed columns and passing legacy text rows through
+- Request logger write path and retention archives storing text
+
+The benchmark compares the previous storage (indented JSON in NVARCHAR, i.e.
+UTF-16) with compact, dictionary-compressed frames on a generated corpus of
+API payloads, and measures encode/decode throughput. Run it directly:
+
+    python -m tests.test_payload_codec
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import common.payload_codec as payload_codec_module
+from common.payload_codec import (
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    PayloadCodec,
+    build_zlib_dictionary,
+    compact_json,
+    decode_payload_columns,
+    default_codec,
+    encode_payload_columns,
+    train_payload_dictionary,
+)
+from models.log import ApiRequest, PayloadBlob, PayloadDictionary
+from tests.sqlite_support import sqlite_engine
+
+
+@pytest.fixture
+def engine():
+    engine = sqlite_engine([ApiRequest.__table__, PayloadBlob.__table__, PayloadDictionary.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(bind=engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def codec(engine):
+    return PayloadCodec(session_factory=lambda: Session(bind=engine))
+
+
+@pytest.fixture
+def zlib_only(monkeypatch):
+    """A server without zstandard"""
+    monkeypatch.setattr(payload_codec_module, "zstandard", None)
+
+
+@pytest.fixture
+def zstd():
+    return pytest.importorskip("zstandard")
+
+
+def _corpus(count: int, seed: int = 3):
+    """Request/response bodies shaped like the API's (events, leads, forms)"""
+    rng = random.Random(seed)
+    bodies = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            body = {
+                "EventID": rng.randrange(10 ** 5), "EventName": f"Expo {rng.randrange(100)}",
+                "StartDate": "2026-03-%02dT09:00:00" % rng.randrange(1, 29), "Venue": {"City": rng.choice(["Sydney", "Melbourne", "Perth"]), "State": "NSW"},
+                "IsPublished": rng.random() < 0.5, "Tags": rng.sample(["expo", "b2b", "tech", "health"], 2),
+            }
+        elif kind == 1:
+            body = {
+                "items": [
+                    {"SubmissionID": rng.randrange(10 ** 6), "FormID": rng.randrange(100), "Email": f"lead{rng.randrange(10 ** 4)}@example.com",
+                     "Answers": {"company": f"Acme {rng.randrange(500)}", "interest": rng.choice(["high", "medium", "low"])},
+                     "CreatedDate": "2026-03-10T10:%02d:00" % rng.randrange(60)}
+                    for _ in range(rng.randrange(1, 6))
+                ],
+                "next_cursor": None, "has_more": False, "limit": 50,
+            }
+        else:
+            body = {"success": True, "message": "Form saved", "data": {"FormID": rng.randrange(100), "Version": rng.randrange(10), "Status": "draft"}}
+        bodies.append(json.dumps(body, indent=2))
+    return bodies
+
+
+class TestFrames:
+    """Encoding and decoding"""
+
+    def test_round_trip_compacts_json(self, codec):
+        text = json.dumps({"name": "Ünïcode ✓", "items": [1, 2, {"a": None}]}, indent=2)
+        frame = codec.encode(text)
+        assert isinstance(frame, bytes) and frame[0] == default_codec()
+        assert codec.decode(frame) == '{"name":"Ünïcode ✓","items":[1,2,{"a":null}]}'
+        assert json.loads(codec.decode(frame)) == json.loads(text)
+
+    def test_non_json_and_truncated_kept_verbatim(self, codec):
+        for text in ("plain text body", '{"a": 1, "b": "cut off... [TRUNCATED - original size: 90 KB]', ""):
+            assert codec.decode(codec.encode(text)) == text
+        assert compact_json(" [1, 2]") == "[1,2]"
+
+    def test_none_and_legacy_text(self, codec):
+        assert codec.encode(None) is None
+        assert codec.decode(None) is None
+        assert codec.decode('{"legacy": true}') == '{"legacy": true}'
+
+    def test_unknown_codec_rejected(self, codec):
+        with pytest.raises(ValueError):
+            codec.decode(b"\x09\x00\x00data")
+
+
+class TestDictionaries:
+    """Shared dictionaries"""
+
+    def test_dictionary_improves_small_payloads(self, codec, zlib_only):
+        corpus = _corpus(400)
+        baseline = sum(len(codec.encode(body)) for body in corpus[200:])
+        codec.register(1, CODEC_ZLIB, build_zlib_dictionary(corpus[:200]))
+        with_dictionary = sum(len(codec.encode(body)) for body in corpus[200:])
+        assert with_dictionary < baseline * 0.8
+
+    def test_trained_dictionary_stored_and_old_frames_still_decode(self, db, codec):
+        corpus = _corpus(60)
+        db.add_all([
+            ApiRequest(RequestID=f"r{i}", Method="POST", Path="/api/forms", StatusCode=200, DurationMs=5,
+                       CreatedDate=datetime(2026, 3, 10), **encode_payload_columns(body, body, None, codec))
+            for i, body in enumerate(corpus)
+        ])
+        db.commit()
+        old_frame = codec.encode(corpus[0])
+
+        first = train_payload_dictionary(db, codec=codec)
+        second = train_payload_dictionary(db, codec=codec)
+
+        assert (first, second) == (1, 2)
+        assert codec.active_dictionary_id == 2
+        active = db.scalars(select(PayloadDictionary.PayloadDictionaryID).where(PayloadDictionary.IsActive)).all()
+        assert active == [2]
+        new_frame = codec.encode(corpus[0])
+        assert int.from_bytes(new_frame[1:3], "big") == 2
+
+        # A fresh process loads every dictionary from the table
+        reader = PayloadCodec(session_factory=codec._session_factory)
+        assert reader.decode(old_frame) == reader.decode(new_frame) == compact_json(corpus[0])
+
+    def test_too_few_samples(self, db, codec):
+        assert train_payload_dictionary(db, codec=codec) is None
+
+
+class TestZstd:
+    """zstd frames and moving from zlib"""
+
+    def test_zstd_frames_with_trained_dictionary(self, codec, zstd):
+        corpus = _corpus(400)
+        assert default_codec() == CODEC_ZSTD
+        baseline = sum(len(codec.encode(body)) for body in corpus[200:])
+        codec.register(1, CODEC_ZSTD, payload_codec_module.build_dictionary(corpus[:200]))
+
+        frames = [codec.encode(body) for body in corpus[200:]]
+        assert all(frame[0] == CODEC_ZSTD and int.from_bytes(frame[1:3], "big") == 1 for frame in frames)
+        assert sum(len(frame) for frame in frames) < baseline * 0.8
+        assert [codec.decode(frame) for frame in frames] == [compact_json(body) for body in corpus[200:]]
+
+    def test_zlib_frames_decode_after_zstd_installed(self, zstd, monkeypatch):
+        corpus = _corpus(200)
+        zlib_dictionary = build_zlib_dictionary(corpus[:100])
+        monkeypatch.setattr(payload_codec_module, "zstandard", None)
+        old_server = PayloadCodec(session_factory=None)
+        old_server.register(1, CODEC_ZLIB, zlib_dictionary)
+        zlib_frame = old_server.encode(corpus[150])
+        monkeypatch.setattr(payload_codec_module, "zstandard", zstd)
+
+        # The zlib dictionary is known but never used to encode zstd frames
+        new_server = PayloadCodec(session_factory=None)
+        new_server.register(1, CODEC_ZLIB, zlib_dictionary)
+        assert new_server.active_dictionary_id == 0
+        new_server.register(2, CODEC_ZSTD, payload_codec_module.build_dictionary(corpus[:100]))
+        zstd_frame = new_server.encode(corpus[150])
+
+        assert (zlib_frame[:3], zstd_frame[:3]) == (bytes([CODEC_ZLIB, 0, 1]), bytes([CODEC_ZSTD, 0, 2]))
+        assert new_server.decode(zlib_frame) == new_server.decode(zstd_frame) == compact_json(corpus[150])
+
+    def test_zstd_frame_without_zstandard(self, codec, zstd, monkeypatch):
+        frame = codec.encode('{"a": 1}')
+        monkeypatch.setattr(payload_codec_module, "zstandard", None)
+        with pytest.raises(ValueError):
+            codec.decode(frame)
+
+
+class TestReaders:
+    """Row expansion for readers"""
+
+    def test_compressed_and_legacy_rows(self, codec, monkeypatch):
+        monkeypatch.setattr(payload_codec_module, "PAYLOAD_COMPRESSION_ENABLED", True)
+        row = {"ApiRequestID": 1, "RequestPayload": None, "ResponsePayload": None, "Headers": None}
+        row.update(encode_payload_columns('{"a": 1}', None, '{"accept": "*/*"}', codec))
+        assert decode_payload_columns(row, codec) == {
+            "ApiRequestID": 1, "RequestPayload": '{"a":1}', "ResponsePayload": None, "Headers": '{"accept":"*/*"}',
+        }
+        legacy = {"RequestPayload": '{"a": 1}', "RequestPayloadCompressed": None}
+        assert decode_payload_columns(legacy, codec) == {"RequestPayload": '{"a": 1}'}
+
+    def test_compression_disabled_writes_text(self, codec, monkeypatch):
+        monkeypatch.setattr(payload_codec_module, "PAYLOAD_COMPRESSION_ENABLED", False)
+        assert encode_payload_columns("a", "b", "c", codec) == {"RequestPayload": "a", "ResponsePayload": "b", "Headers": "c"}
+
+    def test_model_decoded_payloads(self, db, codec, monkeypatch):
+        monkeypatch.setattr(payload_codec_module, "payload_codec", codec)
+        request = ApiRequest(RequestID="r", Method="GET", Path="/", StatusCode=200, DurationMs=1,
+                             ResponsePayload="legacy", RequestPayloadCompressed=codec.encode('{"x": 2}'))
+        assert request.decoded_payloads() == {"RequestPayload": '{"x":2}', "ResponsePayload": "legacy", "Headers": None}
+
+
+class TestWritePaths:
+    """Request logger and retention"""
+
+    def test_bulletproof_logger_writes_compressed_columns(self, engine, codec, monkeypatch):
+        import common.database
+        import middleware.bulletproof_request_logger as bulletproof
+        from common.request_rollup import RequestRollupBuffer
+        from middleware.bulletproof_request_logger import RequestLoggingMiddleware
+
+        monkeypatch.setattr(payload_codec_module, "PAYLOAD_COMPRESSION_ENABLED", True)
+        monkeypatch.setattr(payload_codec_module, "payload_codec", codec)
+        monkeypatch.setattr("common.payload_blobs.PAYLOAD_DEDUP_ENABLED", False)
+        monkeypatch.setattr(common.database, "LogSessionLocal", lambda: Session(bind=engine))
+        monkeypatch.setattr(bulletproof, "request_rollup_buffer", RequestRollupBuffer())
+        middleware = RequestLoggingMiddleware.__new__(RequestLoggingMiddleware)
+        middleware._debug = False
+        middleware._log_to_database({
+            "request_id": "r1", "method": "POST", "path": "/api/forms", "route": "/api/forms",
+            "query_params": None, "status_code": 201, "duration_ms": 12, "ip_address": None, "user_agent": None,
+            "request_payload": '{\n  "name": "Form"\n}', "response_payload": '{"FormID": 7}', "headers": '{"accept":"*/*"}',
+        })
+
+        with Session(bind=engine) as db:
+            stored = db.execute(select(ApiRequest.__table__)).one()._mapping
+            assert stored["RequestPayload"] is None
+            assert isinstance(stored["RequestPayloadCompressed"], bytes)
+            decoded = decode_payload_columns(dict(stored), codec)
+        assert (decoded["RequestPayload"], decoded["ResponsePayload"]) == ('{"name":"Form"}', '{"FormID":7}')
+
+    def test_retention_archives_decoded_text(self, db, codec, tmp_path, monkeypatch):
+        from common.log_retention import expire_batch, read_archive
+
+        monkeypatch.setattr(payload_codec_module, "payload_codec", codec)
+        db.add(ApiRequest(RequestID="old", Method="GET", Path="/", StatusCode=200, DurationMs=1,
+                          CreatedDate=datetime(2026, 1, 1), RequestPayloadCompressed=codec.encode('{"email": "a@example.com"}')))
+        db.commit()
+
+        expire_batch(db, ApiRequest, datetime(2026, 1, 1) + timedelta(days=1), archive_dir=str(tmp_path))
+
+        row = next(read_archive("ApiRequest", archive_dir=str(tmp_path)))
+        assert row["RequestPayload"] == '{"email":"a@example.com"}'
+        assert "RequestPayloadCompressed" not in row
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(count: int = 3000) -> dict:
+    """
+    Storage and throughput of indented NVARCHAR payloads vs compressed frames.
+
+    The dictionary is trained on the first quarter of the corpus and
+    measured on the rest.
+
+    Returns:
+        Dict with legacy_bytes, compact_bytes, plain_frame_bytes,
+        frame_bytes, encode_mb_s and decode_mb_s
+    """
+    corpus = _corpus(count)
+    training, measured = corpus[:count // 4], corpus[count // 4:]
+    codec = PayloadCodec(session_factory=None)
+    codec._loaded = True
+    plain_frame_bytes = sum(len(codec.encode(body)) for body in measured)
+    codec.register(1, default_codec(), payload_codec_module.build_dictionary(training))
+
+    started = time.perf_counter()
+    frames = [codec.encode(body) for body in measured]
+    encode_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for frame in frames:
+        codec.decode(frame)
+    decode_seconds = time.perf_counter() - started
+
+    raw_mb = sum(len(body.encode("utf-8")) for body in measured) / 1e6
+    return {
+        "legacy_bytes": sum(len(body.encode("utf-16-le")) for body in measured),
+        "compact_bytes": sum(len(compact_json(body).encode("utf-8")) for body in measured),
+        "plain_frame_bytes": plain_frame_bytes,
+        "frame_bytes": sum(len(frame) for frame in frames),
+        "encode_mb_s": raw_mb / encode_seconds,
+        "decode_mb_s": raw_mb / decode_seconds,
+    }
+
+
+@pytest.mark.slow
+def test_benchmark_storage_reduced():
+    results = run_benchmark(count=1000)
+    assert results["frame_bytes"] * 5 < results["legacy_bytes"]
+    assert results["frame_bytes"] < results["plain_frame_bytes"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    legacy = results["legacy_bytes"]
+    for label, key in (("NVARCHAR indented JSON", "legacy_bytes"), ("compact JSON (UTF-8)", "compact_bytes"),
+                       ("compressed, no dictionary", "plain_frame_bytes"), ("compressed + dictionary", "frame_bytes")):
+        print(f"{label:28s} {results[key]:10d} bytes  {legacy / results[key]:5.1f}x")
+    print(f"encode {results['encode_mb_s']:.1f} MB/s, decode {results['decode_mb_s']:.1f} MB/s")
@@ -0,0 +1,223 @@
+"""
+Redaction Engine Tests and Benchmark
+
+Covers common.redaction:
+- One compiled key matcher agreeing with the per-pattern searches
+- Single-pass JSON redaction agreeing with tree redaction on generated
+  documents, preserving formatting, and handling truncated bodies and
+  escaped keys
+- Header / query string / form body redaction
+- Request logger capture paths using the engine
+
+The benchmark compares the previous capture path (json.loads, per-key
+substring scan, json.dumps(indent=2)) with redact_json on 1 KB, 50 KB and
+1 MB bodies. Run it directly for timings:
+
+    python -m tests.test_redaction
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import pytest
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.redaction import (
+    REDACTED,
+    SENSITIVE_FIELD_PATTERNS,
+    is_sensitive_key,
+    redact_body,
+    redact_headers,
+    redact_json,
+    redact_query_string,
+    redact_value,
+)
+
+
+KEYS = [
+    "id", "name", "email", "company", "notes", "answers", "items", "author", "password", "newPassword",
+    "access_token", "refreshToken", "apiKey", "x-api-key", "sessionId", "csrf", "clientSecret", "credentials",
+]
+
+
+def _document(rng, depth=0):
+    kind = rng.random()
+    if depth < 4 and kind < 0.3:
+        return {rng.choice(KEYS): _document(rng, depth + 1) for _ in range(rng.randrange(1, 6))}
+    if depth < 4 and kind < 0.45:
+        return [_document(rng, depth + 1) for _ in range(rng.randrange(0, 4))]
+    return rng.choice([
+        rng.randrange(-1000, 1000), rng.random() * 1e6, True, False, None, "plain",
+        'quote " and \\ backslash', "brackets { [ ] }", '"password": "inside a string"', "ünïcödé ✓",
+    ])
+
+
+class TestKeys:
+    """Compiled key matcher"""
+
+    def test_matches_per_pattern_search(self):
+        for key in KEYS + ["Password", "user_password", "api-key", "authToken", "username", "PWD_HASH", ""]:
+            expected = any(re.search(p, key, re.IGNORECASE) for p in SENSITIVE_FIELD_PATTERNS)
+            assert is_sensitive_key(key) is expected
+
+    def test_decisions_are_cached(self):
+        is_sensitive_key.cache_clear()
+        for _ in range(3):
+            is_sensitive_key("refresh_token")
+        assert is_sensitive_key.cache_info().hits == 2
+
+
+class TestRedactJson:
+    """Single-pass JSON redaction"""
+
+    def test_agrees_with_tree_redaction(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            document = {rng.choice(KEYS): _document(rng) for _ in range(rng.randrange(1, 6))}
+            for indent in (None, 2):
+                text = json.dumps(document, indent=indent, ensure_ascii=rng.random() < 0.5)
+                redacted = redact_json(text)
+                assert json.loads(redacted) == redact_value(document, max_depth=100)
+                assert redact_json(text.encode()) == redacted.encode()
+
+    def test_formatting_preserved(self):
+        text = '{\n  "user":  "a",\n  "password" : "x",\n  "nested": {"token": 1}\n}'
+        assert redact_json(text) == '{\n  "user":  "a",\n  "password" : "[REDACTED]",\n  "nested": {"token": "[REDACTED]"}\n}'
+
+    def test_containers_and_scalars(self):
+        assert redact_json('{"credentials": {"a": [1, {"b": "}"}]}, "ok": 1}') == '{"credentials": "[REDACTED]", "ok": 1}'
+        assert redact_json('[{"pwd": -1.5e3}, {"token": null}]') == '[{"pwd": "[REDACTED]"}, {"token": "[REDACTED]"}]'
+
+    def test_escaped_keys_decoded(self):
+        text = '{"pass\\u0077ord": "leak", "to\\u006ben": {"a": 1}, "n\\"ote": "ok"}'
+        expected = '{"pass\\u0077ord": "[REDACTED]", "to\\u006ben": "[REDACTED]", "n\\"ote": "ok"}'
+        assert redact_json(text) == expected
+        assert redact_json(text.encode()) == expected.encode()
+        assert json.loads(redact_json(text)) == redact_value(json.loads(text))
+
+    def test_sensitive_text_inside_strings_ignored(self):
+        text = '{"note": "\\"password\\": leaked", "list": ["password", "token"]}'
+        assert redact_json(text) == text
+
+    def test_truncated_bodies_still_redacted(self):
+        assert redact_json('{"a": 1, "password": "abc') == '{"a": 1, "password": "[REDACTED]"'
+        assert redact_json('{"token": {"a": [1, 2') == '{"token": "[REDACTED]"'
+        assert redact_json('{"secret": 42') == '{"secret": "[REDACTED]"'
+
+    def test_unchanged_text_returned_as_is(self):
+        text = '{"a": [1, 2, 3]}'
+        assert redact_json(text) is text
+
+
+class TestOtherShapes:
+    """Headers, query strings and bodies"""
+
+    def test_headers(self):
+        headers = {"Authorization": "Bearer x", "Cookie": "sid=1", "X-Api-Key": "k", "Accept": "*/*"}
+        assert redact_headers(headers) == {
+            "Authorization": REDACTED, "Cookie": REDACTED, "X-Api-Key": REDACTED, "Accept": "*/*",
+        }
+
+    def test_query_string(self):
+        assert redact_query_string("a=1&token=abc&flag") == "a=1&token=[REDACTED]&flag"
+        assert redact_query_string(None) is None
+
+    def test_body_by_content_type(self):
+        assert redact_body("user=a&password=b", "application/x-www-form-urlencoded") == "user=a&password=[REDACTED]"
+        assert redact_body(' {"password": "b"}', "text/plain") == ' {"password": "[REDACTED]"}'
+        assert redact_body("password=b", "text/plain") == "password=b"
+
+
+class TestCapturePaths:
+    """Request logger middleware uses the engine"""
+
+    def test_bulletproof_payload_redacted_before_truncation(self):
+        from middleware.bulletproof_request_logger import RequestLoggingMiddleware
+
+        middleware = RequestLoggingMiddleware.__new__(RequestLoggingMiddleware)
+        middleware._debug = False
+        body = json.dumps({"notes": "x" * 3000, "password": "hunter2"})
+        captured = middleware._limit_payload(redact_body(body, "application/json"), 1)
+        assert "hunter2" not in captured
+        assert "[TRUNCATED" in captured
+        assert middleware._sanitize_payload({"apiKey": "k"}) == {"apiKey": REDACTED}
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+_LEGACY_SENSITIVE_FIELDS = {
+    "password", "token", "secret", "api_key", "apikey", "authorization", "auth", "credential",
+    "passwd", "pwd", "private_key", "access_token", "refresh_token", "session_id", "sessionid",
+}
+
+
+def _legacy_sanitize(payload):
+    # Previous BulletproofRequestLoggingMiddleware._sanitize_payload
+    if isinstance(payload, dict):
+        return {
+            key: "***REDACTED***" if any(s in key.lower() for s in _LEGACY_SENSITIVE_FIELDS) else _legacy_sanitize(value)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [_legacy_sanitize(item) for item in payload]
+    return payload
+
+
+def _legacy_capture(body: str) -> str:
+    return json.dumps(_legacy_sanitize(json.loads(body)), indent=2)
+
+
+def _payload(size: int, rng) -> str:
+    def _record():
+        return {
+            "SubmissionID": rng.randrange(10 ** 6), "email": f"user{rng.randrange(1000)}@example.com",
+            "answers": {"q1": "yes", "q2": rng.random(), "notes": "lorem ipsum " * rng.randrange(1, 6)},
+            "access_token": "eyJ" + "a" * 40, "tags": ["lead", "hot"],
+        }
+    records = [_record()]
+    per_record = len(json.dumps(records[0]))
+    records += [_record() for _ in range(size // per_record)]
+    return json.dumps({"items": records, "password": "x"})
+
+
+def run_benchmark(sizes=(1024, 50 * 1024, 1024 * 1024), repeat: int = 20) -> dict:
+    """
+    Time the previous capture path against redact_json per body size.
+
+    Returns:
+        Dict of size -> (legacy_ms, redact_ms) per body
+    """
+    rng = random.Random(2)
+    results = {}
+    for size in sizes:
+        body = _payload(size, rng)
+        runs = max(1, repeat * 1024 // max(1024, size // 16))
+        started = time.perf_counter()
+        for _ in range(runs):
+            _legacy_capture(body)
+        legacy_ms = (time.perf_counter() - started) / runs * 1000
+        started = time.perf_counter()
+        for _ in range(runs):
+            redact_json(body)
+        redact_ms = (time.perf_counter() - started) / runs * 1000
+        results[size] = (legacy_ms, redact_ms)
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_single_pass_faster_than_round_trip():
+    for size, (legacy_ms, redact_ms) in run_benchmark(repeat=5).items():
+        assert redact_ms < legacy_ms, size
+
+
+if __name__ == "__main__":
+    for size, (legacy_ms, redact_ms) in run_benchmark().items():
+        print(f"{size // 1024:5d} KB  loads+sanitize+dumps {legacy_ms:9.3f} ms   redact_json {redact_ms:9.3f} ms")
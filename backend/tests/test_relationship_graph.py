@@ -0,0 +1,177 @@
+"""
+Company Relationship Graph Tests
+
+Covers modules.companies.relationship_graph and the closure maintenance in
+RelationshipService:
+- In-memory adjacency walks (ancestors, descendants, cycle detection)
+- Closure rows written on create_relationship / update_relationship_status
+- Cycle checks via the closure table (including reactivation)
+- Adjacency cache TTL and invalidation
+"""
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from models.company_relationship import CompanyRelationship
+from models.company_relationship_closure import CompanyRelationshipClosure
+from models.form import Form
+from models.form_access_control import FormAccessControl
+from models.ref.company_relationship_type import CompanyRelationshipType
+from modules.companies.relationship_graph import (
+    CompanyGraph,
+    RelationshipEdge,
+    RelationshipGraphCache,
+    closure_rows_for,
+    get_ancestor_ids,
+    get_descendant_ids,
+    is_ancestor,
+)
+from modules.companies.relationship_service import RelationshipService
+from tests.sqlite_support import sqlite_engine
+
+
+USER = SimpleNamespace(UserID=1)
+
+
+def _graph(*pairs, type_name="branch"):
+    return CompanyGraph.from_edges(
+        RelationshipEdge(relationship_id=i, parent_id=p, child_id=c, type_name=type_name)
+        for i, (p, c) in enumerate(pairs, start=1)
+    )
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([
+        CompanyRelationshipType.__table__,
+        CompanyRelationship.__table__,
+        CompanyRelationshipClosure.__table__,
+        # Relationship changes rebuild form grants (modules.forms.access_service)
+        Form.__table__,
+        FormAccessControl.__table__,
+    ], utcnow=lambda: datetime(2025, 1, 1))
+
+    session = Session(bind=engine)
+    for name in ("branch", "subsidiary", "partner"):
+        session.add(CompanyRelationshipType(TypeName=name))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _closure(db):
+    rows = db.execute(select(
+        CompanyRelationshipClosure.AncestorCompanyID,
+        CompanyRelationshipClosure.DescendantCompanyID,
+        CompanyRelationshipClosure.Depth,
+    )).all()
+    return sorted(tuple(r) for r in rows)
+
+
+class TestCompanyGraph:
+    """In-memory adjacency walks"""
+
+    def test_ancestors_and_descendants_with_depth(self):
+        graph = _graph((1, 2), (2, 3), (3, 4))
+        assert graph.ancestors(4) == {3: 1, 2: 2, 1: 3}
+        assert graph.descendants(1) == {2: 1, 3: 2, 4: 3}
+        assert graph.ancestors(1) == {}
+
+    def test_shortest_depth_on_diamond(self):
+        graph = _graph((1, 2), (1, 3), (2, 4), (3, 4), (4, 5))
+        assert graph.ancestors(5) == {4: 1, 2: 2, 3: 2, 1: 3}
+
+    def test_would_create_cycle(self):
+        graph = _graph((1, 2), (2, 3))
+        assert graph.would_create_cycle(3, 1)
+        assert graph.would_create_cycle(2, 2)
+        assert not graph.would_create_cycle(1, 3)
+
+    def test_edges_for(self):
+        graph = _graph((1, 2), (2, 3))
+        assert [(e.parent_id, e.child_id) for e in graph.edges_for(2)] == [(2, 3), (1, 2)]
+
+    def test_closure_rows_for(self):
+        graph = _graph((1, 2), (2, 3))
+        assert sorted(closure_rows_for(graph, [2, 3])) == [(1, 2, 1), (1, 3, 2), (2, 3, 1)]
+
+
+class TestClosureMaintenance:
+    """Closure table kept in sync by RelationshipService"""
+
+    def test_create_builds_transitive_rows(self, db):
+        service = RelationshipService(db)
+        service.create_relationship(1, 2, "branch", USER)
+        service.create_relationship(3, 4, "subsidiary", USER)
+        # Linking two existing chains updates the whole lower subtree
+        service.create_relationship(2, 3, "subsidiary", USER)
+
+        assert _closure(db) == [
+            (1, 2, 1), (1, 3, 2), (1, 4, 3),
+            (2, 3, 1), (2, 4, 2),
+            (3, 4, 1),
+        ]
+        assert get_ancestor_ids(db, 4) == [3, 2, 1]
+        assert get_descendant_ids(db, 1) == [2, 3, 4]
+        assert is_ancestor(db, 1, 4)
+        assert not is_ancestor(db, 4, 1)
+
+    def test_cycle_rejected_via_closure(self, db):
+        service = RelationshipService(db)
+        service.create_relationship(1, 2, "branch", USER)
+        service.create_relationship(2, 3, "branch", USER)
+        with pytest.raises(ValueError, match="circular"):
+            service.create_relationship(3, 1, "branch", USER)
+
+    def test_status_change_removes_and_restores_paths(self, db):
+        service = RelationshipService(db)
+        service.create_relationship(1, 2, "branch", USER)
+        middle = service.create_relationship(2, 3, "branch", USER)
+
+        service.update_relationship_status(middle.CompanyRelationshipID, "suspended", USER)
+        assert _closure(db) == [(1, 2, 1)]
+
+        service.update_relationship_status(middle.CompanyRelationshipID, "active", USER)
+        assert _closure(db) == [(1, 2, 1), (1, 3, 2), (2, 3, 1)]
+
+    def test_reactivation_cycle_rejected(self, db):
+        service = RelationshipService(db)
+        service.create_relationship(1, 2, "branch", USER)
+        link = service.create_relationship(2, 3, "branch", USER)
+        service.update_relationship_status(link.CompanyRelationshipID, "terminated", USER)
+        service.create_relationship(3, 1, "partner", USER)
+
+        with pytest.raises(ValueError, match="circular"):
+            service.update_relationship_status(link.CompanyRelationshipID, "active", USER)
+
+
+class TestRelationshipGraphCache:
+    """Adjacency cache loading and invalidation"""
+
+    def test_cached_until_invalidated(self, db):
+        cache = RelationshipGraphCache()
+        RelationshipService(db).create_relationship(1, 2, "branch", USER)
+
+        graph = cache.get(db)
+        assert graph.edges_for(1)[0].type_name == "branch"
+
+        RelationshipService(db).create_relationship(2, 3, "branch", USER)
+        assert cache.get(db) is graph
+
+        cache.invalidate()
+        assert cache.get(db).descendants(1) == {2: 1, 3: 2}
+
+    def test_ttl_expiry_reloads(self, db):
+        cache = RelationshipGraphCache(ttl_seconds=0)
+        first = cache.get(db)
+        assert cache.get(db) is not first
@@ -174,7 +174,7 @@ def test_log_api_request_database_insert():
     # Mock database session
     mock_db = MagicMock(spec=Session)
     
-    with patch('backend.middleware.request_logger.SessionLocal', return_value=mock_db):
+    with patch('backend.middleware.request_logger.LogSessionLocal', return_value=mock_db):
         log_api_request(log_data)
         
         # Verify database insert
@@ -226,7 +226,7 @@ def test_request_logging_handles_database_error_gracefully():
     mock_db = MagicMock(spec=Session)
     mock_db.commit.side_effect = Exception("Database error")
     
-    with patch('backend.middleware.request_logger.SessionLocal', return_value=mock_db):
+    with patch('backend.middleware.request_logger.LogSessionLocal', return_value=mock_db):
         # Should not raise exception
         log_api_request(log_data)
         
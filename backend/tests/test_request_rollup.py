@@ -0,0 +1,295 @@
+"""
+API Request Rollup Tests and Benchmark
+
+Covers common.request_rollup:
+- Buffer aggregation per minute, method, route template and status class
+- Additive upserts at minute and hour granularity across flushes/buffers
+- Summaries matching the raw log.ApiRequest aggregates
+- Bucket-interpolated percentiles
+- Failed flushes restoring the buffer
+
+The benchmark compares the old full-window scan of log.ApiRequest with the
+rollup read. It only runs under pytest with RUN_BENCHMARKS=1; run the module
+directly for timings:
+
+    python -m tests.test_request_rollup
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.request_rollup import (
+    HOUR,
+    MINUTE,
+    RequestRollupBuffer,
+    RequestRollupWorker,
+    bucket_quantile,
+    endpoint_performance,
+    flush_request_rollup,
+    latency_bucket,
+    performance_summary,
+    performance_timeseries,
+)
+from models.log.api_request import ApiRequest
+from models.log.api_request_rollup import ApiRequestRollup, LATENCY_BUCKET_COLUMNS
+from tests.sqlite_support import sqlite_engine
+
+
+NOW = datetime(2026, 3, 10, 12, 30, 15)
+
+
+@pytest.fixture
+def db():
+    engine = sqlite_engine([ApiRequestRollup.__table__, ApiRequest.__table__])
+    session = Session(bind=engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _rows(db, seconds):
+    return {
+        (row.BucketStart, row.Method, row.PathTemplate, row.StatusClass): row
+        for row in db.scalars(select(ApiRequestRollup).where(ApiRequestRollup.BucketSeconds == seconds))
+    }
+
+
+class TestBuffer:
+    """In-process aggregation"""
+
+    def test_requests_grouped_per_minute_route_and_status_class(self):
+        buffer = RequestRollupBuffer()
+        buffer.add("GET", "/api/forms/{form_id}", 200, 12, at=NOW)
+        buffer.add("GET", "/api/forms/{form_id}", 204, 30, at=NOW + timedelta(seconds=20))
+        buffer.add("GET", "/api/forms/{form_id}", 404, 3, at=NOW)
+        buffer.add("GET", "/api/forms/{form_id}", 200, 7, at=NOW + timedelta(minutes=1))
+
+        entries = buffer.drain()
+        minute = NOW.replace(second=0)
+        stats = entries[(minute, "GET", "/api/forms/{form_id}", 2)]
+        assert (stats.count, stats.total_ms, stats.min_ms, stats.max_ms) == (2, 42, 12, 30)
+        assert entries[(minute, "GET", "/api/forms/{form_id}", 4)].count == 1
+        assert len(entries) == 3
+        assert len(buffer) == 0
+
+    def test_latency_buckets_are_upper_inclusive(self):
+        assert [latency_bucket(ms) for ms in (0, 10, 11, 10000, 10001)] == [0, 0, 1, 9, 10]
+
+
+class TestFlush:
+    """Additive upserts"""
+
+    def test_minute_and_hour_rows(self, db):
+        buffer = RequestRollupBuffer()
+        buffer.add("GET", "/a", 200, 10, at=NOW)
+        buffer.add("GET", "/a", 200, 30, at=NOW + timedelta(minutes=5))
+
+        assert flush_request_rollup(db, buffer) == 3
+
+        minutes = _rows(db, MINUTE)
+        assert len(minutes) == 2
+        hour = _rows(db, HOUR)[(NOW.replace(minute=0, second=0), "GET", "/a", 2)]
+        assert (hour.RequestCount, hour.TotalDurationMs, hour.MinDurationMs, hour.MaxDurationMs) == (2, 40, 10, 30)
+        assert (hour.LatencyLe10, hour.LatencyLe50) == (1, 1)
+
+    def test_flushes_and_buffers_add_up(self, db):
+        first, second = RequestRollupBuffer(), RequestRollupBuffer()
+        first.add("POST", "/b", 500, 40, at=NOW)
+        flush_request_rollup(db, first)
+        # A second worker process flushing into the same buckets
+        second.add("POST", "/b", 503, 5, at=NOW)
+        second.add("POST", "/b", 500, 90, at=NOW)
+        flush_request_rollup(db, second)
+
+        row = _rows(db, MINUTE)[(NOW.replace(second=0), "POST", "/b", 5)]
+        assert (row.RequestCount, row.TotalDurationMs, row.MinDurationMs, row.MaxDurationMs) == (3, 135, 5, 90)
+        assert (row.LatencyLe10, row.LatencyLe50, row.LatencyLe100) == (1, 1, 1)
+        assert flush_request_rollup(db, first) == 0
+
+    def test_failed_flush_restores_buffer(self, db):
+        buffer = RequestRollupBuffer()
+        buffer.add("GET", "/a", 200, 10, at=NOW)
+        ApiRequestRollup.__table__.drop(db.connection())
+        db.commit()
+
+        with pytest.raises(Exception):
+            flush_request_rollup(db, buffer)
+        assert len(buffer) == 1
+
+        ApiRequestRollup.__table__.create(db.connection())
+        db.commit()
+        buffer.add("GET", "/a", 200, 20, at=NOW)
+        flush_request_rollup(db, buffer)
+        assert _rows(db, MINUTE)[(NOW.replace(second=0), "GET", "/a", 2)].RequestCount == 2
+
+    def test_worker_run_once(self, db):
+        buffer = RequestRollupBuffer()
+        buffer.add("GET", "/a", 200, 10, at=NOW)
+        worker = RequestRollupWorker(session_factory=lambda: Session(bind=db.get_bind()), buffer=buffer)
+        assert worker.run_once() == 2
+        assert worker.run_once() == 0
+
+
+class TestReads:
+    """Dashboard summaries"""
+
+    def _record(self, db, samples):
+        buffer = RequestRollupBuffer()
+        for at, method, path, status_code, ms in samples:
+            buffer.add(method, path, status_code, ms, at=at)
+            db.add(ApiRequest(
+                RequestID=f"r{len(db.new)}", Method=method, Path=path, StatusCode=status_code,
+                DurationMs=ms, CreatedDate=at,
+            ))
+        db.commit()
+        flush_request_rollup(db, buffer)
+
+    def _samples(self, count=2000, hours=3):
+        rng = random.Random(7)
+        return [
+            (
+                NOW - timedelta(seconds=rng.randrange(hours * 3600)),
+                "GET",
+                f"/api/route{rng.randrange(4)}",
+                rng.choice((200, 200, 200, 201, 404, 500)),
+                int(rng.lognormvariate(4, 1)),
+            )
+            for _ in range(count)
+        ]
+
+    def test_summary_matches_raw_scan(self, db):
+        self._record(db, self._samples())
+
+        summary = performance_summary(db, hours=2, now=NOW)
+        since = (NOW - timedelta(hours=2)).replace(second=0, microsecond=0)
+        raw = db.execute(select(
+            func.count(),
+            func.max(ApiRequest.DurationMs),
+            func.min(ApiRequest.DurationMs),
+            func.sum(ApiRequest.DurationMs),
+            func.sum(case((ApiRequest.StatusCode >= 400, 1), else_=0)),
+        ).where(ApiRequest.CreatedDate >= since)).one()
+
+        assert summary["bucket_seconds"] == MINUTE
+        assert summary["total_requests"] == raw[0]
+        assert (summary["max_duration_ms"], summary["min_duration_ms"]) == (raw[1], raw[2])
+        assert summary["avg_duration_ms"] == round(raw[3] / raw[0], 2)
+        assert summary["error_count"] == raw[4]
+
+    def test_long_windows_read_hour_buckets(self, db):
+        self._record(db, self._samples(hours=20))
+        summary = performance_summary(db, hours=24, now=NOW)
+        assert summary["bucket_seconds"] == HOUR
+        assert summary["total_requests"] == 2000
+
+    def test_percentiles_within_their_bucket(self, db):
+        samples = self._samples()
+        self._record(db, samples)
+        summary = performance_summary(db, hours=4, now=NOW)
+
+        ordered = sorted(ms for *_, ms in samples)
+        for key, q in (("p50_duration_ms", 0.5), ("p95_duration_ms", 0.95), ("p99_duration_ms", 0.99)):
+            exact = ordered[int(q * len(ordered)) - 1]
+            assert latency_bucket(summary[key]) == latency_bucket(exact) or abs(summary[key] - exact) <= 1
+
+    def test_endpoint_breakdown_and_timeseries(self, db):
+        self._record(db, self._samples())
+        endpoints = endpoint_performance(db, hours=4, limit=2, now=NOW)
+        assert len(endpoints) == 2
+        assert endpoints[0]["total_requests"] >= endpoints[1]["total_requests"]
+
+        series = performance_timeseries(db, hours=1, path_template="/api/route0", now=NOW)
+        assert all(point["bucket_start"] >= NOW - timedelta(hours=1, minutes=1) for point in series)
+        assert sum(point["total_requests"] for point in series) > 0
+
+    def test_empty_window(self, db):
+        summary = performance_summary(db, hours=1, now=NOW)
+        assert summary["total_requests"] == 0
+        assert summary["p99_duration_ms"] == 0.0
+
+    def test_bucket_quantile(self):
+        buckets = [0] * len(LATENCY_BUCKET_COLUMNS)
+        buckets[1] = 10  # ten requests in (10, 25]
+        assert bucket_quantile(buckets, 0.5) == 17.5
+        buckets[-1] = 90
+        assert bucket_quantile(buckets, 0.99, max_ms=42000) == 42000
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(requests: int = 200000, routes: int = 40, hours: int = 24, repeat: int = 5) -> dict:
+    """
+    Time a 24 hour summary: full scan of log.ApiRequest against the rollup.
+
+    Returns:
+        Dict with per-read costs (milliseconds) and row counts
+    """
+    import tempfile
+
+    rng = random.Random(11)
+    payload = "x" * 2000  # request/response bodies make the scan expensive
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine(
+            [ApiRequestRollup.__table__, ApiRequest.__table__], f"sqlite:///{os.path.join(tmp, 'rollup.db')}"
+        )
+        session = Session(bind=engine)
+        buffer = RequestRollupBuffer()
+        rows = []
+        for i in range(requests):
+            at = NOW - timedelta(seconds=rng.randrange(hours * 3600))
+            path = f"/api/route{rng.randrange(routes)}"
+            status_code = rng.choice((200, 200, 200, 404, 500))
+            ms = int(rng.lognormvariate(4, 1))
+            buffer.add("GET", path, status_code, ms, at=at)
+            rows.append({
+                "RequestID": f"r{i}", "Method": "GET", "Path": path, "StatusCode": status_code, "DurationMs": ms,
+                "RequestPayload": payload, "ResponsePayload": payload, "CreatedDate": at,
+            })
+        session.execute(ApiRequest.__table__.insert(), rows)
+        session.commit()
+        flush_request_rollup(session, buffer)
+        rollup_rows = session.scalar(select(func.count()).select_from(ApiRequestRollup))
+
+        since = NOW - timedelta(hours=hours)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            session.execute(select(
+                func.count(), func.avg(ApiRequest.DurationMs), func.max(ApiRequest.DurationMs),
+                func.min(ApiRequest.DurationMs), func.sum(case((ApiRequest.StatusCode >= 400, 1), else_=0)),
+            ).where(ApiRequest.CreatedDate >= since)).one()
+        scan_ms = (time.perf_counter() - started) / repeat * 1000
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            performance_summary(session, hours=hours, now=NOW)
+        rollup_ms = (time.perf_counter() - started) / repeat * 1000
+
+        session.close()
+        engine.dispose()
+    return {"scan_ms": scan_ms, "rollup_ms": rollup_ms, "raw_rows": requests, "rollup_rows": rollup_rows}
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run benchmarks")
+def test_benchmark_rollup_faster_than_scan():
+    result = run_benchmark(requests=50000)
+    assert result["rollup_ms"] * 5 < result["scan_ms"]
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print(f"log.ApiRequest scan ({result['raw_rows']} rows):   {result['scan_ms']:8.2f} ms")
+    print(f"Rollup read ({result['rollup_rows']} rows):        {result['rollup_ms']:8.2f} ms")
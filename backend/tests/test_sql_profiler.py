@@ -0,0 +1,133 @@
+"""
+SQL Profiler and N+1 Detector Tests
+
+Covers common.sql_profiler and middleware.sql_profiler:
+- Statement shape normalization
+- Query counting/timing attributed to the request ID
+- N+1 detection threshold
+- Server-Timing header on sync and async (aiosqlite) endpoints
+"""
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.sql_profiler import (
+    normalize_statement, install_sql_profiler, start_profile, finish_profile, get_current_profile
+)
+from middleware.sql_profiler import SQLProfilerMiddleware
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    install_sql_profiler()
+    yield engine
+    engine.dispose()
+
+
+class TestNormalizeStatement:
+    """normalize_statement()"""
+
+    def test_whitespace_collapsed(self):
+        assert normalize_statement("SELECT  *\n  FROM t\tWHERE id = ?") == "SELECT * FROM t WHERE id = ?"
+
+    def test_in_lists_collapsed(self):
+        a = normalize_statement("SELECT * FROM t WHERE id IN (?, ?, ?)")
+        b = normalize_statement("SELECT * FROM t WHERE id IN (?,?)")
+        assert a == b
+
+    def test_literals_collapsed(self):
+        a = normalize_statement("SELECT TOP 50 * FROM t WHERE name = 'abc'")
+        b = normalize_statement("SELECT TOP 10 * FROM t WHERE name = 'x''y'")
+        assert a == b
+
+
+class TestQueryProfile:
+    """Profiling via engine hooks"""
+
+    def test_queries_counted_only_while_profiling(self, engine):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            profile = start_profile("req-profile-1")
+            conn.execute(text("SELECT 2"))
+            conn.execute(text("SELECT 3"))
+            finish_profile(profile)
+            conn.execute(text("SELECT 4"))
+
+        assert profile.request_id == "req-profile-1"
+        assert profile.query_count == 2
+        assert profile.total_ms >= 0
+        assert get_current_profile() is None
+
+    def test_n_plus_one_flagged_at_threshold(self, engine):
+        profile = start_profile("req-n1")
+        profile.n1_threshold = 3
+        with engine.connect() as conn:
+            for i in range(3):
+                conn.execute(text("SELECT :id"), {"id": i})
+            conn.execute(text("SELECT 1 + 1"))
+        finish_profile(profile)
+
+        repeated = profile.n_plus_one()
+        assert len(repeated) == 1
+        assert repeated[0].count == 3
+        assert "db-n1" in profile.server_timing()
+        assert profile.summary()["n_plus_one"][0]["count"] == 3
+
+    def test_no_n_plus_one_below_threshold(self, engine):
+        profile = start_profile("req-ok")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        finish_profile(profile)
+        assert profile.n_plus_one() == []
+        assert profile.server_timing().startswith('db;dur=')
+
+
+class TestSQLProfilerMiddleware:
+    """Server-Timing header from the middleware"""
+
+    def test_sync_endpoint_server_timing(self, engine):
+        app = FastAPI()
+        app.add_middleware(SQLProfilerMiddleware)
+
+        @app.get("/items")
+        def list_items():
+            with engine.connect() as conn:
+                for i in range(6):
+                    conn.execute(text("SELECT :id"), {"id": i})
+            return {"ok": True}
+
+        response = TestClient(app).get("/items")
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert 'desc="6 queries"' in timing
+        assert "db-n1" in timing
+
+    def test_async_engine_statements_attributed(self):
+        install_sql_profiler()
+        async_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        app = FastAPI()
+        app.add_middleware(SQLProfilerMiddleware)
+
+        @app.get("/async-items")
+        async def list_async_items():
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+            return {"ok": True}
+
+        response = TestClient(app).get("/async-items")
+        assert response.status_code == 200
+        assert 'desc="2 queries"' in response.headers["server-timing"]
@@ -0,0 +1,255 @@
+"""
+Structured Logging Tests and Benchmark
+
+Covers common.logger:
+- JSON lines with request/user/company IDs from the RequestContext, extra
+  fields and exception text
+- Queued records keeping their arguments un-rendered until the listener
+  formats them; a full queue dropping instead of blocking
+- Opt-in per-logger/message rate limiting (optionally for named loggers
+  only), WARNING and above always passing, and the suppressed count
+  reported with the next record let through and once per minute
+
+The benchmark measures the cost on the logging thread of a synchronous
+stdout-style handler (a stream that blocks ~100 us per write) against the
+queue handler. Run it directly:
+
+    python -m tests.test_structured_logging
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+import pytest
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.logger import (
+    JsonFormatter,
+    LogQueueHandler,
+    RateLimitFilter,
+    RequestIDFilter,
+    TextFormatter,
+    get_log_handler,
+    get_logger,
+)
+from common.request_context import clear_request_context, set_request_context
+
+
+def _record(msg="hello %s", args=("world",), level=logging.INFO, name="tests.logging", created=None, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    if created is not None:
+        record.created = created
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.fixture
+def request_context():
+    set_request_context("req-123", user_id=7, company_id=3)
+    yield
+    clear_request_context()
+
+
+class TestFormatters:
+    """JSON and text output"""
+
+    def test_json_includes_request_context(self, request_context):
+        record = _record(order_id=42)
+        RequestIDFilter().filter(record)
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["msg"] == "hello world"
+        assert (entry["request_id"], entry["user_id"], entry["company_id"]) == ("req-123", 7, 3)
+        assert entry["level"] == "INFO" and entry["logger"] == "tests.logging"
+        assert entry["order_id"] == 42
+        assert entry["ts"].endswith("+00:00")
+
+    def test_json_outside_request(self):
+        record = _record()
+        RequestIDFilter().filter(record)
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["request_id"] == "no-request" and entry["user_id"] is None
+
+    def test_exception_text(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("tests.logging", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        assert "ValueError: boom" in entry["exc"]
+
+    def test_text_format_unchanged(self, request_context):
+        record = _record()
+        RequestIDFilter().filter(record)
+        assert TextFormatter().format(record).endswith("[INFO] [req-123] [tests.logging] hello world")
+
+
+class TestQueueHandler:
+    """Deferred formatting"""
+
+    def test_arguments_rendered_by_listener_only(self):
+        rendered = []
+
+        class Expensive:
+            def __str__(self):
+                rendered.append(True)
+                return "expensive"
+
+        handler = LogQueueHandler(queue.Queue())
+        handler.handle(_record("value %s", (Expensive(),)))
+        assert rendered == []
+
+        record = handler.queue.get_nowait()
+        assert JsonFormatter().format(record)
+        assert rendered == [True]
+
+    def test_exception_rendered_before_queueing(self):
+        handler = LogQueueHandler(queue.Queue())
+        try:
+            raise KeyError("missing")
+        except KeyError:
+            handler.handle(logging.LogRecord("tests.logging", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()))
+        record = handler.queue.get_nowait()
+        assert record.exc_info is None and "KeyError" in record.exc_text
+        assert "KeyError" in TextFormatter().format(record)
+
+    def test_full_queue_drops(self):
+        handler = LogQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(_record())
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_listener_writes_records(self):
+        lines = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                lines.append(self.format(record))
+
+        target = ListHandler()
+        target.setFormatter(JsonFormatter())
+        handler = LogQueueHandler(queue.Queue())
+        listener = logging.handlers.QueueListener(handler.queue, target)
+        listener.start()
+        handler.handle(_record("n=%d", (5,)))
+        listener.stop()
+        assert json.loads(lines[0])["msg"] == "n=5"
+
+    def test_get_logger_uses_shared_handler(self):
+        logger = get_logger("tests.structured_logging")
+        assert logger.handlers == [get_log_handler()]
+        assert not logger.propagate
+        assert any(isinstance(f, RequestIDFilter) for f in get_log_handler().filters)
+
+
+class TestRateLimit:
+    """RateLimitFilter"""
+
+    def test_repeats_limited_per_minute(self):
+        limiter = RateLimitFilter(per_minute=3)
+        start = 600 * 60.0
+        passed = [limiter.filter(_record(created=start + i)) for i in range(10)]
+        assert passed == [True] * 3 + [False] * 7
+        # Different message or logger: separate budgets
+        assert limiter.filter(_record("other %s", created=start + 11))
+        assert limiter.filter(_record(name="tests.other", created=start + 12))
+
+        # Next minute: passes again and reports what was dropped
+        record = _record(created=start + 61)
+        assert limiter.filter(record)
+        assert record.suppressed == 7
+        assert "[7 similar messages suppressed]" in TextFormatter().format(record)
+        assert json.loads(JsonFormatter().format(record))["suppressed"] == 7
+
+    def test_warnings_never_limited(self):
+        limiter = RateLimitFilter(per_minute=1)
+        assert all(limiter.filter(_record(level=logging.WARNING, created=60.0)) for _ in range(5))
+
+    def test_disabled(self):
+        limiter = RateLimitFilter(per_minute=0)
+        assert all(limiter.filter(_record(created=60.0)) for _ in range(500))
+
+    def test_off_by_default(self):
+        assert not any(isinstance(f, RateLimitFilter) for f in get_log_handler().filters)
+
+    def test_only_named_loggers_limited(self):
+        limiter = RateLimitFilter(per_minute=1, loggers=["tests.noisy"])
+        assert [limiter.filter(_record(name="tests.noisy.child", created=60.0)) for _ in range(3)] == [True, False, False]
+        assert all(limiter.filter(_record(name="tests.audit", created=60.0)) for _ in range(3))
+        assert all(limiter.filter(_record(name="tests.noisyish", created=60.0)) for _ in range(3))
+
+    def test_suppressed_total_reported_each_minute(self):
+        reports = []
+        limiter = RateLimitFilter(per_minute=1, report=lambda records, messages: reports.append((records, messages)))
+        for i in range(4):
+            limiter.filter(_record(created=60.0 + i))
+            limiter.filter(_record("other %s", created=60.0 + i))
+        assert reports == []
+        limiter.filter(_record("unrelated", created=125.0))
+        assert reports == [(6, 2)]
+        limiter.filter(_record("unrelated", created=190.0))
+        assert reports == [(6, 2)]
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+class _SlowStream:
+    """Stand-in for a contended stdout: each write blocks ~100 us (GIL released)"""
+
+    def write(self, text):
+        time.sleep(100e-6)
+
+    def flush(self):
+        pass
+
+
+def run_benchmark(count: int = 10000):
+    """Microseconds per INFO call on the logging thread"""
+    results = {}
+    for label in ("stream", "queue"):
+        logger = logging.getLogger(f"tests.logging.bench.{label}")
+        logger.handlers.clear()
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        stream_handler = logging.StreamHandler(_SlowStream())
+        stream_handler.setFormatter(JsonFormatter())
+        listener = None
+        if label == "queue":
+            handler = LogQueueHandler(queue.Queue(maxsize=count))
+            listener = logging.handlers.QueueListener(handler.queue, stream_handler)
+            listener.start()
+        else:
+            handler = stream_handler
+        handler.addFilter(RequestIDFilter())
+        logger.addHandler(handler)
+
+        started = time.perf_counter()
+        for i in range(count):
+            logger.info("Cache hit: %s search for '%s' returned %d results", "abn", "51824753556", i)
+        results[label] = (time.perf_counter() - started) / count * 1e6
+        if listener is not None:
+            listener.stop()
+        logger.handlers.clear()
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_queue_unblocks_caller():
+    results = run_benchmark(count=2000)
+    assert results["queue"] * 2 < results["stream"]
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    for label, us in results.items():
+        print(f"{label:8s} {us:6.2f} us/call on the logging thread")
@@ -0,0 +1,286 @@
+"""
+Request Timing Span Tests
+
+Covers common.timing and middleware.timing:
+- Nested spans, traced() on sync and async functions, no-op outside a trace
+- SQL statements recorded as spans under the enclosing span, through the
+  cursor hooks shared with the SQL profiler
+- Span cap keeping the Server-Timing totals complete
+- Server-Timing header and request ID on sync and async endpoints
+- OTLP/JSON export to a file, off the request path
+
+The benchmark measures the per-call cost of traced() inside and outside a
+trace. Run it directly:
+
+    python -m tests.test_timing
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import middleware.timing as timing_middleware
+from common.security import hash_password, verify_password
+from common.sql_profiler import finish_profile, install_sql_profiler, start_profile
+from common.timing import (
+    SpanExporter,
+    finish_trace,
+    get_current_trace,
+    install_timing_hooks,
+    span,
+    start_trace,
+    traced,
+)
+from middleware.timing import TimingMiddleware
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    install_timing_hooks()
+    yield engine
+    engine.dispose()
+
+
+@traced("lookup")
+def _lookup(value):
+    return value * 2
+
+
+@traced("remote")
+async def _remote(value):
+    await asyncio.sleep(0)
+    return value + 1
+
+
+class TestSpans:
+    """span() / traced()"""
+
+    def test_nested_spans_and_parents(self):
+        trace = start_trace("GET /x", request_id="req-1")
+        with span("outer", kind="test") as outer:
+            assert _lookup(2) == 4
+        finish_trace(trace)
+
+        assert get_current_trace() is None
+        by_name = {s.name: s for s in trace.spans}
+        assert by_name["lookup"].parent_id == outer.span_id
+        assert by_name["outer"].parent_id is None
+        assert by_name["outer"].attributes == {"kind": "test"}
+        assert by_name["outer"].duration_ns >= by_name["lookup"].duration_ns
+        assert trace.duration_ns > 0
+
+    def test_async_traced(self):
+        async def run():
+            trace = start_trace()
+            assert await _remote(1) == 2
+            return finish_trace(trace)
+
+        trace = asyncio.run(run())
+        assert [s.name for s in trace.spans] == ["remote"]
+
+    def test_no_trace_is_a_noop(self):
+        with span("idle") as current:
+            assert current is None
+        assert _lookup(3) == 6
+
+    def test_errors_recorded(self):
+        trace = start_trace()
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        finish_trace(trace)
+        assert trace.spans[0].attributes["error"] == "ValueError"
+
+    def test_bcrypt_instrumented(self):
+        hashed = hash_password("Secret123!", rounds=4)
+        trace = start_trace()
+        assert verify_password("Secret123!", hashed)
+        finish_trace(trace)
+        assert trace.totals["bcrypt"][0] == 1
+
+    def test_span_cap_keeps_totals(self):
+        trace = start_trace()
+        trace.max_spans = 3
+        for i in range(5):
+            _lookup(i)
+        finish_trace(trace)
+        assert len(trace.spans) == 3 and trace.dropped == 2
+        assert trace.totals["lookup"][0] == 5
+        assert 'lookup;dur=' in trace.server_timing() and 'desc="5x"' in trace.server_timing()
+
+
+class TestSqlSpans:
+    """Engine hooks"""
+
+    def test_statements_recorded_while_tracing(self, engine):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            trace = start_trace()
+            with span("repository") as outer:
+                conn.execute(text("SELECT  2"))
+                conn.execute(text("SELECT 3"))
+            finish_trace(trace)
+            conn.execute(text("SELECT 4"))
+
+        sql = [s for s in trace.spans if s.name == "sql"]
+        assert [s.attributes["db.statement"] for s in sql] == ["SELECT 2", "SELECT 3"]
+        assert all(s.parent_id == outer.span_id for s in sql)
+        assert trace.totals["sql"][0] == 2
+
+    def test_profiler_shares_the_hooks(self, engine):
+        install_sql_profiler()
+        with engine.connect() as conn:
+            profile = start_profile("req-1")
+            trace = start_trace()
+            conn.execute(text("SELECT 1"))
+            finish_trace(trace)
+            conn.execute(text("SELECT 2"))
+            finish_profile(profile)
+
+        assert trace.totals["sql"][0] == 1
+        assert profile.query_count == 2
+
+    def test_failed_statement_leaves_no_start_time(self, engine):
+        traces = []
+
+        def start_mid_statement(conn, cursor, statement, parameters, context, executemany):
+            # Registered after the shared hooks: the trace starts once the statement is under way
+            if statement == "SELECT 2":
+                traces.append(start_trace())
+
+        with engine.connect() as conn:
+            trace = start_trace()
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            finish_trace(trace)
+            conn.rollback()
+
+            event.listen(engine, "before_cursor_execute", start_mid_statement)
+            try:
+                conn.execute(text("SELECT 2"))
+            finally:
+                event.remove(engine, "before_cursor_execute", start_mid_statement)
+            finish_trace(traces[0])
+
+        # Neither statement was timed from start to end
+        assert "sql" not in trace.totals and "sql" not in traces[0].totals
+
+
+class TestTimingMiddleware:
+    """Server-Timing header and export"""
+
+    @pytest.fixture
+    def app(self, engine, tmp_path, monkeypatch):
+        exporter = SpanExporter(path=str(tmp_path / "spans.jsonl"), url="")
+        monkeypatch.setattr(timing_middleware, "span_exporter", exporter)
+        app = FastAPI()
+
+        @app.get("/sync/{item_id}")
+        def sync_endpoint(item_id: int):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return {"value": _lookup(item_id)}
+
+        @app.get("/async")
+        async def async_endpoint():
+            return {"value": await _remote(1)}
+
+        class RequestIdMiddleware:
+            # Stands in for the request logger, which sets the ID inside
+            def __init__(self, inner):
+                self.inner = inner
+
+            async def __call__(self, scope, receive, send):
+                scope["request_id"] = "req-abc"
+                await self.inner(scope, receive, send)
+
+        app.add_middleware(RequestIdMiddleware)
+        app.add_middleware(TimingMiddleware)
+        return app, exporter, tmp_path / "spans.jsonl"
+
+    def test_sync_endpoint_server_timing(self, app):
+        app, exporter, _ = app
+        response = TestClient(app).get("/sync/2")
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert "sql;dur=" in timing and "lookup;dur=" in timing and "total;dur=" in timing
+
+    def test_async_endpoint_server_timing(self, app):
+        app, exporter, _ = app
+        timing = TestClient(app).get("/async").headers["server-timing"]
+        assert "remote;dur=" in timing
+
+    def test_exported_as_otlp_json(self, app):
+        app, exporter, path = app
+        TestClient(app).get("/sync/5")
+        assert not path.exists()  # Written by the exporter thread, not the request
+        assert exporter.run_once() == 1
+
+        document = json.loads(path.read_text().splitlines()[0])
+        spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = spans[0]
+        assert root["name"] == "GET /sync/{item_id}"
+        assert "parentSpanId" not in root and len(root["traceId"]) == 32
+        assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+        assert {"key": "request.id", "value": {"stringValue": "req-abc"}} in root["attributes"]
+        assert {s["name"] for s in spans[1:]} == {"sql", "lookup"}
+        assert all(s["parentSpanId"] == root["spanId"] for s in spans[1:])
+        assert all(int(s["endTimeUnixNano"]) >= int(s["startTimeUnixNano"]) for s in spans)
+
+    def test_export_queue_bounded(self):
+        exporter = SpanExporter(path="unused.jsonl", url="", queue_size=1)
+        assert exporter.export(finish_trace(start_trace()))
+        assert not exporter.export(finish_trace(start_trace()))
+        assert not SpanExporter(path="", url="").export(finish_trace(start_trace()))
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+
+def run_benchmark(calls: int = 200000):
+    """Per-call overhead of traced() outside and inside a trace, in microseconds"""
+    def plain(value):
+        return value
+
+    wrapped = traced("bench")(plain)
+    results = {}
+    for label, func in (("plain", plain), ("traced_idle", wrapped)):
+        started = time.perf_counter()
+        for i in range(calls):
+            func(i)
+        results[label] = (time.perf_counter() - started) / calls * 1e6
+
+    trace = start_trace()
+    started = time.perf_counter()
+    for i in range(calls):
+        wrapped(i)
+    results["traced_active"] = (time.perf_counter() - started) / calls * 1e6
+    finish_trace(trace)
+    return results
+
+
+@pytest.mark.slow
+def test_benchmark_idle_overhead_small():
+    results = run_benchmark(calls=50000)
+    assert results["traced_idle"] < 5
+    assert results["traced_active"] < 50
+
+
+if __name__ == "__main__":
+    for label, us in run_benchmark().items():
+        print(f"{label:14s} {us:6.2f} us/call")
@@ -0,0 +1,125 @@
+"""
+TTL/LRU Cache Tests
+
+Covers common.ttl_cache:
+- LRU eviction, TTL and value-driven expiry
+- Loads racing an invalidation not stored (generation counter)
+- Keys queued on a session applied on commit; discarded or applied on
+  rollback, savepoints leaving the queue to the outer transaction
+"""
+import os
+import sys
+from dataclasses import dataclass
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.dirname(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from common.ttl_cache import CommitInvalidation, TtlLruCache
+
+
+@dataclass(frozen=True)
+class Item:
+    item_id: int
+    stale: bool = False
+
+
+def _cache(**kwargs) -> TtlLruCache:
+    options = {"ttl_seconds": 60, "max_entries": 10, "key": lambda item: item.item_id}
+    options.update(kwargs)
+    return TtlLruCache(**options)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    session = Session(bind=engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestTtlLruCache:
+    """Entries, expiry and generations"""
+
+    def test_lru_eviction(self):
+        cache = _cache(max_entries=2)
+        cache.set(Item(1))
+        cache.set(Item(2))
+        cache.get(1)
+        cache.set(Item(3))
+        assert cache.get(2) is None
+        assert (cache.get(1), cache.get(3)) == (Item(1), Item(3))
+
+    def test_ttl_and_value_expiry(self):
+        expired = _cache(ttl_seconds=0)
+        assert expired.set(Item(1)) == Item(1)
+        assert expired.get(1) is None
+
+        cache = _cache(expired=lambda item: item.stale)
+        cache.set(Item(1, stale=True))
+        cache.set(Item(2))
+        assert cache.get(1) is None
+        assert cache.get(2) == Item(2)
+
+    def test_load_racing_invalidation_not_stored(self):
+        cache = _cache()
+        generation = cache.generation()
+        cache.invalidate([1])
+        assert cache.set(Item(1), generation) == Item(1)
+        assert cache.get(1) is None
+
+        cache.set(Item(1), cache.generation())
+        assert cache.get(1) == Item(1)
+
+    def test_invalidate_where_and_clear(self):
+        cache = _cache()
+        for item_id in range(4):
+            cache.set(Item(item_id))
+        cache.invalidate_where(lambda item: item.item_id % 2 == 0)
+        assert [cache.get(item_id) is not None for item_id in range(4)] == [False, True, False, True]
+
+        generation = cache.generation()
+        cache.clear()
+        assert cache.get(1) is None
+        assert cache.generation() == generation + 1
+
+
+class TestCommitInvalidation:
+    """Session queues"""
+
+    def test_applied_after_commit(self, session):
+        applied = []
+        pending = CommitInvalidation("test_ttl_cache_commit", applied.append)
+        session.execute(text("SELECT 1"))
+        pending.queue(session, [1, 2])
+        assert applied == []
+        session.commit()
+        assert applied == [{1, 2}]
+        session.commit()
+        assert applied == [{1, 2}]
+
+    def test_rollback_applies_or_discards(self, session):
+        applied, discarded = [], []
+        CommitInvalidation("test_ttl_cache_rollback_apply", applied.append).queue(session, [1])
+        CommitInvalidation(
+            "test_ttl_cache_rollback_discard", discarded.append, apply_on_rollback=False
+        ).queue(session, [2])
+        session.execute(text("SELECT 1"))
+        session.rollback()
+        session.commit()
+        assert (applied, discarded) == ([{1}], [])
+
+    def test_savepoint_rollback_keeps_queue(self, session):
+        applied = []
+        pending = CommitInvalidation("test_ttl_cache_savepoint", applied.append, apply_on_rollback=False)
+        session.execute(text("SELECT 1"))
+        pending.queue(session, [1])
+        savepoint = session.begin_nested()
+        savepoint.rollback()
+        session.commit()
+        assert applied == [{1}]
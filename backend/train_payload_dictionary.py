@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Train and activate a payload compression dictionary (log.PayloadDictionary)
+from recently captured API payloads.
+
+Run after enabling payload capture, and again when request/response shapes
+change substantially. Older dictionaries stay readable.
+
+Usage:
+    python train_payload_dictionary.py [--samples 2000] [--size 16384]
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.database import LogSessionLocal
+from common.payload_codec import CODEC_NAMES, DEFAULT_DICTIONARY_BYTES, default_codec, train_payload_dictionary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a payload compression dictionary")
+    parser.add_argument("--samples", type=int, default=2000, help="Recent requests to sample")
+    parser.add_argument("--size", type=int, default=DEFAULT_DICTIONARY_BYTES, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    db = LogSessionLocal()
+    try:
+        dictionary_id = train_payload_dictionary(db, sample_limit=args.samples, size=args.size)
+    finally:
+        db.close()
+
+    if dictionary_id is None:
+        print("Not enough captured payloads to train a dictionary")
+        return 1
+    print(f"Activated {CODEC_NAMES[default_codec()]} payload dictionary {dictionary_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())